@@ -6,37 +6,35 @@ Application Flask - Fichier d'initialisation principal
 
 import os
 import sys
-from flask import Flask, g, redirect, url_for, request_started, request_finished, current_app, render_template
+from flask import Flask, g, redirect, url_for, request, request_started, request_finished, current_app, render_template
 from flask_login import LoginManager, current_user
 from dotenv import load_dotenv
 from pathlib import Path
-from config import DB_CONFIG
+from config import DB_CONFIG, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLING, SQL_INSTRUMENTATION, SQL_BARRE_DEBUG, SQL_SEUIL_LENT_MS, MEMO_REQUETE
+from config import USE_X_SENDFILE, X_ACCEL_REDIRECT, UPLOADS_MAX_AGE, COMPRESSION, COMPRESSION_SEUIL, APP_VERSION
+from config import ADMIN_EMAILS
 import pymysql
 import pymysql.cursors
 import logging
-from logging.handlers import RotatingFileHandler
+from app.utils.journalisation import configurer_journalisation, niveaux_depuis_texte
+from app.utils import instrumentation_sql
+from app.utils import assets_statiques
+from app.utils import reponses_conditionnelles
+from app.utils import compression
 
 # Charge les variables d'environnement avec chemin absolu
 env_path = Path('/var/www/webroot/ROOT') / '.env'
 load_dotenv(dotenv_path=env_path)
 
 # --- Configuration de la journalisation ---
+# Écriture disque dans un thread dédié (QueueListener), niveaux par module depuis config.py
 log_dir = os.path.join('/var/www/webroot/ROOT', 'logs')
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-file_handler = RotatingFileHandler(
-    os.path.join(log_dir, 'app.log'),
-    maxBytes=1024 * 1024 * 10,  # 10 Mo
-    backupCount=10
+configurer_journalisation(
+    log_dir,
+    niveau=LOG_LEVEL,
+    niveaux_modules=niveaux_depuis_texte(LOG_LEVELS),
+    taux_echantillonnage=LOG_SAMPLING
 )
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-file_handler.setLevel(logging.INFO)
-
-root_logger = logging.getLogger()
-root_logger.addHandler(file_handler)
-root_logger.setLevel(logging.INFO)
 
 # Initialisation Flask
 app = Flask(__name__)
@@ -47,6 +45,23 @@ app.secret_key = os.environ.get('SECRET_KEY', 'votre-cle-secrete-tres-longue-et-
 
 # Configuration de la base de données avec PyMySQL
 app.config['DB_CONFIG'] = DB_CONFIG
+app.config['SQL_INSTRUMENTATION'] = SQL_INSTRUMENTATION
+app.config['SQL_BARRE_DEBUG'] = SQL_BARRE_DEBUG
+app.config['MEMO_REQUETE'] = MEMO_REQUETE
+app.config['ADMIN_EMAILS'] = {email.strip().lower() for email in ADMIN_EMAILS.split(',') if email.strip()}
+instrumentation_sql.agregateur.seuil_lent = SQL_SEUIL_LENT_MS / 1000
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
+app.config['X_ACCEL_REDIRECT'] = X_ACCEL_REDIRECT
+
+# Assets empreintés et précompressés (build : python app/utils/assets_statiques.py)
+assets_statiques.installer(app)
+# Version incluse dans les ETag des pages : un déploiement invalide les pages en cache
+app.config['APP_VERSION'] = APP_VERSION or reponses_conditionnelles.version_application(app.root_path)
+
+# Compression des réponses : déclarée avant les autres after_request pour s'exécuter en dernier
+app.config['COMPRESSION'] = COMPRESSION
+app.config['COMPRESSION_SEUIL'] = COMPRESSION_SEUIL
+compression.installer(app)
 
 # Configuration Flask-Login
 login_manager = LoginManager()
@@ -67,6 +82,16 @@ def load_user(user_id):
         import pymysql
         from pymysql.cursors import DictCursor
 
+        if DB_CONFIG.get('backend') == 'sqlite':
+            from app.models import DatabaseManager, Utilisateur
+            with DatabaseManager(DB_CONFIG).get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, nom, prenom, email, mot_de_passe FROM utilisateurs WHERE id = %s",
+                    (user_id,)
+                )
+                row = cursor.fetchone()
+            return Utilisateur(**row) if row else None
+
         config = DB_CONFIG.copy()
         # Convertir le cursorclass de chaîne en classe réelle
         config['cursorclass'] = DictCursor
@@ -106,8 +131,18 @@ def secure_uploads(filename):
     if any(filename.lower().endswith(ext) for ext in dangerous_ext):
         from flask import abort
         abort(403)
-    from flask import send_from_directory
-    return send_from_directory(os.path.join(app.static_folder, 'uploads'), filename)
+    # Fichiers privés et noms réutilisés (user_123.png) : cache court, revalidation par ETag
+    return assets_statiques.envoyer_fichier(os.path.join(app.static_folder, 'uploads'), filename,
+                                            max_age=UPLOADS_MAX_AGE, prive=True)
+# Base SQLite : le schéma est créé au démarrage (CREATE TABLE IF NOT EXISTS) ;
+# MySQL : les tables, colonnes et index ajoutés depuis la mise en service sont appliqués
+# (DatabaseManager.migrer_schema : TABLES_AJOUTEES, COLONNES_AJOUTEES, INDEX_AJOUTES)
+from app.models import DatabaseManager
+if DB_CONFIG.get('backend') == 'sqlite':
+    DatabaseManager(DB_CONFIG).create_tables()
+else:
+    DatabaseManager(DB_CONFIG).migrer_schema()
+
 # Enregistrement des blueprints
 app.register_blueprint(auth.bp)
 app.register_blueprint(admin.bp)
@@ -177,14 +212,43 @@ def init_db_managers():
     from app.models import DatabaseManager, ModelManager
     try:
         g.db_manager = DatabaseManager(app.config['DB_CONFIG'])
-        logging.info("✅ DatabaseManager créé")
-        g.models = ModelManager(g.db_manager)
-        logging.info("✅ ModelManager créé avec succès")
+        g.models = ModelManager(g.db_manager, memoiser=app.config['MEMO_REQUETE'])
+        logging.debug("DatabaseManager et ModelManager créés pour %s", request.path)
     except Exception as e:
         logging.error(f"❌ Échec création ModelManager: {e}", exc_info=True)
         g.db_manager = None
         g.models = None
 
+# --- Instrumentation SQL par requête ---
+@app.before_request
+def demarrer_instrumentation_sql():
+    if app.config['SQL_INSTRUMENTATION']:
+        instrumentation_sql.demarrer_mesure()
+
+@app.after_request
+def exposer_instrumentation_sql(response):
+    mesure = instrumentation_sql.mesure_courante()
+    if mesure is None:
+        return response
+    # Détails internes (temps SQL, nombre de requêtes) : jamais exposés aux visiteurs
+    if not (app.debug or (current_user.is_authenticated and current_user.is_admin)):
+        return response
+    response.headers['Server-Timing'] = instrumentation_sql.entete_server_timing(mesure)
+    response.headers['X-SQL-Queries'] = str(mesure.nb_requetes)
+    if (app.config['SQL_BARRE_DEBUG'] or app.debug) and response.mimetype == 'text/html' \
+            and not response.is_streamed and not response.direct_passthrough:
+        corps = response.get_data(as_text=True)
+        if '</body>' in corps:
+            barre = instrumentation_sql.barre_debug_html(mesure, request.endpoint)
+            response.set_data(corps.replace('</body>', barre + '</body>', 1))
+    return response
+
+@app.teardown_request
+def enregistrer_instrumentation_sql(exception=None):
+    mesure = instrumentation_sql.terminer_mesure()
+    if mesure is not None:
+        instrumentation_sql.agregateur.enregistrer(request.endpoint, mesure, mesure.duree_totale())
+
 @app.teardown_appcontext
 def close_db_managers(exception=None):
     if hasattr(g, 'db_manager') and g.db_manager is not None:
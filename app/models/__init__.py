@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modèles de données pour la gestion bancaire
+Classes pour manipuler les banques, comptes et sous-comptes
+
+Le paquet est découpé par domaine (comptes, transactions, comptabilite, paie,
+heures, planning, parametres, recherche). Seuls DatabaseManager, Utilisateur, VersionDonnees
+et ModelManager sont importés avec le paquet ; les autres classes restent
+accessibles par `from app.models import X` mais leur sous-module n'est chargé
+qu'au premier accès (PEP 562).
+"""
+from .base import DatabaseManager, Utilisateur, VersionDonnees
+from .gestionnaire import EMPLACEMENTS, ModelManager, charger_classe
+
+__all__ = ['ModelManager', *EMPLACEMENTS]
+
+
+def __getattr__(nom: str):
+    if nom in EMPLACEMENTS:
+        classe = charger_classe(nom)
+        globals()[nom] = classe
+        return classe
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EMPLACEMENTS))
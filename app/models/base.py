@@ -0,0 +1,1333 @@
+"""
+Accès à la base (DatabaseManager), utilisateur connecté et compteurs de version des données.
+"""
+from dbutils.pooled_db import PooledDB
+import pymysql
+from pymysql import Error
+import uuid
+from datetime import datetime
+import time
+from typing import List, Dict, Optional, Tuple, Any
+from contextlib import contextmanager
+from flask import current_app
+from flask_login import UserMixin
+import logging
+
+from ..utils.instrumentation_sql import mesure_courante, CurseurInstrumente
+from ..utils.memo_requete import CurseurSuiviEcritures
+from ..utils.stockage_sqlite import obtenir_stockage
+from ..utils.lignes import construire_lignes
+
+logger = logging.getLogger(__name__)
+
+
+class Utilisateur(UserMixin):
+    def __init__(self, id, nom=None, prenom=None, email=None, mot_de_passe=None):
+        self.id = id
+        self.nom = nom
+        self.prenom = prenom
+        self.email = email
+        self.mot_de_passe = mot_de_passe
+
+    # Méthodes requises par Flask-Login
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_active(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def is_admin(self):
+        """Administrateur : email présent dans ADMIN_EMAILS (config.py)"""
+        return bool(self.email) and self.email.strip().lower() in current_app.config.get('ADMIN_EMAILS', ())
+
+    @staticmethod
+    def get_by_id(user_id: int, db):
+        try:
+            with db.get_cursor(dictionary=True) as cursor:
+                query = "SELECT id, nom, prenom, email, mot_de_passe FROM utilisateurs WHERE id = %s"
+                cursor.execute(query, (user_id,))
+                row = cursor.fetchone()
+                if row:
+                    # On envoie l'ID en premier pour correspondre au nouveau __init__
+                    return Utilisateur(row['id'], row['nom'], row['prenom'], row['email'], row['mot_de_passe'])
+                return None
+        except Exception as e:
+            # Note: évite logger ici pour ne pas relancer la récursion
+            print(f"Erreur lors de la récupération de l'utilisateur: {e}")
+            return None
+
+    @staticmethod
+    def get_by_email(email: str, db):
+        """
+        Récupère un utilisateur par email.
+        :param email: l'email de l'utilisateur
+        :param db: instance de DatabaseManager (ou objet avec méthode get_cursor())
+        :return: instance Utilisateur ou None
+        """
+        if db is None:
+            return None
+        try:
+            with db.get_cursor(dictionary=True) as cursor:
+                cursor.execute(
+                    "SELECT id, nom, prenom, email, mot_de_passe FROM utilisateurs WHERE email = %s",
+                    (email,)
+                )
+                row = cursor.fetchone()
+                if row:
+                    return Utilisateur(
+                        row['id'],
+                        row['nom'],
+                        row['prenom'],
+                        row['email'],
+                        row['mot_de_passe']
+                    )
+                return None
+        except Exception as e:
+            print(f"Erreur lors de la récupération de l'utilisateur par email: {e}")
+            return None
+
+    @staticmethod
+    def create(nom: str, prenom: str, email: str, mot_de_passe: str, db):
+        """
+        Crée un nouvel utilisateur dans la base de données.
+        """
+        if db is None:
+            return False
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO utilisateurs (nom, prenom, email, mot_de_passe)
+                    VALUES (%s, %s, %s, %s)
+                """, (nom, prenom, email, mot_de_passe))
+                user_id = cursor.lastrowid
+                logger.info("Utilisateur créé avec ID: %s", user_id)
+            return user_id
+        except Exception as e:
+            logger.error(f"Erreur création utilisateur : {e}")
+            return False
+
+
+class DatabaseManager:
+    """
+    Gère la connexion à la base de données en utilisant un pool de connexions
+    pour une gestion plus robuste et performante, avec la bibliothèque pymysql.
+    Avec backend='sqlite' dans la configuration, les curseurs viennent d'un fichier
+    SQLite local (app/utils/stockage_sqlite.py) et aucun serveur MySQL n'est requis.
+    """
+    def __init__(self, db_config):
+        self.db_config = db_config
+        self._connection_pool = None
+        self._stockage_sqlite = obtenir_stockage(db_config['path']) if db_config.get('backend') == 'sqlite' else None
+        # Requêtes d'écriture passées par les curseurs (invalide le mémo de requête de ModelManager)
+        self.nb_ecritures = 0
+
+
+    def _get_connection_pool(self):
+        """Initialise et retourne le pool de connexions avec DBUtils."""
+        if self._connection_pool is None:
+            logger.info("Initialisation du pool de connexions avec DBUtils...")
+            try:
+                self._connection_pool = PooledDB(
+                    creator=pymysql,
+                    maxconnections=5,
+                    mincached=2,
+                    maxcached=5,
+                    maxshared=0,
+                    blocking=True,
+                    maxusage=None,
+                    setsession=None,
+                    reset=True,
+                    failures=None,
+                    ping=1,
+                    **self.db_config
+                )
+                logger.info("Pool de connexions DBUtils initialisé avec succès.")
+            except Error as err:
+                logger.error(f"Erreur lors de l'initialisation du pool de connexions : {err}")
+                self._connection_pool = None
+        return self._connection_pool
+    def close_connection(self):
+        """
+        Ferme le pool de connexions.
+        Cette méthode est optionnelle car DBUtils gère normalement la fermeture automatiquement.
+        Les connexions SQLite, une par thread, restent ouvertes d'une requête à l'autre.
+        """
+        if self._connection_pool is not None:
+            self._connection_pool.close()
+            self._connection_pool = None
+            logger.info("Pool de connexions fermé")
+    
+    def close(self):
+        """Alias pour close_connection pour compatibilité"""
+        self.close_connection()
+    @contextmanager
+    def get_cursor(self, dictionary=False, commit=True, tuples=False):
+        """
+        Fournit un curseur de base de données depuis le pool.
+        Gère automatiquement la connexion et la fermeture des ressources.
+
+        :param dictionary: Si True, retourne un curseur de type dictionnaire
+        :param commit: Si True, commit la transaction après l'exécution
+        :param tuples: Si True, lignes en tuples bruts quelle que soit la configuration (voir lire_lignes)
+        """
+        if self._stockage_sqlite is not None:
+            with self._stockage_sqlite.curseur(tuples=tuples) as cursor:
+                yield self._envelopper(cursor, mesure_courante())
+            return
+
+        connection = None
+        cursor = None
+        try:
+            pool = self._get_connection_pool()
+            if not pool:
+                raise RuntimeError("Impossible d'obtenir une connexion à la base de données.")
+
+            # Obtient une connexion du pool (attente mesurée si l'instrumentation est active)
+            mesure = mesure_courante()
+            debut_attente = time.perf_counter()
+            connection = pool.connection()
+            if mesure is not None:
+                mesure.ajouter_attente_pool(time.perf_counter() - debut_attente)
+
+            # Crée un curseur (dictionnaire si nécessaire)
+            if tuples:
+                cursor = connection.cursor(pymysql.cursors.Cursor)
+            else:
+                cursor = connection.cursor(pymysql.cursors.DictCursor) if dictionary else connection.cursor()
+
+            yield self._envelopper(cursor, mesure)
+
+            # Commit la transaction après une exécution réussie si commit=True
+            if commit:
+                connection.commit()
+        except Exception as e:
+            logger.error(f"Erreur dans le gestionnaire de curseur : {e}", exc_info=True)
+            if connection:
+                try:
+                    connection.rollback()  # Annule les changements en cas d'erreur
+                except Exception as rollback_error:
+                    logger.error(f"Erreur lors du rollback : {rollback_error}", exc_info=True)
+            raise  # Relance l'exception
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception as close_error:
+                    logger.error(f"Erreur lors de la fermeture du curseur : {close_error}", exc_info=True)
+            if connection:
+                try:
+                    connection.close()  # Retourne la connexion au pool
+                except Exception as close_error:
+                    logger.error(f"Erreur lors de la fermeture de la connexion : {close_error}", exc_info=True)
+
+    def _envelopper(self, cursor, mesure):
+        """Curseur suivi (écritures comptées), chronométré si l'instrumentation est active"""
+        if mesure is not None:
+            cursor = CurseurInstrumente(cursor, mesure)
+        return CurseurSuiviEcritures(cursor, self)
+
+    def lire_lignes(self, query: str, params=None, mode: str = 'slots',
+                    convertisseurs: Optional[Dict[str, Any]] = None, nom: str = 'Ligne', cursor=None) -> List:
+        """
+        Lecture volumineuse sans dict par ligne (voir app/utils/lignes.py).
+
+        :param mode: 'slots' (enregistrements à __slots__, accès ligne['col'] ou ligne.col) ou 'tuple'
+        :param convertisseurs: {colonne: fonction} appliqués colonne par colonne
+        :param cursor: curseur ouvert avec tuples=True à réutiliser (sinon un curseur est ouvert)
+        """
+        if cursor is None:
+            with self.get_cursor(tuples=True) as cursor:
+                return self.lire_lignes(query, params, mode, convertisseurs, nom, cursor)
+        cursor.execute(query, params)
+        colonnes = [colonne[0] for colonne in cursor.description or ()]
+        return construire_lignes(cursor.fetchall(), colonnes, mode, convertisseurs, nom)
+
+    def create_tables(self):
+        """
+        Crée toutes les tables de la base de données si elles n'existent pas.
+        """
+        logger.info("Vérification et création des tables de la base de données...")
+        try:
+            # Utilisation du gestionnaire de contexte pour la création des tables.
+            with self.get_cursor() as cursor:
+
+                # Table utilisateurs
+                create_users_table_query = """
+                CREATE TABLE IF NOT EXISTS utilisateurs (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nom VARCHAR(255) NOT NULL,
+                    prenom VARCHAR(255) NOT NULL,
+                    email VARCHAR(255) NOT NULL UNIQUE,
+                    mot_de_passe VARCHAR(255) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+                cursor.execute(create_users_table_query)
+
+                # Table PeriodeFavorite
+                create_periode_favorite_table_query = """
+                CREATE TABLE IF NOT EXISTS periode_favorite (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    compte_id INT NOT NULL,
+                    compte_type ENUM('principal','sous_compte') NOT NULL,
+                    nom VARCHAR(255) NOT NULL,
+                    date_debut DATE NOT NULL,
+                    date_fin DATE NOT NULL,
+                    statut ENUM('active','inactive') DEFAULT 'active',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_periode_favorite_table_query)
+
+                # Table banques
+                create_banques_table_query = """
+                CREATE TABLE IF NOT EXISTS banques (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nom VARCHAR(255) NOT NULL,
+                    code_banque VARCHAR(50) UNIQUE,
+                    pays VARCHAR(100) DEFAULT 'Suisse',
+                    couleur VARCHAR(7) DEFAULT '#3498db',
+                    site_web VARCHAR(255),
+                    logo_url VARCHAR(255),
+                    actif BOOLEAN DEFAULT TRUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+                cursor.execute(create_banques_table_query)
+
+                # Table comptes_principaux
+                create_comptes_table_query = """
+                CREATE TABLE IF NOT EXISTS comptes_principaux (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    utilisateur_id INT NOT NULL,
+                    banque_id INT NOT NULL,
+                    nom_compte VARCHAR(255) NOT NULL,
+                    numero_compte VARCHAR(255),
+                    iban VARCHAR(34),
+                    bic VARCHAR(11),
+                    type_compte ENUM('courant', 'epargne', 'compte_jeune', 'autre') DEFAULT 'courant',
+                    solde DECIMAL(15,2) DEFAULT 0.00,
+                    solde_initial DECIMAL(15,2) DEFAULT 0.00,
+                    devise VARCHAR(3) DEFAULT 'CHF',
+                    date_ouverture DATE,
+                    actif BOOLEAN DEFAULT TRUE,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id),
+                    FOREIGN KEY (banque_id) REFERENCES banques(id)
+                );
+                """
+                cursor.execute(create_comptes_table_query)
+
+                # Table sous_comptes
+                create_sous_comptes_table_query = """
+                CREATE TABLE IF NOT EXISTS sous_comptes (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    compte_principal_id INT NOT NULL,
+                    nom_sous_compte VARCHAR(255) NOT NULL,
+                    description TEXT,
+                    objectif_montant DECIMAL(15,2),
+                    solde DECIMAL(15,2) DEFAULT 0.00,
+                    solde_initial DECIMAL(15,2) DEFAULT 0.00,
+                    utilisateur_id INT,
+                    couleur VARCHAR(7) DEFAULT '#28a745',
+                    icone VARCHAR(50) DEFAULT 'piggy-bank',
+                    date_objectif DATE,
+                    actif BOOLEAN DEFAULT TRUE,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (compte_principal_id) REFERENCES comptes_principaux(id)
+                );
+                """
+                cursor.execute(create_sous_comptes_table_query)
+
+                # Table transactions
+                create_transactions_table_query = """
+                CREATE TABLE IF NOT EXISTS transactions (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    compte_principal_id INT,
+                    sous_compte_id INT,
+                    compte_source_id INT,
+                    sous_compte_source_id INT,
+                    compte_destination_id INT,
+                    sous_compte_destination_id INT,
+                    type_transaction ENUM('depot', 'retrait', 'transfert_entrant', 'transfert_sortant', 'transfert_externe', 'recredit_annulation', 'transfert_compte_vers_sous', 'transfert_sous_vers_compte') NOT NULL,
+                    montant DECIMAL(15,2) NOT NULL,
+                    description TEXT,
+                    reference VARCHAR(100),
+                    utilisateur_id INT NOT NULL,
+                    date_transaction DATETIME NOT NULL,
+                    solde_apres DECIMAL(15,2),
+                    reference_transfert VARCHAR(100),
+                    statut_comptable ENUM('a_comptabiliser', 'comptabilise', 'ne_pas_comptabiliser') DEFAULT 'a_comptabiliser',
+                    empreinte_import CHAR(40),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_transactions_utilisateur_date (utilisateur_id, date_transaction),
+                    FOREIGN KEY (compte_principal_id) REFERENCES comptes_principaux(id),
+                    FOREIGN KEY (sous_compte_id) REFERENCES sous_comptes(id),
+                    FOREIGN KEY (compte_source_id) REFERENCES comptes_principaux(id),
+                    FOREIGN KEY (sous_compte_source_id) REFERENCES sous_comptes(id),
+                    FOREIGN KEY (compte_destination_id) REFERENCES comptes_principaux(id),
+                    FOREIGN KEY (sous_compte_destination_id) REFERENCES sous_comptes(id),
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_transactions_table_query)
+
+                # Table categories_transactions
+                create_categories_table_query = """
+                CREATE TABLE IF NOT EXISTS categories_transactions (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    utilisateur_id INT NOT NULL,
+                    nom VARCHAR(100) NOT NULL,
+                    description TEXT,
+                    type_categorie ENUM('Revenu', 'Dépense', 'Transfert') NOT NULL DEFAULT 'Dépense',
+                    couleur VARCHAR(7) DEFAULT '#007bff',
+                    icone VARCHAR(50),
+                    budget_mensuel DECIMAL(15,2) DEFAULT 0,
+                    actif BOOLEAN DEFAULT TRUE,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id),
+                    UNIQUE KEY unique_categorie_user (utilisateur_id, nom, type_categorie)
+                );
+                """
+                cursor.execute(create_categories_table_query)
+
+                # table transactions_categories
+                create_transactions_categories_table_query = """
+                CREATE TABLE IF NOT EXISTS transaction_categories (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    transaction_id INT NOT NULL,
+                    categorie_id INT NOT NULL,
+                    utilisateur_id INT NOT NULL,
+                    date_association TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (transaction_id) REFERENCES transactions(id) ON DELETE CASCADE,
+                    FOREIGN KEY (categorie_id) REFERENCES categories_transactions(id) ON DELETE CASCADE,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id),
+                    UNIQUE KEY unique_transaction_categorie (transaction_id, categorie_id)
+                );
+                """
+                cursor.execute(create_transactions_categories_table_query)
+
+                # Table regles_categorisation (catégorisation automatique à l'import)
+                cursor.execute(self.DDL_REGLES_CATEGORISATION)
+                # Table transferts_externes
+                create_transferts_externes_table_query = """
+                CREATE TABLE IF NOT EXISTS transferts_externes (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    transaction_id INT NOT NULL,
+                    iban_dest VARCHAR(34) NOT NULL,
+                    bic_dest VARCHAR(11),
+                    nom_dest VARCHAR(255) NOT NULL,
+                    montant DECIMAL(15,2) NOT NULL,
+                    devise VARCHAR(3) DEFAULT 'EUR',
+                    statut ENUM('pending', 'processed', 'cancelled') DEFAULT 'pending',
+                    date_demande TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    date_traitement TIMESTAMP NULL,
+                    FOREIGN KEY (transaction_id) REFERENCES transactions(id)
+                );
+                """
+                cursor.execute(create_transferts_externes_table_query)
+
+                # Table categories_comptables
+                create_categories_table_query = """
+                CREATE TABLE IF NOT EXISTS categories_comptables (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    numero VARCHAR(10) NOT NULL UNIQUE,
+                    nom VARCHAR(255) NOT NULL,
+                    parent_id INT,
+                    utilisateur_id INT,
+                    type_compte ENUM('Actif', 'Passif', 'Charge', 'Revenus') NOT NULL,
+                    compte_systeme BOOLEAN DEFAULT FALSE,
+                    compte_associe VARCHAR(10),
+                    categorie_complementaire_id INT,
+                    type_ecriture_complementaire VARCHAR(50),
+                    type_tva ENUM('taux_plein', 'taux_reduit', 'taux_zero', 'exonere') DEFAULT 'taux_plein',
+                    actif BOOLEAN DEFAULT TRUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                );
+                """
+                cursor.execute(create_categories_table_query)
+
+                # Table contacts
+                create_contacts_table_query = """
+                CREATE TABLE IF NOT EXISTS contacts (
+                    id_contact INT AUTO_INCREMENT PRIMARY KEY,
+                    nom VARCHAR(255) NOT NULL,
+                    email VARCHAR(255),
+                    telephone VARCHAR(20),
+                    adresse TEXT,
+                    code_postal VARCHAR(10),
+                    ville VARCHAR(100),
+                    pays VARCHAR(100),
+                    utilisateur_id INT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_contacts_table_query)
+
+
+                # Table contact plan
+                create_contact_plans_table_query = """
+                CREATE TABLE IF NOT EXISTS contact_plans(
+                contact_id INT NOT NULL,
+                plan_id INT NOT NULL,
+                PRIMARY KEY (contact_id, plan_id),
+                FOREIGN KEY (contact_id) REFERENCES contacts(id_contact) ON DELETE CASCADE,
+                FOREIGN KEY (plan_id) REFERENCES plans_comptables(id) ON DELETE CASCADE
+                )
+                """
+                cursor.execute(create_contact_plans_table_query)
+
+
+                #Table ecritures_comptables
+                create_ecritures_table_query = """
+                CREATE TABLE IF NOT EXISTS ecritures_comptables (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    date_ecriture DATE NOT NULL,
+                    compte_bancaire_id INT NOT NULL,
+                    sous_compte_id INT,
+                    categorie_id INT NOT NULL,
+                    montant DECIMAL(15,2) NOT NULL,
+                    montant_htva DECIMAL(15,2) NOT NULL,
+                    devise VARCHAR(3) DEFAULT 'CHF',
+                    description TEXT,
+                    id_contact INT,
+                    reference VARCHAR(100),
+                    type_ecriture ENUM('depense', 'recette') NOT NULL,
+                    type_ecriture_comptable VARCHAR(50),
+                    ecriture_principale_id INT,
+                    transaction_id INT,
+                    tva_taux DECIMAL(5,2),
+                    tva_montant DECIMAL(15,2),
+                    utilisateur_id INT NOT NULL,
+                    justificatif_url VARCHAR(255),
+                    nom_fichier VARCHAR(255),
+                    type_mime VARCHAR(100),
+                    taille_fichier INT,
+                    fichier_joint LONGBLOB,
+                    statut ENUM('pending', 'validée', 'rejetée') DEFAULT 'pending',
+                    date_validation TIMESTAMP NULL,
+                    date_suppression TIMESTAMP NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_ecritures_transaction (transaction_id),
+
+                    FOREIGN KEY (compte_bancaire_id) REFERENCES comptes_principaux(id),
+                    FOREIGN KEY (sous_compte_id) REFERENCES sous_comptes(id),
+                    FOREIGN KEY (categorie_id) REFERENCES categories_comptables(id),
+                    FOREIGN KEY (id_contact) REFERENCES contacts(id_contact),
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_ecritures_table_query)
+
+                # Table cumuls_comptables (sommes mensuelles tenues à jour par EcritureComptable)
+                cursor.execute(self.DDL_CUMULS_COMPTABLES)
+
+                # Table Plan comptable
+                create_plan_comptable_table_query = """
+                CREATE TABLE IF NOT EXISTS plans_comptables (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nom VARCHAR(100) NOT NULL,
+                    description TEXT,
+                    devise VARCHAR(3) DEFAULT 'CHF',
+                    utilisateur_id INT NOT NULL,
+                    actif TINYINT(1) DEFAULT 1,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id) ON DELETE CASCADE
+                );
+                """
+                cursor.execute(create_plan_comptable_table_query)
+
+                # Table plan_category
+                create_plan_categorie_table_query = """
+                CREATE TABLE IF NOT EXISTS plan_categorie (
+                    plan_id INT NOT NULL,
+                    categorie_id INT NOT NULL,
+                    PRIMARY KEY (plan_id, categorie_id),
+                    FOREIGN KEY (plan_id) REFERENCES plans_comptables(id) ON DELETE CASCADE,
+                    FOREIGN KEY (categorie_id) REFERENCES categories_comptables(id) ON DELETE CASCADE
+                );
+                """
+                cursor.execute(create_plan_categorie_table_query)
+
+
+                # Table contactCompte
+                create_contact_compte_table_query = """
+                CREATE TABLE IF NOT EXISTS contact_comptes (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    contact_id INT NOT NULL,
+                    compte_id INT NOT NULL,
+                    utilisateur_id INT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+                    -- Clés étrangères
+                    FOREIGN KEY (contact_id) REFERENCES contacts(id_contact) ON DELETE CASCADE,
+                    FOREIGN KEY (compte_id) REFERENCES comptes_principaux(id) ON DELETE CASCADE,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id) ON DELETE CASCADE,
+
+                    -- Contrainte d'unicité : un utilisateur ne peut lier un contact à un compte qu'une seule fois
+                    UNIQUE KEY unique_contact_compte_user (contact_id, compte_id, utilisateur_id),
+
+                    -- Index pour les recherches fréquentes
+                    INDEX idx_contact_user (contact_id, utilisateur_id),
+                    INDEX idx_compte_user (compte_id, utilisateur_id)
+                );
+                """
+                cursor.execute(create_contact_compte_table_query)
+
+                # Table parametres_utilisateur
+                create_parametres_table_query = """
+                CREATE TABLE IF NOT EXISTS parametres_utilisateur (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    utilisateur_id INT NOT NULL UNIQUE,
+                    devise_principale VARCHAR(3) DEFAULT 'CHF',
+                    theme ENUM('clair', 'sombre') DEFAULT 'clair',
+                    notifications_email BOOLEAN DEFAULT TRUE,
+                    alertes_solde BOOLEAN DEFAULT TRUE,
+                    seuil_alerte_solde DECIMAL(15,2) DEFAULT 500.00,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_parametres_table_query)
+
+                # Table heures_travail
+                create_heures_travail_table_query = """
+                CREATE TABLE IF NOT EXISTS heures_travail (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    date DATE NOT NULL,
+                    user_id INT NOT NULL,
+                    employe_id INT NULL,
+                    h1d TIME,
+                    h1f TIME,
+                    h2d TIME,
+                    h2f TIME,
+                    total_h DECIMAL(5,2),
+                    type_heures ENUM('reelles', 'simulees') NOT NULL DEFAULT 'reelles',
+                    vacances BOOLEAN DEFAULT FALSE,
+                    jour_semaine VARCHAR(10),
+                    semaine_annee INT,
+                    mois INT,
+                    employeur VARCHAR(255),
+                    id_contrat INT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY unique_date_user_contrat_employe (date, user_id, id_contrat, employe_id),
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id) ON DELETE CASCADE,
+                    FOREIGN KEY (employe_id) REFERENCES employes(id) ON DELETE SET NULL,
+                    FOREIGN KEY (id_contrat) REFERENCES contrats(id) ON DELETE CASCADE
+                );
+                """
+                cursor.execute(create_heures_travail_table_query)
+
+                # Table heures_simules
+                create_heures_simules_table_query = """
+                CREATE TABLE IF NOT EXISTS heures_simulees (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                employe_id INT NOT NULL,
+                equipe_id INT NULL,
+                date DATE NOT NULL,
+                h1d TIME,            -- heure début
+                h2f TIME,            -- heure fin
+                total_h FLOAT,       -- heures totales
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id),
+                FOREIGN KEY (employe_id) REFERENCES employes(id),
+                FOREIGN KEY (equipe_id) REFERENCES equipes(id)
+                );"""
+                cursor.execute(create_heures_simules_table_query)
+
+                # Table salaires
+                create_salaires_table_query = """
+                CREATE TABLE IF NOT EXISTS salaires (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    mois INT NOT NULL,
+                    annee INT NOT NULL,
+                    heures_reelles DECIMAL(7,2),
+                    salaire_horaire DECIMAL(7,2) DEFAULT 24.05,
+                    salaire_calcule DECIMAL(10,2),
+                    salaire_net DECIMAL(10,2),
+                    salaire_verse DECIMAL(10,2),
+                    acompte_25 DECIMAL(10,2),
+                    acompte_10 DECIMAL(10,2),
+                    acompte_25_estime DECIMAL(10,2),
+                    acompte_10_estime DECIMAL(10,2),
+                    difference DECIMAL(10,2),
+                    difference_pourcent DECIMAL(5,2),
+                    user_id INT NOT NULL,
+                    employe_id INT NULL,
+                    employeur VARCHAR(255),
+                    id_contrat INT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_salaires_table_query)
+
+                # Table synthese_hebdo
+                create_synthese_hebdo_table_query = """
+                CREATE TABLE IF NOT EXISTS synthese_hebdo (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    semaine_numero INT NOT NULL,
+                    annee INT NOT NULL,
+                    heures_reelles DECIMAL(7,2),
+                    heures_simulees DECIMAL(7,2),
+                    difference DECIMAL(7,2),
+                    moyenne_mobile DECIMAL(7,2),
+                    user_id INT NOT NULL,
+                    id_contrat INT,
+                    employeur VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_synthese_hebdo_contrat (user_id, id_contrat, annee, semaine_numero),
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_synthese_hebdo_table_query)
+
+                # Table synthese_mensuelle
+                create_synthese_mensuelle_table_query = """
+                CREATE TABLE IF NOT EXISTS synthese_mensuelle (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    mois INT NOT NULL,
+                    annee INT NOT NULL,
+                    heures_reelles DECIMAL(7,2),
+                    heures_simulees DECIMAL(7,2),
+                    salaire_reel DECIMAL(10,2),
+                    salaire_simule DECIMAL(10,2),
+                    user_id INT NOT NULL,
+                    id_contrat INT,
+                    employeur VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_synthese_mensuelle_contrat (user_id, id_contrat, annee, mois),
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_synthese_mensuelle_table_query)
+
+                # Table contrats
+                create_contrats_table_query = """
+                CREATE TABLE IF NOT EXISTS contrats (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    employe_id INT NULL,
+                    employeur VARCHAR(255),
+                    heures_hebdo DECIMAL(4,2) NOT NULL,
+                    date_debut DATE NOT NULL,
+                    date_fin DATE,
+                    salaire_horaire DECIMAL(7,2) DEFAULT 24.05,
+                    jour_estimation_salaire INT DEFAULT 15,
+                    versement_10 BOOLEAN DEFAULT TRUE,
+                    versement_25 BOOLEAN DEFAULT TRUE,
+                    indemnite_vacances_tx DECIMAL(5,2),
+                    indemnite_jours_feries_tx DECIMAL(5,2),
+                    indemnite_jour_conges_tx DECIMAL(5,2),
+                    indemnite_repas_tx DECIMAL(5,2),
+                    indemnite_retenues_tx DECIMAL(5,2),
+                    cotisation_avs_tx DECIMAL(5,2),
+                    cotisation_ac_tx DECIMAL(5,2),
+                    cotisation_accident_n_prof_tx DECIMAL(5,2),
+                    cotisation_assurance_indemnite_maladie_tx DECIMAL(5,2),
+                    cotisation_cap_tx DECIMAL(5,2),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id)
+                );
+                """
+                cursor.execute(create_contrats_table_query)
+
+                # Tables types_cotisation 
+                create_types_cotisation_table_query = """
+                CREATE TABLE IF NOT EXISTS types_cotisation (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                user_id INT NOT NULL,
+                nom VARCHAR(100) NOT NULL,
+                description TEXT,
+                est_obligatoire BOOLEAN DEFAULT FALSE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES utilisateurs(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_types_cotisation_table_query)
+
+                # Tables types_indemnite 
+                create_types_indemnite_table_query = """
+                CREATE TABLE IF NOT EXISTS types_indemnite (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                user_id INT NOT NULL,
+                nom VARCHAR(100) NOT NULL,
+                description TEXT,
+                est_obligatoire BOOLEAN DEFAULT FALSE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES utilisateurs(id) ON DELETE CASCADE
+              );"""
+                cursor.execute(create_types_indemnite_table_query)
+
+                # cotisations_contrat
+                create_cotisations_contrat_table_query = """
+                CREATE TABLE IF NOT EXISTS cotisations_contrat (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                contrat_id INT NOT NULL,
+                type_cotisation_id INT NOT NULL,
+                taux DECIMAL(10,4) NOT NULL, -- peut être % ou montant fixe
+                base_calcul ENUM('brut', 'brut_tot') DEFAULT 'brut',
+                annee YEAR NOT NULL,
+                actif BOOLEAN DEFAULT TRUE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY unique_contrat_type_annee (contrat_id, type_cotisation_id, annee),
+                FOREIGN KEY (contrat_id) REFERENCES contrats(id) ON DELETE CASCADE,
+                FOREIGN KEY (type_cotisation_id) REFERENCES types_cotisation(id) ON DELETE CASCADE
+               );
+                """
+                cursor.execute(create_cotisations_contrat_table_query)
+
+                 # indemnites_contrat
+                create_indemnites_contrat_table_query = """
+                CREATE TABLE IF NOT EXISTS indemnites_contrat (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                contrat_id INT NOT NULL,
+                type_indemnite_id INT NOT NULL,
+                taux DECIMAL(10,4) NOT NULL, -- interprété comme % du brut
+                base_calcul ENUM('brut', 'brut_tot') DEFAULT 'brut',
+                annee YEAR NOT NULL,
+                actif BOOLEAN DEFAULT TRUE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY unique_contrat_type_annee (contrat_id, type_indemnite_id, annee),
+                FOREIGN KEY (contrat_id) REFERENCES contrats(id) ON DELETE CASCADE,
+                FOREIGN KEY (type_indemnite_id) REFERENCES types_indemnite(id) ON DELETE CASCADE
+                );
+                """
+                cursor.execute(create_indemnites_contrat_table_query)
+                # regles_cotisation
+
+                create_regles_cotisations_table_query = """
+                CREATE TABLE IF NOT EXISTS regles_cotisation (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                type_cotisation_id INT NOT NULL,
+                seuil_min DECIMAL(10,2) DEFAULT 0.00,   -- salaire mensuel brut minimum inclus
+                seuil_max DECIMAL(10,2) DEFAULT NULL,   -- NULL = sans limite
+                montant_fixe DECIMAL(10,2) DEFAULT 0.00,
+                taux DECIMAL(5,2) DEFAULT 0.00,         -- à utiliser si montant non fixe
+                type_valeur ENUM('taux','fixe') NOT NULL DEFAULT 'fixe',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (type_cotisation_id) REFERENCES types_cotisation(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_regles_cotisations_table_query)
+                 # baremes_indemnite
+
+                create_baremes_indemnite_table_query = """
+                CREATE TABLE IF NOT EXISTS baremes_indemnite (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                type_indemnite_id INT NOT NULL,
+                seuil_min DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+                seuil_max DECIMAL(10,2) DEFAULT NULL,
+                montant_fixe DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+                taux DECIMAL(5,2) NOT NULL DEFAULT 0.00,
+                type_valeur ENUM('taux','fixe') NOT NULL DEFAULT 'fixe',
+                ordre INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (type_indemnite_id) REFERENCES types_indemnite(id) ON DELETE CASCADE
+                 );"""
+                cursor.execute(create_baremes_indemnite_table_query)
+                # baremes_cotisation
+                create_baremes_cotisation_table_query = """
+                CREATE TABLE IF NOT EXISTS baremes_cotisation (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                type_cotisation_id INT NOT NULL,
+                seuil_min DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+                seuil_max DECIMAL(10,2) DEFAULT NULL,
+                montant_fixe DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+                taux DECIMAL(5,2) NOT NULL DEFAULT 0.00,
+                type_valeur ENUM('taux','fixe') NOT NULL DEFAULT 'fixe',
+                ordre INT NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (type_cotisation_id) REFERENCES types_cotisation(id) ON DELETE CASCADE
+                 );"""
+                cursor.execute(create_baremes_cotisation_table_query)
+
+                #plages_horaires
+                create_plages_horaires_table_query = """
+                CREATE TABLE IF NOT EXISTS plages_horaires (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                heure_travail_id INT NOT NULL,
+                ordre TINYINT NOT NULL,
+                debut TIME,
+                fin TIME,
+                FOREIGN KEY (heure_travail_id) REFERENCES heures_travail(id) ON DELETE CASCADE,
+                UNIQUE KEY unique_heure_travail_ordre (heure_travail_id, ordre)
+                );
+                """
+                cursor.execute(create_plages_horaires_table_query)
+
+
+                # Table employe
+                create_employes_table_query = """
+                CREATE TABLE IF NOT EXISTS employes (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    user_id INT NOT NULL,
+                    nom VARCHAR(100) NOT NULL,
+                    prenom VARCHAR(100) NOT NULL,
+                    email VARCHAR(150),
+                    telephone VARCHAR(20),
+                    rue VARCHAR(255),
+                    code_postal VARCHAR(10),
+                    commune VARCHAR(100),
+                    genre ENUM('M', 'F') NOT NULL,
+                    date_de_naissance DATE NOT NULL,
+                    code_acces_salaire VARCHAR(50),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES utilisateurs(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_employes_table_query)
+
+                #Table equipes
+                create_equipes_table_query = """
+                CREATE TABLE IF NOT EXISTS equipes (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                nom VARCHAR(100) NOT NULL,
+                description VARCHAR(255) NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+                );"""
+                cursor.execute(create_equipes_table_query)
+
+
+                #Table equipes_employes
+                create_equipes_employes_table_query = """
+                CREATE TABLE IF NOT EXISTS equipes_employes (
+                equipe_id INT,
+                employe_id INT,
+                added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (equipe_id, employe_id),
+                FOREIGN KEY (equipe_id) REFERENCES equipes(id) ON DELETE CASCADE,
+                FOREIGN KEY (employe_id) REFERENCES employes(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_equipes_employes_table_query)
+
+                #Table competences
+                create_competences_table_query = """
+                CREATE TABLE IF NOT EXISTS competences (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                nom VARCHAR(100) NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+                );
+                """
+                cursor.execute(create_competences_table_query)
+
+                #Table employes_competences
+                create_equipes_competences_table_query = """
+                CREATE TABLE IF NOT EXISTS employes_competences (
+                competence_id INT,
+                employe_id INT,
+                assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (competence_id, employe_id),
+                FOREIGN KEY (competence_id) REFERENCES competences(id) ON DELETE CASCADE,
+                FOREIGN KEY (employe_id) REFERENCES employes(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_equipes_competences_table_query)
+
+
+
+
+                # #Table equipes_competences_requises
+                create_equipes_competences_requises_table_query = """
+                CREATE TABLE IF NOT EXISTS equipes_competences_requises (
+                equipe_id INT,
+                competence_id INT,
+                quantite_min INT DEFAULT 1,
+                PRIMARY KEY (equipe_id, competence_id),
+                FOREIGN KEY (equipe_id) REFERENCES equipes(id) ON DELETE CASCADE,
+                FOREIGN KEY (competence_id) REFERENCES competences(id) ON DELETE CASCADE
+                );
+                """
+                cursor.execute(create_equipes_competences_requises_table_query)
+
+                #Table palnning regles
+                create_planning_regles_table_query = """
+                CREATE TABLE IF NOT EXISTS planning_regles (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                nom VARCHAR(150) NOT NULL,
+                type_regle VARCHAR(50) NOT NULL,
+                params_json JSON NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+                );"""
+                cursor.execute(create_planning_regles_table_query)
+
+                # Table entreprise
+                create_entreprise_table_query = """
+                CREATE TABLE IF NOT EXISTS entreprise (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL UNIQUE,
+                nom VARCHAR(255) NOT NULL,
+                rue VARCHAR(255),
+                code_postal VARCHAR(20),
+                commune VARCHAR(100),
+                email VARCHAR(255),
+                telephone VARCHAR(50),
+                logo_path VARCHAR(255),  -- ex: 'uploads/logos/user_123.png'
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                );"""
+                cursor.execute(create_entreprise_table_query)
+
+                # Table versions_donnees (compteurs de changement par compte, contrat, utilisateur, règles)
+                cursor.execute(self.DDL_VERSIONS_DONNEES)
+
+                # Table index_recherche (index inversé des transactions, écritures et contacts)
+                cursor.execute(self.DDL_INDEX_RECHERCHE)
+
+
+
+            logger.info("Toutes les tables ont été vérifiées/créées avec succès.")
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la création des tables : {e}")
+        self.migrer_schema()
+
+    # Tables ajoutées après la mise en service : (table, DDL de create_tables, méthode
+    # d'initialisation appelée une fois à la création, ou None). Sur MySQL, create_tables
+    # n'est pas exécutée au démarrage : migrer_schema crée ces tables si elles manquent
+    DDL_VERSIONS_DONNEES = """
+    CREATE TABLE IF NOT EXISTS versions_donnees (
+    portee VARCHAR(20) NOT NULL,
+    portee_id INT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (portee, portee_id)
+    );"""
+
+    DDL_CUMULS_COMPTABLES = """
+    CREATE TABLE IF NOT EXISTS cumuls_comptables (
+        utilisateur_id INT NOT NULL,
+        categorie_id INT NOT NULL,
+        annee SMALLINT NOT NULL,
+        mois TINYINT NOT NULL,
+        statut VARCHAR(20) NOT NULL,
+        type_ecriture VARCHAR(10) NOT NULL,
+        nb_ecritures INT NOT NULL DEFAULT 0,
+        total_montant DECIMAL(15,2) NOT NULL DEFAULT 0,
+        total_montant_htva DECIMAL(15,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (utilisateur_id, categorie_id, annee, mois, statut, type_ecriture)
+    );
+    """
+
+    DDL_REGLES_CATEGORISATION = """
+    CREATE TABLE IF NOT EXISTS regles_categorisation (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        utilisateur_id INT NOT NULL,
+        categorie_id INT NOT NULL,
+        type_regle ENUM('mot_cle', 'regex', 'iban', 'montant') NOT NULL DEFAULT 'mot_cle',
+        motif VARCHAR(255),
+        montant_min DECIMAL(15,2),
+        montant_max DECIMAL(15,2),
+        priorite INT NOT NULL DEFAULT 0,
+        actif BOOLEAN DEFAULT TRUE,
+        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs(id),
+        FOREIGN KEY (categorie_id) REFERENCES categories_transactions(id) ON DELETE CASCADE,
+        KEY idx_regles_utilisateur (utilisateur_id)
+    );
+    """
+
+    DDL_INDEX_RECHERCHE = """
+    CREATE TABLE IF NOT EXISTS index_recherche (
+    utilisateur_id INT NOT NULL,
+    terme VARCHAR(64) NOT NULL,
+    source VARCHAR(12) NOT NULL,
+    source_id INT NOT NULL,
+    poids SMALLINT NOT NULL DEFAULT 1,
+    PRIMARY KEY (utilisateur_id, terme, source, source_id),
+    KEY idx_index_recherche_source (source, source_id)
+    );"""
+
+    TABLES_AJOUTEES = (
+        ('versions_donnees', DDL_VERSIONS_DONNEES, None),
+        ('cumuls_comptables', DDL_CUMULS_COMPTABLES, '_initialiser_cumuls_comptables'),
+        ('regles_categorisation', DDL_REGLES_CATEGORISATION, None),
+        ('index_recherche', DDL_INDEX_RECHERCHE, '_initialiser_index_recherche'),
+    )
+
+    # Rattrapages de données exécutés une seule fois : (numéro, méthode). Le numéro est
+    # enregistré dans versions_donnees (portée 'migration') une fois la méthode réussie
+    MIGRATIONS_DONNEES = (
+        (1, '_rattraper_syntheses_hebdo'),
+    )
+
+    # Colonnes et index ajoutés après la création initiale des tables :
+    # CREATE TABLE IF NOT EXISTS ne modifie pas une table existante
+    COLONNES_AJOUTEES = (
+        ('transactions', 'empreinte_import', "ALTER TABLE transactions ADD COLUMN empreinte_import CHAR(40)"),
+        ('transactions', 'statut_comptable',
+         "ALTER TABLE transactions ADD COLUMN statut_comptable "
+         "ENUM('a_comptabiliser', 'comptabilise', 'ne_pas_comptabiliser') DEFAULT 'a_comptabiliser'"),
+        ('categories_comptables', 'categorie_complementaire_id',
+         "ALTER TABLE categories_comptables ADD COLUMN categorie_complementaire_id INT"),
+        ('categories_comptables', 'type_ecriture_complementaire',
+         "ALTER TABLE categories_comptables ADD COLUMN type_ecriture_complementaire VARCHAR(50)"),
+    )
+    INDEX_AJOUTES = (
+        ('transactions', 'idx_transactions_utilisateur_date',
+         "CREATE INDEX idx_transactions_utilisateur_date ON transactions (utilisateur_id, date_transaction)"),
+    )
+
+    def _initialiser_cumuls_comptables(self) -> None:
+        """Remplit cumuls_comptables depuis le grand livre existant (même calcul que reconstruire_cumuls)"""
+        with self.get_cursor() as cursor:
+            cursor.execute("DELETE FROM cumuls_comptables")
+            cursor.execute("""
+                INSERT INTO cumuls_comptables
+                (utilisateur_id, categorie_id, annee, mois, statut, type_ecriture,
+                 nb_ecritures, total_montant, total_montant_htva)
+                SELECT utilisateur_id, categorie_id, YEAR(date_ecriture), MONTH(date_ecriture),
+                       COALESCE(statut, ''), type_ecriture, COUNT(*),
+                       SUM(COALESCE(montant, 0)), SUM(COALESCE(montant_htva, 0))
+                FROM ecritures_comptables
+                GROUP BY utilisateur_id, categorie_id, YEAR(date_ecriture), MONTH(date_ecriture),
+                         COALESCE(statut, ''), type_ecriture
+            """)
+            logger.info("Migration : cumuls_comptables initialisés (%s lignes)", cursor.rowcount)
+
+    def _initialiser_index_recherche(self) -> None:
+        """Indexe une fois les transactions, écritures et contacts existants de chaque utilisateur"""
+        from .recherche import IndexRecherche  # recherche importe ce module
+        with self.get_cursor() as cursor:
+            cursor.execute("SELECT id FROM utilisateurs")
+            utilisateurs = [ligne['id'] for ligne in cursor.fetchall()]
+        index = IndexRecherche(self)
+        reussis = sum(1 for user_id in utilisateurs if index.reconstruire(user_id))
+        logger.info("Migration : index de recherche construit pour %s/%s utilisateurs", reussis, len(utilisateurs))
+
+    def _rattraper_syntheses_hebdo(self) -> None:
+        """Synthèses hebdomadaires des heures saisies avant leur mise à jour incrémentale"""
+        from .heures import SyntheseHebdomadaire  # heures importe ce module
+        nb = SyntheseHebdomadaire(self).rattraper_depuis_heures()
+        logger.info("Migration : synthèses hebdomadaires recalculées pour %s contrats", nb)
+
+    def _appliquer_migrations_donnees(self) -> None:
+        for numero, methode in self.MIGRATIONS_DONNEES:
+            try:
+                with self.get_cursor() as cursor:
+                    cursor.execute(
+                        "SELECT 1 FROM versions_donnees WHERE portee = 'migration' AND portee_id = %s",
+                        (numero,)
+                    )
+                    if cursor.fetchone():
+                        continue
+                logger.info("Migration de données %s : %s", numero, methode)
+                getattr(self, methode)()
+                with self.get_cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO versions_donnees (portee, portee_id, version) VALUES ('migration', %s, 1)
+                        ON DUPLICATE KEY UPDATE version = version
+                    """, (numero,))
+            except Exception as e:
+                logger.error(f"Erreur lors de la migration de données {numero} ({methode}) : {e}")
+
+    def _table_existe(self, cursor, table: str) -> bool:
+        if self._stockage_sqlite is not None:
+            cursor.execute("SELECT COUNT(*) AS nb FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+            return cursor.fetchone()['nb'] > 0
+        cursor.execute("""
+            SELECT COUNT(*) AS nb FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table,))
+        return cursor.fetchone()['nb'] > 0
+
+    def _colonne_existe(self, cursor, table: str, colonne: str) -> bool:
+        if self._stockage_sqlite is not None:
+            cursor.execute(f"PRAGMA table_info({table})")
+            return any(ligne['name'] == colonne for ligne in cursor.fetchall())
+        cursor.execute("""
+            SELECT COUNT(*) AS nb FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, colonne))
+        return cursor.fetchone()['nb'] > 0
+
+    def _index_existe(self, cursor, table: str, index: str) -> bool:
+        if self._stockage_sqlite is not None:
+            cursor.execute(f"PRAGMA index_list({table})")
+            return any(ligne['name'] == index for ligne in cursor.fetchall())
+        cursor.execute("""
+            SELECT COUNT(*) AS nb FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, index))
+        return cursor.fetchone()['nb'] > 0
+
+    def migrer_schema(self) -> None:
+        """
+        Crée les tables ajoutées manquantes (puis les initialise), ajoute aux tables
+        existantes les colonnes et index manquants, puis applique une fois chacune des
+        MIGRATIONS_DONNEES (idempotent).
+        Appelée par create_tables et au démarrage de l'application pour MySQL.
+        """
+        for table, ddl, initialisation in self.TABLES_AJOUTEES:
+            try:
+                with self.get_cursor() as cursor:
+                    if self._table_existe(cursor, table):
+                        continue
+                    logger.info("Migration : création de la table %s", table)
+                    cursor.execute(ddl)
+                if initialisation is not None:
+                    getattr(self, initialisation)()
+            except Exception as e:
+                logger.error(f"Erreur lors de la création de la table {table} : {e}")
+        try:
+            with self.get_cursor() as cursor:
+                for table, colonne, ddl in self.COLONNES_AJOUTEES:
+                    if not self._colonne_existe(cursor, table, colonne):
+                        logger.info("Migration : ajout de la colonne %s.%s", table, colonne)
+                        cursor.execute(ddl)
+                for table, index, ddl in self.INDEX_AJOUTES:
+                    if not self._index_existe(cursor, table, index):
+                        logger.info("Migration : ajout de l'index %s sur %s", index, table)
+                        cursor.execute(ddl)
+        except Exception as e:
+            # Deux processus démarrant ensemble : le second trouve la colonne déjà ajoutée
+            logger.error(f"Erreur lors de la migration du schéma : {e}")
+        self._appliquer_migrations_donnees()
+
+
+class VersionDonnees:
+    """
+    Compteurs de version par portée :
+        - 'compte', 'sous_compte', 'contrat' : données d'un compte ou d'un contrat ;
+        - par utilisateur : 'banque' (comptes, transactions, catégories), 'comptabilite'
+          (écritures, contacts), 'utilisateur' (heures, contrats, barèmes, salaires, employés) ;
+        - techniques : 'regles' (moteur de catégorisation), 'index_recherche', 'migration'
+          (rattrapages de données déjà appliqués, voir DatabaseManager.MIGRATIONS_DONNEES).
+    Chaque écriture incrémente le compteur dans sa propre transaction ; un graphique ou
+    un rapport calculé pour une version donnée reste valable tant qu'elle ne change pas.
+    """
+    PORTEES_UTILISATEUR = ('banque', 'comptabilite', 'utilisateur')
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def incrementer_with_cursor(cursor, portee: str, portee_id: int) -> None:
+        if portee_id is None:
+            return
+        # Un échec ne doit jamais annuler l'écriture métier : get_versions désactive alors le cache
+        try:
+            cursor.execute("""
+                INSERT INTO versions_donnees (portee, portee_id, version)
+                VALUES (%s, %s, 1)
+                ON DUPLICATE KEY UPDATE version = version + 1, updated_at = NOW()
+            """, (portee, portee_id))
+        except Exception as e:
+            logger.warning(f"Version {portee}/{portee_id} non incrémentée: {e}")
+
+    @staticmethod
+    def incrementer_selection_with_cursor(cursor, portee: str, requete_ids: str, params: tuple) -> None:
+        """Incrémente la portée pour chaque id renvoyé par requete_ids (colonne nommée portee_id)"""
+        try:
+            cursor.execute(f"""
+                INSERT INTO versions_donnees (portee, portee_id, version)
+                SELECT DISTINCT %s, selection.portee_id, 1 FROM ({requete_ids}) selection
+                WHERE selection.portee_id IS NOT NULL
+                ON DUPLICATE KEY UPDATE version = version + 1, updated_at = NOW()
+            """, (portee, *params))
+        except Exception as e:
+            logger.warning(f"Versions {portee} ({requete_ids.split()[-1]}) non incrémentées: {e}")
+
+    @staticmethod
+    def incrementer_compte_with_cursor(cursor, compte_id: int) -> None:
+        """Un compte modifié change aussi les pages 'banque' de son propriétaire (soldes du menu)"""
+        VersionDonnees.incrementer_with_cursor(cursor, 'compte', compte_id)
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'banque', "SELECT utilisateur_id AS portee_id FROM comptes_principaux WHERE id = %s",
+            (compte_id,))
+
+    @staticmethod
+    def incrementer_sous_compte_with_cursor(cursor, sous_compte_id: int) -> None:
+        """Un sous-compte modifié change aussi les graphiques de son compte principal"""
+        VersionDonnees.incrementer_with_cursor(cursor, 'sous_compte', sous_compte_id)
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'compte', "SELECT compte_principal_id AS portee_id FROM sous_comptes WHERE id = %s",
+            (sous_compte_id,))
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'banque', """SELECT c.utilisateur_id AS portee_id FROM sous_comptes s
+                JOIN comptes_principaux c ON c.id = s.compte_principal_id WHERE s.id = %s""",
+            (sous_compte_id,))
+
+    @staticmethod
+    def incrementer_contrat_with_cursor(cursor, contrat_id: int) -> None:
+        """Un contrat modifié change aussi les pages heures/salaires de son utilisateur"""
+        VersionDonnees.incrementer_with_cursor(cursor, 'contrat', contrat_id)
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'utilisateur', "SELECT user_id AS portee_id FROM contrats WHERE id = %s", (contrat_id,))
+
+    def incrementer(self, portee: str, portee_id: int) -> None:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                self.incrementer_with_cursor(cursor, portee, portee_id)
+        except Exception as e:
+            logger.error(f"Erreur incrément version {portee}/{portee_id}: {e}")
+
+    def get_version(self, portee: str, portee_id: int) -> int:
+        return self.get_versions([(portee, portee_id)]).get((portee, portee_id), 0)
+
+    def get_versions(self, cles: List[Tuple[str, int]]) -> Dict[Tuple[str, int], int]:
+        """Versions de plusieurs portées en une requête ; 0 pour une portée jamais modifiée"""
+        cles = [(portee, int(portee_id)) for portee, portee_id in cles if portee_id is not None]
+        versions = {cle: 0 for cle in cles}
+        if not cles:
+            return versions
+        try:
+            with self.db.get_cursor() as cursor:
+                conditions = ' OR '.join(['(portee = %s AND portee_id = %s)'] * len(cles))
+                cursor.execute(f"SELECT portee, portee_id, version FROM versions_donnees WHERE {conditions}",
+                               [v for cle in cles for v in cle])
+                for row in cursor.fetchall():
+                    versions[(row['portee'], row['portee_id'])] = row['version']
+        except Exception as e:
+            logger.error(f"Erreur lecture versions {cles}: {e}")
+            # Version inconnue : on renvoie une valeur unique pour ne jamais resservir un cache périmé
+            return {cle: f"inconnue-{uuid.uuid4()}" for cle in cles}
+        return versions
+
+    def get_tampon(self, cles: List[Tuple[str, int]]) -> Tuple[Dict[Tuple[str, int], Any], Optional[datetime]]:
+        """
+        Versions de plusieurs portées et date de leur dernière modification, en une requête.
+        Sert d'ETag / Last-Modified aux pages de rapport ; en cas d'erreur les versions sont
+        uniques ('inconnue-...') et la date est None, comme pour get_versions.
+        """
+        cles = [(portee, int(portee_id)) for portee, portee_id in cles if portee_id is not None]
+        versions = {cle: 0 for cle in cles}
+        if not cles:
+            return versions, None
+        derniere_modification = None
+        try:
+            with self.db.get_cursor() as cursor:
+                conditions = ' OR '.join(['(portee = %s AND portee_id = %s)'] * len(cles))
+                cursor.execute(f"SELECT portee, portee_id, version, updated_at FROM versions_donnees WHERE {conditions}",
+                               [v for cle in cles for v in cle])
+                for row in cursor.fetchall():
+                    versions[(row['portee'], row['portee_id'])] = row['version']
+                    if row['updated_at'] and (derniere_modification is None or row['updated_at'] > derniere_modification):
+                        derniere_modification = row['updated_at']
+        except Exception as e:
+            logger.error(f"Erreur lecture tampon {cles}: {e}")
+            return {cle: f"inconnue-{uuid.uuid4()}" for cle in cles}, None
+        return versions, derniere_modification
+
+    def on_changement_heures(self, user_id: int, id_contrat: int, dates: list, cursor) -> None:
+        """Abonné de HeureTravail"""
+        self.incrementer_with_cursor(cursor, 'contrat', id_contrat)
+        self.incrementer_with_cursor(cursor, 'utilisateur', user_id)
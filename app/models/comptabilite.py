@@ -0,0 +1,3019 @@
+"""
+Plan comptable, catégories et écritures comptables, contacts et rapports.
+"""
+from pymysql import Error
+from decimal import Decimal
+from datetime import datetime, date, timedelta
+import os
+from typing import List, Dict, Optional, Tuple
+import traceback
+import logging
+
+from ..utils.montants import Montant, ZERO
+from .base import VersionDonnees
+from .recherche import IndexRecherche
+from ..utils.stockage_justificatifs import (
+    FichierRefuse, empreinte_depuis_chemin, placer_fichier, recevoir_flux, verrou_stockage
+)
+from ..utils.apercus_justificatifs import planifier_apercus, supprimer_apercus
+
+logger = logging.getLogger(__name__)
+
+
+class PlanComptable:
+    """Modèle pour gérer le plan comptable"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def create_plan(self, data: Dict) -> Optional[int]:
+        """Crée un nouveau plan comptable"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO plans_comptables (nom, description, devise, utilisateur_id)
+                VALUES (%s, %s, %s, %s)
+                """
+                values = (
+                    data['nom'],
+                    data.get('description', ''),
+                    data.get('devise', 'CHF'),
+                    data['utilisateur_id']
+                )
+                cursor.execute(query, values)
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Erreur création plan comptable: {e}")
+            return None
+
+    def modifier_plan(self, plan_id: int, data: Dict) -> bool:
+        pass
+    def supprimer_plan(self, plan_id: int, data: Dict) -> bool:
+        pass
+
+    def get_all_plans(self, utilisateur_id: int) -> List[Dict]:
+        """Liste tous les plans de l'utilisateur"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, nom, description, devise, created_at
+                    FROM plans_comptables
+                    WHERE utilisateur_id = %s AND actif = 1
+                    ORDER BY nom
+                """, (utilisateur_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur liste plans: {e}")
+            return []
+
+    def get_plan_with_categories(self, plan_id: int, utilisateur_id: int) -> Optional[Dict]:
+        """Récupère un plan + ses catégories"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer le plan
+                cursor.execute("""
+                    SELECT * FROM plans_comptables
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (plan_id, utilisateur_id))
+                plan = cursor.fetchone()
+                if not plan:
+                    return None
+
+                # Récupérer les catégories liées
+                cursor.execute("""
+                    SELECT c.*
+                    FROM plan_categorie pc
+                    JOIN categories_comptables c ON pc.categorie_id = c.id
+                    WHERE pc.plan_id = %s AND c.utilisateur_id = %s
+                    ORDER BY c.numero
+                """, (plan_id, utilisateur_id))
+                plan['categories'] = cursor.fetchall()
+                return plan
+        except Exception as e:
+            logger.error(f"Erreur plan + catégories: {e}")
+            return None
+
+    def add_categorie_to_plan(self, plan_id: int, categorie_id: int, utilisateur_id: int) -> bool:
+        """Ajoute une catégorie à un plan"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que les deux existent et appartiennent à l'utilisateur
+                cursor.execute("SELECT id FROM plans_comptables WHERE id = %s AND utilisateur_id = %s", (plan_id, utilisateur_id))
+                if not cursor.fetchone():
+                    return False
+                cursor.execute("SELECT id FROM categories_comptables WHERE id = %s AND utilisateur_id = %s", (categorie_id, utilisateur_id))
+                if not cursor.fetchone():
+                    return False
+
+                cursor.execute("""
+                    INSERT IGNORE INTO plan_categorie (plan_id, categorie_id)
+                    VALUES (%s, %s)
+                """, (plan_id, categorie_id))
+                return True
+        except Exception as e:
+            logger.error(f"Erreur ajout catégorie au plan: {e}")
+            return False
+
+    def remove_categorie_from_plan(self, plan_id: int, categorie_id: int) -> bool:
+        """Retire une catégorie d’un plan"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM plan_categorie
+                    WHERE plan_id = %s AND categorie_id = %s
+                """, (plan_id, categorie_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur retrait catégorie du plan: {e}")
+            return False
+    def get_categories_for_plan(self, plan_id: int, utilisateur_id: int) -> List[Dict]:
+        """Récupère uniquement les catégories d’un plan"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.*
+                    FROM plan_categorie pc
+                    JOIN categories_comptables c ON pc.categorie_id = c.id
+                    WHERE pc.plan_id = %s AND c.utilisateur_id = %s
+                    ORDER BY c.numero
+                """, (plan_id, utilisateur_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur catégories du plan: {e}")
+            return []
+
+
+class CategorieComptable:
+    def __init__(self, db):
+        self.db = db
+    def create(self, data: Dict) -> bool:
+        """Crée une nouvelle catégorie comptable"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO categories_comptables
+                (numero, nom, parent_id, type_compte, compte_systeme, compte_associe, type_tva, actif)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                values = (
+                    data['numero'],
+                    data['nom'],
+                    data.get('parent_id'),
+                    data['type_compte'],
+                    data.get('compte_systeme'),
+                    data.get('compte_associe'),
+                    data.get('type_tva'),
+                    data.get('actif', True)
+                )
+                cursor.execute(query, values)
+                # Plan comptable commun : les pages comptables de tous les utilisateurs changent
+                VersionDonnees.incrementer_selection_with_cursor(
+                    cursor, 'comptabilite', "SELECT id AS portee_id FROM utilisateurs", ())
+                # Le commit est géré par le context manager dans la classe DatabaseManager
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la création de la catégorie comptable: {e}")
+            return False
+
+    def modifier_plan(self, plan_id: int, data: Dict, utilisateur_id: int) -> bool:
+        """Met à jour un plan comptable"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le plan existe et appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM plans_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (plan_id, utilisateur_id)
+                )
+                if not cursor.fetchone():
+                    return False
+
+                query = """
+                UPDATE plans_comptables
+                SET nom = %s, description = %s, devise = %s
+                WHERE id = %s AND utilisateur_id = %s
+                """
+                values = (
+                    data['nom'],
+                    data.get('description', ''),
+                    data.get('devise', 'CHF'),
+                    plan_id,
+                    utilisateur_id
+                )
+                cursor.execute(query, values)
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur mise à jour plan comptable: {e}")
+            return False
+
+    def update(self, categorie_id: int, data: Dict) -> bool:
+        """Met à jour une catégorie comptable"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE categories_comptables
+                SET numero = %s, nom = %s, parent_id = %s, type_compte = %s,
+                    compte_systeme = %s, compte_associe = %s, type_tva = %s, actif = %s
+                WHERE id = %s
+                """
+                values = (
+                    data['numero'],
+                    data['nom'],
+                    data.get('parent_id'),
+                    data['type_compte'],
+                    data.get('compte_systeme'),
+                    data.get('compte_associe'),
+                    data.get('type_tva'),
+                    data.get('actif', True),
+                    categorie_id
+                )
+                cursor.execute(query, values)
+                # Plan comptable commun : les pages comptables de tous les utilisateurs changent
+                VersionDonnees.incrementer_selection_with_cursor(
+                    cursor, 'comptabilite', "SELECT id AS portee_id FROM utilisateurs", ())
+                # Le commit est géré par le context manager
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour de la catégorie comptable: {e}")
+            return False
+
+    def delete(self, categorie_id: int) -> bool:
+        """Supprime une catégorie comptable (soft delete)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "UPDATE categories_comptables SET actif = FALSE WHERE id = %s"
+                cursor.execute(query, (categorie_id,))
+                # Plan comptable commun : les pages comptables de tous les utilisateurs changent
+                VersionDonnees.incrementer_selection_with_cursor(
+                    cursor, 'comptabilite', "SELECT id AS portee_id FROM utilisateurs", ())
+                # Le commit est géré par le context manager
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la suppression de la catégorie comptable: {e}")
+            return False
+
+    def get_by_id(self, categorie_id: int) -> Optional[Dict]:
+        """Récupère une catégorie par son ID"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM categories_comptables WHERE id = %s"
+                cursor.execute(query, (categorie_id,))
+                categorie = cursor.fetchone()
+            return categorie
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de la catégorie comptable: {e}")
+            return None
+
+    def get_all_categories(self, utilisateur_id: int = None) -> List[Dict]:
+        """Récupère toutes les catégories avec info sur le parent"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if utilisateur_id:
+                    query = """
+                    SELECT
+                        c1.id, c1.numero, c1.nom, c1.parent_id, c1.type_compte,
+                        c1.compte_systeme, c1.compte_associe, c1.type_tva, c1.actif,
+                        c1.categorie_complementaire_id,
+                        c1.type_ecriture_complementaire,
+                        c2.numero as parent_numero, c2.nom as parent_nom,
+                        c3.numero as categorie_complementaire_numero,
+                        c3.nom as categorie_complementaire_nom
+                    FROM categories_comptables c1
+                    LEFT JOIN categories_comptables c2 ON c1.parent_id = c2.id
+                    LEFT JOIN categories_comptables c3 ON c1.categorie_complementaire_id = c3.id
+                    WHERE c1.utilisateur_id = %s
+                    ORDER BY c1.numero
+                    """
+                    cursor.execute(query, (utilisateur_id,))
+                else:
+                    query = """
+                    SELECT
+                        c1.id, c1.numero, c1.nom, c1.parent_id, c1.type_compte,
+                        c1.compte_systeme, c1.compte_associe, c1.type_tva, c1.actif,
+                        c1.categorie_complementaire_id,
+                        c1.type_ecriture_complementaire,
+                        c2.numero as parent_numero, c2.nom as parent_nom,
+                        c3.numero as categorie_complementaire_numero,
+                        c3.nom as categorie_complementaire_nom
+                    FROM categories_comptables c1
+                    LEFT JOIN categories_comptables c2 ON c1.parent_id = c2.id
+                    LEFT JOIN categories_comptables c3 ON c1.categorie_complementaire_id = c3.id
+                    ORDER BY c1.numero
+                    """
+                    cursor.execute(query)
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur get_all_categories: {e}")
+            return []
+
+    def get_by_numero(self, numero: str, utilisateur_id: int) -> Optional[Dict]:
+        """Récupère une catégorie par son numéro"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM categories_comptables WHERE numero = %s AND utilisateur_id = %s"
+                cursor.execute(query, (numero, utilisateur_id))
+                categorie = cursor.fetchone()
+            return categorie
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de la catégorie comptable: {e}")
+            return None
+
+    def get_by_type(self, type_compte: str, utilisateur_id: int) -> List[Dict]:
+        """Récupère les catégories par type de compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM categories_comptables WHERE type_compte = %s AND utilisateur_id = %s ORDER BY numero"
+                cursor.execute(query, (type_compte, utilisateur_id))
+                categories = cursor.fetchall()
+            return categories
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des catégories comptables: {e}")
+            return []
+
+    def get_categories_avec_complementaires(self, utilisateur_id: int) -> List[Dict]:
+        """Récupère les catégories comptables avec leurs configurations de complémentaires (TVA, etc.)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    c.id,
+                    c.numero,
+                    c.nom,
+                    c.parent_id,
+                    c.type_compte,
+                    c.compte_systeme,
+                    c.compte_associe,
+                    -- 🔥 CORRIGÉ : La colonne categorie_complementaire_id appartient à c (categories_comptables)
+                    c.categorie_complementaire_id,
+                    c.type_ecriture_complementaire,
+                    c.type_tva,
+                    -- On récupère aussi les infos de la catégorie complémentaire si elle existe
+                    cc.numero as comp_numero,
+                    cc.nom as comp_nom
+                FROM categories_comptables c
+                -- 🔥 CORRIGÉ : Jointure avec categories_comptables (cc) pour les infos de la catégorie complémentaire
+                LEFT JOIN categories_comptables cc ON c.categorie_complementaire_id = cc.id
+                WHERE c.utilisateur_id = %s AND c.actif = TRUE
+                ORDER BY c.numero
+                """
+                # Il y a 1 seul placeholder '%s' dans la requête corrigée.
+                cursor.execute(query, (utilisateur_id,)) # On passe 1 seul argument.
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur get_categories_avec_complementaires: {e}")
+            return []
+
+    def ajouter_categorie_complementaire(self, categorie_id: int, categorie_complementaire_id: int,
+                                       utilisateur_id: int, type_complement: str = 'tva',
+                                       taux: float = 0.0) -> bool:
+        """Ajoute une relation de catégorie complémentaire"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO categories_transactions
+                (categorie_id, categorie_complementaire_id, utilisateur_id, type_complement, taux)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                type_complement = VALUES(type_complement),
+                taux = VALUES(taux),
+                actif = TRUE
+                """
+                cursor.execute(query, (categorie_id, categorie_complementaire_id, utilisateur_id, type_complement, taux))
+                return True
+        except Exception as e:
+            logger.error(f"Erreur ajouter_categorie_complementaire: {e}")
+            return False
+
+    def has_categorie_complementaire(self, categorie_id: int, utilisateur_id: int) -> bool:
+        """Vérifie si une catégorie a une catégorie complémentaire configurée."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT COUNT(*) as count
+                FROM categories_comptables
+                WHERE id = %s
+                AND utilisateur_id = %s
+                AND categorie_complementaire_id IS NOT NULL
+                AND actif = TRUE
+                """
+                cursor.execute(query, (categorie_id, utilisateur_id))
+                result = cursor.fetchone()
+                has_complementaire = result['count'] > 0
+                logger.info("Catégorie ID %s a une catégorie complémentaire: %s", categorie_id, has_complementaire)
+                return has_complementaire
+        except Exception as e:
+            logger.error(f"Erreur dans has_categorie_complementaire: {e}")
+            return False
+    def get_categorie_complementaire(self, categorie_id: int, utilisateur_id: int)-> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT ct.id, ct.numero, ct.nom, ct.categorie_complementaire_id as id_complementaire, ct2.numero as numero_complementaire, ct2.nom as nom_complementaire
+                FROM categories_comptables ct
+                JOIN categories_comptables ct2 ON ct.categorie_complementaire_id = ct2.id
+                WHERE ct.id = %s AND ct.utilisateur_id = %s;
+
+                """
+                cursor.execute(query, (categorie_id, utilisateur_id))
+                result = cursor.fetchall()
+                logger.info("La categorie avec id %s a : %s", categorie_id, result)
+                return result
+        except Exception as e:
+            logger.error(f'Erreur dans la recherche de catégorie complémentaire: {e}')
+            return None
+
+
+class EcritureComptable:
+    """Modèle pour gérer les écritures comptables"""
+
+    # Colonnes des listes d'écritures : tout sauf le contenu du justificatif (LONGBLOB)
+    COLONNES_LISTE = """
+        e.id, e.date_ecriture, e.compte_bancaire_id, e.sous_compte_id, e.categorie_id,
+        e.montant, e.montant_htva, e.devise, e.description, e.id_contact, e.reference,
+        e.type_ecriture, e.type_ecriture_comptable, e.ecriture_principale_id, e.transaction_id,
+        e.tva_taux, e.tva_montant, e.utilisateur_id, e.justificatif_url, e.nom_fichier,
+        e.type_mime, e.taille_fichier, e.statut, e.date_validation, e.date_suppression, e.created_at
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    
+    @property
+    def upload_folder(self):
+        """Fournit le dossier d'upload à la demande, sans effet de bord à l'initialisation"""
+        # app/uploads/justificatifs : relatif au paquet app, pas au sous-paquet app/models
+        return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'justificatifs')
+
+    def ensure_upload_folder(self):
+        """À appeler explicitement quand nécessaire (ex: dans une route)"""
+        folder = self.upload_folder
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def _get_file_path(self, filename):
+        """Génère le chemin complet du fichier"""
+        return os.path.join(self.upload_folder, *filename.split('/'))
+    def test_dossier_upload(self):
+        """Teste l'accès au dossier d'upload"""
+        print(f"=== TEST DOSSIER UPLOAD ===")
+        print(f"Chemin absolu: {os.path.abspath(self.upload_folder)}")
+        print(f"Dossier existe: {os.path.exists(self.upload_folder)}")
+
+        if os.path.exists(self.upload_folder):
+            print(f"Permissions lecture: {os.access(self.upload_folder, os.R_OK)}")
+            print(f"Permissions écriture: {os.access(self.upload_folder, os.W_OK)}")
+
+            # Test d'écriture
+            test_file = os.path.join(self.upload_folder, 'test.txt')
+            try:
+                with open(test_file, 'w') as f:
+                    f.write('test écriture')
+                print("✓ Test écriture réussi")
+
+                # Lire pour vérifier
+                with open(test_file, 'r') as f:
+                    content = f.read()
+                print(f"✓ Contenu lu: {content}")
+
+                os.remove(test_file)
+                print("✓ Test suppression réussi")
+                return True
+            except Exception as e:
+                print(f"✗ Erreur écriture: {e}")
+                return False
+        else:
+            print("❌ Dossier n'existe pas")
+            return False
+
+    def create(self, categorie_comptable_model, data: Dict) -> bool:
+        """Crée une nouvelle écriture comptable"""
+        # Validation du lien catégorie ↔ plan comptable du compte
+        if data.get('id_contact'):
+            if not self._is_categorie_valid_for_contact(
+                data['id_contact'],
+                data['categorie_id'],
+                data['utilisateur_id']
+            ):
+                logger.warning("Catégorie non autorisée pour ce contact.")
+                return False
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO ecritures_comptables
+                (date_ecriture, compte_bancaire_id, categorie_id, montant, montant_htva, devise,
+                description, reference, type_ecriture, tva_taux, tva_montant,
+                utilisateur_id, justificatif_url, statut, id_contact, type_ecriture_comptable)
+                VALUES (%s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s, %s, %s,
+                        %s, %s, %s, %s)
+                """
+                values = (
+                    data['date_ecriture'],
+                    data['compte_bancaire_id'],
+                    data['categorie_id'],
+                    data['montant'],
+                    data['montant_htva'],
+                    data.get('devise', 'CHF'),
+                    data.get('description', ''),
+                    data.get('reference', ''),
+                    data['type_ecriture'],  # 'depense' ou 'recette'
+                    data.get('tva_taux'),
+                    data.get('tva_montant'),
+                    data['utilisateur_id'],
+                    data.get('justificatif_url'),
+                    data.get('statut', 'pending'),  # 'pending', 'validée', 'rejetée'
+                    data.get('id_contact'),
+                    data.get('type_ecriture_comptable', 'principale')  # Toujours 'principale' au départ
+                )
+
+                cursor.execute(query, values)
+                ecriture_principale_id = cursor.lastrowid
+                logger.info("Écriture principale créée avec ID: %s", ecriture_principale_id)
+
+                # 🔥 Vérifier si la catégorie a une catégorie complémentaire
+                categorie_id = data['categorie_id']
+                utilisateur_id = data['utilisateur_id']
+
+                if categorie_comptable_model:
+                    has_complementaire = categorie_comptable_model.has_categorie_complementaire(
+                        categorie_id, utilisateur_id
+                    )
+                    if has_complementaire:
+                        logger.info("La catégorie ID %s a une catégorie complémentaire. Création d'écritures secondaires.", categorie_id)
+                        self._create_secondary_ecritures(cursor, ecriture_principale_id, data)
+                    else:
+                        logger.info("La catégorie ID %s n'a pas de catégorie complémentaire. Aucune écriture secondaire.", categorie_id)
+                else:
+                    logger.warning("Modèle CategorieComptable non disponible pour la vérification.")
+
+                self._ajuster_cumuls(cursor, utilisateur_id, {},
+                                     self._lire_contributions(cursor, utilisateur_id, ecriture_principale_id))
+                self._indexer(cursor, utilisateur_id, ecriture_principale_id)
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la création de l'écriture comptable: {e}")
+            return False
+
+    def _create_secondary_ecritures(self, cursor, ecriture_principale_id: int,  data: Dict):
+        """Crée les écritures secondaires (TVA, taxes, etc.)"""
+        try:
+            logger.info("Début de la vérification des écritures secondaires pour l'écriture principale ID: %s", ecriture_principale_id)
+
+            categorie_id = data['categorie_id']
+            utilisateur_id = data['utilisateur_id']
+
+            query = """
+            SELECT
+                cc.categorie_complementaire_id,
+                cc.type_ecriture_complementaire,
+                cc.type_tva,  -- ❌ Cela peut être NULL
+                cc.nom as categorie_nom,
+                cc.numero as categorie_numero,
+                cc_comp.nom as categorie_complementaire_nom,
+                cc_comp.numero as categorie_complementaire_numero
+            FROM categories_comptables cc
+            LEFT JOIN categories_comptables cc_comp ON cc.categorie_complementaire_id = cc_comp.id
+            WHERE cc.id = %s
+            AND cc.utilisateur_id = %s
+            AND cc.actif = TRUE
+            AND cc.categorie_complementaire_id IS NOT NULL
+            """
+
+            cursor.execute(query, (categorie_id, utilisateur_id))
+            result = cursor.fetchone()
+
+            if not result:
+                logger.info("Aucune catégorie complémentaire configurée pour la catégorie ID %s.", categorie_id)
+                return
+
+            categorie_complementaire_id = result['categorie_complementaire_id']
+            type_ecriture_complementaire = result['type_ecriture_complementaire']
+            type_tva_config = result['type_tva']  # Peut être None
+            categorie_nom = result['categorie_nom']
+            categorie_numero = result['categorie_numero']
+            categorie_complementaire_nom = result.get('categorie_complementaire_nom', 'N/A')
+            categorie_complementaire_numero = result.get('categorie_complementaire_numero', 'N/A')
+
+            logger.info(
+                f"Catégorie '{categorie_numero} - {categorie_nom}' a une catégorie complémentaire "
+                f"'{categorie_complementaire_numero} - {categorie_complementaire_nom}' "
+                f"(ID: {categorie_complementaire_id}) avec type '{type_ecriture_complementaire}'."
+            )
+
+            # 🔥 RÉCUPÉRER LE TAUX RÉEL à partir de la configuration ou de data
+            # Selon votre logique, le taux peut venir de type_tva OU de data['tva_taux']
+            if type_ecriture_complementaire == 'tva':
+                montant_secondaire = data.get('tva_montant', 0.0)
+                taux_secondaire = data.get('tva_taux', 0.0)  # ✅ On garde le taux de la principale
+            else:
+                # 🔥 RÉCUPÉRER LE TAUX RÉEL à partir de la configuration ou de data
+                taux_reel = type_tva_config if type_tva_config is not None else data.get('tva_taux', 0)
+                taux_secondaire = taux_reel  # ✅ On garde ce taux pour les autres types
+                # ✅ Maintenant on envoie le bon taux
+                montant_secondaire = self._calculate_secondary_amount(
+                    data, type_ecriture_complementaire, taux_reel
+                )
+
+            if abs(montant_secondaire) > 0.01:
+                comp_cat_simulated = {
+                    'categorie_complementaire_id': categorie_complementaire_id,
+                    'type_complement': type_ecriture_complementaire,
+                    'taux': taux_secondaire  # ✅ aussi ici
+                }
+                self._create_secondary_ecriture(
+                    cursor, ecriture_principale_id, data, comp_cat_simulated, montant_secondaire)
+                logger.info(f"Écriture secondaire de {montant_secondaire:.2f} CHF créée pour la catégorie complémentaire ID {categorie_complementaire_id}.")
+            else:
+                logger.info(f"Montant secondaire négligeable ({montant_secondaire:.2f} CHF), pas de création d'écriture.")
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la création des écritures secondaires pour écriture ID {ecriture_principale_id}: {e}")
+            raise
+
+    def has_secondary_ecritures(self, ecriture_id: int, user_id: int) -> bool:
+        """Vérifie si une écriture a des écritures secondaires"""
+        try:
+            secondaires = self.get_ecritures_complementaires(ecriture_id, user_id)
+            return len(secondaires) > 0
+        except Exception as e:
+            logger.error(f"Erreur vérification écritures secondaires: {e}")
+            return False
+
+    def _calculate_secondary_amount(self, data: Dict, type_complement: str, taux: float) -> float:
+        """Calcule le montant pour l'écriture secondaire"""
+        montant_principal = data['montant']
+        montant_htva = data.get('montant_htva', montant_principal)
+        tva_taux = data.get('tva_taux', 0)
+
+        if type_complement == 'tva':
+            # Logique de calcul TVA
+            if data.get('tva_montant') is not None:
+                return data['tva_montant']
+            elif tva_taux and tva_taux > 0:
+                base_calcul = montant_htva if montant_htva != montant_principal else montant_principal
+                return base_calcul * (tva_taux / 100)
+            else:
+                return 0
+
+        elif type_complement == 'taxe':
+            # Calcul pour autres taxes
+            return montant_principal * (taux / 100)
+
+        else:
+            return montant_principal * (taux / 100)
+
+    def _get_secondary_type(self, type_principal: str, type_complement: str) -> str:
+        """Détermine le type d'écriture pour la secondaire"""
+        if type_complement == 'tva':
+            # La TVA est généralement une dette (passif) donc recette pour le compte TVA
+            return 'recette' if type_principal == 'depense' else 'depense'
+        else:
+            return type_principal
+
+    def _create_secondary_ecriture(self, cursor, ecriture_principale_id: int, data: Dict, comp_cat: Dict, montant_secondaire: float):
+        """Crée une écriture secondaire individuelle"""
+        try:
+            # 🔥 Déterminer le type d'écriture pour la secondaire
+            type_ecriture_secondaire = self._get_secondary_type(data['type_ecriture'], comp_cat['type_complement'])
+
+            logger.info(
+                f"Création d'une écriture secondaire de type '{type_ecriture_secondaire}' "
+                f"pour la catégorie complémentaire ID {comp_cat['categorie_complementaire_id']}, "
+                f"montant: {montant_secondaire:.2f} CHF."
+            )
+
+            query = """
+            INSERT INTO ecritures_comptables(
+                date_ecriture, compte_bancaire_id, categorie_id, montant, montant_htva, devise,
+                description, reference, type_ecriture, tva_taux, tva_montant,
+                utilisateur_id, justificatif_url, statut, id_contact,
+                ecriture_principale_id, type_ecriture_comptable
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'complementaire')
+            """
+
+            values = (
+                data['date_ecriture'],
+                data['compte_bancaire_id'],  # Ou un compte spécifique pour les taxes
+                comp_cat['categorie_complementaire_id'],
+                abs(montant_secondaire),  # Valeur absolue, le sens dépend du type
+                abs(montant_secondaire),
+                data.get('devise', 'CHF'),
+                f"{data.get('description', '')} ({comp_cat['type_complement'].upper()})",
+                data.get('reference', ''),
+                type_ecriture_secondaire,
+                comp_cat.get('taux', 0),  # Pas de TVA sur la TVA
+                0,
+                data['utilisateur_id'],
+                data.get('justificatif_url'),
+                data.get('statut', 'pending'),
+                data.get('id_contact'),
+                ecriture_principale_id
+            )
+
+            cursor.execute(query, values)
+            logger.info(f"Écriture secondaire insérée dans la base de données avec succès.")
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la création de l'écriture secondaire: {e}")
+            raise
+
+
+    def get_ecriture_avec_secondaires(self, ecriture_id: int, user_id: int) -> Dict:
+        """Récupère une écriture principale avec toutes ses écritures secondaires"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer l'écriture principale
+                cursor.execute("""
+                    SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                        cb.nom_compte as compte_bancaire_nom
+                    FROM ecritures_comptables e
+                    LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                    LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                    WHERE e.id = %s AND e.utilisateur_id = %s
+                """, (ecriture_id, user_id))
+                ecriture_principale = cursor.fetchone()
+
+                if not ecriture_principale:
+                    return None
+
+                # Récupérer les écritures secondaires
+                ecritures_secondaires = self.get_ecritures_complementaires(ecriture_id, user_id)
+
+                return {
+                    'principale': ecriture_principale,
+                    'secondaires': ecritures_secondaires
+                }
+        except Exception as e:
+            logger.error(f"Erreur get_ecriture_avec_secondaires: {e}")
+            return None
+
+    def update_statut_comptable(self, ecriture_id: int, user_id: int, statut_comptable: str) -> Tuple[bool, str]:
+        """Met à jour le statut comptable d'une transaction"""
+        try:
+            with self.db.get_cursor() as cursor:
+                avant = self._lire_contributions(cursor, user_id, ecriture_id)
+                ecritures_secondaires = self.get_ecritures_complementaires(ecriture_id, user_id)
+                # Vérifier que l'utilisateur peut accéder à cette transaction
+                if ecritures_secondaires:
+                    query = """
+                    UPDATE ecritures_comptables
+                    SET statut = %s
+                    WHERE (id = %s OR ecriture_principale_id = %s)
+                    AND utilisateur_id = %s
+                    """
+                    cursor.execute(query, (statut_comptable, ecriture_id, ecriture_id, user_id))
+                else:
+                    query = """
+                    UPDATE ecritures_comptables
+                    SET statut = %s
+                    WHERE id = %s AND utilisateur_id = %s
+                    """
+                    cursor.execute(query, (statut_comptable, ecriture_id, user_id))
+                self._ajuster_cumuls(cursor, user_id, avant, self._lire_contributions(cursor, user_id, ecriture_id))
+            return True, "Statut comptable mis à jour avec succès"
+        except Exception as e:
+            logger.error(f"Erreur mise à jour statut comptable: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def get_solde_tva_par_periode(self, user_id: int, date_debut: str, date_fin: str) -> Dict:
+        """Calcule le solde TVA pour une période donnée"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT
+                        SUM(CASE WHEN e.type_ecriture = 'recette' THEN e.montant ELSE 0 END) as tva_collectee,
+                        SUM(CASE WHEN e.type_ecriture = 'depense' THEN e.montant ELSE 0 END) as tva_deductible,
+                        (SUM(CASE WHEN e.type_ecriture = 'recette' THEN e.montant ELSE 0 END) -
+                        SUM(CASE WHEN e.type_ecriture = 'depense' THEN e.montant ELSE 0 END)) as solde_tva
+                    FROM ecritures_comptables e
+                    JOIN categories_comptables c ON e.categorie_id = c.id
+                    WHERE e.utilisateur_id = %s
+                    AND e.date_ecriture BETWEEN %s AND %s
+                    AND e.statut = 'validée'
+                    AND c.type_compte = 'TVA'  -- Supposant que vous avez une catégorie TVA
+                """, (user_id, date_debut, date_fin))
+
+                return cursor.fetchone() or {'tva_collectee': 0, 'tva_deductible': 0, 'solde_tva': 0}
+        except Exception as e:
+            logger.error(f"Erreur get_solde_tva_par_periode: {e}")
+            return {'tva_collectee': 0, 'tva_deductible': 0, 'solde_tva': 0}
+
+    def _create_ecriture_liee(self, cursor, data: Dict):
+        """Méthode interne pour créer une écriture liée"""
+        try:
+            query = """
+            INSERT INTO ecritures_comptables(
+                date_ecriture, compte_bancaire_id, categorie_id, montant, montant_htva, devise,
+                description, reference, type_ecriture, tva_taux, tva_montant,
+                utilisateur_id, justificatif_url, statut, id_contact,
+                ecriture_principale_id, type_ecriture_comptable
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            values = (
+                data['date_ecriture'],
+                data['compte_bancaire_id'],
+                data['categorie_id'],
+                data['montant'],
+                data['montant_htva'],
+                data.get('devise', 'CHF'),
+                data.get('description', ''),
+                data.get('reference', ''),
+                data['type_ecriture'],
+                data.get('tva_taux'),
+                data.get('tva_montant'),
+                data['utilisateur_id'],
+                data.get('justificatif_url'),
+                data.get('statut', 'pending'),
+                data.get('id_contact'),
+                data.get('ecriture_principale_id'),
+                data.get('type_ecriture_comptable', 'complementaire')
+            )
+            cursor.execute(query, values)
+            logger.info(f"Écriture liée créée avec succès")
+        except Exception as e:
+            logger.error(f"Erreur lors de la création de l'écriture liée: {e}")
+            raise
+
+    # *** MÉTHODE POUR RÉCUPÉRER LES ÉCRITURES COMPLÉMENTAIRES D'UNE ÉCRITURE PRINCIPALE ***
+    def get_ecritures_complementaires(self, ecriture_principale_id: int, user_id: int) -> List[Dict]:
+        """
+        Récupère les écritures complémentaires directement liées à une écriture principale spécifique.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                           cb.nom_compte as compte_bancaire_nom
+                    FROM ecritures_comptables e
+                    LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                    LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                    WHERE e.ecriture_principale_id = %s AND e.utilisateur_id = %s
+                    AND e.type_ecriture_comptable = 'complementaire' -- S'assurer que c'est une complémentaire
+                """, (ecriture_principale_id, user_id))
+                ecritures = cursor.fetchall()
+                return ecritures
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des écritures complémentaires: {e}")
+            return []
+
+    # *** MÉTHODE POUR RÉCUPÉRER L'ÉCRITURE PRINCIPALE D'UNE ÉCRITURE COMPLÉMENTAIRE ***
+    def get_ecriture_principale(self, ecriture_complementaire_id: int, user_id: int) -> Optional[Dict]:
+        """
+        Récupère l'écriture principale liée à une écriture complémentaire spécifique.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Version simplifiée et optimisée en une seule requête
+                cursor.execute("""
+                    SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                        cb.nom_compte as compte_bancaire_nom
+                    FROM ecritures_comptables e
+                    LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                    LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                    WHERE e.id = (
+                        SELECT ecriture_principale_id
+                        FROM ecritures_comptables
+                        WHERE id = %s AND utilisateur_id = %s AND type_ecriture_comptable = 'complementaire'
+                    )
+                    AND e.utilisateur_id = %s
+                """, (ecriture_complementaire_id, user_id, user_id))
+
+                return cursor.fetchone()
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération de l'écriture principale: {e}")
+            return None
+    # *** MÉTHODE POUR METTRE À JOUR UNE ÉCRITURE PRINCIPALE ET SES COMPLÉMENTAIRES ***
+    def update_principale_et_complementaires(self, ecriture_principale_id: int, user_id: int, **kwargs) -> Tuple[bool, str]:
+        """
+        Met à jour une écriture principale et éventuellement ses écritures complémentaires
+        en fonction des modifications (par exemple, recalcul de la TVA si le montant change).
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # 1. Récupérer l'écriture principale avant modification
+                cursor.execute("""
+                    SELECT * FROM ecritures_comptables
+                    WHERE id = %s AND utilisateur_id = %s AND type_ecriture_comptable = 'principale'
+                """, (ecriture_principale_id, user_id))
+                ecriture_principale_avant = cursor.fetchone()
+                if not ecriture_principale_avant:
+                    return False, "Écriture principale non trouvée ou non autorisée"
+                contributions_avant = self._lire_contributions(cursor, user_id, ecriture_principale_id)
+
+                # 2. Mettre à jour l'écriture principale
+                champs = []
+                valeurs = []
+                for champ, valeur in kwargs.items():
+                    if valeur is not None and champ not in ['id', 'utilisateur_id', 'ecriture_principale_id', 'type_ecriture_comptable']:
+                        champs.append(f"{champ} = %s")
+                        valeurs.append(valeur)
+
+                if not champs:
+                    return False, "Aucune modification valide spécifiée pour l'écriture principale"
+
+                # Ajouter les conditions pour la mise à jour
+                valeurs.extend([ecriture_principale_id, user_id])
+                query_update_principale = f"""
+                    UPDATE ecritures_comptables
+                    SET {', '.join(champs)}
+                    WHERE id = %s AND utilisateur_id = %s AND type_ecriture_comptable = 'principale'
+                """
+                cursor.execute(query_update_principale, valeurs)
+                if cursor.rowcount == 0:
+                    return False, "Aucune ligne mise à jour pour l'écriture principale (vérifiez les permissions ou l'existence)"
+
+                # 3. Vérifier si des champs impactant les écritures complémentaires ont changé
+                montant_change = 'montant' in kwargs and kwargs['montant'] != ecriture_principale_avant['montant']
+                tva_taux_change = 'tva_taux' in kwargs and kwargs['tva_taux'] != ecriture_principale_avant['tva_taux']
+
+                if montant_change or tva_taux_change:
+                    # 4. Récupérer les écritures complémentaires
+                    ecritures_complementaires = self.get_ecritures_complementaires(ecriture_principale_id, user_id)
+
+                    # 5. Mettre à jour chaque écriture complémentaire
+                    for ecriture_comp in ecritures_complementaires:
+                        # Exemple de logique de mise à jour : recalculer la TVA si le montant principal change
+                        # Cela dépend de votre logique métier précise.
+                        # Ici, on suppose que le montant de la complémentaire (TVA) doit être recalculé.
+                        ancien_montant_principal = ecriture_principale_avant['montant']
+                        ancien_taux_tva = ecriture_principale_avant['tva_taux'] or 0
+                        nouveau_montant_principal = kwargs.get('montant', ancien_montant_principal)
+                        nouveau_taux_tva = kwargs.get('tva_taux', ancien_taux_tva) or 0
+
+                        # Exemple de recalcul de la TVA
+                        # ATTENTION : La logique réelle peut être plus complexe (TVA sur le prix HT, etc.)
+                        # Ici, on fait un recalcul simple basé sur le nouveau montant et le nouveau taux
+                        # par rapport à l'ancien. Il faut affiner selon votre besoin.
+                        # Ancienne TVA = ancien_montant_principal * (ancien_taux_tva / 100)
+                        # Nouvelle TVA = nouveau_montant_principal * (nouveau_taux_tva / 100)
+                        if montant_change or tva_taux_change:
+                            ancien_montant_tva = ecriture_comp['montant'] # Ancien montant de la complémentaire (TVA)
+                            ancienne_base = ancien_montant_principal
+                            nouveau_montant_tva = (nouveau_montant_principal * nouveau_taux_tva) / 100.0
+                            # Si ancien_taux_tva est 0, on ne peut pas recalculer proprement, on garde l'ancien montant_tva ou on le met à 0.
+                            # Une logique plus robuste est nécessaire ici.
+                            # Pour l'exemple, on met à jour avec le nouveau calcul si les deux changent ou si le taux change.
+                            # Si seul le montant change et que le taux est inchangé, on recalcule proportionnellement.
+                            if tva_taux_change:
+                                # Recalcul complet
+                                nouveau_montant_tva_calc = (nouveau_montant_principal * nouveau_taux_tva) / 100.0
+                            elif montant_change and ancien_taux_tva != 0:
+                                # Recalcul proportionnel si le taux n'a pas changé
+                                nouveau_montant_tva_calc = (ancien_montant_tva / ancienne_base) * nouveau_montant_principal
+                            else:
+                                # Aucun changement de taux, montant changé mais taux à 0, donc TVA devrait rester à 0
+                                nouveau_montant_tva_calc = 0.0
+
+                            cursor.execute("""
+                                UPDATE ecritures_comptables
+                                SET montant = %s, montant_htva = %s -- Mettre à jour le montant de la complémentaire
+                                WHERE id = %s AND utilisateur_id = %s AND type_ecriture_comptable = 'complementaire'
+                            """, (nouveau_montant_tva_calc, nouveau_montant_tva_calc, ecriture_comp['id'], user_id))
+                            logger.info("Écriture complémentaire %s mise à jour en fonction de la modification de la principale %s.", ecriture_comp['id'], ecriture_principale_id)
+
+                self._ajuster_cumuls(cursor, user_id, contributions_avant,
+                                     self._lire_contributions(cursor, user_id, ecriture_principale_id))
+                self._indexer(cursor, user_id, ecriture_principale_id)
+                return True, "Écriture principale mise à jour, complémentaires recalculées si nécessaire."
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour de l'écriture (principale ou complémentaire): {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def update(self, ecriture_id: int, data: Dict) -> bool:
+        # Validation du lien catégorie ↔ plan comptable du compte
+        try:
+            if data.get('id_contact'):
+                if not self._is_categorie_valid_for_contact(
+                    data['id_contact'],
+                    data['categorie_id'],
+                    data['utilisateur_id']
+                ):
+                    logger.warning("Catégorie non autorisée pour ce contact.")
+                    return False
+            with self.db.get_cursor() as cursor:
+                avant = self._lire_contributions(cursor, data['utilisateur_id'], ecriture_id, avec_secondaires=False)
+                query = """
+                UPDATE ecritures_comptables
+                SET date_ecriture = %s, compte_bancaire_id = %s, categorie_id = %s,
+                    montant = %s, montant_htva = %s, devise = %s, description = %s, id_contact = %s, reference = %s,
+                    type_ecriture = %s, tva_taux = %s, tva_montant = %s,
+                    justificatif_url = %s, statut = %s
+                WHERE id = %s AND utilisateur_id = %s
+                """
+                values = (
+                    data['date_ecriture'],
+                    data['compte_bancaire_id'],
+                    data['categorie_id'],
+                    data['montant'],
+                    data['montant_htva'],
+                    data.get('devise', 'CHF'),
+                    data.get('description', ''),
+                    data.get('id_contact'),
+                    data.get('reference', ''),
+                    data['type_ecriture'],
+                    data.get('tva_taux'),
+                    data.get('tva_montant'),
+                    data.get('justificatif_url'),
+                    data.get('statut', 'pending'),
+                    ecriture_id,
+                    data['utilisateur_id']
+                )
+
+                cursor.execute(query, values)
+                if cursor.rowcount == 0:
+                    return False
+                self._ajuster_cumuls(cursor, data['utilisateur_id'], avant,
+                                     self._lire_contributions(cursor, data['utilisateur_id'], ecriture_id, avec_secondaires=False))
+                self._indexer(cursor, data['utilisateur_id'], ecriture_id)
+                return True
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour de l'écriture comptable: {e}")
+            return False
+
+    def delete_hard(self, ecriture_id: int, user_id: int) -> Tuple[bool, str]:
+        """
+        Supprime une écriture comptable après avoir délié sa transaction.
+        Gère également la suppression des écritures secondaires associées.
+
+        Args:
+            ecriture_id: ID de l'écriture à supprimer
+            user_id: ID de l'utilisateur pour vérification de propriété
+
+        Returns:
+            Tuple (succès, message)
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # 1. Vérifier que l'écriture existe et appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id, transaction_id, type_ecriture_comptable, ecriture_principale_id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                ecriture = cursor.fetchone()
+
+                if not ecriture:
+                    return False, "Écriture non trouvée ou non autorisée"
+                contributions_avant = self._lire_contributions(cursor, user_id, ecriture_id)
+
+                # 2. Délier la transaction si elle existe
+                if ecriture['transaction_id']:
+                    cursor.execute(
+                        "UPDATE ecritures_comptables SET transaction_id = NULL WHERE id = %s",
+                        (ecriture_id,)
+                    )
+                    logger.info("Écriture %s déliée de la transaction %s", ecriture_id, ecriture['transaction_id'])
+
+                # 3. Gestion des écritures secondaires
+                ecritures_secondaires_ids = []
+
+                if ecriture['type_ecriture_comptable'] == 'principale':
+                    # Si c'est une écriture principale, récupérer ses écritures secondaires
+                    secondaires = self.get_ecritures_complementaires(ecriture_id, user_id)
+                    ecritures_secondaires_ids = [sec['id'] for sec in secondaires]
+                elif ecriture.get('ecriture_principale_id'):
+                    # Si c'est une écriture secondaire, on peut aussi supprimer la principale si souhaité
+                    # Pour l'instant, on ne supprime que la secondaire
+                    pass
+
+                # 4. Supprimer d'abord les écritures secondaires (si elles existent)
+                for sec_id in ecritures_secondaires_ids:
+                    cursor.execute(
+                        "DELETE FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                        (sec_id, user_id)
+                    )
+                    if cursor.rowcount > 0:
+                        logger.info("Écriture secondaire %s supprimée avec succès", sec_id)
+
+                # 5. Supprimer l'écriture principale
+                cursor.execute(
+                    "DELETE FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+
+                if cursor.rowcount > 0:
+                    self._ajuster_cumuls(cursor, user_id, contributions_avant, {})
+                    self._indexer(cursor, user_id, ecriture_id, ecritures_secondaires_ids)
+                    message = f"Écriture {ecriture_id} supprimée avec succès"
+                    if ecritures_secondaires_ids:
+                        message += f" ainsi que {len(ecritures_secondaires_ids)} écriture(s) secondaire(s)"
+                    logger.info(message)
+                    return True, message
+                else:
+                    return False, "Erreur lors de la suppression de l'écriture"
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression de l'écriture {ecriture_id}: {e}")
+            return False, f"Erreur lors de la suppression: {str(e)}"
+
+    def delete_soft(self, ecriture_id: int, user_id: int, soft_delete: bool = True) -> Tuple[bool, str]:
+        """
+        Supprime une écriture comptable (soft delete par défaut).
+        Gère également le soft delete des écritures secondaires associées.
+        Args:
+            ecriture_id: ID de l'écriture à supprimer
+            user_id: ID de l'utilisateur pour vérification de propriété
+            soft_delete: Si True, marque comme supprimée au lieu de supprimer définitivement
+        Returns:
+            Tuple (succès, message)
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que l'écriture existe et appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id, transaction_id, type_ecriture_comptable, ecriture_principale_id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                ecriture = cursor.fetchone()
+
+                if not ecriture:
+                    return False, "Écriture non trouvée ou non autorisée"
+                contributions_avant = self._lire_contributions(cursor, user_id, ecriture_id)
+
+                # Délier la transaction si elle existe
+                if ecriture['transaction_id']:
+                    cursor.execute(
+                        "UPDATE ecritures_comptables SET transaction_id = NULL WHERE id = %s",
+                        (ecriture_id,)
+                    )
+                    logger.info("Écriture %s déliée de la transaction %s", ecriture_id, ecriture['transaction_id'])
+
+                # Gestion des écritures secondaires
+                ecritures_secondaires_ids = []
+
+                if ecriture['type_ecriture_comptable'] == 'principale':
+                    # Si c'est une écriture principale, récupérer ses écritures secondaires
+                    secondaires = self.get_ecritures_complementaires(ecriture_id, user_id)
+                    ecritures_secondaires_ids = [sec['id'] for sec in secondaires]
+                elif ecriture.get('ecriture_principale_id'):
+                    # Si c'est une écriture secondaire, on peut aussi soft delete la principale si souhaité
+                    pass
+
+                if soft_delete:
+                    # SOFT DELETE: marquer comme supprimée l'écriture principale et ses secondaires
+                    success_count = 0
+
+                    # Marquer les écritures secondaires d'abord
+                    for sec_id in ecritures_secondaires_ids:
+                        cursor.execute("""
+                            UPDATE ecritures_comptables
+                            SET statut = 'supprimee', date_suppression = NOW()
+                            WHERE id = %s AND utilisateur_id = %s
+                        """, (sec_id, user_id))
+                        if cursor.rowcount > 0:
+                            success_count += 1
+                            logger.info("Écriture secondaire %s marquée comme supprimée", sec_id)
+
+                    # Marquer l'écriture principale
+                    cursor.execute("""
+                        UPDATE ecritures_comptables
+                        SET statut = 'supprimee', date_suppression = NOW()
+                        WHERE id = %s AND utilisateur_id = %s
+                    """, (ecriture_id, user_id))
+
+                    if cursor.rowcount > 0:
+                        success_count += 1
+                        logger.info("Écriture %s marquée comme supprimée", ecriture_id)
+
+                    if success_count > 0:
+                        self._ajuster_cumuls(cursor, user_id, contributions_avant,
+                                             self._lire_contributions(cursor, user_id, ecriture_id))
+                        self._indexer(cursor, user_id, ecriture_id, ecritures_secondaires_ids)
+                        message = f"Écriture {ecriture_id} marquée comme supprimée"
+                        if ecritures_secondaires_ids:
+                            message += f" ainsi que {len(ecritures_secondaires_ids)} écriture(s) secondaire(s)"
+                        return True, message
+                    else:
+                        return False, "Erreur lors du marquage des écritures comme supprimées"
+
+                else:
+                    # HARD DELETE: suppression définitive
+                    # Supprimer d'abord les écritures secondaires
+                    for sec_id in ecritures_secondaires_ids:
+                        cursor.execute(
+                            "DELETE FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                            (sec_id, user_id)
+                        )
+                        if cursor.rowcount > 0:
+                            logger.info("Écriture secondaire %s supprimée définitivement", sec_id)
+
+                    # Supprimer l'écriture principale
+                    cursor.execute(
+                        "DELETE FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                        (ecriture_id, user_id)
+                    )
+
+                    if cursor.rowcount > 0:
+                        self._ajuster_cumuls(cursor, user_id, contributions_avant, {})
+                        self._indexer(cursor, user_id, ecriture_id, ecritures_secondaires_ids)
+                        message = f"Écriture {ecriture_id} supprimée définitivement"
+                        if ecritures_secondaires_ids:
+                            message += f" ainsi que {len(ecritures_secondaires_ids)} écriture(s) secondaire(s)"
+                        logger.info(message)
+                        return True, message
+                    else:
+                        return False, "Erreur lors de la suppression de l'écriture"
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression de l'écriture {ecriture_id}: {e}")
+            return False, f"Erreur lors de la suppression: {str(e)}"
+
+    def get_by_id(self, ecriture_id: int) -> Optional[Dict]:
+        """Récupère une écriture par son ID"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.id = %s
+                """
+                cursor.execute(query, (ecriture_id,))
+                ecriture = cursor.fetchone()
+            return ecriture
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de l'écriture comptable: {e}")
+            return None
+
+    def get_by_compte_bancaire(self, compte_id: int, user_id: int,
+                            date_from: str = None, date_to: str = None,
+                            limit: int = 100, statut: str = None) -> List[Dict]:
+        """Récupère les écritures d'un compte bancaire avec filtrage par statut"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                WHERE e.compte_bancaire_id = %s AND e.utilisateur_id = %s
+                """
+                params = [compte_id, user_id]
+
+                if statut:
+                    query += " AND e.statut = %s"
+                    params.append(statut)
+
+                if date_from:
+                    query += " AND e.date_ecriture >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND e.date_ecriture <= %s"
+                    params.append(date_to)
+
+                query += " ORDER BY e.date_ecriture DESC LIMIT %s"
+                params.append(limit)
+
+                cursor.execute(query, tuple(params))
+                ecritures = cursor.fetchall()
+            return ecritures
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures: {e}")
+            return []
+
+    def get_ecritures_non_synchronisees(self, compte_id: int, user_id: int):
+        return self.get_by_compte_bancaire(
+            compte_id=compte_id,
+            user_id=user_id,
+            date_from=None,
+            date_to=None,
+            limit=100
+        )
+
+    def get_by_categorie(self, categorie_id: int, user_id: int,
+                        date_from: str = None, date_to: str = None,
+                        statut: str = None) -> List[Dict]:
+        """Récupère les écritures d'une catégorie avec filtrage par statut"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.categorie_id = %s AND e.utilisateur_id = %s
+                """
+                params = [categorie_id, user_id]
+
+                if statut:
+                    query += " AND e.statut = %s"
+                    params.append(statut)
+
+                if date_from:
+                    query += " AND e.date_ecriture >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND e.date_ecriture <= %s"
+                    params.append(date_to)
+
+                query += " ORDER BY e.date_ecriture DESC"
+
+                cursor.execute(query, tuple(params))
+                ecritures = cursor.fetchall()
+            return ecritures
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures par catégorie: {e}")
+            return []
+
+    def get_stats_by_categorie(self, user_id: int, date_from: str = None,
+                          date_to: str = None, statut: str = 'validée') -> List[Dict]:
+        """Récupère les statistiques par catégorie avec filtrage par statut"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, numero, nom, type_compte FROM categories_comptables
+                    WHERE actif = TRUE ORDER BY numero
+                """)
+                categories = cursor.fetchall()
+            # nb_ecritures compte les écritures de tous les statuts, les montants seulement celles de `statut`
+            return self.stats_depuis_totaux(categories, self._totaux_par_categorie(user_id, date_from, date_to), statut)
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des statistiques par catégorie: {e}")
+            return []
+
+    @staticmethod
+    def stats_depuis_totaux(categories: List[Dict], totaux: Dict[tuple, list], statut: str) -> List[Dict]:
+        """Lignes de get_stats_by_categorie à partir de totaux (catégorie, statut, type) -> [nb, montant, htva]"""
+        par_categorie = {}
+        for (categorie_id, statut_ligne, type_ecriture), (nb, montant, htva) in totaux.items():
+            cumul = par_categorie.setdefault(categorie_id, {'nb': 0})
+            cumul['nb'] += nb
+            if statut_ligne == statut:
+                cumul[type_ecriture] = (cumul.get(type_ecriture, (ZERO, ZERO))[0] + montant,
+                                        cumul.get(type_ecriture, (ZERO, ZERO))[1] + htva)
+        stats = []
+        for c in categories:
+            cumul = par_categorie.get(c['id'], {'nb': 0})
+            depenses, depenses_htva = cumul.get('depense', (ZERO, ZERO))
+            recettes, recettes_htva = cumul.get('recette', (ZERO, ZERO))
+            stats.append({
+                'categorie_id': c['id'],
+                'categorie_numero': c['numero'],
+                'categorie_nom': c['nom'],
+                'categorie_type': c['type_compte'],
+                'total_depenses': depenses.en_decimal(),
+                'total_depenses_htva': depenses_htva.en_decimal(),
+                'total_recettes': recettes.en_decimal(),
+                'total_recettes_htva': recettes_htva.en_decimal(),
+                'nb_ecritures': cumul['nb'],
+            })
+        return stats
+
+    def _validate_date(date_str: str) -> bool:
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+            return True
+        except ValueError:
+            return False
+    @staticmethod
+    def _validate_date(date_str: str) -> bool:
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+            return True
+        except ValueError:
+            return False
+    # ===== CUMULS MENSUELS =====
+    # cumuls_comptables contient une ligne par (utilisateur, catégorie, année, mois, statut, type)
+    # avec le nombre d'écritures et les sommes des montants. Chaque écriture (création, modification,
+    # changement de statut, suppression) ajuste ses lignes dans la même transaction ; le compte de
+    # résultat, le bilan et les rapports lisent ces cumuls au lieu de parcourir le grand livre.
+
+    @staticmethod
+    def _indexer(cursor, user_id: int, ecriture_id: int, autres_ids=()) -> None:
+        """Réindexe pour la recherche une écriture, ses écritures complémentaires et `autres_ids` (supprimées)"""
+        ids = [ecriture_id, *autres_ids]
+        try:
+            cursor.execute("SELECT id FROM ecritures_comptables WHERE ecriture_principale_id = %s", (ecriture_id,))
+            ids.extend(r['id'] if isinstance(r, dict) else r[0] for r in cursor.fetchall())
+        except Exception as e:
+            logger.warning(f"Écritures complémentaires de {ecriture_id} non réindexées: {e}")
+        IndexRecherche.indexer_with_cursor(cursor, user_id, 'ecriture', ids)
+
+    @staticmethod
+    def _lire_contributions(cursor, user_id: int, ecriture_id: int, avec_secondaires: bool = True) -> Dict[tuple, tuple]:
+        """Part d'une écriture (et de ses complémentaires) dans les cumuls : clé -> (nb, montant, htva)"""
+        if avec_secondaires:
+            condition, params = "(id = %s OR ecriture_principale_id = %s)", (ecriture_id, ecriture_id, user_id)
+        else:
+            condition, params = "id = %s", (ecriture_id, user_id)
+        cursor.execute(f"""
+            SELECT categorie_id, YEAR(date_ecriture) AS annee, MONTH(date_ecriture) AS mois,
+                   COALESCE(statut, '') AS statut, type_ecriture, COUNT(*) AS nb,
+                   SUM(COALESCE(montant, 0)) AS montant, SUM(COALESCE(montant_htva, 0)) AS montant_htva
+            FROM ecritures_comptables
+            WHERE {condition} AND utilisateur_id = %s
+            GROUP BY categorie_id, YEAR(date_ecriture), MONTH(date_ecriture), COALESCE(statut, ''), type_ecriture
+        """, params)
+        return {
+            (r['categorie_id'], r['annee'], r['mois'], r['statut'], r['type_ecriture']):
+                (r['nb'], Montant.depuis(r['montant']), Montant.depuis(r['montant_htva']))
+            for r in cursor.fetchall()
+        }
+
+    @staticmethod
+    def _ajuster_cumuls(cursor, user_id: int, avant: Dict[tuple, tuple], apres: Dict[tuple, tuple]) -> None:
+        """Applique aux cumuls la différence entre les contributions avant et après une écriture"""
+        # Toute écriture (création, modification, statut, suppression) passe par ici
+        VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', user_id)
+        delta = {}
+        for signe, contributions in ((-1, avant), (1, apres)):
+            for cle, (nb, montant, htva) in contributions.items():
+                nb_total, montant_total, htva_total = delta.get(cle, (0, ZERO, ZERO))
+                delta[cle] = (nb_total + signe * nb, montant_total + montant * signe, htva_total + htva * signe)
+        lignes = [(user_id, *cle, nb, montant.en_decimal(), htva.en_decimal())
+                  for cle, (nb, montant, htva) in delta.items() if nb or montant or htva]
+        if not lignes:
+            return
+        try:
+            cursor.executemany("""
+                INSERT INTO cumuls_comptables
+                (utilisateur_id, categorie_id, annee, mois, statut, type_ecriture,
+                 nb_ecritures, total_montant, total_montant_htva)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    nb_ecritures = nb_ecritures + VALUES(nb_ecritures),
+                    total_montant = total_montant + VALUES(total_montant),
+                    total_montant_htva = total_montant_htva + VALUES(total_montant_htva)
+            """, lignes)
+            cursor.execute("DELETE FROM cumuls_comptables WHERE utilisateur_id = %s AND nb_ecritures = 0", (user_id,))
+        except Exception as e:
+            # L'écriture métier n'est pas annulée : les cumuls de l'utilisateur sont vidés
+            # et seront reconstruits à la prochaine lecture (_assurer_cumuls)
+            logger.warning(f"Cumuls comptables non ajustés pour l'utilisateur {user_id}: {e}")
+            try:
+                cursor.execute("DELETE FROM cumuls_comptables WHERE utilisateur_id = %s", (user_id,))
+            except Exception:
+                pass
+
+    @staticmethod
+    def _reconstruire_cumuls_with_cursor(cursor, user_id: int) -> None:
+        cursor.execute("DELETE FROM cumuls_comptables WHERE utilisateur_id = %s", (user_id,))
+        cursor.execute("""
+            INSERT INTO cumuls_comptables
+            (utilisateur_id, categorie_id, annee, mois, statut, type_ecriture,
+             nb_ecritures, total_montant, total_montant_htva)
+            SELECT utilisateur_id, categorie_id, YEAR(date_ecriture), MONTH(date_ecriture),
+                   COALESCE(statut, ''), type_ecriture, COUNT(*),
+                   SUM(COALESCE(montant, 0)), SUM(COALESCE(montant_htva, 0))
+            FROM ecritures_comptables
+            WHERE utilisateur_id = %s
+            GROUP BY utilisateur_id, categorie_id, YEAR(date_ecriture), MONTH(date_ecriture),
+                     COALESCE(statut, ''), type_ecriture
+        """, (user_id,))
+
+    def reconstruire_cumuls(self, user_id: int) -> bool:
+        """Recalcule tous les cumuls d'un utilisateur depuis le grand livre (migration, réparation)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                self._reconstruire_cumuls_with_cursor(cursor, user_id)
+            logger.info(f"Cumuls comptables reconstruits pour l'utilisateur {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Erreur reconstruction des cumuls comptables de l'utilisateur {user_id}: {e}")
+            return False
+
+    def _assurer_cumuls(self, cursor, user_id: int) -> bool:
+        """
+        Vérifie que les cumuls de l'utilisateur sont disponibles, en les construisant s'il a des
+        écritures mais aucun cumul (base existante, cumuls invalidés). False si la table est
+        inutilisable : l'appelant lit alors le grand livre.
+        """
+        try:
+            cursor.execute("SELECT 1 FROM cumuls_comptables WHERE utilisateur_id = %s LIMIT 1", (user_id,))
+            if cursor.fetchone():
+                return True
+            cursor.execute("SELECT 1 FROM ecritures_comptables WHERE utilisateur_id = %s LIMIT 1", (user_id,))
+            if cursor.fetchone():
+                self._reconstruire_cumuls_with_cursor(cursor, user_id)
+            return True
+        except Exception as e:
+            logger.warning(f"Cumuls comptables indisponibles, lecture du grand livre: {e}")
+            return False
+
+    @staticmethod
+    def _en_date(valeur) -> Optional[date]:
+        if valeur is None or valeur == '':
+            return None
+        if isinstance(valeur, datetime):
+            return valeur.date()
+        if isinstance(valeur, date):
+            return valeur
+        return datetime.strptime(str(valeur)[:10], '%Y-%m-%d').date()
+
+    @staticmethod
+    def _ajouter_totaux(totaux: Dict[tuple, list], lignes) -> None:
+        for r in lignes:
+            cumul = totaux.setdefault((r['categorie_id'], r['statut'], r['type_ecriture']), [0, ZERO, ZERO])
+            cumul[0] += int(r['nb'] or 0)
+            cumul[1] += Montant.depuis(r['montant'])
+            cumul[2] += Montant.depuis(r['montant_htva'])
+
+    def _totaux_par_categorie(self, user_id: int, date_from=None, date_to=None,
+                              statuts: Optional[Tuple[str, ...]] = None) -> Dict[tuple, list]:
+        """
+        Totaux (catégorie, statut, type) -> [nb, montant, htva] entre deux dates incluses (None : pas de borne).
+        Les mois entiers viennent des cumuls ; seuls les mois entamés aux bornes sont lus dans le grand livre.
+        """
+        debut, fin = self._en_date(date_from), self._en_date(date_to)
+        totaux = {}
+        filtre_statut, params_statut = '', []
+        if statuts:
+            filtre_statut = f" AND statut IN ({', '.join(['%s'] * len(statuts))})"
+            params_statut = list(statuts)
+
+        with self.db.get_cursor() as cursor:
+            tranches = [(debut, fin)]
+            if self._assurer_cumuls(cursor, user_id):
+                # Premier et dernier jour de la plage de mois entiers couverte par la période
+                premier = debut if debut is None or debut.day == 1 else (debut.replace(day=28) + timedelta(days=4)).replace(day=1)
+                dernier = fin if fin is None or (fin + timedelta(days=1)).day == 1 else fin.replace(day=1) - timedelta(days=1)
+                if premier is None or dernier is None or premier <= dernier:
+                    tranches = []
+                    if debut is not None and premier > debut:
+                        tranches.append((debut, premier - timedelta(days=1)))
+                    if fin is not None and dernier < fin:
+                        tranches.append((dernier + timedelta(days=1), fin))
+                    conditions, params = ["utilisateur_id = %s"], [user_id]
+                    if premier is not None:
+                        conditions.append("annee * 100 + mois >= %s")
+                        params.append(premier.year * 100 + premier.month)
+                    if dernier is not None:
+                        conditions.append("annee * 100 + mois <= %s")
+                        params.append(dernier.year * 100 + dernier.month)
+                    cursor.execute(f"""
+                        SELECT categorie_id, statut, type_ecriture, SUM(nb_ecritures) AS nb,
+                               SUM(total_montant) AS montant, SUM(total_montant_htva) AS montant_htva
+                        FROM cumuls_comptables
+                        WHERE {' AND '.join(conditions)}{filtre_statut}
+                        GROUP BY categorie_id, statut, type_ecriture
+                    """, params + params_statut)
+                    self._ajouter_totaux(totaux, cursor.fetchall())
+
+            if tranches:
+                conditions_dates, params = [], [user_id]
+                for a, b in tranches:
+                    bornes = []
+                    if a is not None:
+                        bornes.append("date_ecriture >= %s")
+                        params.append(a)
+                    if b is not None:
+                        bornes.append("date_ecriture <= %s")
+                        params.append(b)
+                    conditions_dates.append(f"({' AND '.join(bornes) or '1 = 1'})")
+                cursor.execute(f"""
+                    SELECT categorie_id, COALESCE(statut, '') AS statut, type_ecriture, COUNT(*) AS nb,
+                           SUM(COALESCE(montant, 0)) AS montant, SUM(COALESCE(montant_htva, 0)) AS montant_htva
+                    FROM ecritures_comptables
+                    WHERE utilisateur_id = %s AND ({' OR '.join(conditions_dates)}){filtre_statut}
+                    GROUP BY categorie_id, COALESCE(statut, ''), type_ecriture
+                """, params + params_statut)
+                self._ajouter_totaux(totaux, cursor.fetchall())
+        return totaux
+
+    def get_totaux_mensuels(self, user_id: int, annee: int) -> Dict[int, Dict[tuple, list]]:
+        """Totaux d'une année mois par mois : mois -> {(catégorie, statut, type): [nb, montant, htva]}"""
+        totaux = {mois: {} for mois in range(1, 13)}
+        with self.db.get_cursor() as cursor:
+            if self._assurer_cumuls(cursor, user_id):
+                cursor.execute("""
+                    SELECT mois, categorie_id, statut, type_ecriture, nb_ecritures AS nb,
+                           total_montant AS montant, total_montant_htva AS montant_htva
+                    FROM cumuls_comptables
+                    WHERE utilisateur_id = %s AND annee = %s
+                """, (user_id, annee))
+            else:
+                cursor.execute("""
+                    SELECT MONTH(date_ecriture) AS mois, categorie_id, COALESCE(statut, '') AS statut,
+                           type_ecriture, COUNT(*) AS nb, SUM(COALESCE(montant, 0)) AS montant,
+                           SUM(COALESCE(montant_htva, 0)) AS montant_htva
+                    FROM ecritures_comptables
+                    WHERE utilisateur_id = %s AND date_ecriture BETWEEN %s AND %s
+                    GROUP BY MONTH(date_ecriture), categorie_id, COALESCE(statut, ''), type_ecriture
+                """, (user_id, date(annee, 1, 1), date(annee, 12, 31)))
+            lignes = cursor.fetchall()
+        for r in lignes:
+            self._ajouter_totaux(totaux[int(r['mois'])], [r])
+        return totaux
+
+    def _categories_par_id(self, ids) -> Dict[int, Dict]:
+        if not ids:
+            return {}
+        ids = list(ids)
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"SELECT id, numero, nom, type_compte FROM categories_comptables WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            return {c['id']: c for c in cursor.fetchall()}
+
+    def get_compte_de_resultat(self, user_id: int, date_from: str, date_to: str) -> Dict:
+        if not (self._validate_date(date_from) and self._validate_date(date_to)):
+            logger.error("Format de date invalide dans get_compte_de_resultat")
+            return {}
+
+        try:
+            totaux = self._totaux_par_categorie(user_id, date_from, date_to, ('validée',))
+            categories = self._categories_par_id({categorie_id for categorie_id, _, _ in totaux})
+            lignes = {'recette': [], 'depense': []}
+            for (categorie_id, _, type_ecriture), (nb, montant, htva) in totaux.items():
+                categorie = categories.get(categorie_id)
+                if categorie is None or type_ecriture not in lignes:
+                    continue
+                lignes[type_ecriture].append({
+                    'numero': categorie['numero'],
+                    'categorie_nom': categorie['nom'],
+                    'categorie_id': categorie_id,
+                    'nombre_ecritures': nb,
+                    'montant': montant.en_decimal(),
+                    'montant_htva': htva.en_decimal(),
+                })
+            produits = sorted(lignes['recette'], key=lambda l: l['numero'])
+            charges = sorted(lignes['depense'], key=lambda l: l['numero'])
+
+            total_produits = sum(p['montant'] for p in produits)
+            total_produits_htva = sum(p['montant_htva'] for p in produits)
+            total_charges = sum(c['montant'] for c in charges)
+            total_charges_htva = sum(c['montant_htva'] for c in charges)
+            resultat = total_produits - total_charges
+
+            return {
+                'produits': produits,
+                'charges': charges,
+                'total_produits': total_produits,
+                'total_produits_htva': total_produits_htva,
+                'total_charges': total_charges,
+                'total_charges_htva': total_charges_htva,
+                'resultat': resultat,
+                'date_from': date_from,
+                'date_to': date_to
+            }
+        except Exception as e:
+            logger.error(f"Erreur génération compte de résultat: {e}")
+            return {}
+
+    def get_bilan(self, user_id: int, date_bilan: str) -> Dict:
+        """
+        Génère le bilan à une date donnée (solde cumulé jusqu'à date_bilan inclus).
+        """
+        if not self._validate_date(date_bilan):
+            logger.error("Format de date invalide pour le bilan")
+            return {}
+
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT id AS categorie_id, numero, nom AS categorie_nom, type_compte
+                    FROM categories_comptables
+                    WHERE utilisateur_id = %s
+                    AND actif = TRUE
+                    AND type_compte IN ('Actif', 'Passif', 'Capitaux propres')
+                    ORDER BY numero
+                """, (user_id,))
+                lignes = cursor.fetchall()
+
+            # Soldes cumulés de toutes les écritures validées jusqu'à la date du bilan
+            soldes = {}
+            for (categorie_id, _, type_ecriture), (_, montant, _) in self._totaux_par_categorie(
+                    user_id, None, date_bilan, ('validée',)).items():
+                if type_ecriture == 'recette':
+                    soldes[categorie_id] = soldes.get(categorie_id, ZERO) + montant
+                elif type_ecriture == 'depense':
+                    soldes[categorie_id] = soldes.get(categorie_id, ZERO) - montant
+            for ligne in lignes:
+                ligne['solde'] = soldes.get(ligne['categorie_id'])
+
+            # Répartir entre actif, passif, capitaux
+            actif = []
+            passif = []
+            capitaux = []
+
+            total_actif = 0.0
+            total_passif = 0.0
+            total_capitaux = 0.0
+
+            for ligne in lignes:
+                solde = float(ligne['solde'] or 0.0)
+                item = {
+                    'categorie_id': ligne['categorie_id'],
+                    'numero': ligne['numero'],
+                    'nom': ligne['categorie_nom'],
+                    'solde': solde
+                }
+
+                if ligne['type_compte'] == 'Actif':
+                    actif.append(item)
+                    total_actif += solde
+                elif ligne['type_compte'] == 'Passif':
+                    passif.append(item)
+                    total_passif += solde
+                elif ligne['type_compte'] in ('Capitaux propres', 'Capital', 'Fonds propres'):
+                    capitaux.append(item)
+                    total_capitaux += solde
+
+            total_passif_et_capitaux = total_passif + total_capitaux
+            écart = total_actif - total_passif_et_capitaux
+
+            return {
+                'actif': actif,
+                'passif': passif,
+                'capitaux': capitaux,
+                'total_actif': total_actif,
+                'total_passif': total_passif,
+                'total_capitaux': total_capitaux,
+                'total_passif_et_capitaux': total_passif_et_capitaux,
+                'écart': écart,  # doit être ~0
+                'date_bilan': date_bilan
+            }
+
+        except Exception as e:
+            logger.error(f"Erreur génération bilan: {e}")
+            return {}
+
+    def get_ecritures_by_categorie_period(self, user_id: int, type_categorie: str = None,
+                                            categorie_id: int = None, date_from: str = None,
+                                            date_to: str = None, statut: str = 'validée') -> Tuple[List[Dict], float, str]:
+            """
+            Récupère les écritures par catégorie et période avec calcul du total et génération du titre
+
+            Returns:
+                Tuple: (ecritures, total, titre)
+            """
+            try:
+                with self.db.get_cursor() as cursor:
+                    # Construire la requête avec une jointure LEFT pour les contacts
+                    query = """
+                        SELECT
+                            e.id,
+                            e.date_ecriture,
+                            e.description,
+                            e.reference,
+                            e.montant,
+                            e.statut,
+                            e.id_contact,
+                            c.nom as categorie_nom,
+                            c.numero as categorie_numero,
+                            ct.nom as contact_nom
+                        FROM ecritures_comptables e
+                        JOIN categories_comptables c ON e.categorie_id = c.id
+                        LEFT JOIN contacts ct ON e.id_contact = ct.id_contact
+                        WHERE e.utilisateur_id = %s
+                        AND e.date_ecriture BETWEEN %s AND %s
+                        AND e.statut = %s
+                    """
+                    params = [user_id, date_from, date_to, statut]
+
+                    if type_categorie == 'produit':
+                        query += " AND c.type_compte = 'Revenus' OR c.type_compte = 'Actif'"
+                    elif type_categorie == 'charge':
+                        query += " AND c.type_compte = 'Charge' OR c.type_compte = 'Passif'"
+
+                    if categorie_id and categorie_id != 'all':
+                        query += " AND e.categorie_id = %s"
+                        params.append(int(categorie_id))
+
+                    query += " ORDER BY e.date_ecriture DESC"
+                    cursor.execute(query, tuple(params))
+                    ecritures = cursor.fetchall()
+
+                    # Calculer le total
+                    total = sum(float(e['montant']) for e in ecritures) if ecritures else 0
+
+                    # Générer le titre
+                    titre = self._generate_titre_detail(cursor, type_categorie, categorie_id, ecritures, date_from[:4])
+
+                    return ecritures, total, titre
+
+            except Exception as e:
+                logger.error(f"Erreur lors de la récupération des écritures par catégorie: {e}")
+                return [], 0, ""
+
+    def _generate_titre_detail(self, cursor, type_categorie: str, categorie_id: str,
+                            ecritures: List[Dict], annee: str) -> str:
+        """Génère le titre pour la page de détail"""
+        if categorie_id == 'all':
+            return f"Tous les {type_categorie}s - {annee}"
+        else:
+            # Récupérer le nom de la catégorie depuis la première écriture ou depuis la base
+            if ecritures:
+                categorie_nom = ecritures[0]['categorie_nom']
+                categorie_numero = ecritures[0]['categorie_numero']
+            else:
+                # Si pas d'écritures, récupérer le nom de la catégorie directement
+                cursor.execute("SELECT nom, numero FROM categories_comptables WHERE id = %s", (int(categorie_id),))
+                categorie = cursor.fetchone()
+                categorie_nom = categorie['nom'] if categorie else "Catégorie inconnue"
+                categorie_numero = categorie['numero'] if categorie else "Numéro inconnu"
+            return f"{categorie_numero} : {categorie_nom} - {annee}"
+
+    def update_statut(self, ecriture_id: int, user_id: int, statut: str) -> bool:
+        """Met à jour uniquement le statut d'une écriture"""
+        try:
+            with self.db.get_cursor() as cursor:
+                avant = self._lire_contributions(cursor, user_id, ecriture_id)
+                secondary_ecriture = self.get_ecritures_complementaires(ecriture_id, user_id)
+                if secondary_ecriture:
+                    query = """
+                    UPDATE ecritures_comptables
+                    SET statut = %s
+                    WHERE (id = %s OR ecriture_principale_id = %s)
+                    AND utilisateur_id = %s
+                    """
+                    cursor.execute(query, (statut, ecriture_id, ecriture_id, user_id))
+                else:
+                    # Mettre à jour le statut de l'écriture principale et de ses complémentaires
+                    query = """UPDATE ecritures_comptables
+                    SET statut = %s
+                    WHERE id = %s
+                    AND utilisateur_id = %s"""
+                    cursor.execute(query, (statut, ecriture_id, user_id))
+                self._ajuster_cumuls(cursor, user_id, avant, self._lire_contributions(cursor, user_id, ecriture_id))
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour du statut: {e}")
+            return False
+
+    def get_by_statut(self, user_id: int, statut: str, date_from: str = None,
+                  date_to: str = None, limit: int = 100) -> List[Dict]:
+        """Récupère les écritures par statut avec filtres optionnels"""
+        ecritures = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                    cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.utilisateur_id = %s AND e.statut = %s
+                """
+
+                params = [user_id, statut]
+
+                if date_from:
+                    query += " AND e.date_ecriture >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND e.date_ecriture <= %s"
+                    params.append(date_to)
+
+                query += " ORDER BY e.date_ecriture DESC LIMIT %s"
+                params.append(limit)
+
+                cursor.execute(query, tuple(params))
+                ecritures = cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures par statut: {e}")
+
+        return ecritures
+
+    def get_statistiques_par_statut(self, user_id: int) -> Dict:
+        """Retourne les statistiques regroupées par statut"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Statistiques par statut
+                query = """
+                SELECT
+                    statut,
+                    COUNT(*) as nb_ecritures,
+                    SUM(CASE WHEN type_ecriture = 'depense' THEN montant ELSE 0 END) as total_depenses,
+                    SUM(CASE WHEN type_ecriture = 'depense' THEN montant_htva ELSE 0 END) as total_depenses_htva,
+                    SUM(CASE WHEN type_ecriture = 'recette' THEN montant ELSE 0 END) as total_recettes,
+                    SUM(CASE WHEN type_ecriture = 'recette' THEN montant_htva ELSE 0 END) as total_recettes_htva,
+                    AVG(CASE WHEN type_ecriture = 'depense' THEN montant ELSE NULL END) as moyenne_depenses,
+                    AVG(CASE WHEN type_ecriture = 'depense' THEN montant_htva ELSE NULL END) as moyenne_depenses_htva,
+                    AVG(CASE WHEN type_ecriture = 'recette' THEN montant ELSE NULL END) as moyenne_recettes,
+                    AVG(CASE WHEN type_ecriture = 'recette' THEN montant_htva ELSE NULL END) as moyenne_recettes_htva
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                GROUP BY statut
+                ORDER BY statut
+                """
+                cursor.execute(query, (user_id,))
+                stats_par_statut = cursor.fetchall()
+
+                # Dernières écritures par statut
+                cursor.execute("""
+                SELECT statut, COUNT(*) as nb_ecritures_30j
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                AND date_ecriture >= DATE_SUB(NOW(), INTERVAL 30 DAY)
+                GROUP BY statut
+                """, (user_id,))
+                stats_recentes = cursor.fetchall()
+
+            return {
+                'statistiques_par_statut': stats_par_statut,
+                'statistiques_recentes': stats_recentes
+            }
+
+        except Error as e:
+            logger.error(f"Erreur lors du calcul des statistiques par statut: {e}")
+            return {}
+
+    def get_alertes_statut(self, user_id: int) -> List[Dict]:
+        """Retourne les alertes concernant les statuts"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Écritures en attente depuis plus de 7 jours
+                query = """
+                SELECT
+                    COUNT(*) as nb_ecritures_attente,
+                    MIN(date_ecriture) as plus_ancienne_attente,
+                    DATEDIFF(NOW(), MIN(date_ecriture)) as jours_attente
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                AND statut = 'pending'
+                AND date_ecriture <= DATE_SUB(NOW(), INTERVAL 7 DAY)
+                """
+                cursor.execute(query, (user_id,))
+                alertes = cursor.fetchall()
+
+                # Écritures rejetées récentes
+                cursor.execute("""
+                SELECT COUNT(*) as nb_ecritures_rejetees_7j
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                AND statut = 'rejetée'
+                AND date_ecriture >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+                """, (user_id,))
+                rejetees_recentes = cursor.fetchone()
+
+            resultat = []
+            if alertes and alertes[0]['nb_ecritures_attente'] > 0:
+                resultat.append({
+                    'type': 'attente_longue',
+                    'message': f"{alertes[0]['nb_ecritures_attente']} écriture(s) en attente depuis plus de 7 jours",
+                    'niveau': 'warning'
+                })
+
+            if rejetees_recentes and rejetees_recentes['nb_ecritures_rejetees_7j'] > 0:
+                resultat.append({
+                    'type': 'rejet_recent',
+                    'message': f"{rejetees_recentes['nb_ecritures_rejetees_7j']} écriture(s) rejetée(s) cette semaine",
+                    'niveau': 'danger'
+                })
+
+            return resultat
+
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des alertes: {e}")
+            return []
+
+    def get_indicateurs_performance(self, user_id: int, statut: str = 'validée') -> Dict:
+        """Retourne des indicateurs de performance financière"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Taux de validation
+                cursor.execute("""
+                SELECT
+                    COUNT(*) as total_ecritures,
+                    SUM(CASE WHEN statut = 'validée' THEN 1 ELSE 0 END) as ecritures_validees,
+                    SUM(CASE WHEN statut = 'pending' THEN 1 ELSE 0 END) as ecritures_attente,
+                    SUM(CASE WHEN statut = 'rejetée' THEN 1 ELSE 0 END) as ecritures_rejetees,
+                    ROUND((SUM(CASE WHEN statut = 'validée' THEN 1 ELSE 0 END) / COUNT(*) * 100), 2) as taux_validation
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                """, (user_id,))
+                taux_validation = cursor.fetchone()
+
+                # Temps moyen de traitement
+                cursor.execute("""
+                SELECT
+                    AVG(DATEDIFF(date_validation, date_ecriture)) as temps_traitement_moyen
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                AND statut = 'validée'
+                AND date_validation IS NOT NULL
+                """, (user_id,))
+                temps_traitement = cursor.fetchone()
+
+            return {
+                'taux_validation': taux_validation,
+                'temps_traitement_moyen': temps_traitement['temps_traitement_moyen'] if temps_traitement else 0,
+                'statut_reference': statut
+            }
+
+        except Error as e:
+            logger.error(f"Erreur lors du calcul des indicateurs de performance: {e}")
+            return {}
+
+    def get_annees_disponibles(self, user_id):
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT DISTINCT YEAR(date_ecriture) AS annee
+                    FROM ecritures_comptables
+                    WHERE utilisateur_id = %s
+                    ORDER BY annee DESC
+                """
+                cursor.execute(query, (user_id,))
+                annees = [row['annee'] for row in cursor.fetchall()]
+                return annees
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des années disponibles : {e}")
+            return []
+
+    def get_all(self, user_id: int, date_from: str = None, date_to: str = None, limit: int = 100) -> List[Dict]:
+        """Récupère toutes les écritures avec filtres optionnels"""
+        ecritures = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                    cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.utilisateur_id = %s
+                """
+                params = [user_id]
+
+                if date_from:
+                    query += " AND e.date_ecriture >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND e.date_ecriture <= %s"
+                    params.append(date_to)
+
+                query += " ORDER BY e.date_ecriture DESC LIMIT %s"
+                params.append(limit)
+
+                cursor.execute(query, tuple(params))
+                ecritures = cursor.fetchall()
+
+                return ecritures
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures: {e}")
+            return []
+
+    def get_with_filters(self, user_id: int, date_from: str = None, date_to: str = None,
+                        statut: str = None, id_contact: int = None, compte_id: int = None,
+                        categorie_id: int = None, type_ecriture: str = None, type_ecriture_comptable: str = None,
+                        limit: int = 100) -> List[Dict]:
+        """Récupère les écritures avec tous les filtres combinés (lignes compactes, sans le fichier joint)"""
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                query = f"""
+                SELECT {self.COLONNES_LISTE}, c.numero as categorie_numero, c.nom as categorie_nom,
+                    cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.utilisateur_id = %s
+                """
+                params = [user_id]
+
+                if date_from:
+                    query += " AND e.date_ecriture >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND e.date_ecriture <= %s"
+                    params.append(date_to)
+                if statut:
+                    query += " AND e.statut = %s"
+                    params.append(statut)
+                if id_contact:
+                    query += " AND e.id_contact = %s"
+                    params.append(id_contact)
+                if compte_id:
+                    query += " AND e.compte_bancaire_id = %s"
+                    params.append(compte_id)
+                if categorie_id:
+                    query += " AND e.categorie_id = %s"
+                    params.append(categorie_id)
+                if type_ecriture:
+                    query += " AND e.type_ecriture = %s"
+                    params.append(type_ecriture)
+                if type_ecriture_comptable:
+                    query += " AND e.type_ecriture_comptable = %s"
+                    params.append(type_ecriture_comptable)
+
+
+                query += " ORDER BY e.date_ecriture DESC LIMIT %s"
+                params.append(limit)
+
+                return self.db.lire_lignes(query, tuple(params), nom='LigneEcriture', cursor=cursor)
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures avec filtres: {e}")
+            return []
+
+    def get_by_user_period(self, user_id, date_from, date_to):
+        """Récupère toutes les écritures pour une période donnée"""
+        ecritures =[]
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                    cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.utilisateur_id = %s AND e.date_ecriture BETWEEN %s AND %s
+                ORDER BY e.date_ecriture DESC
+                """
+                params = [user_id, date_from, date_to]
+                cursor.execute(query, tuple(params))
+                ecritures = cursor.fetchall()
+                return ecritures
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures par période: {e}")
+            return []
+
+    def get_by_contact_id(self, contact_id: int, utilisateur_id: int) -> List[Dict]:
+        """Récupère toutes les écritures liées à un contact"""
+        ecritures = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT ec.*, cp.nom_compte
+                FROM ecritures_comptables ec
+                LEFT JOIN comptes_principaux cp ON ec.compte_bancaire_id = cp.id
+                WHERE ec.id_contact = %s AND ec.utilisateur_id = %s
+                ORDER BY ec.date_ecriture DESC
+                """
+                cursor.execute(query, (contact_id, utilisateur_id))
+                ecritures = cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures: {e}")
+        return ecritures
+
+    def get_synthese_statuts(self, user_id: int, date_from: str, date_to: str) -> Dict:
+        """Retourne une synthèse des écritures par statut"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    statut,
+                    COUNT(*) as nombre,
+                    SUM(CASE WHEN type_ecriture = 'depense' THEN montant ELSE 0 END) as total_depenses,
+                    SUM(CASE WHEN type_ecriture = 'depense' THEN montant_htva ELSE 0 END) as total_depenses_htva,
+                    SUM(CASE WHEN type_ecriture = 'recette' THEN montant ELSE 0 END) as total_recettes,
+                    SUM(CASE WHEN type_ecriture = 'recette' THEN montant_htva ELSE 0 END) as total_recettes_htva
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s AND date_ecriture BETWEEN %s AND %s
+                GROUP BY statut
+                """
+                cursor.execute(query, (user_id, date_from, date_to))
+                synthese = cursor.fetchall()
+                return {
+                    'synthese_statuts': synthese,
+                    'date_debut': date_from,
+                    'date_fin': date_to
+                }
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de la synthèse des statuts: {e}")
+            return {}
+
+    def get_by_contact(self, contact_id: int, user_id: int) -> List[Dict]:
+        """Récupère les écritures associées à un contact spécifique"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*, c.numero as categorie_numero, c.nom as categorie_nom,
+                    cb.nom_compte as compte_bancaire_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                LEFT JOIN comptes_principaux cb ON e.compte_bancaire_id = cb.id
+                WHERE e.utilisateur_id = %s AND e.id_contact = %s
+                ORDER BY e.date_ecriture DESC
+                """
+                cursor.execute(query, (user_id, contact_id))
+                ecritures = cursor.fetchall()
+                return ecritures
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des écritures par contact: {e}")
+            return []
+
+    def link_to_transaction(self, ecriture_id: int, transaction_id: int, user_id: int) -> bool:
+        """Lie une écriture comptable à une transaction bancaire"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que l'écriture appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return False
+
+                # Vérifier que la transaction existe et appartient à l'utilisateur
+                cursor.execute("""
+                    SELECT t.id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s AND (cp.utilisateur_id = %s OR t.utilisateur_id = %s)
+                """, (transaction_id, user_id, user_id))
+                if not cursor.fetchone():
+                    return False
+
+                # Lier l'écriture à la transaction
+                cursor.execute(
+                    "UPDATE ecritures_comptables SET transaction_id = %s WHERE id = %s",
+                    (transaction_id, ecriture_id)
+                )
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur lien écriture-transaction : {e}")
+            return False
+
+    def get_ecritures_by_transaction(self, transaction_id: int, user_id: int) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT e.*
+                FROM ecritures_comptables e
+                WHERE e.transaction_id = %s AND e.utilisateur_id = %s
+                ORDER BY e.date_ecriture
+            """, (transaction_id, user_id))
+            return cursor.fetchall()
+
+    def get_total_ecritures_for_transaction(self, transaction_id: int, user_id: int) -> Decimal:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT SUM(montant) as total
+                FROM ecritures_comptables
+                WHERE transaction_id = %s AND utilisateur_id = %s
+            """, (transaction_id, user_id))
+            row = cursor.fetchone()
+            return Decimal(str(row['total'])) if row and row['total'] else Decimal('0')
+
+    def unlink_from_transaction(self, ecriture_id: int, user_id: int) -> bool:
+        """
+        Supprime le lien entre une écriture comptable et sa transaction associée.
+        Ne supprime ni l'écriture, ni la transaction.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que l'écriture appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return False
+
+                cursor.execute(
+                    "UPDATE ecritures_comptables SET transaction_id = NULL WHERE id = %s",
+                    (ecriture_id,)
+                )
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur lors du délien de l'écriture {ecriture_id}: {e}")
+            return False
+
+    def link_ecriture_to_transaction(self, ecriture_id: int, transaction_id: int, user_id: int) -> bool:
+        """
+        Lie (ou relie à nouveau) une écriture à une transaction.
+        Remplace tout lien existant.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # 1. Vérifier que l'écriture existe et appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return False
+
+                # 2. Vérifier que la transaction existe et appartient à l'utilisateur
+                cursor.execute("""
+                    SELECT t.id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s AND (
+                        cp.utilisateur_id = %s
+                        OR t.utilisateur_id = %s
+                    )
+                """, (transaction_id, user_id, user_id))
+                if not cursor.fetchone():
+                    return False
+
+                # 3. Mettre à jour le lien
+                cursor.execute(
+                    "UPDATE ecritures_comptables SET transaction_id = %s WHERE id = %s",
+                    (transaction_id, ecriture_id)
+                )
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur lors du lien écriture {ecriture_id} → transaction {transaction_id}: {e}")
+            return False
+
+    def unlink_all_ecritures_from_transaction(self, transaction_id: int, user_id: int) -> int:
+        """
+        Supprime tous les liens entre une transaction et les écritures de l'utilisateur.
+        Retourne le nombre d'écritures mises à jour.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # S'assurer que la transaction appartient à l'utilisateur
+                cursor.execute("""
+                    SELECT t.id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s AND (
+                        cp.utilisateur_id = %s
+                        OR t.utilisateur_id = %s
+                    )
+                """, (transaction_id, user_id, user_id))
+                if not cursor.fetchone():
+                    return 0
+
+                cursor.execute(
+                    "UPDATE ecritures_comptables SET transaction_id = NULL WHERE transaction_id = %s AND utilisateur_id = %s",
+                    (transaction_id, user_id)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Erreur lors du délien de toutes les écritures de la transaction {transaction_id}: {e}")
+            return 0
+
+    def _is_categorie_valid_for_contact(self, contact_id: int, categorie_id: int, utilisateur_id: int) -> bool:
+        if not contact_id:
+            return True
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer tous les plans du contact
+                cursor.execute("""
+                    SELECT plan_id FROM contact_plans
+                    WHERE contact_id = %s
+                """, (contact_id,))
+                plans = cursor.fetchall()
+                if not plans:
+                    return True  # pas de plan → tout autorisé
+                plan_ids = [p['plan_id'] for p in plans]
+                # Vérifier si la catégorie est dans l’un de ces plans
+                placeholders = ','.join(['%s'] * len(plan_ids))
+                cursor.execute(f"""
+                    SELECT 1 FROM plan_categorie
+                    WHERE plan_id IN ({placeholders}) AND categorie_id = %s
+                """, plan_ids + [categorie_id])
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erreur validation catégorie pour contact {contact_id}: {e}")
+            return False
+
+    ## Gestion fichiers
+
+    def _generate_filename(self, ecriture_id, original_filename, user_id):
+        """
+        Génère un nom de fichier unique et significatif
+        Format: YYYYMMDD_HHMMSS_ecritureID_userID_contact_extension
+        """
+        # Récupérer les infos de l'écriture pour le nom
+        ecriture = self.get_by_id(ecriture_id)
+        date_part = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Partie contact
+        contact_part = ""
+        if ecriture and ecriture.get('id_contact'):
+            contact_part = f"_contact{ecriture['id_contact']}"
+
+        # Extension du fichier
+        file_extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
+
+        # Nom final
+        filename = f"{date_part}_ecriture{ecriture_id}_user{user_id}{contact_part}.{file_extension}"
+
+        return filename
+
+    def _allowed_file(self, filename):
+        """Vérifie si le type de fichier est autorisé"""
+        allowed_extensions = {'pdf', 'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+        return '.' in filename and \
+               filename.rsplit('.', 1)[1].lower() in allowed_extensions
+
+    def ajouter_fichier(self, ecriture_id: int, user_id: int, fichier) -> Tuple[bool, str]:
+        """
+        Ajoute un fichier joint à une écriture comptable (stockage filesystem adressé par contenu).
+        Le fichier est copié par blocs en calculant son SHA-256 : un justificatif déjà stocké
+        n'est pas dupliqué, et l'ancien fichier de l'écriture est supprimé, après le commit,
+        s'il n'est plus référencé.
+        """
+        try:
+            # Vérifications de base
+            if not fichier or fichier.filename == '':
+                return False, "Aucun fichier sélectionné"
+
+            logger.info("Tentative d'upload - Fichier: %s, Taille: %s", fichier.filename, fichier.content_length)
+
+            if not self._allowed_file(fichier.filename):
+                return False, "Type de fichier non autorisé"
+
+            try:
+                self.ensure_upload_folder()
+            except Exception as e:
+                logger.error(f"Erreur création dossier: {e}")
+                return False, f"Erreur création dossier: {str(e)}"
+            if not os.access(self.upload_folder, os.W_OK):
+                logger.error(f"Pas de permission d'écriture dans: {self.upload_folder}")
+                return False, "Pas de permission d'écriture"
+
+            with self.db.get_cursor() as cursor:
+                # Vérifier que l'écriture appartient à l'utilisateur (avant de stocker quoi que ce soit)
+                cursor.execute(
+                    "SELECT id FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                    (ecriture_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return False, "Écriture non trouvée ou non autorisée"
+
+            extension = fichier.filename.rsplit('.', 1)[1].lower()
+            try:
+                temporaire, empreinte, taille = recevoir_flux(
+                    getattr(fichier, 'stream', fichier), self.upload_folder)
+            except FichierRefuse as e:
+                return False, str(e)
+            except OSError as e:
+                logger.error(f"Erreur écriture fichier: {e}")
+                return False, f"Erreur écriture fichier: {str(e)}"
+
+            # Placement et mise à jour sous verrou jusqu'au commit : une suppression concurrente
+            # ne peut pas retirer le contenu dédoublonné avant qu'il soit référencé
+            try:
+                with verrou_stockage(self.upload_folder):
+                    chemin_relatif, deja_present = placer_fichier(
+                        self.upload_folder, temporaire, empreinte, extension)
+                    logger.info("Fichier stocké: %s (%s octets%s)", chemin_relatif, taille,
+                                ", déjà présent" if deja_present else "")
+
+                    with self.db.get_cursor() as cursor:
+                        cursor.execute(
+                            "SELECT justificatif_url FROM ecritures_comptables WHERE id = %s AND utilisateur_id = %s",
+                            (ecriture_id, user_id)
+                        )
+                        ecriture = cursor.fetchone()
+                        cursor.execute("""
+                            UPDATE ecritures_comptables
+                            SET nom_fichier = %s, justificatif_url = %s, type_mime = %s, taille_fichier = %s
+                            WHERE id = %s AND utilisateur_id = %s
+                        """, (
+                            fichier.filename,
+                            chemin_relatif,
+                            fichier.content_type,
+                            taille,
+                            ecriture_id,
+                            user_id
+                        ))
+                        VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', user_id)
+            finally:
+                if os.path.exists(temporaire):
+                    os.remove(temporaire)
+            logger.info("Base de données mise à jour pour écriture %s", ecriture_id)
+
+            # Après le commit seulement : l'ancien fichier, s'il n'est plus référencé
+            ancien = ecriture['justificatif_url'] if ecriture else None
+            if ancien and ancien != chemin_relatif:
+                try:
+                    self._supprimer_fichiers_orphelins([ancien])
+                except OSError as e:
+                    logger.error(f"Erreur suppression ancien fichier {ancien}: {e}")
+
+            # Vignettes générées en arrière-plan (déjà présentes si le contenu était connu)
+            planifier_apercus(self.upload_folder, chemin_relatif)
+            return True, "Fichier joint ajouté avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur ajout fichier écriture {ecriture_id}: {e}")
+            return False, f"Erreur lors de l'ajout du fichier: {str(e)}"
+
+    def _supprimer_fichiers_orphelins(self, justificatif_urls: List[str]) -> int:
+        """
+        Supprime les fichiers physiques qui ne sont plus référencés par aucune écriture
+        (contenu partagé). À appeler une fois la transaction qui les a détachés commitée :
+        les références sont recomptées sous verrou_stockage, qu'un upload concurrent tient
+        jusqu'au commit de sa ligne. Retourne le nombre de fichiers supprimés.
+        """
+        supprimes = 0
+        with verrou_stockage(self.upload_folder):
+            for justificatif_url in dict.fromkeys(justificatif_urls):
+                with self.db.get_cursor() as cursor:
+                    cursor.execute(
+                        "SELECT COUNT(*) AS nb FROM ecritures_comptables WHERE justificatif_url = %s",
+                        (justificatif_url,)
+                    )
+                    if cursor.fetchone()['nb'] > 0:
+                        logger.info("Fichier %s conservé : encore référencé par une autre écriture", justificatif_url)
+                        continue
+                supprimer_apercus(self.upload_folder, justificatif_url)
+                file_path = self._get_file_path(justificatif_url)
+                if not os.path.exists(file_path):
+                    logger.warning(f"⚠️ Fichier physique non trouvé: {file_path}")
+                    continue
+                os.remove(file_path)
+                supprimes += 1
+                logger.info("✓ Fichier physique supprimé: %s", file_path)
+        return supprimes
+
+    def get_fichier(self, ecriture_id: int, user_id: int) -> Optional[Dict]:
+        """
+        Récupère les informations du fichier joint d'une écriture.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT nom_fichier, justificatif_url, type_mime, taille_fichier, fichier_joint
+                    FROM ecritures_comptables
+                    WHERE id = %s AND utilisateur_id = %s AND (justificatif_url IS NOT NULL OR fichier_joint IS NOT NULL)
+                """, (ecriture_id, user_id))
+
+                result = cursor.fetchone()
+                if not result:
+                    return None
+                if result['justificatif_url']:
+                    file_path = self._get_file_path(result['justificatif_url'])
+
+
+                    # Vérifier que le fichier existe physiquement
+                    if os.path.exists(file_path):
+                        return {
+                            'nom_original': result['nom_fichier'],
+                            'chemin_physique': result['justificatif_url'],
+                            'type_mime': result['type_mime'],
+                            'taille': result['taille_fichier'],
+                            'chemin_complet': file_path,
+                            'dossier': self.upload_folder,
+                            'empreinte': empreinte_depuis_chemin(result['justificatif_url']),
+                            'stockage': 'filesystem'
+                        }
+                    else:
+                        logger.warning(f"Fichier manquant sur le disk: {file_path}")
+                        return None
+                elif result['fichier_joint']:
+                    return {
+                    'nom_original': result['nom_fichier'],
+                    'contenu_blob': result['fichier_joint'],
+                    'type_mime': result['type_mime'],
+                    'taille': result['taille_fichier'],
+                    'stockage': 'blob'
+                }
+                return None
+        except Exception as e:
+            logger.error(f"Erreur récupération fichier écriture {ecriture_id}: {e}")
+            return None
+
+    def supprimer_fichier(self, ecriture_id: int, user_id: int) -> Tuple[bool, str]:
+        """
+        Supprime le fichier joint d'une écriture (physiquement et en base).
+        """
+        try:
+            logger.info("📍 Début suppression fichier - Écriture: %s, User: %s", ecriture_id, user_id)
+
+            with self.db.get_cursor() as cursor:
+                # Récupérer les infos du fichier avant suppression
+                cursor.execute("""
+                    SELECT nom_fichier, justificatif_url, fichier_joint
+                    FROM ecritures_comptables
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (ecriture_id, user_id))
+
+                result = cursor.fetchone()
+                if not result:
+                    logger.error(f"❌ Écriture {ecriture_id} non trouvée pour l'utilisateur {user_id}")
+                    return False, "Écriture non trouvée ou non autorisée"
+
+                # Mettre à jour la base de données
+                cursor.execute("""
+                    UPDATE ecritures_comptables
+                    SET nom_fichier = NULL,
+                        justificatif_url = NULL,
+                        type_mime = NULL,
+                        taille_fichier = NULL,
+                        fichier_joint = NULL
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (ecriture_id, user_id))
+
+                if cursor.rowcount == 0:
+                    logger.error(f"❌ Aucune ligne mise à jour dans la base")
+                    return False, "Erreur lors de la suppression en base de données"
+                VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', user_id)
+
+            # Après le commit : le fichier physique n'est supprimé que si aucune autre
+            # écriture ne partage ce contenu
+            if result['justificatif_url']:
+                try:
+                    self._supprimer_fichiers_orphelins([result['justificatif_url']])
+                except OSError as e:
+                    logger.error(f"❌ Erreur suppression fichier physique: {e}")
+            message = f"Fichier '{result['nom_fichier']}' supprimé avec succès"
+            logger.info("✓ Suppression réussie: %s", message)
+            return True, message
+
+        except Exception as e:
+            logger.error(f"❌ Erreur suppression fichier écriture {ecriture_id}: {e}")
+            logger.error(f"❌ Traceback: {traceback.format_exc()}")
+            return False, f"Erreur lors de la suppression: {str(e)}"
+
+    def get_chemin_fichier_physique(self, ecriture_id: int, user_id: int) -> Optional[str]:
+        """
+        Retourne le chemin physique du fichier pour le téléchargement.
+        """
+        fichier_info = self.get_fichier(ecriture_id, user_id)
+        return fichier_info['chemin_complet'] if fichier_info else None
+
+
+    
+
+class ContactPlan:
+    def __init__(self, db):
+        self.db = db
+
+    def get_plans_for_contact(self, contact_id: int, user_id: int) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT p.*
+                FROM contact_plans cp
+                JOIN plans_comptables p ON cp.plan_id = p.id
+                WHERE cp.contact_id = %s AND p.utilisateur_id = %s
+                ORDER BY p.nom
+            """, (contact_id, user_id))
+            return cursor.fetchall()
+
+    def get_contacts_for_plan(self, plan_id: int, user_id: int) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT c.*
+                FROM contact_plans cp
+                JOIN contacts c ON cp.contact_id = c.id_contact
+                WHERE cp.plan_id = %s AND c.utilisateur_id = %s
+                ORDER BY c.nom
+            """, (plan_id, user_id))
+            return cursor.fetchall()
+
+    def assign_plan_to_contact(self, contact_id: int, plan_id: int, user_id: int) -> bool:
+        # Vérifier propriété
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT 1 FROM contacts WHERE id_contact = %s AND utilisateur_id = %s", (contact_id, user_id))
+            if not cursor.fetchone(): return False
+            cursor.execute("SELECT 1 FROM plans_comptables WHERE id = %s AND utilisateur_id = %s", (plan_id, user_id))
+            if not cursor.fetchone(): return False
+            cursor.execute("INSERT IGNORE INTO contact_plans (contact_id, plan_id) VALUES (%s, %s)", (contact_id, plan_id))
+            return True
+
+
+class Contacts:
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, data: Dict) -> bool:
+        """
+        Crée un nouveau contact.
+        La colonne 'id_contact' est en AUTO_INCREMENT et ne doit pas être incluse.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO contacts
+                (nom, email, telephone, adresse, code_postal, ville, pays, utilisateur_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                values = (
+                    data['nom'],
+                    data.get('email', ''),
+                    data.get('telephone', ''),
+                    data.get('adresse', ''),
+                    data.get('code_postal', ''),
+                    data.get('ville', ''),
+                    data.get('pays', ''),
+                    data['utilisateur_id']
+                )
+                cursor.execute(query, values)
+                IndexRecherche.indexer_textes_with_cursor(
+                    cursor, data['utilisateur_id'], 'contact', cursor.lastrowid,
+                    *values[:7])
+                VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', data['utilisateur_id'])
+                return True
+        except Error as e:
+            # Utilisez un logger au lieu de logger.error pour un environnement de production
+            logger.error(f"Erreur lors de la création du contact: {e}")
+            return False
+
+    def update(self, contact_id: int, data: Dict, utilisateur_id: int) -> bool:
+        """Met à jour un contact existant."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE contacts
+                SET nom = %s, email = %s, telephone = %s, adresse = %s,
+                    code_postal = %s, ville = %s, pays = %s
+                WHERE id_contact = %s AND utilisateur_id = %s
+                """
+                values = (
+                    data['nom'],
+                    data.get('email', ''),
+                    data.get('telephone', ''),
+                    data.get('adresse', ''),
+                    data.get('code_postal', ''),
+                    data.get('ville', ''),
+                    data.get('pays', ''),
+                    contact_id,
+                    utilisateur_id
+                )
+
+                # Utilisez le logger de l'application Flask
+                logger.debug("[update] Query: %s avec params: %s", query, values)
+
+                cursor.execute(query, values)
+                modifie = cursor.rowcount > 0
+                if modifie:
+                    IndexRecherche.indexer_with_cursor(cursor, utilisateur_id, 'contact', [contact_id])
+                    VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', utilisateur_id)
+                # Le commit est géré par la classe DatabaseManager (autocommit)
+                # ou via une transaction si vous l'avez configurée.
+                return modifie # Vérifie si une ligne a été modifiée
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour du contact: {e}")
+            return False
+
+    def get_all(self, utilisateur_id: int) -> List[Dict]:
+        """Récupère tous les contacts d'un utilisateur."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM contacts WHERE utilisateur_id = %s ORDER BY nom"
+                cursor.execute(query, (utilisateur_id,))
+                contacts = cursor.fetchall()
+                return contacts
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des contacts: {e}")
+            return []
+
+    def get_by_id(self, contact_id: int, utilisateur_id: int) -> Optional[Dict]:
+        """Récupère un contact par son ID (id_contact)."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM contacts WHERE id_contact = %s AND utilisateur_id = %s"
+                cursor.execute(query, (contact_id, utilisateur_id))
+                contact = cursor.fetchone()
+                return contact
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération du contact: {e}")
+            return None
+
+    def delete(self, contact_id: int, utilisateur_id: int) -> bool:
+        """Supprime un contact par son ID (id_contact)."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "DELETE FROM contacts WHERE id_contact = %s AND utilisateur_id = %s"
+                cursor.execute(query, (contact_id, utilisateur_id))
+                supprime = cursor.rowcount > 0
+                if supprime:
+                    IndexRecherche.indexer_with_cursor(cursor, utilisateur_id, 'contact', [contact_id])
+                    VersionDonnees.incrementer_with_cursor(cursor, 'comptabilite', utilisateur_id)
+                # Le commit est géré par la classe DatabaseManager
+                return supprime # Vérifie si une ligne a été supprimée
+        except Error as e:
+            logger.error(f"Erreur lors de la suppression du contact: {e}")
+            return False
+
+    def get_last_insert_id(self) -> Optional[int]:
+        """Récupère le dernier ID auto-généré après une insertion."""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT LAST_INSERT_ID()")
+                result = cursor.fetchone()
+                # Le résultat est un dictionnaire car vous utilisez DictCursor
+                # Il faut donc y accéder avec la clé 'LAST_INSERT_ID()'
+                return result['LAST_INSERT_ID()'] if result else None
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération du dernier ID: {e}")
+            return None
+
+    def get_by_name(self, nom: str, utilisateur_id: int) -> List[Dict]:
+        """Récupère les contacts par nom."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM contacts WHERE nom LIKE %s AND utilisateur_id = %s ORDER BY nom"
+                cursor.execute(query, (f"%{nom}%", utilisateur_id))
+                contacts = cursor.fetchall()
+                return contacts
+        except Error as e:
+            logger.error(f"Erreur lors de la recherche de contacts: {e}")
+            return []
+
+
+class ContactCompte:
+    def __init__(self, db):
+        self.db = db
+
+    def link_to_compte(self, contact_id: int, compte_id: int, utilisateur_id: int) -> bool:
+        """Lie un contact à un compte bancaire"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que les entités existent et appartiennent à l'utilisateur
+                cursor.execute("""
+                            SELECT id_contact
+                            FROM contacts
+                            WHERE id_contact = %s AND utilisateur_id = %s
+                            """, (contact_id, utilisateur_id))
+                if not cursor.fetchone():
+                    logger.warning(f'Tentative de liason avec un contact non autorisé: contact_id={contact_id}, user={utilisateur_id}')
+                    return False
+                cursor.execute("""
+                            SELECT id
+                            FROM comptes_principaux
+                            WHERE id = %s
+                            """, (compte_id))
+                if not cursor.fetchone():
+                    logger.warning(f'Tentative de liason avec un compte non existant: compte_id = {compte_id}')
+                    return False
+
+                cursor.execute("""
+                    INSERT IGNORE INTO contact_comptes (contact_id, compte_id, utilisateur_id)
+                    VALUES (%s, %s, %s)
+                """, (contact_id, compte_id, utilisateur_id))
+                return True
+        except Error as e:
+            logger.error(f"Erreur SQL dans link_to_compte : {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Erreur liaison contact-compte : {e}")
+            return False
+
+    def unlink_from_compte(self, contact_id: int, compte_id: int, utilisateur_id: int) -> bool:
+        """Supprime la liaison entre un contact et un compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM contact_comptes
+                    WHERE contact_id = %s AND compte_id = %s AND utilisateur_id = %s
+                """, (contact_id, compte_id, utilisateur_id))
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur SQL dans unlink_from_compte : {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Erreur déliaison contact-compte : {e}")
+            return False
+
+    def get_comptes_for_contact(self, contact_id: int, utilisateur_id: int) -> List[Dict]:
+        """Récupère les comptes liés à un contact"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT cp.id, cp.nom_compte, cp.iban, cp.utilisateur_id AS compte_utilisateur_id,
+                               u.nom AS titulaire_nom,
+                               u.prenom AS titulaire_prenom
+                    FROM contact_comptes cc
+                    JOIN comptes_principaux cp ON cc.compte_id = cp.id
+                    JOIN utilisateurs u ON cp.utilisateur_id = u.id
+                    WHERE cc.contact_id = %s AND cc.utilisateur_id = %s
+                    ORDER by cp.nom_compte
+                """, (contact_id, utilisateur_id))
+                return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur SQL dans get_comptes_for_contact : {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Erreur récupération comptes pour contact : {e}")
+            return []
+
+    def get_contacts_for_compte(self, compte_id: int, utilisateur_id: int) -> List[Dict]:
+        """Récupère TOUS les contacts liés à un compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.id_contact, c.nom, c.email, c.telephone, c.adresse, c.ville
+                    FROM contact_comptes cc
+                    JOIN contacts c ON cc.contact_id = c.id_contact  # ✅ Jointure corrigée
+                    WHERE cc.compte_id = %s AND cc.utilisateur_id = %s
+                    ORDER BY c.nom
+                """, (compte_id, utilisateur_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération contacts pour compte : {e}")
+            return []
+
+    def get_contact_by_compte(self, compte_id: int, utilisateur_id: int) -> Optional[Dict]:
+        """Récupère le PREMIER contact lié à un compte (pour écriture automatique)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT cc.contact_id, c.nom, c.email
+                    FROM contact_comptes cc
+                    INNER JOIN contacts c ON cc.contact_id = c.id_contact  # ✅ Jointure corrigée
+                    WHERE cc.compte_id = %s AND cc.utilisateur_id = %s
+                    LIMIT 1
+                """, (compte_id, utilisateur_id))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur récupération contact par compte : {e}")
+            return None
+
+
+class Rapport:
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _bornes_mois(annee: int, mois: int) -> Tuple[date, date]:
+        date_debut = date(annee, mois, 1)
+        date_fin = date(annee, mois + 1, 1) if mois < 12 else date(annee + 1, 1, 1)
+        return date_debut, date_fin - timedelta(days=1)
+
+    def generate_rapport_mensuel(self, ecriture_comptable, user_id: int, annee: int, mois: int, statut: str = 'validée') -> Dict:
+        """Génère un rapport mensuel avec filtrage par statut"""
+        date_debut, date_fin = self._bornes_mois(annee, mois)
+
+        # Utilisez EcritureComptable pour obtenir les données
+        ecritures = ecriture_comptable.get_stats_by_categorie(
+            user_id,
+            str(date_debut),
+            str(date_fin),
+            statut
+        )
+
+        # Les appels aux autres classes doivent être faits ici si nécessaire
+        # Exemple: stats = StatistiquesBancaires(self.db).get_resume_utilisateur(user_id)
+        # exemple: repartition = StatistiquesBancaires(self.db).get_repartition_par_banque(user_id)
+
+        return {
+            'periode': f"{mois}/{annee}",
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            # 'stats': stats,
+            # 'repartition_banques': repartition,
+            'ecritures_par_categorie': ecritures,
+            'statut': statut
+        }
+
+    def _generate_rapports_annuels(self, user_id: int, annee: int, statuts: Tuple[str, ...]) -> Dict[str, Dict]:
+        """
+        Rapports annuels de plusieurs statuts à partir d'une seule lecture des cumuls de l'année
+        (au lieu de 12 rapports mensuels par statut, chacun parcourant le grand livre).
+        """
+        ecriture_comptable = EcritureComptable(self.db)
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, numero, nom, type_compte FROM categories_comptables
+                WHERE actif = TRUE ORDER BY numero
+            """)
+            categories = cursor.fetchall()
+        totaux_mensuels = ecriture_comptable.get_totaux_mensuels(user_id, annee)
+        compte_resultat = ecriture_comptable.get_compte_de_resultat(
+            user_id, str(date(annee, 1, 1)), str(date(annee, 12, 31)))
+
+        rapports = {}
+        for statut in statuts:
+            donnees_mensuelles = []
+            for mois in range(1, 13):
+                date_debut, date_fin = self._bornes_mois(annee, mois)
+                donnees_mensuelles.append({
+                    'periode': f"{mois}/{annee}",
+                    'date_debut': date_debut,
+                    'date_fin': date_fin,
+                    'ecritures_par_categorie': ecriture_comptable.stats_depuis_totaux(
+                        categories, totaux_mensuels[mois], statut),
+                    'statut': statut
+                })
+            rapports[statut] = {
+                'annee': annee,
+                'donnees_mensuelles': donnees_mensuelles,
+                'compte_resultat': compte_resultat,
+                'statut': statut
+            }
+        return rapports
+
+    def generate_rapport_annuel(self, user_id: int, annee: int, statut: str = 'validée') -> Dict:
+        """Génère un rapport annuel avec filtrage par statut"""
+        return self._generate_rapports_annuels(user_id, annee, (statut,))[statut]
+
+    def generate_rapport_comparatif(self, user_id: int, annee: int) -> Dict:
+        """Génère un rapport comparatif avec différents statuts"""
+        rapports = self._generate_rapports_annuels(user_id, annee, ('validée', 'pending', 'rejetée'))
+        rapport_valide = rapports['validée']
+        rapport_pending = rapports['pending']
+        rapport_rejetee = rapports['rejetée']
+
+        return {
+            'annee': annee,
+            'rapport_valide': rapport_valide,
+            'rapport_pending': rapport_pending,
+            'rapport_rejetee': rapport_rejetee,
+            'comparaison': self._comparer_rapports(rapport_valide, rapport_pending, rapport_rejetee)
+        }
+
+    def _comparer_rapports(self, *rapports):
+        """Compare les différents rapports pour analyse"""
+        comparison = {}
+        # Implémentation de la comparaison entre rapports
+        return comparison
+
+    def get_rapport_par_statut(self, user_id: int, date_from: str, date_to: str, statut: str) -> Dict:
+        """Génère un rapport personnalisé par plage de dates et statut"""
+        ecriture_comptable = EcritureComptable(self.db)
+        ecritures = ecriture_comptable.get_stats_by_categorie(
+            user_id, date_from, date_to, statut
+        )
+
+        total_depenses = sum(item['total_depenses'] or 0 for item in ecritures)
+        total_recettes = sum(item['total_recettes'] or 0 for item in ecritures)
+
+        return {
+            'periode': f"{date_from} à {date_to}",
+            'date_debut': date_from,
+            'date_fin': date_to,
+            'statut': statut,
+            'ecritures_par_categorie': ecritures,
+            'total_depenses': total_depenses,
+            'total_recettes': total_recettes,
+            'solde': total_recettes - total_depenses,
+            'nombre_ecritures': sum(item['nb_ecritures'] or 0 for item in ecritures)
+        }
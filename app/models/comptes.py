@@ -0,0 +1,698 @@
+"""
+Banques, comptes principaux, sous-comptes, périodes favorites et rapports de compte.
+"""
+from pymysql import Error, MySQLError
+from decimal import Decimal
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional
+import logging
+
+from ..utils import svg_charts
+from .base import VersionDonnees
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodeFavorite:
+    def __init__(self, db):
+        self.db = db
+
+    def get_by_user_id(self, user_id: int) -> List[Dict]:
+        """Récupère toutes les périodes favorites d'un utilisateur"""
+        periodes = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT id, user_id, compte_id, compte_type, nom, date_debut, date_fin
+                    FROM periode_favorite
+                    WHERE user_id = %s AND statut = 'active'
+                    ORDER BY date_debut DESC
+                    """
+                cursor.execute(query, (user_id,))
+                periodes = cursor.fetchall()
+                return periodes
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des périodes favorites: {e}")
+            return []
+        return periodes
+
+    def create(self, user_id: int, compte_id: int, compte_type: str, nom: str, date_debut: date, date_fin: date, statut: str) -> bool:
+        """Crée une nouvelle période favorite."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO periode_favorite (user_id, compte_id, compte_type, nom, date_debut, date_fin, statut)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (user_id, compte_id, compte_type, nom, date_debut, date_fin, statut))
+                return True
+        except Error as e:
+            logger.error(f"Erreur lors de la création de la période favorite: {e}")
+            return False
+
+    def update(self, user_id: int, periode_id: int, nom: str, date_debut: date, date_fin: date, statut: str) -> bool:
+        """Met à jour une période favorite existante."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE periode_favorite
+                SET nom = %s, date_debut = %s, date_fin = %s, statut = %s
+                WHERE id = %s AND user_id = %s
+                """
+                cursor.execute(query, (nom, date_debut, date_fin, statut, periode_id, user_id))
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour de la période favorite: {e}")
+            return False
+
+    def delete(self, user_id: int, periode_id: int) -> bool:
+        """Supprime une période favorite par son ID."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "DELETE FROM periode_favorite WHERE id = %s AND user_id = %s"
+                cursor.execute(query, (periode_id, user_id))
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur lors de la suppression de la période favorite: {e}")
+            return False
+    def get_by_user_and_compte(self, user_id: int, compte_id: int, compte_type: str) -> Optional[Dict]:
+        """Récupère une période favorite par utilisateur et compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT id, user_id, compte_id, compte_type, nom, date_debut, date_fin, statut
+                FROM periode_favorite
+                WHERE user_id = %s AND compte_id = %s AND compte_type = %s AND statut = 'active'
+                ORDER BY date_debut DESC
+                LIMIT 1
+                """
+                cursor.execute(query, (user_id, compte_id, compte_type))
+                periode = cursor.fetchone()
+                return periode
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de la période favorite: {e}")
+            return None
+
+
+class Banque:
+    """Modèle pour les banques - nettoyé de toute logique transactionnelle"""
+
+    def __init__(self, db):
+        self.db = db
+    def get_all(self) -> List[Dict]:
+        """Récupère toutes les banques actives"""
+        banques = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT id, nom, code_banque, pays, couleur, site_web, logo_url
+                    FROM banques
+                    WHERE actif = TRUE
+                    ORDER BY nom
+                    """
+                cursor.execute(query)
+                banques = cursor.fetchall()
+                return banques
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des banques: {e}")
+            return []
+        return banques
+
+    def get_by_id(self, banque_id: int) -> Optional[Dict]:
+        """Récupère une banque par son ID"""
+        banque = []
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM banques WHERE id = %s AND actif = TRUE"
+                cursor.execute(query, (banque_id,))
+                banque = cursor.fetchone()
+                return banque
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de la banque: {e}")
+            return None
+
+    def create_banque(self, nom: str, code_banque: str, pays: str, couleur: str, site_web: str, logo_url: str) -> bool:
+        """Crée une nouvelle banque."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO banques (nom, code_banque, pays, couleur, site_web, logo_url, actif)
+                VALUES (%s, %s, %s, %s, %s, %s, TRUE)
+                """
+                cursor.execute(query, (nom, code_banque, pays, couleur, site_web, logo_url))
+                return True
+        except Error as e:
+            logger.error(f"Erreur lors de la création de la banque: {e}")
+            return False
+
+    def update_banque(self, banque_id: int, nom: str, code_banque: str, pays: str, couleur: str, site_web: str, logo_url: str) -> bool:
+        """Met à jour une banque existante."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE banques
+                SET nom = %s, code_banque = %s, pays = %s, couleur = %s, site_web = %s, logo_url = %s
+                WHERE id = %s
+                """
+                cursor.execute(query, (nom, code_banque, pays, couleur, site_web, logo_url, banque_id))
+                return cursor.rowcount > 0 # Returns True if at least one row was updated
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour de la banque: {e}")
+            return False
+
+    def delete_banque(self, banque_id: int) -> bool:
+        """Désactive (supprime logiquement) une banque par son ID."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "UPDATE banques SET actif = FALSE WHERE id = %s"
+                cursor.execute(query, (banque_id,))
+                return cursor.rowcount > 0 # Returns True if the row was found and updated
+        except Error as e:
+            logger.error(f"Erreur lors de la suppression de la banque: {e}")
+            return False
+
+
+class ComptePrincipal:
+    """Modèle pour les comptes principaux"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_by_user_id(self, user_id: int) -> List[Dict]:
+        """Récupère tous les comptes d'un utilisateur"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # La ligne "cursor = connection.cursor()" est redondante et incorrecte.
+                # L'objet 'cursor' est déjà fourni par le gestionnaire de contexte.
+                query = """
+                SELECT
+                    c.id, c.banque_id, c.nom_compte, c.numero_compte, c.iban, c.bic,
+                    c.type_compte, c.solde, c.solde_initial, c.devise, c.date_ouverture,
+                    c.actif, c.date_creation,
+                    b.id as banque_id, b.nom as nom_banque, b.code_banque, b.couleur as couleur_banque,
+                    b.logo_url
+                FROM comptes_principaux c
+                JOIN banques b ON c.banque_id = b.id
+                WHERE c.utilisateur_id = %s AND c.actif = TRUE
+                ORDER BY c.date_creation DESC
+                """
+                cursor.execute(query, (user_id,))
+                comptes = cursor.fetchall() # N'oubliez pas de récupérer les données
+                logger.info("models 710 - Comptes récupérés - comptes - pour l'utilisateur %s: %s", user_id, len(comptes))
+                return comptes
+        except Error as e:
+            logger.error(f"713 Erreur lors de la récupération des comptes: {e}")
+            return []
+
+    def get_by_id(self, compte_id: int) -> Optional[Dict]:
+        """Récupère un compte par son ID"""
+        try:
+            # Correction de la syntaxe 'with self.db.get.cursor() as cursor;'
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    c.*,
+                    b.nom as nom_banque, b.code_banque, b.couleur as couleur_banque,
+                    u.nom as nom_utilisateur
+                FROM comptes_principaux c
+                JOIN banques b ON c.banque_id = b.id
+                JOIN utilisateurs u ON c.utilisateur_id = u.id
+                WHERE c.id = %s AND c.actif = TRUE
+                """
+                cursor.execute(query, (compte_id,))
+                compte = cursor.fetchone() # N'oubliez pas de récupérer la donnée
+                return compte
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération du compte: {e}")
+            return None
+
+    def create(self, data: Dict) -> bool:
+        """Crée un nouveau compte principal"""
+        try:
+            # Correction de la syntaxe 'with self.db.get.cursor()'
+            with self.db.get_cursor() as cursor:
+                # Ces vérifications sont des requêtes SELECT, elles n'ont pas besoin d'être dans une transaction.
+                cursor.execute("SELECT id FROM utilisateurs WHERE id = %s", (data['utilisateur_id'],))
+                if not cursor.fetchone():
+                    logger.error(f"746 Erreur: Utilisateur avec ID {data['utilisateur_id']} n'existe pas")
+                    return False
+
+                cursor.execute("SELECT id FROM banques WHERE id = %s", (data['banque_id'],))
+                if not cursor.fetchone():
+                    logger.error(f"Erreur: Banque avec ID {data['banque_id']} n'existe pas")
+                    return False
+
+                query = """
+                INSERT INTO comptes_principaux
+                (utilisateur_id, banque_id, nom_compte, numero_compte, iban, bic,
+                type_compte, solde, solde_initial, devise, date_ouverture)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                values = (
+                    data['utilisateur_id'], data['banque_id'], data['nom_compte'],
+                    data['numero_compte'], data.get('iban', ''), data.get('bic', ''),
+                    data['type_compte'], data.get('solde', 0), data.get('solde_initial', 0), data.get('devise', 'CHF'),
+                    data.get('date_ouverture')
+                )
+                cursor.execute(query, values)
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', data['utilisateur_id'])
+                return True
+        except Error as e:
+            logger.error(f"769 Erreur lors de la création du compte: {e}")
+            return False
+
+    def update_solde(self, compte_id: int, nouveau_solde: Decimal) -> bool:
+        """Met à jour le solde d'un compte"""
+        try:
+            # Correction de la syntaxe 'with self.db.get.cursor()'
+            with self.db.get_cursor() as cursor:
+                query = "UPDATE comptes_principaux SET solde = %s WHERE id = %s"
+                cursor.execute(query, (nouveau_solde, compte_id))
+                VersionDonnees.incrementer_compte_with_cursor(cursor, compte_id)
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"781 Erreur lors de la mise à jour du solde: {e}")
+            return False
+
+    def get_solde_total_avec_sous_comptes(self, compte_id: int) -> Decimal:
+        """
+        Calcule le solde total d'un compte principal, en incluant ses sous-comptes.
+        """
+        try:
+            # Note: J'ai remplacé self.db par self.db pour plus de cohérence.
+            with self.db.get_cursor() as cursor:
+                # Utilisation d'une requête SQL directe pour éviter une fonction de base de données.
+                query = """
+                SELECT
+                    (SELECT COALESCE(SUM(solde), 0) FROM sous_comptes WHERE compte_principal_id = %s) +
+                    (SELECT solde FROM comptes_principaux WHERE id = %s) as solde_total
+                """
+                cursor.execute(query, (compte_id, compte_id))
+                result = cursor.fetchone()
+
+                # Le curseur retourne un dictionnaire, donc nous vérifions si 'solde_total' est présent.
+                # L'ancienne version retournait une erreur si le résultat était vide.
+                if result and 'solde_total' in result:
+                    return Decimal(str(result['solde_total']))
+                else:
+                    return Decimal('0')
+        except MySQLError as e:
+            # J'ai remplacé "Error" par "MySQLError" pour gérer spécifiquement les erreurs de base de données.
+            logger.error(f"808 Erreur lors du calcul du solde total pour le compte {compte_id}: {e}")
+            return Decimal('0')
+
+    def get_solde_avec_ecritures(self, compte_id: int, date_jusqua: date = None) -> Decimal:
+        try:
+            # Correction de la syntaxe 'with self.db.get.cursor()'
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s", (compte_id,))
+                result = cursor.fetchone()
+                solde = Decimal(str(result[0])) if result and result[0] else Decimal('0')
+
+                query = """
+                SELECT SUM(CASE
+                    WHEN type_ecriture = 'recette' THEN montant
+                    WHEN type_ecriture = 'depense' THEN -montant
+                    ELSE 0
+                END)
+                FROM ecritures_comptables
+                WHERE compte_bancaire_id = %s AND synchronise = FALSE
+                """
+                params = [compte_id]
+                if date_jusqua:
+                    query += " AND date_ecriture <= %s"
+                    params.append(date_jusqua)
+                cursor.execute(query, tuple(params))
+                result = cursor.fetchone()
+                ajustement = Decimal(str(result[0])) if result and result[0] else Decimal('0')
+
+                # Suppression des fermetures de connexion/curseur inutiles
+                return solde + ajustement
+        except Error as e:
+            logger.error(f"839Erreur lors du calcul du solde avec écritures: {e}")
+            return Decimal('0')
+
+    def get_all_accounts(self) -> List[Dict]:
+        # Cette méthode de classe n'est pas cohérente avec les autres méthodes d'instance.
+        # Il est préférable de la rendre une méthode d'instance si possible.
+        # Si vous devez la garder en l'état, voici la correction.
+        comptes = []
+        try:
+            # Correction de l'utilisation de db
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    c.id, c.utilisateur_id, c.banque_id, c.nom_compte, c.numero_compte,
+                    c.iban, c.bic, c.type_compte, c.solde, c.solde_initial, c.devise, c.date_ouverture, c.actif,
+                    b.nom as banque_nom, b.code_banque, b.couleur as banque_couleur,
+                    u.nom as utilisateur_nom, u.prenom as utilisateur_prenom
+                FROM comptes_principaux c
+                JOIN banques b ON c.banque_id = b.id
+                JOIN utilisateurs u ON c.utilisateur_id = u.id
+                WHERE c.actif = TRUE
+                ORDER BY b.nom, c.nom_compte
+                """
+                cursor.execute(query)
+                comptes = cursor.fetchall()
+                return comptes if comptes else []
+        except Error as e:
+            logger.error(f"Erreur SQL: {e}")
+            return []
+
+
+class ComptePrincipalRapport:
+    def __init__(self, db):
+        """
+        Initialise le générateur de rapports.
+        :param db: Instance de connexion à la base de données.
+        :param transaction_model: Instance de TransactionFinanciere pour accéder aux méthodes existantes.
+        """
+        # Import local : la comptabilité n'est chargée que si un rapport est demandé
+        from .comptabilite import CategorieComptable
+        self.db = db
+        self.categorie_comptable_model = CategorieComptable(self.db)
+    def _get_solde_avant_periode(self, compte_id: int, user_id: int, debut_periode: date) -> Decimal:
+        """Retourne le solde juste avant le début de la période."""
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT solde_apres
+                FROM transactions
+                WHERE compte_principal_id = %s AND date_transaction < %s
+                ORDER BY date_transaction DESC, id DESC
+                LIMIT 1
+            """, (compte_id, debut_periode))
+            result = cursor.fetchone()
+            if result:
+                return Decimal(str(result['solde_apres']))
+            else:
+                # Aucune transaction → solde initial du compte
+                cursor.execute("SELECT solde_initial FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                               (compte_id, user_id))
+                result = cursor.fetchone()
+                return Decimal(str(result['solde_initial'])) if result else Decimal('0')
+
+    def generer_rapport_periode(self, compte_id: int, user_id: int,
+                                periode: str = 'mensuel',
+                                date_reference: date = None) -> Dict:
+        """
+        Génère un rapport détaillé pour un compte sur une période donnée.
+        :param compte_id: ID du compte principal.
+        :param user_id: ID de l'utilisateur (vérification de propriété).
+        :param periode: 'hebdomadaire', 'mensuel' ou 'annuel'.
+        :param date_reference: Date de référence pour la période (ex: 15/03/2025 → mars 2025).
+        :return: Dictionnaire structuré avec données, graphiques SVG, et métadonnées.
+        """
+        if date_reference is None:
+            date_reference = date.today()
+
+        # 1. Déterminer la plage de dates selon la période
+        if periode == 'hebdomadaire':
+            debut = date_reference - timedelta(days=date_reference.weekday())  # Lundi
+            fin = debut + timedelta(days=6)
+            titre = f"Rapport Hebdomadaire - Semaine du {debut.strftime('%d.%m.%Y')}"
+        elif periode == 'mensuel':
+            debut = date_reference.replace(day=1)
+            if date_reference.month == 12:
+                fin = date(date_reference.year + 1, 1, 1) - timedelta(days=1)
+            else:
+                fin = date(date_reference.year, date_reference.month + 1, 1) - timedelta(days=1)
+            titre = f"Rapport Mensuel - {debut.strftime('%B %Y')}"
+        elif periode == 'annuel':
+            debut = date(date_reference.year, 1, 1)
+            fin = date(date_reference.year, 12, 31)
+            titre = f"Rapport Annuel - {date_reference.year}"
+        else:
+            raise ValueError("Période doit être 'hebdomadaire', 'mensuel' ou 'annuel'.")
+
+        # 2. Récupérer les statistiques de base
+        stats = self.categorie_comptable_model.get_statistiques_compte('compte_principal', compte_id, user_id,
+                                                      date_debut=debut.strftime('%Y-%m-%d'),
+                                                      date_fin=fin.strftime('%Y-%m-%d'))
+
+        # 3. Récupérer le solde au début et à la fin de la période
+        solde_initial = self._get_solde_avant_periode(compte_id, user_id, debut)
+        solde_final = self.categorie_comptable_model.get_solde_courant('compte_principal', compte_id, user_id)
+
+        # 4. Récupérer les transactions
+        transactions, _ = self.tx_model.get_all_user_transactions(
+            user_id=user_id,
+            date_from=debut.strftime('%Y-%m-%d'),
+            date_to=fin.strftime('%Y-%m-%d'),
+            compte_source_id=compte_id,
+            compte_dest_id=compte_id,
+            per_page=1000  # Assure la récupération de tout
+        )
+
+        # 5. Catégorisation des transactions
+        categories = self.categorie_comptable_model.get_categories_par_type('compte_principal', compte_id, user_id,
+                                                           date_debut=debut.strftime('%Y-%m-%d'),
+                                                           date_fin=fin.strftime('%Y-%m-%d'))
+
+        # 6. Génération des graphiques SVG
+        graph_flux = self._generer_graphique_flux_journalier(compte_id, user_id, debut, fin)
+        graph_categories = self._generer_graphique_categories(categories)
+
+        return {
+            "meta": {
+                "compte_id": compte_id,
+                "periode": periode,
+                "date_debut": debut.isoformat(),
+                "date_fin": fin.isoformat(),
+                "titre": titre,
+                "generated_at": datetime.now().isoformat()
+            },
+            "resume": {
+                "solde_initial": float(solde_initial),
+                "solde_final": float(solde_final),
+                "variation": float(solde_final - solde_initial),
+                "total_recettes": stats.get('total_entrees', 0.0),
+                "total_depenses": stats.get('total_sorties', 0.0),
+                "nb_transactions": len(transactions)
+            },
+            "categories": {k: float(v) for k, v in categories.items()},
+            "graphiques": {
+                "flux_journalier_svg": graph_flux,
+                "categories_svg": graph_categories
+            },
+            # Optionnel: inclure les transactions brutes pour export CSV
+            "transactions": [
+                {
+                    "id": t['id'],
+                    "date": t['date_transaction'].isoformat() if t['date_transaction'] else None,
+                    "type": t['type_transaction'],
+                    "montant": float(t['montant']),
+                    "solde_apres": float(t['solde_apres']),
+                    "description": t.get('description', '')
+                }
+                for t in transactions
+            ]
+        }
+
+
+    def _generer_graphique_flux_journalier(self, compte_id: int, user_id: int, debut: date, fin: date) -> str:
+        """Génère un graphique SVG en barres des flux quotidiens."""
+
+        # Récupérer recettes et dépenses quotidiennes
+        recettes = self.categorie_comptable_model._get_daily_balances(compte_id, debut, fin, 'recette')
+        depenses = self.categorie_comptable_model._get_daily_balances(compte_id, debut, fin, 'depense')
+
+        dates = sorted(set(recettes.keys()) | set(depenses.keys()))
+        if not dates:
+            return svg_charts.svg_message("Aucune donnée", 600, 300)
+
+        # Barres empilées : recettes au-dessus de zéro, dépenses en dessous
+        return svg_charts.graphique_barres(
+            [dt.strftime("%d.%m") for dt in dates],
+            {
+                'Recettes': [recettes.get(d, 0) for d in dates],
+                'Dépenses': [-float(depenses.get(d, 0)) for d in dates],
+            },
+            couleurs=["#4CAF50", "#F44336"],
+            largeur=700, hauteur=350, marges=(60, 40, 40, 60),
+            empile=True
+        )
+
+    def _generer_graphique_categories(self, categories: Dict[str, Decimal]) -> str:
+        """Génère un graphique en camembert ou en barres horizontales selon le nombre de catégories."""
+        if not categories:
+            return svg_charts.svg_message("Aucune catégorie", 500, 300)
+
+        # Trier et limiter à 10 catégories principales
+        items = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10]
+        montants = [float(item[1]) for item in items]
+
+        # Graphique en barres horizontales (plus lisible), largeur proportionnelle à la part du total
+        return svg_charts.graphique_barres_horizontales(
+            [item[0] for item in items],
+            montants,
+            couleurs=[f"hsl({360 * i / len(items)}, 60%, 50%)" for i in range(len(items))],
+            largeur=600, hauteur_min=300, hauteur_par_barre=30, marges=(200, 40, 30, 30),
+            valeur_max=sum(montants) or 1,
+            format_valeur=lambda v: f"{v:.2f}",
+            longueur_label=20, taille_police=10
+        )
+
+
+class SousCompte:
+    """Modèle pour les sous-comptes d'épargne"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_by_compte_principal_id(self, compte_principal_id: int) -> List[Dict]:
+        """Récupère tous les sous-comptes d'un compte principal"""
+        logger.debug("Récupération des sous-comptes pour le compte principal %s", compte_principal_id)
+
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    id, nom_sous_compte, description, objectif_montant, solde,
+                    couleur, icone, date_objectif, date_creation,
+                    CASE
+                        WHEN objectif_montant > 0 THEN
+                            ROUND((solde / objectif_montant) * 100, 2)
+                        ELSE 0
+                    END as pourcentage_objectif
+                FROM sous_comptes
+                WHERE compte_principal_id = %s AND actif = TRUE
+                ORDER BY date_creation DESC
+                """
+                cursor.execute(query, (compte_principal_id,))
+                result = cursor.fetchall()
+
+                logger.debug("Résultat de la requête: %s", result)
+                return result
+
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des sous-comptes: {e}")
+            return []
+
+    def get_all_sous_comptes_by_user_id(self, user_id) -> List:
+        """Récupère tous les sous-comptes d'un utilisateur"""
+        logger.debug("Récupération de tous les sous-comptes pour l'utilisateur %s", user_id)
+
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT sc.*, cp.nom_compte as nom_compte_principal
+                FROM sous_comptes sc
+                JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                WHERE cp.utilisateur_id = %s
+                """
+                cursor.execute(query, (user_id,))
+                result = cursor.fetchall()
+
+                return result
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des sous-comptes: {e}")
+            return []
+
+    def get_by_id(self, sous_compte_id: int) -> Optional[Dict]:
+        """Récupère un sous-compte par son ID"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT sc.*, cp.nom_compte as nom_compte_principal
+                FROM sous_comptes sc
+                JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                WHERE sc.id = %s AND sc.actif = TRUE
+                """
+                cursor.execute(query, (sous_compte_id,))
+                sous_compte = cursor.fetchone()
+                logger.debug("voici le resultat de get_by_id %s", sous_compte)
+                return sous_compte
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération du sous-compte: {e}")
+            return None
+
+    def create(self, data: Dict) -> bool:
+        """Crée un nouveau sous-compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO sous_comptes
+                (compte_principal_id, nom_sous_compte, description, objectif_montant,
+                 couleur, icone, date_objectif, utilisateur_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                values = (
+                    data['compte_principal_id'], data['nom_sous_compte'],
+                    data.get('description', ''), data.get('objectif_montant'),
+                    data.get('couleur', '#28a745'), data.get('icone', 'piggy-bank'),
+                    data.get('date_objectif'),
+                    data.get('utilisateur_id')
+                )
+                cursor.execute(query, values)
+                VersionDonnees.incrementer_compte_with_cursor(cursor, data['compte_principal_id'])
+                return True
+        except Error as e:
+            logger.error(f"Erreur lors de la création du sous-compte: {e}")
+            return False
+
+    def update(self, sous_compte_id: int, data: Dict) -> bool:
+        """Met à jour un sous-compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE sous_comptes
+                SET nom_sous_compte = %s, description = %s, objectif_montant = %s,
+                    couleur = %s, icone = %s, date_objectif = %s
+                WHERE id = %s
+                """
+                values = (
+                    data['nom_sous_compte'], data.get('description', ''),
+                    data.get('objectif_montant'), data.get('couleur', '#28a745'),
+                    data.get('icone', 'piggy-bank'), data.get('date_objectif', data.get('utilisateur_id')),
+                    sous_compte_id
+                )
+                cursor.execute(query, values)
+                VersionDonnees.incrementer_sous_compte_with_cursor(cursor, sous_compte_id)
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour du sous-compte: {e}")
+            return False
+
+    def delete(self, sous_compte_id: int) -> bool:
+        """Supprime un sous-compte (soft delete)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier si le sous-compte a un solde
+                cursor.execute("SELECT solde FROM sous_comptes WHERE id = %s", (sous_compte_id,))
+                result = cursor.fetchone()
+
+                if result and Decimal(str(result['solde'])) > 0:
+                    logger.warning(f"Impossible de supprimer le sous-compte {sous_compte_id} car son solde n'est pas nul.")
+                    return False
+
+                # Soft delete
+                cursor.execute("UPDATE sous_comptes SET actif = FALSE WHERE id = %s", (sous_compte_id,))
+                VersionDonnees.incrementer_sous_compte_with_cursor(cursor, sous_compte_id)
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur lors de la suppression du sous-compte: {e}")
+            return False
+
+    def update_solde(self, sous_compte_id: int, nouveau_solde: float) -> bool:
+        """Met à jour le solde d'un sous-compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "UPDATE sous_comptes SET solde = %s WHERE id = %s"
+                cursor.execute(query, (nouveau_solde, sous_compte_id))
+                VersionDonnees.incrementer_sous_compte_with_cursor(cursor, sous_compte_id)
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour du solde: {e}")
+            return False
+
+    def get_solde(self, sous_compte_id: int) -> float:
+        """Retourne le solde d'un sous-compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT solde FROM sous_comptes WHERE id = %s"
+                cursor.execute(query, (sous_compte_id,))
+                result = cursor.fetchone()
+                return float(result['solde']) if result and 'solde' in result else 0.0
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du solde : {e}")
+            return 0.0
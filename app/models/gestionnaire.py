@@ -0,0 +1,228 @@
+"""
+Gestionnaire des modèles (g.models) et chargement paresseux des classes.
+
+Chaque propriété de ModelManager n'importe le sous-module de sa classe qu'au
+premier accès : une requête bancaire ne charge ni la paie ni le planning.
+
+Les lectures de LECTURES_MEMOISEES sont mémorisées pour la durée de la requête
+(voir app/utils/memo_requete.py) : un second appel identique ne refait pas la requête SQL.
+"""
+import logging
+from importlib import import_module
+
+from ..utils.memo_requete import MemoRequete, ModeleMemoise
+
+logger = logging.getLogger(__name__)
+
+# Classe de modèle -> sous-module de app.models qui la définit
+EMPLACEMENTS = {
+    'Utilisateur': 'base',
+    'DatabaseManager': 'base',
+    'VersionDonnees': 'base',
+    'PeriodeFavorite': 'comptes',
+    'Banque': 'comptes',
+    'ComptePrincipal': 'comptes',
+    'ComptePrincipalRapport': 'comptes',
+    'SousCompte': 'comptes',
+    'TransactionFinanciere': 'transactions',
+    'CategorieTransaction': 'transactions',
+    'RegleCategorisation': 'transactions',
+    'StatistiquesBancaires': 'transactions',
+    'PlanComptable': 'comptabilite',
+    'CategorieComptable': 'comptabilite',
+    'EcritureComptable': 'comptabilite',
+    'ContactPlan': 'comptabilite',
+    'Contacts': 'comptabilite',
+    'ContactCompte': 'comptabilite',
+    'Rapport': 'comptabilite',
+    'BaremeCotisation': 'paie',
+    'BaremeIndemnite': 'paie',
+    'TypeCotisation': 'paie',
+    'TypeIndemnite': 'paie',
+    'CotisationContrat': 'paie',
+    'IndemniteContrat': 'paie',
+    'Contrat': 'paie',
+    'Employe': 'paie',
+    'Salaire': 'paie',
+    'HeureTravail': 'heures',
+    'SyntheseHebdomadaire': 'heures',
+    'SyntheseMensuelle': 'heures',
+    'Equipe': 'planning',
+    'Competence': 'planning',
+    'Planning': 'planning',
+    'PlanningRegles': 'planning',
+    'ParametreUtilisateur': 'parametres',
+    'Entreprise': 'parametres',
+    'IndexRecherche': 'recherche',
+}
+
+# Classe de modèle -> méthodes de lecture pure mémorisées par requête (mêmes arguments, même résultat)
+LECTURES_MEMOISEES = {
+    'ComptePrincipal': ('get_by_id', 'get_by_user_id', 'get_all_accounts'),
+    'SousCompte': ('get_by_id', 'get_by_compte_principal_id', 'get_all_sous_comptes_by_user_id'),
+    'CategorieTransaction': ('get_categories_utilisateur', 'get_categorie_par_id'),
+    'CategorieComptable': ('get_all_categories', 'get_categories_avec_complementaires'),
+    'Contacts': ('get_all', 'get_by_id'),
+    'Contrat': ('get_all_contrats', 'get_by_id', 'get_contrat_actuel', 'get_contrat_for_date',
+                'get_contrat_for_employe'),
+    'Employe': ('get_by_id', 'get_all_by_user'),
+    'Entreprise': ('get_or_create_for_user',),
+}
+
+
+def charger_classe(nom: str) -> type:
+    """Importe (une seule fois, via sys.modules) le sous-module de `nom` et retourne la classe."""
+    try:
+        module = EMPLACEMENTS[nom]
+    except KeyError:
+        raise AttributeError(f"Modèle inconnu : {nom}") from None
+    return getattr(import_module(f".{module}", __package__), nom)
+
+
+
+
+class ModelManager:
+    def __init__(self, db, memoiser=True):
+        self._db = db
+        self._cache = {}
+        self.memo = MemoRequete(db) if memoiser else None
+    def _get_model(self, name, classe_nom):
+        # La classe (et son sous-module) n'est importée qu'au premier accès
+        if name not in self._cache:
+            modele = charger_classe(classe_nom)(self._db)
+            if self.memo is not None and classe_nom in LECTURES_MEMOISEES:
+                modele = ModeleMemoise(modele, classe_nom, LECTURES_MEMOISEES[classe_nom], self.memo)
+            self._cache[name] = modele
+        return self._cache[name]
+    @property
+    def banque_model(self):
+        return self._get_model('banque', 'Banque')
+    @property
+    def periode_favorite_model(self):
+        return self._get_model('periode_favorite', 'PeriodeFavorite')
+    @property       
+    def compte_model(self):
+        return self._get_model('compte', 'ComptePrincipal')
+    @property
+    def compte__principal_rapport_model(self):
+        return self._get_model('compte__principal_rapport', 'ComptePrincipalRapport')
+    @property
+    def sous_compte_model(self):
+        return self._get_model('sous_compte', 'SousCompte')
+    @property
+    def transaction_financiere_model(self):
+        return self._get_model('transaction_financiere', 'TransactionFinanciere')
+    @property   
+    def categorie_transaction_model(self):
+        return self._get_model('categorie_transaction', 'CategorieTransaction')
+    @property
+    def regle_categorisation_model(self):
+        return self._get_model('regle_categorisation', 'RegleCategorisation')
+    @property
+    def index_recherche_model(self):
+        return self._get_model('index_recherche', 'IndexRecherche')
+    @property
+    def stats_model(self):
+        return self._get_model('stats', 'StatistiquesBancaires')
+    @property
+    def plan_comptable_model(self):
+        return self._get_model('plan_comptable', 'PlanComptable')
+    @property
+    def categorie_comptable_model(self):
+        return self._get_model('categorie_comptable', 'CategorieComptable')
+    @property
+    def ecriture_comptable_model(self):
+        return self._get_model('ecriture_comptable', 'EcritureComptable')
+    @property
+    def contact_plan_model(self):
+        return self._get_model('contact_plan', 'ContactPlan')
+    @property
+    def contact_model(self):
+        return self._get_model('contact', 'Contacts')
+    @property
+    def contact_compte_model(self):
+        return self._get_model('contact_compte', 'ContactCompte')
+    @property
+    def contact_plan_model(self):
+        return self._get_model('contact_plan', 'ContactPlan')
+    @property
+    def rapport_model(self):
+        return self._get_model('rapport', 'Rapport')
+    @property
+    def bareme_indemnite_model(self):
+        return self._get_model('bareme_indemnite', 'BaremeIndemnite')
+    @property
+    def bareme_cotisation_model(self):
+        return self._get_model('bareme_cotisation', 'BaremeCotisation')
+    @property
+    def type_cotisations_model(self):
+        return self._get_model('type_cotisations', 'TypeCotisation')
+    @property
+    def type_indemnites_model(self):
+        return self._get_model('type_indemnites', 'TypeIndemnite')
+    @property
+    def cotisations_contrat_model(self):
+        return self._get_model('cotisations_contrat', 'CotisationContrat')
+    @property
+    def indemnites_contrat_model(self):
+        return self._get_model('indemnites_contrat', 'IndemniteContrat')
+    @property
+    def heure_model(self):
+        if 'heure' not in self._cache:
+            heure_model = charger_classe('HeureTravail')(self._db)
+            # Les synthèses sont maintenues à chaque écriture d'heures
+            heure_model.abonner(self.synthese_hebdo_model.appliquer_changement_heures)
+            heure_model.abonner(self.synthese_mensuelle_model.appliquer_changement_heures)
+            heure_model.abonner(self.version_model.on_changement_heures)
+            self._cache['heure'] = heure_model
+        return self._cache['heure']
+    @property
+    def salaire_model(self):
+        return self._get_model('salaire', 'Salaire')
+    @property
+    def synthese_hebdo_model(self):
+        return self._get_model('synthese_hebdo', 'SyntheseHebdomadaire')
+    @property
+    def synthese_mensuelle_model(self):
+        return self._get_model('synthese_mensuelle', 'SyntheseMensuelle')
+    @property
+    def contrat_model(self):
+        return self._get_model('contrat', 'Contrat')
+    @property
+    def employe_model(self):
+        return self._get_model('employe', 'Employe')
+    @property
+    def equipe_model(self):
+        return self._get_model('equipe', 'Equipe')
+    @property
+    def competence_model(self):
+        return self._get_model('competence', 'Competence')
+    @property
+    def planning_model(self):
+        return self._get_model('planning', 'Planning')
+    @property
+    def planning_regles_model(self):
+        return self._get_model('planning_regles', 'PlanningRegles')
+    @property
+    def entreprise_model(self):
+        return self._get_model('entreprise', 'Entreprise')
+    @property
+    def version_model(self):
+        return self._get_model('version', 'VersionDonnees')
+    @property
+    def parametre_utilisateur_model(self):
+        return self._get_model('parametre_utilisateur', 'ParametreUtilisateur')
+    def get_user_by_username(self, username):
+        """
+        Récupère un utilisateur par nom d'utilisateur.
+        Ceci est un exemple de fonction de modèle.
+        """
+        try:
+            with self._db.get_cursor() as cursor:
+                query = "SELECT * FROM users WHERE username = %s"
+                cursor.execute(query, (username,))
+                user_data = cursor.fetchone()
+                return user_data
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération de l'utilisateur : {e}")
+            return None
@@ -0,0 +1,2377 @@
+"""
+Heures de travail et synthèses hebdomadaires / mensuelles.
+"""
+from pymysql import Error
+from datetime import datetime, date, timedelta
+import csv
+import json
+import math
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+import logging
+
+from ..utils import svg_charts
+from ..utils.lignes import en_heure_minutes
+from .base import VersionDonnees
+
+logger = logging.getLogger(__name__)
+
+
+class HeureTravail:
+    # Nombre de lignes envoyées par requête multi-lignes lors de l'import CSV
+    TAILLE_LOT_IMPORT = 500
+
+    def __init__(self, db):
+        self.db = db
+        self._abonnes = []
+
+    def abonner(self, callback) -> None:
+        """
+        Enregistre un abonné notifié à chaque modification des heures.
+        Le callback reçoit (user_id, id_contrat, dates, cursor) ; le curseur est
+        celui de la transaction en cours, les écritures ne sont pas encore commitées.
+        """
+        if callback not in self._abonnes:
+            self._abonnes.append(callback)
+
+    def _emettre_changement(self, user_id: int, id_contrat: int, dates, cursor) -> None:
+        """Notifie les abonnés qu'un ensemble de jours a changé pour (user_id, id_contrat)"""
+        if not self._abonnes or not dates:
+            return
+        dates = sorted(set(dates))
+        for callback in self._abonnes:
+            try:
+                callback(user_id, id_contrat, dates, cursor)
+            except Exception as e:
+                logger.error(f"Erreur abonné changement heures (user={user_id}, contrat={id_contrat}): {e}", exc_info=True)
+
+    def create_or_update(self, data: dict, cursor=None) -> bool:
+        """Version améliorée acceptant un curseur externe"""
+        if cursor:
+            # Utiliser le curseur fourni
+            return self._execute_create_or_update(data, cursor)
+        else:
+            # Gérer sa propre connexion comme avant, mais avec le gestionnaire de contexte
+            try:
+                with self.db.get_cursor(commit=True) as new_cursor:
+                    success = self._execute_create_or_update(data, new_cursor)
+                    logger.debug("create_or_update executed with success: %s avec %s", success, data)
+                    return success
+            except Exception as e:
+                logger.error(f"Impossible d'obtenir une connexion ou erreur d'exécution: {str(e)}")
+                return False
+
+    def _execute_create_or_update(self, data: dict, cursor) -> bool:
+        """Logique centrale de création/mise à jour"""
+        try:
+            if not data or not isinstance(data, dict):
+                logger.error(f"_execute_create_or_update: data est None ou invalide: {data}")
+                return False
+                
+            cleaned_data = self._clean_data(data)
+            
+            if not cleaned_data or not isinstance(cleaned_data, dict):
+                logger.error(f"_execute_create_or_update: cleaned_data est None ou invalide: {cleaned_data}")
+                return False
+                
+            required_fields = ['date', 'user_id', 'employeur', 'type_heures']
+            missing_fields = [field for field in required_fields if field not in cleaned_data]
+            if missing_fields:
+                logger.error(f"_execute_create_or_update: Champs manquants dans cleaned_data: {missing_fields}")
+                return False
+                
+            try:
+                date_obj = datetime.fromisoformat(cleaned_data['date']).date()
+            except (ValueError, TypeError) as e:
+                logger.error(f"_execute_create_or_update: Format de date invalide pour {cleaned_data['date']}: {str(e)}")
+                return False
+
+            # Vérifier si l'enregistrement existe déjà
+            cursor.execute(
+                """
+                SELECT * FROM heures_travail
+                WHERE date = %s 
+                    AND user_id = %s 
+                    AND employeur = %s 
+                    AND id_contrat = %s
+                    AND (
+                        (employe_id IS NULL AND %s IS NULL)
+                        OR (employe_id = %s)
+                        ) 
+                    AND type_heures = %s
+                """, (
+                date_obj,
+                cleaned_data['user_id'],
+                cleaned_data['employeur'],
+                cleaned_data['id_contrat'],
+                cleaned_data['employe_id'],
+                cleaned_data['employe_id'],
+                cleaned_data['type_heures']
+            ))
+            existing = cursor.fetchone()
+            
+            if existing:
+                heure_travail_id = existing['id']
+            else:
+                heure_travail_id = None
+                
+            # Préparer les valeurs avec fallback
+            values = {
+                'date': date_obj,
+                'user_id': cleaned_data['user_id'],
+                'employe_id': cleaned_data['employe_id'],
+                'employeur': cleaned_data['employeur'],
+                'id_contrat': cleaned_data.get('id_contrat'),
+                'vacances': cleaned_data.get('vacances', False),
+                'type_heures': cleaned_data['type_heures'],
+                'jour_semaine': date_obj.strftime('%A'),
+                'semaine_annee': date_obj.isocalendar()[1],
+                'mois': date_obj.month
+            }
+            
+            if heure_travail_id:
+                cursor.execute("""
+                UPDATE heures_travail
+                SET type_heures = %(type_heures)s,
+                    vacances = %(vacances)s,
+                    jour_semaine = %(jour_semaine)s,
+                    semaine_annee = %(semaine_annee)s,
+                    mois = %(mois)s
+                WHERE id = %(id)s
+                """, {**values, 'id': heure_travail_id})
+            else:
+                cursor.execute("""
+                INSERT INTO heures_travail
+                (date, user_id, employe_id, employeur, id_contrat, type_heures, vacances, jour_semaine, semaine_annee, mois)
+                VALUES (%(date)s, %(user_id)s, %(employe_id)s, %(employeur)s, %(id_contrat)s, %(type_heures)s, %(vacances)s, %(jour_semaine)s, %(semaine_annee)s, %(mois)s)
+                """, values)
+                heure_travail_id = cursor.lastrowid
+            
+            # Gestion des plages horaires
+            plages = cleaned_data.get('plages')
+            if plages is not None:
+                self._update_plages_horaires(cursor, heure_travail_id, plages)
+            
+            # Calcul du total des heures
+            try:
+                total_h = self.calculer_total_heures(heure_travail_id, cursor)
+                cursor.execute(
+                    """
+                    UPDATE heures_travail SET total_h = %s WHERE id = %s
+                    """, (total_h, heure_travail_id)
+                )
+            except Exception as calc_error:
+                logger.warning(f"Impossible de calculer le total des heures: {calc_error}")
+                # Continuer malgré l'erreur de calcul
+
+            self._emettre_changement(cleaned_data['user_id'], cleaned_data['id_contrat'], [date_obj], cursor)
+
+            logger.debug("create_or_update réussi pour heure_travail_id %s (date %s)", heure_travail_id, cleaned_data['date'])
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erreur _execute_create_or_update: {str(e)}", exc_info=True)
+            return False
+        
+    def _update_plages_horaires(self, cursor, heure_travail_id: int, plages: List[Dict]) -> None:
+        """Met à jour les plages horaires associées à un enregistrement de travail"""
+        try:
+            # 1. Supprimer les anciennes plages
+            cursor.execute("DELETE FROM plages_horaires WHERE heure_travail_id = %s", (heure_travail_id,))
+
+            # 2. Insérer les nouvelles plages
+            for index, plage in enumerate(plages):
+                debut = plage.get('debut')
+                fin = plage.get('fin')
+                if debut and fin:
+                    cursor.execute("""
+                        INSERT INTO plages_horaires (heure_travail_id, ordre, debut, fin)
+                        VALUES (%s, %s, %s, %s)
+                    """, (heure_travail_id, index + 1, debut, fin))
+        except Exception as e:
+            logger.error(f"Erreur _update_plages_horaires: {str(e)}")
+            raise
+
+    @staticmethod
+    def _heure_en_secondes(val) -> Optional[int]:
+        """Convertit une heure (timedelta MySQL, time ou chaîne HH:MM[:SS]) en secondes depuis minuit"""
+        if val is None or val == '':
+            return None
+        if isinstance(val, timedelta):
+            return int(val.total_seconds())
+        if hasattr(val, 'hour') and hasattr(val, 'minute'):
+            return val.hour * 3600 + val.minute * 60 + getattr(val, 'second', 0)
+        try:
+            parts = [int(p) for p in str(val).strip().split(':')]
+            return parts[0] * 3600 + parts[1] * 60 + (parts[2] if len(parts) > 2 else 0)
+        except (ValueError, IndexError):
+            return None
+
+    @classmethod
+    def _plages_completes(cls, plages: List[Dict]) -> Dict[int, Tuple[int, int]]:
+        """
+        Plages effectivement stockées, indexées par ordre (même règle que _update_plages_horaires :
+        l'ordre suit la position dans la liste et seules les plages complètes sont conservées).
+        """
+        completes = {}
+        for index, plage in enumerate(plages or []):
+            if plage.get('debut') and plage.get('fin'):
+                debut = cls._heure_en_secondes(plage['debut'])
+                fin = cls._heure_en_secondes(plage['fin'])
+                if debut is not None and fin is not None:
+                    completes[index + 1] = (debut, fin)
+        return completes
+
+    @staticmethod
+    def _total_depuis_plages(plages: Dict[int, Tuple[int, int]]) -> float:
+        """Même calcul que calculer_total_heures, mais à partir des plages soumises"""
+        total = 0.0
+        for debut, fin in plages.values():
+            if fin < debut:
+                fin += 24 * 3600
+            total += (fin - debut) / 3600
+        return round(total, 2)
+
+    def create_or_update_batch(self, jours: List[Dict], cursor=None) -> int:
+        """
+        Enregistre plusieurs journées (semaine, mois) en une seule transaction.
+        Chaque élément a le même format que pour create_or_update. Les totaux sont calculés
+        à partir des plages soumises et seules les plages modifiées sont réécrites.
+        Retourne le nombre de journées enregistrées.
+        """
+        if cursor:
+            return self._execute_create_or_update_batch(jours, cursor)
+        try:
+            with self.db.get_cursor(commit=True) as new_cursor:
+                return self._execute_create_or_update_batch(jours, new_cursor)
+        except Exception as e:
+            logger.error(f"Erreur create_or_update_batch: {e}", exc_info=True)
+            return 0
+
+    def _execute_create_or_update_batch(self, jours: List[Dict], cursor) -> int:
+        # 1. Nettoyage ; une même journée soumise deux fois garde la dernière version
+        a_enregistrer = {}
+        for data in jours or []:
+            cleaned = self._clean_data(data)
+            if not cleaned:
+                continue
+            try:
+                date_obj = datetime.fromisoformat(cleaned['date']).date()
+            except (ValueError, TypeError):
+                logger.error(f"create_or_update_batch: format de date invalide pour {cleaned['date']}")
+                continue
+            cle = (date_obj, cleaned['user_id'], cleaned['employeur'], cleaned['id_contrat'],
+                   cleaned['employe_id'], cleaned['type_heures'])
+            a_enregistrer[cle] = {
+                'vacances': cleaned['vacances'],
+                'plages': self._plages_completes(cleaned['plages']),
+            }
+        if not a_enregistrer:
+            return 0
+
+        # 2. Lignes existantes des journées concernées, en une requête
+        user_ids = sorted({cle[1] for cle in a_enregistrer})
+        contrats = sorted({cle[3] for cle in a_enregistrer})
+        dates = sorted({cle[0] for cle in a_enregistrer})
+        cursor.execute(f"""
+            SELECT id, date, user_id, employeur, id_contrat, employe_id, type_heures
+            FROM heures_travail
+            WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})
+            AND id_contrat IN ({', '.join(['%s'] * len(contrats))})
+            AND date BETWEEN %s AND %s
+        """, (*user_ids, *contrats, dates[0], dates[-1]))
+        ids = {}
+        for row in cursor.fetchall():
+            cle = (row['date'], row['user_id'], row['employeur'], row['id_contrat'],
+                   row['employe_id'], row['type_heures'])
+            if cle in a_enregistrer:
+                ids.setdefault(cle, row['id'])
+
+        def valeurs_jour(cle, jour):
+            date_obj = cle[0]
+            return {
+                'date': date_obj, 'user_id': cle[1], 'employeur': cle[2], 'id_contrat': cle[3],
+                'employe_id': cle[4], 'type_heures': cle[5], 'vacances': jour['vacances'],
+                'jour_semaine': date_obj.strftime('%A'), 'semaine_annee': date_obj.isocalendar()[1],
+                'mois': date_obj.month, 'total_h': self._total_depuis_plages(jour['plages']),
+            }
+
+        # 3. Mises à jour et insertions multi-lignes
+        existants = [cle for cle in a_enregistrer if cle in ids]
+        nouveaux = [cle for cle in a_enregistrer if cle not in ids]
+        if existants:
+            cursor.executemany("""
+                UPDATE heures_travail
+                SET type_heures = %(type_heures)s, vacances = %(vacances)s, jour_semaine = %(jour_semaine)s,
+                    semaine_annee = %(semaine_annee)s, mois = %(mois)s, total_h = %(total_h)s
+                WHERE id = %(id)s
+            """, [{**valeurs_jour(cle, a_enregistrer[cle]), 'id': ids[cle]} for cle in existants])
+        if nouveaux:
+            cursor.executemany("""
+                INSERT INTO heures_travail
+                (date, user_id, employe_id, employeur, id_contrat, type_heures, vacances, jour_semaine, semaine_annee, mois, total_h)
+                VALUES (%(date)s, %(user_id)s, %(employe_id)s, %(employeur)s, %(id_contrat)s, %(type_heures)s, %(vacances)s, %(jour_semaine)s, %(semaine_annee)s, %(mois)s, %(total_h)s)
+            """, [valeurs_jour(cle, a_enregistrer[cle]) for cle in nouveaux])
+            # Relecture des identifiants attribués (lastrowid ne couvre pas un INSERT multi-lignes)
+            dates_nouvelles = sorted({cle[0] for cle in nouveaux})
+            cursor.execute(f"""
+                SELECT id, date, user_id, employeur, id_contrat, employe_id, type_heures
+                FROM heures_travail
+                WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})
+                AND id_contrat IN ({', '.join(['%s'] * len(contrats))})
+                AND date IN ({', '.join(['%s'] * len(dates_nouvelles))})
+            """, (*user_ids, *contrats, *dates_nouvelles))
+            for row in cursor.fetchall():
+                cle = (row['date'], row['user_id'], row['employeur'], row['id_contrat'],
+                       row['employe_id'], row['type_heures'])
+                if cle in a_enregistrer:
+                    ids.setdefault(cle, row['id'])
+
+        # 4. Différentiel des plages horaires au lieu de tout supprimer puis réinsérer
+        plages_voulues = {ids[cle]: jour['plages'] for cle, jour in a_enregistrer.items() if cle in ids}
+        plages_existantes = defaultdict(dict)
+        if existants:
+            ids_existants = [ids[cle] for cle in existants]
+            cursor.execute(f"""
+                SELECT id, heure_travail_id, ordre, debut, fin
+                FROM plages_horaires
+                WHERE heure_travail_id IN ({', '.join(['%s'] * len(ids_existants))})
+            """, ids_existants)
+            for row in cursor.fetchall():
+                plages_existantes[row['heure_travail_id']][row['ordre']] = (
+                    row['id'], self._heure_en_secondes(row['debut']), self._heure_en_secondes(row['fin']))
+
+        a_supprimer, a_modifier, a_inserer = [], [], []
+        for heure_travail_id, voulues in plages_voulues.items():
+            actuelles = plages_existantes.get(heure_travail_id, {})
+            for ordre, (plage_id, debut, fin) in actuelles.items():
+                if ordre not in voulues:
+                    a_supprimer.append(plage_id)
+                elif voulues[ordre] != (debut, fin):
+                    a_modifier.append((self._secondes_en_heure(voulues[ordre][0]),
+                                       self._secondes_en_heure(voulues[ordre][1]), plage_id))
+            for ordre, (debut, fin) in voulues.items():
+                if ordre not in actuelles:
+                    a_inserer.append((heure_travail_id, ordre,
+                                      self._secondes_en_heure(debut), self._secondes_en_heure(fin)))
+        if a_supprimer:
+            cursor.execute(f"DELETE FROM plages_horaires WHERE id IN ({', '.join(['%s'] * len(a_supprimer))})",
+                           a_supprimer)
+        if a_modifier:
+            cursor.executemany("UPDATE plages_horaires SET debut = %s, fin = %s WHERE id = %s", a_modifier)
+        if a_inserer:
+            cursor.executemany("""
+                INSERT INTO plages_horaires (heure_travail_id, ordre, debut, fin)
+                VALUES (%s, %s, %s, %s)
+            """, a_inserer)
+
+        dates_par_contrat = defaultdict(set)
+        for cle in a_enregistrer:
+            dates_par_contrat[(cle[1], cle[3])].add(cle[0])
+        for (user_id, id_contrat), dates_contrat in dates_par_contrat.items():
+            self._emettre_changement(user_id, id_contrat, dates_contrat, cursor)
+
+        logger.info(f"create_or_update_batch: {len(a_enregistrer)} journée(s) enregistrée(s), "
+                    f"plages -{len(a_supprimer)} ~{len(a_modifier)} +{len(a_inserer)}")
+        return len(a_enregistrer)
+
+    @staticmethod
+    def _secondes_en_heure(secondes: int) -> str:
+        return f"{secondes // 3600:02d}:{(secondes % 3600) // 60:02d}:{secondes % 60:02d}"
+
+    def _clean_data(self, data: dict) -> dict:
+        """Nettoie et valide les données avant traitement - version sécurisée sans exceptions"""
+        # Vérification initiale des données
+        if not data or not isinstance(data, dict):
+            logger.error(f"_clean_data: données invalides reçues (type: {type(data)}): {data}")
+            return {}
+        
+        cleaned = data.copy()
+        
+        # Nettoyage des plages horaires au format moderne [{'debut': '08:00', 'fin': '12:00'}, ...]
+        if 'plages' in cleaned and isinstance(cleaned['plages'], list):
+            plages_nettoyees = []
+            for plage in cleaned['plages']:
+                if not isinstance(plage, dict):
+                    continue
+                plage_clean = {
+                    'debut': str(plage.get('debut', '')).strip() or None,
+                    'fin': str(plage.get('fin', '')).strip() or None
+                }
+                # Ne garder la plage que si au moins un champ est rempli
+                if plage_clean['debut'] or plage_clean['fin']:
+                    plages_nettoyees.append(plage_clean)
+            cleaned['plages'] = plages_nettoyees
+        else:
+            # Conversion depuis l'ancien format h1d/h1f/h2d/h2f si présent
+            cleaned['plages'] = []
+            time_fields = ['h1d', 'h1f', 'h2d', 'h2f']
+            field_values = {}
+            for field in time_fields:
+                val = cleaned.get(field)
+                field_values[field] = str(val).strip() if val else None
+            
+            if field_values['h1d'] or field_values['h1f']:
+                cleaned['plages'].append({
+                    'debut': field_values['h1d'],
+                    'fin': field_values['h1f']
+                })
+            if field_values['h2d'] or field_values['h2f']:
+                cleaned['plages'].append({
+                    'debut': field_values['h2d'],
+                    'fin': field_values['h2f']
+                })
+        
+        # Normalisation du champ 'vacances'
+        if 'vacances' in cleaned:
+            cleaned['vacances'] = bool(cleaned['vacances'])
+        else:
+            cleaned['vacances'] = False
+        
+        # Normalisation du champ 'employe_id'
+        if 'employe_id' in cleaned and cleaned['employe_id'] is not None:
+            try:
+                cleaned['employe_id'] = int(cleaned['employe_id'])
+            except (ValueError, TypeError):
+                logger.warning(f"_clean_data: employe_id invalide '{cleaned['employe_id']}', mis à None")
+                cleaned['employe_id'] = None
+        else:
+            cleaned['employe_id'] = None
+        
+        # Normalisation du champ 'type_heures'
+        cleaned['type_heures'] = str(cleaned.get('type_heures', 'reelles')).strip().lower()
+        if cleaned['type_heures'] not in ('reelles', 'simulees'):
+            logger.warning(f"_clean_data: type_heures invalide '{cleaned['type_heures']}', corrigé en 'reelles'")
+            cleaned['type_heures'] = 'reelles'
+        
+        # ✅ VALIDATION SÉCURISÉE DES CHAMPS OBLIGATOIRES (sans lever d'exception)
+        required_fields = ['user_id', 'date', 'employeur', 'id_contrat']
+        missing_fields = []
+        
+        for field in required_fields:
+            if field not in cleaned or cleaned[field] is None or cleaned[field] == '':
+                logger.error(f"_clean_data: champ obligatoire manquant ou vide: '{field}'")
+                missing_fields.append(field)
+        
+        if missing_fields:
+            logger.error(f"_clean_data: échec de validation - champs manquants: {missing_fields}")
+            return {}  # Retourner un dict vide pour signaler l'échec
+        
+        # Conversion sécurisée de id_contrat en entier
+        try:
+            cleaned['id_contrat'] = int(cleaned['id_contrat'])
+        except (ValueError, TypeError):
+            logger.error(f"_clean_data: id_contrat invalide '{cleaned.get('id_contrat')}', ne peut pas convertir en entier")
+            return {}
+        
+        # Conversion sécurisée de user_id en entier
+        try:
+            cleaned['user_id'] = int(cleaned['user_id'])
+        except (ValueError, TypeError):
+            logger.error(f"_clean_data: user_id invalide '{cleaned.get('user_id')}', ne peut pas convertir en entier")
+            return {}
+        
+        # Nettoyage final de la date (s'assurer que c'est une chaîne ISO)
+        if not isinstance(cleaned['date'], str):
+            try:
+                cleaned['date'] = str(cleaned['date'])
+            except:
+                logger.error(f"_clean_data: date invalide '{cleaned.get('date')}'")
+                return {}
+        
+        logger.debug("_clean_data: données nettoyées avec succès: %s", cleaned)
+        return cleaned
+    
+    def calculer_total_heures(self, heure_travail_id: int, cursor)-> float:
+        """Calcule le total des heures à partir des plages"""
+        def time_to_seconds(val) -> int:
+            if val is None:
+                return 0
+            if isinstance(val, timedelta):
+                # timedelta.total_seconds() donne la durée en secondes
+                return int(val.total_seconds())
+            elif hasattr(val, 'hour') and hasattr(val, 'minute'):
+                # C'est un objet time
+                return val.hour * 3600 + val.minute * 60 + getattr(val, 'second', 0)
+            else:
+                # Cas de secours (chaîne ?)
+                try:
+                    t = datetime.strptime(str(val), '%H:%M:%S').time()
+                    return t.hour * 3600 + t.minute * 60
+                except:
+                    return 0
+        query = """
+            SELECT debut, fin
+            FROM plages_horaires
+            WHERE heure_travail_id = %s
+            ORDER BY ordre"""
+        cursor.execute(query, (heure_travail_id,))
+        plages = cursor.fetchall()
+        total = 0.0
+
+        for plage in plages:
+            debut = plage['debut']
+            fin = plage['fin']
+            if debut and fin:
+                debut_seconds = time_to_seconds(debut)
+                fin_seconds = time_to_seconds(fin)
+                if fin_seconds < debut_seconds:
+                    fin_seconds += 24 *3600
+                total += (fin_seconds - debut_seconds) / 3600
+        return round(total,2)
+
+    def get_by_date(self, date_str: str, user_id: int, employeur: str, id_contrat: int) -> Optional[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                # 1. Récupérer l'enregistrement principal
+                cursor.execute("""
+                    SELECT * FROM heures_travail
+                    WHERE date = %s AND user_id = %s AND employeur = %s AND id_contrat = %s
+                """, (date_str, user_id, employeur, id_contrat))
+                row = cursor.fetchone()
+                
+                if not row:
+                    return None
+
+                # 2. Récupérer les plages associées
+                cursor.execute("""
+                    SELECT debut, fin
+                    FROM plages_horaires
+                    WHERE heure_travail_id = %s
+                    ORDER BY ordre
+                """, (row['id'],))
+                plages = []
+                for plage in cursor.fetchall():
+                    plages.append({
+                        'debut': plage['debut'],  # objet datetime.time
+                        'fin': plage['fin']       # objet datetime.time
+                    })
+
+                row['plages'] = plages
+                return row
+
+        except Exception as e:
+            logger.error(f"Erreur get_by_date pour {date_str}: {str(e)}")
+            return None
+        
+    def get_jour_travail(self, mois:int, semaine:int, user_id: int, employeur: str, id_contrat: int) -> List[Dict]:
+        """ récupère les jours de travauk avec plages"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if semaine > 0:
+                    query = """
+                    SELECT ht.*,
+                            JSON_ARRAYAGG(
+                                    JSON_OBJECT('ordre', ph.ordre, 'debut', ph.debut, 'fin', ph.fin)
+                            ) as plages
+                        FROM heures_travail ht
+                        LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                        WHERE ht.semaine_annee = %s AND ht.user_id = %s AND ht.employeur = %s AND ht.id_contrat = %s
+                        GROUP BY ht.id
+                        ORDER BY ht.date
+                    """
+                    params = (semaine, user_id, employeur, id_contrat)
+                else:
+                    query =  """
+                        SELECT ht.*,
+
+                            JSON_ARRAYAGG(
+                               JSON_OBJECT('ordre', ph.ordre, 'debut', ph.debut, 'fin', ph.fin)
+                           ) as plages
+                        FROM heures_travail ht
+                        LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                        WHERE ht.mois = %s AND ht.user_id = %s AND ht.employeur = %s AND ht.id_contrat = %s
+                        GROUP BY ht.id
+                        ORDER BY ht.date
+                    """
+                    params = (mois, user_id, employeur, id_contrat)
+                cursor.execute(query, params)
+                jours = cursor.fetchall()
+
+                for jour in jours:
+                    if jour['plages'] and jour['plages'][0] is not None:
+                        try:
+                            jour['plages'] = json.loads(jour['plages'])
+                            for plage in jour['plages']:
+                                for field in ['debut', 'fin']:
+                                    if plage.get(field) and hasattr(plage[field], 'total_seconds'):
+                                        total_seconds = plage[field].total_seconds
+                                        hours = int(total_seconds // 3600)
+                                        minutes  = int((total_seconds % 3600) // 60)
+                                        plage[field] = f"{hours:02d}:{minutes:02d}"
+                        except Exception:
+                            jour['plages'] = []
+                    else:
+                        jour['plages'] = []
+                return jours
+        except Exception as e:
+            logger.error(f"Erreur get_jour_travail: {str(e)}")
+            return []
+
+    def calculer_heures(self, h1d: str, h1f: str, h2d: str, h2f: str) -> float:
+        """Calcule le nombre d'heures total"""
+        def diff_heures(debut, fin):
+            if debut and fin:
+                start = datetime.strptime(debut, '%H:%M')
+                end = datetime.strptime(fin, '%H:%M')
+                delta = end - start
+                return max(delta.total_seconds() / 3600, 0)
+            return 0.0
+
+        total = diff_heures(h1d, h1f) + diff_heures(h2d, h2f)
+        return round(total, 2)
+
+    #def get_by_date(self, date_str: str, user_id: int, employeur: str, id_contrat: int) -> Optional[Dict]:
+    #    """Récupère les données pour une date et un utilisateur donnés"""
+    #    try:
+    #        with self.db.get_cursor() as cursor:
+    #            query = "SELECT * FROM heures_travail WHERE date = %s AND user_id = %s AND employeur = %s AND id_contrat = %s"
+    #            logger.debug(f"[get_by_date] Query: {query} avec params: ({date_str}, {user_id}, {employeur}, {id_contrat})")
+    #
+    #            cursor.execute(query, (date_str, user_id, employeur, id_contrat))
+    #            jour = cursor.fetchone()
+    #
+    #            if jour:
+    #                logger.debug(f"[get_by_date] Données trouvées pour {date_str}, user_id: {user_id}, employeur: {employeur}, id_contrat: {id_contrat}  ")
+    #                self._convert_timedelta_fields(jour, ['h1d', 'h1f', 'h2d', 'h2f'])
+    #            else:
+    #               logger.debug(f"[get_by_date] Aucune donnée trouvée pour {date_str}, user_id: {user_id}, employeur: {employeur}, id_contrat: {id_contrat}  ")
+    #
+    #            return jour
+    #
+    #    except Exception as e:
+    #        logger.error(f"Erreur get_by_date pour {date_str}: {str(e)}")
+    #        return []]
+
+    def get_jours_travail(self, mois: int, semaine: int, user_id: int, employeur: str, id_contrat: int) -> List[Dict]:
+        """Récupère les jours de travail pour une période"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if semaine > 0:
+                    query = "SELECT * FROM heures_travail WHERE semaine_annee = %s AND user_id = %s AND employeur = %s AND id_contrat = %s ORDER BY date"
+                    params = (semaine, user_id, employeur, id_contrat)
+                else:
+                    query = "SELECT * FROM heures_travail WHERE mois = %s AND user_id = %s AND employeur = %s AND id_contrat = %s ORDER BY date"
+                    params = (mois, user_id, employeur, id_contrat)
+
+                logger.debug("[get_jours_travail] Query: %s avec params: %s", query, params)
+                cursor.execute(query, params)
+                jours = cursor.fetchall()
+
+                logger.debug("[get_jours_travail] %s jours trouvés", len(jours))
+
+                for jour in jours:
+                    self._convert_timedelta_fields(jour, ['h1d', 'h1f', 'h2d', 'h2f'])
+
+                return jours
+
+        except Exception as e:
+            logger.error(f"Erreur get_jours_travail: {str(e)}")
+            return []
+
+    def delete_by_date(self, date_str: str, user_id: int, employeur: str, id_contrat: int) -> bool:
+        """Supprime les données pour une date et un utilisateur donnés"""
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                query = "DELETE FROM heures_travail WHERE date = %s AND user_id = %s AND employeur = %s AND id_contrat = %s"
+                logger.debug("[delete_by_date] Query: %s avec params: (%s, %s, %s, %s)", query, date_str, user_id, employeur, id_contrat)
+
+                cursor.execute(query, (date_str, user_id, employeur, id_contrat))
+                rows_affected = cursor.rowcount
+
+                logger.debug("[delete_by_date] %s ligne(s) supprimée(s) pour %s", rows_affected, date_str)
+                if rows_affected:
+                    date_obj = datetime.fromisoformat(str(date_str)).date()
+                    self._emettre_changement(int(user_id), int(id_contrat), [date_obj], cursor)
+                return True
+
+        except Exception as e:
+            logger.error(f"Erreur delete_by_date pour {date_str}: {str(e)}")
+            return False
+
+    def _convert_timedelta_fields(self, record: dict, fields: list) -> None:
+        """Convertit les champs timedelta en chaîne HH:MM dans un dictionnaire"""
+        for field in fields:
+            val = record.get(field)
+            if val:
+                if hasattr(val, 'total_seconds'):
+                    total_seconds = val.total_seconds()
+                    hours = int(total_seconds // 3600)
+                    minutes = int((total_seconds % 3600) // 60)
+                    record[field] = f"{hours:02d}:{minutes:02d}"
+                else:
+                    # 'HH:MM:SS' texte (agrégats MIN/MAX sur TIME avec le stockage SQLite)
+                    texte = str(val)
+                    record[field] = texte[:5] if len(texte) == 8 and texte[2] == ':' else texte
+            else:
+                record[field] = ''
+
+    def get_total_heures_mois(self, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int) -> float:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT SUM(total_h) FROM heures_travail
+                WHERE user_id = %s AND employeur = %s AND id_contrat = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                """
+                cursor.execute(query, (user_id, employeur, id_contrat, annee, mois))
+                result = cursor.fetchone()
+                total = float(result['SUM(total_h)']) if result and result['SUM(total_h)'] else 0.0
+                logger.debug("get_total_heures_mois → user=%s, mois=%s/%s, employeur=%s, contrat=%s → total=%s", user_id, mois, annee, employeur, id_contrat, total)
+                return total
+        except Exception as e:
+            logger.error(f"Erreur get_total_heures_mois: {e}")
+            return 0.0
+
+    def get_heures_periode(self, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int, start_day: int, end_day: int) -> float:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT SUM(total_h) FROM heures_travail
+                WHERE user_id = %s AND employeur = %s AND id_contrat = %s
+                AND YEAR(date) = %s
+                AND MONTH(date) = %s
+                AND DAY(date) BETWEEN %s AND %s
+                """
+                cursor.execute(query, (user_id, employeur, id_contrat, annee, mois, start_day, end_day))
+                result = cursor.fetchone()
+                total = float(result['SUM(total_h)']) if result and result['SUM(total_h)'] else 0.0
+                logger.info("get_heures_periode → user=%s, mois=%s/%s, jours=%s-%s, employeur=%s, contrat=%s → total=%s", user_id, mois, annee, start_day, end_day, employeur, id_contrat, total)
+                return total
+        except Exception as e:
+            logger.error(f"Erreur get_heures_periode: {e}")
+            return 0.0
+
+    def importer_depuis_csv(self, fichier_csv: str, user_id: int) -> int:
+        """
+        Importer les heures depuis un fichier CSV
+        - Ne remplace pas les valeurs existantes par NULL
+        - Conserve les anciennes heures si la cellule est vide
+        """
+        lignes_importees = 0
+        dates_par_contrat = defaultdict(set)
+        lignes_csv = []
+        try:
+            # 1. Lecture et validation du fichier, sans toucher à la base
+            with open(fichier_csv, newline='', encoding='utf-8') as csvfile:
+                reader = csv.DictReader(csvfile)
+
+                for row in reader:
+                    date_str = row.get('date')
+                    employeur = row.get('employeur')
+                    id_contrat = row.get('id_contrat')
+                    if id_contrat is None:
+                        logger.warning(f"[Import CSV] id_contrat manquant pour la ligne avec date : {row}. Ligne ignorée.")
+                        continue
+                    try:
+                        id_contrat = int(id_contrat)
+                    except ValueError:
+                        logger.warning(f"[Import CSV] id_contrat invalide pour la ligne avec date : {id_contrat}")
+                        continue
+                    if not date_str or not employeur:
+                        continue
+
+                    try:
+                        date_obj = datetime.fromisoformat(date_str).date()
+                    except ValueError:
+                        logger.warning(f"[Import CSV] Date invalide ignorée : {date_str}")
+                        continue
+                    lignes_csv.append((date_obj, employeur, id_contrat, row))
+
+            if not lignes_csv:
+                logger.info("[Import CSV] 0 lignes importées avec succès")
+                return 0
+
+            with self.db.get_cursor(commit=True) as cursor:
+                # 2. Une seule requête pour les lignes existantes de la période du fichier
+                cursor.execute("""
+                    SELECT id, date, employeur, id_contrat, h1d, h1f, h2d, h2f, vacances
+                    FROM heures_travail
+                    WHERE user_id = %s AND date BETWEEN %s AND %s
+                """, (user_id, min(l[0] for l in lignes_csv), max(l[0] for l in lignes_csv)))
+                fusion = {}
+                for existing in cursor.fetchall():
+                    self._convert_timedelta_fields(existing, ['h1d', 'h1f', 'h2d', 'h2f'])
+                    cle = (existing['date'], existing['employeur'], existing['id_contrat'])
+                    fusion.setdefault(cle, {
+                        'id': existing['id'],
+                        'h1d': existing['h1d'] or None,
+                        'h1f': existing['h1f'] or None,
+                        'h2d': existing['h2d'] or None,
+                        'h2f': existing['h2f'] or None,
+                        'vacances': existing['vacances'],
+                    })
+
+                # 3. Fusion en mémoire : une cellule vide ne remplace jamais une valeur existante
+                for date_obj, employeur, id_contrat, row in lignes_csv:
+                    cle = (date_obj, employeur, id_contrat)
+                    courant = fusion.setdefault(cle, {
+                        'id': None, 'h1d': None, 'h1f': None, 'h2d': None, 'h2f': None, 'vacances': False
+                    })
+                    for champ in ('h1d', 'h1f', 'h2d', 'h2f'):
+                        courant[champ] = row.get(champ) or courant[champ]
+                    if row.get('vacances'):
+                        courant['vacances'] = str(row.get('vacances')).strip().lower() in ('1', 'true', 'oui')
+                    courant['importe'] = True
+                    dates_par_contrat[id_contrat].add(date_obj)
+                    lignes_importees += 1
+
+                # 4. Écriture par lots : id renseigné → mise à jour via la clé primaire, sinon insertion
+                valeurs = []
+                for (date_obj, employeur, id_contrat), courant in fusion.items():
+                    if not courant.get('importe'):
+                        continue
+                    total_h = self.calculer_heures(courant['h1d'], courant['h1f'], courant['h2d'], courant['h2f'])
+                    valeurs.append((
+                        courant['id'], date_obj, date_obj.strftime('%A'), date_obj.isocalendar()[1], date_obj.month,
+                        courant['h1d'], courant['h1f'], courant['h2d'], courant['h2f'], total_h, courant['vacances'],
+                        user_id, employeur, id_contrat
+                    ))
+
+                requete = """
+                    INSERT INTO heures_travail
+                    (id, date, jour_semaine, semaine_annee, mois,
+                    h1d, h1f, h2d, h2f, total_h, vacances, user_id, employeur, id_contrat)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        h1d = VALUES(h1d), h1f = VALUES(h1f), h2d = VALUES(h2d), h2f = VALUES(h2f),
+                        total_h = VALUES(total_h), vacances = VALUES(vacances),
+                        jour_semaine = VALUES(jour_semaine), semaine_annee = VALUES(semaine_annee), mois = VALUES(mois)
+                """
+                for i in range(0, len(valeurs), self.TAILLE_LOT_IMPORT):
+                    cursor.executemany(requete, valeurs[i:i + self.TAILLE_LOT_IMPORT])
+
+                for id_contrat, dates in dates_par_contrat.items():
+                    self._emettre_changement(user_id, id_contrat, dates, cursor)
+
+            logger.info("[Import CSV] %s lignes importées avec succès", lignes_importees)
+            return lignes_importees
+
+        except Exception as e:
+            logger.error(f"[Import CSV] Erreur : {e}")
+            return 0
+
+    def get_heures_employe_mois(self, employe_id: int, annee: int, mois: int) -> float:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT SUM(total_h) FROM heures_travail
+                    WHERE employe_id = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                """
+                cursor.execute(query, (employe_id, annee, mois))
+                result = cursor.fetchone()
+                return float(result['SUM(total_h)']) if result and result['SUM(total_h)'] else 0.0
+        except Exception as e:
+            logger.error(f"Erreur get_heures_employe_mois: {e}")
+            return 0.0
+
+    def get_heures_par_employe_mois(self, employe_id: int, annee: int, mois: int) -> List[Dict]:
+        with self.db.get_cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT date, total_h, vacances, plages
+                FROM heures_travail
+                WHERE employe_id = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                ORDER BY date
+            """, (employe_id, annee, mois))
+            return cursor.fetchall()
+
+    def creer_shift(self, data: Dict) -> bool:
+        """Crée un shift (enregistrement avec employe_id)"""
+        try:
+            # S'assurer que c'est pour le planning
+            data['type_heures'] = 'simulees'
+            
+            # Appeler la méthode existante create_or_update
+            return self.create_or_update(data)
+        except Exception as e:
+            logger.error(f"Erreur creer_shift: {e}")
+            return False
+    
+    def get_shifts_by_employe_date(self, user_id: int, employe_id: int, date_str: str) -> List[Dict]:
+        """Récupère les shifts d'un employé à une date spécifique"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT ht.*, 
+                    ph.debut as plage_debut, 
+                    ph.fin as plage_fin,
+                    ph.ordre
+                FROM heures_travail ht
+                LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                WHERE ht.user_id = %s 
+                AND ht.employe_id = %s 
+                AND ht.date = %s
+                AND ht.type_heures = 'simulees'
+                ORDER BY ph.ordre
+                """
+                cursor.execute(query, (user_id, employe_id, date_str))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur get_shifts_by_employe_date: {e}")
+            return []
+    
+    def delete_shifts_for_employe_date(self, user_id: int, employe_id: int, date_str: str) -> bool:
+        """Supprime tous les shifts d'un employé à une date"""
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                # Récupérer les IDs des enregistrements
+                cursor.execute("""
+                    SELECT id FROM heures_travail 
+                    WHERE user_id = %s AND employe_id = %s AND date = %s
+                    AND type_heures = 'simulees'
+                """, (user_id, employe_id, date_str))
+                
+                records = cursor.fetchall()
+                
+                for record in records:
+                    # Supprimer les plages horaires
+                    cursor.execute("DELETE FROM plages_horaires WHERE heure_travail_id = %s", (record['id'],))
+                    # Supprimer l'enregistrement principal
+                    cursor.execute("DELETE FROM heures_travail WHERE id = %s", (record['id'],))
+                if records:
+                    VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+                
+                return True
+        except Exception as e:
+            logger.error(f"Erreur delete_shifts_for_employe_date: {e}")
+            return False
+    @staticmethod
+    def calculer_heures_static(h1d: str, h1f: str, h2d: str, h2f: str) -> float:
+        """Version statique de calculer_heures pour utilisation hors instance"""
+        def diff_heures(debut, fin):
+            if debut and fin:
+                start = datetime.strptime(debut, '%H:%M')
+                end = datetime.strptime(fin, '%H:%M')
+                delta = end - start
+                return max(delta.total_seconds() / 3600, 0)
+            return 0.0
+
+        total = diff_heures(h1d, h1f) + diff_heures(h2d, h2f)
+        return round(total, 2)
+
+    def has_hours_for_employeur_and_contrat(self, user_id: int, employeur: str, id_contrat: int) -> bool:
+        """Vérifie si l'utilisateur a des heures enregistrées pour un employeur donné"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT 1
+                    FROM heures_travail
+                    WHERE user_id = %s AND employeur = %s AND id_contrat = %s
+                    LIMIT 1
+                """
+                cursor.execute(query, (user_id, employeur, id_contrat))
+                result = cursor.fetchone()
+                return result is not None
+        except Exception as e:
+            logger.error(f"Erreur has_hours_for_employeur: {e}")
+            return False
+
+    def get_h1d_h2f_for_period(self, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int = None, semaine: int = None) -> List[Dict]:
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                if semaine is not None:
+                    query = """
+                        SELECT ht.date,
+                            MIN(ph.debut) as h1d,
+                            MAX(ph.fin) as h2f
+                        FROM heures_travail ht
+                        LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                        WHERE ht.user_id = %s AND ht.employeur = %s AND ht.id_contrat = %s
+                        AND YEAR(ht.date) = %s AND ht.semaine_annee = %s
+                        GROUP BY ht.date
+                        ORDER BY ht.date
+                        """
+                    params = (user_id, employeur, id_contrat, annee, semaine)
+                elif mois is not None:
+                    query = """
+                            SELECT ht.date,
+                                MIN(ph.debut) as h1d,
+                                MAX(ph.fin) as h2f
+                                FROM heures_travail ht
+                                LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                                WHERE ht.user_id = %s AND ht.employeur = %s AND ht.id_contrat = %s
+                                AND YEAR(date) = %s AND ht.mois = %s
+                                GROUP BY ht.date
+                                ORDER BY ht.date
+                                """
+                    params = (user_id, employeur, id_contrat, annee, mois)
+                else:
+                    raise ValueError("Vous devez spéciier soit 'mois', soit 'semaine'.")
+                return self.db.lire_lignes(query, params, nom='LigneH1dH2f', cursor=cursor,
+                                           convertisseurs={'h1d': en_heure_minutes, 'h2f': en_heure_minutes})
+        except Exception as e:
+            logger.error(f"Erreur get_h1d_h2f_for period: {e}")
+            return []
+
+    def get_h2f_par_semaine(self, user_id: int, employeur: str, id_contrat: int, annee: int) -> List[Tuple[int, str]]:
+        """
+        (semaine, h2f 'HH:MM') de chaque jour travaillé de l'année, en une seule requête
+        de tuples (au lieu d'un appel à get_h1d_h2f_for_period par semaine).
+        """
+        try:
+            return self.db.lire_lignes("""
+                SELECT ht.semaine_annee, MAX(ph.fin) as h2f
+                FROM heures_travail ht
+                LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                WHERE ht.user_id = %s AND ht.employeur = %s AND ht.id_contrat = %s
+                AND YEAR(ht.date) = %s
+                GROUP BY ht.date, ht.semaine_annee
+                """, (user_id, employeur, id_contrat, annee), mode='tuple',
+                convertisseurs={'h2f': en_heure_minutes})
+        except Exception as e:
+            logger.error(f"Erreur get_h2f_par_semaine: {e}")
+            return []
+
+
+
+
+
+
+
+    #def get_h1d_h2f_for_period(self, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int = None, semaine: int = None) -> List[Dict]:
+    #    """
+    #    Récupère les heures de début (h1d) et de fin (h2f) pour une période donnée.
+    #    Si 'mois' est spécifié, récupère les données du mois.
+    #    Si 'semaine' est spécifiée, récupère les données de la semaine.
+    #    """
+    #    try:
+    #        with self.db.get_cursor() as cursor:
+    #            if semaine is not None:
+    #                query = """
+    #                SELECT date, h1d, h2f
+    #                FROM heures_travail
+    #                WHERE user_id = %s AND employeur = %s AND id_contrat = %s
+    #                AND YEAR(date) = %s AND semaine_annee = %s
+    #                ORDER BY date
+    #                """
+    #                params = (user_id, employeur, id_contrat, annee, semaine)
+    #            elif mois is not None:
+    #                query = """
+    #                SELECT date, h1d, h2f
+    #                FROM heures_travail
+    #                WHERE user_id = %s AND employeur = %s AND id_contrat = %s
+    #                AND YEAR(date) = %s AND mois = %s
+    #                ORDER BY date
+    #                """
+    #                params = (user_id, employeur, id_contrat, annee, mois)
+    #            else:
+    #                # Si ni mois ni semaine n'est spécifié, on pourrait récupérer l'année entière
+    #                # ou lever une erreur. Ici, on lève une erreur.
+    #                raise ValueError("Vous devez spécifier soit 'mois', soit 'semaine'.")
+#
+    #            cursor.execute(query, params)
+    #            rows = cursor.fetchall()
+#
+    #            # Convertir les timedelta en HH:MM pour l'affichage
+    #            for row in rows:
+    #                self._convert_timedelta_fields(row, ['h1d', 'h2f'])
+#
+    #            return rows
+    #    except Exception as e:
+    #        logger.error(f"Erreur get_h1d_h2f_for_period: {e}")
+    #        return []
+
+    #def get_jour_travaille(self, date_str: str, user_id: int, employeur: str, id_contrat: int) -> Optional[Dict]:
+    #    """
+    #    Récupère les heures de début (h1d) et de fin (h2f) pour une date spécifique.
+    #    """
+    #    try:
+    #        with self.db.get_cursor() as cursor:
+    #            query = """
+    #            SELECT date, h1d, h2f
+    #            FROM heures_travail
+    #            WHERE date = %s AND user_id = %s AND employeur = %s AND id_contrat = %s
+    #            """
+    #            cursor.execute(query, (date_str, user_id, employeur, id_contrat))
+    #            jour = cursor.fetchone()
+    #            if jour:
+    #                self._convert_timedelta_fields(jour, ['h1d', 'h2f'])
+    #            return jour
+    #    except Exception as e:
+    #        logger.error(f"Erreur get_jour_travaille pour {date_str}: {e}")
+    #        return None
+
+    def time_to_minutes(self, time_str: str) -> int:
+        """
+        Convertit une chaîne 'HH:MM' en minutes depuis minuit.
+        Retourne -1 si la chaîne est vide ou invalide.
+        """
+        if not time_str or time_str == '':
+            return -1
+        try:
+            parts = time_str.split(':')
+            if len(parts) != 2:
+                return -1
+            hours = int(parts[0])
+            minutes = int(parts[1])
+            return hours * 60 + minutes
+        except (ValueError, AttributeError):
+            return -1
+
+    def get_h1d_h2f_for_period_with_employe(self, contrat_model, user_id: int, annee: int,mois: Optional[int] = None,semaine: Optional[int] = None, employe_id: Optional[int] = None ) -> List[Dict]:
+        # On récupère d’abord les contrats de l’utilisateur
+        contrats = contrat_model.get_all_contrats(user_id)
+        if not contrats:
+            return []
+
+        # Extraire les paires (employeur, id_contrat)
+        conditions = []
+        params = [user_id, annee]
+        if employe_id is not None:
+            params.append(employe_id)
+            employeur_clause = "AND ht.employe_id = %s"
+        else:
+            employeur_clause = "AND ht.employe_id IS NULL"
+
+        if semaine is not None:
+            time_clause = "AND ht.semaine_annee = %s"
+            params.append(semaine)
+        elif mois is not None:
+            time_clause = "AND ht.mois = %s"
+            params.append(mois)
+        else:
+            raise ValueError("Spécifiez mois ou semaine")
+
+        query = f"""
+            SELECT ht.date, MIN(ph.debut) as h1d, MAX(ph.fin) as h2f
+            FROM heures_travail ht
+            LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+            WHERE ht.user_id = %s
+            {employeur_clause}
+            AND YEAR(ht.date) = %s
+            {time_clause}
+            GROUP BY ht.date
+            ORDER BY ht.date
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            for row in rows:
+                self._convert_timedelta_fields(row, ['h1d', 'h2f'])
+            return rows
+    def get_shifts_for_week(self, user_id: int, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Récupère tous les shifts (plages horaires) pour une semaine donnée
+        """
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT ht.*, 
+                    ph.debut as plage_debut, 
+                    ph.fin as plage_fin,
+                    e.prenom, e.nom
+                FROM heures_travail ht
+                LEFT JOIN plages_horaires ph ON ht.id = ph.heure_travail_id
+                LEFT JOIN employes e ON ht.employe_id = e.id
+                WHERE ht.user_id = %s 
+                AND ht.date BETWEEN %s AND %s
+                ORDER BY ht.date, ph.ordre
+                """
+                cursor.execute(query, (user_id, start_date, end_date))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur get_shifts_for_week: {e}")
+            return []
+
+
+class SyntheseHebdomadaire:
+    def __init__(self, db):
+        self.db = db
+   
+    # Dans la classe SyntheseHebdomadaire
+    def calculate_for_week_by_contrat(self, user_id: int, annee: int, semaine: int) -> list[dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT
+                        ht.id_contrat,
+                        c.employeur,
+                        SUM(ht.total_h) AS total_heures
+                    FROM heures_travail ht
+                    JOIN contrats c ON ht.id_contrat = c.id
+                    WHERE ht.user_id = %s
+                    AND YEAR(ht.date) = %s
+                    AND ht.semaine_annee = %s
+                    AND ht.total_h IS NOT NULL
+                    AND ht.id_contrat IS NOT NULL
+                    GROUP BY ht.id_contrat, c.employeur
+                """
+                cursor.execute(query, (user_id, annee, semaine))
+                rows = cursor.fetchall()
+
+                resultats = []
+                for row in rows:
+                    id_contrat = row['id_contrat']
+                    employeur = row['employeur']
+                    heures = float(row['total_heures'])
+                    heures_simulees = 0.0  # à implémenter plus tard si besoin
+
+                    resultats.append({
+                        'user_id': user_id,
+                        'annee': annee,
+                        'semaine_numero': semaine,
+                        'id_contrat': id_contrat,
+                        'employeur': employeur,
+                        'heures_reelles': round(heures, 2),
+                        'heures_simulees': round(heures_simulees, 2),
+                        'difference': round(heures - heures_simulees, 2),
+                        'moyenne_mobile': 0.0,
+                    })
+                return resultats
+        except Exception as e:
+            logger.error(f"Erreur calcul synthèse hebdo par contrat: {e}")
+            return []
+
+    def create_or_update(self, data: dict) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                # Vérifier si une entrée existe déjà
+                cursor.execute("""
+                    SELECT id FROM synthese_hebdo
+                    WHERE semaine_numero = %s AND annee = %s AND user_id = %s
+                """, (data['semaine_numero'], data['annee'], data['user_id']))
+                existing = cursor.fetchone()
+
+                if existing:
+                    query = """
+                    UPDATE synthese_hebdo
+                    SET heures_reelles = %s, heures_simulees = %s,
+                        difference = %s, moyenne_mobile = %s
+                    WHERE id = %s
+                    """
+                    cursor.execute(query, (
+                        data['heures_reelles'], data['heures_simulees'],
+                        data['difference'], data['moyenne_mobile'],
+                        existing[0]
+                    ))
+                else:
+                    query = """
+                    INSERT INTO synthese_hebdo
+                    (semaine_numero, annee, heures_reelles, heures_simulees,
+                    difference, moyenne_mobile, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(query, (
+                        data['semaine_numero'], data['annee'],
+                        data['heures_reelles'], data['heures_simulees'],
+                        data['difference'], data['moyenne_mobile'],
+                        data['user_id']
+                    ))
+            return True
+        except Error as e:
+            logger.error(f"Erreur synthèse hebdo: {e}")
+            return False
+
+    def create_or_update_batch(self, data_list: list[dict]) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                for data in data_list:
+                    cursor.execute("""
+                        SELECT id FROM synthese_hebdo
+                        WHERE user_id = %s AND annee = %s AND semaine_numero = %s AND id_contrat = %s
+                    """, (
+                        data['user_id'],
+                        data['annee'],
+                        data['semaine_numero'],
+                        data['id_contrat']
+                    ))
+                    existing = cursor.fetchone()
+
+                    if existing:
+                        query = """
+                            UPDATE synthese_hebdo SET
+                                employeur = %s,
+                                heures_reelles = %s,
+                                heures_simulees = %s,
+                                difference = %s,
+                                moyenne_mobile = %s
+                            WHERE id = %s
+                        """
+                        cursor.execute(query, (
+                            data['employeur'],
+                            data['heures_reelles'],
+                            data['heures_simulees'],
+                            data['difference'],
+                            data['moyenne_mobile'],
+                            existing['id']
+                        ))
+                    else:
+                        query = """
+                            INSERT INTO synthese_hebdo
+                            (user_id, annee, semaine_numero, id_contrat, employeur,
+                            heures_reelles, heures_simulees, difference, moyenne_mobile)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        """
+                        cursor.execute(query, (
+                            data['user_id'],
+                            data['annee'],
+                            data['semaine_numero'],
+                            data['id_contrat'],
+                            data['employeur'],
+                            data['heures_reelles'],
+                            data['heures_simulees'],
+                            data['difference'],
+                            data['moyenne_mobile']
+                        ))
+                for user_id in {data['user_id'] for data in data_list}:
+                    VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur batch synthèse hebdo: {e}")
+            return False
+
+    # Nombre de semaines prises en compte dans la moyenne mobile (semaine courante incluse)
+    FENETRE_MOYENNE_MOBILE = 4
+
+    def appliquer_changement_heures(self, user_id: int, id_contrat: int, dates: list, cursor=None) -> None:
+        """
+        Abonné de HeureTravail : recalcule uniquement les semaines touchées
+        pour (user_id, id_contrat), puis les moyennes mobiles qui en dépendent.
+        """
+        if cursor is None:
+            with self.db.get_cursor(commit=True) as new_cursor:
+                self._maj_semaines(new_cursor, user_id, id_contrat, dates)
+        else:
+            self._maj_semaines(cursor, user_id, id_contrat, dates)
+
+    def rattraper_depuis_heures(self) -> int:
+        """
+        Rattrapage unique (migration au démarrage) : recalcule, par le même chemin que les
+        écritures d'heures, toutes les semaines ayant des heures saisies, moyennes mobiles
+        comprises. Retourne le nombre de couples (utilisateur, contrat) traités.
+        """
+        with self.db.get_cursor(commit=True) as cursor:
+            cursor.execute("""
+                SELECT user_id, id_contrat, MIN(date) AS jour
+                FROM heures_travail
+                WHERE id_contrat IS NOT NULL AND total_h IS NOT NULL
+                GROUP BY user_id, id_contrat, YEAR(date), semaine_annee
+            """)
+            dates_par_contrat = defaultdict(list)
+            for r in cursor.fetchall():
+                jour = r['jour'] if isinstance(r['jour'], date) else date.fromisoformat(str(r['jour'])[:10])
+                dates_par_contrat[(r['user_id'], r['id_contrat'])].append(jour)
+            for (user_id, id_contrat), dates in dates_par_contrat.items():
+                self._maj_semaines(cursor, user_id, id_contrat, dates)
+        return len(dates_par_contrat)
+
+    def _maj_semaines(self, cursor, user_id: int, id_contrat: int, dates: list) -> None:
+        semaines_par_annee = defaultdict(set)
+        for d in dates:
+            semaines_par_annee[d.year].add(d.isocalendar()[1])
+
+        cursor.execute("SELECT employeur FROM contrats WHERE id = %s", (id_contrat,))
+        contrat = cursor.fetchone()
+        employeur = contrat['employeur'] if contrat else None
+
+        for annee, semaines in semaines_par_annee.items():
+            for semaine in semaines:
+                cursor.execute("""
+                    SELECT SUM(total_h) AS total_heures
+                    FROM heures_travail
+                    WHERE user_id = %s AND id_contrat = %s
+                    AND YEAR(date) = %s AND semaine_annee = %s
+                    AND total_h IS NOT NULL
+                """, (user_id, id_contrat, annee, semaine))
+                row = cursor.fetchone()
+                total = row['total_heures'] if row else None
+
+                cursor.execute("""
+                    SELECT id FROM synthese_hebdo
+                    WHERE user_id = %s AND annee = %s AND semaine_numero = %s AND id_contrat = %s
+                """, (user_id, annee, semaine, id_contrat))
+                existing = cursor.fetchone()
+
+                if total is None:
+                    if existing:
+                        cursor.execute("DELETE FROM synthese_hebdo WHERE id = %s", (existing['id'],))
+                    continue
+
+                heures = round(float(total), 2)
+                if existing:
+                    cursor.execute("""
+                        UPDATE synthese_hebdo SET
+                            employeur = %s, heures_reelles = %s, difference = %s - COALESCE(heures_simulees, 0)
+                        WHERE id = %s
+                    """, (employeur, heures, heures, existing['id']))
+                else:
+                    cursor.execute("""
+                        INSERT INTO synthese_hebdo
+                        (user_id, annee, semaine_numero, id_contrat, employeur,
+                        heures_reelles, heures_simulees, difference, moyenne_mobile)
+                        VALUES (%s, %s, %s, %s, %s, %s, 0, %s, 0)
+                    """, (user_id, annee, semaine, id_contrat, employeur, heures, heures))
+
+            self._maj_moyennes_mobiles(cursor, user_id, id_contrat, annee, min(semaines), max(semaines))
+
+    def _maj_moyennes_mobiles(self, cursor, user_id: int, id_contrat: int, annee: int, semaine_min: int, semaine_max: int) -> None:
+        """Recalcule la moyenne mobile des seules semaines dont la fenêtre contient une semaine modifiée"""
+        fenetre = self.FENETRE_MOYENNE_MOBILE
+        cursor.execute("""
+            SELECT id, semaine_numero, heures_reelles, moyenne_mobile
+            FROM synthese_hebdo
+            WHERE user_id = %s AND id_contrat = %s AND annee = %s
+            AND semaine_numero BETWEEN %s AND %s
+        """, (user_id, id_contrat, annee, semaine_min - fenetre + 1, semaine_max + fenetre - 1))
+        rows = cursor.fetchall()
+        heures_par_semaine = {r['semaine_numero']: float(r['heures_reelles'] or 0) for r in rows}
+
+        mises_a_jour = []
+        for r in rows:
+            semaine = r['semaine_numero']
+            if semaine < semaine_min:
+                continue
+            valeurs = [heures_par_semaine.get(s, 0.0) for s in range(max(1, semaine - fenetre + 1), semaine + 1)]
+            moyenne = round(sum(valeurs) / len(valeurs), 2)
+            if r['moyenne_mobile'] is None or float(r['moyenne_mobile']) != moyenne:
+                mises_a_jour.append((moyenne, r['id']))
+        if mises_a_jour:
+            cursor.executemany("UPDATE synthese_hebdo SET moyenne_mobile = %s WHERE id = %s", mises_a_jour)
+
+    def get_by_user(self, user_id: int, limit: int = 12) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM synthese_hebdo
+                WHERE user_id = %s
+                ORDER BY annee DESC, semaine_numero DESC
+                LIMIT %s
+                """
+                cursor.execute(query, (user_id, limit))
+                syntheses = cursor.fetchall()
+                return syntheses
+        except Error as e:
+            logger.error(f"Erreur récupération synthèses: {e}")
+            return []
+
+    def get_by_user_and_year(self, user_id: int, annee: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT * FROM synthese_hebdo
+                    WHERE user_id = %s AND annee = %s
+                    ORDER BY semaine_numero ASC
+                """
+                cursor.execute(query, (user_id, annee))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération synthèse hebdo année: {e}")
+            return []
+
+    def get_by_user_and_week(self, user_id: int, annee: int = None, semaine: int = None) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT * FROM synthese_hebdo WHERE user_id = %s
+                """
+                params = [user_id]
+                if annee is not None:
+                    query += " AND annee = %s"
+                    params.append(annee)
+                if semaine is not None:
+                    query += " AND semaine_numero = %s"
+                    params.append(semaine)
+                query += " ORDER BY annee DESC, semaine_numero DESC"
+                cursor.execute(query, tuple(params))
+                result = cursor.fetchall()
+                return result
+        except Error as e:
+            logger.error(f"Erreur récupération synthèse par semaine: {e}")
+            return []
+
+    def get_by_user_and_week_and_contrat(self, user_id: int, id_contrat: int, annee: int = None, semaine: int = None) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM synthese_hebdo
+                WHERE user_id = %s AND id_contrat = %s AND annee = %s AND semaine_numero =%s
+                ORDER BY annee DESC, semaine_numero DESC
+                """
+                cursor.execute(query, (user_id, id_contrat, annee, semaine))
+                syntheses = cursor.fetchall()
+                return syntheses
+        except Error as e:
+            logger.error(f'erreur récupération synthpèse: {e}')
+            return []
+
+    def get_by_user_and_filters(self, user_id: int, annee: int = None, semaine: int = None,
+                            employeur: str = None, contrat_id: int = None) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM synthese_hebdo WHERE user_id = %s"
+                params = [user_id]
+                if annee is not None:
+                    query += " AND annee = %s"
+                    params.append(annee)
+                if semaine is not None:
+                    query += " AND semaine_numero = %s"
+                    params.append(semaine)
+                if employeur:
+                    query += " AND employeur = %s"
+                    params.append(employeur)
+                if contrat_id:
+                    query += " AND id_contrat = %s"
+                    params.append(contrat_id)
+                query += " ORDER BY annee DESC, semaine_numero DESC"
+                cursor.execute(query, tuple(params))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur filtre synthèse hebdo: {e}")
+            return []
+
+    def prepare_svg_data_hebdo(self, user_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        """Prépare les données pour un graphique SVG des heures hebdomadaires TOTALES (agrégées par semaine)."""
+        # Récupère TOUTES les synthèses de l'année (y compris plusieurs contrats/semaine)
+        synthese_list = self.get_by_user_and_year(user_id, annee)
+
+        # Agrège par semaine
+        total_par_semaine = {}
+        for s in synthese_list:
+            semaine = s['semaine_numero']
+            if semaine not in total_par_semaine:
+                total_par_semaine[semaine] = {'heures_reelles': 0.0, 'heures_simulees': 0.0}
+            total_par_semaine[semaine]['heures_reelles'] += float(s.get('heures_reelles', 0))
+            total_par_semaine[semaine]['heures_simulees'] += float(s.get('heures_simulees', 0))
+
+        # Prépare les listes pour les 53 semaines
+        heures_reelles_vals = []
+        heures_simulees_vals = []
+        semaine_labels = []
+
+        for semaine in range(1, 54):
+            data = total_par_semaine.get(semaine, {'heures_reelles': 0.0, 'heures_simulees': 0.0})
+            heures_reelles_vals.append(data['heures_reelles'])
+            heures_simulees_vals.append(data['heures_simulees'])
+            semaine_labels.append(f"S{semaine}")
+
+        # Calcul des bornes Y
+        all_vals = heures_reelles_vals + heures_simulees_vals
+        min_val = min(all_vals) if all_vals else 0.0
+        max_val = max(all_vals) if all_vals else 100.0
+        if min_val == max_val:
+            max_val = min_val + 40.0 if min_val == 0 else min_val * 1.1
+
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        echelle_y = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        # Ticks (tous les 10h)
+        ticks = svg_charts.ticks_y(min_val, max_val, echelle_y, pas=10)
+
+        # Barres (heures réelles) et ligne simulée (heures simulées)
+        colonnes_svg = svg_charts.colonnes(heures_reelles_vals, cadre, echelle_y, ratio_barre=0.6)
+        points_simule = svg_charts.points_centres(heures_simulees_vals, cadre, echelle_y)
+
+        return {
+            'colonnes': colonnes_svg,
+            'ligne_simule': points_simule,
+            'min_val': min_val,
+            'max_val': max_val,
+            'semaine_labels': semaine_labels,
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'annee': annee
+        }
+
+    def get_employeurs_distincts(self, user_id: int) -> List[str]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT employeur
+                    FROM synthese_hebdo
+                    WHERE user_id = %s AND employeur IS NOT NULL
+                    ORDER BY employeur
+                """, (user_id,))
+                return [row['employeur'] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Erreur employeurs: {e}")
+            return []
+
+    def calculate_h2f_stats(self, heure_model, user_id: int, employeur: str, id_contrat: int, annee: int, seuil_h2f_minutes: int = 18 * 60) -> Dict:
+        """
+        Calcule les statistiques sur h2f pour une année donnée.
+        seuil_h2f_minutes: seuil en minutes (ex: 18h = 18*60 min). Défaut à 18h.
+        Retourne un dictionnaire avec les moyennes hebdomadaires et la moyenne mobile.
+        """
+        weekly_counts = {semaine: 0 for semaine in range(1, 53)} # { semaine: nb_jours_avec_h2f_apres_seuil }
+
+        # Une seule requête pour l'année (tuples semaine, h2f)
+        for semaine, h2f in heure_model.get_h2f_par_semaine(user_id, employeur, id_contrat, annee):
+            if semaine not in weekly_counts:
+                continue
+            h2f_minutes = heure_model.time_to_minutes(h2f)
+            if h2f_minutes != -1 and h2f_minutes > seuil_h2f_minutes:
+                weekly_counts[semaine] += 1
+
+        # Calcul des moyennes hebdomadaires
+        moyennes_hebdo = { semaine: float(count) for semaine, count in weekly_counts.items() }
+
+        # Calcul de la moyenne mobile
+        moyennes_mobiles = {}
+        cumulative_count = 0
+        cumulative_weeks = 0
+        for semaine in range(1, 53):
+            cumulative_count += weekly_counts[semaine]
+            cumulative_weeks += 1
+            if cumulative_weeks > 0:
+                moyennes_mobiles[semaine] = round(cumulative_count / cumulative_weeks, 2)
+            else:
+                moyennes_mobiles[semaine] = 0.0
+
+        return {
+            'moyennes_hebdo': moyennes_hebdo,
+            'moyennes_mobiles': moyennes_mobiles,
+            'seuil_heure': f"{seuil_h2f_minutes // 60}:{seuil_h2f_minutes % 60:02d}"
+        }
+
+
+    def prepare_svg_data_horaire_jour(self, heure_model, user_id: int, employeur: str, id_contrat: int, annee: int, semaine: int, seuil_h2f_heure: float = 18.0, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        """
+        Prépare les données pour un graphique SVG des horaires de début/fin de journée.
+        Axe X: Jours de la semaine (Lun, Mar, Mer, Jeu, Ven, Sam, Dim)
+        Axe Y: Heures (6h en haut, 24h en bas)
+        seuil_h2f_heure: Heure du seuil à afficher (par défaut 18h).
+        """
+
+        jours_semaine = heure_model.get_h1d_h2f_for_period(user_id, employeur, id_contrat, annee, semaine=semaine)
+
+        # Constantes pour la conversion des heures en pixels
+        heure_debut_affichage = 6  # 6h du matin
+        heure_fin_affichage = 24   # 24h (minuit)
+        plage_heures = heure_fin_affichage - heure_debut_affichage # 18h
+        minute_debut_affichage = heure_debut_affichage * 60
+        minute_fin_affichage = heure_fin_affichage * 60
+        plage_minutes = plage_heures * 60 # 1080 minutes
+
+        seuil_h2f_minutes = int(seuil_h2f_heure * 60) # Convertir le seuil en minutes
+
+        # Marges
+        margin_x = largeur_svg * 0.1
+        margin_y = hauteur_svg * 0.1
+        plot_width = largeur_svg * 0.8
+        plot_height = hauteur_svg * 0.8
+
+        # Calcul de la position Y de la ligne seuil
+
+        seuil_minutes_affiche = max(minute_debut_affichage, min(seuil_h2f_minutes, minute_fin_affichage))
+        seuil_y = margin_y + plot_height - ((seuil_minutes_affiche - minute_debut_affichage) / plage_minutes) * plot_height
+        # Calcul des rectangles pour chaque jour
+        rectangles_svg = []
+        jours_labels = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+        # On itère sur les données de la liste `jours_semaine`
+        for i, jour_data in enumerate(jours_semaine):
+            # Utiliser le jour de la semaine de la date pour positionner l'élément
+            date_obj_raw = jour_data['date']
+            if isinstance(date_obj_raw, str):
+                date_obj = datetime.fromisoformat(date_obj_raw).date()
+            elif isinstance(date_obj_raw, datetime):
+                date_obj = date_obj_raw.date()
+            elif isinstance(date_obj_raw, date):
+                date_obj = date_obj_raw
+            else:
+                logger.error(f'Type inattendu pour la date : {type(date_obj_raw)}, valeur : {date_obj_raw}')
+                continue
+
+            jour_semaine_numero = date_obj.isocalendar()[2] # 1=Lundi, 7=Dimanche
+            if jour_semaine_numero < 1 or jour_semaine_numero > 7:
+                continue # Ignorer les jours en dehors de Lundi-Dimanche si nécessaire
+
+            h1d_minutes = heure_model.time_to_minutes(jour_data.get('h1d'))
+            h2f_minutes = heure_model.time_to_minutes(jour_data.get('h2f'))
+
+            # Calcul des coordonnées X pour la colonne du jour
+            x_jour_debut = margin_x + (jour_semaine_numero - 1) * (plot_width / 7)
+            x_jour_fin = margin_x + jour_semaine_numero * (plot_width / 7)
+            largeur_rect = (x_jour_fin - x_jour_debut) * 0.8 # Laisser un peu d'espace
+            x_rect_debut = x_jour_debut + (x_jour_fin - x_jour_debut) * 0.1
+
+            # Calcul des coordonnées Y pour h1d (début) et h2f (fin)
+            # La formule est: y = marge_y + hauteur_plot - ((minutes - minute_debut) / plage_minutes) * hauteur_plot
+            if h1d_minutes != -1 and h1d_minutes >= minute_debut_affichage and h1d_minutes <= minute_fin_affichage:
+                y_h1d = margin_y + plot_height - ((h1d_minutes - minute_debut_affichage) / plage_minutes) * plot_height
+            else:
+                y_h1d = None # Ne pas afficher si hors plage ou manquant
+
+            if h2f_minutes != -1 and h2f_minutes >= minute_debut_affichage and h2f_minutes <= minute_fin_affichage:
+                y_h2f = margin_y + plot_height - ((h2f_minutes - minute_debut_affichage) / plage_minutes) * plot_height
+            else:
+                y_h2f = None
+
+            # Vérifier si h2f dépasse le seuil
+            depasse_seuil = (h2f_minutes != -1 and h2f_minutes > seuil_h2f_minutes)
+            couleur = 'red' if depasse_seuil else 'steelblue'
+
+            if y_h1d is not None and y_h2f is not None:
+                # Dessiner un rectangle entre h1d et h2f
+                y_top = min(y_h1d, y_h2f)
+                y_bottom = max(y_h1d, y_h2f)
+                hauteur_rect = y_bottom - y_top
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_top,
+                    'width': largeur_rect,
+                    'height': hauteur_rect,
+                    'jour': jour_data['date'], # Pour info éventuelle dans le template
+                    'type': 'h1d_to_h2f', # Type pour distinguer dans le template
+                    'depasse_seuil': depasse_seuil, # Indicateur pour la couleur.
+                    'couleur': 'red' if depasse_seuil else 'steelblue'
+                })
+            elif y_h1d is not None: # Si h2f est manquant ou hors plage
+                # Dessiner un point ou une petite barre pour h1d
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_h1d - 2, # Hauteur arbitraire pour un point
+                    'width': largeur_rect,
+                    'height': 4,
+                    'jour': jour_data['date'],
+                    'type': 'h1d_only',
+                    'depasse_seuil': False, # h1d seul ne dépasse pas le seuil de h2f
+                    'couleur': 'red' if depasse_seuil else 'steelblue'
+                })
+            elif y_h2f is not None: # Si h1d est manquant ou hors plage
+                # Dessiner un point ou une petite barre pour h2f
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_h2f - 2, # Hauteur arbitraire pour un point
+                    'width': largeur_rect,
+                    'height': 4,
+                    'jour': jour_data['date'],
+                    'type': 'h2f_only',
+                    'depasse_seuil': depasse_seuil, # Utiliser la vérification pour h2f
+                    'couleur': 'red' if depasse_seuil else 'steelblue'
+                })
+
+        # Ticks pour l'axe Y (heures)
+        ticks_y = []
+        for h in range(heure_debut_affichage, heure_fin_affichage + 1):
+            y_tick = margin_y + plot_height - ((h * 60 - minute_debut_affichage) / plage_minutes) * plot_height
+            ticks_y.append({'heure': f"{h:02d}h", 'y': y_tick})
+
+        # Labels pour l'axe X (jours)
+        labels_x = []
+        for i in range(7):
+            x_label = margin_x + (i + 0.5) * (plot_width / 7)
+            labels_x.append({'jour': jours_labels[i], 'x': x_label})
+        total_minutes = int(round(seuil_h2f_heure * 60))
+        heures = total_minutes // 60
+        minutes = total_minutes % 60
+        seuil_heure_label = f"{heures}h{minutes:02d}"
+
+        return {
+            'rectangles': rectangles_svg,
+            'ticks_y': ticks_y,
+            'labels_x': labels_x,
+            'seuil_y': seuil_y, # <-- Ajout de la position Y du seuil
+            'seuil_heure': seuil_heure_label, # <-- Ajout de l'heure du seuil pour le label
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'semaine': semaine,
+            'annee': annee
+        }
+
+
+class SyntheseMensuelle:
+    def __init__(self, db):
+        self.db = db
+
+
+    def calculate_for_month_by_contrat(self, user_id: int, annee: int, mois: int) -> list[dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query_contrats = """
+                    SELECT
+                        h.id_contrat,
+                        c.employeur,
+                        SUM(h.total_h) AS heures_contrat
+                    FROM heures_travail h
+                    JOIN contrats c ON h.id_contrat = c.id
+                    WHERE h.user_id = %s
+                    AND YEAR(h.date) = %s
+                    AND MONTH(h.date) = %s
+                    AND h.total_h IS NOT NULL
+                    AND h.id_contrat IS NOT NULL
+                    GROUP BY h.id_contrat, c.employeur
+                """
+                cursor.execute(query_contrats, (user_id, annee, mois))
+                rows = cursor.fetchall()
+
+                resultats = []
+                for row in rows:
+                    id_contrat = row['id_contrat']
+                    employeur = row['employeur']
+                    heures_c = float(row['heures_contrat'])
+
+                    cursor.execute("SELECT salaire_horaire FROM contrats WHERE id = %s", (id_contrat,))
+                    contrat = cursor.fetchone()
+                    taux = float(contrat['salaire_horaire']) if contrat and contrat['salaire_horaire'] else 0.0
+                    salaire = heures_c * taux
+
+                    resultats.append({
+                        'user_id': user_id,
+                        'annee': annee,
+                        'mois': mois,
+                        'id_contrat': id_contrat,
+                        'employeur': employeur,
+                        'heures_reelles': round(heures_c, 2),
+                        'heures_simulees': 0.0,
+                        'salaire_reel': round(salaire, 2),
+                        'salaire_simule': 0.0,
+                    })
+                return resultats
+        except Exception as e:
+            logger.error(f"Erreur calcul synthèse mensuelle par contrat: {e}")
+            return []
+
+    def prepare_svg_data_mensuel(self, user_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        """
+        Prépare les données pour un graphique SVG des salaires mensuels.
+        Retourne un dict compatible avec le template.
+        """
+        # Récupérer toutes les synthèses mensuelles de l'année
+        synthese_list = self.get_by_user_and_year(user_id, annee)
+
+        # Indexer par mois
+        synthese_par_mois = {s['mois']: s for s in synthese_list}
+
+        # Initialiser les listes pour les 12 mois
+        salaire_reel_vals = []
+        salaire_simule_vals = []
+        mois_labels = []
+
+        for mois in range(1, 13):
+            s = synthese_par_mois.get(mois)
+            if s:
+                salaire_reel_vals.append(float(s.get('salaire_reel', 0)))
+                salaire_simule_vals.append(float(s.get('salaire_simule', 0)))
+            else:
+                salaire_reel_vals.append(0.0)
+                salaire_simule_vals.append(0.0)
+            mois_labels.append(f"{mois:02d}/{annee}")
+
+        # Calcul des bornes
+        all_vals = salaire_reel_vals + salaire_simule_vals
+        min_val = min(all_vals) if all_vals else 0.0
+        max_val = max(all_vals) if all_vals else 100.0
+        if min_val == max_val:
+            max_val = min_val + 100.0 if min_val == 0 else min_val * 1.1
+
+        # Marges, dimensions et échelle Y
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        y_coord = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        # === CALCUL DES TICKS POUR L'AXE Y ===
+        tick_step_minor = 200
+        tick_step_major = 1000
+
+        y_axis_min = math.floor(min_val / tick_step_minor) * tick_step_minor
+        y_axis_max = math.ceil(max_val / tick_step_minor) * tick_step_minor
+        if y_axis_max <= y_axis_min:
+            y_axis_max = y_axis_min + tick_step_major
+        if max_val < tick_step_major:
+            y_axis_max = tick_step_major
+
+        ticks = []
+        y_val = y_axis_min
+        while y_val <= y_axis_max:
+            if y_val >= min_val - 500 and y_val <= max_val + 500:  # plage raisonnable
+                is_major = (y_val % tick_step_major == 0)
+                y_px = y_coord(y_val)
+                ticks.append({
+                    'value': int(y_val),
+                    'y_px': y_px,
+                    'is_major': is_major
+                })
+            y_val += tick_step_minor
+
+        # === PRÉPARATION DES ÉLÉMENTS SVG ===
+        # Colonnes (barres) pour salaire réel, ligne (points) pour salaire simulé
+        colonnes_svg = svg_charts.colonnes(salaire_reel_vals, cadre, y_coord, ratio_barre=0.6)
+        points_simule = svg_charts.points_centres(salaire_simule_vals, cadre, y_coord)
+
+        return {
+            'colonnes': colonnes_svg,
+            'ligne_simule': points_simule,
+            'min_val': min_val,
+            'max_val': max_val,
+            'mois_labels': mois_labels,
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'annee': annee
+        }
+
+    def get_by_user_and_year(self, user_id: int, annee: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT * FROM synthese_mensuelle
+                    WHERE user_id = %s AND annee = %s
+                    ORDER BY mois ASC
+                """
+                cursor.execute(query, (user_id, annee))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération synthèse annuelle: {e}")
+            return []
+
+    def get_by_user_and_month(self, user_id: int, annee : int, mois: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT * FROM synthese_mensuelle
+                    WHERE user_id = %s AND annee = %s AND mois = %s
+                    ORDER BY mois ASC
+                """
+                cursor.execute(query, (user_id, annee, mois))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération synthèse annuelle: {e}")
+            return []
+
+    def get_by_user_and_filters(self, user_id: int, annee: int = None, mois: int = None, employeur: str = None, contrat_id: int = None) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM synthese_mensuelle WHERE user_id = %s"
+                params = [user_id]
+                if annee is not None:
+                    query += " AND annee = %s"
+                    params.append(annee)
+                if mois is not None:
+                    query += " AND mois = %s"
+                    params.append(mois)
+                if employeur:
+                    query += " AND employeur = %s"
+                    params.append(employeur)
+                if contrat_id:
+                    query += " AND id_contrat = %s"
+                    params.append(contrat_id)
+                query += " ORDER BY annee DESC, mois DESC"
+                cursor.execute(query, tuple(params))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur filtre synthèse: {e}")
+            return []
+
+    def get_employeurs_distincts(self, user_id: int) -> List[str]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT employeur
+                    FROM synthese_mensuelle
+                    WHERE user_id = %s AND employeur IS NOT NULL
+                    ORDER BY employeur
+                """, (user_id,))
+                return [row['employeur'] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Erreur employeurs: {e}")
+            return []
+
+    def create_or_update(self, data: dict) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                    SELECT id FROM synthese_mensuelle
+                    WHERE user_id = %s AND annee = %s AND mois = %s AND id_contrat = %s
+                """, (data['user_id'], data['annee'], data['mois'], data['id_contrat']))
+                existing = cursor.fetchone()
+
+                if existing:
+                    query = """
+                        UPDATE synthese_mensuelle SET
+                            employeur = %s,
+                            heures_reelles = %s,
+                            heures_simulees = %s,
+                            salaire_reel = %s,
+                            salaire_simule = %s
+                        WHERE id = %s
+                    """
+                    cursor.execute(query, (
+                        data['employeur'],
+                        data['heures_reelles'],
+                        data['heures_simulees'],
+                        data['salaire_reel'],
+                        data['salaire_simule'],
+                        existing['id']
+                    ))
+                else:
+                    query = """
+                        INSERT INTO synthese_mensuelle
+                        (user_id, annee, mois, id_contrat, employeur,
+                        heures_reelles, heures_simulees, salaire_reel, salaire_simule)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(query, (
+                        data['user_id'],
+                        data['annee'],
+                        data['mois'],
+                        data['id_contrat'],
+                        data['employeur'],
+                        data['heures_reelles'],
+                        data['heures_simulees'],
+                        data['salaire_reel'],
+                        data['salaire_simule']
+                    ))
+                VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', data['user_id'])
+            return True
+        except Exception as e:
+            logger.error(f"Erreur synthèse mensuelle: {e}")
+            return False
+
+    def appliquer_changement_heures(self, user_id: int, id_contrat: int, dates: list, cursor=None) -> None:
+        """
+        Abonné de HeureTravail : recalcule uniquement les mois touchés pour (user_id, id_contrat).
+        """
+        if cursor is None:
+            with self.db.get_cursor(commit=True) as new_cursor:
+                self._maj_mois(new_cursor, user_id, id_contrat, dates)
+        else:
+            self._maj_mois(cursor, user_id, id_contrat, dates)
+
+    def _maj_mois(self, cursor, user_id: int, id_contrat: int, dates: list) -> None:
+        cursor.execute("SELECT employeur, salaire_horaire FROM contrats WHERE id = %s", (id_contrat,))
+        contrat = cursor.fetchone()
+        employeur = contrat['employeur'] if contrat else None
+        taux = float(contrat['salaire_horaire']) if contrat and contrat['salaire_horaire'] else 0.0
+
+        for annee, mois in sorted({(d.year, d.month) for d in dates}):
+            cursor.execute("""
+                SELECT SUM(total_h) AS heures_contrat
+                FROM heures_travail
+                WHERE user_id = %s AND id_contrat = %s
+                AND YEAR(date) = %s AND MONTH(date) = %s
+                AND total_h IS NOT NULL
+            """, (user_id, id_contrat, annee, mois))
+            row = cursor.fetchone()
+            total = row['heures_contrat'] if row else None
+
+            cursor.execute("""
+                SELECT id FROM synthese_mensuelle
+                WHERE user_id = %s AND annee = %s AND mois = %s AND id_contrat = %s
+            """, (user_id, annee, mois, id_contrat))
+            existing = cursor.fetchone()
+
+            if total is None:
+                if existing:
+                    cursor.execute("DELETE FROM synthese_mensuelle WHERE id = %s", (existing['id'],))
+                continue
+
+            heures = float(total)
+            if existing:
+                cursor.execute("""
+                    UPDATE synthese_mensuelle SET
+                        employeur = %s, heures_reelles = %s, salaire_reel = %s
+                    WHERE id = %s
+                """, (employeur, round(heures, 2), round(heures * taux, 2), existing['id']))
+            else:
+                cursor.execute("""
+                    INSERT INTO synthese_mensuelle
+                    (user_id, annee, mois, id_contrat, employeur,
+                    heures_reelles, heures_simulees, salaire_reel, salaire_simule)
+                    VALUES (%s, %s, %s, %s, %s, %s, 0, %s, 0)
+                """, (user_id, annee, mois, id_contrat, employeur, round(heures, 2), round(heures * taux, 2)))
+
+    def delete_by_user_and_year(self, user_id: int, annee: int):
+        with self.db.get_cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM synthese_mensuelle WHERE user_id = %s AND annee = %s", (user_id, annee))
+            VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+
+    def get_monthly_total(self, user_id: int, annee: int, mois: int) -> dict:
+        rows = self.get_by_user_and_filters(user_id, annee=annee, mois=mois)
+        total_heures = sum(float(r.get('heures_reelles', 0)) for r in rows)
+        total_salaire = sum(float(r.get('salaire_reel', 0)) for r in rows)
+        return {
+            'heures_reelles': round(total_heures, 2),
+            'salaire_reel': round(total_salaire, 2)
+        }
+
+    def get_by_user(self, user_id: int, limit: int = 6) -> List[Dict]:
+        """
+        Récupère les synthèses mensuelles pour un utilisateur donné.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM synthese_mensuelle
+                WHERE user_id = %s
+                ORDER BY annee DESC, mois DESC
+                LIMIT %s
+                """
+                cursor.execute(query, (user_id, limit))
+                syntheses = cursor.fetchall()
+                return syntheses
+        except Error as e:
+            logger.error(f"Erreur récupération synthèses: {e}")
+            return []
+
+    def calculate_h2f_stats_mensuel(self,heure_model, user_id: int, employeur: str, id_contrat: int,
+                                    annee: int, mois: int, seuil_h2f_minutes: int = 18 * 60) -> Dict:
+        """
+        Calcule les statistiques sur h2f pour un mois donné.
+        """
+        seuil_h2f_minutes = int(round(seuil_h2f_minutes))
+
+        jours_mois = heure_model.get_h1d_h2f_for_period(user_id, employeur, id_contrat, annee, mois=mois)
+        count = 0
+        for jour in jours_mois:
+            h2f_minutes = heure_model.time_to_minutes(jour.get('h2f'))
+            if h2f_minutes != -1 and h2f_minutes > seuil_h2f_minutes:
+                count += 1
+
+        moyenne_mensuelle = count / len(jours_mois) if jours_mois else 0.0
+        seuil_int = int(round(seuil_h2f_minutes))
+        return {
+            'nb_jours_apres_seuil': count,
+            'jours_travailles': len(jours_mois),
+            'moyenne_mensuelle': round(moyenne_mensuelle, 2),
+            'seuil_heure': f"{seuil_int // 60}:{seuil_int % 60:02d}"
+        }
+
+    def prepare_svg_data_horaire_mois(self, heure_model, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int, largeur_svg: int = 1000, hauteur_svg: int = 400) -> Dict:
+        """
+        Prépare les données pour un graphique SVG des horaires sur un mois.
+        Axe X: Jours du mois (1, 2, 3, ..., 31)
+        Axe Y: Heures (6h en haut, 22h en bas)
+        """
+
+        jours_mois = heure_model.get_h1d_h2f_for_period(user_id, employeur, id_contrat, annee, mois=mois)
+
+        # Constantes pour la conversion des heures en pixels
+        heure_debut_affichage = 6
+        heure_fin_affichage = 22
+        minute_debut_affichage = heure_debut_affichage * 60
+        minute_fin_affichage = heure_fin_affichage * 60
+        plage_minutes = (heure_fin_affichage - heure_debut_affichage) * 60
+
+        margin_x = largeur_svg * 0.1
+        margin_y = hauteur_svg * 0.1
+        plot_width = largeur_svg * 0.8
+        plot_height = hauteur_svg * 0.8
+
+        rectangles_svg = []
+        # On suppose que `jours_mois` est trié par date
+        for i, jour_data in enumerate(jours_mois):
+            date_value = jour_data['date']
+            if isinstance(date_value, str):
+                date_obj = datetime.fromisoformat(date_value).date()
+            elif isinstance(date_value, datetime):
+                date_obj = date_value.date()
+            elif isinstance(date_value, date):
+                date_obj = date_value
+            else:
+                logger.warning(f"Type de date inattendu : {type(date_value)}")
+                continue
+            jour_du_mois = date_obj.day
+
+            h1d_minutes = heure_model.time_to_minutes(jour_data.get('h1d'))
+            h2f_minutes = heure_model.time_to_minutes(jour_data.get('h2f'))
+
+            # Coordonnée X basée sur le jour du mois
+            # On suppose que le mois a au maximum 31 jours
+            x_jour_debut = margin_x + (jour_du_mois - 1) * (plot_width / 31)
+            x_jour_fin = margin_x + jour_du_mois * (plot_width / 31)
+            largeur_rect = (x_jour_fin - x_jour_debut) * 0.8
+            x_rect_debut = x_jour_debut + (x_jour_fin - x_jour_debut) * 0.1
+
+            # Coordonnées Y
+            if h1d_minutes != -1 and h1d_minutes >= minute_debut_affichage and h1d_minutes <= minute_fin_affichage:
+                y_h1d = margin_y + plot_height - ((h1d_minutes - minute_debut_affichage) / plage_minutes) * plot_height
+            else:
+                y_h1d = None
+
+            if h2f_minutes != -1 and h2f_minutes >= minute_debut_affichage and h2f_minutes <= minute_fin_affichage:
+                y_h2f = margin_y + plot_height - ((h2f_minutes - minute_debut_affichage) / plage_minutes) * plot_height
+            else:
+                y_h2f = None
+
+            if y_h1d is not None and y_h2f is not None:
+                y_top = min(y_h1d, y_h2f)
+                y_bottom = max(y_h1d, y_h2f)
+                hauteur_rect = y_bottom - y_top
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_top,
+                    'width': largeur_rect,
+                    'height': hauteur_rect,
+                    'jour': jour_data['date'],
+                    'type': 'h1d_to_h2f'
+                })
+            elif y_h1d is not None:
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_h1d - 2,
+                    'width': largeur_rect,
+                    'height': 4,
+                    'jour': jour_data['date'],
+                    'type': 'h1d_only'
+                })
+            elif y_h2f is not None:
+                rectangles_svg.append({
+                    'x': x_rect_debut,
+                    'y': y_h2f - 2,
+                    'width': largeur_rect,
+                    'height': 4,
+                    'jour': jour_data['date'],
+                    'type': 'h2f_only'
+                })
+
+        # Ticks Y
+        ticks_y = []
+        for h in range(heure_debut_affichage, heure_fin_affichage + 1):
+             y_tick = margin_y + plot_height - ((h * 60 - minute_debut_affichage) / plage_minutes) * plot_height
+             ticks_y.append({'heure': f"{h:02d}h", 'y': y_tick})
+
+        # Labels X (jours du mois)
+        labels_x = []
+        # On affiche un label tous les 5 jours pour moins encombrer l'axe
+        for j in range(1, 32):
+            if j % 5 == 0 or j == 1: # Label pour le 1er et tous les 5ème jour
+                x_label = margin_x + (j - 1) * (plot_width / 31)
+                labels_x.append({'jour': str(j), 'x': x_label})
+
+        return {
+            'rectangles': rectangles_svg,
+            'ticks_y': ticks_y,
+            'labels_x': labels_x,
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'mois': mois,
+            'annee': annee
+        }
+
+    def prepare_svg_data_h2f_annuel(self, synthese_hebdo_model, heure_model, user_id: int, employeur: str, id_contrat: int, annee: int, seuil_h2f_minutes: int = 18 * 60, largeur_svg: int = 900, hauteur_svg: int = 400) -> Dict:
+    # Récupérer les stats hebdomadaires
+
+        stats = synthese_hebdo_model.calculate_h2f_stats(heure_model, user_id, employeur, id_contrat, annee, seuil_h2f_minutes)
+
+        semaines = list(range(1, 53))  # ou 54 si besoin
+        depassements = [stats['moyennes_hebdo'].get(s, 0) for s in semaines]
+        moyennes_mobiles = [stats['moyennes_mobiles'].get(s, 0) for s in semaines]
+
+        # Calcul des dimensions SVG
+        margin_x = 60
+        margin_y = 40
+        plot_width = largeur_svg - margin_x - 50
+        plot_height = hauteur_svg - margin_y - 50
+
+        max_val = max(max(depassements), max(moyennes_mobiles)) if (depassements or moyennes_mobiles) else 1
+
+        # Barres
+        barres = []
+        for i, (semaine, val) in enumerate(zip(semaines, depassements)):
+            x = margin_x + i * (plot_width / 52)
+            largeur_barre = (plot_width / 52) * 0.7
+            hauteur_barre = (val / max_val) * plot_height if max_val > 0 else 0
+            y = hauteur_svg - margin_y - hauteur_barre
+            barres.append({
+                'x': x,
+                'y': y,
+                'width': largeur_barre,
+                'height': hauteur_barre,
+                'value': val
+            })
+
+        # Ligne moyenne mobile
+        points_ligne = []
+        for i, val in enumerate(moyennes_mobiles):
+            x = margin_x + (i + 0.5) * (plot_width / 52)
+            y = hauteur_svg - margin_y - (val / max_val) * plot_height if max_val > 0 else hauteur_svg - margin_y
+            points_ligne.append(f"{x},{y}")
+
+        return {
+            'barres': barres,
+            'ligne': points_ligne,
+            'semaines': [f"S{num}" for num in semaines],
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'max_val': max_val,
+            'annee': annee,
+            'seuil_heure': f"{seuil_h2f_minutes // 60}h{seuil_h2f_minutes % 60:02d}"
+        }
+
+
+    def calculate_h2f_stats_weekly_for_month(self, heure_model, user_id: int, employeur: str, id_contrat: int, annee: int, mois: int, seuil_h2f_minutes: int) -> Dict:
+        # Bornes du mois
+        if mois == 12:
+            fin_mois = date(annee + 1, 1, 1) - timedelta(days=1)
+        else:
+            fin_mois = date(annee, mois + 1, 1) - timedelta(days=1)
+        debut_mois = date(annee, mois, 1)
+
+        # Récupérer TOUS les jours du mois
+        tous_les_jours = heure_model.get_h1d_h2f_for_period(
+            user_id=user_id,
+            employeur=employeur,
+            id_contrat=id_contrat,
+            annee=annee,
+            mois=mois
+        )
+
+        # Regrouper par semaine ISO
+        par_semaine = {}
+        for j in tous_les_jours:
+            date_val = j['date']
+            # Gérer les différents types possibles de `date`
+            if isinstance(date_val, str):
+                d = datetime.fromisoformat(date_val).date()
+            elif isinstance(date_val, datetime):
+                d = date_val.date()
+            elif isinstance(date_val, date):
+                d = date_val
+            else:
+                continue  # type inconnu, on ignore
+
+            # Vérifier que la date est bien dans le mois (sécurité)
+            if d < debut_mois or d > fin_mois:
+                continue
+
+            semaine_iso = d.isocalendar()[1]
+            if semaine_iso not in par_semaine:
+                par_semaine[semaine_iso] = []
+            par_semaine[semaine_iso].append(j)
+
+        # Compter les dépassements
+        semaines_sorted = sorted(par_semaine.keys())
+        depassements = []
+        for semaine in semaines_sorted:
+            count = 0
+            for jour in par_semaine[semaine]:
+                h2f_min = heure_model.time_to_minutes(jour.get('h2f'))
+                if h2f_min != -1 and h2f_min > seuil_h2f_minutes:
+                    count += 1
+            depassements.append(count)
+
+        # Moyenne mobile cumulative
+        moyennes_mobiles = []
+        cumul = 0
+        for i, val in enumerate(depassements, 1):
+            cumul += val
+            moyennes_mobiles.append(round(cumul / i, 2))
+
+        return {
+            'semaines': semaines_sorted,
+            'jours_depassement': depassements,
+            'moyenne_mobile': moyennes_mobiles
+        }
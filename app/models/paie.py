@@ -0,0 +1,1866 @@
+"""
+Contrats, employés, barèmes, cotisations, indemnités et calcul des salaires.
+"""
+from pymysql import Error
+from decimal import Decimal
+import csv
+from typing import List, Dict, Optional, Tuple
+import logging
+
+from ..utils import svg_charts
+from ..utils.montants import Montant
+from .base import VersionDonnees
+from .heures import HeureTravail
+
+logger = logging.getLogger(__name__)
+
+
+def _incrementer_versions_type(cursor, nature: str, type_id: int) -> None:
+    """Un barème ou type de cotisation/indemnité modifié change les salaires de son utilisateur et des contrats qui l'utilisent"""
+    VersionDonnees.incrementer_selection_with_cursor(
+        cursor, 'utilisateur', f"SELECT user_id AS portee_id FROM types_{nature} WHERE id = %s", (type_id,))
+    VersionDonnees.incrementer_selection_with_cursor(
+        cursor, 'contrat', f"SELECT contrat_id AS portee_id FROM {nature}s_contrat WHERE type_{nature}_id = %s",
+        (type_id,))
+
+
+class BaremeCotisation:
+    def __init__(self, db):
+        self.db = db
+
+    def modifier_bareme(self, type_cotisation_id: int, tranches: List[Dict]) -> bool:
+        """
+        Remplace entièrement le barème associé à un type de cotisation.
+        `tranches` est une liste de dict avec :
+            - seuil_min (float)
+            - seuil_max (float ou None)
+            - montant_fixe (float, utilisé si type_valeur='fixe')
+            - taux (float, utilisé si type_valeur='taux')
+            - type_valeur ('taux' ou 'fixe')
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Supprimer les anciennes tranches
+                cursor.execute("DELETE FROM baremes_cotisation WHERE type_cotisation_id = %s", (type_cotisation_id,))
+
+                # Insérer les nouvelles
+                query = """
+                INSERT INTO baremes_cotisation 
+                (type_cotisation_id, seuil_min, seuil_max, montant_fixe, taux, type_valeur, ordre)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                for i, t in enumerate(tranches):
+                    seuil_min = float(t.get('seuil_min', 0))
+                    seuil_max = t.get('seuil_max')
+                    if seuil_max is not None:
+                        seuil_max = float(seuil_max)
+                    montant_fixe = float(t.get('montant_fixe', 0))
+                    taux = float(t.get('taux', 0))
+                    type_valeur = t.get('type_valeur', 'fixe')
+                    if type_valeur not in ('taux', 'fixe'):
+                        type_valeur = 'fixe'
+
+                    cursor.execute(query, (
+                        type_cotisation_id,
+                        seuil_min,
+                        seuil_max,
+                        montant_fixe,
+                        taux,
+                        type_valeur,
+                        i
+                    ))
+                _incrementer_versions_type(cursor, 'cotisation', type_cotisation_id)
+                return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la modification du barème pour type_cotisation {type_cotisation_id}: {e}")
+            return False
+
+    def get_bareme(self, type_cotisation_id: int) -> List[Dict]:
+        """Récupère toutes les tranches d’un barème, triées par seuil_min"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT seuil_min, seuil_max, montant_fixe, taux, type_valeur
+                    FROM baremes_cotisation
+                    WHERE type_cotisation_id = %s
+                    ORDER BY seuil_min
+                """, (type_cotisation_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération barème type {type_cotisation_id}: {e}")
+            return []
+
+    def has_bareme(self, type_cotisation_id: int) -> bool:
+        """Vérifie si un barème existe pour ce type"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT 1 FROM baremes_cotisation WHERE type_cotisation_id = %s LIMIT 1", (type_cotisation_id,))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erreur vérification barème: {e}")
+            return False
+
+
+        
+class BaremeIndemnite:
+    def __init__(self, db):
+        self.db = db
+
+    def modifier_bareme(self, type_indemnite_id: int, tranches: List[Dict]) -> bool:
+        """
+        Remplace entièrement le barème associé à un type d'indemnité.
+        `tranches` est une liste de dict avec :
+            - seuil_min (float)
+            - seuil_max (float ou None)
+            - montant_fixe (float, utilisé si type_valeur='fixe')
+            - taux (float, utilisé si type_valeur='taux')
+            - type_valeur ('taux' ou 'fixe')
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Supprimer les anciennes tranches
+                cursor.execute("DELETE FROM baremes_indemnite WHERE type_indemnite_id = %s", (type_indemnite_id,))
+
+                # Insérer les nouvelles
+                query = """
+                INSERT INTO baremes_indemnite
+                (type_indemnite_id, seuil_min, seuil_max, montant_fixe, taux, type_valeur, ordre)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                for i, t in enumerate(tranches):
+                    seuil_min = float(t.get('seuil_min', 0))
+                    seuil_max = t.get('seuil_max')
+                    if seuil_max is not None:
+                        seuil_max = float(seuil_max)
+                    montant_fixe = float(t.get('montant_fixe', 0))
+                    taux = float(t.get('taux', 0))
+                    type_valeur = t.get('type_valeur', 'fixe')
+                    if type_valeur not in ('taux', 'fixe'):
+                        type_valeur = 'fixe'
+
+                    cursor.execute(query, (
+                        type_indemnite_id,
+                        seuil_min,
+                        seuil_max,
+                        montant_fixe,
+                        taux,
+                        type_valeur,
+                        i
+                    ))
+                _incrementer_versions_type(cursor, 'indemnite', type_indemnite_id)
+                return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la modification du barème pour type_indemnite {type_indemnite_id}: {e}")
+            return False
+
+    def get_bareme(self, type_indemnite_id: int) -> List[Dict]:
+        """Récupère toutes les tranches d’un barème, triées par seuil_min"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                cursor.execute("""
+                    SELECT seuil_min, seuil_max, montant_fixe, taux, type_valeur
+                    FROM baremes_indemnite
+                    WHERE type_indemnite_id = %s
+                    ORDER BY seuil_min
+                """, (type_indemnite_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération barème type indemnité {type_indemnite_id}: {e}")
+            return []
+
+    def has_bareme(self, type_indemnite_id: int) -> bool:
+        """Vérifie si un barème existe pour ce type d'indemnité"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT 1 FROM baremes_indemnite WHERE type_indemnite_id = %s LIMIT 1", (type_indemnite_id,))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erreur vérification barème indemnité: {e}")
+            return False
+
+
+        
+class TypeCotisation:
+    def __init__(self, db):
+        self.db = db
+    def create(self, user_id: int, nom: str, description: str ="", est_obligatoire: bool = False)-> int:
+        """Crée un type de cotisation"""
+        try:
+            with self.db.get_cursor as cursor:
+                query = """
+                INSERT INTO types_cotisation (user_id, nom, description, est_obligatoire
+                VALUES (%s, %s, %s, %s)"""
+                cursor.execute(query, (user_id, nom, description, est_obligatoire))
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Erreur création type_cotisation {e}")
+    def get_all_by_user(self, user_id: int)-> List[Dict]:
+        """récupère toutes les cotisations de l'utilisateur"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT *
+                FROM types_cotisation
+                WHERE user_id = %s
+                ORDER BY nom"""
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall
+        except Exception as e:
+            logger.error(f"Erreur récupération types_cotisation : {e}")
+            return []
+    def update(self, type_id: int, user_id:int, data: Dict)-> bool:
+        set_clause = ", ".join([f"{k} = %s" for k in data.keys()])
+        params = list(data.values()) + [type_id, user_id]
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE types_cotisation SET {set_clause}
+                WHERE id = %s AND user_id=%s"""
+                cursor.execute(query, params)
+                _incrementer_versions_type(cursor, 'cotisation', type_id)
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger(f"Erreur mise à jour type cotisation : {e}")
+    def delete(self, type_id:int, user_id:int)-> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                _incrementer_versions_type(cursor, 'cotisation', type_id)
+                cursor.execute("DELETE FROM types_cotisation WHERE id = %s AND user_id = %s",
+                    (type_id, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur suppression type cotisation: {e}")
+            return False
+
+
+class TypeIndemnite:
+    def __init__(self, db):
+        self.db = db
+    def create(self, user_id: int, nom: str, description: str ="", est_obligatoire: bool = False)-> int:
+        """Crée un type d'indemnité"""
+        try:
+            with self.db.get_cursor as cursor:
+                query = """
+                INSERT INTO types_indemnite (user_id, nom, description, est_obligatoire
+                VALUES (%s, %s, %s, %s)"""
+                cursor.execute(query, (user_id, nom, description, est_obligatoire))
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Erreur création type_cotisation {e}")
+    def get_all_by_user(self, user_id: int)-> List[Dict]:
+        """récupère toutes les indemnités de l'utilisateur"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT *
+                FROM types_indemnite
+                WHERE user_id = %s
+                ORDER BY nom"""
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall
+        except Exception as e:
+            logger.error(f"Erreur récupération types_indemnite : {e}")
+            return []
+    def update(self, type_id: int, user_id:int, data: Dict)-> bool:
+        set_clause = ", ".join([f"{k} = %s" for k in data.keys()])
+        params = list(data.values()) + [type_id, user_id]
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                UPDATE types_indemnite SET {set_clause}
+                WHERE id = %s AND user_id=%s"""
+                cursor.execute(query, params)
+                _incrementer_versions_type(cursor, 'indemnite', type_id)
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger(f"Erreur mise à jour type indemnite : {e}")
+    def delete(self, type_id:int, user_id:int)-> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                _incrementer_versions_type(cursor, 'indemnite', type_id)
+                cursor.execute("DELETE FROM types_indemnite WHERE id = %s AND user_id = %s",
+                    (type_id, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur suppression type indemnite: {e}")
+            return False
+
+
+class CotisationContrat:
+    def __init__(self, db):
+        self.db = db
+
+    def calculer_montant_cotisation(self, bareme_cotisation_model, type_cotisation_id: int, base_montant, taux_fallback = 0.0):
+        """
+        Calcule le montant d'une cotisation.
+        Retourne un float.
+        """
+        return float(self.montant_cotisation(bareme_cotisation_model, type_cotisation_id,
+                                             Montant.depuis(base_montant), taux_fallback))
+
+    def montant_cotisation(self, bareme_cotisation_model, type_cotisation_id: int, base: Montant, taux_fallback = 0.0) -> Montant:
+        """Montant d'une cotisation en centimes, selon le barème du type ou à défaut le taux du contrat."""
+        if bareme_cotisation_model.has_bareme(type_cotisation_id):
+            for tranche in bareme_cotisation_model.get_bareme(type_cotisation_id):
+                max_s = tranche['seuil_max']
+                if base >= Montant.depuis(tranche['seuil_min']) and (max_s is None or base <= Montant.depuis(max_s)):
+                    if tranche['type_valeur'] == 'fixe':
+                        return Montant.depuis(tranche['montant_fixe'])
+                    return base.pourcentage(tranche['taux'])
+            return Montant()
+        # Ancien comportement : un taux >= 10 est un montant fixe
+        taux = Decimal(str(taux_fallback or 0))
+        if taux >= 10:
+            return Montant.depuis(taux)
+        return base.pourcentage(taux)
+    def assigner_a_contrat(self, contrat_id: int, type_cotisation_id: int, taux:float, annee: int, base_calcul : str = "brut")-> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO cotisations_contrat (contrat_id, type_cotisation_id, taux, base_calcul, annee)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE taux = VALUES(taux), base_calcul = VALUES(base_calcul), actif = TRUE
+                """
+                cursor.execute(query, (contrat_id, type_cotisation_id, taux, base_calcul, annee))
+                VersionDonnees.incrementer_contrat_with_cursor(cursor, contrat_id)
+                return True
+        except Exception as e:
+            logger.error(f"Erreur assignation cotisation : {e}")
+            return False
+    
+    def get_for_contrat(self, contrat_id: int)-> List[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT cc.*, tc.nom AS nom_cotisation
+                FROM cotisations_contrat cc
+                JOIN types_cotisation tc ON cc.type_cotisation_id = tc.id
+                WHERE cc.contrat_id = %s AND cc.actif = TRUE
+                """
+                cursor.execute(query,(contrat_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération cotisation contrat : {e}")
+            return []
+    
+
+    def get_for_contrat_and_annee(self, contrat_id: int, annee: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT cc.*, tc.nom AS nom_cotisation, tc.description
+                FROM cotisations_contrat cc
+                JOIN types_cotisation tc ON cc.type_cotisation_id = tc.id
+                WHERE cc.contrat_id = %s AND cc.annee = %s
+                """
+                cursor.execute(query,(contrat_id, annee))
+
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération cotisation contrat {contrat_id} pour annee {annee} : {e}")
+            return []
+    
+    def get_total_cotisations_par_mois(self, bareme_cotisation_model, user_id: int, annee: int, mois: int) -> List[Dict]:
+        """
+        Retourne le détail des cotisations par contrat pour un mois donné.
+        Inclut le montant calculé selon la base (brut ou brut_tot) et le taux.
+        """
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT
+                    cc.contrat_id,
+                    cc.type_cotisation_id,
+                    c.employeur,
+                    c.employe_id,
+                    c.salaire_horaire,
+                    tc.nom AS nom_cotisation,
+                    cc.taux,
+                    cc.base_calcul
+                FROM cotisations_contrat cc
+                JOIN contrats c ON cc.contrat_id = c.id
+                JOIN types_cotisation tc ON cc.type_cotisation_id = tc.id
+                WHERE c.user_id = %s AND cc.annee = %s
+                """
+                cursor.execute(query, (user_id, annee))
+                cotisations = cursor.fetchall()
+
+                # On précharge toutes les heures réelles du mois par contrat
+                heures_query = """
+                SELECT id_contrat, SUM(total_h) AS total_heures
+                FROM heures_travail
+                WHERE user_id = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                GROUP BY id_contrat
+                """
+                cursor.execute(heures_query, (user_id, annee, mois))
+                heures_rows = cursor.fetchall()
+                heures_par_contrat = {row['id_contrat']: float(row['total_heures']) for row in heures_rows}
+
+                # Calcul final
+                result = []
+                for item in cotisations:
+                    contrat_id = item['contrat_id']
+                    heures = heures_par_contrat.get(contrat_id, 0.0)
+                    brut = Montant.depuis(item['salaire_horaire']) * heures
+
+                    # Pour simplifier, on suppose "base_calcul = brut"
+                    # (une version avancée devrait inclure indemnités → nécessite appel à IndemniteContrat)
+                    montant = self.montant_cotisation(bareme_cotisation_model, item['type_cotisation_id'],
+                                                      brut, item['taux'])
+
+                    result.append({
+                        'contrat_id': contrat_id,
+                        'employeur': item['employeur'],
+                        'employe_id': item['employe_id'],
+                        'nom_cotisation': item['nom_cotisation'],
+                        'taux': item['taux'],
+                        'base_calcul': item['base_calcul'],
+                        'heures': heures,
+                        'brut': float(brut),
+                        'montant': float(montant)
+                    })
+                return result
+        except Exception as e:
+            logger.error(f"Erreur get_total_cotisations_par_mois: {e}")
+            return []
+
+    def prepare_svg_cotisations_mensuelles(self, user_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        """
+        Prépare les données SVG pour un graphique en barres des cotisations mensuelles totales.
+        """
+        # 1. Récupérer les cotisations mois par mois
+        montants_mensuels = []
+        for mois in range(1, 13):
+            total = sum(
+                c['montant']
+                for c in self.get_total_cotisations_par_mois(user_id, annee, mois)
+            )
+            montants_mensuels.append(round(total, 2))
+
+        # 2. Calcul des bornes
+        min_val = min(montants_mensuels) if montants_mensuels else 0.0
+        max_val = max(montants_mensuels) if montants_mensuels else 1.0
+        if min_val == max_val:
+            max_val = min_val + (10.0 if min_val == 0 else min_val * 0.1)
+
+        # 3. Géométrie (cadre, échelle, graduations automatiques) via le moteur commun
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        echelle_y = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        ticks = svg_charts.ticks_y(min_val, max_val, echelle_y)
+        colonnes_svg = svg_charts.colonnes(montants_mensuels, cadre, echelle_y, ratio_barre=0.7)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        # 6. Labels mois
+        mois_labels = [f"{m:02d}/{annee}" for m in range(1, 13)]
+
+        return {
+            'colonnes': colonnes_svg,
+            'mois_labels': mois_labels,
+            'valeurs': montants_mensuels,
+            'total_annuel': round(sum(montants_mensuels), 2),
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'min_val': min_val,
+            'max_val': max_val,
+            'annee': annee
+        }
+    def get_all_by_user(self, user_id: int) -> List[Dict]:
+        """Récupère toutes les cotisations pour les contrats d'un utilisateur"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT cc.*, c.employeur, c.employe_id, tc.nom AS type_cotisation_nom
+                FROM cotisations_contrat cc
+                JOIN contrats c ON cc.contrat_id = c.id
+                JOIN types_cotisation tc ON cc.type_cotisation_id = tc.id
+                WHERE c.user_id = %s
+                ORDER BY c.employeur, tc.nom
+                """
+                cursor.execute(query, (user_id,))
+                rows = cursor.fetchall()
+                return rows
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des cotisations pour user_id={user_id}: {e}", exc_info=True)
+            return []
+
+    # Dans la classe CotisationContrat
+    def prepare_svg_cotisations_mensuelles_employe(self, employe_model, user_id: int, employe_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        montants_mensuels = []
+        for mois in range(1, 13):
+            total = sum(
+                c['montant']
+                for c in self.get_total_cotisations_par_mois(user_id, annee, mois)
+                if c.get('employe_id') == employe_id
+            )
+            montants_mensuels.append(round(total, 2))
+
+        min_val = min(montants_mensuels) if montants_mensuels else 0.0
+        max_val = max(montants_mensuels) if montants_mensuels else 1.0
+        if min_val == max_val:
+            max_val = min_val + (10.0 if min_val == 0 else min_val * 0.1)
+
+        # Géométrie (cadre, échelle, graduations automatiques) via le moteur commun
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        echelle_y = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        ticks = svg_charts.ticks_y(min_val, max_val, echelle_y)
+        colonnes_svg = svg_charts.colonnes(montants_mensuels, cadre, echelle_y, ratio_barre=0.7)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        mois_labels = [f"{m:02d}/{annee}" for m in range(1, 13)]
+        
+        # Récupérer le nom de l'employé (optionnel, pour le titre)
+        employe = employe_model.get_by_id(employe_id, user_id)
+        employe_nom = f"{employe['prenom']} {employe['nom']}" if employe else "Employé inconnu"
+
+        return {
+            'colonnes': colonnes_svg,
+            'mois_labels': mois_labels,
+            'valeurs': montants_mensuels,
+            'total_annuel': round(sum(montants_mensuels), 2),
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'min_val': min_val,
+            'max_val': max_val,
+            'annee': annee,
+            'employe_id': employe_id,
+            'employe_nom': employe_nom,
+            'type': 'cotisations_employe'
+        }
+
+    def get_all_types(self):
+        with self.db.get_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT id, nom FROM types_cotisation ORDER BY nom")
+            return cursor.fetchall()
+
+
+    def user_has_types_cotisation(self, user_id: int) -> bool:
+        """Vérifie si l'utilisateur a défini des types de cotisations"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM types_cotisation WHERE user_id = %s LIMIT 1", 
+                    (user_id,)
+                )
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erreur vérification types cotisation user {user_id}: {e}")
+            return False
+
+
+class IndemniteContrat:
+    def __init__(self, db):
+        self.db = db
+
+    def calculer_montant_indemnite(self, bareme_indemnite_model, type_indemnite_id: int, base_montant, taux_fallback = 0.0):
+        """
+        Calcule le montant d'une indemnité.
+        base_montant et taux_fallback peuvent être float ou Decimal.
+        Retourne un float (pour compatibilité avec l'interface).
+        """
+        return float(self.montant_indemnite(bareme_indemnite_model, type_indemnite_id,
+                                            Montant.depuis(base_montant), taux_fallback))
+
+    def montant_indemnite(self, bareme_indemnite_model, type_indemnite_id: int, base: Montant, taux_fallback = 0.0) -> Montant:
+        """Montant d'une indemnité en centimes, selon le barème du type ou à défaut le taux du contrat."""
+        if bareme_indemnite_model.has_bareme(type_indemnite_id):
+            for tranche in bareme_indemnite_model.get_bareme(type_indemnite_id):
+                max_s = tranche['seuil_max']
+                if base >= Montant.depuis(tranche['seuil_min']) and (max_s is None or base <= Montant.depuis(max_s)):
+                    if tranche['type_valeur'] == 'fixe':
+                        return Montant.depuis(tranche['montant_fixe'])
+                    return base.pourcentage(tranche['taux'])
+            return Montant()
+        # Ancien comportement : toujours en % du brut
+        return base.pourcentage(taux_fallback)
+    
+    def assigner_a_contrat(self, contrat_id: int, type_indemnite_id: int, taux:float, annee: int, base_calcul : str = "brut")-> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO indemnites_contrat (contrat_id, type_indemnite_id, taux, base_calcul, annee)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE taux = VALUES(taux), base_calcul = VALUES(base_calcul), actif = TRUE
+                """
+                cursor.execute(query, (contrat_id, type_indemnite_id, taux, base_calcul, annee))
+                VersionDonnees.incrementer_contrat_with_cursor(cursor, contrat_id)
+                return True
+        except Exception as e:
+            logger.error(f"Erreur assignation cotisation : {e}")
+            return False
+    def get_for_contrat(self, contrat_id: int)-> List[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT ic.*, ti.nom AS nom_indemnite, ti.description
+                FROM indemnites_contrat ic
+                JOIN types_indemnite ti ON ic.type_indemnite_id = ti.id
+                WHERE ic.contrat_id = %s AND ic.actif = TRUE
+                """
+                cursor.execute(query,(contrat_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération indemnite contrat : {e}")
+            return []
+    def get_for_contrat_and_annee(self, contrat_id: int, annee: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT ic.*, ti.nom AS nom_indemnite, ti.description
+                FROM indemnites_contrat ic
+                JOIN types_indemnite ti ON ic.type_indemnite_id = ti.id
+                WHERE ic.contrat_id = %s AND ic.annee = %s
+                """
+                cursor.execute(query,(contrat_id, annee))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération indemnite contrat {contrat_id} pour annee {annee} : {e}")
+            return []
+
+    def get_total_indemnites_par_mois(self, bareme_indemnite_model, user_id: int, annee: int, mois: int) -> List[Dict]:
+        """
+        Retourne le détail des indemnités par contrat pour un mois donné.
+        Inclut le montant calculé selon la base (brut ou brut_tot).
+        Attention : cette version utilise uniquement le salaire BRUT comme base.
+        Pour une version complète avec brut_tot, il faudrait charger aussi les cotisations → à implémenter dans Salaire.
+        """
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                # Étape 1 : récupérer toutes les indemnités définies pour l'année
+                query_indem = """
+                SELECT
+                    ic.contrat_id,
+                    ic.type_indemnite_id,
+                    c.employeur,
+                    c.employe_id,
+                    c.salaire_horaire,
+                    ti.nom AS nom_indemnite,
+                    ic.taux,
+                    ic.base_calcul
+                FROM indemnites_contrat ic
+                JOIN contrats c ON ic.contrat_id = c.id
+                JOIN types_indemnite ti ON ic.type_indemnite_id = ti.id
+                WHERE c.user_id = %s AND ic.annee = %s
+                """
+                cursor.execute(query_indem, (user_id, annee))
+                indemnites = cursor.fetchall()
+
+                # Étape 2 : précharger les heures réelles par contrat pour le mois
+                heures_query = """
+                SELECT id_contrat, SUM(total_h) AS total_heures
+                FROM heures_travail
+                WHERE user_id = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                GROUP BY id_contrat
+                """
+                cursor.execute(heures_query, (user_id, annee, mois))
+                heures_rows = cursor.fetchall()
+                heures_par_contrat = {row['id_contrat']: float(row['total_heures']) for row in heures_rows}
+
+                # Étape 3 : calculer les montants
+                result = []
+                for item in indemnites:
+                    contrat_id = item['contrat_id']
+                    heures = Decimal(str(heures_par_contrat.get(contrat_id, 0)))
+                    brut = Montant.depuis(item['salaire_horaire']) * heures
+                    montant = self.montant_indemnite(
+                        bareme_indemnite_model=bareme_indemnite_model,
+                        type_indemnite_id=item['type_indemnite_id'],
+                        base=brut,
+                        taux_fallback=item['taux']
+                    )
+
+                    result.append({
+                        'contrat_id': contrat_id,
+                        'employeur': item['employeur'],
+                        'employe_id': item['employe_id'],
+                        'nom_indemnite': item['nom_indemnite'],
+                        'taux': item['taux'],
+                        'base_calcul': item['base_calcul'],
+                        'heures': heures,
+                        'brut': brut.en_decimal(),
+                        'montant': float(montant)
+                    })
+                return result
+        except Exception as e:
+            logger.error(f"Erreur get_total_indemnites_par_mois: {e}")
+            return []
+    
+    def prepare_svg_indemnites_mensuelles(self, user_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        """
+        Prépare les données SVG pour un graphique en barres des indemnités mensuelles totales.
+        """
+        # 1. Récupérer les indemnités mois par mois
+        montants_mensuels = []
+        for mois in range(1, 13):
+            total = sum(
+                i['montant']
+                for i in self.get_total_indemnites_par_mois(user_id, annee, mois)
+            )
+            montants_mensuels.append(round(total, 2))
+
+        # 2. Calcul des bornes
+        min_val = min(montants_mensuels) if montants_mensuels else 0.0
+        max_val = max(montants_mensuels) if montants_mensuels else 1.0
+        if min_val == max_val:
+            max_val = min_val + (10.0 if min_val == 0 else min_val * 0.1)
+
+        # 3. Géométrie (cadre, échelle, graduations automatiques) via le moteur commun
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        echelle_y = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        ticks = svg_charts.ticks_y(min_val, max_val, echelle_y)
+        colonnes_svg = svg_charts.colonnes(montants_mensuels, cadre, echelle_y, ratio_barre=0.7)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        # 6. Labels mois
+        mois_labels = [f"{m:02d}/{annee}" for m in range(1, 13)]
+
+        return {
+            'colonnes': colonnes_svg,
+            'mois_labels': mois_labels,
+            'valeurs': montants_mensuels,
+            'total_annuel': round(sum(montants_mensuels), 2),
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'min_val': min_val,
+            'max_val': max_val,
+            'annee': annee
+        }
+    def get_all_by_user(self, user_id: int) -> List[Dict]:
+        """Récupère toutes les cotisations pour les contrats d'un utilisateur"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT ic.*, c.employeur, c.employe_id, ti.nom AS type_indemnite_nom
+                FROM indemnites_contrat ic  # ← Table CORRIGÉE : indemnites_contrat, pas cotisations_contrat
+                JOIN contrats c ON ic.contrat_id = c.id
+                JOIN types_indemnite ti ON ic.type_indemnite_id = ti.id  # ← CORRECT
+                WHERE c.user_id = %s
+                ORDER BY c.employeur, ti.nom
+                """
+                cursor.execute(query, (user_id,))
+                rows = cursor.fetchall()
+                return rows
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des indemnites pour user_id={user_id}: {e}", exc_info=True)
+            return []
+    # Dans la classe CotisationContrat
+    def prepare_svg_indemnites_mensuelles_employe(self, employe_model, user_id: int, employe_id: int, annee: int, largeur_svg: int = 800, hauteur_svg: int = 400) -> Dict:
+        montants_mensuels = []
+        for mois in range(1, 13):
+            total = sum(
+                c['montant']
+                for c in self.get_total_indemnites_par_mois(user_id, annee, mois)
+                if c.get('employe_id') == employe_id
+            )
+            montants_mensuels.append(round(total, 2))
+
+        min_val = min(montants_mensuels) if montants_mensuels else 0.0
+        max_val = max(montants_mensuels) if montants_mensuels else 1.0
+        if min_val == max_val:
+            max_val = min_val + (10.0 if min_val == 0 else min_val * 0.1)
+
+        # Géométrie (cadre, échelle, graduations automatiques) via le moteur commun
+        cadre = svg_charts.Cadre.proportionnel(largeur_svg, hauteur_svg)
+        echelle_y = svg_charts.Echelle(min_val, max_val, cadre.bas, cadre.haut)
+        ticks = svg_charts.ticks_y(min_val, max_val, echelle_y)
+        colonnes_svg = svg_charts.colonnes(montants_mensuels, cadre, echelle_y, ratio_barre=0.7)
+        margin_x, margin_y = cadre.gauche, cadre.haut
+        plot_width, plot_height = cadre.largeur_graph, cadre.hauteur_graph
+
+        mois_labels = [f"{m:02d}/{annee}" for m in range(1, 13)]
+        
+        # Récupérer le nom de l'employé (optionnel, pour le titre)
+        employe = employe_model.get_by_id(employe_id, user_id)
+        employe_nom = f"{employe['prenom']} {employe['nom']}" if employe else "Employé inconnu"
+
+        return {
+            'colonnes': colonnes_svg,
+            'mois_labels': mois_labels,
+            'valeurs': montants_mensuels,
+            'total_annuel': round(sum(montants_mensuels), 2),
+            'largeur_svg': largeur_svg,
+            'hauteur_svg': hauteur_svg,
+            'margin_x': margin_x,
+            'margin_y': margin_y,
+            'plot_width': plot_width,
+            'plot_height': plot_height,
+            'ticks': ticks,
+            'min_val': min_val,
+            'max_val': max_val,
+            'annee': annee,
+            'employe_id': employe_id,
+            'employe_nom': employe_nom,
+            'type': 'cotisations_employe'
+        }
+    def get_all_types(self):
+        with self.db.get_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT id, nom FROM types_indemnite ORDER BY nom")
+            return cursor.fetchall()
+    def user_has_types_indemnite(self, user_id: int) -> bool:
+        """Vérifie si l'utilisateur a défini des types de cotisations"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM types_indemnite WHERE user_id = %s LIMIT 1", 
+                    (user_id,)
+                )
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erreur vérification types indemnité user {user_id}: {e}")
+            return False
+
+
+class Contrat:
+    def __init__(self, db):
+        self.db = db
+        
+    def user_has_types_cotisation_or_indemnite(self, user_id: int, cotisations_contrat_model, indemnites_contrat_model) -> bool:
+        cotisations = cotisations_contrat_model.get_all_by_user(user_id)
+        indemnites = indemnites_contrat_model.get_all_by_user(user_id)
+        return len(cotisations) > 0 or len(indemnites) > 0
+
+    def create_or_update(self, data: Dict) -> bool:
+        required_fields = {'user_id', 'employeur', 'heures_hebdo', 'date_debut'}
+        if not required_fields.issubset(data.keys()):
+            logger.error("Champs requis manquants pour créer/mettre à jour un contrat. Données reçues: {}")
+            return None
+        try:
+            with self.db.get_cursor() as cursor:
+                user_id = int(data['user_id'])
+                employe_id = int(data['employe_id']) if data.get('employe_id') is not None else None
+                employeur = str(data['employeur']).strip()
+                heures_hebdo = float(data['heures_hebdo'])
+                date_debut = data['date_debut']
+                date_fin = data.get('date_fin') or None  # NULL si non fourni
+                salaire_horaire = float(data.get('salaire_horaire', 24.05))
+                jour_estimation_salaire = int(data.get('jour_estimation_salaire', 15))
+                versement_10 = bool(data.get('versement_10', True))
+                versement_25 = bool(data.get('versement_25', True))
+                if 'id' in data and data['id']:
+                    # Mise à jour
+                    query = """
+                        UPDATE contrats SET
+                            user_id = %s,
+                            employe_id = %s,
+                            employeur = %s,
+                            heures_hebdo = %s,
+                            date_debut = %s,
+                            date_fin = %s,
+                            salaire_horaire = %s,
+                            jour_estimation_salaire = %s,
+                            versement_10 = %s,
+                            versement_25 = %s
+                        WHERE id = %s
+                    """
+                    params = (
+                        user_id, employe_id, employeur, heures_hebdo,
+                        date_debut, date_fin, salaire_horaire,
+                        jour_estimation_salaire, versement_10, versement_25,
+                        data['id']
+                        )
+                    cursor.execute(query, params)
+                    contrat_id = data['id']
+                else:
+                    query = """
+                    INSERT INTO contrats (
+                        user_id, employe_id, employeur, heures_hebdo,
+                        date_debut, date_fin, salaire_horaire,
+                        jour_estimation_salaire, versement_10, versement_25
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                    params = (
+                    user_id, employe_id, employeur, heures_hebdo,
+                    date_debut, date_fin, salaire_horaire,
+                    jour_estimation_salaire, versement_10, versement_25
+                    )
+                    cursor.execute(query, params)
+                    contrat_id = cursor.lastrowid
+                VersionDonnees.incrementer_contrat_with_cursor(cursor, contrat_id)
+            return contrat_id
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la création/mise à jour du contrat: {e}")
+            return False
+
+    def get_contrat_actuel(self, user_id: int) -> Optional[Dict]:
+        """Récupère le contrat en cours pour l'utilisateur (fin null ou future)"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                    SELECT * FROM contrats
+                    WHERE user_id = %s
+                    AND (date_fin IS NULL OR date_fin >= CURDATE())
+                    ORDER BY date_debut ASC
+                    LIMIT 1
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du contrat: {e}")
+            return None
+
+    def get_by_id(self, contrat_id: int) -> Optional[Dict]:
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                cursor.execute("SELECT * FROM contrats WHERE id = %s", (contrat_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur get_by_id contrat {contrat_id}: {e}")
+            return None
+    def get_all_contrats(self, user_id: int) -> List[Dict]:
+        """Liste tous les contrats de l'utilisateur, du plus récent au plus ancien."""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = "SELECT * FROM contrats WHERE user_id = %s ORDER BY date_debut ASC;"
+                logger.debug("SQL: %s | Params: %s", query, user_id)
+                cursor.execute(query, (user_id,))  # ← CORRIGÉ : virgule ajoutée
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des contrats: {e}")
+            return []
+
+    def delete(self, contrat_id: int) -> bool:
+        """Supprime un contrat par son id."""
+        try:
+            with self.db.get_cursor() as cursor:
+                VersionDonnees.incrementer_contrat_with_cursor(cursor, contrat_id)
+                query = "DELETE FROM contrats WHERE id = %s;"
+                cursor.execute(query, (contrat_id,))
+                return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression du contrat: {e}")
+            return False
+
+    def get_contrat_for_date(self, user_id: int, employeur: str, date_str: str) -> Optional[Dict]:
+        """Récupère le contrat actif pour une date spécifique"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT * FROM contrats
+                WHERE user_id = %s
+                AND employeur = %s
+                AND date_debut <= %s
+                AND (date_fin IS NULL OR date_fin >= %s)
+                ORDER BY date_debut DESC
+                LIMIT 1
+                """
+                cursor.execute(query, (user_id, employeur, date_str, date_str))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du contrat pour la date {date_str}: {e}")
+            return None
+
+    def get_contrats_actifs(self, user_id: int) -> List[Dict]:
+        """Récupère tous les contrats actifs pour un utilisateur"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT * FROM contrats
+                WHERE user_id = %s
+                AND (date_fin IS NULL OR date_fin >= CURDATE())
+                ORDER BY date_debut DESC
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des contrats actifs: {e}")
+            return []
+
+    def get_contrat_for_employe(self, user_id: int, id_employe: int) -> Optional[Dict]:
+        """Récupère le contrat associé à un employé spécifique"""
+        try:
+            with self.db.get_cursor(dictionary=True) as cursor:
+                query = """
+                SELECT c.* FROM contrats c
+                WHERE c.user_id = %s AND c.employe_id = %s 
+                LIMIT 1
+                """
+                cursor.execute(query, (user_id, id_employe))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du contrat pour l'employé {id_employe}: {e}")
+            return None
+    
+    def sauvegarder_cotisations_et_indemnites(self, cotisations_contrat_model, indemnites_contrat_model, contrat_id: int, user_id: int, data: Dict)-> bool:
+        annee = data.get('annee')
+        if not annee:
+            raise ValueError("L'annee est requise pour sauvegarder cotisations/indemnites")
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM cotisations_contrat WHERE contrat_id = %s AND annee = %s", (contrat_id, annee))
+            cursor.execute("DELETE FROM indemnites_contrat WHERE contrat_id = %s AND annee = %s", (contrat_id, annee))
+            VersionDonnees.incrementer_contrat_with_cursor(cursor, contrat_id)
+            for c in data.get('cotisations', []):
+                cotisations_contrat_model.assigner_a_contrat(
+                    contrat_id=contrat_id,
+                    type_cotisation_id=c['type_id'],
+                    taux=c['taux'],
+                    annee=annee,
+                    base_calcul=c.get('base', 'brut')
+                )
+            for i in data.get('indemnites', []):
+                indemnites_contrat_model.assigner_a_contrat(
+                    contrat_id=contrat_id,
+                    type_indemnite_id=i['type_id'],
+                    valeur=i['valeur'],
+                    annee=annee,
+                    unite=i.get('unite', 'taux')
+                )
+            return True
+
+
+class Employe:
+
+    def __init__(self, db):
+        self.db = db
+        self.heure_model = HeureTravail(self.db)
+      
+
+    def create(self, data: Dict) -> bool:
+        """
+        créé un employé
+        data doit contenir :
+        - user_id (int): ID de l'utilisateur propriétaire
+        - nom (str)
+        - prenom (str)
+        - email (str, optionnel)
+        - telephone
+        - rue
+        - code_postal
+        - commune
+        - genre
+        - date_de_naissance
+        """
+        required = {'user_id', 'nom', 'prenom', 'genre', 'date_de_naissance'}
+        if not required.issubset(data.keys()):
+            raise ValueError("Champs manquants : 'user_id', 'nom', 'prenom', 'genre', 'date_de_naissance', requis")
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                query = """
+                INSERT INTO employes
+                (user_id, nom, prenom, email, telephone, rue, code_postal, commune, genre, date_de_naissance, created_at)
+                VALUES (%s, %s, %s, %s,%s, %s, %s, %s, %s, %s, NOW())
+                """
+                values = (
+                    data['user_id'],
+                    data['nom'],
+                    data['prenom'],
+                    data.get('email'),
+                    data.get('telephone'),
+                    data.get('rue'),
+                    data.get('code_postal'),
+                    data.get('commune'),
+                    data['genre'],
+                    data['date_de_naissance']
+                )
+                cursor.execute(query, values)
+                VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', data['user_id'])
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de création fr l'employe: {e}")
+            return False
+
+
+    def get_all_by_user(self, user_id: int) -> List[Dict]:
+        """
+        Récupère les employés lié à un utilisateur
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM employes
+                WHERE user_id = %s
+                ORDER BY nom, prenom
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f'Erreur de récupération des employées pour user_id {user_id}: {e}')
+
+    def get_by_id(self, employe_id: int, user_id : int) -> Optional[Dict]:
+        """
+        récupère un employe avec vérification de sécurité"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM employes
+                WHERE id = %s AND user_id = %s
+                """
+                cursor.execute(query, (employe_id, user_id))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f'Erreur de récupération employe ID {employe_id} de user_id {user_id}: {e}')
+            return None
+
+    def update(self, employe_id : int, user_id : int, data: dict) -> bool:
+        """
+        Met à jour les données d'un employé (en vérifiant son appartenance à un user_id)
+        """
+        allowed = {'nom', 'prenom', 'email', 'telephone', 'rue', 'code_postal', 'commune', 'genre', 'date_de_naissance'}
+        update_fields = {k: v for k, v in data.items() if k in allowed}
+        if not update_fields:
+            return False
+
+        set_clause = ", ".join([f"{k} = %s" for k in update_fields])
+        params = list(update_fields.values()) + [employe_id, user_id]
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(f"""
+                        UPDATE employes
+                        SET {set_clause}
+                        WHERE id = %s AND user_id = %s
+                        """, params)
+                VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f'Erreur lors de la mise à jour employe {employe_id} pour {data}: {e}')
+            return False
+
+    def delete(self, employe_id: int, user_id: int) -> bool:
+        """
+        supprime un employe avec vérification
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                            DELETE FROM employes
+                            WHERE id = %s AND user_id = %s
+                            """, (employe_id, user_id))
+                VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f'Erreur dans la suppresion employe {employe_id} de user {user_id}; {e}')
+            return False
+
+    def get_heures_mois(self, annee: int, mois: int) -> float:
+        """
+        Récupère le total des heures travaillées pour un employé sur un mois donné
+        """
+        if not hasattr(self, 'id'):
+            raise ValueError("L'instance Employe n'a pas d'ID. Utilisez get_by_id() pour charger un employé.")
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT SUM(total_h) AS total_heures
+                FROM heures_travail
+                WHERE employe_id = %s AND YEAR(date) = %s AND MONTH(date) = %s
+                """
+                cursor.execute(query, (self.id, annee, mois))
+                result = cursor.fetchone()
+                return float(result['total_heures']) if result and result['total_heures'] else 0.0
+        except Exception as e:
+            logger.error(f'Erreur récupération heures mois {annee}-{mois} : {e}')
+            return 0.0
+    def get_salaire_mois(self, annee: int, mois: int) -> dict:
+        """
+        Récupère le salaire total pour un employé sur un mois donné
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT SUM(montant) AS total_salaire, SUM(retentions) AS total
+                FROM salaires
+                WHERE EXTRACT(YEAR FROM date_paiement) = %s AND EXTRACT(MONTH FROM date_paiement) = %s
+                """
+                cursor.execute(query, (annee, mois))
+                result = cursor.fetchone()
+                return {
+                    'total_salaire': float(result['total_salaire']) if result and result['total_salaire'] else 0.0,
+                    'total_retentions': float(result['total']) if result and result['total'] else 0.0
+                }
+        except Exception as e:
+            logger.error(f'Erreur récupération salaire mois {annee}-{mois} : {e}')
+            return {'total_salaire': 0.0, 'total_retentions': 0.0}
+
+    def recalculer_salaire_mois(self, annee: int, mois: int) -> bool:
+        """
+        Recalcule les salaires pour un employé sur un mois donné
+        """
+        try:
+            heures_travail = self.get_heures_mois(annee, mois)
+            salaire_info = self.get_salaire_mois(annee, mois)
+            # Logique de recalcul ici (exemple simple)
+            salaire_net = salaire_info['total_salaire'] - salaire_info['total_retentions']
+            # Mettre à jour la synthèse mensuelle
+            #   ...
+            # Pour l'instant, on retourne simplement True
+            #
+            #
+            return True
+        except Exception as e:
+            logger.error(f'Erreur recalcul salaire mois {annee}-{mois} : {e}')
+            return False
+    
+    def get_contrats_actifs(self) -> list:
+        """
+        Récupère les contrats actifs pour un employé
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT * FROM contrats
+                WHERE employe_id = %s AND actif = TRUE
+                """
+                cursor.execute(query, (self.id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f'Erreur récupération contrats actifs pour employe {self.id} : {e}')
+            return []
+    def get_employe_by_id_and_code(self, employe_id: int, code: str) -> Optional[Dict]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM employes
+                WHERE id = %s AND code_acces_salaire = %s
+            """, (employe_id, code))
+            return cursor.fetchone()
+    def verifier_code_acces(self, employe_id: int, code: str) -> Optional[Dict]:
+        """
+        Retourne les infos de l'employé si le couple (id, code) est valide.
+        """
+        if not employe_id or not code:
+            return None
+        with self.db.get_cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT id, user_id, prenom, nom, code_acces_salaire
+                FROM employes
+                WHERE id = %s AND code_acces_salaire = %s
+            """, (employe_id, code))
+            return cursor.fetchone()
+
+
+class Salaire:
+    def __init__(self, db):
+        self.db = db
+
+
+
+    def create(self, data: dict) -> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                if not cursor:
+                    return False
+
+                query = """
+                INSERT INTO salaires
+                (employe_id, mois, annee, heures_reelles, salaire_horaire,
+                salaire_calcule, salaire_net, salaire_verse, acompte_25, acompte_10,
+                acompte_25_estime, acompte_10_estime, difference, difference_pourcent, user_id, employeur, id_contrat)
+                VALUES (%s, %s, %s, %s, %s, %s, %s,%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+                """
+                values = (
+                    data.get('employe_id'),
+                    data['mois'], data['annee'], data['heures_reelles'],
+                    data.get('salaire_horaire', 27.12),
+                    data.get('salaire_calcule'),
+                    data.get('salaire_net'),
+                    data.get('salaire_verse'),
+                    data.get('acompte_25'),
+                    data.get('acompte_10'),
+                    data.get('acompte_25_estime'),
+                    data.get('acompte_10_estime'),
+                    data.get('difference'),
+                    data.get('difference_pourcent'),
+                    data['user_id'],
+                    data['employeur'],
+                    data.get('id_contrat')
+                )
+                cursor.execute(query, values)
+                VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', data['user_id'])
+                VersionDonnees.incrementer_with_cursor(cursor, 'contrat', data.get('id_contrat'))
+            return True
+        except Exception as e:
+            logger.error(f"Erreur création salaire: {e}")
+            return False
+
+    @staticmethod
+    def _incrementer_versions(cursor, salaire_id: int) -> None:
+        """Un salaire modifié change les pages salaires de son utilisateur et de son contrat"""
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'utilisateur', "SELECT user_id AS portee_id FROM salaires WHERE id = %s", (salaire_id,))
+        VersionDonnees.incrementer_selection_with_cursor(
+            cursor, 'contrat', "SELECT id_contrat AS portee_id FROM salaires WHERE id = %s", (salaire_id,))
+
+    def update(self, salaire_id: int, data: dict) -> bool:
+        allowed_fields = {
+            'mois', 'annee', 'heures_reelles', 'salaire_horaire',
+            'salaire_calcule', 'salaire_net', 'salaire_verse',
+            'acompte_25', 'acompte_10', 'acompte_25_estime',
+            'acompte_10_estime', 'difference', 'difference_pourcent'
+        }
+
+        # Filtrer les champs autorisés
+        update_data = {k: v for k, v in data.items() if k in allowed_fields}
+
+        if not update_data:
+            return False
+
+        set_clauses = ", ".join([f"{k} = %s" for k in update_data.keys()])
+        values = list(update_data.values()) + [salaire_id]
+
+        try:
+            with self.db.get_cursor() as cursor:
+                query = f"UPDATE salaires SET {set_clauses} WHERE id = %s"
+                cursor.execute(query, values)
+                self._incrementer_versions(cursor, salaire_id)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur mise à jour salaire: {e}")
+            return False
+
+    def delete(self, salaire_id: int) -> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                if not cursor:
+                    return False
+                self._incrementer_versions(cursor, salaire_id)
+                query = "DELETE FROM salaires WHERE id = %s"
+                cursor.execute(query, (salaire_id,))
+            return True
+        except Exception as e:
+            logger.error(f"Erreur suppression salaire: {e}")
+            return False
+
+    def get_by_id(self, salaire_id: int) -> Optional[Dict]:
+        with self.db.get_cursor() as cursor:
+            if not cursor:
+                return None
+            cursor.execute("SELECT * FROM salaires WHERE id = %s", (salaire_id,))
+            return cursor.fetchone()
+
+    def get_all(self, user_id: int) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            if not cursor:
+                return []
+            query = "SELECT * FROM salaires WHERE user_id = %s ORDER BY annee DESC, mois DESC"
+            cursor.execute(query, (user_id,))
+            return cursor.fetchall()
+
+    def get_by_mois_annee(self, user_id: int, annee: int, mois: int, employeur: str, id_contrat: int) -> List[Dict]:
+        """Récupère les salaires par mois et année avec gestion de connexion sécurisée."""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM salaires WHERE user_id = %s AND employeur = %s AND id_contrat = %s AND annee = %s AND mois = %s"
+                cursor.execute(query, (user_id, employeur, id_contrat, annee, mois))
+                result = cursor.fetchall()
+                logger.info("ligne 4785 salaire selectionné: %s", result)
+                return result
+        except Exception as e:
+            logger.error(f"Erreur récupération salaire par mois/année: {e}")
+            return []
+
+    def get_cotisations_indemnites_mois(self, cotisations_contrat_model, indemnites_contrat_model, user_id: int, annee: int, mois: int) -> Dict:
+        cotis = cotisations_contrat_model.get_total_cotisations_par_mois(user_id, annee, mois)
+        indem = indemnites_contrat_model.get_total_indemnites_par_mois(user_id, annee, mois)
+
+        # Agréger par employé ou global
+        total_cotisations = sum(item['total_cotisations'] for item in cotis)
+        total_indemnites = sum(item['total_indemnites'] for item in indem)
+
+        return {
+            'cotisations_par_contrat': cotis,
+            'indemnites_par_contrat': indem,
+            'total_cotisations': round(total_cotisations, 2),
+            'total_indemnites': round(total_indemnites, 2)
+        }
+    
+    def calculer_salaire(self, heures_reelles: float, salaire_horaire: float) -> float:
+        try:
+            return float(Montant.depuis(salaire_horaire) * round(heures_reelles, 2))
+        except Exception as e:
+            logger.error(f"Erreur calcul salaire: {e}")
+            return 0.0
+
+    def calculer_salaire_net(self, heures_reelles: float, contrat: Dict) -> float:
+        try:
+            if not contrat or heures_reelles <= 0:
+                return 0.0
+
+            brut = Montant.depuis(contrat.get('salaire_horaire', '24.05')) * heures_reelles
+
+            # Fonction helper pour obtenir les taux
+            def get_taux(key, default=0.0):
+                val = contrat.get(key, default)
+                return val if val else default
+
+            # Calcul des additions
+            additions = sum(brut.pourcentage(get_taux(cle)) for cle in (
+                'indemnite_vacances_tx', 'indemnite_jours_feries_tx', 'indemnite_jour_conges_tx'))
+            brut_tot = brut + additions
+
+            # Calcul des soustractions
+            soustractions = sum(brut_tot.pourcentage(get_taux(cle)) for cle in (
+                'cotisation_avs_tx', 'cotisation_ac_tx', 'cotisation_accident_n_prof_tx',
+                'assurance_indemnite_maladie_tx')) + Montant.depuis(get_taux('cap_tx'))
+
+            return float(brut_tot - soustractions)
+        except Exception as e:
+            logger.error(f"Erreur calcul salaire net: {e}")
+            return 0.0
+
+
+    def calculer_salaire_net_avec_details(self, heure_model, cotisations_contrat_model, indemnites_contrat_model,
+                                    bareme_indemnite_model, bareme_cotisation_model, heures_reelles: float, 
+                                    contrat: Dict, contrat_id: int, annee: int, user_id: Optional[int] = None, 
+                                    mois: Optional[int] = None, jour_estimation: int = 15) -> Dict:
+        """
+        Calcule le salaire net et retourne tous les détails du calcul pour affichage
+        avec des noms explicites pour chaque élément
+        """
+        try:
+            if not contrat or heures_reelles <= 0:
+                return {
+                    'salaire_net': 0.0,
+                    'erreur': 'Paramètres invalides',
+                    'details': {}
+                }
+
+            salaire_horaire = Montant.depuis(contrat.get('salaire_horaire', '24.05'))
+            heures_reelles_dec = Decimal(str(heures_reelles))
+            salaire_brut = salaire_horaire * heures_reelles_dec
+
+            # Récupérer cotisations et indemnités dynamiques
+            cotisations_contrat = cotisations_contrat_model.get_for_contrat_and_annee(contrat_id, annee)
+            indemnites_contrat = indemnites_contrat_model.get_for_contrat_and_annee(contrat_id, annee)
+            logger.debug("Contrat %s, année %s: %d cotisations, %d indemnités",
+                         contrat_id, annee, len(cotisations_contrat or []), len(indemnites_contrat or []))
+
+            # Calcul des indemnités (en centimes)
+            indemnites_detail = {}
+            total_indemnites = Montant()
+            for item in indemnites_contrat:
+                montant = indemnites_contrat_model.montant_indemnite(
+                    bareme_indemnite_model=bareme_indemnite_model,
+                    type_indemnite_id=item['type_indemnite_id'],
+                    base=salaire_brut,
+                    taux_fallback=item['taux']
+                )
+                total_indemnites += montant
+
+                nom_indemnite = item.get('nom_indemnite', f"indemnite_{item.get('type_indemnite_id', 'inconnue')}")
+                indemnites_detail[nom_indemnite] = {
+                    'nom': nom_indemnite,
+                    'taux': float(item['taux']),
+                    'montant': float(montant),
+                    'base': item.get('base_calcul', 'brut'),
+                    'actif': bool(item.get('actif', True))
+                }
+                logger.debug("Calcul des indemnités %s: taux=%s, montant=%s, actif=%s", nom_indemnite, item['taux'], montant, item.get('actif', True))
+
+            salaire_brut_tot = salaire_brut + total_indemnites
+
+            # Calcul des cotisations (en centimes)
+            cotisations_detail = {}
+            total_cotisations = Montant()
+            for item in cotisations_contrat:
+                base = item.get('base_calcul', 'brut')
+                base_montant = salaire_brut_tot if base == 'brut_tot' else salaire_brut
+
+                nom_cotisation = item.get('nom_cotisation', f"Cotisation {item.get('type_cotisation_id', 'inconnue')}")
+                montant = cotisations_contrat_model.montant_cotisation(
+                    bareme_cotisation_model,
+                    type_cotisation_id=item['type_cotisation_id'],
+                    base=base_montant,
+                    taux_fallback=item['taux']
+                )
+                logger.debug("Calcul cotisation %s: base=%s (%s), taux=%s, montant=%s", nom_cotisation, base, base_montant, item["taux"], montant)
+                total_cotisations += montant
+
+                cotisations_detail[nom_cotisation] = {
+                    'nom': nom_cotisation,
+                    'taux': float(item['taux']),
+                    'montant': float(montant),
+                    'base': base,
+                    'actif': bool(item.get('actif', True))
+                }
+
+            salaire_net = salaire_brut_tot - total_cotisations
+
+            # Acomptes
+            versements = {}
+            total_versements = Montant()
+            if user_id is not None and mois is not None:
+                for cle, nom, taux, calculer_acompte in (
+                    ('acompte_25', 'Acompte du 25', 25, self.calculer_acompte_25),
+                    ('acompte_10', 'Acompte du 10', 10, self.calculer_acompte_10),
+                ):
+                    if not contrat.get(f'versement_{taux}', False):
+                        continue
+                    acompte = Montant.depuis(calculer_acompte(
+                        heure_model=heure_model,
+                        user_id=user_id,
+                        annee=annee,
+                        mois=mois,
+                        salaire_horaire=float(salaire_horaire),
+                        employeur=contrat['employeur'],
+                        id_contrat=contrat_id,
+                        jour_estimation=contrat.get('jour_estimation_salaire', 15)
+                    ))
+                    versements[cle] = {
+                        'nom': nom,
+                        'actif': True,
+                        'montant': float(acompte),
+                        'taux': taux
+                    }
+                    total_versements += acompte
+
+            salaire_net_final = salaire_net - total_versements
+
+            # Conversion en float uniquement pour les templates
+            return {
+                'salaire_net': float(salaire_net_final),
+                'erreur': None,
+                'details': {
+                    'heures_reelles': float(heures_reelles_dec),
+                    'salaire_horaire': float(salaire_horaire),
+                    'salaire_brut': float(salaire_brut),
+                    'indemnites': indemnites_detail,
+                    'total_indemnites': float(total_indemnites),
+                    'cotisations': cotisations_detail,
+                    'total_cotisations': float(total_cotisations),
+                    'versements': versements,
+                    'total_versements': float(total_versements),
+                    'brut_tot': float(salaire_brut_tot),
+                    'calcul_final': {
+                        'brut': float(salaire_brut),
+                        'plus_indemnites': float(salaire_brut_tot),
+                        'moins_cotisations': float(salaire_net),
+                        'moins_versements': float(salaire_net_final)
+                    }
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Erreur dans calculer_salaire_net_avec_details: {str(e)}")
+            return {
+                'salaire_net': 0.0,
+                'erreur': str(e),
+                'details': {}
+            }
+    
+    def calculer_differences(self, salaire_calcule: float, salaire_verse: float) -> Tuple[float, float]:
+        if salaire_verse is None:
+            return 0.0, 0.0
+        difference = salaire_verse - salaire_calcule
+        difference_pourcent = (difference / salaire_calcule * 100) if salaire_calcule else 0.0
+        return round(difference, 2), round(difference_pourcent, 2)
+
+    def importer_depuis_csv(self, fichier_csv: str, user_id: int) -> bool:
+        """Importe les salaires depuis un fichier CSV avec gestion de connexion sécurisée."""
+        import csv
+
+        mois_nom_to_num = {
+            'Janvier': 1, 'Février': 2, 'Mars': 3, 'Avril': 4,
+            'Mai': 5, 'Juin': 6, 'Juillet': 7, 'Août': 8,
+            'Septembre': 9, 'Octobre': 10, 'Novembre': 11, 'Décembre': 12
+        }
+
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                with open(fichier_csv, mode='r', encoding='utf-8') as f:
+                    reader = csv.DictReader(f, delimiter=',')
+                    for row in reader:
+                        if not row.get('Mois'):
+                            continue
+                        mois_num = mois_nom_to_num.get(row['Mois'])
+                        if not mois_num:
+                            continue
+                        id_contrat = row.get('id_contrat')
+                        employeur = row.get('employeur', 'Inconnu')
+                        if id_contrat is None:
+                            try:
+                                id_contrat = int(id_contrat)
+                            except ValueError:
+                                id_contrat = None
+
+                        def clean_value(val):
+                            if val is None or val.strip() == '':
+                                return None
+                            return float(val.replace("'", "").replace(" CHF", "").strip())
+
+                        heures_reelles = clean_value(row.get('Heures'))
+                        salaire_calcule = clean_value(row.get('Salaire'))
+                        salaire_verse = clean_value(row.get('Salaire versé'))
+                        acompte_25 = clean_value(row.get('Acompte du 25'))
+                        acompte_10 = clean_value(row.get('Acompte du 10'))
+
+                        difference, difference_pourcent = self.calculer_differences(
+                            salaire_calcule or 0, salaire_verse
+                        )
+
+                        annee = int(row.get('Année', 2025))
+
+                        query = """
+                        INSERT INTO salaires
+                        (mois, annee, heures_reelles, salaire_calcule, salaire_verse,
+                        acompte_25, acompte_10, difference, difference_pourcent, user_id, employeur, id_contrat)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        """
+                        values = (
+                            mois_num, annee,
+                            heures_reelles, salaire_calcule, salaire_verse,
+                            acompte_25, acompte_10,
+                            difference, difference_pourcent,
+                            user_id, employeur, id_contrat
+                        )
+                        cursor.execute(query, values)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur import salaires: {e}")
+            return False
+
+    def get_by_user_and_month(self, user_id: int, employeur: str, id_contrat: int, mois: int = None, annee: int = None) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            if not cursor:
+                return []
+            query = "SELECT * FROM salaires WHERE user_id = %s AND employeur = %s AND id_contrat = %s"
+            params = [user_id, employeur, id_contrat]
+            if mois is not None:
+                query += " AND mois = %s"
+                params.append(mois)
+            if annee is not None:
+                query += " AND annee = %s"
+                params.append(annee)
+            query += " ORDER BY annee DESC, mois DESC"
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+
+    def calculer_acompte_25(self, heure_model, user_id: int, annee: int, mois: int, salaire_horaire: float, employeur: str, id_contrat: int, jour_estimation: int = 15) -> float:
+        heures = heure_model.get_heures_periode(
+            user_id, employeur, id_contrat, annee, mois, 1, jour_estimation
+        )
+        # Protection contre les valeurs négatives ou None
+        heures = max(0.0, heures or 0.0)
+        return round(max(0.0, heures or 0.0) * salaire_horaire, 2)
+
+    def calculer_acompte_10(self, heure_model, user_id: int, annee: int, mois: int, salaire_horaire: float, employeur: str, id_contrat: int, jour_estimation: int = 15) -> float:
+        if not heure_model:
+            raise ValueError("HeureTravail manager non initialisé")
+
+        heures_total = heure_model.get_total_heures_mois(user_id, employeur, id_contrat, annee, mois)
+        heures_avant = heure_model.get_heures_periode(
+            user_id, employeur, id_contrat, annee, mois, 1, jour_estimation
+        ) or 0.0
+
+        # Normaliser les valeurs
+        heures_total = float(heures_total)
+        heures_avant = float(heures_avant)
+
+        # Heures après le jour d'estimation
+        heures_apres = max(0.0, heures_total - heures_avant)
+
+        # Log en cas d’incohérence (utile pour le debug)
+        if heures_apres < 0:
+            logger.warning(
+                f"Incohérence heures acompte 10: total={heures_total}, avant={heures_avant} "
+                f"(user={user_id}, mois={mois}/{annee}, employeur={employeur})"
+            )
+            heures_apres = 0.0
+        result = round(heures_apres * salaire_horaire, 2)
+        logger.info("calculer_acompte_10 → heures_apres=%s, result=%s", heures_apres, result)
+        logger.error(f"calculer_acompte_10 → heures_apres={heures_apres}, result={result}")
+        return result
+    def recalculer_salaire(self, heure_model, cotisations_contrat_model, indemnites_contrat_model, bareme_indemnite_model, bareme_cotisation_model, salaire_id: int, contrat: Dict) -> bool:
+        try:
+            salaire = self.get_by_id(salaire_id)
+            if not salaire:
+                logger.warning(f"Salaire ID {salaire_id} introuvable.")
+                return False
+
+            heures_reelles = salaire.get('heures_reelles') or 0.0
+            salaire_horaire_raw = contrat.get('salaire_horaire')
+            if salaire_horaire_raw is None:
+                logger.warning(f"Salaire horaire manquant pour contrat {contrat.get('id')}")
+                salaire_horaire = 27.12
+            else:
+                salaire_horaire = float(salaire_horaire_raw)
+            user_id = salaire['user_id']
+            employeur = salaire['employeur']
+            id_contrat = salaire['id_contrat']
+            annee = salaire['annee']
+            mois = salaire['mois']
+            jour_estimation = contrat.get('jour_estimation_salaire', 15)
+
+            # 1. Calcul du salaire net réel (mois entier)
+            result = self.calculer_salaire_net_avec_details(
+                heure_model=heure_model,
+                cotisations_contrat_model=cotisations_contrat_model,
+                indemnites_contrat_model= indemnites_contrat_model,
+                bareme_indemnite_model=bareme_indemnite_model,
+                bareme_cotisation_model=bareme_cotisation_model,
+                heures_reelles=heures_reelles,
+                contrat=contrat,
+                contrat_id=id_contrat,
+                annee=annee,
+                user_id=user_id,
+                mois=mois,
+                jour_estimation=jour_estimation
+            )
+
+            if result['erreur']:
+                logger.error(f"Erreur recalcul salaire : {result['erreur']}")
+                return False
+
+            salaire_net = result['salaire_net']
+
+            # 2. Acompte du 25 → heures du 1 au 15
+            acompte_25_estime = 0.0
+            if contrat.get('versement_25', False):
+                acompte_25_estime = self.calculer_acompte_25(
+                    heure_model=heure_model,
+                    user_id=user_id,
+                    annee=annee,
+                    mois=mois,
+                    salaire_horaire=salaire_horaire,
+                    employeur=employeur,
+                    id_contrat=id_contrat,
+                    jour_estimation=jour_estimation
+                )
+
+            # 3. Acompte du 10 → différence SALAIRE NET - ACOMPTE 25
+            acompte_10_estime = round(salaire_net - acompte_25_estime, 2)
+
+            # 4. Différence avec salaire versé (si saisi)
+            salaire_verse = salaire.get('salaire_verse')
+            difference, difference_pourcent = self.calculer_differences(salaire_net, salaire_verse)
+
+            # 5. Mise à jour
+            update_data = {
+                'salaire_horaire': salaire_horaire,
+                'salaire_calcule': result['details']['salaire_brut'],
+                'salaire_net': salaire_net,
+                'acompte_25_estime': round(acompte_25_estime, 2),
+                'acompte_10_estime': acompte_10_estime,
+                'difference': round(difference, 2),
+                'difference_pourcent': round(difference_pourcent, 2),
+            }
+
+            return self.update(salaire_id, update_data)
+
+        except Exception as e:
+            logger.error(f"Erreur recalcul salaire ID {salaire_id}: {e}", exc_info=True)
+            return False
+    
+    #def recalculer_salaire(self, salaire_id: int, contrat: Dict) -> bool:
+    #    """
+    #    Recalcule les champs dérivés d’un salaire existant à partir du contrat et des heures réelles.
+    #    Met à jour l’entrée en base.
+    #    """
+    #    try:
+    #        # 1. Récupérer le salaire existant
+    #        salaire = self.get_by_id(salaire_id)
+    #        if not salaire:
+    #            logger.warning(f"Salaire ID {salaire_id} introuvable pour recalcul.")
+    #            return False
+
+    #        # 2. Extraire les données nécessaires
+    #        heures_reelles = salaire.get('heures_reelles') or 0.0
+    #        salaire_horaire = float(contrat.get('salaire_horaire', 27.12))
+    #        user_id = salaire['user_id']
+    #        employeur = salaire['employeur']
+    #        id_contrat = salaire['id_contrat']
+     #       annee = salaire['annee']
+    #        mois = salaire['mois']
+    #        jour_estimation = contrat.get('jour_estimation_salaire', 15)
+
+    #        # 3. Recalculer les valeurs
+    #        salaire_calcule = self.calculer_salaire(heures_reelles, salaire_horaire)
+    #        salaire_net = self.calculer_salaire_net(heures_reelles, contrat)
+
+    #        # Acomptes estimés
+    #        acompte_25_estime = 0.0
+    #        acompte_10_estime = 0.0
+
+    #        if contrat.get('versement_25', False):
+    #            acompte_25_estime = self.calculer_acompte_25(
+     #               user_id=user_id,
+    #                annee=annee,
+    #                mois=mois,
+    #                salaire_horaire=salaire_horaire,
+    #                employeur=employeur,
+    #                id_contrat=id_contrat,  # ⬅️ Correctement passé ici
+    #                jour_estimation=jour_estimation
+    #            )
+    #        if contrat.get('versement_10', False):
+    #            acompte_10_estime = self.calculer_acompte_10(
+    #                user_id=user_id,
+    #                annee=annee,
+     #               mois=mois,
+    #                salaire_horaire=salaire_horaire,
+    #                employeur=employeur,
+    #                id_contrat=id_contrat,  # ⬅️ Correctement passé ici
+    #                jour_estimation=jour_estimation
+    #            )
+
+            # Différence avec le salaire versé (si présent)
+    #        salaire_verse = salaire.get('salaire_verse')
+    #        difference, difference_pourcent = self.calculer_differences(salaire_calcule, salaire_verse)
+
+            # 4. Préparer les données à mettre à jour
+    #        update_data = {
+    #            'salaire_horaire': salaire_horaire,
+    #            'salaire_calcule': salaire_calcule,
+    #            'salaire_net': salaire_net,
+    #            'acompte_25_estime': round(acompte_25_estime, 2),
+    #            'acompte_10_estime': round(acompte_10_estime, 2),
+    #            'difference': round(difference, 2),
+    #            'difference_pourcent': round(difference_pourcent, 2),
+    #        }
+
+    #        # 5. Mettre à jour en base
+    #        logger.info(f'update_data : {update_data}')
+    #        return self.update(salaire_id, update_data)
+
+    #    except Exception as e:
+    #        logger.error(f"Erreur lors du recalcul du salaire ID {salaire_id}: {e}", exc_info=True)
+    #        return False
+
+    def get_salaire_employe_mois(self, employe_id: int, annee: int, mois: int) -> float:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(salaire_net), 0) 
+                    FROM salaires
+                    WHERE employe_id = %s AND annee = %s AND mois = %s
+                """, (employe_id, annee, mois))
+                
+                result = cursor.fetchone()
+                # Vérification robuste
+                if result is None or 'total_salaire' not in result:
+                    return 0.0
+            
+                total = result['total_salaire']
+                return float(total) if total is not None else 0.0
+        except Exception as e:
+            logger.error(f"Erreur get_salaire_employe_mois: {e}")
+            return 0.0
+    def get_by_user_and_month_with_employe(self,user_id: int,annee: int,mois: int,employe_id: Optional[int] = None) -> List[Dict]:
+        clause = "AND employe_id = %s" if employe_id is not None else "AND employe_id IS NULL"
+        params = [user_id, annee, mois]
+        if employe_id is not None:
+            params.append(employe_id)
+
+        query = f"""
+            SELECT * FROM salaires
+            WHERE user_id = %s AND annee = %s AND mois = %s {clause}
+            ORDER BY annee DESC, mois DESC
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
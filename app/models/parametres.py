@@ -0,0 +1,143 @@
+"""
+Paramètres utilisateur et entreprise.
+"""
+from pymysql import Error
+from typing import Dict, Optional
+import logging
+
+from .base import DatabaseManager, VersionDonnees
+
+logger = logging.getLogger(__name__)
+
+
+class ParametreUtilisateur:
+    """Modèle pour gérer les paramètres utilisateur"""
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+
+    def get(self, user_id: int) -> Dict:
+        """Récupère tous les paramètres d'un utilisateur de manière sécurisée"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = "SELECT * FROM parametres_utilisateur WHERE utilisateur_id = %s"
+                cursor.execute(query, (user_id,))
+                params = cursor.fetchone()
+                return params or {}
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des paramètres: {e}")
+            return {}
+
+    def update(self, user_id: int, data: Dict) -> bool:
+        """Met à jour les paramètres utilisateur de manière sécurisée"""
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                # Vérifie si l'utilisateur a déjà des paramètres
+                cursor.execute("SELECT 1 FROM parametres_utilisateur WHERE utilisateur_id = %s", (user_id,))
+                exists = cursor.fetchone()
+
+                if exists:
+                    # Mise à jour
+                    query = """
+                    UPDATE parametres_utilisateur
+                    SET devise_principale = %s, theme = %s, notifications_email = %s,
+                        alertes_solde = %s, seuil_alerte_solde = %s
+                    WHERE utilisateur_id = %s
+                    """
+                    values = (
+                        data.get('devise_principale', 'CHF'),
+                        data.get('theme', 'clair'),
+                        data.get('notifications_email', True),
+                        data.get('alertes_solde', True),
+                        data.get('seuil_alerte_solde', 500),
+                        user_id
+                    )
+                else:
+                    # Insertion
+                    query = """
+                    INSERT INTO parametres_utilisateur
+                    (utilisateur_id, devise_principale, theme, notifications_email,
+                    alertes_solde, seuil_alerte_solde)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """
+                    values = (
+                        user_id,
+                        data.get('devise_principale', 'CHF'),
+                        data.get('theme', 'clair'),
+                        data.get('notifications_email', True),
+                        data.get('alertes_solde', True),
+                        data.get('seuil_alerte_solde', 500)
+                    )
+
+                cursor.execute(query, values)
+                # Devise et thème s'affichent sur toutes les pages
+                for portee in VersionDonnees.PORTEES_UTILISATEUR:
+                    VersionDonnees.incrementer_with_cursor(cursor, portee, user_id)
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la mise à jour des paramètres: {e}")
+            return False
+
+
+class Entreprise:
+    def __init__(self, db):
+        self.db = db
+
+    def get_or_create_for_user(self, user_id: int) -> Dict:
+        """
+        Récupère ou crée une entrée par défaut pour l'utilisateur.
+        """
+        with self.db.get_cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT * FROM entreprise WHERE user_id = %s
+            """, (user_id,))
+            row = cursor.fetchone()
+            if row:
+                return row
+            # Création par défaut
+            cursor.execute("""
+                INSERT INTO entreprise (user_id, nom, rue, code_postal, commune, email, telephone)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (user_id, f"Entreprise de utilisateur {user_id}", "", "", "", "", ""))
+            cursor.execute("""
+                SELECT * FROM entreprise WHERE user_id = %s
+            """, (user_id,))
+            return cursor.fetchone()
+
+    def update(self, user_id: int, data: Dict) -> bool:
+        """
+        Met à jour les infos de l'entreprise.
+        Champs autorisés : nom, rue, code_postal, commune, email, telephone, logo_path
+        """
+        allowed = {'nom', 'rue', 'code_postal', 'commune', 'email', 'telephone', 'logo_path'}
+        update_data = {k: v for k, v in data.items() if k in allowed}
+        if not update_data:
+            return False
+
+        set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()])
+        values = list(update_data.values()) + [user_id]
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE entreprise SET {set_clause} WHERE user_id = %s
+            """, values)
+            VersionDonnees.incrementer_with_cursor(cursor, 'utilisateur', user_id)
+            return cursor.rowcount > 0
+
+    def get_logo_path(self, user_id: int) -> Optional[str]:
+        """
+        Renvoie le chemin du logo (relatif à static/) ou None.
+        """
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT logo_path FROM entreprise WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def entreprise_exists_for_user(self, user_id: int) -> bool:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT 1 FROM entreprise WHERE user_id = %s", (user_id,))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Pas d'entreprise pour l'utilisateur {user_id} : {e}")
+            return False
@@ -0,0 +1,553 @@
+"""
+Équipes, compétences et planning.
+"""
+from pymysql import Error
+from datetime import date, timedelta
+import json
+from typing import List, Dict, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Equipe:
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, user_id, nom: str, description:str) -> int:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                INSERT INTO equipes (user_id, nom, description, created_at)
+                VALUES (%s, %s, %s, NOW())
+                """
+                cursor.execute(query, (user_id, nom, description))
+            return cursor.lastrowid
+        except Error as e:
+            logger.error(f'"erreur création équipe : {e}')
+            return None
+
+    def modifier(self, user_id:int, id_equipe: int, nom: str, description: str)-> int:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                query = """
+                UPDATE equipes 
+                SET nom = %s, description = %s 
+                WHERE id = %s AND user_id = %s
+                """
+                params = (nom, description, id_equipe, user_id)
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error(f"Erreur mise à jour équipe {id_equipe} : {e}")
+            return False
+    
+    def get_equipe_id(self, user_id: int, id_equipe: int)-> Dict:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT * FROM equipes WHERE user_id = %s AND id = %s", (user_id, id_equipe))
+                equipe = cursor.fetchone()
+                return equipe
+        except Exception as e:
+            logger.error(f"Erreur dans récupération equipe {id_equipe} : {e}")
+            return False
+
+    def supprimer(self, user_id: int, id_equipe: int) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("DELETE FROM Equipes_competences_requises WHERE equipe_id = %s", (id_equipe,))
+                cursor.execute("DELETE FROM equipes_employes WHERE equipe_id = %s", (id_equipe,))
+                cursor.execute("DELETE FROM equipes WHERE id = %s AND user_id = %s", (id_equipe, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur suppression equipe {id_equipe}: {e}")
+            return False
+
+    def ajouter_employe_to_equipe(self, employe_model, id_equipe: int, employe_id: int, user_id: int) -> bool:
+        employe = employe_model.get_by_id(employe_id, user_id)
+        if not employe:
+            return False
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                INSERT IGNORE INTO equipes_employes (id_equipe, employe_id, added_at)
+                VALUES (%s, %s, NOW())
+                """, (id_equipe, employe_id)
+                )
+                return True
+        except Exception as e:
+            logger.error(f"Erreur ajout employe {employe_id} à equipe {id_equipe}: {e}")
+            return False
+    def retirer_employe_to_equipe(self, id_equipe: int, employe_id: int) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                DELETE FROM equipes_employes
+                WHERE id_equipe = %s AND employe_id = %s
+                """, (id_equipe, employe_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur retrait employe {employe_id} de l'equipe {id_equipe} : {e}")
+            return False
+
+    def get_employes_from_equipe(self, user_id: int, id_equipe: int)-> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT e.*
+                FROM employes e
+                JOIN equipes_employes ee ON e.id = ee.employe_id
+                WHERE e.user_id = %s AND ee.id_equipe = %s
+                ORDER BY e.nom, e.prenom
+                """
+                cursor.execute(query, (user_id, id_equipe))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur Récupération employé equipe {id_equipe}: {e}")
+            return []
+    def get_equipes_from_user(self, user_id:int)->List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT * FROM equipes WHERE user_id = %s ORDER BY nom", (user_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération équipes user {user_id}: {e}")
+            return []
+
+    def get_equipes_avec_employe(self, user_id: int)-> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query= """
+                SELECT t.*,
+                          e.id as employe_id, e.nom as employe_nom, e.prenom as employe_prenom
+                          FROM equipes t
+                          LEFT JOIN equipes_employes te ON t.id = te.equipe_id
+                          LEFT JOIN employes e ON te.employe_id = e.id
+                            WHERE t.user_id = %s
+                            ORDER BY t.nom, e.nom, e.prenom
+                """
+                cursor.execute(query, (user_id,))
+                rows = cursor.fetchall()
+                equipes = {}
+                for row in rows:
+                    equipe_id = row['id']
+                    if equipe_id not in equipes:
+                        equipes[equipe_id] = {
+                            'id': equipe_id,
+                            'nom': row['nom'],
+                            'membres': []
+                        }
+                    if row['employe_id']:
+                        equipes[equipe_id]['membres'].append({
+                            'id': row['employe_id'],
+                            'nom': row['employe_nom'],
+                            'prenom': row['employe_prenom']
+                        })
+                return list(equipes.values())
+        except Exception as e:
+            logger.error(f"Erreur récupération des équipes avec employes de user {user_id}: {e}")
+            return []
+
+    def get_all_by_user(self, user_id: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT * FROM equipes WHERE user_id = %s ORDER BY nom", (user_id,))
+                return cursor.fetchall()
+        except Exception as e:  
+            logger.error(f"Erreur récupération équipes user {user_id}: {e}")
+            return []
+
+
+class Competence:
+    def __init__(self, db):
+        self.db = db
+    def create(self, user_id: int, nom: str) -> int:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                INSERT INTP competences (user_id, nom, created_at)
+                VALUES (%s, %s, NOW())
+                """, (user_id, nom))
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Erreur créatio competence : {e}")
+            return None
+    def modifier(self, user_id:int, nom: str, id_competence: int)-> int:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.excecute("""
+                UPDATE competences
+                SET nom = %s
+                WHERE id= %s AND user_id = %s
+                """, (nom, id_competence, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur mise à jour compétence : {e}")
+            return False
+    def supprimer(self, user_id: int, id_competence: int)-> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("DELETE FROM employes_competences WHERE id_competence = %s", (id_competence,))
+                cursor.execute("DELETE FROM equipes_competences_requises WHERE id_competence = %s", (id_competence,))
+                cursor.execute("DELETE FROM competences WHERE id = %s AND user_id = %s", (id_competence, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur suppression compétence {id_competence} : {e}")
+            return False
+    def assigner_employe_competence(self, employe_model, id_competence: int, employe_id: int, user_id:int) -> bool:
+        if not employe_model.get_by_id(employe_id, user_id):
+            return False
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                    INSERT IGNORE INTO employes_competences (id_competence, employe_id, assigned_at)
+                    VALUES (%s, %s, NOW())
+                """, (id_competence, employe_id))
+                return True
+        except Exception as e:
+            logger.error(f"Erreur assignation compétence {id_competence} à employé {employe_id} : {e}")
+            return False
+    def retirer_de_employe(self, id_competence: int, employe_id: int) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                    DELETE FROM employes_competences
+                    WHERE competence_id = %s AND employe_id = %s
+                """, (id_competence, employe_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur retrait compétence {id_competence} de employé {employe_id} : {e}")
+            return False
+
+    def get_competences_employe(self, employe_id: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.id, c.nom
+                    FROM competences c
+                    JOIN employes_competences ec ON c.id = ec.competence_id
+                    WHERE ec.employe_id = %s
+                """, (employe_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération compétences employé {employe_id} : {e}")
+            return []
+    def get_employes_avec_competence(self, user_id: int, id_competence: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT e.*
+                    FROM employes e
+                    JOIN employes_competences ec ON e.id = ec.employe_id
+                    WHERE ec.competence_id = %s AND e.user_id = %s
+                """, (id_competence, user_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération employés compétence {id_competence} : {e}")
+            return []
+    def definir_competence_requise_equipe(self, equipe_model, user_id: int, equipe_id: int, id_competence: int, quantite_min: int = 1) -> bool:
+        # Vérifier que l’équipe appartient à l’utilisateur
+        equipes = equipe_model.get_all_by_user(user_id)
+        if not any(eq['id'] == equipe_id for eq in equipes):
+            return False
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                    INSERT INTO equipes_competences_requises (equipe_id, id_competence, quantite_min)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE quantite_min = VALUES(quantite_min)
+                """, (equipe_id, id_competence, quantite_min))
+                return True
+        except Exception as e:
+            logger.error(f"Erreur définition comp. requise équipe {equipe_id} : {e}")
+            return False
+    def get_competences_requises_equipe(self, user_id: int, equipe_id: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.id, c.nom, ecr.quantite_min
+                    FROM competences c
+                    JOIN equipes_competences_requises ecr ON c.id = ecr.competence_id
+                    JOIN equipes eq ON ecr.equipe_id = eq.id
+                    WHERE eq.id = %s AND eq.user_id = %s
+                """, (equipe_id, user_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération comp. requises équipe {equipe_id} : {e}")
+            return []
+
+
+class Planning:
+    def __init__(self, db):
+        self.db = db
+
+    def creer_shift(self, data: Dict)-> bool:
+        "Crée un créneau horaire"
+        required = ('employe_id', 'date', 'heure_debut', 'heure_fin', 'type_shift')
+        if not all(k in data for k in required):
+            raise ValueError("Champs manquants")
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                query = """
+                INSERT INTO shifts
+                (employe_id, date, heure_debut, heure_fin, type_shift, commentaire, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                """
+                values = (
+                    data['employe_id'],
+                    data['date'],
+                    data['heure_debut'],
+                    data['heure_fin'],
+                    data['type_shift'],
+                    data.get('commentaire', '')
+                )
+                cursor.execute(query, values)
+                return True
+        except Error as e:
+            logger.error("Erreur création shift {e}")
+            return False
+
+    def get_shifts_for_period(self, user_id: int, date_debut: str, date_fin: str)-> Dict:
+        "Récupère tous les créneaux horaires pour une période donnée"
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT s.*, e.nom, e.prenom, e.id as employe_id
+                FROM shifts s
+                JOIN employes e ON s.employe_id = e.id
+                WHERE user_id = %s
+                AND s.date BETWEEN %s AND %s
+                ORDER BY s.date, s.heure_debut
+                """
+                cursor.execute(query, (user_id, date_debut, date_fin))
+                shifts = cursor.fetchall()
+
+                organized = {}
+                for shift in shifts:
+                    employe_id = shift['employe_id']
+                    date_str = str(shift['date'])
+                    
+                    if employe_id not in organized:
+                        organized[employe_id] = {}  # Correction : '=' au lieu de ':'
+                    
+                    if date_str not in organized[employe_id]: # Correction : [] au lieu de ()
+                        organized[employe_id][date_str] = []  # Correction : '=' au lieu de ':'
+                        
+                    organized[employe_id][date_str].append(shift)
+
+                return organized
+        except Exception as e:
+            logger.error(f"Erreur récupération shifts: {e}")
+
+
+class PlanningRegles:
+    def __init__(self, db):
+        self.db = db
+
+    def create_regle(self, user_id: int, nom: str, type_regle: str, params: Dict[str, Any]) -> int:
+        """
+        Types supportés :
+          - 'competence_min_simulee'
+          - 'bilinguisme_simultane_simule'
+        """
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("""
+                    INSERT INTO planning_regles (user_id, nom, type_regle, params_json, created_at)
+                    VALUES (%s, %s, %s, %s, NOW())
+                """, (user_id, nom, type_regle, json.dumps(params)))
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error(f"Erreur création règle planning : {e}")
+            return None
+
+    def get_regles_by_user(self, user_id: int) -> List[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, nom, type_regle, params_json
+                    FROM planning_regles
+                    WHERE user_id = %s
+                    ORDER BY nom
+                """, (user_id,))
+                return [
+                    {**row, 'params': json.loads(row['params_json'])}
+                    for row in cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error(f"Erreur récup règles user {user_id} : {e}")
+            return []
+
+    def delete_regle(self, user_id: int, regle_id: int) -> bool:
+        try:
+            with self.db.get_cursor(commit=True) as cursor:
+                cursor.execute("DELETE FROM planning_regles WHERE id = %s AND user_id = %s", (regle_id, user_id))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erreur suppression règle {regle_id} : {e}")
+            return False
+
+    def valider_periode_simulee(self, user_id: int, date_debut: date, date_fin: date) -> List[Dict]:
+        """
+        Valide les règles sur les **heures simulées** uniquement.
+        """
+        violations = []
+        regles = self.get_regles_by_user(user_id)
+
+        for regle in regles:
+            if regle['type_regle'] == 'competence_min_simulee':
+                violations += self._valider_competence_min_simulee(user_id, regle, date_debut, date_fin)
+            elif regle['type_regle'] == 'bilinguisme_simultane_simule':
+                violations += self._valider_bilinguisme_simultane_simule(user_id, regle, date_debut, date_fin)
+
+        return violations
+
+    def _get_employes_simules_jour(self, user_id: int, equipe_id: int, date_jour: date) -> List[Dict]:
+        """
+        Récupère les employés **planifiés** (simulés) dans une équipe à une date donnée.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT e.*
+                    FROM employes e
+                    JOIN heures_simulees hs ON e.id = hs.employe_id
+                    WHERE hs.user_id = %s
+                      AND hs.equipe_id = %s
+                      AND hs.date = %s
+                """, (user_id, equipe_id, date_jour))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récup simulés {date_jour} équipe {equipe_id} : {e}")
+            return []
+
+    def _valider_competence_min_simulee(self, equipe_model, competence_model, user_id: int, regle: Dict, debut: date, fin: date) -> List[Dict]:
+        params = regle['params']
+        equipe_id = params.get('equipe_id')
+        competence_id = params.get('competence_id')
+        quantite_min = params.get('quantite_min', 1)
+
+        # Vérifier propriété
+        equipes = equipe_model.get_equipes_from_user(user_id)
+        if not any(eq['id'] == equipe_id for eq in equipes):
+            return []
+
+        violations = []
+        current = debut
+        while current <= fin:
+            employes_presents = self._get_employes_simules_jour(user_id, equipe_id, current)
+            employes_qualifies = [
+                e for e in employes_presents
+                if competence_id in [c['id'] for c in competence_model.get_competences_employe(e['id'])]
+            ]
+            if len(employes_qualifies) < quantite_min:
+                violations.append({
+                    'regle_id': regle['id'],
+                    'nom_regle': regle['nom'],
+                    'type': 'competence_min_simulee',
+                    'violation': f"Seulement {len(employes_qualifies)} sur {quantite_min} employés requis avec compétence ID {competence_id}",
+                    'date': current.isoformat(),
+                    'equipe_id': equipe_id
+                })
+            current += timedelta(days=1)
+        return violations
+
+    def _valider_bilinguisme_simultane_simule(self, equipe_model, competence_model,user_id: int, regle: Dict, debut: date, fin: date) -> List[Dict]:
+        params = regle['params']
+        equipe_id = params.get('equipe_id')
+
+        equipes = equipe_model.get_equipes_from_user(user_id)
+        if not any(eq['id'] == equipe_id for eq in equipes):
+            return []
+
+        comp_fr = self._get_competence_by_nom(user_id, 'francais')
+        comp_de = self._get_competence_by_nom(user_id, 'allemand')
+        if not comp_fr or not comp_de:
+            return [{'regle_id': regle['id'], 'violation': "Compétences langue non trouvées", 'date': debut.isoformat()}]
+
+        violations = []
+        current = debut
+        while current <= fin:
+            employes_presents = self._get_employes_simules_jour(user_id, equipe_id, current)
+            a_fr = any(comp_fr['id'] in [c['id'] for c in competence_model.get_competences_employe(e['id'])] for e in employes_presents)
+            a_de = any(comp_de['id'] in [c['id'] for c in competence_model.get_competences_employe(e['id'])] for e in employes_presents)
+
+            if not (a_fr and a_de):
+                violations.append({
+                    'regle_id': regle['id'],
+                    'nom_regle': regle['nom'],
+                    'type': 'bilinguisme_simultane_simule',
+                    'violation': "Bilinguisme (FR+DE) manquant dans planning simulé",
+                    'date': current.isoformat(),
+                    'equipe_id': equipe_id
+                })
+            current += timedelta(days=1)
+        return violations
+
+    def _get_competence_by_nom(self, user_id: int, nom: str) -> Optional[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT id, nom FROM competences WHERE user_id = %s AND nom = %s", (user_id, nom))
+                return cursor.fetchone()
+        except:
+            return None
+
+    # --- Fonctionnalité bonus : contexte réel pour aide à la planification ---
+    def get_contexte_reel_pour_plage(self, user_id: int, employe_id: int, date_ref: date, plage_h1d: str, plage_h2f: str, tolerance_min: int = 30) -> Dict:
+        """
+        Retourne des stats réelles sur les comportements passés de l'employé
+        pour des plages horaires comparables (même jour de semaine ± tolérance).
+        Utile pour afficher : "en moyenne, cet employé commence 12 min plus tard que prévu".
+        """
+        jour_semaine = date_ref.weekday()  # 0=Lundi
+        try:
+            with self.db.get_cursor() as cursor:
+                # Rechercher les entrées réelles du même jour de semaine ± tolérance
+                cursor.execute("""
+                    SELECT h1d, h2f, total_h
+                    FROM heures_travail
+                    WHERE user_id = %s
+                      AND employe_id = %s
+                      AND type_heure = 'reel'
+                      AND DAYOFWEEK(date) = %s + 1  -- MySQL: 1=Dim, donc +1
+                      AND date < %s
+                    ORDER BY date DESC
+                    LIMIT 20
+                """, (user_id, employe_id, jour_semaine, date_ref))
+                historique = cursor.fetchall()
+
+                if not historique:
+                    return {'message': 'Aucun historique réel trouvé'}
+
+                # Convertir plage simulée en minutes
+                h1d_sim = self._time_to_minutes(plage_h1d)
+                h2f_sim = self._time_to_minutes(plage_h2f)
+
+                ecarts_h1d = []
+                ecarts_h2f = []
+                for h in historique:
+                    h1d_r = self._time_to_minutes(h['h1d'])
+                    h2f_r = self._time_to_minutes(h['h2f'])
+                    if h1d_r != -1 and h1d_sim != -1:
+                        ecarts_h1d.append(h1d_r - h1d_sim)
+                    if h2f_r != -1 and h2f_sim != -1:
+                        ecarts_h2f.append(h2f_r - h2f_sim)
+
+                return {
+                    'moyenne_ecart_h1d_min': round(sum(ecarts_h1d) / len(ecarts_h1d), 1) if ecarts_h1d else 0,
+                    'moyenne_ecart_h2f_min': round(sum(ecarts_h2f) / len(ecarts_h2f), 1) if ecarts_h2f else 0,
+                    'nb_echantillons': len(historique),
+                    'plage_simulee': f"{plage_h1d} → {plage_h2f}"
+                }
+        except Exception as e:
+            logger.error(f"Erreur contexte réel pour {employe_id} le {date_ref} : {e}")
+            return {'erreur': str(e)}
+
+    def _time_to_minutes(self, t) -> int:
+        if not t:
+            return -1
+        if isinstance(t, str):
+            h, m = map(int, t.split(':')[:2])
+            return h * 60 + m
+        elif hasattr(t, 'hour'):
+            return t.hour * 60 + t.minute
+        return -1
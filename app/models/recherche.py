@@ -0,0 +1,309 @@
+"""
+Index de recherche plein texte sur les transactions, les écritures comptables et les contacts.
+
+La table index_recherche est un index inversé : une ligne par (utilisateur, terme, source,
+identifiant), avec le nombre d'occurrences du terme. Sa clé primaire commence par
+(utilisateur_id, terme), si bien qu'une recherche par préfixe (`terme LIKE 'coo%'`) est un
+parcours d'intervalle de l'index, quel que soit le volume du grand livre. Le même schéma
+fonctionne sur MySQL et sur SQLite, contrairement à FULLTEXT / MATCH ... AGAINST.
+
+Les modèles qui écrivent dans les tables indexées appellent indexer_with_cursor (ou
+indexer_textes_with_cursor) dans leur propre transaction. L'index d'un utilisateur est
+construit à la première recherche (base existante) ; la portée 'index_recherche' de
+versions_donnees indique qu'il est complet.
+"""
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.categorisation_auto import normaliser_texte
+from ..utils.montants import Montant
+from .base import VersionDonnees
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('transaction', 'ecriture', 'contact')
+
+# Mots et nombres ; '12,50' et '12.50' donnent le même terme
+_RE_TERME = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)?")
+LONGUEUR_MAX_TERME = 64
+# Résultats classés (/api/search) : lignes lues au plus par terme de la requête (préfixes
+# très courts et très fréquents). Le filtrage exact (ids_correspondants) n'est pas borné.
+MAX_CANDIDATS_PAR_TERME = 5000
+
+
+def extraire_termes(*textes) -> Dict[str, int]:
+    """Termes normalisés (minuscules, sans accents) -> nombre d'occurrences."""
+    termes: Dict[str, int] = defaultdict(int)
+    for texte in textes:
+        if texte is None or texte == '':
+            continue
+        for terme in _RE_TERME.findall(normaliser_texte(texte)):
+            terme = terme.replace(',', '.')
+            if len(terme) < 2 and not terme.isdigit():
+                continue
+            termes[terme[:LONGUEUR_MAX_TERME]] += 1
+    return termes
+
+
+def _texte_montant(montant) -> Optional[str]:
+    if montant is None or montant == '':
+        return None
+    return str(Montant.depuis(montant))
+
+
+class IndexRecherche:
+    """Index inversé et recherche classée sur transactions, écritures et contacts."""
+
+    # Requêtes de relecture des lignes à indexer, par source : (id, utilisateur_id, textes...)
+    _LECTURES = {
+        'transaction': """
+            SELECT id, utilisateur_id, description, reference, montant
+            FROM transactions WHERE {filtre}
+        """,
+        'ecriture': """
+            SELECT id, utilisateur_id, description, reference, montant
+            FROM ecritures_comptables
+            WHERE {filtre} AND (statut IS NULL OR statut <> 'supprimee')
+        """,
+        'contact': """
+            SELECT id_contact, utilisateur_id, nom, email, telephone, adresse, code_postal, ville, pays
+            FROM contacts WHERE {filtre}
+        """,
+    }
+    _COLONNES_ID = {'transaction': 'id', 'ecriture': 'id', 'contact': 'id_contact'}
+
+    def __init__(self, db):
+        self.db = db
+
+    # --- Écriture de l'index ---
+
+    @staticmethod
+    def _lignes_index(source: str, ligne) -> List[Tuple]:
+        """(utilisateur_id, terme, source, source_id, poids) d'une ligne relue par _LECTURES."""
+        source_id, utilisateur_id, *textes = ligne
+        if source != 'contact':
+            textes[-1] = _texte_montant(textes[-1])
+        return [(utilisateur_id, terme, source, source_id, min(poids, 255))
+                for terme, poids in extraire_termes(*textes).items()]
+
+    @staticmethod
+    def _invalider_with_cursor(cursor, user_id: int) -> None:
+        """Index incohérent : on l'efface, il sera reconstruit à la prochaine recherche."""
+        try:
+            cursor.execute("DELETE FROM index_recherche WHERE utilisateur_id = %s", (user_id,))
+            cursor.execute("DELETE FROM versions_donnees WHERE portee = 'index_recherche' AND portee_id = %s",
+                           (user_id,))
+        except Exception as e:
+            logger.warning(f"Index de recherche de l'utilisateur {user_id} non invalidé: {e}")
+
+    @staticmethod
+    def indexer_textes_with_cursor(cursor, user_id: int, source: str, source_id: int, *textes) -> None:
+        """Indexe une ligne qui vient d'être insérée, à partir des valeurs déjà connues (pas de relecture)."""
+        lignes = [(user_id, terme, source, source_id, min(poids, 255))
+                  for terme, poids in extraire_termes(*textes).items()]
+        if not lignes:
+            return
+        # Un échec ne doit jamais annuler l'écriture métier
+        try:
+            cursor.executemany("""
+                INSERT INTO index_recherche (utilisateur_id, terme, source, source_id, poids)
+                VALUES (%s, %s, %s, %s, %s)
+            """, lignes)
+        except Exception as e:
+            logger.warning(f"Indexation {source}/{source_id} impossible: {e}")
+            IndexRecherche._invalider_with_cursor(cursor, user_id)
+
+    @classmethod
+    def indexer_with_cursor(cls, cursor, user_id: int, source: str, ids: Iterable[int]) -> None:
+        """
+        Réindexe des lignes d'après leur contenu actuel en base : les termes des lignes
+        supprimées (ou écritures marquées 'supprimee') disparaissent, les autres sont réécrits.
+        """
+        ids = sorted({int(i) for i in ids if i is not None})
+        if not ids:
+            return
+        marqueurs = ', '.join(['%s'] * len(ids))
+        try:
+            cursor.execute(f"DELETE FROM index_recherche WHERE source = %s AND source_id IN ({marqueurs})",
+                           [source, *ids])
+            filtre = f"{cls._COLONNES_ID[source]} IN ({marqueurs})"
+            cursor.execute(cls._LECTURES[source].format(filtre=filtre), ids)
+            lignes = []
+            for ligne in cursor.fetchall():
+                if isinstance(ligne, dict):
+                    ligne = tuple(ligne.values())
+                lignes.extend(cls._lignes_index(source, ligne))
+            if lignes:
+                cursor.executemany("""
+                    INSERT INTO index_recherche (utilisateur_id, terme, source, source_id, poids)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, lignes)
+        except Exception as e:
+            logger.warning(f"Réindexation {source} {ids} impossible: {e}")
+            cls._invalider_with_cursor(cursor, user_id)
+
+    def _reconstruire_with_cursor(self, cursor, user_id: int) -> int:
+        cursor.execute("DELETE FROM index_recherche WHERE utilisateur_id = %s", (user_id,))
+        nb = 0
+        for source in SOURCES:
+            cursor.execute(self._LECTURES[source].format(filtre='utilisateur_id = %s'), (user_id,))
+            lignes = []
+            for ligne in cursor.fetchall():
+                if isinstance(ligne, dict):
+                    ligne = tuple(ligne.values())
+                lignes.extend(self._lignes_index(source, ligne))
+            if lignes:
+                cursor.executemany("""
+                    INSERT INTO index_recherche (utilisateur_id, terme, source, source_id, poids)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, lignes)
+            nb += len(lignes)
+        VersionDonnees.incrementer_with_cursor(cursor, 'index_recherche', user_id)
+        return nb
+
+    def reconstruire(self, user_id: int) -> bool:
+        """Reconstruit entièrement l'index de l'utilisateur"""
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                nb = self._reconstruire_with_cursor(cursor, user_id)
+            logger.info(f"Index de recherche reconstruit pour l'utilisateur {user_id} ({nb} termes)")
+            return True
+        except Exception as e:
+            logger.error(f"Erreur reconstruction de l'index de recherche: {e}")
+            return False
+
+    def assurer_index(self, user_id: int) -> bool:
+        """Construit l'index de l'utilisateur s'il ne l'a jamais été. False si l'index est inutilisable."""
+        version = VersionDonnees(self.db).get_version('index_recherche', user_id)
+        if str(version).startswith('inconnue'):
+            return False
+        return bool(version) or self.reconstruire(user_id)
+
+    # --- Recherche ---
+
+    def ids_correspondants(self, user_id: int, source: str, q: str) -> Optional[set]:
+        """
+        Identifiants de la source dont l'index contient tous les termes de `q` (par préfixe).
+        Tous les candidats sont lus : un filtre ne doit perdre aucune ligne correspondante.
+        None si la requête ne contient aucun terme ou si l'index est indisponible.
+        """
+        scores = self._scores(user_id, q, (source,), max_candidats=None)
+        if scores is None:
+            return None
+        return {source_id for (_, source_id) in scores}
+
+    def _scores(self, user_id: int, q: str, sources: Tuple[str, ...],
+                max_candidats: Optional[int] = MAX_CANDIDATS_PAR_TERME) -> Optional[Dict[Tuple[str, int], int]]:
+        """(source, id) -> score des lignes contenant tous les termes de `q` (max_candidats=None : sans borne)."""
+        termes = list(extraire_termes(q))
+        if not termes or not self.assurer_index(user_id):
+            return None
+        marqueurs = ', '.join(['%s'] * len(sources))
+        scores: Optional[Dict[Tuple[str, int], int]] = None
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                # Les termes les plus longs (les plus sélectifs) d'abord : l'intersection se réduit vite
+                for terme in sorted(termes, key=len, reverse=True):
+                    limite = " LIMIT %s" if max_candidats is not None else ""
+                    cursor.execute(f"""
+                        SELECT source, source_id, terme, poids
+                        FROM index_recherche
+                        WHERE utilisateur_id = %s AND terme LIKE %s AND source IN ({marqueurs})
+                    """ + limite, [user_id, terme + '%', *sources,
+                                    *([max_candidats] if max_candidats is not None else [])])
+                    meilleurs: Dict[Tuple[str, int], int] = {}
+                    for source, source_id, terme_index, poids in cursor.fetchall():
+                        # Terme exact : poids doublé par rapport à un simple préfixe
+                        score = poids * (2 if terme_index == terme else 1)
+                        cle = (source, source_id)
+                        if score > meilleurs.get(cle, 0):
+                            meilleurs[cle] = score
+                    if scores is None:
+                        scores = meilleurs
+                    else:
+                        scores = {cle: s + meilleurs[cle] for cle, s in scores.items() if cle in meilleurs}
+                    if not scores:
+                        break
+        except Exception as e:
+            logger.error(f"Erreur recherche '{q}': {e}")
+            return None
+        return scores or {}
+
+    def rechercher(self, user_id: int, q: str, sources: Iterable[str] = SOURCES, limite: int = 20) -> List[Dict]:
+        """
+        Résultats classés (score décroissant, puis plus récents d'abord) sur les sources demandées.
+        Chaque résultat : type, id, titre, detail, date, montant, score.
+        """
+        sources = tuple(s for s in sources if s in SOURCES) or SOURCES
+        scores = self._scores(user_id, q, sources)
+        if not scores:
+            return []
+        retenus = sorted(scores.items(), key=lambda e: (-e[1], -e[0][1]))[:max(1, limite)]
+        par_source = defaultdict(list)
+        for (source, source_id), _ in retenus:
+            par_source[source].append(source_id)
+
+        details = {}
+        try:
+            with self.db.get_cursor() as cursor:
+                for source, ids in par_source.items():
+                    details.update(self._details(cursor, user_id, source, ids))
+        except Exception as e:
+            logger.error(f"Erreur lecture des résultats de recherche: {e}")
+            return []
+
+        # Les lignes supprimées entre-temps (ou d'un autre utilisateur) n'ont pas de détail
+        return [{**details[cle], 'score': score} for cle, score in retenus if cle in details]
+
+    @staticmethod
+    def _details(cursor, user_id: int, source: str, ids: List[int]) -> Dict[Tuple[str, int], Dict]:
+        marqueurs = ', '.join(['%s'] * len(ids))
+        resultats = {}
+        if source == 'transaction':
+            cursor.execute(f"""
+                SELECT t.id, t.date_transaction, t.montant, t.type_transaction, t.description, t.reference,
+                       t.compte_principal_id, t.sous_compte_id, cp.nom_compte, sc.nom_sous_compte
+                FROM transactions t
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                WHERE t.utilisateur_id = %s AND t.id IN ({marqueurs})
+            """, [user_id, *ids])
+            for r in cursor.fetchall():
+                resultats[('transaction', r['id'])] = {
+                    'type': 'transaction', 'id': r['id'],
+                    'titre': r['description'] or r['type_transaction'],
+                    'detail': r['nom_compte'] or r['nom_sous_compte'] or '',
+                    'date': r['date_transaction'], 'montant': r['montant'],
+                    'compte_principal_id': r['compte_principal_id'], 'sous_compte_id': r['sous_compte_id'],
+                }
+        elif source == 'ecriture':
+            cursor.execute(f"""
+                SELECT e.id, e.date_ecriture, e.montant, e.type_ecriture, e.description, e.reference,
+                       e.statut, c.nom AS categorie_nom
+                FROM ecritures_comptables e
+                LEFT JOIN categories_comptables c ON e.categorie_id = c.id
+                WHERE e.utilisateur_id = %s AND e.id IN ({marqueurs})
+                AND (e.statut IS NULL OR e.statut <> 'supprimee')
+            """, [user_id, *ids])
+            for r in cursor.fetchall():
+                resultats[('ecriture', r['id'])] = {
+                    'type': 'ecriture', 'id': r['id'],
+                    'titre': r['description'] or r['reference'] or r['type_ecriture'],
+                    'detail': r['categorie_nom'] or '',
+                    'date': r['date_ecriture'], 'montant': r['montant'], 'statut': r['statut'],
+                }
+        else:
+            cursor.execute(f"""
+                SELECT id_contact, nom, email, telephone, ville
+                FROM contacts
+                WHERE utilisateur_id = %s AND id_contact IN ({marqueurs})
+            """, [user_id, *ids])
+            for r in cursor.fetchall():
+                resultats[('contact', r['id_contact'])] = {
+                    'type': 'contact', 'id': r['id_contact'], 'titre': r['nom'],
+                    'detail': ' · '.join(v for v in (r['email'], r['telephone'], r['ville']) if v),
+                    'date': None, 'montant': None,
+                }
+        return resultats
@@ -0,0 +1,4473 @@
+"""
+Transactions financières (soldes, transferts, import), catégories de transactions
+et statistiques bancaires.
+"""
+from pymysql import Error
+from decimal import Decimal
+from datetime import datetime, date, timedelta
+import time
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional, Tuple
+import logging
+import re
+import secrets
+
+from ..utils import svg_charts
+from ..utils.montants import Montant
+from ..utils.lignes import en_decimal, en_float
+from ..utils.categorisation_auto import TYPES_REGLE, MoteurCategorisation, cache_moteurs, verifier_regex
+from ..utils.empreintes_import import empreinte_transaction, est_credit
+from .base import VersionDonnees
+from .comptes import ComptePrincipal, SousCompte
+from .recherche import IndexRecherche, extraire_termes
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionFinanciere:
+    """
+    Classe unifiée pour gérer toutes les transactions financières avec optimisation des soldes
+    """
+    def __init__(self, db):
+        self.db = db
+    # ===== VALIDATION ET UTILITAIRES =====
+
+    def _valider_solde_suffisant(self, compte_type: str, compte_id: int, montant: Decimal) -> Tuple[bool, Decimal]:
+        """Vérifie si le solde est suffisant pour l'opération"""
+        logger.debug("Vérification du solde pour %s ID %s", compte_type, compte_id)
+
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s", (compte_id,))
+                elif compte_type == 'sous_compte':
+                    cursor.execute("SELECT solde FROM sous_comptes WHERE id = %s", (compte_id,))
+                else:
+                    logger.error(f"Type de compte invalide: {compte_type}")
+                    return False, Decimal('0')
+
+                result = cursor.fetchone()
+                if not result or 'solde' not in result:
+                    logger.warning(f"Aucun solde trouvé pour {compte_type} ID {compte_id}")
+                    return False, Decimal('0')
+
+                solde_actuel = Decimal(str(result['solde']))
+                return solde_actuel >= montant, solde_actuel
+        except Error as e:
+            logger.error(f"Erreur validation solde: {e}")
+            return False, Decimal('0')
+
+    def _get_previous_transaction(self, compte_type: str, compte_id: int, date_transaction: datetime) -> Optional[Dict]:
+        """Trouve la transaction précédente la plus proche pour un compte donné"""
+        logger.debug("Recherche de la transaction précédente pour %s ID %s", compte_type, compte_id)
+
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    condition = "compte_principal_id = %s"
+                else:
+                    condition = "sous_compte_id = %s"
+
+                query = f"""
+                SELECT id, date_transaction, solde_apres
+                FROM transactions
+                WHERE {condition} AND date_transaction <= %s
+                ORDER BY date_transaction DESC, id DESC
+                LIMIT 1
+                """
+
+                cursor.execute(query, (compte_id, date_transaction))
+                return cursor.fetchone()
+        except Error as e:
+            logger.error(f"Erreur recherche transaction précédente: {e}")
+            return None
+
+    def _get_solde_initial(self, compte_type: str, compte_id: int) -> Decimal:
+        """Récupère le solde initial d'un compte"""
+        logger.debug("Récupération du solde initial pour %s ID %s", compte_type, compte_id)
+
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    cursor.execute("SELECT solde_initial FROM comptes_principaux WHERE id = %s", (compte_id,))
+                else:
+                    cursor.execute("SELECT solde_initial FROM sous_comptes WHERE id = %s", (compte_id,))
+
+                result = cursor.fetchone()
+                return Decimal(str(result['solde_initial'])) if result and 'solde_initial' in result else Decimal('0')
+        except Error as e:
+            logger.error(f"Erreur récupération solde initial: {e}")
+            return Decimal('0')
+
+    def _update_subsequent_transactions(self, cursor, compte_type: str, compte_id: int,
+                                      date_transaction: datetime, transaction_id: int,
+                                      solde_apres_insere: Decimal) -> Optional[Decimal]:
+        """Met à jour les soldes des transactions suivantes après une insertion ou modification"""
+        logger.debug("Mise à jour des transactions suivantes")
+
+        if compte_type == 'compte_principal':
+            condition = "compte_principal_id = %s"
+        else:
+            condition = "sous_compte_id = %s"
+
+        # Récupérer les transactions suivantes
+        query = f"""
+        SELECT id, type_transaction, montant, date_transaction
+        FROM transactions
+        WHERE {condition} AND (date_transaction > %s OR (date_transaction = %s AND id > %s))
+        ORDER BY date_transaction ASC, id ASC
+        """
+
+        cursor.execute(query, (compte_id, date_transaction, date_transaction, transaction_id))
+        subsequent_transactions = cursor.fetchall()
+        if not subsequent_transactions:
+            return None
+
+        return self._propager_soldes(cursor, compte_type, subsequent_transactions,
+                                     Montant.depuis(solde_apres_insere)).en_decimal()
+
+    def _propager_soldes(self, cursor, compte_type: str, transactions: List[Dict], solde_depart: Montant) -> Montant:
+        """
+        Recalcule en centimes le solde_apres de transactions triées chronologiquement,
+        à partir de solde_depart, et les écrit en une seule requête groupée.
+        Retourne le solde après la dernière transaction.
+        """
+        solde_courant = solde_depart.centimes
+        mises_a_jour = []
+        for transaction in transactions:
+            effet = self._get_transaction_effect(transaction['type_transaction'], compte_type)
+            if effet == 'unknown':
+                logger.warning(f"Type de transaction non reconnu: {transaction['type_transaction']}")
+                continue
+            montant = Montant.depuis(transaction['montant']).centimes
+            solde_courant += montant if effet == 'credit' else -montant
+            mises_a_jour.append((Montant(solde_courant).en_decimal(), transaction['id']))
+
+        if mises_a_jour:
+            cursor.executemany("UPDATE transactions SET solde_apres = %s WHERE id = %s", mises_a_jour)
+        return Montant(solde_courant)
+
+    def _inserer_transaction(self, compte_type: str, compte_id: int, type_transaction: str,
+                            montant: Decimal, description: str, user_id: int,
+                            date_transaction: datetime, validate_balance: bool = True) -> Tuple[bool, str, Optional[int]]:
+        """Insère une transaction avec calcul intelligent du solde et mise à jour des transactions suivantes"""
+        logger.info("Insertion de la transaction de type '%s'", type_transaction)
+        try:
+            with self.db.get_cursor() as cursor:
+                # Trouver la transaction précédente
+                previous = self._get_previous_transaction(compte_type, compte_id, date_transaction)
+                # Calculer le solde_avant
+                if previous:
+                    solde_avant = Montant.depuis(previous['solde_apres'])
+                else:
+                    solde_avant = Montant.depuis(self._get_solde_initial(compte_type, compte_id))
+                montant = Montant.depuis(montant)
+                # Pour les transactions de débit, vérifier le solde suffisant si demandé
+                if validate_balance and type_transaction in ['retrait', 'transfert_sortant', 'transfert_externe']:
+                    if solde_avant < montant:
+                        return False, "Solde insuffisant", None
+                # Calculer le nouveau solde
+                if type_transaction in ['depot', 'transfert_entrant', 'recredit_annulation']:
+                    solde_apres = solde_avant + montant
+                else:
+                    solde_apres = solde_avant - montant
+                reference_transfert = f"TRF_{int(time.time())}_{user_id}_{secrets.token_hex(6)}"
+                empreinte = empreinte_transaction(compte_type, compte_id, date_transaction, montant,
+                                                  est_credit(type_transaction, compte_type), description)
+                # Insérer la transaction
+                if compte_type == 'compte_principal':
+                    query = """
+                    INSERT INTO transactions
+                    (compte_principal_id, type_transaction, montant, description, utilisateur_id, date_transaction, solde_apres, reference_transfert, empreinte_import)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(query, (compte_id, type_transaction, montant.en_decimal(),
+                                        description, user_id, date_transaction, solde_apres.en_decimal(), reference_transfert, empreinte))
+                else:
+                    query = """
+                    INSERT INTO transactions
+                    (sous_compte_id, type_transaction, montant, description, utilisateur_id, date_transaction, solde_apres, reference_transfert, empreinte_import)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                    cursor.execute(query, (compte_id, type_transaction, montant.en_decimal(),
+                                        description, user_id, date_transaction, solde_apres.en_decimal(), reference_transfert, empreinte))
+
+                transaction_id = cursor.lastrowid
+                IndexRecherche.indexer_textes_with_cursor(cursor, user_id, 'transaction', transaction_id,
+                                                          description, str(montant))
+
+                # Mettre à jour les transactions suivantes
+                dernier_solde = self._update_subsequent_transactions(
+                    cursor, compte_type, compte_id, date_transaction, transaction_id, solde_apres
+                )
+
+                # Mettre à jour le solde du compte
+                solde_final = dernier_solde if dernier_solde is not None else solde_apres.en_decimal()
+                if not self._mettre_a_jour_solde(compte_type, compte_id, solde_final):
+                    raise Exception("Erreur lors de la mise à jour du solde")
+
+                return True, "Transaction insérée avec succès", transaction_id
+        except Exception as e:
+            logger.error(f"Erreur insertion transaction: {e}")
+            return False, f"Erreur lors de l'insertion: {str(e)}", None
+
+    def _recalculer_soldes_apres_date(self, compte_type: str, compte_id: int, date_modification: datetime) -> bool:
+        """Recalcule tous les soldes_apres des transactions postérieures à une date"""
+        logger.info("Recalcul des soldes après modification")
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer toutes les transactions à partir de la date de modification, triées chronologiquement
+                if compte_type == 'compte_principal':
+                    condition_compte = "compte_principal_id = %s"
+                else:
+                    condition_compte = "sous_compte_id = %s"
+                query = f"""
+                SELECT id, montant, type_transaction, date_transaction
+                FROM transactions
+                WHERE {condition_compte} AND date_transaction >= %s
+                ORDER BY date_transaction, id
+                """
+                cursor.execute(query, (compte_id, date_modification))
+                transactions = cursor.fetchall()
+                if not transactions:
+                    return True
+                # Trouver la transaction précédente pour obtenir le solde initial
+                premiere_transaction = transactions[0]
+                previous = self._get_previous_transaction(compte_type, compte_id, premiere_transaction['date_transaction'])
+                if previous:
+                    solde_depart = Montant.depuis(previous['solde_apres'])
+                else:
+                    solde_depart = Montant.depuis(self._get_solde_initial(compte_type, compte_id))
+
+                solde_courant = self._propager_soldes(cursor, compte_type, transactions, solde_depart).en_decimal()
+
+                if not self._mettre_a_jour_solde(compte_type, compte_id, solde_courant):
+                    raise Exception("Erreur lors de la mise à jour du solde")
+
+                return True
+        except Exception as e:
+            logger.error(f"Erreur recalcul soldes: {e}")
+            return False
+
+    def _recalculer_soldes_apres_date_with_cursor(self, cursor, compte_type: str, compte_id: int, date_modification: datetime) -> bool:
+        """Recalcule tous les soldes_apres des transactions postérieures à une date — version avec curseur existant"""
+        logger.info("Recalcul des soldes après modification")
+        try:
+            # Récupérer toutes les transactions à partir de la date de modification, triées chronologiquement
+            if compte_type == 'compte_principal':
+                condition_compte = "compte_principal_id = %s"
+            else:
+                condition_compte = "sous_compte_id = %s"
+
+            query = f"""
+            SELECT id, montant, type_transaction, date_transaction
+            FROM transactions
+            WHERE {condition_compte} AND date_transaction >= %s
+            ORDER BY date_transaction, id
+            """
+            cursor.execute(query, (compte_id, date_modification))
+            transactions = cursor.fetchall()
+            if not transactions:
+                return True
+
+            # Trouver la transaction précédente pour obtenir le solde initial
+            premiere_transaction = transactions[0]
+            previous = self._get_previous_transaction_with_cursor(cursor, compte_type, compte_id, premiere_transaction['date_transaction'])
+            if previous:
+                solde_depart = Montant.depuis(previous[2])  # previous[2] = solde_apres
+            else:
+                solde_depart = Montant.depuis(self._get_solde_initial_with_cursor(cursor, compte_type, compte_id))
+
+            solde_courant = self._propager_soldes(cursor, compte_type, transactions, solde_depart).en_decimal()
+
+            # Mettre à jour le solde final du compte
+            if not self._mettre_a_jour_solde_with_cursor(cursor, compte_type, compte_id, solde_courant):
+                raise Exception("Erreur lors de la mise à jour du solde")
+
+            return True
+        except Exception as e:
+            logger.error(f"Erreur recalcul soldes: {e}")
+            return False
+
+    def get_solde_historique(self, compte_type: str, compte_id: int, user_id: int,
+                        date_debut: str = None, date_fin: str = None) -> List[Dict]:
+        """Récupère l'évolution historique du solde d'un compte"""
+        if not self._verifier_appartenance_compte(compte_type, compte_id, user_id):
+            return []
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    condition_compte = "compte_principal_id = %s"
+                else:
+                    condition_compte = "sous_compte_id = %s"
+                query = f"""
+                SELECT
+                    date_transaction,
+                    type_transaction,
+                    montant,
+                    description,
+                    solde_apres,
+                    reference
+                FROM transactions
+                WHERE {condition_compte}
+                """
+                params = [compte_id]
+                if date_debut:
+                    query += " AND date_transaction >= %s"
+                    params.append(date_debut)
+                if date_fin:
+                    query += " AND date_transaction <= %s"
+                    params.append(date_fin)
+                query += " ORDER BY date_transaction DESC, id DESC"
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur récupération solde historique: {e}")
+            return []
+
+    def _mettre_a_jour_solde(self, compte_type: str, compte_id: int, nouveau_solde: Decimal) -> bool:
+        """Met à jour le solde d'un compte"""
+        logger.info("Mise à jour solde %s ID %s -> %s", compte_type, compte_id, nouveau_solde)
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    query = "UPDATE comptes_principaux SET solde = %s WHERE id = %s"
+                else:
+                    query = "UPDATE sous_comptes SET solde = %s WHERE id = %s"
+                cursor.execute(query, (Montant.depuis(nouveau_solde).en_decimal(), compte_id))
+                mis_a_jour = cursor.rowcount > 0
+                self._incrementer_version_compte(cursor, compte_type, compte_id)
+                return mis_a_jour
+        except Error as e:
+            logger.error(f"Erreur mise à jour solde: {e}")
+            return False
+
+    def modifier_transaction(self, transaction_id: int, user_id: int,
+                        nouveau_montant: Decimal,
+                        nouvelle_description: str,
+                        nouvelle_date: datetime,
+                        nouvelle_reference: str ) -> Tuple[bool, str]:
+        """Modifie une transaction existante et recalcule les soldes suivants si le montant ou la date change"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer la transaction originale
+                cursor.execute("""
+                    SELECT t.*,
+                        COALESCE(cp.utilisateur_id, (
+                            SELECT cp2.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp2 ON sc.compte_principal_id = cp2.id
+                            WHERE sc.id = t.sous_compte_id
+                        )) as owner_user_id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s
+                """, (transaction_id,))
+                transaction = cursor.fetchone()
+                if not transaction:
+                    return False, "Transaction non trouvée"
+                if transaction['owner_user_id'] != user_id:
+                    return False, "Non autorisé à modifier cette transaction"
+                type_tx = transaction['type_transaction']
+                est_transfert = type_tx in ['transfert_entrant', 'transfert_sortant']
+
+                compte_type = 'compte_principal' if transaction['compte_principal_id'] else 'sous_compte'
+                compte_id = transaction['compte_principal_id'] or transaction['sous_compte_id']
+                ancien_montant = Decimal(str(transaction['montant']))
+                ancienne_date = transaction['date_transaction']
+                ancien_type = transaction['type_transaction'] # On garde l'ancien type pour la logique
+
+
+                # Préparer les champs à mettre à jour
+                update_fields = []
+                update_params = []
+                # Vérifier et ajouter le montant
+                if nouveau_montant is not None and nouveau_montant != ancien_montant and nouveau_montant >= 0:
+                    update_fields.append("montant = %s")
+                    update_params.append(float(nouveau_montant))
+                # Vérifier et ajouter la description
+                if nouvelle_description is not None and nouvelle_description != transaction.get('description', ''):
+                    update_fields.append("description = %s")
+                    update_params.append(nouvelle_description)
+                # Vérifier et ajouter la date
+                if nouvelle_date is not None and nouvelle_date != ancienne_date:
+                    if nouvelle_date > datetime.now() + timedelta(days=365):
+                        return False, "La date ne peut pas être dans le futur lointain"
+                    update_fields.append("date_transaction = %s")
+                    update_params.append(nouvelle_date)
+                # Vérifier et ajouter la référence
+                if nouvelle_reference is not None and nouvelle_reference != transaction.get('reference', ''):
+                    update_fields.append("reference = %s")
+                    update_params.append(nouvelle_reference)
+                # Si rien n'a changé, on ne fait rien
+                if not update_fields:
+                    return True, "Aucune modification nécessaire"
+                # Montant, description ou date modifiés : l'empreinte d'import sera recalculée à la lecture
+                if any(not champ.startswith('reference') for champ in update_fields):
+                    update_fields.append("empreinte_import = NULL")
+
+                # Construire et exécuter la requête de mise à jour
+                update_params.append(transaction_id)
+                query = f"UPDATE transactions SET {', '.join(update_fields)} WHERE id = %s"
+                cursor.execute(query, update_params)
+
+                # Déterminer si un recalcul des soldes est nécessaire
+                recalcul_necessaire = (
+                    (nouveau_montant is not None and nouveau_montant != ancien_montant) or
+                    (nouvelle_date is not None and nouvelle_date != ancienne_date)
+                )
+                if est_transfert:
+                    reference_transfert = transaction.get('reference_transfert')
+                    if not reference_transfert:
+                        return False, "Transfert corrompu : référence manquante"
+                    cursor.execute("""
+                        SELECT id, type_transaction
+                        FROM transactions
+                        WHERE reference_transfert = %s AND id != %s
+                    """, (reference_transfert, transaction_id))
+                    autre_tx = cursor.fetchone()
+                    if not autre_tx:
+                        return False, "Transfert corrompu : transaction liée introuvable"
+                    update_params_autre = update_params[:-1]  # Même modifications sauf l'ID
+                    update_params_autre.append(autre_tx['id'])
+                    cursor.execute(query, update_params_autre)
+                    IndexRecherche.indexer_with_cursor(cursor, user_id, 'transaction', [autre_tx['id']])
+                IndexRecherche.indexer_with_cursor(cursor, user_id, 'transaction', [transaction_id])
+
+
+                if recalcul_necessaire:
+                    # Déterminer la date de référence pour le recalcul
+                    # Si la date a changé, on prend la plus ancienne pour être sûr de tout recalculer
+                    if nouvelle_date is not None:
+                        ancienne_dt = ancienne_date if isinstance(ancienne_date, datetime) else datetime.combine(ancienne_date, datetime.min.time())
+                        nouvelle_dt = nouvelle_date if isinstance(nouvelle_date, datetime) else datetime.combine(nouvelle_date, datetime.min.time())
+                        date_reference = min(ancienne_dt, nouvelle_dt)
+                    else:
+                        # Si seule le montant change, on garde l'ancienne date (qui est aussi la nouvelle)
+                        date_reference = ancienne_date if isinstance(ancienne_date, datetime) else datetime.combine(ancienne_date, datetime.min.time())
+
+                    compte_type = 'compte_principal' if transaction['compte_principal_id'] else 'sous_compte'
+                    compte_id = transaction['compte_principal_id'] or transaction['sous_compte_id']
+                    success1 = self._recalculer_soldes_apres_date_with_cursor(cursor, compte_type, compte_id, date_reference)
+                    if not success1:
+                        raise Exception("Erreur lors du recalcul des soldes des transactions suivantes")
+                    else:
+                        logger.info("Recalcul des soldes réussi de la transaction après modification")
+                    if est_transfert and autre_tx:
+                        # Recalculer aussi pour l'autre transaction du transfert
+                        cursor.execute("""
+                            SELECT compte_principal_id, sous_compte_id
+                            FROM transactions WHERE id = %s
+                        """, (autre_tx['id'],))
+                        autre_details = cursor.fetchone()
+                        if autre_details:
+                            autre_compte_type = 'compte_principal' if autre_details['compte_principal_id'] else 'sous_compte'
+                            autre_compte_id = autre_details['compte_principal_id'] or autre_details['sous_compte_id']
+                            success2 = self._recalculer_soldes_apres_date_with_cursor(cursor, autre_compte_type, autre_compte_id, date_reference)
+                            if not success2:
+                                raise Exception("Erreur lors du recalcul des soldes de l'autre transaction du transfert")
+                            else:
+                                logger.info("Recalcul des soldes réussi de l'autre transaction du transfert après modification")
+                return True, "Transaction modifiée avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur modification transaction: {e}")
+            return False, f"Erreur lors de la modification: {str(e)}"
+
+    def supprimer_transaction(self, transaction_id: int, user_id: int) -> Tuple[bool, str]:
+        """Supprime une transaction. Si c'est un transfert, supprime les deux transactions liées."""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer la transaction AVANT de la supprimer
+                cursor.execute("""
+                    SELECT t.*,
+                        COALESCE(cp.utilisateur_id, (
+                            SELECT cp2.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp2 ON sc.compte_principal_id = cp2.id
+                            WHERE sc.id = t.sous_compte_id
+                        )) as owner_user_id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s
+                """, (transaction_id,))
+                transaction = cursor.fetchone()
+
+                if not transaction:
+                    return False, "Transaction non trouvée"
+                    logger.info("Transaction %s non trouvée pour suppression", transaction_id)
+                if transaction['owner_user_id'] != user_id:
+                    logger.info("Utilisateur %s non autorisé à supprimer cette transaction", user_id)
+                    return False, "Non autorisé à supprimer cette transaction"
+
+                type_tx = transaction['type_transaction']
+                compte_type = 'compte_principal' if transaction['compte_principal_id'] else 'sous_compte'
+                compte_id = transaction['compte_principal_id'] or transaction['sous_compte_id']
+                date_transaction = transaction['date_transaction']
+
+                # === CAS SPÉCIAL : TRANSFERT INTERNE (entrant/sortant) ===
+                if type_tx in ['transfert_entrant', 'transfert_sortant']:
+                    reference_transfert = transaction.get('reference_transfert')
+                    if not reference_transfert:
+                        logger.error(f"Transfert corrompu : référence manquante pour la transaction {transaction_id}")
+                        return False, "Transfert corrompu : référence manquante"
+
+                    # Récupérer les deux transactions liées
+                    cursor.execute("""
+                        SELECT id, type_transaction, compte_principal_id, sous_compte_id, date_transaction
+                        FROM transactions
+                        WHERE reference_transfert = %s
+                    """, (reference_transfert,))
+                    transactions_liees = cursor.fetchall()
+
+                    if len(transactions_liees) != 2:
+                        return False, f"Transfert invalide : {len(transactions_liees)} transactions trouvées"
+
+                    # Identifier la transaction source (sortante) pour vérifier la propriété
+                    tx_source = next((tx for tx in transactions_liees if tx['type_transaction'] == 'transfert_sortant'), None)
+                    if not tx_source:
+                        return False, "Transfert mal formé : transaction source manquante"
+
+                    # Vérifier que l'utilisateur est propriétaire du compte source
+                    if tx_source['compte_principal_id']:
+                        cursor.execute("SELECT utilisateur_id FROM comptes_principaux WHERE id = %s",
+                                    (tx_source['compte_principal_id'],))
+                    else:
+                        cursor.execute("""
+                            SELECT cp.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                            WHERE sc.id = %s
+                        """, (tx_source['sous_compte_id'],))
+                    owner_row = cursor.fetchone()
+                    if not owner_row or owner_row['utilisateur_id'] != user_id:
+                        return False, "Non autorisé à annuler ce transfert"
+
+                    # Supprimer les deux transactions
+                    cursor.execute("DELETE FROM transactions WHERE reference_transfert = %s", (reference_transfert,))
+                    IndexRecherche.indexer_with_cursor(cursor, user_id, 'transaction', [tx['id'] for tx in transactions_liees])
+
+                    # Recalculer les soldes pour chaque compte impliqué
+                    for tx in transactions_liees:
+                        tx_compte_type = 'compte_principal' if tx['compte_principal_id'] else 'sous_compte'
+                        tx_compte_id = tx['compte_principal_id'] or tx['sous_compte_id']
+                        tx_date = tx['date_transaction']
+
+                        # On ne recalcule que si l'utilisateur est propriétaire (sécurité)
+                        if not self._verifier_appartenance_compte_with_cursor(cursor, tx_compte_type, tx_compte_id, user_id):
+                            continue
+
+                        success = self._recalculer_soldes_apres_date_with_cursor(
+                            cursor, tx_compte_type, tx_compte_id, tx_date
+                        )
+                        if not success:
+                            raise Exception(f"Échec du recalcul du solde pour le compte {tx_compte_type} ID {tx_compte_id}")
+
+                    return True, "Transfert annulé avec succès"
+
+                # === CAS NORMAL : transaction simple (dépôt, retrait, etc.) ===
+                else:
+                    # Supprimer la transaction unique
+                    cursor.execute("DELETE FROM transactions WHERE id = %s", (transaction_id,))
+                    IndexRecherche.indexer_with_cursor(cursor, user_id, 'transaction', [transaction_id])
+                    logger.info("Demande de suppression de la Transaction %s supprimée avec succès", transaction_id)
+                    cursor.execute("SELECT * FROM transactions WHERE id = %s", (transaction_id,))
+                    logger.info("Vérification post-suppression: %s (devrait être None)", cursor.fetchone())
+                    # Recalculer les soldes à partir de la date de la transaction
+                    success = self._recalculer_soldes_apres_date_with_cursor(
+                        cursor, compte_type, compte_id, date_transaction
+                    )
+                    logger.info("Recalcul des soldes après suppression de la transaction %s du compte %s en date du %s %s", transaction_id, compte_id, date_transaction, 'réussi' if success else 'échoué')
+                    if not success:
+                        raise Exception("Erreur lors du recalcul des soldes")
+
+                    return True, "Transaction supprimée avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression de la transaction {transaction_id}: {e}", exc_info=True)
+            return False, f"Erreur lors de la suppression : {str(e)}"
+
+    def reparer_soldes_compte(self, compte_type: str, compte_id: int, user_id: int) -> Tuple[bool, str]:
+        """
+        Script de réparation : Recalcule TOUTES les transactions d'un compte depuis le solde initial.
+        À utiliser UNIQUEMENT pour corriger les données corrompues.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer le solde initial
+                solde_initial = self._get_solde_initial_with_cursor(cursor, compte_type, compte_id)
+                # Vérifier que l'utilisateur est bien propriétaire du compte
+                if not self._verifier_appartenance_compte_with_cursor(cursor, compte_type, compte_id, user_id):
+                    return False, "Non autorisé"
+                logger.info("🔧 Réparation des soldes pour %s ID %s. Solde initial: %s", compte_type, compte_id, solde_initial)
+                # Récupérer TOUTES les transactions du compte, triées par date
+                if compte_type == 'compte_principal':
+                    condition = "compte_principal_id = %s"
+                else:
+                    condition = "sous_compte_id = %s"
+
+                query = f"""
+                SELECT id, type_transaction, montant, date_transaction
+                FROM transactions
+                WHERE {condition}
+                ORDER BY date_transaction ASC, id ASC
+                """
+                cursor.execute(query, (compte_id,))
+                transactions = cursor.fetchall()
+
+                # Mettre à jour le solde_apres de chaque transaction
+                solde_courant = self._propager_soldes(
+                    cursor, compte_type, transactions, Montant.depuis(solde_initial)).en_decimal()
+                logger.info("  - %s transactions recalculées", len(transactions))
+
+                # Mettre à jour le solde final du compte
+                if not self._mettre_a_jour_solde_with_cursor(cursor, compte_type, compte_id, solde_courant):
+                    logger.error(f"Échec de la mise à jour du solde {solde_courant} du compte {compte_id} de type {compte_type}après réparation")
+                    raise Exception("Échec de la mise à jour du solde du compte")
+
+                logger.info("✅ Soldes du %s ID %s réparés avec succès. Nouveau solde: %s", compte_type, compte_id, solde_courant)
+                return True, "Soldes réparés avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la réparation des soldes: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def _verifier_appartenance_compte(self, compte_type: str, compte_id: int, user_id: int) -> bool:
+        """Vérifie que le compte appartient à l'utilisateur"""
+        logger.debug("Vérification appartenance: %s ID %s pour user %s", compte_type, compte_id, user_id)
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    cursor.execute("SELECT utilisateur_id FROM comptes_principaux WHERE id = %s", (compte_id,))
+                elif compte_type == 'sous_compte':
+                    cursor.execute("""
+                        SELECT cp.utilisateur_id
+                        FROM sous_comptes sc
+                        JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                        WHERE sc.id = %s
+                    """, (compte_id,))
+                else:
+                    logger.error("Type de compte invalide")
+                    return False
+
+                result = cursor.fetchone()
+                appartenance = result and result['utilisateur_id'] == user_id
+                logger.debug("Résultat vérification appartenance: %s", appartenance)
+                return appartenance
+        except Error as e:
+            logger.error(f"Erreur vérification appartenance: {e}")
+            return False
+
+    def get_by_compte_id(self, compte_id: int, user_id: int, limit: int = 100) -> List[Dict]:
+        """
+        Récupère les transactions d'un compte principal avec pagination
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier d'abord que le compte appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return []
+
+                # Récupérer les transactions
+                query = """
+                SELECT
+                    t.id,
+                    t.type_transaction,
+                    t.montant,
+                    t.description,
+                    t.reference,
+                    t.date_transaction,
+                    t.solde_apres,
+                    t.referece_transfert,
+                    sc.nom_sous_compte as sous_compte_source,
+                    sc_dest.nom_sous_compte as sous_compte_dest
+                FROM transactions t
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                LEFT JOIN sous_comptes sc_dest ON t.sous_compte_destination_id = sc_dest.id
+                WHERE t.compte_principal_id = %s
+                ORDER BY t.date_transaction DESC
+
+                """
+
+                cursor.execute(query, (compte_id, limit))
+                transactions = cursor.fetchall()
+
+                # Convertir les montants en Decimal pour une manipulation plus précise
+                for transaction in transactions:
+                    transaction['montant'] = Decimal(str(transaction['montant']))
+                    transaction['solde_apres'] = Decimal(str(transaction['solde_apres']))
+
+                return transactions
+
+        except Exception as e:
+            logger.error(f"Erreur récupération transactions par compte: {e}")
+            return []
+
+    def get_all_user_transactions(self,
+                                user_id: int,
+                                date_from: str = None,
+                                date_to: str = None,
+                                compte_source_id: int = None,
+                                compte_dest_id: int = None,
+                                sous_compte_source_id: int = None,
+                                sous_compte_dest_id: int = None,
+                                reference: str = None,
+                                q: str = None,
+                                page: int = 1,
+                                per_page: int = 20
+                            ) -> Tuple[List[Dict], int]:
+        """
+        Récupère toutes les transactions d'un utilisateur avec filtres avancés.
+        Retourne (liste_de_transactions, total).
+        La recherche texte `q` passe par l'index de recherche (préfixes de mots de la
+        description, de la référence ou du montant) ; LIKE seulement si l'index est indisponible.
+        """
+        termes_recherche = list(extraire_termes(q)) if q and q.strip() else []
+        if termes_recherche and not IndexRecherche(self.db).assurer_index(user_id):
+            termes_recherche = []
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                # Construire la requête avec jointures pour récupérer les noms
+                base_query = """
+                SELECT
+                    t.id,
+                    t.type_transaction,
+                    t.montant,
+                    t.description,
+                    t.reference,
+                    t.date_transaction,
+                    t.solde_apres,
+                    t.compte_principal_id,
+                    t.sous_compte_id,
+                    t.compte_destination_id,
+                    t.sous_compte_destination_id,
+                    cp.nom_compte as nom_compte_source,
+                    cp_dest.nom_compte as nom_compte_dest,
+                    sc.nom_sous_compte as nom_sous_compte_source,
+                    sc_dest.nom_sous_compte as nom_sous_compte_dest
+                FROM transactions t
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                LEFT JOIN sous_comptes sc_dest ON t.sous_compte_destination_id = sc_dest.id
+                WHERE (
+                    (cp.utilisateur_id = %(user_id)s) OR
+                    (sc.compte_principal_id IN (
+                        SELECT id FROM comptes_principaux WHERE utilisateur_id = %(user_id)s
+                    )) OR
+                    (cp_dest.utilisateur_id = %(user_id)s) OR
+                    (sc_dest.compte_principal_id IN (
+                        SELECT id FROM comptes_principaux WHERE utilisateur_id = %(user_id)s
+                    ))
+                )
+                """
+
+                # Préparer les paramètres
+                params = {'user_id': user_id}
+
+                # === Filtres ===
+                if date_from:
+                    base_query += " AND DATE(t.date_transaction) >= %(date_from)s"
+                    params['date_from'] = date_from
+
+                if date_to:
+                    base_query += " AND DATE(t.date_transaction) <= %(date_to)s"
+                    params['date_to'] = date_to
+
+                if compte_source_id:
+                    base_query += " AND t.compte_principal_id = %(compte_source_id)s"
+                    params['compte_source_id'] = compte_source_id
+
+                if compte_dest_id:
+                    base_query += " AND t.compte_destination_id = %(compte_dest_id)s"
+                    params['compte_dest_id'] = compte_dest_id
+
+                if sous_compte_source_id:
+                    base_query += " AND t.sous_compte_id = %(sous_compte_source_id)s"
+                    params['sous_compte_source_id'] = sous_compte_source_id
+
+                if sous_compte_dest_id:
+                    base_query += " AND t.sous_compte_destination_id = %(sous_compte_dest_id)s"
+                    params['sous_compte_dest_id'] = sous_compte_dest_id
+
+                if reference:
+                    base_query += " AND t.reference = %(reference)s"
+                    params['reference'] = reference
+
+                if termes_recherche:
+                    # Une sous-requête par terme : parcours d'intervalle sur (utilisateur_id, terme).
+                    # Les noms de comptes ne sont pas indexés : toujours cherchés par sous-chaîne.
+                    sous_requetes = []
+                    for n, terme in enumerate(termes_recherche):
+                        sous_requetes.append(f"""t.id IN (
+                            SELECT source_id FROM index_recherche
+                            WHERE utilisateur_id = %(user_id)s AND source = 'transaction'
+                            AND terme LIKE %(terme_{n})s
+                        )""")
+                        params[f'terme_{n}'] = terme + '%'
+                    base_query += f""" AND (
+                        ({' AND '.join(sous_requetes)}) OR
+                        COALESCE(cp.nom_compte, '') LIKE %(q)s OR
+                        COALESCE(cp_dest.nom_compte, '') LIKE %(q)s OR
+                        COALESCE(sc.nom_sous_compte, '') LIKE %(q)s OR
+                        COALESCE(sc_dest.nom_sous_compte, '') LIKE %(q)s
+                    )"""
+                    params['q'] = f"%{q.strip()}%"
+                elif q and q.strip():
+                    q_clean = f"%{q.strip()}%"
+                    base_query += """ AND (
+                        COALESCE(t.description, '') LIKE %(q)s OR
+                        COALESCE(t.reference, '') LIKE %(q)s OR
+                        COALESCE(cp.nom_compte, '') LIKE %(q)s OR
+                        COALESCE(cp_dest.nom_compte, '') LIKE %(q)s OR
+                        COALESCE(sc.nom_sous_compte, '') LIKE %(q)s OR
+                        COALESCE(sc_dest.nom_sous_compte, '') LIKE %(q)s
+                    )"""
+                    params['q'] = q_clean
+
+                # === Compter le total (après filtres) ===
+                count_query = "SELECT COUNT(*) as total FROM (" + base_query + ") AS filtered"
+                cursor.execute(count_query, params)
+                total = cursor.fetchone()[0]
+
+                # === Ajouter l'ordre et la pagination ===
+                base_query += " ORDER BY t.date_transaction DESC, t.id DESC"
+                if page and per_page:
+                    offset = (page - 1) * per_page
+                    base_query += " LIMIT %(limit)s OFFSET %(offset)s"
+                    params['limit'] = per_page
+                    params['offset'] = offset
+
+                # Lignes compactes, montants convertis en Decimal colonne par colonne
+                transactions = self.db.lire_lignes(
+                    base_query, params, convertisseurs={'montant': en_decimal, 'solde_apres': en_decimal},
+                    nom='LigneTransaction', cursor=cursor)
+
+                return transactions, total
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_all_user_transactions: {e}", exc_info=True)
+            return [], 0
+
+   # ===== DÉPÔTS ET RETRAITS =====
+
+    def create_depot(self, compte_id: int, user_id: int, montant: Decimal,
+                    description: str = "", compte_type: str = 'compte_principal',
+                    date_transaction: datetime = None) -> Tuple[bool, str]:
+        """Crée un dépôt sur un compte"""
+
+        if montant <= 0:
+            return False, "Le montant doit être positif"
+
+        if not self._verifier_appartenance_compte(compte_type, compte_id, user_id):
+            return False, "Compte non trouvé ou non autorisé"
+
+        if date_transaction is None:
+            date_transaction = datetime.now()
+
+        try:
+            with self.db.get_cursor(dictionary=True, commit=True) as cursor:
+                compte_destination_id = None
+                sous_compte_destinatin_id = None
+
+                if compte_type == 'compte_principal':
+                    compte_destination_id = compte_id
+                elif compte_type == 'sous_compte':
+                    sous_compte_destination_id = compte_id
+                success, message, _ = self._inserer_transaction_with_cursor(
+                    cursor, compte_type, compte_id, 'depot', montant,
+                    description, user_id, date_transaction, False,
+                    compte_destination_id=compte_destination_id,
+                    sous_compte_destination_id=sous_compte_destinatin_id
+                )
+                return success, message
+        except Exception as e:
+            logger.error(f"Erreur création dépôt: {e}")
+            return False, f"Erreur lors de la création du dépôt: {str(e)}"
+
+    def create_retrait(self, compte_id: int, user_id: int, montant: Decimal,
+                    description: str = "", compte_type: str = 'compte_principal',
+                    date_transaction: datetime = None) -> Tuple[bool, str]:
+        """Crée un retrait sur un compte"""
+        if montant <= 0:
+            return False, "Le montant doit être positif"
+        if not self._verifier_appartenance_compte(compte_type, compte_id, user_id):
+            return False, "Compte non trouvé ou non autorisé"
+        if date_transaction is None:
+            date_transaction = datetime.now()
+        solde_suffisant, _ = self._valider_solde_suffisant(compte_type, compte_id, montant)
+        if not solde_suffisant:
+            return False, "Solde insuffisant"
+        try:
+            with self.db.get_cursor(dictionary=True, commit=True) as cursor:
+                success, message, _ = self._inserer_transaction_with_cursor(cursor,
+                                                                            compte_type, compte_id, 'retrait', montant, description, user_id, date_transaction, False)
+            return success, message
+        except Exception as e:
+            logger.error(f"Erreur création retrait: {e}")
+            return False, f"Erreur lors de la création du retrait: {str(e)}"
+
+    def _valider_solde_suffisant_with_cursor(self, cursor, compte_type: str, compte_id: int, montant: Decimal) -> Tuple[bool, Decimal]:
+        """
+        Vérifie si le solde d'un compte est suffisant pour une opération.
+        Cette fonction utilise un curseur de base de données déjà ouvert.
+
+        Args:
+            cursor: Le curseur de la base de données.
+            compte_type (str): 'compte_principal' ou 'sous_compte'.
+            compte_id (int): L'identifiant du compte.
+            montant (Decimal): Le montant à vérifier.
+
+        Returns:
+            Tuple[bool, Decimal]: Un tuple contenant un booléen (True si le solde est suffisant)
+                                et le solde actuel du compte.
+        """
+        try:
+            if compte_type == 'compte_principal':
+                cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s", (compte_id,))
+            elif compte_type == 'sous_compte':
+                cursor.execute("SELECT solde FROM sous_comptes WHERE id = %s", (compte_id,))
+            else:
+                # Type de compte inconnu
+                return False, Decimal('0')
+
+            result = cursor.fetchone()
+            if not result:
+                # Compte non trouvé
+                return False, Decimal('0')
+
+            # Assurer la précision décimale en convertissant le résultat de la requête
+            solde_actuel = Decimal(str(result['solde']))
+            return solde_actuel >= montant, solde_actuel
+        except Exception as e:
+            logger.error(f"Erreur lors de la validation du solde: {e}")
+            return False, Decimal('0')
+
+# ===== TRANSFERTS INTERNES =====
+
+    def _get_solde_compte(self, compte_type: str, compte_id: int) -> Decimal:
+        """
+        Récupère le solde actuel d'un compte.
+        Cette fonction ouvre et ferme sa propre connexion.
+
+        Args:
+            compte_type (str): 'compte_principal' ou 'sous_compte'.
+            compte_id (int): L'identifiant du compte.
+
+        Returns:
+            Decimal: Le solde du compte, ou 0 si une erreur survient.
+        """
+        logger.error(f"Récupération solde pour {compte_type} ID {compte_id}")
+
+        if compte_type == 'compte_principal':
+            query = "SELECT solde FROM comptes_principaux WHERE id = %s"
+        else: # Supposant que le seul autre type est 'sous_compte'
+            query = "SELECT solde FROM sous_comptes WHERE id = %s"
+
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(query, (compte_id,))
+                result = cursor.fetchone()
+                solde = Decimal(result['solde']) if result  and 'solde' in result else Decimal('0')
+                logger.error(f"Solde trouvé: {solde}")
+                return solde
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du solde: {e}")
+            return Decimal('0')
+
+    def _get_transaction_effect(self, transaction_type: str, compte_type: str) -> str:
+        """
+        Détermine si une transaction est un crédit ou un débit pour un type de compte donné.
+        Retourne 'credit' ou 'debit'.
+        """
+        credit_types = ['depot', 'transfert_entrant', 'recredit_annulation']
+        debit_types = ['retrait', 'transfert_sortant', 'transfert_externe']
+
+        # Types spéciaux qui dépendent du type de compte
+        if transaction_type == 'transfert_compte_vers_sous':
+            return 'debit' if compte_type == 'compte_principal' else 'credit'
+        elif transaction_type == 'transfert_sous_vers_compte':
+            return 'debit' if compte_type == 'sous_compte' else 'credit'
+
+        # Types normaux
+        if transaction_type in credit_types:
+            return 'credit'
+        elif transaction_type in debit_types:
+            return 'debit'
+
+        return 'unknown'
+
+    def _verifier_appartenance_compte_with_cursor(self, cursor, compte_type: str, compte_id: int, user_id: int) -> bool:
+        """
+        Vérifie si un compte appartient à un utilisateur donné.
+        Utilise un curseur de base de données déjà ouvert.
+
+        Args:
+            cursor: Le curseur de la base de données.
+            compte_type (str): 'compte_principal' ou 'sous_compte'.
+            compte_id (int): L'identifiant du compte.
+            user_id (int): L'identifiant de l'utilisateur.
+
+        Returns:
+            bool: True si le compte appartient à l'utilisateur, False sinon.
+        """
+        try:
+            if compte_type == 'compte_principal':
+                cursor.execute(
+                    "SELECT id FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_id, user_id)
+                )
+                result = cursor.fetchone()
+                return result is not None
+            elif compte_type == 'sous_compte':
+            # Jointure pour vérifier la propriété du sous-compte via le compte principal
+                cursor.execute(
+                    """SELECT sc.id
+                    FROM sous_comptes sc
+                    JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                    WHERE sc.id = %s AND cp.utilisateur_id = %s""",
+                    (compte_id, user_id)
+                )
+                result = cursor.fetchone()
+                return result is not None
+            else:
+                return False
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification de l'appartenance du compte: {e}")
+            return False
+
+    def _get_solde_compte_with_cursor(self, cursor, compte_type: str, compte_id: int) -> Decimal:
+        """
+        Récupère le solde d'un compte en utilisant un curseur existant.
+
+        Args:
+            cursor: Le curseur de la base de données.
+            compte_type (str): 'compte_principal' ou 'sous_compte'.
+            compte_id (int): L'identifiant du compte.
+
+        Returns:
+            Decimal: Le solde du compte, ou 0 si une erreur ou un compte non trouvé.
+        """
+        try:
+            if compte_type == 'compte_principal':
+                cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s", (compte_id,))
+                result = cursor.fetchone()
+                return Decimal(str(result['solde'])) if result and 'solde' in result else Decimal('0')
+            elif compte_type == 'sous_compte':
+                cursor.execute("SELECT solde FROM sous_comptes WHERE id = %s", (compte_id,))
+                result = cursor.fetchone()
+                return Decimal(str(result['solde'])) if result and 'solde' in result else Decimal('0')
+            else:
+                return Decimal('0')
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du solde : {e}", exc_info=True)
+            return Decimal('0')
+
+    def valider_transfert_sous_compte(sous_compte_id, compte_principal_id, sous_comptes):
+        """
+        Valide qu'un sous-compte appartient bien à un compte principal.
+
+        Args:
+            sous_compte_id (int): L'identifiant du sous-compte.
+            compte_principal_id (int): L'identifiant du compte principal.
+            sous_comptes (list): Une liste de sous-comptes, typiquement des dictionnaires.
+
+        Returns:
+            bool: True si le sous-compte appartient au compte principal, False sinon.
+        """
+        sous_compte = next((sc for sc in sous_comptes if sc['id'] == sous_compte_id), None)
+        return sous_compte is not None and sous_compte['compte_principal_id'] == compte_principal_id
+
+    def _inserer_transaction_with_cursor(self, cursor, compte_type: str, compte_id: int, type_transaction: str,
+                    montant: Decimal, description: str, user_id: int,
+                    date_transaction: datetime, validate_balance: bool = True, reference_transfert: str = None,
+                    compte_destination_id: int = None, sous_compte_destination_id: int = None) -> Tuple[bool, str, Optional[int]]:
+        """
+        Insère une transaction dans la base de données et met à jour les soldes.
+        """
+        try:
+            # Trouver la transaction précédente pour calculer le solde_avant
+            previous = self._get_previous_transaction_with_cursor(cursor, compte_type, compte_id, date_transaction)
+
+            # Calculer le solde_avant
+            if previous:
+                solde_avant = Montant.depuis(previous[2])
+            else:
+                # Si aucune transaction précédente, utiliser le solde initial du compte
+                solde_avant = Montant.depuis(self._get_solde_initial_with_cursor(cursor, compte_type, compte_id))
+            montant = Montant.depuis(montant)
+
+            # Pour les transactions de débit, vérifier le solde suffisant si demandé
+            if validate_balance and type_transaction in ['retrait', 'transfert_sortant', 'transfert_externe', 'transfert_compte_vers_sous']:
+                if solde_avant < montant:
+                    return False, "Solde insuffisant", None
+
+            # Calculer le nouveau solde
+            if type_transaction in ['depot', 'transfert_entrant', 'recredit_annulation']:
+                solde_apres = solde_avant + montant
+            elif type_transaction in ['retrait', 'transfert_sortant', 'transfert_externe']:
+                solde_apres = solde_avant - montant
+            elif type_transaction == 'transfert_compte_vers_sous':
+                # Ce type est utilisé pour le compte principal (débit) ET le sous-compte (crédit)
+                if compte_type == 'compte_principal':
+                    solde_apres = solde_avant - montant   # Débit sur le compte principal
+                else:  # compte_type == 'sous_compte'
+                    solde_apres = solde_avant + montant   # Crédit sur le sous-compte
+            elif type_transaction == 'transfert_sous_vers_compte':
+                # Ce type est utilisé pour le sous-compte (débit) ET le compte principal (crédit)
+                if compte_type == 'sous_compte':
+                    solde_apres = solde_avant - montant   # Débit sur le sous-compte
+                else:  # compte_type == 'compte_principal'
+                    solde_apres = solde_avant + montant   # Crédit sur le compte principal
+            else:
+                return False, f"Type de transaction non reconnu: {type_transaction}", None
+
+            if reference_transfert is None:
+                reference_transfert = f"TRF_{int(time.time())}_{user_id}_{secrets.token_hex(6)}"
+
+            # Déterminer les IDs source et destination
+            compte_principal_id = None
+            sous_compte_id = None
+            compte_source_id = None
+            sous_compte_source_id = None
+
+            # Pour les colonnes source
+            if compte_type == 'compte_principal':
+                compte_principal_id = compte_id
+                compte_source_id = compte_id
+            else:  # sous_compte
+                sous_compte_id = compte_id
+                sous_compte_source_id = compte_id
+
+            # Pour les colonnes destination - si non fournies, utiliser les mêmes que la source pour les dépôts
+            if compte_destination_id is None and sous_compte_destination_id is None:
+                if type_transaction == 'depot':
+                    # Pour un dépôt, la destination est le même compte
+                    if compte_type == 'compte_principal':
+                        compte_destination_id = compte_id
+                    else:
+                        sous_compte_destination_id = compte_id
+
+            # Empreinte d'import : un relevé réimporté retrouvera cette transaction
+            empreinte = empreinte_transaction(compte_type, compte_id, date_transaction, montant,
+                                              est_credit(type_transaction, compte_type), description)
+
+            # Insérer la transaction avec toutes les colonnes
+            query = """
+            INSERT INTO transactions
+            (compte_principal_id, sous_compte_id, type_transaction, montant, description,
+            utilisateur_id, date_transaction, solde_apres, reference_transfert,
+            compte_destination_id, sous_compte_destination_id,
+            compte_source_id, sous_compte_source_id, empreinte_import)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+
+            cursor.execute(query, (
+                compte_principal_id, sous_compte_id, type_transaction, montant.en_decimal(),
+                description, user_id, date_transaction, solde_apres.en_decimal(), reference_transfert,
+                compte_destination_id, sous_compte_destination_id,
+                compte_source_id, sous_compte_source_id, empreinte
+            ))
+
+            transaction_id = cursor.lastrowid
+            IndexRecherche.indexer_textes_with_cursor(cursor, user_id, 'transaction', transaction_id,
+                                                      description, str(montant))
+
+            # Mettre à jour les transactions suivantes
+            dernier_solde = self._update_subsequent_transactions_with_cursor(
+                cursor, compte_type, compte_id, date_transaction, transaction_id, solde_apres
+            )
+
+            # Mettre à jour le solde final du compte principal/sous-compte
+            solde_final = dernier_solde if dernier_solde is not None else solde_apres.en_decimal()
+            if not self._mettre_a_jour_solde_with_cursor(cursor, compte_type, compte_id, solde_final):
+                return False, "Erreur lors de la mise à jour du solde", None
+
+            return True, "Transaction insérée avec succès", transaction_id
+
+        except Exception as e:
+            logger.error(f"Erreur lors de l'insertion de la transaction: {e}", exc_info=True)
+            return False, f"Erreur lors de l'insertion: {str(e)}", None
+
+    def _get_previous_transaction_with_cursor(self, cursor, compte_type: str, compte_id: int, date_transaction: datetime) -> Optional[tuple]:
+        """
+        Trouve la transaction précédente la plus proche pour un compte donné.
+        Utilise un curseur de base de données déjà ouvert.
+        """
+        try:
+            if compte_type == 'compte_principal':
+                condition = "compte_principal_id = %s"
+            else:
+                condition = "sous_compte_id = %s"
+
+            query_simple = f"""
+            SELECT id, date_transaction, solde_apres
+            FROM transactions
+            WHERE {condition} AND date_transaction < %s
+            ORDER BY date_transaction DESC, id DESC
+            LIMIT 1
+            """
+
+            cursor.execute(query_simple, (compte_id, date_transaction))
+            result = cursor.fetchone()
+            if result:
+                return (result['id'], result['date_transaction'], result['solde_apres'])
+            return None
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche de la transaction précédente: {e}")
+            return None
+
+    def _get_solde_initial_with_cursor(self, cursor, compte_type: str, compte_id: int) -> Decimal:
+        """
+        Récupère le solde initial d'un compte en utilisant un curseur existant.
+        """
+        try:
+            if compte_type == 'compte_principal':
+                cursor.execute("SELECT solde_initial FROM comptes_principaux WHERE id = %s", (compte_id,))
+            else:
+                cursor.execute("SELECT solde_initial FROM sous_comptes WHERE id = %s", (compte_id,))
+
+            result = cursor.fetchone()
+            return Decimal(str(result['solde_initial'])) if result and 'solde_initial' in result else Decimal('0')
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération du solde initial: {e}")
+            return Decimal('0')
+
+    @staticmethod
+    def _incrementer_version_compte(cursor, compte_type: str, compte_id: int) -> None:
+        """Toute écriture sur un compte passe par la mise à jour de son solde : on y versionne ses données"""
+        if compte_type == 'compte_principal':
+            VersionDonnees.incrementer_compte_with_cursor(cursor, compte_id)
+        else:
+            VersionDonnees.incrementer_sous_compte_with_cursor(cursor, compte_id)
+
+    def _mettre_a_jour_solde_with_cursor(self, cursor, compte_type: str, compte_id: int, nouveau_solde: Decimal) -> bool:
+        """
+        Met à jour le solde d'un compte en utilisant un curseur existant.
+        """
+        try:
+            logger.info("➡️ Mise à jour solde: compte_type=%s, compte_id=%s, solde=%s (type=%s)", compte_type, compte_id, nouveau_solde, type(nouveau_solde))
+
+            if compte_type == 'compte_principal':
+                query = "UPDATE comptes_principaux SET solde = %s WHERE id = %s"
+            else:
+                query = "UPDATE sous_comptes SET solde = %s WHERE id = %s"
+
+            cursor.execute(query, (Montant.depuis(nouveau_solde).en_decimal(), compte_id))
+            if cursor.rowcount > 0:
+                logger.info("✅ Nombre de lignes mises à jour : %s", cursor.rowcount)
+            self._incrementer_version_compte(cursor, compte_type, compte_id)
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour du solde: {e}")
+            return False
+
+    def _update_subsequent_transactions_with_cursor(self, cursor, compte_type: str, compte_id: int,
+                                                date_transaction: datetime, transaction_id: int,
+                                                solde_apres_insere: Decimal) -> Optional[Decimal]:
+        """
+        Met à jour les soldes des transactions suivantes après une insertion.
+        Utilise un curseur de base de données déjà ouvert.
+        """
+        if compte_type == 'compte_principal':
+            condition = "compte_principal_id = %s"
+        else:
+            condition = "sous_compte_id = %s"
+
+        query = f"""
+        SELECT id, type_transaction, montant, date_transaction
+        FROM transactions
+        WHERE {condition} AND (
+            date_transaction > %s OR
+            (date_transaction = %s AND id > %s)
+        )
+        ORDER BY date_transaction ASC, id ASC
+        """
+
+        cursor.execute(query, (compte_id, date_transaction, date_transaction, transaction_id))
+        subsequent_transactions = cursor.fetchall()
+        if not subsequent_transactions:
+            return None
+
+        return self._propager_soldes(cursor, compte_type, subsequent_transactions,
+                                     Montant.depuis(solde_apres_insere)).en_decimal()
+
+    def create_transfert_interne(self, source_type: str, source_id: int,
+                                dest_type: str, dest_id: int, user_id: int,
+                                montant: Decimal, description: str = "",
+                                date_transaction: datetime = None) -> Tuple[bool, str]:
+        """
+        Exécute un transfert interne entre deux comptes gérés.
+
+        Args:
+            source_type (str): Le type du compte source ('compte_principal' ou 'sous_compte').
+            source_id (int): L'ID du compte source.
+            dest_type (str): Le type du compte de destination ('compte_principal' ou 'sous_compte').
+            dest_id (int): L'ID du compte de destination.
+            user_id (int): L'ID de l'utilisateur effectuant le transfert.
+            montant (Decimal): Le montant à transférer.
+            description (str): Une description optionnelle pour la transaction.
+            date_transaction (datetime): Date et heure de la transaction (maintenant par défaut).
+
+        Returns:
+            Tuple[bool, str]: Un tuple indiquant le succès (True/False) et un message.
+        """
+        logger.info(f"=== DÉBUT TRANSFERT INTERNE ===")
+        logger.info("Source: %s ID %s", source_type, source_id)
+        logger.info("Destination: %s ID %s", dest_type, dest_id)
+        logger.info("Utilisateur: %s, Montant: %s", user_id, montant)
+
+        # Validations initiales
+        if montant <= 0:
+            logger.warning("❌ Échec: Le montant doit être positif")
+            return False, "Le montant doit être positif"
+
+        if source_type == dest_type and source_id == dest_id:
+            logger.warning("❌ Échec: Les comptes source et destination doivent être différents")
+            return False, "Les comptes source et destination doivent être différents"
+
+        if date_transaction is None:
+            date_transaction = datetime.now()
+
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier l'appartenance des comptes
+                if not self._verifier_appartenance_compte_with_cursor(cursor, source_type, source_id, user_id):
+                    return False, "Compte source non trouvé ou non autorisé"
+
+                #if not self._verifier_appartenance_compte_with_cursor(cursor, dest_type, dest_id, user_id):
+                #    return False, "Compte destination non trouvé ou non autorisé"
+
+                # Récupérer les soldes
+                solde_source = self._get_solde_compte_with_cursor(cursor, source_type, source_id)
+                solde_dest = self._get_solde_compte_with_cursor(cursor, dest_type, dest_id)
+
+                # Vérifier le solde source
+                if solde_source < montant:
+                    return False, "Solde insuffisant sur le compte source"
+
+                # Générer une référence unique
+                timestamp = int(time.time())
+                reference = f"TRF_{timestamp}_{source_type}_{source_id}_{dest_type}_{dest_id}"
+
+                # Créer la description complète
+                desc_complete = f"{description} (Réf: {reference})"
+
+                # 1. Transaction de DÉBIT sur le compte source
+                success, message, debit_tx_id = self._inserer_transaction_with_cursor(
+                    cursor, source_type, source_id, 'transfert_sortant', montant,
+                    desc_complete, user_id, date_transaction, True
+                )
+
+                if not success:
+                    return False, f"Erreur transaction débit: {message}"
+
+                # 2. Transaction de CRÉDIT sur le compte destination
+                success, message, credit_tx_id = self._inserer_transaction_with_cursor(
+                    cursor, dest_type, dest_id, 'transfert_entrant', montant,
+                    desc_complete, user_id, date_transaction,  False
+                )
+
+                if not success:
+                    return False, f"Erreur transaction crédit: {message}"
+
+                # Déterminer les IDs de source et de destination pour les liens
+                source_compte_id = source_id if source_type == 'compte_principal' else None
+                source_sous_compte_id = source_id if source_type == 'sous_compte' else None
+
+                dest_compte_id = dest_id if dest_type == 'compte_principal' else None
+                dest_sous_compte_id = dest_id if dest_type == 'sous_compte' else None
+
+                # Mettre à jour les deux transactions avec les liens bidirectionnels
+                update_query = """
+                UPDATE transactions
+                SET
+                    compte_source_id = %s,
+                    sous_compte_source_id = %s,
+                    compte_destination_id = %s,
+                    sous_compte_destination_id = %s
+                WHERE id IN (%s, %s)
+                """
+                cursor.execute(update_query, (
+                    source_compte_id, source_sous_compte_id,
+                    dest_compte_id, dest_sous_compte_id,
+                    debit_tx_id, credit_tx_id
+                ))
+
+                # Optionnel : loguer les IDs des transactions créées
+                logger.info("✅ Transfert interne réussi : débit=%s, crédit=%s", debit_tx_id, credit_tx_id)
+
+                # Le commit est automatique à la sortie du bloc 'with'
+                return True, "Transfert interne effectué avec succès"
+
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du transfert interne: {e}", exc_info=True)
+            return False, f"Erreur lors du transfert: {str(e)}"
+
+    def transfert_compte_vers_sous_compte(self, compte_id, sous_compte_id, montant, user_id, description="", date_transaction = datetime.now(), reference_transfert=None):
+        """
+        Transfert d'un compte principal vers un sous-compte.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le sous-compte appartient au compte
+                cursor.execute(
+                    "SELECT id FROM sous_comptes WHERE id = %s AND compte_principal_id = %s",
+                    (sous_compte_id, compte_id)
+                )
+                if not cursor.fetchone():
+                    return False, "Le sous-compte n'appartient pas à ce compte"
+
+                # Vérifier le solde du compte
+                cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s", (compte_id,))
+                result = cursor.fetchone()
+                if not result:
+                    return False, "Compte non trouvé"
+                solde_compte = Decimal(str(result['solde']))
+                if solde_compte < montant:
+                    return False, "Solde insuffisant sur le compte"
+
+                # Générer référence et description
+                timestamp = int(time.time())
+                reference = f"TRF_CP_SC_{timestamp}"
+                desc_complete = f"{description} (Réf: {reference})"
+                reference_transfert = f"TRF_{int(time.time())}_{user_id}_{secrets.token_hex(6)}"
+                if date_transaction is None:
+                    date_transaction = datetime.now()
+
+                # ⚠️ UTILISER _inserer_transaction_with_cursor pour DÉBIT sur le compte principal
+                success, message, debit_transaction_id = self._inserer_transaction_with_cursor(
+                    cursor,
+                    compte_type='compte_principal',
+                    compte_id=compte_id,
+                    type_transaction='transfert_compte_vers_sous',
+                    montant=montant,
+                    description=desc_complete,
+                    user_id=user_id,
+                    date_transaction=date_transaction,
+                    validate_balance=True,  # Vérifie le solde
+                    reference_transfert=reference_transfert
+                )
+                if not success:
+                    return False, f"Erreur débit compte principal: {message}"
+
+                # ⚠️ UTILISER _inserer_transaction_with_cursor pour CRÉDIT sur le sous-compte
+                success, message, credit_transaction_id = self._inserer_transaction_with_cursor(
+                    cursor,
+                    compte_type='sous_compte',
+                    compte_id=sous_compte_id,
+                    type_transaction='transfert_compte_vers_sous',  # Même type : c’est une seule opération logique
+                    montant=montant,
+                    description=desc_complete,
+                    user_id=user_id,
+                    date_transaction=date_transaction,
+                    validate_balance=False,  # Pas besoin de vérifier ici — on vient de débiter
+                    reference_transfert=reference_transfert
+                )
+                if not success:
+                    return False, f"Erreur crédit sous-compte: {message}"
+
+                # Mettre à jour les relations entre les deux transactions
+                update_query = """
+                UPDATE transactions SET
+                    compte_source_id = %s,
+                    sous_compte_destination_id = %s
+                WHERE id IN (%s, %s)
+                """
+                cursor.execute(update_query, (
+                    compte_id, sous_compte_id, debit_transaction_id, credit_transaction_id
+                ))
+
+                return True, "Transfert effectué avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur transfert compte → sous-compte: {e}")
+            return False, f"Erreur lors du transfert: {str(e)}"
+
+    def transfert_sous_compte_vers_compte(self, sous_compte_id, compte_id, montant, user_id, description="", date_transaction = datetime.now()):
+        """
+        Transfert d'un sous-compte vers un compte principal.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le sous-compte appartient au compte
+                cursor.execute(
+                    "SELECT id FROM sous_comptes WHERE id = %s AND compte_principal_id = %s",
+                    (sous_compte_id, compte_id)
+                )
+                if not cursor.fetchone():
+                    return False, "Le sous-compte n'appartient pas à ce compte"
+
+                # Vérifier le solde du sous-compte
+                cursor.execute("SELECT solde FROM sous_comptes WHERE id = %s", (sous_compte_id,))
+                result = cursor.fetchone()
+                if not result:
+                    return False, "Sous-compte non trouvé"
+                solde_sous_compte = Decimal(str(result['solde']))
+                if solde_sous_compte < montant:
+                    return False, "Solde insuffisant sur le sous-compte"
+
+                # Générer référence et description
+                timestamp = int(time.time())
+                reference = f"TRF_SC_CP_{timestamp}"
+                reference_transfert = f"TRF_{int(time.time())}_{user_id}_{secrets.token_hex(6)}"
+                desc_complete = f"{description} (Réf: {reference})"
+                if date_transaction is None:
+                    date_transaction = datetime.now()
+
+                # ⚠️ UTILISER _inserer_transaction_with_cursor pour DÉBIT sur le sous-compte
+                success, message, debit_transaction_id = self._inserer_transaction_with_cursor(
+                    cursor,
+                    compte_type='sous_compte',
+                    compte_id=sous_compte_id,
+                    type_transaction='transfert_sous_vers_compte',
+                    montant=montant,
+                    description=desc_complete,
+                    user_id=user_id,
+                    date_transaction=date_transaction,
+                    validate_balance=True,
+                    reference_transfert=reference_transfert
+                )
+                if not success:
+                    return False, f"Erreur débit sous-compte: {message}"
+
+                # ⚠️ UTILISER _inserer_transaction_with_cursor pour CRÉDIT sur le compte principal
+                success, message, credit_transaction_id = self._inserer_transaction_with_cursor(
+                    cursor,
+                    compte_type='compte_principal',
+                    compte_id=compte_id,
+                    type_transaction='transfert_sous_vers_compte',  # Même type
+                    montant=montant,
+                    description=desc_complete,
+                    user_id=user_id,
+                    date_transaction=date_transaction,
+                    validate_balance=False,
+                    reference_transfert=reference_transfert
+                )
+                if not success:
+                    return False, f"Erreur crédit compte principal: {message}"
+
+                # Mettre à jour les relations
+                update_query = """
+                UPDATE transactions SET
+                    sous_compte_source_id = %s,
+                    compte_destination_id = %s
+                WHERE id IN (%s, %s)
+                """
+                cursor.execute(update_query, (
+                    sous_compte_id, compte_id, debit_transaction_id, credit_transaction_id
+                ))
+
+                return True, "Transfert effectué avec succès"
+
+        except Exception as e:
+            logger.error(f"Erreur transfert sous-compte → compte: {e}")
+            return False, f"Erreur lors du transfert: {str(e)}"
+
+    # ===== TRANSFERTS EXTERNES =====
+
+    def create_transfert_externe(self, source_type: str, source_id: int, user_id: int,
+                                iban_dest: str, bic_dest: str, nom_dest: str,
+                                montant: Decimal, devise: str = 'EUR',
+                                description: str = "", date_transaction: datetime = None) -> Tuple[bool, str]:
+        """
+        Crée un transfert vers un compte externe (IBAN).
+        Utilise une seule transaction pour débiter le compte et créer l'ordre de transfert.
+        """
+        # Validations
+        if montant <= 0:
+            return False, "Le montant doit être positif"
+
+        if not iban_dest or len(iban_dest.strip()) < 15:
+            return False, "IBAN destination invalide"
+
+        # Utiliser la date actuelle si non spécifiée
+        if date_transaction is None:
+            date_transaction = datetime.now()
+
+        try:
+            # L'ensemble de l'opération est géré dans une seule transaction 'with'
+            with self.db.get_cursor() as cursor:
+                # Vérifier l'appartenance du compte
+                if not self._verifier_appartenance_compte_with_cursor(cursor, source_type, source_id, user_id):
+                    return False, "Compte source non trouvé ou non autorisé"
+
+                # Insérer la transaction de débit
+                success, message, transaction_id = self._inserer_transaction_with_cursor(
+                    cursor, source_type, source_id, 'transfert_externe', montant,
+                    description, user_id, date_transaction, True
+                )
+
+                if not success:
+                    return False, message
+
+                # Créer l'ordre de transfert externe
+                query_ordre = """
+                INSERT INTO transferts_externes (
+                    transaction_id, iban_dest, bic_dest, nom_dest,
+                    montant, devise, statut, date_demande
+                ) VALUES (%s, %s, %s, %s, %s, %s, 'pending', NOW())
+                """
+                cursor.execute(query_ordre, (
+                    transaction_id, iban_dest.strip().upper(),
+                    bic_dest.strip().upper() if bic_dest else '',
+                    nom_dest.strip(), Montant.depuis(montant).en_decimal(), devise
+                ))
+
+                return True, "Ordre de transfert externe créé avec succès"
+
+        except Exception as e:
+            # Le rollback est géré automatiquement par le bloc 'with'
+            logger.error(f"Erreur transfert externe: {e}")
+            return False, f"Erreur lors du transfert externe: {str(e)}"
+
+    def get_historique_compte(self, compte_type: str, compte_id: int, user_id: int,
+                            date_from: str = None, date_to: str = None,
+                            limit: int = 50) -> List[Dict]:
+        """Récupère l'historique des transactions d'un compte"""
+
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                if not self._verifier_appartenance_compte_with_cursor(cursor, compte_type, compte_id, user_id):
+                    return []
+
+                # Requête pour compte principal
+                if compte_type == 'compte_principal':
+                    query = """
+                    SELECT
+                    t.id,
+                    t.type_transaction,
+                    t.montant,
+                    t.description,
+                    t.reference,
+                    t.date_transaction,
+                    t.solde_apres,
+                    -- Sous-comptes
+                    sc.nom_sous_compte as sous_compte_source,
+                    sc_dest.nom_sous_compte as sous_compte_dest,
+                    -- Comptes principaux source/destination
+                    cp_source.nom_compte as compte_source_nom,
+                    cp_dest.nom_compte as compte_dest_nom,
+                    -- Transferts externes
+                    te.iban_dest,
+                    te.nom_dest,
+                    te.statut as statut_externe,
+                    CASE
+                        WHEN t.type_transaction = 'transfert_compte_vers_sous' THEN 'Débit'
+                        WHEN t.type_transaction = 'transfert_sous_vers_compte' THEN 'Crédit'
+                        ELSE NULL
+                    END as sens_operation
+                FROM transactions t
+                -- Sous-comptes
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                LEFT JOIN sous_comptes sc_dest ON t.sous_compte_destination_id = sc_dest.id
+                -- Comptes principaux (à adapter selon vos colonnes réelles)
+                LEFT JOIN comptes_principaux cp_source ON t.compte_source_id = cp_source.id
+                LEFT JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                -- Transferts externes
+                LEFT JOIN transferts_externes te ON t.id = te.transaction_id
+                WHERE t.compte_principal_id = %s
+                    """
+
+                # Requête pour sous-compte
+                else:
+                    query = """
+                    SELECT
+                        t.id,
+                        t.type_transaction,
+                        t.montant,
+                        t.description,
+                        t.reference,
+                        t.date_transaction,
+                        t.solde_apres,
+                        cp.nom_compte as compte_principal_lie,
+                        cp_dest.nom_compte as compte_principal_dest,
+                        CASE
+                            WHEN t.type_transaction = 'transfert_compte_vers_sous' THEN 'Crédit'
+                            WHEN t.type_transaction = 'transfert_sous_vers_compte' THEN 'Débit'
+                            ELSE NULL
+                        END as sens_operation
+                    FROM transactions t
+                    LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                    LEFT JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                    LEFT JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                    WHERE t.sous_compte_id = %s OR t.sous_compte_destination_id = %s
+                    """
+
+                params = [compte_id] if compte_type == 'compte_principal' else [compte_id, compte_id]
+
+                # Filtres de date
+                if date_from:
+                    query += " AND DATE(t.date_transaction) >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND DATE(t.date_transaction) <= %s"
+                    params.append(date_to)
+
+                query += " ORDER BY t.date_transaction DESC LIMIT %s"
+                params.append(limit)
+
+                return self.db.lire_lignes(query, params, convertisseurs={'montant': en_float},
+                                           nom='LigneHistorique', cursor=cursor)
+
+        except Exception as e:
+            logger.error(f"Erreur récupération historique: {e}")
+            return []
+
+    def get_statistiques_compte(self, compte_type: str, compte_id: int, user_id: int, date_debut: str = None, date_fin: str = None) -> Dict:
+        """Récupère les statistiques d'un compte sur une période personnalisée"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if not self._verifier_appartenance_compte_with_cursor(cursor, compte_type, compte_id, user_id):
+                    return {}
+
+                if compte_type == 'compte_principal':
+                    condition_compte = "t.compte_principal_id = %s"
+                else:
+                    condition_compte = "t.sous_compte_id = %s"
+
+                query = f"""
+                SELECT
+                    SUM(CASE
+                        WHEN t.type_transaction IN ('depot', 'transfert_entrant', 'transfert_sous_vers_compte', 'recredit_annulation')
+                        THEN t.montant ELSE 0 END) as total_entrees,
+                    SUM(CASE
+                        WHEN t.type_transaction IN ('retrait', 'transfert_sortant', 'transfert_externe', 'transfert_compte_vers_sous')
+                        THEN t.montant ELSE 0 END) as total_sorties,
+                    COUNT(*) as nombre_transactions,
+                    AVG(t.montant) as montant_moyen
+                FROM transactions t
+                WHERE {condition_compte}
+                AND t.date_transaction BETWEEN %s AND %s
+                """
+
+                cursor.execute(query, (compte_id, date_debut, date_fin))
+                stats = cursor.fetchone()
+
+                if stats:
+                    return {
+                        'total_entrees': float(stats['total_entrees'] or 0),
+                        'total_sorties': float(stats['total_sorties'] or 0),
+                        'solde_variation': float((stats['total_entrees'] or 0) - (stats['total_sorties'] or 0)),
+                        'nombre_transactions': int(stats['nombre_transactions'] or 0),
+                        'montant_moyen': float(stats['montant_moyen'] or 0)
+                    }
+                return {}
+        except Exception as e:
+            logger.error(f"Erreur récupération statistiques: {e}")
+            return {}
+
+    def get_transferts_externes_pending(self, user_id: int) -> List[Dict]:
+        """Récupère les transferts externes en attente pour un utilisateur"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    te.id, te.iban_dest, te.bic_dest, te.nom_dest,
+                    te.montant, te.devise, te.statut, te.date_demande,
+                    t.description, t.reference,
+                    CASE
+                        WHEN t.compte_principal_id IS NOT NULL THEN cp.nom_compte
+                        WHEN t.sous_compte_id IS NOT NULL THEN sc.nom_sous_compte
+                    END as nom_compte_source
+                FROM transferts_externes te
+                JOIN transactions t ON te.transaction_id = t.id
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                WHERE t.utilisateur_id = %s AND te.statut = 'pending'
+                ORDER BY te.date_demande DESC
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall()
+
+        except Exception as e:
+            logger.error(f"Erreur récupération transferts externes: {e}")
+            return []
+
+    def annuler_transfert_externe(self, transfert_externe_id: int, user_id: int) -> Tuple[bool, str]:
+        """Annule un transfert externe en attente et recrédite le compte"""
+        try:
+            # L'ensemble de l'opération est géré dans une seule transaction 'with'
+            with self.db.get_cursor() as cursor:
+                # Récupérer les détails du transfert externe
+                query = """
+                SELECT te.*, t.compte_principal_id, t.sous_compte_id, t.utilisateur_id
+                FROM transferts_externes te
+                JOIN transactions t ON te.transaction_id = t.id
+                WHERE te.id = %s AND te.statut = 'pending'
+                """
+                cursor.execute(query, (transfert_externe_id,))
+                transfert = cursor.fetchone()
+
+                if not transfert:
+                    return False, "Transfert externe non trouvé ou déjà traité"
+
+                if transfert['utilisateur_id'] != user_id:
+                    return False, "Non autorisé à annuler ce transfert"
+
+                # Déterminer le type et l'ID du compte source
+                if transfert['compte_principal_id']:
+                    compte_type = 'compte_principal'
+                    compte_id = transfert['compte_principal_id']
+                else:
+                    compte_type = 'sous_compte'
+                    compte_id = transfert['sous_compte_id']
+
+                # Recréditer le compte source
+                montant = Decimal(str(transfert['montant']))
+
+                # Utiliser la méthode d'insertion pour créer une transaction de recrédit
+                success, message, _ = self._inserer_transaction_with_cursor(
+                    cursor, compte_type, compte_id, 'recredit_annulation', montant,
+                    f"Annulation transfert externe vers {transfert['iban_dest']}",
+                    user_id, datetime.now(), False
+                )
+
+                if not success:
+                    return False, f"Erreur lors du recrédit: {message}"
+
+                # Marquer le transfert comme annulé
+                cursor.execute("UPDATE transferts_externes SET statut = 'cancelled' WHERE id = %s",
+                            (transfert_externe_id,))
+
+                return True, "Transfert externe annulé et compte recrédité"
+
+        except Exception as e:
+            # Le rollback est géré automatiquement par le bloc 'with'
+            logger.error(f"Erreur annulation transfert externe: {e}")
+            return False, f"Erreur lors de l'annulation: {str(e)}"
+
+    def get_evolution_soldes_quotidiens_compte(self, compte_id: int, user_id: int, date_debut: str = None, date_fin: str = None) -> List[Dict]:
+        """
+        Récupère l'évolution quotidienne des soldes d'un compte,
+        en remplissant les jours sans transaction par le solde du jour précédent.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+
+                # 1. Vérification d'appartenance (simplifiée)
+                cursor.execute("SELECT id, solde_initial FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s", (compte_id, user_id))
+                row = cursor.fetchone()
+                if not row:
+                    logger.warning(f"Tentative d'accès non autorisé ou compte inexistant: compte={compte_id}, user={user_id}")
+                    return []
+                solde_initial = Decimal(str(row['solde_initial'] or '0.00'))
+
+                # 2. Préparation des dates
+                debut_dt = datetime.strptime(date_debut, '%Y-%m-%d').date()
+                fin_dt = datetime.strptime(date_fin, '%Y-%m-%d').date() # On travaille avec des objets date simples
+
+                # 3. Requête SQL (pour récupérer le DERNIER solde APRES transaction pour chaque jour où il y a eu une activité)
+                query = """
+                    SELECT date_transaction, solde_apres
+                    FROM (
+                        SELECT
+                            date_transaction,
+                            solde_apres,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY DATE(date_transaction)
+                                ORDER BY id DESC
+                            ) as rn
+                        FROM transactions
+                        WHERE compte_principal_id = %s
+                        AND date_transaction >= %s
+                        AND date_transaction <= %s
+                    ) ranked
+                    WHERE rn = 1
+                    ORDER BY date_transaction;
+                """
+                cursor.execute(query, (compte_id, date_debut, date_fin))
+                transactions_par_jour = cursor.fetchall()
+
+                # Si aucune transaction n'est trouvée dans la période, on renvoie une liste vide (ou l'initialisation)
+                if not transactions_par_jour:
+                    return []
+
+                # --- 4. Logique de Remplissage des Jours Manquants (Report de Solde) ---
+
+                # Map des soldes de fin de journée pour un accès rapide
+                soldes_fin_journee = {t['date_transaction'].date(): Decimal(str(t['solde_apres'])) for t in transactions_par_jour}
+
+                # Déterminer le solde APRES la dernière transaction AVANT date_debut
+                # C'est nécessaire pour initialiser le report sur date_debut si aucune transaction n'a eu lieu ce jour-là
+                cursor.execute("""
+                    SELECT solde_apres FROM transactions
+                    WHERE compte_principal_id = %s AND date_transaction < %s
+                    ORDER BY date_transaction DESC, id DESC LIMIT 1
+                """, (compte_id, date_debut))
+                solde_initial_report = Decimal(str(cursor.fetchone()['solde_apres'])) if cursor.rowcount else solde_initial
+
+                jours_complets = []
+                current_solde = solde_initial_report
+                current_date = debut_dt
+
+                while current_date <= fin_dt:
+                    # 1. Si une transaction a eu lieu ce jour, utiliser le solde de fin de journée
+                    if current_date in soldes_fin_journee:
+                        current_solde = soldes_fin_journee[current_date]
+                    # 2. Sinon (jour sans transaction), le solde est simplement reporté (current_solde est inchangé)
+
+                    jours_complets.append({
+                        'date': current_date,
+                        'solde_apres': float(current_solde) # Convertir en float pour l'utilisation dans la vue
+                    })
+
+                    current_date += timedelta(days=1)
+
+                return jours_complets
+
+        except Exception as e:
+            logger.error(f"Erreur récupération évolution soldes compte: {e}")
+            return []
+
+
+    def get_evolution_soldes_quotidiens_sous_compte(self, sous_compte_id: int, user_id: int, nb_jours: int = 30) -> List[Dict]:
+        """
+        Récupère l'évolution quotidienne des soldes d'un sous-compte,
+        en remplissant les jours sans transaction par le solde du jour précédent.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+
+                # --- 1. Définition de la période ---
+                date_fin_dt = date.today()
+                date_debut_dt = date_fin_dt - timedelta(days=nb_jours - 1)
+
+                # Conversion au format string pour la requête SQL
+                date_debut_str = date_debut_dt.strftime('%Y-%m-%d')
+                date_fin_str = date_fin_dt.strftime('%Y-%m-%d')
+
+                # NOTE: Il faudrait idéalement une vérification d'appartenance du sous-compte au user_id ici.
+
+                # --- 2. Requête SQL (Récupération des soldes de fin de journée pour les jours AVEC transaction) ---
+
+                # Nous utilisons la méthode ROW_NUMBER() plus moderne comme dans la version compte principal
+                query = """
+                    SELECT date_transaction, solde_apres
+                    FROM (
+                        SELECT
+                            date_transaction,
+                            solde_apres,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY DATE(date_transaction)
+                                ORDER BY id DESC
+                            ) as rn
+                        FROM transactions
+                        WHERE sous_compte_id = %s
+                        AND date_transaction >= %s
+                        AND date_transaction <= %s
+                    ) ranked
+                    WHERE rn = 1
+                    ORDER BY date_transaction;
+                """
+                cursor.execute(query, (sous_compte_id, date_debut_str, date_fin_str))
+                transactions_par_jour = cursor.fetchall()
+
+                if not transactions_par_jour:
+                    return []
+
+                # --- 3. Logique de Remplissage des Jours Manquants (Report de Solde) ---
+
+                soldes_fin_journee = {t['date_transaction'].date(): Decimal(str(t['solde_apres'])) for t in transactions_par_jour}
+
+                # Déterminer le solde APRES la dernière transaction AVANT date_debut
+                cursor.execute("""
+                    SELECT solde_apres FROM transactions
+                    WHERE sous_compte_id = %s AND date_transaction < %s
+                    ORDER BY date_transaction DESC, id DESC LIMIT 1
+                """, (sous_compte_id, date_debut_str))
+
+                # Dans un sous-compte, on part souvent de 0.0 si aucune transaction passée n'est trouvée.
+                solde_initial_report = Decimal(str(cursor.fetchone()['solde_apres'])) if cursor.rowcount else Decimal('0.00')
+
+                jours_complets = []
+                current_solde = solde_initial_report
+                current_date = date_debut_dt
+
+                while current_date <= date_fin_dt:
+                    if current_date in soldes_fin_journee:
+                        # Mise à jour avec le solde réel de fin de journée
+                        current_solde = soldes_fin_journee[current_date]
+                    # Sinon, le solde est reporté (current_solde reste inchangé)
+
+                    jours_complets.append({
+                        'date': current_date,
+                        'solde_apres': float(current_solde)
+                    })
+
+                    current_date += timedelta(days=1)
+
+                return jours_complets
+
+        except Exception as e:
+            logger.error(f"Erreur récupération évolution soldes sous-compte: {e}")
+            return []
+
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Dict]:
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    t.*,
+                    COALESCE(cp.utilisateur_id, (
+                        SELECT cp2.utilisateur_id
+                        FROM sous_comptes sc
+                        JOIN comptes_principaux cp2 ON sc.compte_principal_id = cp2.id
+                        WHERE sc.id = t.sous_compte_id
+                    )) as owner_user_id,
+                    -- Compte principal + banque
+                    cp.nom_compte as compte_principal_nom,
+                    b1.nom as compte_principal_banque,
+                    sc.nom_sous_compte as sous_compte_nom,
+                    -- Compte destination + banque
+                    cp_dest.nom_compte as compte_destination_nom,
+                    b2.nom as compte_destination_banque,
+                    -- Compte source + banque
+                    cp_src.nom_compte as compte_source_nom,
+                    b3.nom as compte_source_banque
+                FROM transactions t
+                -- Compte principal
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN banques b1 ON cp.banque_id = b1.id
+                -- Sous-compte
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                -- Compte destination
+                LEFT JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                LEFT JOIN banques b2 ON cp_dest.banque_id = b2.id
+                -- Compte source
+                LEFT JOIN comptes_principaux cp_src ON t.compte_source_id = cp_src.id
+                LEFT JOIN banques b3 ON cp_src.banque_id = b3.id
+                WHERE t.id = %s
+                """
+                cursor.execute(query, (transaction_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur récupération transaction: {e}")
+            return None
+
+    def get_solde_courant(self, compte_type: str, compte_id: int, user_id: int) -> Decimal:
+        """Récupère le solde courant d'un compte"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if compte_type == 'compte_principal':
+                    cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                                (compte_id, user_id))
+                else:
+                    cursor.execute("""
+                        SELECT sc.solde
+                        FROM sous_comptes sc
+                        JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                        WHERE sc.id = %s AND cp.utilisateur_id = %s
+                    """, (compte_id, user_id))
+
+                result = cursor.fetchone()
+                return Decimal(str(result['solde'])) if result and 'solde' in result else Decimal('0')
+        except Exception as e:
+            logger.error(f"Erreur récupération solde courant: {e}")
+            return Decimal('0')
+
+    def get_solde_total_avec_sous_comptes(self, compte_principal_id: int, user_id: int) -> Decimal:
+        """Calcule le solde total d'un compte principal incluant ses sous-comptes"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le compte principal appartient à l'utilisateur
+                cursor.execute("SELECT solde FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                            (compte_principal_id, user_id))
+                result = cursor.fetchone()
+                if not result:
+                    return Decimal('0')
+
+                solde_total = Decimal(str(result['solde']))
+
+                # Ajouter les soldes des sous-comptes
+                cursor.execute("""
+                    SELECT solde FROM sous_comptes
+                    WHERE compte_principal_id = %s
+                """, (compte_principal_id,))
+
+                sous_comptes = cursor.fetchall()
+                for sc in sous_comptes:
+                    solde_total += Decimal(str(sc['solde']))
+
+                return solde_total
+        except Exception as e:
+            logger.error(f"Erreur calcul solde total: {e}")
+            return Decimal('0')
+
+    def get_categories_par_type(self, compte_type: str, compte_id: int, user_id: int, date_debut: str, date_fin: str) -> Dict[str, Decimal]:
+        """
+        Récupère la répartition des transactions par catégorie pour un compte donné sur une période.
+
+        Args:
+            compte_type (str): 'compte_principal' ou 'sous_compte'
+            compte_id (int): ID du compte
+            user_id (int): ID de l'utilisateur
+            date_debut (str): Date de début au format 'YYYY-MM-DD'
+            date_fin (str): Date de fin au format 'YYYY-MM-DD'
+
+        Returns:
+            Dict[str, Decimal]: Dictionnaire {catégorie: montant_total}
+        """
+        mapping_categories = {
+            'depot': 'Dépôts',
+            'retrait': 'Retraits',
+            'transfert_entrant': 'Transferts entrants',
+            'transfert_sortant': 'Transferts sortants',
+            'transfert_compte_vers_sous': 'Transferts vers sous-comptes',
+            'transfert_sous_vers_compte': 'Transferts depuis sous-comptes',
+            'transfert_externe': 'Transferts externes',
+            'recredit_annulation': 'Annulations / Recrédits'
+        }
+
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier l'appartenance du compte
+                if not self._verifier_appartenance_compte_with_cursor(cursor, compte_type, compte_id, user_id):
+                    logger.warning(f"Tentative d'accès non autorisé aux catégories: user={user_id}, compte={compte_id} ({compte_type})")
+                    return {}
+
+                # Construire la condition selon le type de compte
+                if compte_type == 'compte_principal':
+                    condition_compte = "compte_principal_id = %s"
+                else:
+                    condition_compte = "sous_compte_id = %s"
+
+                query = f"""
+                SELECT
+                    type_transaction,
+                    SUM(montant) as total
+                FROM transactions
+                WHERE {condition_compte}
+                AND date_transaction BETWEEN %s AND %s
+                GROUP BY type_transaction
+                ORDER BY total DESC
+                """
+                cursor.execute(query, (compte_id, date_debut, date_fin))
+                rows = cursor.fetchall()
+
+                result = {}
+                for row in rows:
+                    type_tx = row['type_transaction']
+                    montant = Decimal(str(row['total'] or '0'))
+
+                    # Inclure dans la catégorie correspondante
+                    cat = mapping_categories.get(type_tx, 'Autres')
+                    result[cat] = result.get(cat, Decimal('0')) + montant
+
+                return result
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_categories_par_type: {e}", exc_info=True)
+            return {}
+
+    def get_categories_par_type_complet(self, user_id: int, date_debut: str, date_fin: str) -> Dict[str, Decimal]:
+        """
+        Récupère la répartition des transactions par catégorie pour **tous les comptes** de l'utilisateur.
+        """
+        mapping_categories = {
+            'depot': 'Dépôts',
+            'retrait': 'Retraits',
+            'transfert_entrant': 'Transferts entrants',
+            'transfert_sortant': 'Transferts sortants',
+            'transfert_compte_vers_sous': 'Transferts vers sous-comptes',
+            'transfert_sous_vers_compte': 'Transferts depuis sous-comptes',
+            'transfert_externe': 'Transferts externes',
+            'recredit_annulation': 'Annulations / Recrédits'
+        }
+
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    t.type_transaction,
+                    SUM(t.montant) as total
+                FROM transactions t
+                JOIN comptes_principaux cp ON (
+                    t.compte_principal_id = cp.id
+                    OR t.compte_principal_id IN (
+                        SELECT sc2.compte_principal_id
+                        FROM sous_comptes sc2
+                        WHERE sc2.id = t.sous_compte_id
+                    )
+                )
+                WHERE cp.utilisateur_id = %s
+                AND t.date_transaction BETWEEN %s AND %s
+                GROUP BY t.type_transaction
+                """
+                cursor.execute(query, (user_id, date_debut, date_fin))
+                rows = cursor.fetchall()
+
+                result = {}
+                for row in rows:
+                    type_tx = row['type_transaction']
+                    montant = Decimal(str(row['total'] or '0'))
+                    cat = mapping_categories.get(type_tx, 'Autres')
+                    result[cat] = result.get(cat, Decimal('0')) + montant
+
+                return result
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_categories_par_type_complet: {e}", exc_info=True)
+            return {}
+
+    def get_categories_par_type_sous_compte(self, sous_compte_id: int, user_id: int, date_debut: str, date_fin: str) -> Dict[str, Decimal]:
+        """
+        Récupère la répartition des transactions par catégorie pour un **sous-compte** donné.
+        """
+        mapping_categories = {
+            'transfert_compte_vers_sous': 'Crédits (compte → sous-compte)',
+            'transfert_sous_vers_compte': 'Débits (sous-compte → compte)',
+            'depot': 'Dépôts directs',
+            'retrait': 'Retraits directs',
+            # Tu peux adapter selon ce qui est pertinent pour les sous-comptes
+        }
+
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le sous-compte appartient à l'utilisateur
+                cursor.execute("""
+                    SELECT sc.id
+                    FROM sous_comptes sc
+                    JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                    WHERE sc.id = %s AND cp.utilisateur_id = %s
+                """, (sous_compte_id, user_id))
+                if not cursor.fetchone():
+                    logger.warning(f"Accès refusé au sous-compte {sous_compte_id} pour user {user_id}")
+                    return {}
+
+                query = """
+                SELECT
+                    type_transaction,
+                    SUM(montant) as total
+                FROM transactions
+                WHERE sous_compte_id = %s
+                AND date_transaction BETWEEN %s AND %s
+                GROUP BY type_transaction
+                """
+                cursor.execute(query, (sous_compte_id, date_debut, date_fin))
+                rows = cursor.fetchall()
+
+                result = {}
+                for row in rows:
+                    type_tx = row['type_transaction']
+                    montant = Decimal(str(row['total'] or '0'))
+                    cat = mapping_categories.get(type_tx, 'Autres')
+                    result[cat] = result.get(cat, Decimal('0')) + montant
+
+                return result
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_categories_par_type_sous_compte: {e}", exc_info=True)
+            return {}
+
+    def get_transaction_with_ecritures_total(self, transaction_id: int, user_id: int) -> Optional[Dict]:
+        """Récupère une transaction + le total des écritures liées avec vérification de propriété complète"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Requête améliorée avec toutes les vérifications de propriété
+                cursor.execute("""
+                    SELECT
+                        t.*,
+                        COALESCE(SUM(e.montant), 0) as total_ecritures,
+                        COUNT(e.id) as nb_ecritures,
+                        -- Informations de propriété
+                        COALESCE(cp.utilisateur_id, (
+                            SELECT cp2.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp2 ON sc.compte_principal_id = cp2.id
+                            WHERE sc.id = t.sous_compte_id
+                        )) as owner_user_id,
+                        -- Informations du compte
+                        cp.nom_compte as compte_principal_nom,
+                        sc.nom_sous_compte as sous_compte_nom
+                    FROM transactions t
+                    LEFT JOIN ecritures_comptables e ON t.id = e.transaction_id
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                    WHERE t.id = %s
+                    GROUP BY t.id, cp.utilisateur_id, cp.nom_compte, sc.nom_sous_compte
+                """, (transaction_id,))
+
+                tx = cursor.fetchone()
+                if not tx:
+                    return None
+
+                # Vérification de propriété améliorée
+                owner_id = tx.get('owner_user_id')
+                if not owner_id or owner_id != user_id:
+                    # Vérification supplémentaire pour les transactions liées à des sous-comptes
+                    if tx.get('sous_compte_id'):
+                        cursor.execute("""
+                            SELECT cp.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                            WHERE sc.id = %s
+                        """, (tx['sous_compte_id'],))
+                        sous_compte_owner = cursor.fetchone()
+                        if not sous_compte_owner or sous_compte_owner['utilisateur_id'] != user_id:
+                            return None
+                    else:
+                        return None
+
+                return tx
+        except Exception as e:
+            logger.error(f"Erreur get_transaction_with_ecritures_total: {e}")
+            return None
+
+    def _check_transaction_ownership(self, transaction_id: int, user_id: int) -> bool:
+        """Vérifie si l'utilisateur est propriétaire de la transaction"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT
+                        COALESCE(cp.utilisateur_id, (
+                            SELECT cp2.utilisateur_id
+                            FROM sous_comptes sc
+                            JOIN comptes_principaux cp2 ON sc.compte_principal_id = cp2.id
+                            WHERE sc.id = t.sous_compte_id
+                        )) as owner_user_id
+                    FROM transactions t
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    WHERE t.id = %s
+                """, (transaction_id,))
+
+                result = cursor.fetchone()
+                return result and result['owner_user_id'] == user_id
+        except Exception as e:
+            logger.error(f"Erreur vérification propriété transaction: {e}")
+            return False
+
+    def get_contacts_avec_transactions(self, user_id: int) -> List[Dict]:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT
+                    c.id_contact,
+                    c.nom,
+                    c.iban_dest,   -- si tu stockes l'IBAN dans contacts
+                    te.iban_dest as iban_transaction
+                FROM ecritures_comptables e
+                JOIN contacts c ON e.id_contact = c.id_contact
+                LEFT JOIN transactions t ON e.transaction_id = t.id
+                LEFT JOIN transferts_externes te ON t.id = te.transaction_id
+                WHERE e.utilisateur_id = %s
+            """, (user_id,))
+            return cursor.fetchall()
+
+    def get_comptes_interagis(self, user_id: int) -> List[Dict]:
+        """
+        Récupère TOUS les comptes bancaires avec lesquels l'utilisateur a interagi :
+        - Ses propres comptes,
+        - Les comptes externes liés à des contacts,
+        - Les comptes apparaissant comme source ou destination dans ses transactions.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # 1. Mes propres comptes
+                query_internes = """
+                    SELECT
+                        c.id,
+                        c.nom_compte,
+                        c.iban,
+                        c.bic,
+                        c.type_compte,
+                        c.solde,
+                        c.devise,
+                        c.date_ouverture,
+                        'interne' AS type_compte_origine
+                    FROM comptes_principaux c
+                    WHERE c.utilisateur_id = %s
+                """
+                cursor.execute(query_internes, (user_id,))
+                comptes = {row['id']: row for row in cursor.fetchall()}
+
+                # 2. Comptes liés à des contacts (externes)
+                query_contacts = """
+                    SELECT DISTINCT
+                        cp.id,
+                        cp.nom_compte,
+                        cp.iban,
+                        cp.bic,
+                        cp.type_compte,
+                        0.00 AS solde,
+                        cp.devise,
+                        cp.date_ouverture,
+                        'externe' AS type_compte_origine
+                    FROM contact_comptes cc
+                    JOIN comptes_principaux cp ON cc.compte_id = cp.id
+                    WHERE cc.utilisateur_id = %s
+                """
+                cursor.execute(query_contacts, (user_id,))
+                for row in cursor.fetchall():
+                    if row['id'] not in comptes:
+                        comptes[row['id']] = row
+
+                # 3. Comptes apparaissant dans les transactions (source ou destination)
+                query_transactions = """
+                    SELECT DISTINCT
+                        cp.id,
+                        cp.nom_compte,
+                        cp.iban,
+                        cp.bic,
+                        cp.type_compte,
+                        cp.solde,
+                        cp.devise,
+                        cp.date_ouverture,
+                        'transaction' AS type_compte_origine
+                    FROM transactions t
+                    JOIN comptes_principaux cp ON (
+                        cp.id = t.compte_destination_id OR
+                        cp.id = t.compte_source_id
+                    )
+                    WHERE t.utilisateur_id = %s
+                    AND cp.id IS NOT NULL
+                """
+                cursor.execute(query_transactions, (user_id,))
+                for row in cursor.fetchall():
+                    if row['id'] not in comptes:
+                        # Marquer comme 'externe' si ce n’est pas l’un de mes comptes
+                        if row.get('type_compte_origine') == 'transaction' and row['id'] not in [
+                            c['id'] for c in comptes.values() if c.get('type_compte_origine') == 'interne'
+                        ]:
+                            row['type_compte_origine'] = 'externe'
+                        comptes[row['id']] = row
+
+                # Retourner la liste finale
+                return list(comptes.values())
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_comptes_interagis: {e}", exc_info=True)
+            return []
+
+    def get_transactions_sans_ecritures(self, user_id: int, date_from: str = None, date_to: str = None,
+                                  statut_comptable: str = None, limit: int = 100) -> List[Dict]:
+        """Récupère les transactions sans écritures comptables associées"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    t.*,
+                    cp.nom_compte as compte_principal_nom,
+                    sc.nom_sous_compte as sous_compte_nom,
+                    COUNT(e.id) as nb_ecritures_liees,
+                    COALESCE(SUM(e.montant), 0) as total_ecritures
+                FROM transactions t
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                LEFT JOIN ecritures_comptables e ON t.id = e.transaction_id
+                WHERE (cp.utilisateur_id = %s OR sc.compte_principal_id IN (
+                    SELECT id FROM comptes_principaux WHERE utilisateur_id = %s
+                ))
+                AND t.id NOT IN (
+                    SELECT DISTINCT transaction_id
+                    FROM ecritures_comptables
+                    WHERE transaction_id IS NOT NULL
+                )
+                """
+                params = [user_id, user_id]
+
+                # Filtres optionnels
+                if date_from:
+                    query += " AND DATE(t.date_transaction) >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND DATE(t.date_transaction) <= %s"
+                    params.append(date_to)
+                if statut_comptable:
+                    query += " AND t.statut_comptable = %s"
+                    params.append(statut_comptable)
+
+                query += """
+                GROUP BY t.id
+                HAVING nb_ecritures_liees = 0
+                ORDER BY t.date_transaction DESC
+                LIMIT %s
+                """
+                params.append(limit)
+
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+        except Exception as e:
+            logger.error(f"Erreur récupération transactions sans écritures: {e}")
+            return []
+
+
+
+    def get_stats_transactions_comptables(self, user_id: int) -> Dict:
+        """Retourne les statistiques des transactions par statut comptable"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    statut_comptable,
+                    COUNT(*) as nb_transactions,
+                    SUM(montant) as total_montant,
+                    AVG(montant) as moyenne_montant
+                FROM transactions t
+                LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                WHERE cp.utilisateur_id = %s OR sc.compte_principal_id IN (
+                    SELECT id FROM comptes_principaux WHERE utilisateur_id = %s
+                )
+                GROUP BY statut_comptable
+                """
+                cursor.execute(query, (user_id, user_id))
+                stats = cursor.fetchall()
+
+                return {
+                    'statistiques': stats,
+                    'total_transactions': sum(s['nb_transactions'] for s in stats),
+                    'total_montant': sum(float(s['total_montant'] or 0) for s in stats)
+                }
+
+        except Exception as e:
+            logger.error(f"Erreur statistiques transactions comptables: {e}")
+            return {}
+
+    def creer_ecriture_automatique(self, transaction_id: int, user_id: int, categorie_id: int = None) -> Tuple[bool, str]:
+        """Crée automatiquement une écriture comptable pour une transaction avec statut 'pending'"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Récupérer les détails de la transaction
+                transaction = self.get_transaction_by_id(transaction_id)
+                if not transaction or transaction.get('owner_user_id') != user_id:
+                    return False, "Transaction non trouvée ou non autorisée"
+
+                # Déterminer le type d'écriture basé sur le type de transaction
+                type_ecriture = self._determiner_type_ecriture(transaction['type_transaction'])
+
+                # Déterminer la catégorie par défaut si non fournie
+                if not categorie_id:
+                    categorie_id = self._get_categorie_par_defaut(type_ecriture, user_id)
+                    if not categorie_id:
+                        return False, "Aucune catégorie par défaut trouvée"
+
+                # Créer l'écriture comptable avec statut 'pending'
+                ecriture_data = {
+                    'date_ecriture': transaction['date_transaction'],
+                    'compte_bancaire_id': transaction['compte_principal_id'],
+                    'categorie_id': categorie_id,
+                    'montant': transaction['montant'],
+                    'devise': 'CHF',
+                    'description': f"Auto: {transaction['description']}",
+                    'type_ecriture': type_ecriture,
+                    'utilisateur_id': user_id,
+                    'statut': 'pending',  # Statut en attente par défaut
+                    'transaction_id': transaction_id
+                }
+
+                # Utiliser votre modèle d'écriture comptable existant
+                success = self.ecriture_model.create(ecriture_data)
+
+                if success:
+                    # Marquer la transaction comme comptabilisée
+                    self.update_statut_comptable(transaction_id, user_id, 'comptabilise')
+                    return True, "Écriture créée automatiquement avec statut 'en attente'"
+                else:
+                    return False, "Erreur lors de la création de l'écriture"
+
+        except Exception as e:
+            logger.error(f"Erreur création écriture automatique: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def _determiner_type_ecriture(self, type_transaction: str) -> str:
+        """Détermine le type d'écriture basé sur le type de transaction"""
+        types_depense = ['retrait', 'transfert_sortant', 'transfert_externe']
+        types_recette = ['depot', 'transfert_entrant', 'recredit_annulation']
+
+        if type_transaction in types_depense:
+            return 'depense'
+        elif type_transaction in types_recette:
+            return 'recette'
+        else:
+            return 'depense'  # par défaut
+
+    def _get_categorie_par_defaut(self, type_ecriture: str, user_id: int) -> int:
+        """Récupère la catégorie par défaut selon le type d'écriture"""
+        try:
+            with self.db.get_cursor() as cursor:
+                if type_ecriture == 'depense':
+                    cursor.execute("""
+                        SELECT id FROM categories_comptables
+                        WHERE utilisateur_id = %s AND nom LIKE '%divers%' OR nom LIKE '%autres%'
+                        LIMIT 1
+                    """, (user_id,))
+                else:
+                    cursor.execute("""
+                        SELECT id FROM categories_comptables
+                        WHERE utilisateur_id = %s AND type_compte = 'Revenus'
+                        LIMIT 1
+                    """, (user_id,))
+
+                result = cursor.fetchone()
+                return result['id'] if result else None
+        except Exception as e:
+            logger.error(f"Erreur récupération catégorie par défaut: {e}")
+            return None
+
+    def get_transactions_sans_ecritures_par_compte(self, compte_id: int, user_id: int,
+                                                date_from: str = None, date_to: str = None,
+                                                statut_comptable: str = None) -> List[Dict]:
+        """Récupère les transactions sans écritures comptables pour un compte spécifique"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le compte appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return []
+
+                query = """
+                SELECT
+                    t.*,
+                    cp.nom_compte as compte_principal_nom,
+                    cp_dest.nom_compte as compte_destination_nom,
+                    sc.nom_sous_compte as sous_compte_nom,
+                    COUNT(e.id) as nb_ecritures_liees,
+                    COALESCE(SUM(e.montant), 0) as total_ecritures
+                FROM
+                    transactions t
+                LEFT JOIN
+                    comptes_principaux cp
+                    ON t.compte_principal_id = cp.id
+                LEFT JOIN
+                    comptes_principaux cp_dest
+                    ON t.compte_destination_id = cp_dest.id
+                LEFT JOIN
+                    sous_comptes sc
+                    ON t.sous_compte_id = sc.id
+                LEFT JOIN
+                    ecritures_comptables e
+                    ON t.id = e.transaction_id
+                WHERE
+                    t.compte_principal_id = %s
+                    AND t.id NOT IN (
+                        SELECT DISTINCT transaction_id
+                        FROM ecritures_comptables
+                        WHERE transaction_id IS NOT NULL
+                    )
+                """
+                params = [compte_id]
+
+                # Filtres optionnels
+                if date_from:
+                    query += " AND DATE(t.date_transaction) >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND DATE(t.date_transaction) <= %s"
+                    params.append(date_to)
+                if statut_comptable:
+                    query += " AND t.statut_comptable = %s"
+                    params.append(statut_comptable)
+
+                query += """
+                GROUP BY t.id
+                HAVING nb_ecritures_liees = 0
+                ORDER BY t.date_transaction DESC
+                """
+
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+        except Exception as e:
+            logger.error(f"Erreur récupération transactions sans écritures par compte: {e}")
+            return []
+
+    def get_dernier_id(self, user_id: int) -> int:
+        """Identifiant de la dernière transaction de l'utilisateur (0 s'il n'en a aucune)"""
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions WHERE utilisateur_id = %s", (user_id,))
+                return int(cursor.fetchone()[0])
+        except Exception as e:
+            logger.error(f"Erreur lecture dernière transaction: {e}")
+            return 0
+
+    def get_empreintes_import(self, user_id: int, date_debut, date_fin) -> Counter:
+        """
+        Empreintes d'import des transactions de l'utilisateur entre deux jours (inclus),
+        avec leur nombre d'occurrences. Les lignes sans empreinte (antérieures à la colonne
+        ou modifiées depuis) sont calculées ici puis enregistrées pour les imports suivants.
+        """
+        empreintes = Counter()
+        try:
+            with self.db.get_cursor(tuples=True) as cursor:
+                cursor.execute("""
+                    SELECT id, compte_principal_id, sous_compte_id, type_transaction,
+                           montant, description, date_transaction, empreinte_import
+                    FROM transactions
+                    WHERE utilisateur_id = %s
+                    AND date_transaction >= %s
+                    AND date_transaction < DATE_ADD(%s, INTERVAL 1 DAY)
+                """, (user_id, date_debut, date_fin))
+                a_completer = []
+                for (transaction_id, compte_principal_id, sous_compte_id, type_transaction,
+                     montant, description, date_transaction, empreinte) in cursor.fetchall():
+                    if empreinte is None:
+                        compte_type = 'compte_principal' if compte_principal_id else 'sous_compte'
+                        empreinte = empreinte_transaction(
+                            compte_type, compte_principal_id or sous_compte_id, date_transaction, montant,
+                            est_credit(type_transaction, compte_type), description)
+                        a_completer.append((empreinte, transaction_id))
+                    empreintes[empreinte] += 1
+
+                if a_completer:
+                    cursor.executemany("UPDATE transactions SET empreinte_import = %s WHERE id = %s", a_completer)
+        except Exception as e:
+            logger.error(f"Erreur lecture des empreintes d'import: {e}")
+        return empreintes
+
+    def compter_transactions_sans_ecritures(self, user_id: int, date_from: str = None, date_to: str = None,
+                                            statut_comptable: str = None, depuis_ouverture: bool = False) -> Dict:
+        """
+        Compte les transactions sans écriture comptable de chaque compte principal actif de l'utilisateur,
+        en une requête groupée (anti-jointure, aucune ligne de transaction chargée). Même périmètre que
+        get_transactions_sans_ecritures_par_compte appelée compte par compte.
+        depuis_ouverture : ignore les transactions antérieures à la date d'ouverture de leur compte.
+        Retourne {'par_compte': {compte_id: {'nb', 'montant'}}, 'nb_total', 'montant_total'}
+        """
+        resultat = {'par_compte': {}, 'nb_total': 0, 'montant_total': Decimal('0')}
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT t.compte_principal_id AS compte_id, COUNT(*) AS nb, COALESCE(SUM(t.montant), 0) AS montant
+                FROM transactions t
+                JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                WHERE cp.utilisateur_id = %s
+                AND cp.actif = TRUE
+                AND NOT EXISTS (
+                    SELECT 1 FROM ecritures_comptables e WHERE e.transaction_id = t.id
+                )
+                """
+                params = [user_id]
+
+                if date_from:
+                    query += " AND t.date_transaction >= %s"
+                    params.append(date_from)
+                if date_to:
+                    query += " AND t.date_transaction < DATE_ADD(%s, INTERVAL 1 DAY)"
+                    params.append(date_to)
+                if depuis_ouverture:
+                    query += " AND (cp.date_ouverture IS NULL OR t.date_transaction >= cp.date_ouverture)"
+                if statut_comptable:
+                    query += " AND t.statut_comptable = %s"
+                    params.append(statut_comptable)
+                query += " GROUP BY t.compte_principal_id"
+
+                cursor.execute(query, params)
+                for row in cursor.fetchall():
+                    montant = Montant.depuis(row['montant']).en_decimal()
+                    resultat['par_compte'][row['compte_id']] = {'nb': row['nb'], 'montant': montant}
+                    resultat['nb_total'] += row['nb']
+                    resultat['montant_total'] += montant
+        except Exception as e:
+            logger.error(f"Erreur comptage transactions sans écritures: {e}")
+        return resultat
+
+    def _get_daily_balances(self, compte_id: int, date_debut: date, date_fin: date,
+                            type_transaction: str = 'total') -> Dict[date, Decimal]:
+            """
+            Retourne les soldes ou flux quotidiens d'un compte principal.
+            type_transaction:
+            - 'total'   → solde journalier (solde_final après chaque jour)
+            - 'recette' → total des recettes quotidiennes
+            - 'depense' → total des dépenses quotidiennes
+            """
+            try:
+                with self.db.get_cursor(tuples=True) as cursor:
+                    # 1. Récupérer le solde initial
+                    cursor.execute("SELECT solde_initial FROM comptes_principaux WHERE id = %s", (compte_id,))
+                    row = cursor.fetchone()
+                    solde_initial = Decimal(str(row[0])) if row and row[0] is not None else Decimal('0')
+
+                    # 2. Récupérer TOUTES les transactions du compte dans la période (tuples date, montant, type)
+                    txns = self.db.lire_lignes("""
+                        SELECT date_transaction, montant, type_transaction
+                        FROM transactions
+                        WHERE compte_principal_id = %s
+                        AND date_transaction >= %s
+                        AND date_transaction <= %s
+                        ORDER BY date_transaction ASC
+                    """, (compte_id, date_debut, date_fin), mode='tuple', cursor=cursor, convertisseurs={
+                        'date_transaction': lambda d: d.date() if isinstance(d, datetime) else d,
+                        'montant': en_decimal,
+                    })
+
+                    # 3. Préparer structure par date
+                    recettes_par_jour = {}
+                    depenses_par_jour = {}
+                    solde_par_jour = {}
+
+                    # Initialiser le solde courant
+                    solde_courant = solde_initial
+
+                    # Si on demande 'total', le solde_initial s'applique à date_debut
+                    if type_transaction == 'total':
+                        solde_par_jour[date_debut] = solde_initial
+
+                    # 4. Parcourir les transactions
+                    for tx_date, montant, tx_type in txns:
+                        # Classifier la transaction
+                        if tx_type in ['depot', 'transfert_entrant', 'recredit_annulation', 'transfert_sous_vers_compte']:
+                            # → Recette
+                            recettes_par_jour[tx_date] = recettes_par_jour.get(tx_date, Decimal('0')) + montant
+                            solde_courant += montant
+                        elif tx_type in ['retrait', 'transfert_sortant', 'transfert_externe', 'transfert_compte_vers_sous']:
+                            # → Dépense
+                            depenses_par_jour[tx_date] = depenses_par_jour.get(tx_date, Decimal('0')) + montant
+                            solde_courant -= montant
+                        else:
+                            logger.warning(f"Type de transaction inconnu : {tx_type}")
+                            continue
+
+                        # Enregistrer le solde à cette date
+                        if type_transaction == 'total':
+                            solde_par_jour[tx_date] = solde_courant
+
+                    # 5. Remplir les jours manquants (report de solde ou zéro pour flux)
+                    current = date_debut
+                    result = {}
+                    last_solde = solde_initial
+
+                    while current <= date_fin:
+                        if type_transaction == 'total':
+                            if current in solde_par_jour:
+                                last_solde = solde_par_jour[current]
+                            result[current] = last_solde
+                        elif type_transaction == 'recette':
+                            result[current] = recettes_par_jour.get(current, Decimal('0'))
+                        elif type_transaction == 'depense':
+                            result[current] = depenses_par_jour.get(current, Decimal('0'))
+                        else:
+                            result[current] = Decimal('0')
+                        current += timedelta(days=1)
+
+                    return result
+
+            except Exception as e:
+                logger.error(f"Erreur dans _get_daily_balances (compte {compte_id}): {e}")
+                return {}
+
+    def compare_comptes_soldes_barres_horizontales(self, compte_id_1: int, compte_id_2: int,
+                                    date_debut: date, date_fin: date,
+                                    type_1: str, type_2: str,
+                                    couleur_1: str = "#0000FF", couleur_2: str = "#00FF00") -> str:
+        """
+        Génère un graphique en BARRES SVG comparant l'évolution des soldes de deux comptes.
+        """
+        from datetime import timedelta
+
+        # Récupérer les soldes quotidiens pour chaque compte et type
+        soldes_1 = self._get_daily_balances(compte_id_1, date_debut, date_fin, type_1)
+        soldes_2 = self._get_daily_balances(compte_id_2, date_debut, date_fin, type_2)
+
+        # Trier les dates
+        toutes_dates = sorted(set(soldes_1.keys()) | set(soldes_2.keys()))
+        if not toutes_dates:
+            return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+
+        # Obtenir les valeurs
+        valeurs_1 = [soldes_1.get(dt, Decimal('0')) for dt in toutes_dates]
+        valeurs_2 = [soldes_2.get(dt, Decimal('0')) for dt in toutes_dates]
+
+        # Calculer les valeurs absolues pour l'échelle Y
+        toutes_valeurs = valeurs_1 + valeurs_2
+        if not toutes_valeurs:
+            return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+
+        max_val = max(abs(float(v)) for v in toutes_valeurs)
+        if max_val == 0:
+            max_val = 1  # Éviter la division par zéro
+
+        # --- Paramètres du graphique ---
+        largeur_svg, hauteur_svg = 900, 500
+        marge_gauche, marge_droite = 80, 40
+        marge_haut, marge_bas = 40, 80
+        largeur_graph = largeur_svg - marge_gauche - marge_droite
+        hauteur_graph = hauteur_svg - marge_haut - marge_bas
+
+        # Échelle pour les valeurs (axe Y)
+        echelle_y = hauteur_graph / (2 * max_val)  # Pour couvrir -max à +max
+
+        # Échelle pour les dates (axe X)
+        nb_dates = len(toutes_dates)
+        if nb_dates <= 1:
+            largeur_barre = largeur_graph * 0.8
+            espacement = 0
+        else:
+            largeur_barre = largeur_graph / nb_dates * 0.4  # 40% de la place pour la barre
+            espacement = largeur_graph / nb_dates - largeur_barre
+
+        svg_content = f'<svg width="{largeur_svg}" height="{hauteur_svg}" xmlns="http://www.w3.org/2000/svg">\n'
+
+        # Ligne centrale (valeur 0 sur l'axe Y)
+        y_zero = marge_haut + hauteur_graph / 2
+        svg_content += f'<line x1="{marge_gauche}" y1="{y_zero}" x2="{marge_gauche + largeur_graph}" y2="{y_zero}" stroke="#000" stroke-dasharray="4" />\n'
+
+        # Dessiner les barres pour chaque date
+        for i, (dt, val_1, val_2) in enumerate(zip(toutes_dates, valeurs_1, valeurs_2)):
+            # Position X centrale pour ce groupe de barres
+            x_centre = marge_gauche + (i * (largeur_barre + espacement)) + (largeur_barre + espacement) / 2
+
+            # Barre Compte 1
+            hauteur_1 = abs(float(val_1)) * echelle_y
+            if val_1 >= 0:
+                y_1 = y_zero - hauteur_1
+            else:
+                y_1 = y_zero
+                hauteur_1 = abs(hauteur_1) # Assure que la hauteur est positive
+            svg_content += f'<rect x="{x_centre - largeur_barre}" y="{y_1}" width="{largeur_barre/2}" height="{hauteur_1}" fill="{couleur_1}" />\n'
+
+            # Barre Compte 2
+            hauteur_2 = abs(float(val_2)) * echelle_y
+            if val_2 >= 0:
+                y_2 = y_zero - hauteur_2
+            else:
+                y_2 = y_zero
+                hauteur_2 = abs(hauteur_2)
+            svg_content += f'<rect x="{x_centre - largeur_barre/2}" y="{y_2}" width="{largeur_barre/2}" height="{hauteur_2}" fill="{couleur_2}" />\n'
+
+        # Ajouter les labels des dates sur l'axe X
+        for i, dt in enumerate(toutes_dates):
+            x_centre = marge_gauche + (i * (largeur_barre + espacement)) + (largeur_barre + espacement) / 2
+            # Rotation pour les labels longs
+            svg_content += f'<text x="{x_centre}" y="{marge_haut + hauteur_graph + 20}" text-anchor="middle" font-size="10" transform="rotate(45, {x_centre}, {marge_haut + hauteur_graph + 20})">{dt.strftime("%d.%m")}</text>\n'
+
+        # Ajouter une légende simple
+        svg_content += f'<rect x="{marge_gauche}" y="{marge_haut - 25}" width="15" height="10" fill="{couleur_1}" />\n'
+        svg_content += f'<text x="{marge_gauche + 20}" y="{marge_haut - 15}" font-size="12">Compte 1 ({type_1})</text>\n'
+        svg_content += f'<rect x="{marge_gauche + 150}" y="{marge_haut - 25}" width="15" height="10" fill="{couleur_2}" />\n'
+        svg_content += f'<text x="{marge_gauche + 170}" y="{marge_haut - 15}" font-size="12">Compte 2 ({type_2})</text>\n'
+
+        svg_content += '</svg>'
+        return svg_content
+
+    def compare_comptes_soldes_horizontales(self, compte_id_1: int, compte_id_2: int,
+                               date_debut: date, date_fin: date,
+                               type_1: str, type_2: str,
+                               couleur_1_recette: str = "#0000FF", couleur_1_depense: str = "#FF0000",
+                               couleur_2_recette: str = "#00FF00", couleur_2_depense: str = "#FF00FF") -> str:
+        """
+        Génère un graphique SVG comparant l'évolution des soldes de deux comptes.
+        """
+
+
+        # Récupérer les soldes quotidiens pour chaque compte et type
+        soldes_1 = self._get_daily_balances(compte_id_1, date_debut, date_fin, type_1)
+        soldes_2 = self._get_daily_balances(compte_id_2, date_debut, date_fin, type_2)
+
+        # Trier les dates pour l'axe Y (axe des ordonnées)
+        toutes_dates = sorted(set(soldes_1.keys()) | set(soldes_2.keys()))
+        if not toutes_dates:
+            return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+
+        # Déterminer les valeurs max pour l'échelle de l'axe X
+        all_values = list(soldes_1.values()) + list(soldes_2.values())
+        if not all_values:
+             return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+        max_val = max(abs(v) for v in all_values)
+        if max_val == 0: max_val = 1 # Éviter la division par zéro
+
+        # Dimensions du graphique
+        largeur_svg, hauteur_svg = 800, 400
+        marge_gauche, marge_droite = 50, 50
+        marge_haut, marge_bas = 30, 30
+        largeur_graph = largeur_svg - marge_gauche - marge_droite
+        hauteur_graph = hauteur_svg - marge_haut - marge_bas
+
+        # Echelle pour les valeurs (axe X)
+        echelle_x = largeur_graph / (2 * max_val) # 2 * max_val pour couvrir -max à +max
+
+        # Echelle pour les dates (axe Y)
+        # On inverse l'axe Y : la date la plus ancienne (0) est en bas, la plus récente (len-1) en haut
+        nb_dates = len(toutes_dates)
+        if nb_dates <= 1:
+            pas_y = 0
+        else:
+            pas_y = hauteur_graph / (nb_dates - 1) if nb_dates > 1 else hauteur_graph
+
+        # Générer le SVG
+        svg_content = f'<svg width="{largeur_svg}" height="{hauteur_svg}" xmlns="http://www.w3.org/2000/svg">\n'
+
+        # Ligne centrale (valeur 0)
+        x_zero = marge_gauche + largeur_graph / 2
+        svg_content += f'<line x1="{x_zero}" y1="{marge_haut}" x2="{x_zero}" y2="{marge_haut + hauteur_graph}" stroke="#000" stroke-dasharray="4" />\n'
+
+        # Dessiner les points pour chaque date
+        for i, dt in enumerate(toutes_dates):
+            y_pos = marge_haut + hauteur_graph - (i * pas_y) # Inverser l'axe Y
+
+            # Valeurs pour les deux comptes à cette date
+            val_1 = soldes_1.get(dt, Decimal('0'))
+            val_2 = soldes_2.get(dt, Decimal('0'))
+
+            # Calculer les positions X
+            x_1 = marge_gauche + (largeur_graph / 2) + float(val_1) * echelle_x
+            x_2 = marge_gauche + (largeur_graph / 2) + float(val_2) * echelle_x
+
+            # Choisir la couleur en fonction du type
+            color_1 = couleur_1_recette if type_1 == 'recette' else couleur_1_depense
+            color_2 = couleur_2_recette if type_2 == 'recette' else couleur_2_depense
+
+            # Dessiner les points
+            svg_content += f'<circle cx="{x_1}" cy="{y_pos}" r="3" fill="{color_1}" />\n'
+            svg_content += f'<circle cx="{x_2}" cy="{y_pos}" r="3" fill="{color_2}" />\n'
+
+            # Optionnel : Lier les points des deux comptes pour la même date
+            svg_content += f'<line x1="{x_1}" y1="{y_pos}" x2="{x_2}" y2="{y_pos}" stroke="#ccc" stroke-dasharray="2" />\n'
+
+        # Ajouter les labels des dates sur l'axe Y
+        for i, dt in enumerate(toutes_dates):
+            y_pos = marge_haut + hauteur_graph - (i * pas_y)
+            svg_content += f'<text x="{marge_gauche - 10}" y="{y_pos + 4}" text-anchor="end" font-size="10">{dt.strftime("%d.%m")}</text>\n'
+
+        # Ajouter une légende simple
+        svg_content += f'<rect x="{largeur_svg - 120}" y="{10}" width="10" height="10" fill="{color_1}" />\n'
+        svg_content += f'<text x="{largeur_svg - 105}" y="20" font-size="12">Compte 1</text>\n'
+        svg_content += f'<rect x="{largeur_svg - 120}" y="{25}" width="10" height="10" fill="{color_2}" />\n'
+        svg_content += f'<text x="{largeur_svg - 105}" y="35" font-size="12">Compte 2</text>\n'
+
+        svg_content += '</svg>'
+
+        return svg_content
+
+    def old_compare_comptes_soldes_barres(self, compte_id_1: int, compte_id_2: int,
+                                    date_debut: date, date_fin: date,
+                                    type_1: str, type_2: str,
+                                    couleur_1: str = "#0000FF", couleur_2: str = "#00FF00") -> str:
+        """
+        Génère un graphique en BARRES SVG comparant l'évolution des soldes de deux comptes.
+        Axe X horizontal : valeurs des soldes (compte 1 à gauche, compte 2 à droite, axe Y au centre)
+        Axe Y vertical descendant : dates (sur le côté gauche)
+        """
+        from datetime import timedelta
+
+        # Récupérer les soldes quotidiens pour chaque compte et type
+        soldes_1 = self._get_daily_balances(compte_id_1, date_debut, date_fin, type_1)
+        soldes_2 = self._get_daily_balances(compte_id_2, date_debut, date_fin, type_2)
+
+        # Trier les dates
+        toutes_dates = sorted(set(soldes_1.keys()) | set(soldes_2.keys()))
+        if not toutes_dates:
+            return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+
+        # Obtenir les valeurs
+        valeurs_1 = [soldes_1.get(dt, Decimal('0')) for dt in toutes_dates]
+        valeurs_2 = [soldes_2.get(dt, Decimal('0')) for dt in toutes_dates]
+
+        # Calculer les valeurs absolues pour l'échelle X
+        toutes_valeurs = valeurs_1 + valeurs_2
+        if not toutes_valeurs:
+            return "<svg width='800' height='400'><text x='10' y='20'>Aucune donnée pour les dates sélectionnées.</text></svg>"
+
+        max_val = max(abs(float(v)) for v in toutes_valeurs)
+        if max_val == 0:
+            max_val = 1  # Éviter la division par zéro
+
+        # --- Paramètres du graphique ---
+        largeur_svg, hauteur_svg = 900, 500
+        marge_gauche, marge_droite = 120, 40  # Augmenter la marge gauche pour les labels de dates
+        marge_haut, marge_bas = 40, 40
+        largeur_graph = largeur_svg - marge_gauche - marge_droite
+        hauteur_graph = hauteur_svg - marge_haut - marge_bas
+
+        # Échelle pour les valeurs (axe X)
+        echelle_x = largeur_graph / (2 * max_val)  # Pour couvrir -max à +max
+
+        # Échelle pour les dates (axe Y)
+        nb_dates = len(toutes_dates)
+        if nb_dates <= 1:
+            hauteur_barre = hauteur_graph * 0.8
+            espacement = 0
+        else:
+            hauteur_barre = hauteur_graph / nb_dates * 0.8  # 80% de la place pour la barre
+            espacement = hauteur_graph / nb_dates - hauteur_barre
+
+        svg_content = f'<svg width="{largeur_svg}" height="{hauteur_svg}" xmlns="http://www.w3.org/2000/svg">\n'
+
+        # Ligne centrale (valeur 0 sur l'axe X)
+        x_zero = marge_gauche + largeur_graph / 2
+        svg_content += f'<line x1="{x_zero}" y1="{marge_haut}" x2="{x_zero}" y2="{marge_haut + hauteur_graph}" stroke="#000" stroke-dasharray="4" />\n'
+
+        # Dessiner les barres pour chaque date
+        for i, (dt, val_1, val_2) in enumerate(zip(toutes_dates, valeurs_1, valeurs_2)):
+            # Position Y centrale pour ce groupe de barres
+            y_centre = marge_haut + (i * (hauteur_barre + espacement)) + (hauteur_barre + espacement) / 2
+
+            # Barre Compte 1 (à gauche de l'axe Y)
+            largeur_1 = abs(float(val_1)) * echelle_x
+            if val_1 >= 0:
+                x_1 = x_zero # Commence à l'axe Y
+                largeur_1 = -largeur_1 # Barre vers la gauche
+            else:
+                x_1 = x_zero + float(val_1) * echelle_x # Commence à la position négative
+            svg_content += f'<rect x="{x_1 + largeur_1}" y="{y_centre - hauteur_barre/2}" width="{abs(largeur_1)}" height="{hauteur_barre}" fill="{couleur_1}" />\n'
+
+            # Barre Compte 2 (à droite de l'axe Y)
+            largeur_2 = abs(float(val_2)) * echelle_x
+            if val_2 >= 0:
+                x_2 = x_zero # Commence à l'axe Y
+            else:
+                x_2 = x_zero + float(val_2) * echelle_x # Commence à la position négative
+                largeur_2 = -largeur_2 # Barre vers la gauche
+            svg_content += f'<rect x="{x_2}" y="{y_centre - hauteur_barre/2}" width="{abs(largeur_2)}" height="{hauteur_barre}" fill="{couleur_2}" />\n'
+
+        # Ajouter les labels des dates sur l'axe Y (à gauche)
+        for i, dt in enumerate(toutes_dates):
+            y_centre = marge_haut + (i * (hauteur_barre + espacement)) + (hauteur_barre + espacement) / 2
+            svg_content += f'<text x="{marge_gauche - 10}" y="{y_centre}" text-anchor="end" dominant-baseline="middle" font-size="10">{dt.strftime("%d.%m")}</text>\n'
+
+        # Ajouter une légende simple
+        svg_content += f'<rect x="{marge_gauche}" y="{marge_haut - 25}" width="15" height="10" fill="{couleur_1}" />\n'
+        svg_content += f'<text x="{marge_gauche + 20}" y="{marge_haut - 15}" font-size="12">Compte 1 ({type_1})</text>\n'
+        svg_content += f'<rect x="{marge_gauche + 150}" y="{marge_haut - 25}" width="15" height="10" fill="{couleur_2}" />\n'
+        svg_content += f'<text x="{marge_gauche + 170}" y="{marge_haut - 15}" font-size="12">Compte 2 ({type_2})</text>\n'
+
+        svg_content += '</svg>'
+        return svg_content
+
+    def compare_comptes_soldes_barres(self, compte_id_1: int, compte_id_2: int,
+                                date_debut: date, date_fin: date,
+                                type_1: str, type_2: str,
+                                couleur_1: str = "#0000FF", couleur_2: str = "#00FF00") -> str:
+        """
+        Génère un graphique en BARRES SVG comparant l'évolution des soldes de deux comptes.
+        Axes épais, quadrillage fin, et graduations automatiques.
+        """
+        # Récupérer les soldes quotidiens pour chaque compte et type
+        soldes_1 = self._get_daily_balances(compte_id_1, date_debut, date_fin, type_1)
+        soldes_2 = self._get_daily_balances(compte_id_2, date_debut, date_fin, type_2)
+
+        toutes_dates = sorted(set(soldes_1.keys()) | set(soldes_2.keys()))
+        return svg_charts.graphique_barres_opposees(
+            [dt.strftime("%d.%m") for dt in toutes_dates],
+            [soldes_1.get(dt, 0) for dt in toutes_dates],
+            [soldes_2.get(dt, 0) for dt in toutes_dates],
+            couleurs=(couleur_1, couleur_2),
+            legendes=(f"Compte 1 ({type_1})", f"Compte 2 ({type_2})")
+        )
+
+    def get_top_comptes_echanges(self, compte_principal_id: int, user_id: int,
+                           date_debut: str, date_fin: str,
+                           direction: str = 'tous',
+                           limite: int = 50) -> List[Dict]:
+        """
+        Récupère les comptes avec lesquels un compte a le plus échangé de l'argent.
+
+        Args:
+            compte_principal_id (int): ID du compte principal source.
+            user_id (int): ID de l'utilisateur (pour vérification).
+            date_debut (str): Date de début (format 'YYYY-MM-DD').
+            date_fin (str): Date de fin (format 'YYYY-MM-DD').
+            direction (str): 'envoye', 'recu', ou 'tous'.
+            limite (int): Nombre maximum de comptes à retourner.
+
+        Returns:
+            List[Dict]: Liste triée de dictionnaires avec clés 'compte_id', 'nom_compte', 'total_montant', 'direction'
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le compte appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_principal_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return []
+
+                # Construire la requête selon la direction
+                if direction == 'envoye':
+                    # Transferts sortants vers d'autres comptes principaux
+                    query = """
+                    SELECT
+                        cp_dest.id as compte_id,
+                        cp_dest.nom_compte,
+                        SUM(t.montant) as total_montant,
+                        'envoye' as direction
+                    FROM transactions t
+                    JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                    WHERE t.compte_principal_id = %s
+                    AND t.type_transaction = 'transfert_sortant'
+                    AND t.date_transaction BETWEEN %s AND %s
+                    GROUP BY cp_dest.id, cp_dest.nom_compte
+                    ORDER BY total_montant DESC
+                    LIMIT %s
+                    """
+                elif direction == 'recu':
+                    # Transferts entrants depuis d'autres comptes principaux
+                    query = """
+                    SELECT
+                        cp_src.id as compte_id,
+                        cp_src.nom_compte,
+                        SUM(t.montant) as total_montant,
+                        'recu' as direction
+                    FROM transactions t
+                    JOIN comptes_principaux cp_src ON t.compte_source_id = cp_src.id
+                    WHERE t.compte_principal_id = %s
+                    AND t.type_transaction = 'transfert_entrant'
+                    AND t.date_transaction BETWEEN %s AND %s
+                    GROUP BY cp_src.id, cp_src.nom_compte
+                    ORDER BY total_montant DESC
+                    LIMIT %s
+                    """
+                else: # 'tous'
+                    # Combiner les deux directions
+                    query = """
+                    SELECT
+                        compte_id,
+                        nom_compte,
+                        SUM(total_montant) as total_montant,
+                        'tous' as direction
+                    FROM (
+                        -- Transferts ENVOYES
+                        SELECT
+                            cp_dest.id as compte_id,
+                            cp_dest.nom_compte,
+                            SUM(t.montant) as total_montant
+                        FROM transactions t
+                        JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                        WHERE t.compte_principal_id = %s
+                        AND t.type_transaction = 'transfert_sortant'
+                        AND t.date_transaction BETWEEN %s AND %s
+                        GROUP BY cp_dest.id, cp_dest.nom_compte
+
+                        UNION ALL
+
+                        -- Transferts RECUS
+                        SELECT
+                            cp_src.id as compte_id,
+                            cp_src.nom_compte,
+                            SUM(t.montant) as total_montant
+                        FROM transactions t
+                        JOIN comptes_principaux cp_src ON t.compte_source_id = cp_src.id
+                        WHERE t.compte_principal_id = %s
+                        AND t.type_transaction = 'transfert_entrant'
+                        AND t.date_transaction BETWEEN %s AND %s
+                        GROUP BY cp_src.id, cp_src.nom_compte
+                    ) AS combined
+                    GROUP BY compte_id, nom_compte
+                    ORDER BY total_montant DESC
+                    LIMIT %s
+                    """
+                    # Pour 'tous', on a 3 fois les paramètres
+                    params = [compte_principal_id, date_debut, date_fin,
+                            compte_principal_id, date_debut, date_fin,
+                            limite]
+                if direction in ['envoye', 'recu']:
+                    params = [compte_principal_id, date_debut, date_fin, limite]
+
+                cursor.execute(query, params)
+                resultats = cursor.fetchall()
+                logger.debug("get_top_comptes_echanges: %d comptes (compte %s, direction %s)", len(resultats), compte_principal_id, direction)
+                return [dict(row) for row in resultats]
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_top_comptes_echanges: {e}")
+            return []
+
+    def generer_graphique_top_comptes_echanges(self, donnees: List[Dict],
+                                            couleur_barre: str = "#4e79a7") -> str:
+        """
+        Génère un graphique en barres horizontales SVG pour les top comptes d'échange.
+        La barre la plus longue (montant le plus élevé) est en haut.
+        """
+        return svg_charts.graphique_barres_horizontales(
+            [row['nom_compte'] for row in donnees],
+            [row['total_montant'] for row in donnees],
+            couleurs=couleur_barre
+        )
+
+    def get_transactions_avec_comptes(self, compte_principal_id: int, user_id: int,
+                                    comptes_cibles_ids: List[int],
+                                    date_debut: str, date_fin: str) -> List[Dict]:
+        """
+        Récupère la liste des transactions entre un compte principal et une liste de comptes cibles.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le compte source appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_principal_id, user_id)
+                )
+                if not cursor.fetchone():
+                    return []
+
+                if not comptes_cibles_ids:
+                    return []
+
+                # Préparer la liste des IDs pour la requête
+                placeholders = ','.join(['%s'] * len(comptes_cibles_ids))
+                params = [compte_principal_id, date_debut, date_fin] + comptes_cibles_ids
+
+                # Requête pour récupérer les transactions sortantes ET entrantes
+                query = f"""
+                (
+                    -- Transferts SORTANTS vers les comptes cibles
+                    SELECT
+                        t.date_transaction,
+                        t.montant,
+                        cp_dest.id as compte_cible_id,
+                        cp_dest.nom_compte as nom_compte_cible,
+                        'sortant' as direction
+                    FROM transactions t
+                    JOIN comptes_principaux cp_dest ON t.compte_destination_id = cp_dest.id
+                    WHERE t.compte_principal_id = %s
+                      AND t.type_transaction = 'transfert_sortant'
+                      AND t.date_transaction BETWEEN %s AND %s
+                      AND cp_dest.id IN ({placeholders})
+                )
+                UNION ALL
+                (
+                    -- Transferts ENTRANTS depuis les comptes cibles
+                    SELECT
+                        t.date_transaction,
+                        t.montant,
+                        cp_src.id as compte_cible_id,
+                        cp_src.nom_compte as nom_compte_cible,
+                        'entrant' as direction
+                    FROM transactions t
+                    JOIN comptes_principaux cp_src ON t.compte_source_id = cp_src.id
+                    WHERE t.compte_principal_id = %s
+                      AND t.type_transaction = 'transfert_entrant'
+                      AND t.date_transaction BETWEEN %s AND %s
+                      AND cp_src.id IN ({placeholders})
+                )
+                ORDER BY date_transaction ASC
+                """
+                # Pour UNION ALL, on a besoin de répéter les paramètres
+                params = [compte_principal_id, date_debut, date_fin] + comptes_cibles_ids + [compte_principal_id, date_debut, date_fin] + comptes_cibles_ids
+
+                cursor.execute(query, params)
+                resultats = cursor.fetchall()
+                return [dict(row) for row in resultats]
+
+        except Exception as e:
+            logger.error(f"Erreur dans get_transactions_avec_comptes: {e}")
+            return []
+
+    def _structurer_donnees_pour_graphique(self, donnees_brutes: List[Dict], cumuler: bool = False) -> Dict:
+        """
+        Transforme une liste plate de transactions en une structure utilisable pour le graphique.
+        Si cumuler=True, toutes les transactions sont fusionnées en une seule série.
+        Si cumuler=False, les transactions sont regroupées par compte cible.
+        """
+        if not donnees_brutes:
+            return {}
+
+        # Trier par date
+        donnees_triees = sorted(donnees_brutes, key=lambda x: x['date_transaction'])
+        dates_uniques = sorted(set(d['date_transaction'] for d in donnees_triees))
+
+        if cumuler:
+            # Mode cumulé : une seule série
+            serie_cumulee = []
+            for dt in dates_uniques:
+                total_jour = sum(d['montant'] for d in donnees_triees if d['date_transaction'] == dt)
+                serie_cumulee.append(total_jour)
+            return {
+                'dates': dates_uniques,
+                'series': {
+                    'Tous les comptes': serie_cumulee
+                }
+            }
+        else:
+            # Mode séparé : une série par compte cible
+            series = {}
+            for d in donnees_triees:
+                nom_compte = d['nom_compte_cible']
+                if nom_compte not in series:
+                    series[nom_compte] = [0] * len(dates_uniques)
+                # Trouver l'index de la date
+                idx = dates_uniques.index(d['date_transaction'])
+                series[nom_compte][idx] += d['montant']
+
+            return {
+                'dates': dates_uniques,
+                'series': series
+            }
+
+    def generer_graphique_echanges_temporel_lignes(self, donnees_structurees: Dict,
+                                                  couleurs: List[str] = None) -> str:
+        """
+        Génère un graphique en lignes SVG avec axes Y améliorés.
+        """
+        if not donnees_structurees or not donnees_structurees['series']:
+            return svg_charts.svg_message("Aucune donnée disponible.")
+        series = donnees_structurees['series']
+        return svg_charts.graphique_lignes(
+            [dt.strftime("%d.%m") for dt in donnees_structurees['dates']],
+            series,
+            couleurs=couleurs,
+            afficher_legende=len(series) > 1 or list(series.keys())[0] != 'Tous les comptes'
+        )
+
+    def generer_graphique_echanges_temporel_barres(self, donnees_structurees: Dict,
+                                                  couleurs: List[str] = None) -> str:
+        """
+        Génère un graphique en barres SVG avec axes Y améliorés.
+        """
+        if not donnees_structurees or not donnees_structurees['series']:
+            return svg_charts.svg_message("Aucune donnée disponible.")
+        series = donnees_structurees['series']
+        return svg_charts.graphique_barres(
+            [dt.strftime("%d.%m") for dt in donnees_structurees['dates']],
+            series,
+            couleurs=couleurs,
+            afficher_legende=len(series) > 1 or list(series.keys())[0] != 'Tous les comptes'
+        )
+
+    def _get_solde_avant_periode(self, compte_id: int, user_id: int, debut_periode: date) -> Decimal:
+        """
+        Retourne le solde juste avant le début de la période, pour un compte principal.
+        Cela correspond au solde_apres de la dernière transaction avant cette date,
+        ou au solde_initial du compte si aucune transaction n'existe avant.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que le compte appartient à l'utilisateur
+                cursor.execute(
+                    "SELECT id, solde_initial FROM comptes_principaux WHERE id = %s AND utilisateur_id = %s",
+                    (compte_id, user_id)
+                )
+                if not cursor.fetchone():
+                    logger.warning(f"Tentative d'accès non autorisé ou compte inexistant: compte={compte_id}, user={user_id}")
+                    return Decimal('0')
+
+                # Récupérer la dernière transaction avant la date de début de la période
+                cursor.execute("""
+                    SELECT solde_apres
+                    FROM transactions
+                    WHERE compte_principal_id = %s AND date_transaction < %s
+                    ORDER BY date_transaction DESC, id DESC
+                    LIMIT 1
+                """, (compte_id, debut_periode))
+                result = cursor.fetchone()
+
+                if result and result['solde_apres'] is not None:
+                    # Retourner le solde après la dernière transaction avant la période
+                    return Decimal(str(result['solde_apres']))
+                else:
+                    # Aucune transaction avant la période, retourner le solde initial du compte
+                    cursor.execute(
+                        "SELECT solde_initial FROM comptes_principaux WHERE id = %s",
+                        (compte_id,)
+                    )
+                    initial_result = cursor.fetchone()
+                    if initial_result and initial_result['solde_initial'] is not None:
+                        return Decimal(str(initial_result['solde_initial']))
+                    else:
+                        # Si le solde_initial n'est pas non plus défini, retourner 0
+                        return Decimal('0')
+        except Exception as e:
+            logger.error(f"Erreur dans _get_solde_avant_periode (compte {compte_id}, date {debut_periode}): {e}")
+            return Decimal('0')
+
+
+class CategorieTransaction:
+    """Classe pour gérer les catégories de transactions"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_categories_utilisateur(self, user_id: int, type_categorie: str = None) -> List[Dict]:
+        """Récupère les catégories de transactions pour un utilisateur donné"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT id, nom, description, couleur, icone, type_categorie, budget_mensuel
+                    FROM categories_transactions
+                    WHERE utilisateur_id = %s AND actif = TRUE
+                """
+                params = [user_id]
+
+                if type_categorie:
+                    query += " AND type_categorie = %s"
+                    params.append(type_categorie)
+
+                query += " ORDER BY type_categorie, nom ASC"
+
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération catégories: {e}")
+            return []
+
+    def creer_categorie(self, user_id: int, nom: str, type_categorie: str = "Dépense",
+                        description: str = '', couleur: str = None, icone: str = None, budget_mensuel: float = 0.0) -> Tuple[bool, str]:
+        """Crée une nouvelle catégorie de transaction pour un utilisateur"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier si la catégorie existe déjà
+                cursor.execute("""
+                    SELECT id FROM categories_transactions
+                    WHERE utilisateur_id = %s AND nom = %s AND type_categorie = %s
+                """, (user_id, nom, type_categorie))
+
+                if cursor.fetchone():
+                    return False, "Cette catégorie existe déjà"
+
+                # Couleur par défaut si non fournie
+                if not couleur:
+                    couleur = self._generer_couleur_aleatoire()
+
+                cursor.execute("""
+                    INSERT INTO categories_transactions
+                    (utilisateur_id, nom, description, type_categorie, couleur, icone, budget_mensuel)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, nom, description, type_categorie, couleur, icone, budget_mensuel))
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+
+                return True, "Catégorie créée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur création catégorie: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def modifier_categorie(self, categorie_id: int, user_id: int, **kwargs) -> Tuple[bool, str]:
+        """Met à jour une catégorie de transaction existante"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier que la catégorie appartient à l'utilisateur
+                cursor.execute("""
+                    SELECT id FROM categories_transactions
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (categorie_id, user_id))
+
+                if not cursor.fetchone():
+                    return False, "Catégorie non trouvée ou non autorisée"
+
+                # Construire la requête dynamiquement
+                champs = []
+                valeurs = []
+                for champ, valeur in kwargs.items():
+                    if valeur is not None:
+                        champs.append(f"{champ} = %s")
+                        valeurs.append(valeur)
+
+                if not champs:
+                    return False, "Aucune modification spécifiée"
+
+                valeurs.extend([categorie_id, user_id])
+                query = f"""
+                    UPDATE categories_transactions
+                    SET {', '.join(champs)}
+                    WHERE id = %s AND utilisateur_id = %s
+                """
+
+                cursor.execute(query, valeurs)
+                VersionDonnees.incrementer_with_cursor(cursor, 'regles', user_id)
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+                return True, "Catégorie modifiée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur mise à jour catégorie: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    #def get_categorie_complementaire(self, categorie_id: int, user_id: int) -> Optional[Dict]:
+    #    """Récupère la catégorie complémentaire associée à une catégorie donnée"""
+    #    try:
+    #        with self.db.get_cursor() as cursor:
+    #            cursor.execute("""
+    #                SELECT ct2.id, ct2.nom, ct2.description, ct2.couleur, ct2.icone, ct2.type_categorie, ct2.budget_mensuel
+    #                FROM categories_transactions ct1
+    #                JOIN categories_transactions ct2 ON ct1.categorie_complementaire_id = ct2.id
+    #                WHERE ct1.id = %s AND ct1.utilisateur_id = %s AND ct2.actif = TRUE
+    #            """, (categorie_id, user_id))
+    #            return cursor.fetchone()
+    #    except Exception as e:
+    #        logger.error(f"Erreur récupération catégorie complémentaire: {e}")
+    #        return None
+
+    def supprimer_categorie(self, categorie_id: int, user_id: int) -> Tuple[bool, str]:
+        """Supprime une catégorie de transaction (soft delete)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier s'il y a des transactions utilisant cette catégorie
+                cursor.execute("""
+                    SELECT COUNT(*) as count
+                    FROM transaction_categories
+                    WHERE categorie_id = %s
+                """, (categorie_id,))
+                result = cursor.fetchone()
+
+                if result and result['count'] > 0:
+                    return False, "Impossible de supprimer : catégorie utilisée dans des transactions"
+
+                # Soft delete
+                cursor.execute("""
+                    UPDATE categories_transactions
+                    SET actif = FALSE
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (categorie_id, user_id))
+
+                if cursor.rowcount > 0:
+                    VersionDonnees.incrementer_with_cursor(cursor, 'regles', user_id)
+                    VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+                    return True, "Catégorie supprimée avec succès"
+                else:
+                    return False, "Catégorie non trouvée ou non autorisée"
+        except Exception as e:
+            logger.error(f"Erreur suppression catégorie: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def associer_categorie_transaction(self, transaction_id: int, categorie_id: int, user_id: int) -> Tuple[bool, str]:
+        """Associe une catégorie à une transaction (évite les doublons)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # ... vérifications de permissions existantes ...
+
+                # Vérifier si l'association existe déjà
+                cursor.execute("""
+                    SELECT id FROM transaction_categories
+                    WHERE transaction_id = %s AND categorie_id = %s AND utilisateur_id = %s
+                """, (transaction_id, categorie_id, user_id))
+
+                if cursor.fetchone():
+                    return False, "Cette catégorie est déjà associée à la transaction"
+
+                # Créer la nouvelle association
+                cursor.execute("""
+                    INSERT INTO transaction_categories (transaction_id, categorie_id, utilisateur_id)
+                    VALUES (%s, %s, %s)
+                """, (transaction_id, categorie_id, user_id))
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+
+                return True, "Catégorie associée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur association catégorie à transaction: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def associer_categorie_non_categorisees(self, categorie_id: int, user_id: int, compte_id: int = None,
+                                            date_debut: str = None, date_fin: str = None) -> Optional[int]:
+        """
+        Associe une catégorie à toutes les transactions sans catégorie d'un compte principal
+        (ou de tous les comptes de l'utilisateur) sur une période, en une seule requête
+        INSERT ... SELECT avec anti-jointure. Une catégorie inactive ou d'un autre utilisateur
+        n'est associée à rien.
+        Retourne le nombre de transactions catégorisées, None en cas d'erreur.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    INSERT INTO transaction_categories (transaction_id, categorie_id, utilisateur_id)
+                    SELECT t.id, c.id, %s
+                    FROM transactions t
+                    JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    JOIN categories_transactions c ON c.id = %s AND c.utilisateur_id = %s AND c.actif = TRUE
+                    WHERE cp.utilisateur_id = %s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM transaction_categories tc
+                        WHERE tc.transaction_id = t.id AND tc.utilisateur_id = %s
+                    )
+                """
+                params = [user_id, categorie_id, user_id, user_id, user_id]
+
+                if compte_id:
+                    query += " AND t.compte_principal_id = %s"
+                    params.append(compte_id)
+                if date_debut:
+                    query += " AND t.date_transaction >= %s"
+                    params.append(date_debut)
+                if date_fin:
+                    query += " AND t.date_transaction < DATE_ADD(%s, INTERVAL 1 DAY)"
+                    params.append(date_fin)
+
+                cursor.execute(query, params)
+                nb = cursor.rowcount
+                if nb:
+                    VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+            logger.info(f"Catégorie {categorie_id} associée à {nb} transaction(s) non catégorisée(s) (utilisateur {user_id})")
+            return nb
+        except Exception as e:
+            logger.error(f"Erreur catégorisation en masse: {e}")
+            return None
+
+    def dissocier_categorie_transaction(self, transaction_id: int, user_id: int) -> Tuple[bool, str]:
+        """Dissocie une catégorie d'une transaction"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Vérifier les permissions
+                cursor.execute("""
+                    SELECT tc.id
+                    FROM transaction_categories tc
+                    JOIN transactions t ON tc.transaction_id = t.id
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                    WHERE tc.transaction_id = %s AND tc.utilisateur_id = %s
+                    AND (
+                        cp.utilisateur_id = %s OR
+                        sc.compte_principal_id IN (
+                            SELECT id FROM comptes_principaux WHERE utilisateur_id = %s
+                        )
+                    )
+                """, (transaction_id, user_id, user_id, user_id))
+
+                if not cursor.fetchone():
+                    return False, "Association non trouvée ou non autorisée"
+
+                cursor.execute("""
+                    DELETE FROM transaction_categories
+                    WHERE transaction_id = %s AND utilisateur_id = %s
+                """, (transaction_id, user_id))
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+
+                return True, "Catégorie dissociée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur dissociation catégorie de transaction: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def get_categorie_par_id(self, categorie_id: int, user_id: int) -> Optional[Dict]:
+        """Récupère une catégorie par son ID pour un utilisateur donné"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, nom, description, couleur, icone, type_categorie, budget_mensuel
+                    FROM categories_transactions
+                    WHERE id = %s AND utilisateur_id = %s AND actif = TRUE
+                """, (categorie_id, user_id))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Erreur récupération catégorie par ID: {e}")
+            return None
+
+    def get_transactions_par_categorie(self, categorie_id: int, user_id: int,
+                                     date_debut: str = None, date_fin: str = None) -> List[Dict]:
+        """Récupère toutes les transactions associées à une catégorie"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT
+                        t.*,
+                        cp.nom_compte as nom_compte_principal,
+                        sc.nom_sous_compte as nom_sous_compte
+                    FROM transaction_categories tc
+                    JOIN transactions t ON tc.transaction_id = t.id
+                    LEFT JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                    LEFT JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                    WHERE tc.categorie_id = %s AND tc.utilisateur_id = %s
+                """
+                params = [categorie_id, user_id]
+
+                if date_debut and date_fin:
+                    query += " AND DATE(t.date_transaction) BETWEEN %s AND %s"
+                    params.extend([date_debut, date_fin])
+
+                query += " ORDER BY t.date_transaction DESC"
+
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération transactions par catégorie: {e}")
+            return []
+
+    def get_statistiques_categories(self, user_id: int, date_debut: str = None, date_fin: str = None) -> List[Dict]:
+        """Récupère des statistiques sur les catégories de transactions"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT
+                        c.id,
+                        c.nom,
+                        c.type_categorie,
+                        c.couleur,
+                        c.icone,
+                        COUNT(tc.transaction_id) AS nb_transactions,
+                        SUM(t.montant) AS total_montant,
+                        AVG(t.montant) AS moyenne_montant,
+                        c.budget_mensuel,
+                        CASE
+                            WHEN c.budget_mensuel > 0 THEN
+                                ROUND((SUM(t.montant) / c.budget_mensuel) * 100, 2)
+                            ELSE 0
+                        END as pourcentage_budget
+                    FROM categories_transactions c
+                    LEFT JOIN transaction_categories tc ON c.id = tc.categorie_id
+                    LEFT JOIN transactions t ON tc.transaction_id = t.id
+                    WHERE c.utilisateur_id = %s AND c.actif = TRUE
+                """
+                params = [user_id]
+
+                if date_debut and date_fin:
+                    query += " AND t.date_transaction BETWEEN %s AND %s"
+                    params.extend([date_debut, date_fin])
+
+                query += """
+                    GROUP BY c.id, c.nom, c.type_categorie, c.couleur, c.icone, c.budget_mensuel
+                    ORDER BY c.type_categorie, total_montant DESC
+                """
+
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération statistiques catégories: {e}")
+            return []
+
+    def _generer_couleur_aleatoire(self) -> str:
+        """Génère une couleur hexadécimale aléatoire"""
+        import random
+        return f"#{random.randint(0, 0xFFFFFF):06x}"
+
+    def get_categories_transaction(self, transaction_id: int, user_id: int) -> List[Dict]:
+        """Récupère TOUTES les catégories d'une transaction spécifique"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.id, c.nom, c.description, c.couleur, c.icone, c.type_categorie
+                    FROM transaction_categories tc
+                    JOIN categories_transactions c ON tc.categorie_id = c.id
+                    WHERE tc.transaction_id = %s AND tc.utilisateur_id = %s
+                """, (transaction_id, user_id))
+                return cursor.fetchall()  # Retourne une LISTE
+        except Exception as e:
+            logger.error(f"Erreur récupération catégories transaction: {e}")
+            return []
+    def dissocier_categorie_transaction(self, transaction_id: int, categorie_id: int, user_id: int) -> Tuple[bool, str]:
+        """Dissocie une catégorie spécifique d'une transaction"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM transaction_categories
+                    WHERE transaction_id = %s AND categorie_id = %s AND utilisateur_id = %s
+                """, (transaction_id, categorie_id, user_id))
+
+                if cursor.rowcount > 0:
+                    VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+                    return True, "Catégorie dissociée avec succès"
+                else:
+                    return False, "Association non trouvée"
+        except Exception as e:
+            logger.error(f"Erreur dissociation catégorie de transaction: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def dissocier_toutes_categories_transaction(self, transaction_id: int, user_id: int) -> Tuple[bool, str]:
+        """Dissocie TOUTES les catégories d'une transaction"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM transaction_categories
+                    WHERE transaction_id = %s AND utilisateur_id = %s
+                """, (transaction_id, user_id))
+                VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+                return True, "Toutes les catégories ont été dissociées"
+        except Exception as e:
+            logger.error(f"Erreur dissociation catégories de transaction: {e}")
+            return False, f"Erreur: {str(e)}"
+
+
+class RegleCategorisation:
+    """
+    Règles de catégorisation automatique d'un utilisateur (mot-clé, regex, IBAN, montant).
+    Les règles sont compilées en un MoteurCategorisation gardé en cache tant que la
+    version 'regles' de l'utilisateur ne change pas.
+    """
+
+    CHAMPS_MODIFIABLES = ('categorie_id', 'type_regle', 'motif', 'montant_min', 'montant_max', 'priorite', 'actif')
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_regles(self, user_id: int, actives_seulement: bool = False) -> List[Dict]:
+        """Règles de l'utilisateur avec le nom de leur catégorie, les plus prioritaires d'abord"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                    SELECT r.id, r.categorie_id, r.type_regle, r.motif, r.montant_min, r.montant_max,
+                           r.priorite, r.actif, c.nom AS categorie_nom, c.couleur AS categorie_couleur
+                    FROM regles_categorisation r
+                    JOIN categories_transactions c ON c.id = r.categorie_id
+                    WHERE r.utilisateur_id = %s
+                """
+                if actives_seulement:
+                    query += " AND r.actif = TRUE AND c.actif = TRUE"
+                query += " ORDER BY r.priorite DESC, r.id ASC"
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Erreur récupération règles de catégorisation: {e}")
+            return []
+
+    def _valider(self, cursor, user_id: int, valeurs: Dict) -> Optional[str]:
+        """Message d'erreur si la règle est invalide, None sinon"""
+        type_regle = valeurs.get('type_regle')
+        if type_regle not in TYPES_REGLE:
+            return f"Type de règle inconnu : {type_regle}"
+        motif = (valeurs.get('motif') or '').strip()
+        if type_regle == 'montant':
+            if valeurs.get('montant_min') in (None, '') and valeurs.get('montant_max') in (None, ''):
+                return "Une règle de montant doit avoir un minimum ou un maximum"
+        elif not motif:
+            return "Le motif est obligatoire"
+        if type_regle == 'regex':
+            erreur = verifier_regex(motif)
+            if erreur:
+                return erreur
+        cursor.execute("""
+            SELECT id FROM categories_transactions
+            WHERE id = %s AND utilisateur_id = %s AND actif = TRUE
+        """, (valeurs.get('categorie_id'), user_id))
+        if not cursor.fetchone():
+            return "Catégorie non trouvée ou non autorisée"
+        return None
+
+    def creer_regle(self, user_id: int, categorie_id: int, type_regle: str, motif: str = None,
+                    montant_min: Decimal = None, montant_max: Decimal = None, priorite: int = 0) -> Tuple[bool, str]:
+        """Crée une règle de catégorisation pour l'utilisateur"""
+        valeurs = {'categorie_id': categorie_id, 'type_regle': type_regle, 'motif': motif,
+                   'montant_min': montant_min, 'montant_max': montant_max}
+        try:
+            with self.db.get_cursor() as cursor:
+                erreur = self._valider(cursor, user_id, valeurs)
+                if erreur:
+                    return False, erreur
+                cursor.execute("""
+                    INSERT INTO regles_categorisation
+                    (utilisateur_id, categorie_id, type_regle, motif, montant_min, montant_max, priorite)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, categorie_id, type_regle, (motif or '').strip() or None,
+                      montant_min if montant_min != '' else None,
+                      montant_max if montant_max != '' else None, int(priorite or 0)))
+                VersionDonnees.incrementer_with_cursor(cursor, 'regles', user_id)
+                return True, "Règle créée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur création règle de catégorisation: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def modifier_regle(self, regle_id: int, user_id: int, **kwargs) -> Tuple[bool, str]:
+        """Met à jour une règle existante (seuls les champs de CHAMPS_MODIFIABLES sont pris en compte)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT categorie_id, type_regle, motif, montant_min, montant_max
+                    FROM regles_categorisation
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (regle_id, user_id))
+                regle = cursor.fetchone()
+                if not regle:
+                    return False, "Règle non trouvée ou non autorisée"
+
+                modifications = {champ: valeur for champ, valeur in kwargs.items()
+                                 if champ in self.CHAMPS_MODIFIABLES and valeur is not None}
+                if not modifications:
+                    return False, "Aucune modification spécifiée"
+
+                erreur = self._valider(cursor, user_id, {**regle, **modifications})
+                if erreur:
+                    return False, erreur
+
+                champs = ', '.join(f"{champ} = %s" for champ in modifications)
+                cursor.execute(f"""
+                    UPDATE regles_categorisation
+                    SET {champs}
+                    WHERE id = %s AND utilisateur_id = %s
+                """, [*modifications.values(), regle_id, user_id])
+                VersionDonnees.incrementer_with_cursor(cursor, 'regles', user_id)
+                return True, "Règle modifiée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur mise à jour règle de catégorisation: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def supprimer_regle(self, regle_id: int, user_id: int) -> Tuple[bool, str]:
+        """Supprime définitivement une règle"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM regles_categorisation
+                    WHERE id = %s AND utilisateur_id = %s
+                """, (regle_id, user_id))
+                if cursor.rowcount == 0:
+                    return False, "Règle non trouvée ou non autorisée"
+                VersionDonnees.incrementer_with_cursor(cursor, 'regles', user_id)
+                return True, "Règle supprimée avec succès"
+        except Exception as e:
+            logger.error(f"Erreur suppression règle de catégorisation: {e}")
+            return False, f"Erreur: {str(e)}"
+
+    def get_moteur(self, user_id: int) -> MoteurCategorisation:
+        """Moteur compilé des règles actives, recompilé seulement si la version 'regles' a changé"""
+        version = VersionDonnees(self.db).get_version('regles', user_id)
+        return cache_moteurs.get_or_compile(
+            user_id, version, lambda: self.get_regles(user_id, actives_seulement=True))
+
+    def appliquer_regles(self, user_id: int, compte_id: int = None, depuis_id: int = None,
+                         date_debut: str = None, date_fin: str = None) -> Optional[int]:
+        """
+        Catégorise les transactions sans catégorie de l'utilisateur avec ses règles :
+        une requête pour les lire, un passage du moteur compilé, un INSERT groupé.
+        `depuis_id` limite aux transactions d'identifiant supérieur (celles d'un import).
+        Retourne le nombre de transactions catégorisées, None en cas d'erreur.
+        """
+        try:
+            moteur = self.get_moteur(user_id)
+            if not len(moteur):
+                return 0
+            with self.db.get_cursor(tuples=True) as cursor:
+                query = """
+                    SELECT t.id, CONCAT(COALESCE(t.description, ''), ' ', COALESCE(t.reference, '')), t.montant
+                    FROM transactions t
+                    WHERE t.utilisateur_id = %s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM transaction_categories tc
+                        WHERE tc.transaction_id = t.id AND tc.utilisateur_id = %s
+                    )
+                """
+                params = [user_id, user_id]
+                if compte_id:
+                    query += " AND t.compte_principal_id = %s"
+                    params.append(compte_id)
+                if depuis_id:
+                    query += " AND t.id > %s"
+                    params.append(depuis_id)
+                if date_debut:
+                    query += " AND t.date_transaction >= %s"
+                    params.append(date_debut)
+                if date_fin:
+                    query += " AND t.date_transaction < DATE_ADD(%s, INTERVAL 1 DAY)"
+                    params.append(date_fin)
+                cursor.execute(query, params)
+                associations = moteur.categoriser_lot(cursor.fetchall())
+
+                if associations:
+                    cursor.executemany("""
+                        INSERT INTO transaction_categories (transaction_id, categorie_id, utilisateur_id)
+                        VALUES (%s, %s, %s)
+                    """, [(transaction_id, categorie_id, user_id) for transaction_id, categorie_id in associations])
+                    VersionDonnees.incrementer_with_cursor(cursor, 'banque', user_id)
+            logger.info(f"{len(associations)} transaction(s) catégorisée(s) par règles (utilisateur {user_id})")
+            return len(associations)
+        except Exception as e:
+            logger.error(f"Erreur application des règles de catégorisation: {e}")
+            return None
+
+
+class StatistiquesBancaires:
+    """Classe pour générer des statistiques bancaires"""
+
+    def __init__(self, db):
+        # L'instance 'db' doit avoir une méthode get_cursor()
+        self.db = db
+
+    def get_resume_utilisateur(self, user_id: int, statut: str = 'validée') -> Dict:
+        """Résumé financier complet en utilisant les classes existantes"""
+        try:
+            # Récupérer les comptes principaux en utilisant la classe existante
+            compte_model = ComptePrincipal(self.db)
+            comptes = compte_model.get_by_user_id(user_id)
+
+            # Calculer les totaux des comptes principaux
+            nb_comptes = len(comptes)
+            noms_banques = set(compte['nom_banque'] for compte in comptes)
+            nb_banques = len(noms_banques)
+            solde_total_principal = sum(Decimal(str(compte['solde'])) for compte in comptes)
+
+            # Récupérer et calculer les totaux des sous-comptes
+            sous_compte_model = SousCompte(self.db)
+            nb_sous_comptes = 0
+            epargne_totale = Decimal('0')
+            objectifs_totaux = Decimal('0')
+
+            for compte in comptes:
+                sous_comptes = sous_compte_model.get_by_compte_principal_id(compte['id'])
+                nb_sous_comptes += len(sous_comptes)
+                epargne_totale += sum(Decimal(str(sc['solde'])) for sc in sous_comptes)
+                objectifs_totaux += sum(Decimal(str(sc['objectif_montant'] or '0')) for sc in sous_comptes)
+
+            # Calculer le patrimoine total
+            patrimoine_total = solde_total_principal + epargne_totale
+
+            # Récupérer les transactions du mois en utilisant TransactionFinanciere
+            transaction_model = TransactionFinanciere(self.db)
+            nb_transactions_mois = 0
+
+            # Pour chaque compte, compter les transactions du mois
+            for compte in comptes:
+                transactions = transaction_model.get_historique_compte(
+                    'compte_principal', compte['id'], user_id,
+                    date_from=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
+                    date_to=datetime.now().strftime('%Y-%m-%d')
+                )
+                nb_transactions_mois += len(transactions)
+
+            # Pour les sous-comptes
+            for compte in comptes:
+                sous_comptes = sous_compte_model.get_by_compte_principal_id(compte['id'])
+                for sous_compte in sous_comptes:
+                    transactions = transaction_model.get_historique_compte(
+                        'sous_compte', sous_compte['id'], user_id,
+                        date_from=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
+                        date_to=datetime.now().strftime('%Y-%m-%d')
+                    )
+                    nb_transactions_mois += len(transactions)
+
+            # Pour les écritures comptables, nous utilisons une requête directe
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    COUNT(*) as nb_ecritures_mois,
+                    SUM(CASE WHEN type_ecriture = 'depense' THEN montant ELSE 0 END) as total_depenses,
+                    SUM(CASE WHEN type_ecriture = 'recette' THEN montant ELSE 0 END) as total_recettes
+                FROM ecritures_comptables
+                WHERE utilisateur_id = %s
+                AND statut = %s
+                AND date_ecriture >= DATE_SUB(NOW(), INTERVAL 1 MONTH)
+                """
+                cursor.execute(query, (user_id, statut))
+                stats_ecritures = cursor.fetchone()
+
+            nb_ecritures_mois = stats_ecritures['nb_ecritures_mois'] or 0
+            total_depenses = Decimal(str(stats_ecritures['total_depenses'] or '0'))
+            total_recettes = Decimal(str(stats_ecritures['total_recettes'] or '0'))
+            solde_mois = total_recettes - total_depenses
+
+            # Calculer la progression de l'épargne
+            progression_epargne = Decimal('0')
+            if objectifs_totaux and objectifs_totaux > 0:
+                progression_epargne = (epargne_totale / objectifs_totaux) * 100
+
+            return {
+                'nb_comptes': nb_comptes,
+                'nb_banques': nb_banques,
+                'nb_sous_comptes': nb_sous_comptes,
+                'solde_total_principal': float(solde_total_principal),
+                'epargne_totale': float(epargne_totale),
+                'patrimoine_total': float(patrimoine_total),
+                'objectifs_totaux': float(objectifs_totaux),
+                'nb_transactions_mois': nb_transactions_mois,
+                'nb_ecritures_mois': nb_ecritures_mois,
+                'total_depenses_mois': float(total_depenses),
+                'total_recettes_mois': float(total_recettes),
+                'solde_mois': float(solde_mois),
+                'progression_epargne': float(round(progression_epargne, 2)),
+                'statut_utilise': statut
+            }
+
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul des statistiques: {e}")
+            # Retourner des valeurs par défaut en cas d'erreur
+            return {
+                'nb_comptes': 0,
+                'nb_banques': 0,
+                'nb_sous_comptes': 0,
+                'solde_total_principal': 0.0,
+                'epargne_totale': 0.0,
+                'patrimoine_total': 0.0,
+                'objectifs_totaux': 0.0,
+                'nb_transactions_mois': 0,
+                'nb_ecritures_mois': 0,
+                'total_depenses_mois': 0.0,
+                'total_recettes_mois': 0.0,
+                'solde_mois': 0.0,
+                'progression_epargne': 0.0,
+                'statut_utilise': statut
+            }
+
+    def get_repartition_par_banque(self, user_id: int) -> List[Dict]:
+        """Répartition du patrimoine par banque"""
+        try:
+            compte_model = ComptePrincipal(self.db)
+            comptes = compte_model.get_by_user_id(user_id)
+            sous_compte_model = SousCompte(self.db)
+            repartition = {}
+
+            for compte in comptes:
+                banque_nom = compte['nom_banque']
+                banque_couleur = compte.get('couleur_banque', '#3498db')
+
+                if banque_nom not in repartition:
+                    repartition[banque_nom] = {
+                        'nom_banque': banque_nom,
+                        'couleur': banque_couleur,
+                        'montant_total': Decimal('0'),
+                        'nb_comptes': 0
+                    }
+
+                repartition[banque_nom]['montant_total'] += Decimal(str(compte['solde']))
+                repartition[banque_nom]['nb_comptes'] += 1
+
+                sous_comptes = sous_compte_model.get_by_compte_principal_id(compte['id'])
+                for sous_compte in sous_comptes:
+                    repartition[banque_nom]['montant_total'] += Decimal(str(sous_compte['solde']))
+
+            result = list(repartition.values())
+            result.sort(key=lambda x: x['montant_total'], reverse=True)
+
+            return result
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul de la répartition par banque: {e}")
+            return []
+
+    def get_evolution_epargne(self, user_id: int, nb_mois: int = 6, statut: str = 'validée') -> List[Dict]:
+        """Évolution de l'épargne sur les derniers mois"""
+        try:
+            with self.db.get_cursor() as cursor:
+                query = """
+                SELECT
+                    DATE_FORMAT(t.date_transaction, '%Y-%m') as mois,
+                    SUM(CASE
+                        WHEN t.type_transaction IN ('transfert_compte_vers_sous', 'depot')
+                        THEN t.montant ELSE 0 END) as epargne_mensuelle
+                FROM transactions t
+                JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                WHERE cp.utilisateur_id = %s
+                    AND t.date_transaction >= DATE_SUB(NOW(), INTERVAL %s MONTH)
+                    AND t.type_transaction IN ('transfert_compte_vers_sous', 'depot')
+                GROUP BY DATE_FORMAT(t.date_transaction, '%Y-%m')
+                ORDER BY mois DESC
+                """
+                cursor.execute(query, (user_id, nb_mois))
+                evolution = cursor.fetchall()
+                return evolution
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul de l'évolution: {e}")
+            return []
+
+    def get_evolution_soldes_quotidiens(self, user_id: int, nb_jours: int = 30) -> Dict[str, List]:
+        """Récupère l'évolution quotidienne des soldes pour tous les comptes"""
+        try:
+            with self.db.get_cursor() as cursor:
+                # Pour les comptes principaux - utiliser les transactions
+                query_comptes = """
+                SELECT
+                    DATE(t.date_transaction) as date,
+                    cp.nom_compte,
+                    t.solde_apres as solde_quotidien
+                FROM transactions t
+                JOIN comptes_principaux cp ON t.compte_principal_id = cp.id
+                WHERE cp.utilisateur_id = %s
+                    AND t.date_transaction >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                    AND t.id IN (
+                        SELECT MAX(t2.id)
+                        FROM transactions t2
+                        WHERE t2.compte_principal_id = cp.id
+                        AND DATE(t2.date_transaction) = DATE(t.date_transaction)
+                        GROUP BY DATE(t2.date_transaction)
+                    )
+                ORDER BY date, cp.nom_compte
+                """
+                cursor.execute(query_comptes, (user_id, nb_jours))
+                evolution_comptes = cursor.fetchall()
+
+                # Pour les sous-comptes - utiliser les transactions
+                query_sous_comptes = """
+                SELECT
+                    DATE(t.date_transaction) as date,
+                    sc.nom_sous_compte,
+                    t.solde_apres as solde_quotidien
+                FROM transactions t
+                JOIN sous_comptes sc ON t.sous_compte_id = sc.id
+                JOIN comptes_principaux cp ON sc.compte_principal_id = cp.id
+                WHERE cp.utilisateur_id = %s
+                    AND t.date_transaction >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                    AND t.id IN (
+                        SELECT MAX(t2.id)
+                        FROM transactions t2
+                        WHERE t2.sous_compte_id = sc.id
+                        AND DATE(t2.date_transaction) = DATE(t.date_transaction)
+                        GROUP BY DATE(t2.date_transaction)
+                    )
+                ORDER BY date, sc.nom_sous_compte
+                """
+                cursor.execute(query_sous_comptes, (user_id, nb_jours))
+                evolution_sous_comptes = cursor.fetchall()
+
+                return {
+                    'comptes_principaux': evolution_comptes,
+                    'sous_comptes': evolution_sous_comptes,
+                    'total': []  # On ne calcule pas le total ici
+                }
+        except Error as e:
+            logger.error(f"Erreur lors du calcul de l'évolution quotidienne: {e}")
+            return {'comptes_principaux': [], 'sous_comptes': [], 'total': []}
+
+    def preparer_svg_tresorie(self, user_id: int, compte_id: int, date_debut: date, date_fin : date):
+        pass
+    def preparer_graphique_solde_quotidien(self, user_id: int, compte_id: int, date_debut: date, date_fin: date) -> Optional[Dict]:
+        """Prépare les données pour un graphique SVG de l'évolution quotidienne du solde."""
+        try:
+            tx_model = TransactionFinanciere(self.db)
+            soldes = tx_model.get_evolution_soldes_quotidiens_compte(
+                compte_id=compte_id,
+                user_id=user_id,
+                date_debut=date_debut.strftime('%Y-%m-%d'),
+                date_fin=date_fin.strftime('%Y-%m-%d')
+            )
+            if not soldes:
+                return None
+
+            dates = [s['date'].strftime('%d/%m') for s in soldes]
+            valeurs = [float(s['solde_apres']) for s in soldes]
+            min_val = min(valeurs)
+            max_val = max(valeurs)
+
+            # Éviter division par zéro
+            if min_val == max_val:
+                if min_val == 0:
+                    max_val = 100.0
+                else:
+                    min_val *= 0.9
+                    max_val *= 1.1
+
+            return {
+                'type': 'line',
+                'titre': 'Évolution du solde',
+                'labels': dates,
+                'valeurs': valeurs,
+                'min': min_val,
+                'max': max_val,
+                'unite': 'CHF'
+            }
+        except Exception as e:
+            logger.error(f"Erreur préparation graphique solde quotidien: {e}")
+            return None
+
+    def preparer_graphique_tresorerie(self, user_id: int, compte_id: int, date_debut: date, date_fin: date) -> Optional[Dict]:
+        """Prépare les données pour un graphique en barres ou camembert des recettes/dépenses."""
+        try:
+            tx_model = TransactionFinanciere(self.db)
+            stats = tx_model.get_statistiques_compte(
+                compte_type='compte_principal',
+                compte_id=compte_id,
+                user_id=user_id,
+                date_debut=date_debut.strftime('%Y-%m-%d'),
+                date_fin=date_fin.strftime('%Y-%m-%d')
+            )
+            if not stats:
+                return None
+
+            recettes = stats.get('total_entrees', 0.0)
+            depenses = stats.get('total_sorties', 0.0)
+
+            return {
+                'type': 'bar',
+                'titre': 'Trésorerie',
+                'labels': ['Recettes', 'Dépenses'],
+                'valeurs': [recettes, depenses],
+                'couleurs': ['#28a745', '#dc3545'],
+                'unite': 'CHF'
+            }
+        except Exception as e:
+            logger.error(f"Erreur préparation graphique trésorerie: {e}")
+            return None
+
+    def preparer_graphique_tresorerie_cumulee(self, user_id: int, compte_id: int, date_debut: date, date_fin: date) -> Optional[Dict]:
+        """Prépare les données pour un graphique du solde cumulé (flux de trésorerie)."""
+        try:
+            tx_model = TransactionFinanciere(self.db)
+            # Récupérer TOUTES les transactions dans la période, triées
+            transactions = tx_model.get_historique_compte(
+                compte_type='compte_principal',
+                compte_id=compte_id,
+                user_id=user_id,
+                date_from=date_debut.strftime('%Y-%m-%d'),
+                date_to=date_fin.strftime('%Y-%m-%d'),
+                limit=1000  # assez grand
+            )
+            if not transactions:
+                return None
+
+            # Trier par date (au cas où)
+            transactions.sort(key=lambda x: x['date_transaction'])
+
+            # Récupérer le solde initial AVANT la période
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT COALESCE(solde_initial, 0) as solde_initial
+                    FROM comptes_principaux WHERE id = %s
+                """, (compte_id,))
+                row = cursor.fetchone()
+                solde_initial = float(row['solde_initial']) if row else 0.0
+
+            # Calculer le solde cumulé JOUR PAR JOUR
+
+            daily_net = defaultdict(float)
+            for tx in transactions:
+                date_key = tx['date_transaction'].date()
+                montant = float(tx['montant'])
+                if tx['type_transaction'] in ['depot', 'transfert_entrant', 'recredit_annulation', 'transfert_sous_vers_compte']:
+                    daily_net[date_key] += montant
+                else:
+                    daily_net[date_key] -= montant
+
+            # Générer série complète de dates
+            current = date_debut
+            dates = []
+            soldes_cumules = []
+            solde_courant = solde_initial
+
+            while current <= date_fin:
+                dates.append(current.strftime('%d/%m'))
+                if current in daily_net:
+                    solde_courant += daily_net[current]
+                soldes_cumules.append(solde_courant)
+                current += timedelta(days=1)
+
+            return {
+                'type': 'line',
+                'titre': 'Trésorerie cumulée',
+                'labels': dates,
+                'valeurs': soldes_cumules,
+                'min': min(soldes_cumules),
+                'max': max(soldes_cumules),
+                'unite': 'CHF'
+            }
+        except Exception as e:
+            logger.error(f"Erreur préparation trésorerie cumulée: {e}")
+            return None
+
+    def preparer_graphique_categories(self, user_id: int, compte_id: int, date_debut: date, date_fin: date) -> Optional[Dict]:
+        tx_model = TransactionFinanciere(self.db)
+        categories = tx_model.get_categories_par_type(
+            'compte_principal', compte_id, user_id,
+            date_debut.strftime('%Y-%m-%d'),
+            date_fin.strftime('%Y-%m-%d')
+        )
+        if not categories:
+            return None
+        return {
+            'type': 'bar',
+            'titre': 'Répartition des opérations',
+            'labels': list(categories.keys()),
+            'valeurs': [float(v) for v in categories.values()],
+            'unite': 'CHF'
+        }
+
+    def preparer_graphique_tresorerie_compare(self, user_id: int, compte_id: int, date_debut: date, date_fin: date) -> Optional[Dict]:
+        """
+        Prépare les données pour un graphique en barres côte à côte :
+        - Recettes (positive, en vert)
+        - Dépenses (positive, en rouge)
+        Les deux sont affichées au-dessus de 0 pour faciliter la comparaison visuelle.
+        """
+        try:
+            tx_model = TransactionFinanciere(self.db)
+            stats = tx_model.get_statistiques_compte(
+                compte_type='compte_principal',
+                compte_id=compte_id,
+                user_id=user_id,
+                date_debut=date_debut.strftime('%Y-%m-%d'),
+                date_fin=date_fin.strftime('%Y-%m-%d')
+            )
+            if not stats:
+                return None
+
+            recettes = float(stats.get('total_entrees', 0.0))
+            depenses = float(stats.get('total_sorties', 0.0))
+
+            return {
+                'type': 'bar_compare',
+                'titre': 'Recettes vs Dépenses',
+                'labels': ['Recettes', 'Dépenses'],
+                'valeurs': [recettes, depenses],
+                'couleurs': ['#28a745', '#dc3545'],  # vert, rouge
+                'unite': 'CHF'
+            }
+        except Exception as e:
+            logger.error(f"Erreur préparation graphique comparaison trésorerie: {e}")
+            return None
@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g, abort
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..models import Utilisateur
+from ..utils.instrumentation_sql import agregateur
 from mysql.connector import Error
 
 # Créez le Blueprint avec le nom 'admin' et un préfixe d'URL
@@ -132,3 +133,23 @@ def api_utilisateurs():
             return jsonify({'success': True, 'utilisateurs': utilisateurs})
     except Error as e:
         return jsonify({'success': False, 'error': str(e)})
+
+@bp.route('/performances', methods=['GET', 'POST'])
+def performances():
+    """Endpoints les plus coûteux et requêtes SQL lentes (statistiques du processus courant)."""
+    # Requêtes de tous les utilisateurs : réservé aux administrateurs (ADMIN_EMAILS)
+    if not current_user.is_admin:
+        abort(403)
+    if request.method == 'POST':
+        agregateur.reinitialiser()
+        flash("Statistiques de performance réinitialisées.", 'success')
+        return redirect(url_for('admin.performances'))
+
+    tri = request.args.get('tri', 'temps_moyen')
+    if tri not in ('temps_moyen', 'temps_max', 'requetes_moyennes', 'requetes_max', 'temps_db_moyen', 'appels'):
+        tri = 'temps_moyen'
+    return render_template('admin/performances.html',
+                           endpoints=agregateur.pires_endpoints(tri=tri),
+                           requetes_lentes=agregateur.requetes_lentes(),
+                           seuil_lent_ms=agregateur.seuil_lent * 1000,
+                           tri=tri)
@@ -30,45 +30,32 @@ def login():
             return render_template('auth/login.html', active_tab='login')
 
         try:
-            connection = pymysql.connect(
-                host=config_db['host'],
-                port=config_db['port'],
-                user=config_db['user'],
-                password=config_db['password'],
-                database=config_db['database'],
-                charset=config_db['charset'],
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            
-            try:
-                with connection.cursor() as cursor:
-                    cursor.execute(
-                        "SELECT id, nom, prenom, email, mot_de_passe FROM utilisateurs WHERE email = %s",
-                        (email,)
+            # Même chemin que le reste de l'application (pool MySQL ou fichier SQLite)
+            with g.db_manager.get_cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, nom, prenom, email, mot_de_passe FROM utilisateurs WHERE email = %s",
+                    (email,)
+                )
+                row = cursor.fetchone()
+                
+                if row and check_password_hash(row['mot_de_passe'], password):
+                    from app.models import Utilisateur
+                    user = Utilisateur(
+                        id=row['id'],
+                        nom=row['nom'],
+                        prenom=row['prenom'],
+                        email=row['email'],
+                        mot_de_passe=row['mot_de_passe']
                     )
-                    row = cursor.fetchone()
+                    login_user(user, remember=True)  # Ajoutez remember=True pour maintenir la session
+                    logging.info(f"Utilisateur {user.email} connecté")
+                    flash("Connexion réussie !", "success")
                     
-                    if row and check_password_hash(row['mot_de_passe'], password):
-                        from app.models import Utilisateur
-                        user = Utilisateur(
-                            id=row['id'],
-                            nom=row['nom'],
-                            prenom=row['prenom'],
-                            email=row['email'],
-                            mot_de_passe=row['mot_de_passe']
-                        )
-                        login_user(user, remember=True)  # Ajoutez remember=True pour maintenir la session
-                        logging.info(f"Utilisateur {user.email} connecté")
-                        flash("Connexion réussie !", "success")
-                        
-                        # REDIRECTION IMMÉDIATE ET FORCÉE
-                        return redirect(url_for('banking.banking_dashboard'))
-                    else:
-                        logging.warning(f"Échec de connexion pour {email}")
-                        flash("Email ou mot de passe incorrect", "error")
-            finally:
-                connection.close()
-                
+                    # REDIRECTION IMMÉDIATE ET FORCÉE
+                    return redirect(url_for('banking.banking_dashboard'))
+                else:
+                    logging.warning(f"Échec de connexion pour {email}")
+                    flash("Email ou mot de passe incorrect", "error")
         except Exception as e:
             logging.error(f"Erreur lors de la connexion: {e}")
             flash("Erreur lors de la connexion", "error")
@@ -1,11 +1,10 @@
 from typing import Optional
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response, current_app, g, session, abort, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response, current_app, g, session, abort, send_file, Response, stream_with_context
 from flask_login import login_required, current_user
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta, date, time
 from calendar import monthrange
-from app.models import DatabaseManager, Banque, ComptePrincipal, SousCompte, TransactionFinanciere, StatistiquesBancaires, PlanComptable, EcritureComptable, HeureTravail, Salaire, SyntheseHebdomadaire, SyntheseMensuelle, Contrat, Contacts, ContactCompte, ComptePrincipalRapport, CategorieComptable, Employe, Equipe, Planning, Competence, PlanningRegles
 from io import StringIO
 import os
 from werkzeug.utils import secure_filename
@@ -16,14 +15,14 @@ from flask import send_file
 import io
 import traceback
 import random
-from collections import defaultdict
+from collections import Counter, defaultdict
 from . import db_csv_store
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from ..utils.pdf_salaire import generer_pdf_salaire
+from ..utils.pdf_salaire import preparer_fiche, get_cache_pdf_salaire, generer_lot_zip
+from ..utils.chart_cache import chart_cache
+from ..utils.empreintes_import import empreinte_transaction
+from ..utils.reponses_conditionnelles import tampon_donnees
+from ..utils.assets_statiques import envoyer_fichier
+from ..utils.apercus_justificatifs import TAILLES as TAILLES_APERCU, chemin_apercu, planifier_apercus
 # --- DÉBUT DES AJOUTS (8 lignes) ---
 from flask import _app_ctx_stack
 
@@ -32,22 +31,8 @@ from flask import _app_ctx_stack
 # Création du blueprint
 bp = Blueprint('banking', __name__)
 
-# Configuration du logger
+# Configuration du logger (niveau et handlers : app/utils/journalisation.py)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Création des handlers
-file_handler = logging.FileHandler('app.log')
-stream_handler = logging.StreamHandler()
-
-# Format des logs
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-# Ajout des handlers au logger
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 
 
     # ---- Fonctions utilitaires ----
@@ -58,7 +43,7 @@ def get_comptes_utilisateur(user_id):
             for compte in comptes:
                 compte['sous_comptes'] = g.models.sous_compte_model.get_by_compte_principal_id(compte['id'])
                 compte['solde_total'] = g.models.compte_model.get_solde_total_avec_sous_comptes(compte['id'])
-            logging.info(f"banking 70 Comptes sous la liste -comptes- détaillés pour l'utilisateur {user_id}: {len(comptes)}")
+            logging.info("banking 70 Comptes sous la liste -comptes- détaillés pour l'utilisateur %s: %s", user_id, len(comptes))
             return comptes
         except Exception as e:
             logging.error(f" banking73Erreur lors de la récupération des comptes pour l'utilisateur {user_id}: {e}")
@@ -247,12 +232,12 @@ def banking_dashboard():
         flash("Erreur interne : impossible d’accéder aux données bancaires.", "error")
         return redirect(url_for('auth.login'))
     user_id = current_user.id
-    logger.debug(f'Accès au dashboard bancaire pour l\'utilisateur {user_id}')
+    logger.debug("Accès au dashboard bancaire pour l'utilisateur %s", user_id)
     try:
         stats = g.models.stats_model.get_resume_utilisateur(user_id)
         repartition = g.models.stats_model.get_repartition_par_banque(user_id)
         comptes = get_comptes_utilisateur(user_id)
-        logger.debug(f'Dashboard - Comptes récupérés: {len(comptes)} pour utilisateur {user_id}')
+        logger.debug("Dashboard - Comptes récupérés: %s pour utilisateur %s", len(comptes), user_id)
 
         # Correction de la boucle (vous aviez une erreur de logique)
         les_comptes = []
@@ -421,12 +406,15 @@ def banking_compte_detail(compte_id):
         except InvalidOperation:
             flash('Montant maximum invalide', 'error')
     if search_query:
+        # Identifiants trouvés par l'index de recherche (None : index indisponible, recherche par sous-chaîne)
+        ids_trouves = g.models.index_recherche_model.ids_correspondants(user_id, 'transaction', search_query)
         search_lower = search_query.lower()
         filtred_mouvements = [
             m for m in filtred_mouvements 
-            if (m.get('description','') and search_lower in m['description'].lower()) 
+            if (ids_trouves is not None and m.get('id') in ids_trouves)
+            or (ids_trouves is None and m.get('description','') and search_lower in m['description'].lower())
             or (m.get('categorie', '') and search_lower in m['categorie'].lower())
-            or (m.get('reference', '') and search_lower in m['reference'].lower())
+            or (ids_trouves is None and m.get('reference', '') and search_lower in m['reference'].lower())
             or (m.get('beneficiaire', '') and search_lower in m['beneficiaire'].lower())
         ]
     if filter_categorie != 'tous':
@@ -487,68 +475,78 @@ def banking_compte_detail(compte_id):
     nb_jours_periode = (fin - debut).days
     transferts_externes_pending = g.models.transaction_financiere_model.get_transferts_externes_pending(user_id)
     
-    # Appel de la fonction (inchangé, car elle gère maintenant le report de solde)
-    soldes_quotidiens = g.models.transaction_financiere_model.get_evolution_soldes_quotidiens_compte(
-        compte_id=compte_id, 
-        user_id=user_id, 
-        date_debut=debut.strftime('%Y-%m-%d'),
-        date_fin=fin.strftime('%Y-%m-%d')
-    )
-
     # Préparation des données pour le graphique SVG
     largeur_svg = 800
     hauteur_svg = 400
-    graphique_svg = None
 
-    if soldes_quotidiens:
-        soldes_values = [s['solde_apres'] for s in soldes_quotidiens]
-        min_solde = min(soldes_values) if soldes_values else 0.0
-        max_solde = max(soldes_values) if soldes_values else 0.0
+    def _graphique_soldes():
+        # Appel de la fonction (inchangé, car elle gère maintenant le report de solde)
+        soldes_quotidiens = g.models.transaction_financiere_model.get_evolution_soldes_quotidiens_compte(
+            compte_id=compte_id, 
+            user_id=user_id, 
+            date_debut=debut.strftime('%Y-%m-%d'),
+            date_fin=fin.strftime('%Y-%m-%d')
+        )
+        graphique_svg = None
+
+        if soldes_quotidiens:
+            soldes_values = [s['solde_apres'] for s in soldes_quotidiens]
+            min_solde = min(soldes_values) if soldes_values else 0.0
+            max_solde = max(soldes_values) if soldes_values else 0.0
 
-        if min_solde == max_solde:
-            if min_solde == 0:
-                min_solde = -50.0
-                max_solde = 50.0
+            if min_solde == max_solde:
+                if min_solde == 0:
+                    min_solde = -50.0
+                    max_solde = 50.0
+                else:
+                    y_padding = abs(min_solde) * 0.1
+                    min_solde -= y_padding
+                    max_solde += y_padding
             else:
-                y_padding = abs(min_solde) * 0.1
+                y_padding = (max_solde - min_solde) * 0.05
                 min_solde -= y_padding
                 max_solde += y_padding
-        else:
-            y_padding = (max_solde - min_solde) * 0.05
-            min_solde -= y_padding
-            max_solde += y_padding
 
-        n = len(soldes_quotidiens)
-        points = []
-        margin_x = largeur_svg * 0.1
-        margin_y = hauteur_svg * 0.1
-        plot_width = largeur_svg * 0.8
-        plot_height = hauteur_svg * 0.8
+            n = len(soldes_quotidiens)
+            points = []
+            margin_x = largeur_svg * 0.1
+            margin_y = hauteur_svg * 0.1
+            plot_width = largeur_svg * 0.8
+            plot_height = hauteur_svg * 0.8
         
-        x_interval = plot_width / (n - 1) if n > 1 else 0
-        solde_range = max_solde - min_solde
-
-        for i, solde in enumerate(soldes_quotidiens):
-            solde_float = solde['solde_apres']
-            x = margin_x + i * x_interval if n > 1 else margin_x + plot_width / 2
-            if solde_range != 0:
-                y = margin_y + plot_height - ((solde_float - min_solde) / solde_range) * plot_height
-            else:
-                y = margin_y + plot_height / 2
-            points.append(f"{x},{y}")
-
-        graphique_svg = {
-            'points': points,
-            'min_solde': min_solde,
-            'max_solde': max_solde,
-            'dates': [s['date'].strftime('%d/%m/%Y') for s in soldes_quotidiens],
-            'soldes': soldes_values,
-            'nb_points': n,
-            'margin_x': margin_x,
-            'margin_y': margin_y,
-            'plot_width': plot_width,
-            'plot_height': plot_height
-        }
+            x_interval = plot_width / (n - 1) if n > 1 else 0
+            solde_range = max_solde - min_solde
+
+            for i, solde in enumerate(soldes_quotidiens):
+                solde_float = solde['solde_apres']
+                x = margin_x + i * x_interval if n > 1 else margin_x + plot_width / 2
+                if solde_range != 0:
+                    y = margin_y + plot_height - ((solde_float - min_solde) / solde_range) * plot_height
+                else:
+                    y = margin_y + plot_height / 2
+                points.append(f"{x},{y}")
+
+            graphique_svg = {
+                'points': points,
+                'min_solde': min_solde,
+                'max_solde': max_solde,
+                'dates': [s['date'].strftime('%d/%m/%Y') for s in soldes_quotidiens],
+                'soldes': soldes_values,
+                'nb_points': n,
+                'margin_x': margin_x,
+                'margin_y': margin_y,
+                'plot_width': plot_width,
+                'plot_height': plot_height
+            }
+        return graphique_svg
+
+    # Servi depuis le cache tant qu'aucune écriture n'a touché le compte
+    graphique_svg = chart_cache.get_or_render(
+        'compte_detail_soldes',
+        (compte_id, debut, fin, date.today(), largeur_svg, hauteur_svg),
+        g.models.version_model.get_version('compte', compte_id),
+        _graphique_soldes
+    )
     liste_categories = g.models.categorie_transaction_model.get_categories_utilisateur(current_user.id)
     return render_template('banking/compte_detail.html',
                         compte=compte,
@@ -585,6 +583,7 @@ def banking_compte_detail(compte_id):
 
 @bp.route('/banking/compte/<int:compte_id>/rapport')
 @login_required
+@tampon_donnees('banque')
 def banking_compte_rapport(compte_id):
     user_id = current_user.id
 
@@ -852,12 +851,12 @@ def banking_comparer_soldes(compte_id):
         flash('Compte non trouvé ou non autorisé', 'error')
         return redirect(url_for('banking.banking_dashboard'))
 
-    logging.info(f"Utilisateur connecté: {user_id}, Compte de référence: {compte_id}")
+    logging.info("Utilisateur connecté: %s, Compte de référence: %s", user_id, compte_id)
 
     try:
         logging.info("Récupération des comptes de l'utilisateur...")
         comptes = g.models.compte_model.get_by_user_id(user_id)
-        logging.info(f'banking 557 Comptes récupérés pour la comparaison des soldes: {len(comptes)} pour l\'utilisateur {user_id}')
+        logging.info("banking 557 Comptes récupérés pour la comparaison des soldes: %s pour l'utilisateur %s", len(comptes), user_id)
     except Exception as e:
         logging.error(f"Erreur lors de la récupération des comptes: {e}")
         flash("Erreur lors du chargement des comptes.", 'error')
@@ -895,7 +894,7 @@ def banking_comparer_soldes(compte_id):
             'couleur_2_recette': request.form.get('couleur_2_recette', '#00FF00'),
             'couleur_2_depense': '#FF00FF',  # Fixé car on n'utilise qu'une couleur par compte-type
         }
-        logging.info(f"Données du formulaire récupérées: {form_data}")
+        logging.info("Données du formulaire récupérées: %s", form_data)
 
         # Validation de base
         if not all([form_data['compte_id_1'], form_data['compte_id_2'], form_data['date_debut'], form_data['date_fin']]):
@@ -909,7 +908,7 @@ def banking_comparer_soldes(compte_id):
                 compte_id_2 = int(form_data['compte_id_2'])
                 date_debut = date.fromisoformat(form_data['date_debut'])
                 date_fin = date.fromisoformat(form_data['date_fin'])
-                logging.info(f"IDs et dates convertis. C1: {compte_id_1}, C2: {compte_id_2}, Du: {date_debut}, Au: {date_fin}")
+                logging.info("IDs et dates convertis. C1: %s, C2: %s, Du: %s, Au: %s", compte_id_1, compte_id_2, date_debut, date_fin)
 
                 if date_debut > date_fin:
                     logging.error("Erreur: La date de début est postérieure à la date de fin.")
@@ -925,11 +924,17 @@ def banking_comparer_soldes(compte_id):
 
                 # Générer le graphique SVG en barres
                 logging.info("Appel de la méthode compare_comptes_soldes_barres...")
-                svg_code = g.models.transaction_financiere_model.compare_comptes_soldes_barres(
-                    compte_id_1, compte_id_2,
-                    date_debut, date_fin,
-                    form_data['type_1'], form_data['type_2'],
-                    form_data['couleur_1_recette'], form_data['couleur_2_recette'] # On passe les couleurs des recettes
+                svg_code = chart_cache.get_or_render(
+                    'compare_comptes_soldes_barres',
+                    (compte_id_1, compte_id_2, date_debut, date_fin, form_data['type_1'], form_data['type_2'],
+                     form_data['couleur_1_recette'], form_data['couleur_2_recette']),
+                    g.models.version_model.get_versions([('compte', compte_id_1), ('compte', compte_id_2)]),
+                    lambda: g.models.transaction_financiere_model.compare_comptes_soldes_barres(
+                        compte_id_1, compte_id_2,
+                        date_debut, date_fin,
+                        form_data['type_1'], form_data['type_2'],
+                        form_data['couleur_1_recette'], form_data['couleur_2_recette'] # On passe les couleurs des recettes
+                    )
                 )
                 logging.info("Graphique SVG généré avec succès.")
 
@@ -940,10 +945,10 @@ def banking_comparer_soldes(compte_id):
     # Pré-remplir les dates si elles ne viennent pas du formulaire
     if not form_data['date_fin']:
         form_data['date_fin'] = date.today().isoformat()
-        logging.info(f"Date de fin par défaut: {form_data['date_fin']}")
+        logging.info("Date de fin par défaut: %s", form_data['date_fin'])
     if not form_data['date_debut']:
         form_data['date_debut'] = (date.today() - timedelta(days=30)).isoformat()
-        logging.info(f"Date de début par défaut: {form_data['date_debut']}")
+        logging.info("Date de début par défaut: %s", form_data['date_debut'])
 
     logging.info("Rendu du template comparer_soldes.html.")
     try:
@@ -982,15 +987,23 @@ def banking_compte_top_echanges(compte_id):
         direction = request.form.get('direction', 'tous')
         limite = int(request.form.get('limite', 40))
 
-    # Récupérer les données
-    donnees = g.models.transaction_financiere_model.get_top_comptes_echanges(
-        compte_id, user_id, date_debut, date_fin, direction, limite
+    def _graphique_top_echanges():
+        # Récupérer les données
+        donnees = g.models.transaction_financiere_model.get_top_comptes_echanges(
+            compte_id, user_id, date_debut, date_fin, direction, limite
+        )
+        # Générer le graphique
+        if donnees:
+            return g.models.transaction_financiere_model.generer_graphique_top_comptes_echanges(donnees)
+        return None
+
+    svg_code = chart_cache.get_or_render(
+        'top_comptes_echanges',
+        (compte_id, user_id, date_debut, date_fin, direction, limite),
+        g.models.version_model.get_version('compte', compte_id),
+        _graphique_top_echanges
     )
 
-    # Générer le graphique
-    if donnees:
-        svg_code = g.models.transaction_financiere_model.generer_graphique_top_comptes_echanges(donnees)
-
     return render_template('banking/compte_top_echanges.html',
                          compte=compte,
                          svg_code=svg_code,
@@ -1026,7 +1039,7 @@ def banking_compte_evolution_echanges(compte_id):
         for compte in all_comptes
         if compte['id'] != compte_id # Exclure le compte source
         ]
-    logging.info(f"banking XXX Comptes cibles {len(comptes_cibles_possibles)} possibles pour le compte {compte_id} (tous les comptes actifs de l'utilisateur sauf le compte source) : {comptes_cibles_possibles} ")
+    logging.info("banking XXX Comptes cibles %s possibles pour le compte %s (tous les comptes actifs de l'utilisateur sauf le compte source) : %s ", len(comptes_cibles_possibles), compte_id, comptes_cibles_possibles)
     date_debut = (date.today() - timedelta(days=90)).isoformat()
     date_fin = date.today().isoformat()
     comptes_cibles_ids = []
@@ -1043,7 +1056,7 @@ def banking_compte_evolution_echanges(compte_id):
         couleur = request.form.get('couleur', '#4e79a7')
         cumuler = request.form.get('cumuler') == 'on'
 
-        if comptes_cibles_ids:
+        def _graphique_evolution():
             # Récupérer les données brutes
             donnees_brutes = g.models.transaction_financiere_model.get_transactions_avec_comptes(
                 compte_id, user_id, comptes_cibles_ids, date_debut, date_fin
@@ -1076,14 +1089,23 @@ def banking_compte_evolution_echanges(compte_id):
 
             # Générer le graphique avec les nouvelles méthodes
             if type_graphique == 'barres':
-                svg_code = g.models.transaction_financiere_model.generer_graphique_echanges_temporel_barres(
+                return g.models.transaction_financiere_model.generer_graphique_echanges_temporel_barres(
                     donnees_struct, couleurs_a_utiliser
                 )
             else: # lignes
-                svg_code = g.models.transaction_financiere_model.generer_graphique_echanges_temporel_lignes(
+                return g.models.transaction_financiere_model.generer_graphique_echanges_temporel_lignes(
                     donnees_struct, couleurs_a_utiliser
                 )
 
+        if comptes_cibles_ids:
+            couleurs_formulaire = sorted((k, v) for k, v in request.form.items() if k.startswith('couleur_compte_'))
+            svg_code = chart_cache.get_or_render(
+                'echanges_temporel_' + type_graphique,
+                (compte_id, user_id, date_debut, date_fin, tuple(comptes_cibles_ids), cumuler, tuple(couleurs_formulaire)),
+                g.models.version_model.get_version('compte', compte_id),
+                _graphique_evolution
+            )
+
     return render_template('banking/compte_evolution_echanges.html',
                         compte_source=compte_source,
                         all_comptes=all_comptes,
@@ -1113,7 +1135,7 @@ def create_periode_favorite(compte_id):
     date_debut = request.form.get("date_debut")
     date_fin = request.form.get("date_fin")
     statut = request.form.get("statut", "active")
-    logging.debug(f"banking 531 Création période favorite pour user {user_id}, compte {compte_id} ({compte_type}), nom: {nom}, début: {date_debut}, fin: {date_fin}, statut: {statut}")
+    logging.debug("banking 531 Création période favorite pour user %s, compte %s (%s), nom: %s, début: %s, fin: %s, statut: %s", user_id, compte_id, compte_type, nom, date_debut, date_fin, statut)
     # Mettre à jour / insérer la période favorite
     nouveau_of = g.models.periode_favorite_model.create(
         user_id=user_id,
@@ -1263,8 +1285,8 @@ def banking_sous_compte_detail(sous_compte_id):
         date_from=debut.strftime('%Y-%m-%d %H:%M:%S'),
         date_to=fin.strftime('%Y-%m-%d %H:%M:%S'),
         limit=50)
-    logger.debug(f'{len(mouvements)} Mouvements récupérés pour le sous-compte {sous_compte_id}: {mouvements}')
-    logger.debug(f'{len(mouvements)} Mouvements après filtrage pour le sous-compte {sous_compte_id}: {mouvements}')
+    logger.debug("%s Mouvements récupérés pour le sous-compte %s: %s", len(mouvements), sous_compte_id, mouvements)
+    logger.debug("%s Mouvements après filtrage pour le sous-compte %s: %s", len(mouvements), sous_compte_id, mouvements)
         
     # Ajouter les statistiques du sous-compte
     stats_sous_compte = g.models.transaction_financiere_model.get_statistiques_compte(
@@ -1289,7 +1311,7 @@ def banking_sous_compte_detail(sous_compte_id):
         user_id=user_id, 
         nb_jours=30
     )
-    logger.debug(f'{len(soldes_quotidiens)} Soldes quotidiens récupérés: {soldes_quotidiens}')
+    logger.debug("%s Soldes quotidiens récupérés: %s", len(soldes_quotidiens), soldes_quotidiens)
     soldes_quotidiens_len = len(soldes_quotidiens)
     # Préparation des données pour le graphique SVG
     graphique_svg = None
@@ -1402,7 +1424,7 @@ def reparer_soldes_compte(compte_id):
     # Déterminer le type de compte
     compte_type = 'compte_principal' if compte.get('compte_principal_id') is None else 'sous_compte'
     # Appeler la méthode de réparation
-    logging.info(f"banking 820 Appel reparation avec compte_type='{compte_type}', compte_id={compte_id}")
+    logging.info("banking 820 Appel reparation avec compte_type='%s', compte_id=%s", compte_type, compte_id)
     success, message = g.models.transaction_financiere_model.reparer_soldes_compte(
         compte_type=compte_type,
         compte_id=compte_id,
@@ -1955,12 +1977,12 @@ def banking_transfert_compte_sous_compte():
                 success, message = g.models.transaction_financiere_model.transfert_compte_vers_sous_compte(
                     compte_id, sous_compte_id, montant, user_id, commentaire, date_transaction
                 )
-                logger.debug(f'voici les données envoyées : {compte_id}, {sous_compte_id}, {montant}, {user_id}, {date_transaction}')
+                logger.debug("voici les données envoyées : %s, %s, %s, %s, %s", compte_id, sous_compte_id, montant, user_id, date_transaction)
             else:
                 success, message = g.models.transaction_financiere_model.transfert_sous_compte_vers_compte(
                     sous_compte_id, compte_id, montant, user_id, commentaire, date_transaction
                 )
-                logger.debug(f'voici les données envoyées : {compte_id}, {sous_compte_id}, {montant}, {user_id}, {date_transaction}')
+                logger.debug("voici les données envoyées : %s, %s, %s, %s, %s", compte_id, sous_compte_id, montant, user_id, date_transaction)
 
 
             if success:
@@ -2450,6 +2472,15 @@ def import_csv_confirm():
     return render_template('banking/import_csv_confirm.html', rows=rows_for_template, comptes_possibles=comptes_possibles)
 
 
+def _categoriser_import(user_id: int, dernier_id: int, success_count: int) -> None:
+    """Applique les règles de catégorisation aux transactions qui viennent d'être importées"""
+    if not success_count:
+        return
+    nb = g.models.regle_categorisation_model.appliquer_regles(user_id, depuis_id=dernier_id)
+    if nb:
+        flash(f"🏷️ {nb} transaction(s) catégorisée(s) automatiquement par vos règles.", "info")
+
+
 @bp.route('/import/csv/final', methods=['POST'])
 @login_required
 def import_csv_final():
@@ -2462,6 +2493,8 @@ def import_csv_final():
         flash("Données d'import manquantes. Veuillez recommencer.", "danger")
         return redirect(url_for('banking.import_csv_upload'))
 
+    # Les transactions créées par cet import auront un identifiant supérieur
+    dernier_id = g.models.transaction_financiere_model.get_dernier_id(user_id)
     success_count = 0
     errors = []
 
@@ -2571,6 +2604,7 @@ def import_csv_final():
     session.pop('column_mapping', None)
 
     flash(f"✅ Import terminé : {success_count} transaction(s) créée(s).", "success")
+    _categoriser_import(user_id, dernier_id, success_count)
     for err in errors[:5]:  # Limiter les messages d'erreur affichés
         flash(f"❌ {err}", "danger")
 
@@ -2655,6 +2689,8 @@ def import_csv_final_distinct():
             global_mapping[name] = key
         i += 1
 
+    # Les transactions créées par cet import auront un identifiant supérieur
+    dernier_id = g.models.transaction_financiere_model.get_dernier_id(user_id)
     success_count = 0
     errors = []
 
@@ -2742,6 +2778,7 @@ def import_csv_final_distinct():
         session.pop(key, None)
 
     flash(f"✅ Import terminé : {success_count} transaction(s) créée(s).", "success")
+    _categoriser_import(user_id, dernier_id, success_count)
     for err in errors[:5]:
         flash(f"❌ {err}", "danger")
 
@@ -2925,6 +2962,18 @@ def import_csv_final_temp():
     csv_rows = enriched_rows_sorted  # utiliser cette liste
 
     comptes_possibles = {str(c['id']) + '|' + c['type']: c for c in csv_data['comptes_possibles']}
+
+    # Empreintes des transactions déjà en base sur la période du fichier, chargées une seule fois :
+    # chaque ligne est ensuite comparée en O(1), avant toute insertion (et tout recalcul de soldes)
+    importer_doublons = request.form.get('importer_doublons') == '1'
+    dates_valides = [d for d in map(parse_date_for_sort, csv_rows) if d != datetime.max]
+    empreintes_existantes = Counter()
+    if dates_valides and not importer_doublons:
+        empreintes_existantes = g.models.transaction_financiere_model.get_empreintes_import(
+            user_id, dates_valides[0].date().isoformat(), dates_valides[-1].date().isoformat())
+    doublons = []
+    # Les transactions créées par cet import auront un identifiant supérieur
+    dernier_id = g.models.transaction_financiere_model.get_dernier_id(user_id)
     success_count = 0
     errors = []
 
@@ -2965,6 +3014,14 @@ def import_csv_final_temp():
             source_id = source_info['id']
             source_type = source_info['type']
 
+            # Ligne déjà présente sur le compte source : ignorée (une occurrence en base couvre une ligne)
+            if tx_type in ('depot', 'retrait', 'transfert') and empreintes_existantes:
+                empreinte = empreinte_transaction(source_type, source_id, date_tx, montant, tx_type == 'depot', desc)
+                if empreintes_existantes[empreinte] > 0:
+                    empreintes_existantes[empreinte] -= 1
+                    doublons.append(i + 1)
+                    continue
+
             if tx_type == 'depot':
                 ok, msg = g.models.transaction_financiere_model.create_depot(
                     compte_id=source_id, user_id=user_id, montant=montant,
@@ -3008,6 +3065,10 @@ def import_csv_final_temp():
     session.pop('column_mapping', None)
 
     flash(f"✅ Import terminé : {success_count} transaction(s) créée(s).", "success")
+    if doublons:
+        lignes = ', '.join(map(str, doublons[:10])) + ('…' if len(doublons) > 10 else '')
+        flash(f"⚠️ {len(doublons)} ligne(s) déjà importée(s) ignorée(s) (lignes {lignes}).", "warning")
+    _categoriser_import(user_id, dernier_id, success_count)
     for err in errors[:5]:
         flash(f"❌ {err}", "danger")
 
@@ -3083,6 +3144,8 @@ def import_csv_final_distinct_temp():
             global_mapping[name] = key
         i += 1
 
+    # Les transactions créées par cet import auront un identifiant supérieur
+    dernier_id = g.models.transaction_financiere_model.get_dernier_id(user_id)
     success_count = 0
     errors = []
 
@@ -3170,6 +3233,7 @@ def import_csv_final_distinct_temp():
     session.pop('column_mapping', None)
 
     flash(f"✅ Import terminé : {success_count} transaction(s) créée(s).", "success")
+    _categoriser_import(user_id, dernier_id, success_count)
     for err in errors[:5]:
         flash(f"❌ {err}", "danger")
 
@@ -3325,21 +3389,9 @@ def comptabilite_dashboard():
     total_depenses = sum(s['total_depenses'] or 0 for s in stats)
     resultat_net = total_recettes - total_depenses
 
-    # Nombre de transactions à comptabiliser
-    comptes = g.models.compte_model.get_by_user_id(current_user.id) # Utilise la méthode correcte
-    transactions_a_comptabiliser = []
-    for compte in comptes:
-        # Appel correct de la méthode avec les arguments nommés pour éviter les ambiguités
-        txs = g.models.transaction_financiere_model.get_transactions_sans_ecritures_par_compte(
-            compte_id=compte['id'], # Premier argument : compte_id
-            user_id=current_user.id, # Deuxième argument : user_id
-            # Pas besoin de spécifier date_from/date_to ici, on veut pour l'année entière
-            # On peut ajouter date_from et date_to si le filtre par année est important pour cette requête
-            # date_from=date_from, date_to=date_to
-            statut_comptable='a_comptabiliser'
-        )
-        transactions_a_comptabiliser.extend(txs)
-    nb_a_comptabiliser = len(transactions_a_comptabiliser)
+    # Nombre de transactions à comptabiliser (un seul comptage groupé pour tous les comptes)
+    nb_a_comptabiliser = g.models.transaction_financiere_model.compter_transactions_sans_ecritures(
+        current_user.id, statut_comptable='a_comptabiliser')['nb_total']
 
     # Préparer les données pour le template
     annees_disponibles = g.models.ecriture_comptable_model.get_annees_disponibles(current_user.id)
@@ -3353,6 +3405,7 @@ def comptabilite_dashboard():
                         annees_disponibles=annees_disponibles)
 @bp.route('/comptabilite/statistiques')
 @login_required
+@tampon_donnees('comptabilite')
 def statistiques_comptables():
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to') 
@@ -3808,30 +3861,36 @@ def export_ecritures():
     import csv
     from io import StringIO
     
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    if ecritures:
+    def lignes_csv():
+        # Envoi en flux par paquets de lignes : la compression des réponses travaille
+        # morceau par morceau, sans construire le fichier entier en mémoire
+        output = StringIO()
+        writer = csv.writer(output)
+        if not ecritures:
+            return
         # En-têtes
-        headers = list(ecritures[0].keys()) if isinstance(ecritures[0], dict) else [f"col_{i}" for i in range(len(ecritures[0]))]
+        headers = list(ecritures[0].keys()) if hasattr(ecritures[0], 'keys') else [f"col_{i}" for i in range(len(ecritures[0]))]
         writer.writerow(headers)
         
         # Données
-        for ecriture in ecritures:
-            if isinstance(ecriture, dict):
+        for n, ecriture in enumerate(ecritures, 1):
+            if hasattr(ecriture, 'keys'):
                 row = [ecriture.get(header, "") for header in headers]
             else:
                 row = list(ecriture)
             writer.writerow(row)
+            if n % 500 == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
     
-    output.seek(0)
     filename = f"ecritures_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
-    return send_file(
-        StringIO(output.getvalue()),
+    return Response(
+        stream_with_context(lignes_csv()),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
     )
 
 @bp.route('/comptabilite/ecritures/by-contact/<int:contact_id>', methods=['GET'])
@@ -3920,7 +3979,7 @@ def update_statut_ecriture(ecriture_id):
         
         if success:
             if commentaire:
-                logging.info(f"Statut écriture {ecriture_id} changé: {commentaire}")
+                logging.info("Statut écriture %s changé: %s", ecriture_id, commentaire)
             flash(f"Statut mis à jour: {nouveau_statut}", 'success')
         else:
             flash("Erreur lors de la mise à jour", 'error')
@@ -3936,17 +3995,17 @@ def update_statut_ecriture(ecriture_id):
 @login_required
 def upload_fichier_ecriture(ecriture_id):
     """Upload un fichier pour une écriture"""
-    logging.info(f"Route upload appelée - Écriture: {ecriture_id}, Utilisateur: {current_user.id}")
+    logging.info("Route upload appelée - Écriture: %s, Utilisateur: %s", ecriture_id, current_user.id)
     if 'fichier' not in request.files:
         flash('Aucun fichier sélectionné', 'error')
         return redirect(request.referrer or url_for('banking.liste_ecritures'))
     
     fichier = request.files['fichier']
-    logging.info(f"Fichier reçu - Nom: {fichier.filename}, Type: {fichier.content_type}")
+    logging.info("Fichier reçu - Nom: %s, Type: %s", fichier.filename, fichier.content_type)
     success, message = g.models.ecriture_comptable_model.ajouter_fichier(
         ecriture_id, current_user.id, fichier
     )
-    logging.info(f"Résultat upload: {success} - {message}")
+    logging.info("Résultat upload: %s - %s", success, message)
     if success:
         flash(message, 'success')
         flash(f'Fichier uploadé avec succès {fichier.filename} à {ecriture_id} sur {fichier.content_type}', 'success')
@@ -3967,6 +4026,28 @@ def test_upload():
     result = g.models.ecriture_comptable_model.test_dossier_upload()
     
     return f"Test terminé - Vérifiez les logs pour les résultats détaillés: {result}"
+def _envoyer_justificatif(fichier_info, en_piece_jointe):
+    """
+    Réponse pour le fichier joint d'une écriture. Depuis le disque : X-Sendfile / X-Accel-Redirect
+    si configuré, Range, et l'empreinte SHA-256 du contenu comme ETag (304 à la revalidation).
+    """
+    if fichier_info['stockage'] == 'blob':
+        return send_file(
+            BytesIO(fichier_info['contenu_blob']),
+            as_attachment=en_piece_jointe,
+            download_name=fichier_info['nom_original'],
+            mimetype=fichier_info['type_mime']
+        )
+    return envoyer_fichier(
+        fichier_info['dossier'],
+        fichier_info['chemin_physique'],
+        mimetype=fichier_info['type_mime'],
+        prive=True,
+        as_attachment=en_piece_jointe,
+        download_name=fichier_info['nom_original'],
+        etag=fichier_info['empreinte'] or True
+    )
+
 @bp.route('/comptabilite/ecritures/download_fichier/<int:ecriture_id>')
 @login_required
 def download_fichier_ecriture(ecriture_id):
@@ -3978,12 +4059,7 @@ def download_fichier_ecriture(ecriture_id):
         return redirect(request.referrer or url_for('banking.liste_ecritures'))
     
     try:
-        return send_file(
-            fichier_info['chemin_complet'],
-            as_attachment=True,
-            download_name=fichier_info['nom_original'],
-            mimetype=fichier_info['type_mime']
-        )
+        return _envoyer_justificatif(fichier_info, en_piece_jointe=True)
     except Exception as e:
         logging.error(f"Erreur téléchargement fichier: {e}")
         flash('Erreur lors du téléchargement du fichier', 'error')
@@ -3993,7 +4069,7 @@ def download_fichier_ecriture(ecriture_id):
 @login_required
 def view_fichier_ecriture(ecriture_id):
     """Affiche le fichier joint dans le navigateur"""
-    logging.info(f"📍 Route view_fichier appelée - Écriture: {ecriture_id}")
+    logging.info("📍 Route view_fichier appelée - Écriture: %s", ecriture_id)
     
     fichier_info = g.models.ecriture_comptable_model.get_fichier(ecriture_id, current_user.id)
     
@@ -4002,28 +4078,52 @@ def view_fichier_ecriture(ecriture_id):
         flash('Fichier non trouvé', 'error')
         return redirect(request.referrer or url_for('banking.liste_ecritures'))
     
-    logging.info(f"📍 Fichier info: {fichier_info}")
+    logging.info("📍 Fichier info: %s", fichier_info)
     
     try:
         # Vérifications supplémentaires
-        if not os.path.exists(fichier_info['chemin_complet']):
+        if fichier_info['stockage'] == 'filesystem' and not os.path.exists(fichier_info['chemin_complet']):
             logging.error(f"❌ Fichier manquant sur le disk: {fichier_info['chemin_complet']}")
             flash('Fichier manquant sur le serveur', 'error')
             return redirect(request.referrer or url_for('banking.liste_ecritures'))
         
-        logging.info(f"📍 Envoi du fichier: {fichier_info['chemin_complet']}")
+        logging.info("📍 Envoi du fichier: %s", fichier_info.get('chemin_complet', 'blob'))
         
-        return send_file(
-            fichier_info['chemin_complet'],
-            as_attachment=False,
-            download_name=fichier_info['nom_original'],
-            mimetype=fichier_info['type_mime']
-        )
+        return _envoyer_justificatif(fichier_info, en_piece_jointe=False)
     except Exception as e:
         logging.error(f"❌ Erreur send_file: {str(e)}")
         logging.error(f"❌ Traceback complète: {traceback.format_exc()}")
         flash('Erreur lors de l\'affichage du fichier', 'error')
         return redirect(request.referrer or url_for('banking.liste_ecritures'))
+@bp.route('/comptabilite/ecritures/apercu_fichier/<int:ecriture_id>')
+@bp.route('/comptabilite/ecritures/apercu_fichier/<int:ecriture_id>/<taille>')
+@login_required
+def apercu_fichier_ecriture(ecriture_id, taille='vignette'):
+    """
+    Aperçu JPEG du fichier joint ('vignette' pour la liste, 'apercu' pour la visualisation).
+    Tant qu'il n'est pas généré (en arrière-plan), répond 404 : la page affiche l'icône.
+    """
+    if taille not in TAILLES_APERCU:
+        abort(404)
+    fichier_info = g.models.ecriture_comptable_model.get_fichier(ecriture_id, current_user.id)
+    if not fichier_info or fichier_info['stockage'] != 'filesystem':
+        abort(404)
+
+    relatif = chemin_apercu(fichier_info['chemin_physique'], taille)
+    if not os.path.exists(os.path.join(fichier_info['dossier'], *relatif.split('/'))):
+        # Justificatif antérieur aux aperçus, ou génération encore en cours
+        planifier_apercus(fichier_info['dossier'], fichier_info['chemin_physique'])
+        return Response(status=404, headers={'Cache-Control': 'no-store'})
+
+    empreinte = fichier_info['empreinte']
+    return envoyer_fichier(
+        fichier_info['dossier'],
+        relatif,
+        mimetype='image/jpeg',
+        prive=True,
+        etag=f"{empreinte}-{taille}" if empreinte else True
+    )
+
 @bp.route('/comptabilite/ecritures/supprimer_fichier/<int:ecriture_id>', methods=['POST'])
 @login_required
 def supprimer_fichier_ecriture(ecriture_id):
@@ -4048,16 +4148,16 @@ def gestion_categories():
     """Page principale de gestion des catégories"""
     try:
         categories = g.models.categorie_transaction_model.get_categories_utilisateur(current_user.id)
-        logging.info(f"Catégories récupérées pour utilisateur {current_user.id} : {categories}")
+        logging.info("Catégories récupérées pour utilisateur %s : %s", current_user.id, categories)
         statistiques = g.models.categorie_transaction_model.get_statistiques_categories(current_user.id)
-        logging.info(f"Statistiques des catégories pour utilisateur {current_user.id} : {statistiques}")
+        logging.info("Statistiques des catégories pour utilisateur %s : %s", current_user.id, statistiques)
         # Séparer par type pour l'affichage
         categories_revenus = [c for c in categories if c['type_categorie'] == 'Revenu']
-        logging.info(f"Catégories de revenus pour utilisateur {current_user.id} : {categories_revenus}")
+        logging.info("Catégories de revenus pour utilisateur %s : %s", current_user.id, categories_revenus)
         categories_depenses = [c for c in categories if c['type_categorie'] == 'Dépense']
         logging
         categories_transferts = [c for c in categories if c['type_categorie'] == 'Transfert']
-        logging.info(f"Chargement page catégories pour utilisateur {current_user.id} : {categories}")
+        logging.info("Chargement page catégories pour utilisateur %s : %s", current_user.id, categories)
         return render_template(
             'categories/old-gestion_categories.html',
             categories=categories,
@@ -4309,42 +4409,21 @@ def associer_categorie_transaction_multiple():
         flash("Compte non autorisé.", "error")
         return redirect(url_for('banking.banking_dashboard'))
 
-    # Récupérer les transactions non catégorisées dans la période
-    transactions_non_cat, _ = g.models.transaction_financiere_model.get_all_user_transactions(
-        user_id=current_user.id,
-        date_from=date_debut.isoformat(),
-        date_to=date_fin.isoformat(),
-        compte_source_id=compte_id,
-        compte_dest_id=compte_id,
-        per_page=10000
+    # Catégoriser en une requête toutes les transactions sans catégorie du compte sur la période
+    nb = g.models.categorie_transaction_model.associer_categorie_non_categorisees(
+        categorie_id,
+        current_user.id,
+        compte_id=compte_id,
+        date_debut=date_debut.isoformat(),
+        date_fin=date_fin.isoformat()
     )
 
-    # Filtrer celles qui n'ont aucune catégorie
-    transactions_a_categoriser = []
-    for tx in transactions_non_cat:
-        cats = g.models.categorie_transaction_model.get_categories_transaction(tx['id'], current_user.id)
-        if not cats:
-            transactions_a_categoriser.append(tx['id'])
-
-    if not transactions_a_categoriser:
+    if nb is None:
+        flash("Erreur lors de la catégorisation multiple.", "error")
+    elif nb == 0:
         flash("Aucune transaction non catégorisée dans cette période.", "info")
-        return redirect(request.referrer)
-
-    # Associer la catégorie à chacune
-    erreurs = 0
-    for tx_id in transactions_a_categoriser:
-        try:
-            g.models.categorie_transaction_model.associer_categorie_transaction(
-                tx_id, categorie_id, current_user.id
-            )
-        except Exception as e:
-            logging.error(f"Erreur catégorisation multiple TX {tx_id}: {e}")
-            erreurs += 1
-
-    if erreurs == 0:
-        flash(f"Catégorie appliquée à {len(transactions_a_categoriser)} transactions.", "success")
     else:
-        flash(f"Catégorie appliquée partiellement ({len(transactions_a_categoriser) - erreurs} / {len(transactions_a_categoriser)}).", "warning")
+        flash(f"Catégorie appliquée à {nb} transactions.", "success")
 
     return redirect(request.referrer)
 # API endpoints pour AJAX
@@ -4382,6 +4461,106 @@ def api_associer_categorie():
         logging.error(f"Erreur association catégorie: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@bp.route('/api/regles-categorisation', methods=['GET', 'POST'])
+@login_required
+def api_regles_categorisation():
+    """API des règles de catégorisation automatique : liste (GET) ou création (POST)"""
+    try:
+        if request.method == 'GET':
+            regles = g.models.regle_categorisation_model.get_regles(current_user.id)
+            return jsonify({'success': True, 'regles': regles})
+
+        data = request.get_json() or {}
+        if not data.get('categorie_id') or not data.get('type_regle'):
+            return jsonify({'success': False, 'error': 'Données manquantes'}), 400
+        success, message = g.models.regle_categorisation_model.creer_regle(
+            current_user.id,
+            data['categorie_id'],
+            data['type_regle'],
+            motif=data.get('motif'),
+            montant_min=data.get('montant_min'),
+            montant_max=data.get('montant_max'),
+            priorite=data.get('priorite', 0)
+        )
+        return jsonify({'success': success, 'message': message}), (201 if success else 400)
+    except Exception as e:
+        logging.error(f"Erreur API règles de catégorisation: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/api/regles-categorisation/<int:regle_id>', methods=['PUT', 'DELETE'])
+@login_required
+def api_regle_categorisation(regle_id):
+    """API de modification (PUT) ou de suppression (DELETE) d'une règle de catégorisation"""
+    try:
+        if request.method == 'DELETE':
+            success, message = g.models.regle_categorisation_model.supprimer_regle(regle_id, current_user.id)
+        else:
+            success, message = g.models.regle_categorisation_model.modifier_regle(
+                regle_id, current_user.id, **(request.get_json() or {}))
+        return jsonify({'success': success, 'message': message}), (200 if success else 400)
+    except Exception as e:
+        logging.error(f"Erreur API règle de catégorisation {regle_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/api/search', methods=['GET'])
+@login_required
+def api_search():
+    """
+    Recherche classée dans les transactions, les écritures comptables et les contacts.
+    Paramètres : q (texte), types (ex. 'transaction,contact'), limit (50 au plus).
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': True, 'q': q, 'resultats': []})
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    limite = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    try:
+        resultats = g.models.index_recherche_model.rechercher(
+            current_user.id, q, sources=types or ('transaction', 'ecriture', 'contact'), limite=limite)
+        for r in resultats:
+            if r['type'] == 'transaction':
+                r['url'] = (url_for('banking.banking_compte_detail', compte_id=r['compte_principal_id'])
+                            if r['compte_principal_id'] else
+                            url_for('banking.banking_sous_compte_detail', sous_compte_id=r['sous_compte_id']))
+            elif r['type'] == 'ecriture':
+                r['url'] = url_for('banking.edit_ecriture', ecriture_id=r['id'])
+            else:
+                r['url'] = url_for('banking.edit_contact_comptable', contact_id=r['id'])
+            if r['montant'] is not None:
+                r['montant'] = float(r['montant'])
+            if r['date'] is not None and hasattr(r['date'], 'isoformat'):
+                r['date'] = r['date'].isoformat()
+        return jsonify({'success': True, 'q': q, 'resultats': resultats})
+    except Exception as e:
+        logging.error(f"Erreur API recherche: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/categorie/regles/appliquer', methods=['POST'])
+@login_required
+def appliquer_regles_categorisation():
+    """Recatégorise en masse les transactions sans catégorie avec les règles de l'utilisateur"""
+    compte_id = request.form.get('compte_id', type=int)
+    date_debut = request.form.get('date_debut') or None
+    date_fin = request.form.get('date_fin') or None
+
+    if compte_id:
+        compte = g.models.compte_model.get_by_id(compte_id)
+        if not compte or compte['utilisateur_id'] != current_user.id:
+            flash("Compte non autorisé.", "error")
+            return redirect(url_for('banking.banking_dashboard'))
+
+    nb = g.models.regle_categorisation_model.appliquer_regles(
+        current_user.id, compte_id=compte_id, date_debut=date_debut, date_fin=date_fin)
+
+    if nb is None:
+        flash("Erreur lors de l'application des règles de catégorisation.", "error")
+    elif nb == 0:
+        flash("Aucune transaction non catégorisée ne correspond à vos règles.", "info")
+    else:
+        flash(f"{nb} transaction(s) catégorisée(s) par vos règles.", "success")
+
+    return redirect(request.referrer or url_for('banking.gestion_categories'))
+
 
 
 
@@ -4432,20 +4611,17 @@ def transactions_sans_ecritures():
         transaction_dict['contact_lie'] = contact_lie
         transactions_avec_contacts.append(transaction_dict)
     
-    total_transactions = []
-
-    for i in comptes:
-        txs = g.models.transaction_financiere_model.get_transactions_sans_ecritures_par_compte(
-            compte_id=i['id'],
-            user_id=current_user.id,
-            date_from=i['date_ouverture'],
+    # Totaux à comptabiliser de tous les comptes (depuis leur ouverture) en une requête groupée
+    total_a_comptabiliser, total_a_comptabiliser_len = 0, 0
+    if statut_comptable == 'a_comptabiliser':
+        compteurs = g.models.transaction_financiere_model.compter_transactions_sans_ecritures(
+            current_user.id,
             date_to=date.today().strftime('%Y-%m-%d'),
-            statut_comptable=statut_comptable
+            statut_comptable=statut_comptable,
+            depuis_ouverture=True
         )
-        total_transactions.extend(txs)
-    
-    total_a_comptabiliser = sum(tx['montant'] for tx in total_transactions if tx['statut_comptable'] == 'a_comptabiliser')
-    total_a_comptabiliser_len = len([tx for tx in total_transactions if tx['statut_comptable'] == 'a_comptabiliser'])
+        total_a_comptabiliser = compteurs['montant_total']
+        total_a_comptabiliser_len = compteurs['nb_total']
     
     # Récupérer les catégories et celles avec complémentaires
     categories = g.models.categorie_comptable_model.get_all_categories(current_user.id)
@@ -5233,7 +5409,7 @@ def nouvelle_ecriture_from_transactions():
                 flash("Aucune transaction à traiter", "warning")
                 return redirect(url_for('banking.transactions_sans_ecritures'))
 
-            logging.info(f'voici les transactions : {transaction_ids}')
+            logging.info("voici les transactions : %s", transaction_ids)
             success_count = 0
             errors = []
 
@@ -5356,8 +5532,8 @@ def nouvelle_ecriture_from_transactions():
         date_from=date_from,
         date_to=date_to
     )
-    logging.info(f'Filtrage des transactions pour compte_id={compte_id}, date_from={date_from}, date_to={date_to}')
-    logging.info(f' route nouvelle_ecriture_from_transaction Transactions récupérées avant filtrage: {len(transactions)}') # Info plus claire
+    logging.info("Filtrage des transactions pour compte_id=%s, date_from=%s, date_to=%s", compte_id, date_from, date_to)
+    logging.info(" route nouvelle_ecriture_from_transaction Transactions récupérées avant filtrage: %s", len(transactions)) # Info plus claire
     if compte_id is not None: # Correction : Tester None explicitement
         transactions = [t for t in transactions if t.get('compte_bancaire_id') == compte_id]
 
@@ -5698,6 +5874,7 @@ def transactions_by_contact_and_compte(compte_id: int, contact_id: int):
 
 @bp.route('/comptabilite/compte-de-resultat')
 @login_required
+@tampon_donnees('comptabilite')
 def compte_de_resultat():
     """Génère le compte de résultat avec filtres"""
     print(f"DEBUG: User {current_user.id} accède au compte de résultat")
@@ -5773,7 +5950,7 @@ def detail_ecritures_categorie(type, categorie_id):
             
             ecritures_avec_secondaires.append(ecriture_dict)
         
-        logging.info(f"INFO: {len(ecritures_avec_secondaires)} écritures récupérées pour le détail")
+        logging.info("INFO: %s écritures récupérées pour le détail", len(ecritures_avec_secondaires))
         
         return render_template('comptabilite/detail_ecritures.html',
                             ecritures=ecritures_avec_secondaires,
@@ -5974,18 +6151,14 @@ def heures_travail():
         semaine = int(request.args.get('semaine', 0))
         current_mode = request.args.get('mode', 'reel')
         selected_employeur = request.args.get('employeur')
-    logging.debug(f"DEBUG 2950 : Requête de tous les contrats pour user_id={current_user.id}")
     try:
         tous_contrats = g.models.contrat_model.get_all_contrats(current_user_id)
-        logging.error(f"DEBUG 2953: Tous les contrats pour l'utilisateur {current_user_id}: {tous_contrats}")
     except Exception as e:
-        logging.exception(f"🚨 ERREUR dans get_all_contrats pour user_id={current_user_id}: {e}")
+        logger.exception("Erreur dans get_all_contrats pour user_id=%s: %s", current_user_id, e)
         tous_contrats = []
-    logging.debug(f"DEBUG2 2957: Contrats récupérés: {tous_contrats}")
-    logging.debug(f"DEBUG 2958: Mois={mois}, Semaine={semaine}, Mode={current_mode}, Employeur sélectionné={selected_employeur} avec tous_contrats={len(tous_contrats)}")
-    logging.error(f"DEBUG 2959: Tous les contrats pour l'utilisateur {current_user_id}: {tous_contrats}")
+    logger.debug("heures_travail: %d contrats, mois=%s, semaine=%s, mode=%s, employeur=%s",
+                 len(tous_contrats), mois, semaine, current_mode, selected_employeur)
     employeurs_unique = sorted({c['employeur'] for c in tous_contrats if c.get('employeur')})
-    logging.debug(f"DEBUG 2956 : Employeurs uniques trouvés: {employeurs_unique}")
     if not selected_employeur:
         if employeurs_unique:
             contrat_actuel = g.models.contrat_model.get_contrat_actuel(current_user_id)
@@ -6015,7 +6188,7 @@ def heures_travail():
 
     contrat = None
     id_contrat = None
-    logging.debug(f"banking 2973 DEBUG: Recherche du contrat pour l'employeur sélectionné: {selected_employeur}")
+    logger.debug("Recherche du contrat pour l'employeur sélectionné: %s", selected_employeur)
     if selected_employeur:
         for c in tous_contrats:
             if c['employeur'] == selected_employeur and (c['date_fin'] is None or c['date_fin'] >= date.today()):
@@ -6120,7 +6293,7 @@ def heures_travail():
                     #        plage['fin'] = plage['fin'].strftime('%H:%M')
                     #    else:
                     #        plage['fin'] = str(plage['fin']).strip()
-        logging.debug(f"banking 3012 DEBUG: Données pour le {date_str}: {jour_data}")
+        logger.debug("Données pour le %s: %s", date_str, jour_data)
         # CORRECTION : Toujours recalculer total_h pour assurer la cohérence
         #if not jour_data['vacances'] and any([jour_data['h1d'], jour_data['h1f'], jour_data['h2d'], jour_data['h2f']]):
         #    calculated_total = g.models.heure_model.calculer_heures(
@@ -6151,11 +6324,10 @@ def heures_travail():
         semaine_data['solde'] = semaine_data['total'] - heures_hebdo_contrat
     
     total_general = sum(s['total'] for s in semaines.values())
-    logging.debug(f"banking 3043 DEBUG: Total général des heures: {total_general}")
+    logger.debug("Total général des heures: %s", total_general)
     semaines = dict(sorted(semaines.items()))
-    logging.debug(f"banking 3045 DEBUG: Semaines préparées pour le rendu: {semaines.keys()}")
+    logger.debug("Semaines préparées pour le rendu: %s", list(semaines))
 
-    logging.debug(f"Exemple de jour_data: {semaines[list(semaines.keys())[0]]['jours'][0] if semaines else 'AUCUN'}")
     return render_template('salaires/heures_travail.html',
                         semaines=semaines,
                         total_general=total_general,
@@ -6243,7 +6415,7 @@ def save_day_transaction(cursor, payload):
         success = g.models.heure_model.create_or_update(payload, cursor)
         
         if success:
-            logger.debug(f"Sauvegarde réussie pour {payload['date']}")
+            logger.debug("Sauvegarde réussie pour %s", payload['date'])
             return True, None
         else:
             error_msg = f"Échec de la sauvegarde pour {payload['date']}"
@@ -6331,7 +6503,7 @@ def handle_save_line(request, current_user_id, annee, mois, semaine, current_mod
     }
     
     success = g.models.heure_model.create_or_update(data)
-    logging.debug(f"banking 3112 DEBUG: Sauvegarde ligne pour {date_str} avec {data} avec succès={success}")
+    logging.debug("banking 3112 DEBUG: Sauvegarde ligne pour %s avec %s avec succès=%s", date_str, data, success)
     if success:
         flash('Heures enregistrées avec succès avec {data}', 'success')
     else:
@@ -6380,10 +6552,10 @@ def handle_simulation(request, current_user_id, annee, mois, semaine, current_mo
     employe_id = contrat.get('employe_id') if contrat else None
 
     days = generate_days(annee, mois, semaine)
-    success_count = 0
+    payloads = []
     for day in days:
         date_str = day.isoformat()
-        payload = {
+        payloads.append({
             'date': date_str,
             'user_id': current_user_id,
             'employeur': selected_employeur,
@@ -6395,9 +6567,8 @@ def handle_simulation(request, current_user_id, annee, mois, semaine, current_mo
             ],
             'vacances': False,
             'type_heures': 'simulees'
-        }
-        if g.models.heure_model.create_or_update(payload):
-            success_count += 1
+        })
+    success_count = g.models.heure_model.create_or_update_batch(payloads)
 
     if success_count > 0:
         flash(f'Heures simulées appliquées pour {success_count} jours', 'info')
@@ -6421,6 +6592,7 @@ def handle_save_all(request, current_user_id, annee, mois, semaine, current_mode
             if len(parts) >= 2:
                 dates.add(parts[1])
 
+    payloads = []
     for date_str in dates:
         vacances = request.form.get(f'vacances_{date_str}') == 'on'
         plages = []
@@ -6442,9 +6614,12 @@ def handle_save_all(request, current_user_id, annee, mois, semaine, current_mode
             'vacances': vacances,
             'type_heures': 'reelles' if current_mode == 'reel' else 'simulees'
         }
-        g.models.heure_model.create_or_update(data)
+        payloads.append(data)
 
-    flash('Toutes les heures ont été enregistrées', 'success')
+    if g.models.heure_model.create_or_update_batch(payloads) < len(payloads):
+        flash("Certaines journées n'ont pas pu être enregistrées", 'warning')
+    else:
+        flash('Toutes les heures ont été enregistrées', 'success')
     return redirect(url_for('banking.heures_travail',
                             annee=annee, mois=mois, semaine=semaine,
                             mode=current_mode, employeur=selected_employeur))
@@ -6507,7 +6682,7 @@ def handle_copier_semaine(request, user_id, mode, employeur, id_contrat):
     contrat = g.models.contrat_model.get_by_id(id_contrat)
     employe_id = contrat.get('employe_id') if contrat else None
 
-    copied = 0
+    payloads = []
     for i in range(7):
         src_day = (date.fromisoformat(src_start) + timedelta(days=i)).isoformat()
         tgt_day = (tgt_monday + timedelta(days=i)).isoformat()
@@ -6516,7 +6691,7 @@ def handle_copier_semaine(request, user_id, mode, employeur, id_contrat):
         if not src_data:
             continue
 
-        payload = {
+        payloads.append({
             'date': tgt_day,
             'user_id': user_id,
             'employeur': employeur,
@@ -6525,10 +6700,9 @@ def handle_copier_semaine(request, user_id, mode, employeur, id_contrat):
             'plages': src_data.get('plages', []),
             'vacances': src_data.get('vacances', False),
             'type_heures': src_data.get('type_heures', 'reelles')
-        }
+        })
 
-        if g.models.heure_model.create_or_update(payload):
-            copied += 1
+    copied = g.models.heure_model.create_or_update_batch(payloads)
 
     flash(f"{copied} jour(s) copié(s) vers la semaine du {tgt_monday.strftime('%d/%m/%Y')}.", "success")
     return redirect(url_for('banking.heures_travail',
@@ -6779,21 +6953,10 @@ def employe_login():
     
     return render_template('employe/login.html')
 
-@bp.route('/salaires/pdf/<int:mois>/<int:annee>')
-@login_required
-def salaire_pdf(mois: int, annee: int):
-    user_id = current_user.id
-    selected_employeur = request.args.get('employeur')
-
-    # Récupérer les données comme dans /salaires
-    contrat = g.models.contrat_model.get_contrat_for_date(user_id, selected_employeur, f"{annee}-{mois:02d}-01")
-    if not contrat:
-        abort(404)
-
-    heures_reelles = g.models.heure_model.get_total_heures_mois(user_id, selected_employeur, contrat['id'], annee, mois) or 0.0
-    salaires_db = g.models.salaire_model.get_by_mois_annee(user_id, annee, mois, selected_employeur, contrat['id'])
-    salaire_data = salaires_db[0] if salaires_db else None
-
+def _fiche_salaire(user_id: int, contrat: dict, employe_info: dict, entreprise: dict, annee: int, mois: int) -> dict:
+    """Calcule le salaire d'un contrat pour le mois et prépare la fiche PDF correspondante."""
+    employeur = contrat['employeur']
+    heures_reelles = g.models.heure_model.get_total_heures_mois(user_id, employeur, contrat['id'], annee, mois) or 0.0
     result = g.models.salaire_model.calculer_salaire_net_avec_details(
         g.models.heure_model,
         g.models.cotisations_contrat_model,
@@ -6808,72 +6971,30 @@ def salaire_pdf(mois: int, annee: int):
         user_id=user_id,
         jour_estimation=contrat.get('jour_estimation_salaire', 15)
     )
-    details = result.get('details', {})
+    return preparer_fiche(
+        entreprise=entreprise,
+        employe_info=employe_info,
+        mois=mois,
+        annee=annee,
+        heures_reelles=heures_reelles,
+        result=result,
+        details=result.get('details', {})
+    )
 
-    # Récupérer infos entreprise
-    entreprise = g.models.entreprise_model.get_or_create_for_user(user_id)
+@bp.route('/salaires/pdf/<int:mois>/<int:annee>')
+@login_required
+def salaire_pdf(mois: int, annee: int):
+    user_id = current_user.id
+    selected_employeur = request.args.get('employeur')
 
-    # === GÉNÉRATION PDF ===
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-    elements = []
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=14,
-        alignment=1  # center
-    )
+    # Récupérer les données comme dans /salaires
+    contrat = g.models.contrat_model.get_contrat_for_date(user_id, selected_employeur, f"{annee}-{mois:02d}-01")
+    if not contrat:
+        abort(404)
 
-    # En-tête entreprise
-    if entreprise.get('logo_path') and os.path.exists(os.path.join(current_app.static_folder, entreprise['logo_path'])):
-        logo_path = os.path.join(current_app.static_folder, entreprise['logo_path'])
-        img = Image(logo_path, width=1.5*inch, height=1.5*inch)
-        elements.append(img)
-        elements.append(Spacer(1, 12))
-
-    elements.append(Paragraph(entreprise.get('nom', 'Votre entreprise'), title_style))
-    elements.append(Paragraph(f"{entreprise.get('rue', '')}", styles['Normal']))
-    elements.append(Paragraph(f"{entreprise.get('code_postal', '')} {entreprise.get('commune', '')}", styles['Normal']))
-    elements.append(Spacer(1, 24))
-
-    # Titre du document
-    mois_noms = ["", "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                 "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
-    elements.append(Paragraph(f"Fiche de salaire – {mois_noms[mois]} {annee}", styles['Heading1']))
-    if selected_employeur:
-        elements.append(Paragraph(f"Employeur : {selected_employeur}", styles['Normal']))
-    elements.append(Spacer(1, 18))
-
-    # Tableau de synthèse
-    data = [
-        ["Élément", "Montant (CHF)"],
-        ["Heures réelles", f"{heures_reelles:.2f} h"],
-        ["Salaire brut", f"{details.get('salaire_brut', 0):.2f}"],
-        ["+ Indemnités", f"+{details.get('total_indemnites', 0):.2f}"],
-        ["- Cotisations", f"-{details.get('total_cotisations', 0):.2f}"],
-        ["= Salaire net", f"{result.get('salaire_net', 0):.2f}"],
-    ]
-    table = Table(data, colWidths=[3*inch, 1.5*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 24))
-
-    # Signature
-    elements.append(Paragraph("_________________________", styles['Normal']))
-    elements.append(Paragraph("Signature employeur", styles['Normal']))
-
-    doc.build(elements)
-    buffer.seek(0)
+    entreprise = g.models.entreprise_model.get_or_create_for_user(user_id)
+    fiche = _fiche_salaire(user_id, contrat, {'employeur': selected_employeur}, entreprise, annee, mois)
+    buffer = io.BytesIO(get_cache_pdf_salaire().obtenir(fiche))
 
     filename = f"salaire_{selected_employeur or 'perso'}_{annee}_{mois:02d}.pdf"
     return send_file(
@@ -6884,6 +7005,44 @@ def salaire_pdf(mois: int, annee: int):
     )
 
 
+@bp.route('/salaires/pdf/lot/<int:annee>/<int:mois>')
+@login_required
+def salaires_pdf_lot(annee: int, mois: int):
+    """
+    Paie du mois : fiches de salaire de tous les employés dans une archive ZIP envoyée en flux.
+    Les fiches sont rendues en parallèle (pool de processus) et mises en cache sur disque.
+    """
+    user_id = current_user.id
+    debut_mois = date(annee, mois, 1)
+    fin_mois = date(annee, mois, monthrange(annee, mois)[1])
+    entreprise = g.models.entreprise_model.get_or_create_for_user(user_id)
+
+    fiches = []
+    for employe in g.models.employe_model.get_all_by_user(user_id) or []:
+        contrat = g.models.contrat_model.get_contrat_for_employe(user_id, employe['id'])
+        if not contrat:
+            continue
+        # Ignorer les contrats qui ne couvrent pas le mois
+        if contrat.get('date_debut') and contrat['date_debut'] > fin_mois:
+            continue
+        if contrat.get('date_fin') and contrat['date_fin'] < debut_mois:
+            continue
+        employe_info = {'prenom': employe['prenom'], 'nom': employe['nom'], 'employeur': contrat['employeur']}
+        nom_fichier = secure_filename(f"salaire_{employe['id']}_{employe['prenom']}_{employe['nom']}_{annee}_{mois:02d}.pdf")
+        fiches.append((nom_fichier, _fiche_salaire(user_id, contrat, employe_info, entreprise, annee, mois)))
+
+    if not fiches:
+        flash("Aucun employé avec un contrat pour ce mois.", "warning")
+        return redirect(url_for('banking.salaires'))
+
+    flux = generer_lot_zip(fiches, get_cache_pdf_salaire(), current_app.config.get('PDF_SALAIRE_PROCESSUS'))
+    return Response(
+        stream_with_context(flux),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="fiches_salaire_{annee}_{mois:02d}.zip"'}
+    )
+
+
 @bp.route('/salaires/employe/<int:employe_id>/pdf/<int:annee>/<int:mois>')
 def salaire_employe_pdf(employe_id: int, annee: int, mois: int):
     code = request.args.get('code')
@@ -6899,38 +7058,14 @@ def salaire_employe_pdf(employe_id: int, annee: int, mois: int):
     if not contrat:
         abort(404)
 
-    employeur = contrat['employeur']
-    heures_reelles = g.models.heure_model.get_total_heures_mois(user_id, employeur, contrat['id'], annee, mois) or 0.0
-    result = g.models.salaire_model.calculer_salaire_net_avec_details(
-        g.models.heure_model,
-        g.models.cotisations_contrat_model,
-        g.models.indemnites_contrat_model,
-        g.models.bareme_indemnite_model,
-        g.models.bareme_cotisation_model,
-        heures_reelles=heures_reelles,
-        contrat=contrat,
-        contrat_id=contrat['id'],
-        annee=annee,
-        mois=mois,
-        user_id=user_id,
-        jour_estimation=contrat.get('jour_estimation_salaire', 15)
-    )
-    details = result.get('details', {})
     entreprise = g.models.entreprise_model.get_or_create_for_user(user_id)
-
-    buffer = generer_pdf_salaire(
-        entreprise=entreprise,
-        employe_info={
-            'prenom': employe['prenom'],
-            'nom': employe['nom'],
-            'employeur': employeur
-        },
-        mois=mois,
-        annee=annee,
-        heures_reelles=heures_reelles,
-        result=result,
-        details=details
-    )
+    employe_info = {
+        'prenom': employe['prenom'],
+        'nom': employe['nom'],
+        'employeur': contrat['employeur']
+    }
+    fiche = _fiche_salaire(user_id, contrat, employe_info, entreprise, annee, mois)
+    buffer = io.BytesIO(get_cache_pdf_salaire().obtenir(fiche))
 
     filename = f"salaire_{employe['prenom']}_{employe['nom']}_{annee}_{mois:02d}.pdf"
     return send_file(buffer, as_attachment=True, download_name=filename, mimetype='application/pdf')
@@ -7157,6 +7292,7 @@ def employe_logout():
 
 @bp.route('/salaires', methods=['GET'])
 @login_required
+@tampon_donnees('utilisateur')
 def salaires():
     current_user_id = current_user.id
     now = datetime.now()
@@ -7645,7 +7781,7 @@ def recalculer_salaires():
     annee = request.form.get('annee', type=int)
     employeur = request.form.get('employeur', '').strip()
     current_user_id = current_user.id
-    logging.info(f'demande de recalcul des salaires pour {current_user_id} et {employeur}')
+    logging.info("demande de recalcul des salaires pour %s et %s", current_user_id, employeur)
     if not annee or not employeur:
         flash("Année et employeur requis pour le recalcul", "error")
         return redirect(url_for('banking.salaires', annee=annee or datetime.now().year))
@@ -7676,13 +7812,14 @@ def recalculer_salaires():
     for sal in salaires:
         if g.models.salaire_model.recalculer_salaire(g.models.heure_model, g.models.cotisations_contrat_model, g.models.indemnites_contrat_model, g.models.bareme_indemnite_model,g.models.bareme_cotisation_model, sal['id'], contrat):
             count += 1
-            logging.info(f'salaire corrigé : {salaires} - {sal}')
+            logging.info("salaire corrigé : %s - %s", salaires, sal)
 
     flash(f"✅ {count} salaires ont été recalculés avec succès pour {employeur} en {annee}.", "success")
     return redirect(url_for('banking.salaires', annee=annee, employeur=employeur))
 
 @bp.route('/synthese-hebdo', methods=['GET'])
 @login_required
+@tampon_donnees('utilisateur')
 def synthese_hebdomadaire():
     user_id = current_user.id
     annee = int(request.args.get('annee', datetime.now().year))
@@ -7702,11 +7839,9 @@ def synthese_hebdomadaire():
     else:
         semaine = int(semaine)
 
-    # Calculer et sauvegarder les synthèses par contrat pour la semaine si nécessaire
-    data_list = g.models.synthese_hebdo_model.calculate_for_week_by_contrat(user_id, annee, semaine)
-    for data in data_list:
-        g.models.synthese_hebdo_model.create_or_update_batch([data])
-
+    # Les synthèses sont tenues à jour à chaque écriture d'heures (HeureTravail → abonnés),
+    # les heures plus anciennes ont été rattrapées une fois au démarrage
+    # (DatabaseManager.MIGRATIONS_DONNEES) : la page se contente de les lire.
     # Données de la semaine sélectionnée
     synthese_list = g.models.synthese_hebdo_model.get_by_user_and_filters(
         user_id=user_id, annee=annee, semaine=semaine,
@@ -7738,8 +7873,8 @@ def synthese_hebdomadaire():
     # Pour cet exemple, on prend le premier contrat trouvé pour la semaine, ou None.
     id_contrat_exemple = synthese_list[0]['id_contrat'] if synthese_list else None
     employeur_exemple = synthese_list[0]['employeur'] if synthese_list else None
-    id_contrat_svg = id_contrat_filtre if id_contrat_filtre else (synthese_list[0]['id_contrat'])
-    employeur_svg = employeur_filtre if employeur_filtre else synthese_list[0]['employeur']
+    id_contrat_svg = id_contrat_filtre if id_contrat_filtre else id_contrat_exemple
+    employeur_svg = employeur_filtre if employeur_filtre else employeur_exemple
 
     svg_horaire_data = None
     if id_contrat_exemple and employeur_exemple:
@@ -7752,7 +7887,11 @@ def synthese_hebdomadaire():
     # Si pas de contrat trouvé, svg_horaire_data restera None, gère-le dans ton template.
 
     # Préparer le graphique SVG pour l'année entière (heures totales)
-    graphique_svg = g.models.synthese_hebdo_model.prepare_svg_data_hebdo(user_id, annee)
+    graphique_svg = chart_cache.get_or_render(
+        'synthese_hebdo', (user_id, annee),
+        g.models.version_model.get_version('utilisateur', user_id),
+        lambda: g.models.synthese_hebdo_model.prepare_svg_data_hebdo(user_id, annee)
+    )
     employeurs_disponibles = g.models.contrat_model.get_all_contrats(user_id)
     contrats_disponibles = g.models.contrat_model.get_all_contrats(user_id)
     return render_template('salaires/synthese_hebdo.html',
@@ -7804,7 +7943,11 @@ def synthese_heures():
     semaines = g.models.synthese_hebdo_model.get_by_user_and_year(user_id, annee)
     
     # Générer le graphique SVG global
-    graphique_svg = g.models.synthese_hebdo_model.prepare_svg_data_hebdo(user_id, annee)
+    graphique_svg = chart_cache.get_or_render(
+        'synthese_hebdo', (user_id, annee),
+        g.models.version_model.get_version('utilisateur', user_id),
+        lambda: g.models.synthese_hebdo_model.prepare_svg_data_hebdo(user_id, annee)
+    )
     
     # Liste des employeurs pour les filtres (optionnel)
     try:
@@ -7850,12 +7993,12 @@ def generer_syntheses_mensuelles():
 def synthese_mensuelle():
     user_id = current_user.id
     employeurs = g.models.synthese_mensuelle_model.get_employeurs_distincts(user_id)
-    logging.info(f'liste des employeurs : {employeurs}')
+    logging.info("liste des employeurs : %s", employeurs)
     contrats = g.models.contrat_model.get_all_contrats(user_id)
     employeurs_default = employeurs[0] if employeurs else None
-    logging.info(f'employeur par defaut : {employeurs_default}')
+    logging.info("employeur par defaut : %s", employeurs_default)
     contrats_default = contrats[0]['id'] if contrats else None
-    logging.info(f'contrat par défaut : {contrats_default}')
+    logging.info("contrat par défaut : %s", contrats_default)
     
     annee = int(request.args.get('annee', datetime.now().year))
     mois = request.args.get('mois')
@@ -7877,13 +8020,17 @@ def synthese_mensuelle():
         employeur=employeur,
         contrat_id=contrat_id
     )
-    logging.info(f'voici la synthese list : {synthese_list}')
+    logging.info("voici la synthese list : %s", synthese_list)
    
         
         
     # ✅ Préparer le graphique SVG (toujours pour l'année entière, en CHF)
-    graphique_svg = g.models.synthese_mensuelle_model.prepare_svg_data_mensuel(user_id, annee)
-    logging.info(f'Voici les données graphiques {graphique_svg} ')
+    graphique_svg = chart_cache.get_or_render(
+        'synthese_mensuelle', (user_id, annee),
+        g.models.version_model.get_version('utilisateur', user_id),
+        lambda: g.models.synthese_mensuelle_model.prepare_svg_data_mensuel(user_id, annee)
+    )
+    logging.info("Voici les données graphiques %s ", graphique_svg)
     # --- NOUVEAU : Calcul des stats h2f pour le mois ---
     seuil_h2f_heure_input = request.args.get('seuil_h2f', '20.0')
     if seuil_h2f_heure_input:
@@ -7895,7 +8042,7 @@ def synthese_mensuelle():
     else:
         seuil_h2f_heure = 20.0
     seuil_h2f_minutes = int(round(seuil_h2f_heure * 60))  # ← entier en minutes
-    logging.info(f'Voici le seuil : {seuil_h2f_minutes} pour {seuil_h2f_heure_input}')
+    logging.info("Voici le seuil : %s pour %s", seuil_h2f_minutes, seuil_h2f_heure_input)
 
     seuil_h2f_minutes = int(round(seuil_h2f_heure * 60))  # ✅ garantit un int
     graphique_h2f_annuel = None
@@ -7941,7 +8088,7 @@ def synthese_mensuelle():
             # --- NOUVEAU : Préparation des données SVG pour le graphique horaire du mois ---
             svg_horaire_mois_data = g.models.synthese_mensuelle_model.prepare_svg_data_horaire_mois(g.models.heure_model, 
                 user_id, employeur_exemple, id_contrat_exemple, annee, mois)
-            logging.info(f'Voici les données pour {mois} : {svg_horaire_mois_data}')
+            logging.info("Voici les données pour %s : %s", mois, svg_horaire_mois_data)
     # --- NOUVEAU : Graphique hebdomadaire du dépassement de seuil DANS le mois ---
     graphique_h2f_semaines = None
     if mois and synthese_list:
@@ -7951,7 +8098,7 @@ def synthese_mensuelle():
         donnees_semaines = g.models.synthese_mensuelle_model.calculate_h2f_stats_weekly_for_month(g.models.heure_model, 
             user_id, employeur_exemple, id_contrat_exemple, annee, mois, seuil_h2f_minutes
         )
-        logging.info(f'voici les données pour {mois}: {donnees_semaines}')
+        logging.info("voici les données pour %s: %s", mois, donnees_semaines)
 
         # Préparer les données SVG (barres + ligne)
         semaines = donnees_semaines['semaines']
@@ -8112,7 +8259,7 @@ def nouveau_contrat():
                     'cotisation_assurance_indemnite_maladie_tx': float(request.form.get('cotisation_assurance_indemnite_maladie_tx') or 0),
                     'cotisation_cap_tx': float(request.form.get('cotisation_cap_tx') or 0),
                 }
-                logging.debug(f'banking 3807 Voici les données du contrat à sauvegarder: {data}')
+                logging.debug("banking 3807 Voici les données du contrat à sauvegarder: %s", data)
             except ValueError:
                 flash("Certaines valeurs numériques sont invalides.", "danger")
                 return redirect(url_for('banking.nouveau_contrat'))
@@ -9298,7 +9445,11 @@ def synthese_mensuelle_employes():
     employeurs = g.models.synthese_mensuelle_model.get_employeurs_distincts(current_user.id)
     
     # Préparer le SVG
-    svg_data = g.models.synthese_mensuelle_model.prepare_svg_data_mensuel(current_user.id, annee)
+    svg_data = chart_cache.get_or_render(
+        'synthese_mensuelle', (current_user.id, annee),
+        g.models.version_model.get_version('utilisateur', current_user.id),
+        lambda: g.models.synthese_mensuelle_model.prepare_svg_data_mensuel(current_user.id, annee)
+    )
 
     return render_template(
         'employes/mensuelle.html',
@@ -5,7 +5,6 @@ from flask_login import login_required, current_user
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta, date, time
 from calendar import monthrange
-from app.models import DatabaseManager, Banque, ComptePrincipal, SousCompte, TransactionFinanciere, StatistiquesBancaires, PlanComptable, EcritureComptable, HeureTravail, Salaire, SyntheseHebdomadaire, SyntheseMensuelle, Contrat, Contacts, ContactCompte, ComptePrincipalRapport, CategorieComptable, Employe, Equipe, Planning, Competence, PlanningRegles
 from io import StringIO
 import os
 from werkzeug.utils import secure_filename
@@ -18,11 +17,6 @@ import traceback
 import random
 from collections import defaultdict
 from . import db_csv_store
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from ..utils.pdf_salaire import generer_pdf_salaire
 # --- DÉBUT DES AJOUTS (8 lignes) ---
 from flask import _app_ctx_stack
@@ -32,22 +26,8 @@ from flask import _app_ctx_stack
 # Création du blueprint
 bp = Blueprint('banking', __name__)
 
-# Configuration du logger
+# Configuration du logger (niveau et handlers : app/utils/journalisation.py)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Création des handlers
-file_handler = logging.FileHandler('app.log')
-stream_handler = logging.StreamHandler()
-
-# Format des logs
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-# Ajout des handlers au logger
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 
 
 @bp.route('/banques', methods=['GET'])
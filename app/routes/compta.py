@@ -5,7 +5,6 @@ from flask_login import login_required, current_user
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta, date, time
 from calendar import monthrange
-from app.models import DatabaseManager, Banque, ComptePrincipal, SousCompte, TransactionFinanciere, StatistiquesBancaires, PlanComptable, EcritureComptable, HeureTravail, Salaire, SyntheseHebdomadaire, SyntheseMensuelle, Contrat, Contacts, ContactCompte, ComptePrincipalRapport, CategorieComptable, Employe, Equipe, Planning, Competence, PlanningRegles
 from io import StringIO
 import os
 from werkzeug.utils import secure_filename
@@ -18,11 +17,6 @@ import traceback
 import random
 from collections import defaultdict
 from . import db_csv_store
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from ..utils.pdf_salaire import generer_pdf_salaire
 # --- DÉBUT DES AJOUTS (8 lignes) ---
 from flask import _app_ctx_stack
@@ -32,22 +26,8 @@ from flask import _app_ctx_stack
 # Création du blueprint
 bp = Blueprint('compta', __name__)
 
-# Configuration du logger
+# Configuration du logger (niveau et handlers : app/utils/journalisation.py)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Création des handlers
-file_handler = logging.FileHandler('app.log')
-stream_handler = logging.StreamHandler()
-
-# Format des logs
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-# Ajout des handlers au logger
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 
 ##### Partie comptabilité
 
@@ -70,21 +50,9 @@ def comptabilite_dashboard():
     total_depenses = sum(s['total_depenses'] or 0 for s in stats)
     resultat_net = total_recettes - total_depenses
 
-    # Nombre de transactions à comptabiliser
-    comptes = g.models.compte_model.get_by_user_id(current_user.id) # Utilise la méthode correcte
-    transactions_a_comptabiliser = []
-    for compte in comptes:
-        # Appel correct de la méthode avec les arguments nommés pour éviter les ambiguités
-        txs = g.models.transaction_financiere_model.get_transactions_sans_ecritures_par_compte(
-            compte_id=compte['id'], # Premier argument : compte_id
-            user_id=current_user.id, # Deuxième argument : user_id
-            # Pas besoin de spécifier date_from/date_to ici, on veut pour l'année entière
-            # On peut ajouter date_from et date_to si le filtre par année est important pour cette requête
-            # date_from=date_from, date_to=date_to
-            statut_comptable='a_comptabiliser'
-        )
-        transactions_a_comptabiliser.extend(txs)
-    nb_a_comptabiliser = len(transactions_a_comptabiliser)
+    # Nombre de transactions à comptabiliser (un seul comptage groupé pour tous les comptes)
+    nb_a_comptabiliser = g.models.transaction_financiere_model.compter_transactions_sans_ecritures(
+        current_user.id, statut_comptable='a_comptabiliser')['nb_total']
 
     # Préparer les données pour le template
     annees_disponibles = g.models.ecriture_comptable_model.get_annees_disponibles(current_user.id)
@@ -558,12 +526,12 @@ def export_ecritures():
     
     if ecritures:
         # En-têtes
-        headers = list(ecritures[0].keys()) if isinstance(ecritures[0], dict) else [f"col_{i}" for i in range(len(ecritures[0]))]
+        headers = list(ecritures[0].keys()) if hasattr(ecritures[0], 'keys') else [f"col_{i}" for i in range(len(ecritures[0]))]
         writer.writerow(headers)
         
         # Données
         for ecriture in ecritures:
-            if isinstance(ecriture, dict):
+            if hasattr(ecriture, 'keys'):
                 row = [ecriture.get(header, "") for header in headers]
             else:
                 row = list(ecriture)
@@ -1054,42 +1022,21 @@ def associer_categorie_transaction_multiple():
         flash("Compte non autorisé.", "error")
         return redirect(url_for('banking.banking_dashboard'))
 
-    # Récupérer les transactions non catégorisées dans la période
-    transactions_non_cat, _ = g.models.transaction_financiere_model.get_all_user_transactions(
-        user_id=current_user.id,
-        date_from=date_debut.isoformat(),
-        date_to=date_fin.isoformat(),
-        compte_source_id=compte_id,
-        compte_dest_id=compte_id,
-        per_page=10000
+    # Catégoriser en une requête toutes les transactions sans catégorie du compte sur la période
+    nb = g.models.categorie_transaction_model.associer_categorie_non_categorisees(
+        categorie_id,
+        current_user.id,
+        compte_id=compte_id,
+        date_debut=date_debut.isoformat(),
+        date_fin=date_fin.isoformat()
     )
 
-    # Filtrer celles qui n'ont aucune catégorie
-    transactions_a_categoriser = []
-    for tx in transactions_non_cat:
-        cats = g.models.categorie_transaction_model.get_categories_transaction(tx['id'], current_user.id)
-        if not cats:
-            transactions_a_categoriser.append(tx['id'])
-
-    if not transactions_a_categoriser:
+    if nb is None:
+        flash("Erreur lors de la catégorisation multiple.", "error")
+    elif nb == 0:
         flash("Aucune transaction non catégorisée dans cette période.", "info")
-        return redirect(request.referrer)
-
-    # Associer la catégorie à chacune
-    erreurs = 0
-    for tx_id in transactions_a_categoriser:
-        try:
-            g.models.categorie_transaction_model.associer_categorie_transaction(
-                tx_id, categorie_id, current_user.id
-            )
-        except Exception as e:
-            logging.error(f"Erreur catégorisation multiple TX {tx_id}: {e}")
-            erreurs += 1
-
-    if erreurs == 0:
-        flash(f"Catégorie appliquée à {len(transactions_a_categoriser)} transactions.", "success")
     else:
-        flash(f"Catégorie appliquée partiellement ({len(transactions_a_categoriser) - erreurs} / {len(transactions_a_categoriser)}).", "warning")
+        flash(f"Catégorie appliquée à {nb} transactions.", "success")
 
     return redirect(request.referrer)
 # API endpoints pour AJAX
@@ -1177,20 +1124,17 @@ def transactions_sans_ecritures():
         transaction_dict['contact_lie'] = contact_lie
         transactions_avec_contacts.append(transaction_dict)
     
-    total_transactions = []
-
-    for i in comptes:
-        txs = g.models.transaction_financiere_model.get_transactions_sans_ecritures_par_compte(
-            compte_id=i['id'],
-            user_id=current_user.id,
-            date_from=i['date_ouverture'],
+    # Totaux à comptabiliser de tous les comptes (depuis leur ouverture) en une requête groupée
+    total_a_comptabiliser, total_a_comptabiliser_len = 0, 0
+    if statut_comptable == 'a_comptabiliser':
+        compteurs = g.models.transaction_financiere_model.compter_transactions_sans_ecritures(
+            current_user.id,
             date_to=date.today().strftime('%Y-%m-%d'),
-            statut_comptable=statut_comptable
+            statut_comptable=statut_comptable,
+            depuis_ouverture=True
         )
-        total_transactions.extend(txs)
-    
-    total_a_comptabiliser = sum(tx['montant'] for tx in total_transactions if tx['statut_comptable'] == 'a_comptabiliser')
-    total_a_comptabiliser_len = len([tx for tx in total_transactions if tx['statut_comptable'] == 'a_comptabiliser'])
+        total_a_comptabiliser = compteurs['montant_total']
+        total_a_comptabiliser_len = compteurs['nb_total']
     
     # Récupérer les catégories et celles avec complémentaires
     categories = g.models.categorie_comptable_model.get_all_categories(current_user.id)
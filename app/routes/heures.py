@@ -5,7 +5,6 @@ from flask_login import login_required, current_user
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta, date, time
 from calendar import monthrange
-from app.models import DatabaseManager, Banque, ComptePrincipal, SousCompte, TransactionFinanciere, StatistiquesBancaires, PlanComptable, EcritureComptable, HeureTravail, Salaire, SyntheseHebdomadaire, SyntheseMensuelle, Contrat, Contacts, ContactCompte, ComptePrincipalRapport, CategorieComptable, Employe, Equipe, Planning, Competence, PlanningRegles
 from io import StringIO
 import os
 from werkzeug.utils import secure_filename
@@ -18,11 +17,6 @@ import traceback
 import random
 from collections import defaultdict
 from . import db_csv_store
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from ..utils.pdf_salaire import generer_pdf_salaire
 # --- DÉBUT DES AJOUTS (8 lignes) ---
 from flask import _app_ctx_stack
@@ -32,22 +26,8 @@ from flask import _app_ctx_stack
 # Création du blueprint
 bp = Blueprint('heures', __name__)
 
-# Configuration du logger
+# Configuration du logger (niveau et handlers : app/utils/journalisation.py)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Création des handlers
-file_handler = logging.FileHandler('app.log')
-stream_handler = logging.StreamHandler()
-
-# Format des logs
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-# Ajout des handlers au logger
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 # Partie heures et salaires 
 
 # --- Routes heures et salaires ---
@@ -71,18 +51,14 @@ def heures_travail():
         semaine = int(request.args.get('semaine', 0))
         current_mode = request.args.get('mode', 'reel')
         selected_employeur = request.args.get('employeur')
-    logging.debug(f"DEBUG 2950 : Requête de tous les contrats pour user_id={current_user.id}")
     try:
         tous_contrats = g.models.contrat_model.get_all_contrats(current_user_id)
-        logging.error(f"DEBUG 2953: Tous les contrats pour l'utilisateur {current_user_id}: {tous_contrats}")
     except Exception as e:
-        logging.exception(f"🚨 ERREUR dans get_all_contrats pour user_id={current_user_id}: {e}")
+        logger.exception("Erreur dans get_all_contrats pour user_id=%s: %s", current_user_id, e)
         tous_contrats = []
-    logging.debug(f"DEBUG2 2957: Contrats récupérés: {tous_contrats}")
-    logging.debug(f"DEBUG 2958: Mois={mois}, Semaine={semaine}, Mode={current_mode}, Employeur sélectionné={selected_employeur} avec tous_contrats={len(tous_contrats)}")
-    logging.error(f"DEBUG 2959: Tous les contrats pour l'utilisateur {current_user_id}: {tous_contrats}")
+    logger.debug("heures_travail: %d contrats, mois=%s, semaine=%s, mode=%s, employeur=%s",
+                 len(tous_contrats), mois, semaine, current_mode, selected_employeur)
     employeurs_unique = sorted({c['employeur'] for c in tous_contrats if c.get('employeur')})
-    logging.debug(f"DEBUG 2956 : Employeurs uniques trouvés: {employeurs_unique}")
     if not selected_employeur:
         if employeurs_unique:
             contrat_actuel = g.models.contrat_model.get_contrat_actuel(current_user_id)
@@ -854,6 +830,12 @@ def employe_login():
 @bp.route('/salaires/pdf/<int:mois>/<int:annee>')
 @login_required
 def salaire_pdf(mois: int, annee: int):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+
     user_id = current_user.id
     selected_employeur = request.args.get('employeur')
 
@@ -0,0 +1,177 @@
+"""
+Aperçus (vignettes JPEG) des justificatifs d'écritures.
+
+La liste des écritures chargeait chaque justificatif en taille réelle (image ou PDF
+complet dans la fenêtre de visualisation) : parcourir des centaines d'écritures
+transférait des centaines de fichiers. Deux aperçus sont produits par justificatif,
+stockés à côté de l'original (ab/<sha256>.pdf -> ab/<sha256>.vignette.jpg, ...) :
+    - 'vignette' (160 px) : colonne Fichier de la liste ;
+    - 'apercu' (1000 px) : fenêtre de visualisation, l'original restant accessible
+      par « Ouvrir dans un nouvel onglet » et « Télécharger ».
+Pour un PDF, l'aperçu est la première page.
+
+Les aperçus sont générés en arrière-plan (un thread, file d'attente) juste après
+ajouter_fichier, et à la demande pour les justificatifs plus anciens : tant qu'ils
+n'existent pas, la route répond 404 et la page affiche l'icône du fichier. Le stockage
+étant adressé par contenu, un justificatif déjà connu a déjà ses aperçus.
+
+Dépendances optionnelles : Pillow pour les images ; pour les PDF, PyMuPDF (avec Pillow)
+ou, à défaut, l'outil pdftoppm de poppler. Sans elles, pas d'aperçu, comme avant.
+"""
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # dépendance optionnelle : sans elle, pas d'aperçu d'image
+    Image = None
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+TAILLES = {'vignette': 160, 'apercu': 1000}
+QUALITE_JPEG = 80
+EXTENSIONS_IMAGE = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+DELAI_PDFTOPPM = 60
+
+_executeur: Optional[ThreadPoolExecutor] = None
+_en_cours = set()
+# Justificatifs dont le rendu a échoué : pas de nouvelle tentative à chaque affichage
+_echecs = set()
+_verrou = threading.Lock()
+
+
+def chemin_apercu(chemin_relatif: str, taille: str) -> str:
+    """Chemin relatif de l'aperçu d'un justificatif (même dossier, même nom, suffixe .<taille>.jpg)"""
+    dossier, nom = posixpath.split(chemin_relatif)
+    base = nom.rsplit('.', 1)[0] if '.' in nom else nom
+    return posixpath.join(dossier, f"{base}.{taille}.jpg")
+
+
+def _extension(chemin_relatif: str) -> str:
+    nom = posixpath.basename(chemin_relatif)
+    return nom.rsplit('.', 1)[1].lower() if '.' in nom else ''
+
+
+def _enregistrer_jpeg(image, destination: str) -> None:
+    if image.mode != 'RGB':
+        # Transparence (PNG, GIF) : fond blanc plutôt que noir
+        image = image.convert('RGBA')
+        fond = Image.new('RGB', image.size, 'white')
+        fond.paste(image, mask=image.getchannel('A'))
+        image = fond
+    image.save(destination, 'JPEG', quality=QUALITE_JPEG, optimize=True)
+
+
+def _rendre_image(source: str, destination: str, cote: int) -> None:
+    with Image.open(source) as image:
+        image.draft('RGB', (cote, cote))  # JPEG : décodage directement à taille réduite
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((cote, cote))
+        _enregistrer_jpeg(image, destination)
+
+
+def _rendre_pdf(source: str, destination: str, cote: int) -> None:
+    if fitz is not None and Image is not None:
+        with fitz.open(source) as document:
+            page = document.load_page(0)
+            zoom = cote / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        _enregistrer_jpeg(image, destination)
+        return
+    # pdftoppm ajoute lui-même l'extension .jpg au préfixe donné
+    subprocess.run(
+        [shutil.which('pdftoppm'), '-f', '1', '-l', '1', '-singlefile', '-jpeg',
+         '-scale-to', str(cote), source, destination[:-len('.jpg')]],
+        check=True, capture_output=True, timeout=DELAI_PDFTOPPM)
+
+
+def _rendu(chemin_relatif: str) -> Optional[Callable[[str, str, int], None]]:
+    """Fonction de rendu adaptée au justificatif, None si aucune dépendance ne le permet"""
+    extension = _extension(chemin_relatif)
+    if extension == 'pdf':
+        if (fitz is not None and Image is not None) or shutil.which('pdftoppm'):
+            return _rendre_pdf
+    elif extension in EXTENSIONS_IMAGE and Image is not None:
+        return _rendre_image
+    return None
+
+
+def generer_apercus(dossier: str, chemin_relatif: str) -> int:
+    """Génère les aperçus manquants d'un justificatif ; retourne le nombre d'aperçus créés"""
+    rendu = _rendu(chemin_relatif)
+    if rendu is None:
+        return 0
+    source = os.path.join(dossier, *chemin_relatif.split('/'))
+    crees = 0
+    for taille, cote in TAILLES.items():
+        destination = os.path.join(dossier, *chemin_apercu(chemin_relatif, taille).split('/'))
+        if os.path.exists(destination):
+            continue
+        descripteur, temporaire = tempfile.mkstemp(prefix='.apercu-', suffix='.jpg',
+                                                   dir=os.path.dirname(destination))
+        os.close(descripteur)
+        try:
+            rendu(source, temporaire, cote)
+            os.chmod(temporaire, 0o644)
+            os.replace(temporaire, destination)
+            crees += 1
+        finally:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+    return crees
+
+
+def _generer_en_tache(dossier: str, chemin_relatif: str, cle: str) -> None:
+    try:
+        crees = generer_apercus(dossier, chemin_relatif)
+        logger.info("Aperçus générés pour %s : %s", chemin_relatif, crees)
+    except Exception as e:
+        logger.warning("Aperçu impossible pour %s : %s", chemin_relatif, e)
+        with _verrou:
+            _echecs.add(cle)
+    finally:
+        with _verrou:
+            _en_cours.discard(cle)
+
+
+def planifier_apercus(dossier: str, chemin_relatif: str) -> bool:
+    """
+    Met en file la génération des aperçus d'un justificatif (sans attendre).
+    Retourne False si aucun aperçu n'est possible pour ce fichier.
+    """
+    global _executeur
+    if _rendu(chemin_relatif) is None:
+        return False
+    cle = os.path.join(dossier, chemin_relatif)
+    with _verrou:
+        if cle in _echecs:
+            return False
+        if cle in _en_cours:
+            return True
+        if _executeur is None:
+            _executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix='apercus')
+        _en_cours.add(cle)
+    _executeur.submit(_generer_en_tache, dossier, chemin_relatif, cle)
+    return True
+
+
+def supprimer_apercus(dossier: str, chemin_relatif: str) -> None:
+    """Supprime les aperçus d'un justificatif (avec le fichier physique)"""
+    for taille in TAILLES:
+        chemin = os.path.join(dossier, *chemin_apercu(chemin_relatif, taille).split('/'))
+        if os.path.exists(chemin):
+            os.remove(chemin)
+    with _verrou:
+        _echecs.discard(os.path.join(dossier, chemin_relatif))
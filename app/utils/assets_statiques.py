@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assets statiques empreintés et précompressés.
+
+Construction (à relancer après chaque modification d'un fichier de app/static) :
+    python app/utils/assets_statiques.py [--inclure js/adminlte.min.js] [--verbeux]
+
+    - seuls les assets réellement utilisés sont retenus : ceux référencés par
+      url_for('static', filename='...') dans les templates, plus (récursivement) les
+      url(...) / @import des feuilles CSS retenues. Les thèmes AdminLTE livrés dans
+      app/static (plusieurs Mo) ne sont référencés nulle part et ne sont pas copiés ;
+    - chaque fichier est copié dans app/static/dist/ sous un nom contenant le hash de
+      son contenu (css/mystyle.css -> dist/css/mystyle.3f9a1c0e2b7d.css), les url(...)
+      des CSS étant réécrites vers les noms empreintés ;
+    - les fichiers texte reçoivent une variante .gz (et .br si le module brotli est
+      installé), compressée une fois pour toutes au niveau maximal ;
+    - dist/manifest.json associe le nom logique au nom empreinté.
+
+Service (installer(app), appelé depuis app/__init__.py) :
+    - url_for('static', filename='css/mystyle.css') renvoie le nom empreinté si le
+      manifeste le connaît (sauf en mode debug, pour voir les modifications sans rebuild) ;
+    - un fichier empreinté est servi avec Cache-Control: immutable sur un an, et sa
+      variante .br ou .gz selon Accept-Encoding (Vary: Accept-Encoding) ;
+    - tout autre fichier passe par le service statique habituel de Flask.
+
+Sans manifeste (build jamais lancé), rien ne change : les templates pointent sur les
+fichiers d'origine.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import sys
+from typing import Dict, List, Optional, Set
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : sans elle, seules les variantes .gz sont produites
+    brotli = None
+
+REPERTOIRE_DIST = 'dist'
+NOM_MANIFESTE = 'manifest.json'
+LONGUEUR_EMPREINTE = 12
+DUREE_CACHE_IMMUABLE = 365 * 24 * 3600
+
+EXTENSIONS_COMPRESSIBLES = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.ico', '.ttf', '.eot'}
+# Une variante compressée n'est gardée que si elle fait gagner au moins 10 %
+RATIO_COMPRESSION_MAX = 0.9
+# Variantes dans l'ordre de préférence : (nom Accept-Encoding, suffixe du fichier)
+ENCODAGES = (('br', '.br'), ('gzip', '.gz'))
+
+# Répertoires de app/static jamais empreintés (fichiers déposés par les utilisateurs, sortie du build)
+EXCLUS = ('uploads/', REPERTOIRE_DIST + '/')
+
+_RE_URL_FOR_STATIC = re.compile(
+    r"""url_for\(\s*['"]static['"]\s*,\s*filename\s*=\s*['"]([^'"]+)['"]\s*\)""")
+_RE_REFERENCE_CSS = re.compile(
+    r"""url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3""")
+
+
+# ---------------------------------------------------------------------------
+# Construction
+# ---------------------------------------------------------------------------
+
+def references_templates(dossier_templates: str) -> Set[str]:
+    """Noms de fichiers statiques littéraux utilisés par les templates."""
+    references = set()
+    for racine, _dossiers, fichiers in os.walk(dossier_templates):
+        for nom in fichiers:
+            if not nom.endswith(('.html', '.htm', '.jinja', '.j2', '.txt', '.xml')):
+                continue
+            with open(os.path.join(racine, nom), encoding='utf-8', errors='replace') as f:
+                references.update(_RE_URL_FOR_STATIC.findall(f.read()))
+    return references
+
+
+def _est_locale(reference: str) -> bool:
+    return not (reference.startswith(('data:', 'http:', 'https:', '//', '#', '/'))
+                or reference.strip() == '')
+
+
+def _cible_css(fichier_css: str, reference: str) -> str:
+    """Nom logique (relatif à app/static) visé par une url(...) d'une feuille CSS."""
+    chemin = re.split(r'[?#]', reference, maxsplit=1)[0]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(fichier_css), chemin))
+
+
+def _references_css(fichier_css: str, contenu: str) -> List[str]:
+    cibles = []
+    for correspondance in _RE_REFERENCE_CSS.finditer(contenu):
+        reference = correspondance.group(2) or correspondance.group(4)
+        if _est_locale(reference):
+            cibles.append(_cible_css(fichier_css, reference))
+    return cibles
+
+
+def _nom_empreinte(nom: str, contenu: bytes) -> str:
+    empreinte = hashlib.sha256(contenu).hexdigest()[:LONGUEUR_EMPREINTE]
+    base, extension = posixpath.splitext(nom)
+    return f"{REPERTOIRE_DIST}/{base}.{empreinte}{extension}"
+
+
+def _exclu(nom: str) -> bool:
+    return nom.startswith(EXCLUS) or nom.startswith('..')
+
+
+def _variantes_compressees(nom: str, contenu: bytes) -> Dict[str, bytes]:
+    if posixpath.splitext(nom)[1].lower() not in EXTENSIONS_COMPRESSIBLES:
+        return {}
+    variantes = {'.gz': gzip.compress(contenu, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(contenu, quality=11)
+    return {suffixe: donnees for suffixe, donnees in variantes.items()
+            if len(donnees) <= len(contenu) * RATIO_COMPRESSION_MAX}
+
+
+def construire(dossier_static: str, dossier_templates: str, inclure=(), verbeux: bool = False) -> Dict:
+    """
+    Construit app/static/dist et son manifeste ; retourne le manifeste.
+
+    La sortie est d'abord écrite dans un répertoire temporaire puis substituée à
+    l'ancienne en une fois : un serveur en marche ne voit jamais de build à moitié écrit.
+    """
+    a_traiter = sorted(set(references_templates(dossier_templates)) | set(inclure))
+    dependances: Dict[str, List[str]] = {}
+    retenus: List[str] = []  # ordre de traitement : dépendances d'abord
+
+    def visiter(nom: str, pile: Set[str]):
+        if nom in dependances or nom in pile or _exclu(nom):
+            return
+        chemin = os.path.join(dossier_static, *nom.split('/'))
+        if not os.path.isfile(chemin):
+            if verbeux:
+                print(f"  ignoré (introuvable) : {nom}")
+            return
+        cibles = []
+        if nom.lower().endswith('.css'):
+            with open(chemin, encoding='utf-8', errors='replace') as f:
+                cibles = _references_css(nom, f.read())
+        pile.add(nom)
+        for cible in cibles:
+            visiter(cible, pile)
+        pile.discard(nom)
+        dependances[nom] = cibles
+        retenus.append(nom)
+
+    for nom in a_traiter:
+        visiter(posixpath.normpath(nom), set())
+
+    dossier_dist = os.path.join(dossier_static, REPERTOIRE_DIST)
+    dossier_tmp = dossier_dist + '.tmp'
+    shutil.rmtree(dossier_tmp, ignore_errors=True)
+    os.makedirs(dossier_tmp)
+
+    fichiers: Dict[str, Dict] = {}
+    for nom in retenus:
+        with open(os.path.join(dossier_static, *nom.split('/')), 'rb') as f:
+            contenu = f.read()
+        if nom.lower().endswith('.css'):
+            contenu = _reecrire_css(nom, contenu, fichiers)
+        nom_final = _nom_empreinte(nom, contenu)
+        destination = os.path.join(dossier_tmp, *nom_final.split('/')[1:])
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, 'wb') as f:
+            f.write(contenu)
+        variantes = _variantes_compressees(nom, contenu)
+        for suffixe, donnees in variantes.items():
+            with open(destination + suffixe, 'wb') as f:
+                f.write(donnees)
+        fichiers[nom] = {
+            'chemin': nom_final,
+            'taille': len(contenu),
+            'encodages': sorted(variantes, key=lambda s: [e[1] for e in ENCODAGES].index(s)),
+        }
+        if verbeux:
+            tailles = ', '.join(f"{s[1:]} {len(d)} o" for s, d in variantes.items())
+            print(f"  {nom} -> {nom_final} ({len(contenu)} o{', ' + tailles if tailles else ''})")
+
+    manifeste = {'version': 1, 'fichiers': fichiers}
+    with open(os.path.join(dossier_tmp, NOM_MANIFESTE), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=2, sort_keys=True)
+
+    dossier_ancien = dossier_dist + '.ancien'
+    shutil.rmtree(dossier_ancien, ignore_errors=True)
+    if os.path.isdir(dossier_dist):
+        os.rename(dossier_dist, dossier_ancien)
+    os.rename(dossier_tmp, dossier_dist)
+    shutil.rmtree(dossier_ancien, ignore_errors=True)
+    return manifeste
+
+
+def _reecrire_css(nom_css: str, contenu: bytes, fichiers: Dict[str, Dict]) -> bytes:
+    """Remplace les url(...) d'une feuille par les noms empreintés (chemins relatifs)."""
+    texte = contenu.decode('utf-8', errors='surrogateescape')
+    dossier_final = posixpath.dirname(REPERTOIRE_DIST + '/' + nom_css)
+
+    def remplacer(correspondance):
+        guillemet, reference = (correspondance.group(1), correspondance.group(2)) \
+            if correspondance.group(2) is not None else (correspondance.group(3), correspondance.group(4))
+        if not _est_locale(reference):
+            return correspondance.group(0)
+        entree = fichiers.get(_cible_css(nom_css, reference))
+        if entree is None:
+            return correspondance.group(0)
+        suffixe = reference[len(re.split(r'[?#]', reference, maxsplit=1)[0]):]
+        nouvelle = posixpath.relpath(entree['chemin'], dossier_final) + suffixe
+        if correspondance.group(2) is not None:
+            return f"url({guillemet}{nouvelle}{guillemet})"
+        return f"@import {guillemet}{nouvelle}{guillemet}"
+
+    return _RE_REFERENCE_CSS.sub(remplacer, texte).encode('utf-8', errors='surrogateescape')
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+def charger_manifeste(dossier_static: str) -> Dict[str, Dict]:
+    """Fichiers du manifeste ({nom logique: entrée}), vide si le build n'a pas été lancé."""
+    chemin = os.path.join(dossier_static, REPERTOIRE_DIST, NOM_MANIFESTE)
+    try:
+        with open(chemin, encoding='utf-8') as f:
+            return json.load(f).get('fichiers', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        import logging
+        logging.getLogger(__name__).warning(f"Manifeste des assets illisible ({chemin}) : {e}")
+        return {}
+
+
+def installer(app) -> None:
+    """Branche la réécriture de url_for('static', ...) et le service des fichiers empreintés."""
+    from flask import request
+
+    manifeste = charger_manifeste(app.static_folder)
+    if not manifeste:
+        return
+    # nom empreinté -> (encodages disponibles, type MIME du fichier d'origine)
+    empreintes = {
+        entree['chemin']: (tuple(entree.get('encodages', ())),
+                           mimetypes.guess_type(nom)[0] or 'application/octet-stream')
+        for nom, entree in manifeste.items()
+    }
+    servir_statique_flask = app.view_functions['static']
+
+    @app.url_defaults
+    def url_asset_empreinte(endpoint, values):
+        if endpoint == 'static' and not app.debug:
+            entree = manifeste.get(values.get('filename'))
+            if entree is not None:
+                values['filename'] = entree['chemin']
+
+    def servir_statique(filename):
+        connu = empreintes.get(filename)
+        if connu is None:
+            return servir_statique_flask(filename=filename)
+        encodages, mimetype = connu
+        nom, encodage = filename, None
+        for encodage_http, suffixe in ENCODAGES:
+            if suffixe in encodages and request.accept_encodings[encodage_http]:
+                nom, encodage = filename + suffixe, encodage_http
+                break
+        reponse = envoyer_fichier(app.static_folder, nom, mimetype=mimetype,
+                                  max_age=DUREE_CACHE_IMMUABLE, immuable=True)
+        if encodage:
+            reponse.headers['Content-Encoding'] = encodage
+        if encodages:
+            reponse.vary.add('Accept-Encoding')
+        return reponse
+
+    app.view_functions['static'] = servir_statique
+
+
+def envoyer_fichier(repertoire: str, nom: str, mimetype: Optional[str] = None,
+                    max_age: int = 0, immuable: bool = False, prive: bool = False, **options):
+    """
+    Envoie repertoire/nom (chemin validé par safe_join) avec ETag, Last-Modified et Range.
+    Les options (download_name, as_attachment, etag) sont transmises à send_from_directory.
+
+    Le contenu quitte Python dès que le serveur frontal sait le faire :
+        - USE_X_SENDFILE=1 (Apache mod_xsendfile, lighttpd) : en-tête X-Sendfile, géré par Flask ;
+        - X_ACCEL_REDIRECT=/_interne (nginx) : en-tête X-Accel-Redirect vers le chemin du
+          fichier relatif au paquet app/, avec côté nginx :
+              location /_interne/ { internal; alias /var/www/webroot/ROOT/app/; }
+          nginx gère alors lui-même les requêtes conditionnelles et Range.
+    """
+    from flask import abort, current_app, send_from_directory
+    from werkzeug.security import safe_join
+
+    prefixe = current_app.config.get('X_ACCEL_REDIRECT')
+    if prefixe:
+        chemin = safe_join(repertoire, nom)
+        if chemin is None or not os.path.isfile(chemin):
+            abort(404)
+        relatif = os.path.relpath(chemin, current_app.root_path).replace(os.sep, '/')
+        if relatif.startswith('..'):
+            abort(404)
+        from urllib.parse import quote
+        # En-têtes calculés par send_file (type, Content-Disposition, ETag), corps servi par nginx
+        reponse = send_from_directory(repertoire, nom, mimetype=mimetype, max_age=max_age,
+                                      conditional=False, **options)
+        reponse.close()
+        reponse.response = []
+        reponse.headers.pop('Content-Length', None)
+        reponse.headers['X-Accel-Redirect'] = prefixe.rstrip('/') + '/' + quote(relatif)
+    else:
+        reponse = send_from_directory(repertoire, nom, mimetype=mimetype, max_age=max_age, **options)
+
+    directives = ['private' if prive else 'public', f'max-age={max_age}']
+    if immuable:
+        directives.append('immutable')
+    elif max_age == 0:
+        directives.append('no-cache')
+    reponse.headers['Cache-Control'] = ', '.join(directives)
+    return reponse
+
+
+def main(argv=None) -> int:
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Construit les assets statiques empreintés et précompressés.")
+    parser.add_argument('--static', default=os.path.join(app_dir, 'static'))
+    parser.add_argument('--templates', default=os.path.join(app_dir, 'templates'))
+    parser.add_argument('--inclure', action='append', default=[],
+                        help="asset supplémentaire (relatif à static/), ex. js/adminlte.min.js")
+    parser.add_argument('--verbeux', action='store_true')
+    args = parser.parse_args(argv)
+
+    if brotli is None:
+        print("Module brotli absent : seules les variantes .gz seront produites.")
+    manifeste = construire(args.static, args.templates, args.inclure, verbeux=args.verbeux)
+    total = sum(entree['taille'] for entree in manifeste['fichiers'].values())
+    print(f"{len(manifeste['fichiers'])} asset(s), {total} octets -> "
+          f"{os.path.join(args.static, REPERTOIRE_DIST)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
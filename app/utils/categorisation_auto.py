@@ -0,0 +1,258 @@
+"""
+Catégorisation automatique des transactions par règles utilisateur.
+
+Les règles d'un utilisateur (mot-clé, expression régulière, IBAN de la contrepartie,
+plage de montants) sont compilées une fois en un MoteurCategorisation :
+    - tous les mots-clés dans un automate d'Aho-Corasick (un seul parcours du texte,
+      quel que soit le nombre de mots-clés) ;
+    - tous les IBAN dans un second automate, parcouru sur le texte sans espaces ;
+    - toutes les expressions régulières dans une alternative unique servant de
+      préfiltre : les règles regex ne sont évaluées une à une que si elle trouve
+      quelque chose dans la description.
+Parmi les règles satisfaites, la plus prioritaire l'emporte (priorité décroissante,
+puis identifiant croissant). Une plage de montants posée sur une règle mot-clé, regex
+ou IBAN s'ajoute à sa condition ; une règle 'montant' n'a que la plage.
+
+Le moteur compilé est gardé par utilisateur dans `cache_moteurs`, associé à la version
+'regles' de l'utilisateur (table versions_donnees) : toute modification d'une règle
+ou d'une catégorie incrémente cette version et le moteur est recompilé au prochain usage.
+"""
+import re
+import threading
+import unicodedata
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TYPES_REGLE = ('mot_cle', 'regex', 'iban', 'montant')
+
+# Références à un groupe (\1, (?P=nom), (?(1)...)) dont le numéro change une fois le motif
+# fondu dans l'alternative du préfiltre, et groupes nommés (un même nom dans deux règles
+# rendrait l'alternative invalide)
+_RE_GROUPES_NON_COMBINABLES = re.compile(r'\\[1-9]|\(\?P[=<]|\(\?\(')
+
+
+def verifier_regex(motif: str) -> Optional[str]:
+    """Message d'erreur si le motif ne compile pas, seul ou inclus dans le préfiltre ; None sinon."""
+    try:
+        re.compile(motif, re.IGNORECASE)
+        re.compile(f'(?:{motif})', re.IGNORECASE)
+    except re.error as e:
+        if 'global flags' in str(e):
+            return "Les indicateurs comme (?i) ne sont pas acceptés : la recherche ignore déjà la casse"
+        return f"Expression régulière invalide : {e}"
+    return None
+
+
+def _combinable(motif: str) -> bool:
+    """Le motif peut-il entrer dans l'alternative unique du préfiltre ?"""
+    return verifier_regex(motif) is None and not _RE_GROUPES_NON_COMBINABLES.search(motif)
+
+
+def normaliser_texte(texte: Optional[str]) -> str:
+    """Minuscules, sans accents, espaces consécutifs réduits à un seul."""
+    if not texte:
+        return ''
+    texte = unicodedata.normalize('NFKD', str(texte))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c))
+    return ' '.join(texte.lower().split())
+
+
+def normaliser_iban(texte: Optional[str]) -> str:
+    """Majuscules sans espaces : 'CH93 0076 2011...' -> 'CH9300762011...'."""
+    return ''.join(str(texte or '').split()).upper()
+
+
+class AhoCorasick:
+    """Automate d'Aho-Corasick : trouve en un parcours tous les motifs présents dans un texte."""
+
+    __slots__ = ('_transitions', '_echecs', '_sorties')
+
+    def __init__(self, motifs: Iterable[Tuple[str, object]]):
+        """`motifs` : couples (motif, valeur) ; rechercher() renvoie les valeurs des motifs trouvés."""
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._sorties: List[List[object]] = [[]]
+        for motif, valeur in motifs:
+            if not motif:
+                continue
+            etat = 0
+            for caractere in motif:
+                suivant = self._transitions[etat].get(caractere)
+                if suivant is None:
+                    suivant = len(self._transitions)
+                    self._transitions[etat][caractere] = suivant
+                    self._transitions.append({})
+                    self._sorties.append([])
+                etat = suivant
+            self._sorties[etat].append(valeur)
+
+        # Liens d'échec en largeur ; les sorties d'un état incluent celles de son lien d'échec
+        self._echecs = [0] * len(self._transitions)
+        file = list(self._transitions[0].values())
+        for etat in file:
+            for caractere, suivant in self._transitions[etat].items():
+                file.append(suivant)
+                echec = self._echecs[etat]
+                while echec and caractere not in self._transitions[echec]:
+                    echec = self._echecs[echec]
+                cible = self._transitions[echec].get(caractere, 0)
+                self._echecs[suivant] = cible if cible != suivant else 0
+                self._sorties[suivant] = self._sorties[suivant] + self._sorties[self._echecs[suivant]]
+
+    def __bool__(self) -> bool:
+        return len(self._transitions) > 1
+
+    def rechercher(self, texte: str) -> set:
+        """Valeurs de tous les motifs présents dans `texte`."""
+        trouves = set()
+        transitions, echecs, sorties = self._transitions, self._echecs, self._sorties
+        etat = 0
+        for caractere in texte:
+            while etat and caractere not in transitions[etat]:
+                etat = echecs[etat]
+            etat = transitions[etat].get(caractere, 0)
+            if sorties[etat]:
+                trouves.update(sorties[etat])
+        return trouves
+
+
+class MoteurCategorisation:
+    """Règles compilées d'un utilisateur. Construit à partir des lignes de regles_categorisation."""
+
+    def __init__(self, regles: Iterable[Dict]):
+        self._regles: Dict[int, Dict] = {}
+        mots_cles, ibans, regex_compilees, montants = [], [], [], []
+        for regle in regles:
+            type_regle = regle['type_regle']
+            motif = regle.get('motif') or ''
+            info = {
+                'id': regle['id'],
+                'categorie_id': regle['categorie_id'],
+                'cle': (-int(regle.get('priorite') or 0), regle['id']),
+                'min': self._montant(regle.get('montant_min')),
+                'max': self._montant(regle.get('montant_max')),
+            }
+            if type_regle == 'mot_cle' and normaliser_texte(motif):
+                mots_cles.append((normaliser_texte(motif), regle['id']))
+            elif type_regle == 'iban' and normaliser_iban(motif):
+                ibans.append((normaliser_iban(motif), regle['id']))
+            elif type_regle == 'regex' and motif:
+                try:
+                    info['regex'] = re.compile(motif, re.IGNORECASE)
+                except re.error:
+                    continue
+                regex_compilees.append((motif, regle['id']))
+            elif type_regle == 'montant' and (info['min'] is not None or info['max'] is not None):
+                montants.append(regle['id'])
+            else:
+                continue
+            self._regles[regle['id']] = info
+
+        self._mots_cles = AhoCorasick(mots_cles)
+        self._ibans = AhoCorasick(ibans)
+        self._regex_ids = [regle_id for _, regle_id in sorted(regex_compilees, key=lambda r: self._regles[r[1]]['cle'])]
+        # Les motifs qui ne se combinent pas (drapeaux globaux, références de groupe, noms de
+        # groupe en double) sont évalués un à un à chaque description, hors préfiltre
+        combinables = [(motif, regle_id) for motif, regle_id in regex_compilees if _combinable(motif)]
+        self._prefiltre = None
+        if combinables:
+            try:
+                self._prefiltre = re.compile('|'.join(f'(?:{motif})' for motif, _ in combinables), re.IGNORECASE)
+            except re.error:
+                combinables = []
+        ids_combines = {regle_id for _, regle_id in combinables}
+        self._hors_prefiltre = {regle_id for _, regle_id in regex_compilees if regle_id not in ids_combines}
+        self._montants_ids = montants
+
+    @staticmethod
+    def _montant(valeur) -> Optional[Decimal]:
+        if valeur is None or valeur == '':
+            return None
+        try:
+            return Decimal(str(valeur))
+        except InvalidOperation:
+            return None
+
+    def __len__(self) -> int:
+        return len(self._regles)
+
+    def _dans_plage(self, info: Dict, montant: Optional[Decimal]) -> bool:
+        if info['min'] is None and info['max'] is None:
+            return True
+        if montant is None:
+            return False
+        montant = abs(montant)
+        return (info['min'] is None or montant >= info['min']) and (info['max'] is None or montant <= info['max'])
+
+    def categoriser(self, description: Optional[str], montant=None) -> Optional[int]:
+        """Catégorie de la règle la plus prioritaire satisfaite, None si aucune."""
+        if not self._regles:
+            return None
+        montant = self._montant(montant)
+        candidats = set(self._montants_ids)
+        if description:
+            if self._mots_cles:
+                candidats |= self._mots_cles.rechercher(normaliser_texte(description))
+            if self._ibans:
+                candidats |= self._ibans.rechercher(normaliser_iban(description))
+
+        meilleure = None
+        for regle_id in candidats:
+            info = self._regles[regle_id]
+            if (meilleure is None or info['cle'] < meilleure['cle']) and self._dans_plage(info, montant):
+                meilleure = info
+
+        # Regex par priorité décroissante ; celles du préfiltre seulement s'il trouve quelque chose
+        if description and self._regex_ids:
+            prefiltre_trouve = self._prefiltre is not None and self._prefiltre.search(description) is not None
+            for regle_id in self._regex_ids:
+                info = self._regles[regle_id]
+                if meilleure is not None and meilleure['cle'] < info['cle']:
+                    break
+                if not prefiltre_trouve and regle_id not in self._hors_prefiltre:
+                    continue
+                if info['regex'].search(description) and self._dans_plage(info, montant):
+                    meilleure = info
+                    break
+        return meilleure['categorie_id'] if meilleure else None
+
+    def categoriser_lot(self, lignes: Iterable[Tuple[int, Optional[str], object]]) -> List[Tuple[int, int]]:
+        """(transaction_id, description, montant) -> [(transaction_id, categorie_id)] des lignes reconnues."""
+        resultats = []
+        for transaction_id, description, montant in lignes:
+            categorie_id = self.categoriser(description, montant)
+            if categorie_id is not None:
+                resultats.append((transaction_id, categorie_id))
+        return resultats
+
+
+class CacheMoteurs:
+    """Moteurs compilés par utilisateur, valables pour une version donnée de ses règles."""
+
+    def __init__(self, max_entrees: int = 512):
+        self.max_entrees = max_entrees
+        self._entrees: Dict[int, Tuple[object, MoteurCategorisation]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compile(self, user_id: int, version, charger_regles) -> MoteurCategorisation:
+        """Moteur en cache pour (user_id, version), sinon compilé depuis charger_regles()."""
+        with self._lock:
+            entree = self._entrees.get(user_id)
+            if entree is not None and entree[0] == version:
+                return entree[1]
+
+        moteur = MoteurCategorisation(charger_regles())
+        # Une version inconnue ('inconnue-<uuid>') ne doit jamais être resservie
+        if not str(version).startswith('inconnue'):
+            with self._lock:
+                if len(self._entrees) >= self.max_entrees and user_id not in self._entrees:
+                    self._entrees.pop(next(iter(self._entrees)))
+                self._entrees[user_id] = (version, moteur)
+        return moteur
+
+    def invalider(self, user_id: int) -> None:
+        with self._lock:
+            self._entrees.pop(user_id, None)
+
+
+# Instance partagée par le processus (un worker gunicorn = un cache)
+cache_moteurs = CacheMoteurs()
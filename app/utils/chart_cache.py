@@ -0,0 +1,90 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ChartCache:
+    """
+    Cache LRU des graphiques SVG déjà calculés.
+    La clé combine le type de graphique, ses paramètres et la version des données
+    sous-jacentes (table versions_donnees) : dès qu'une écriture incrémente la version
+    d'un compte ou d'un contrat, l'entrée correspondante n'est plus jamais servie.
+    """
+
+    def __init__(self, max_entrees: int = 256, max_octets: int = 32 * 1024 * 1024):
+        self.max_entrees = max_entrees
+        self.max_octets = max_octets
+        self._entrees = OrderedDict()  # cle -> (valeur, taille)
+        self._taille_totale = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cle(type_graphique: str, params, version):
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        return (type_graphique, repr(params), repr(version))
+
+    @staticmethod
+    def _taille(valeur) -> int:
+        if isinstance(valeur, (str, bytes)):
+            return len(valeur)
+        return len(repr(valeur))
+
+    def get_or_render(self, type_graphique: str, params, version, render):
+        """
+        Retourne le graphique en cache, ou appelle render() puis le mémorise.
+        Une valeur None (pas de données) n'est pas mise en cache.
+        """
+        cle = self._cle(type_graphique, params, version)
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                self._entrees.move_to_end(cle)
+                self.hits += 1
+                valeur = entree[0]
+                return valeur if isinstance(valeur, (str, bytes)) else copy.deepcopy(valeur)
+            self.misses += 1
+
+        valeur = render()
+        if valeur is None:
+            return None
+        self._stocker(cle, valeur)
+        return valeur if isinstance(valeur, (str, bytes)) else copy.deepcopy(valeur)
+
+    def _stocker(self, cle, valeur) -> None:
+        taille = self._taille(valeur)
+        if taille > self.max_octets:
+            logger.debug("Graphique %s trop volumineux pour le cache (%d octets)", cle[0], taille)
+            return
+        with self._lock:
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self._taille_totale -= ancienne[1]
+            self._entrees[cle] = (valeur, taille)
+            self._taille_totale += taille
+            while self._entrees and (len(self._entrees) > self.max_entrees or self._taille_totale > self.max_octets):
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self._taille_totale -= taille_evincee
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entrees.clear()
+            self._taille_totale = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entrees': len(self._entrees),
+                'octets': self._taille_totale,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Instance partagée par le processus (un worker gunicorn = un cache)
+chart_cache = ChartCache()
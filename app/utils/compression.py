@@ -0,0 +1,170 @@
+"""
+Compression des réponses HTTP (gzip, ou brotli si le module est installé).
+
+Les pages de rapport (détail de compte, comparaison, synthèse hebdo, compte de
+résultat) embarquent de gros SVG et tableaux : du texte très redondant qui se
+compresse d'un facteur 5 à 10, ce qui compte surtout pour l'accès distant.
+
+    - seuls les types de l'allowlist sont compressés (HTML, JSON, SVG, CSV, ...) ;
+      PDF, ZIP et images le sont déjà ;
+    - les réponses sous le seuil (COMPRESSION_SEUIL octets) sont laissées telles quelles ;
+    - les réponses envoyées en flux (exports CSV, generateurs) sont compressées morceau
+      par morceau, sans les charger en mémoire ;
+    - les fichiers (send_file : direct_passthrough) et les réponses déjà encodées
+      (assets précompressés) ne sont pas touchés ;
+    - pour une réponse cacheable (ETag, ou Cache-Control public / max-age), le corps
+      compressé est mémorisé, indexé par l'empreinte du corps d'origine : une page
+      identique resservie n'est compressée qu'une fois.
+
+installer(app) doit être appelé avant la déclaration des autres after_request de
+l'application : Flask les exécute dans l'ordre inverse, la compression passe donc en
+dernier, après la barre de debug SQL qui modifie le HTML.
+"""
+import hashlib
+import zlib
+
+from .chart_cache import ChartCache
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : sans elle, seul gzip est proposé
+    brotli = None
+
+TYPES_COMPRESSIBLES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+SEUIL_DEFAUT = 1024
+NIVEAU_GZIP_DEFAUT = 6
+QUALITE_BROTLI_DEFAUT = 5
+# En flux : une vidange (Z_SYNC_FLUSH) au plus tous les N octets lus, pour que le
+# navigateur reçoive les premières lignes d'un long export sans attendre la fin
+TAILLE_VIDANGE_FLUX = 256 * 1024
+
+# Corps compressés des réponses cacheables (un worker gunicorn = un cache)
+cache_compression = ChartCache(max_entrees=512, max_octets=16 * 1024 * 1024)
+
+
+class _Compresseur:
+    """Compresseur incrémental commun à gzip et brotli."""
+
+    def __init__(self, encodage: str, niveau_gzip: int, qualite_brotli: int):
+        self.encodage = encodage
+        if encodage == 'br':
+            self._brotli = brotli.Compressor(quality=qualite_brotli)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(niveau_gzip, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+
+    def compresser(self, donnees: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(donnees)
+        return self._zlib.compress(donnees)
+
+    def vidanger(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminer(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def choisir_encodage(accept_encodings):
+    """'br', 'gzip' ou None selon l'en-tête Accept-Encoding (objet Accept de werkzeug)."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compresser(corps: bytes, encodage: str, niveau_gzip: int = NIVEAU_GZIP_DEFAUT,
+               qualite_brotli: int = QUALITE_BROTLI_DEFAUT) -> bytes:
+    compresseur = _Compresseur(encodage, niveau_gzip, qualite_brotli)
+    return compresseur.compresser(corps) + compresseur.terminer()
+
+
+def compresser_flux(iterable, encodage: str, charset: str = 'utf-8',
+                    niveau_gzip: int = NIVEAU_GZIP_DEFAUT, qualite_brotli: int = QUALITE_BROTLI_DEFAUT):
+    """Générateur compressant un corps de réponse morceau par morceau."""
+    compresseur = _Compresseur(encodage, niveau_gzip, qualite_brotli)
+    depuis_vidange = 0
+    try:
+        for morceau in iterable:
+            if isinstance(morceau, str):
+                morceau = morceau.encode(charset)
+            if not morceau:
+                continue
+            sortie = compresseur.compresser(morceau)
+            depuis_vidange += len(morceau)
+            if depuis_vidange >= TAILLE_VIDANGE_FLUX:
+                sortie += compresseur.vidanger()
+                depuis_vidange = 0
+            if sortie:
+                yield sortie
+        yield compresseur.terminer()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def _cacheable(response) -> bool:
+    cache_control = response.cache_control
+    if cache_control.no_store:
+        return False
+    return bool(response.get_etag()[0]) or bool(cache_control.public) or bool(cache_control.max_age)
+
+
+def installer(app) -> None:
+    """Ajoute la compression des réponses à l'application (désactivable par COMPRESSION=0)."""
+    from flask import request
+
+    if not app.config.get('COMPRESSION', True):
+        return
+    seuil = app.config.get('COMPRESSION_SEUIL', SEUIL_DEFAUT)
+    niveau_gzip = app.config.get('COMPRESSION_NIVEAU_GZIP', NIVEAU_GZIP_DEFAUT)
+    qualite_brotli = app.config.get('COMPRESSION_QUALITE_BROTLI', QUALITE_BROTLI_DEFAUT)
+
+    @app.after_request
+    def compresser_reponse(response):
+        if response.mimetype not in TYPES_COMPRESSIBLES \
+                or response.status_code < 200 or response.status_code in (204, 206, 304) \
+                or response.direct_passthrough \
+                or 'Content-Encoding' in response.headers \
+                or response.cache_control.no_transform:
+            return response
+
+        taille = response.calculate_content_length()  # None pour une réponse en flux
+        if taille is not None and taille < seuil:
+            return response
+        response.vary.add('Accept-Encoding')
+        encodage = choisir_encodage(request.accept_encodings)
+        if encodage is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compresser_flux(response.response, encodage, 'utf-8',
+                                                niveau_gzip, qualite_brotli)
+            response.headers.pop('Content-Length', None)
+        else:
+            corps = response.get_data()
+            if _cacheable(response):
+                empreinte = hashlib.sha1(corps).hexdigest()
+                compresse = cache_compression.get_or_render(
+                    encodage, len(corps), empreinte,
+                    lambda: compresser(corps, encodage, niveau_gzip, qualite_brotli))
+            else:
+                compresse = compresser(corps, encodage, niveau_gzip, qualite_brotli)
+            if len(compresse) >= len(corps):
+                return response
+            response.set_data(compresse)
+
+        response.headers['Content-Encoding'] = encodage
+        # Un ETag fort désigne des octets précis : la variante compressée n'en a plus qu'un faible
+        etag, faible = response.get_etag()
+        if etag and not faible:
+            response.set_etag(etag, weak=True)
+        return response
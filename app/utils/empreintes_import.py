@@ -0,0 +1,56 @@
+"""
+Empreintes d'import des transactions (détection des doublons à l'import CSV).
+
+L'empreinte d'une transaction est un SHA-1 de (type et id du compte, jour, sens et
+montant en centimes, description normalisée). Elle est stockée dans
+transactions.empreinte_import à l'insertion ; un relevé réimporté produit les mêmes
+empreintes, qu'on retrouve en O(1) dans un Counter chargé une fois pour la fenêtre
+de dates du fichier.
+
+L'heure n'entre pas dans l'empreinte : les relevés bancaires ne la donnent pas
+toujours, ou pas de façon stable d'un export à l'autre. De même, le suffixe
+« (Réf: TRF_...) » ajouté par create_transfert_interne est ignoré : il contient
+l'horodatage de la saisie, pas celui de l'opération.
+"""
+import hashlib
+import re
+from datetime import date, datetime
+from typing import Optional
+
+from .categorisation_auto import normaliser_texte
+from .montants import Montant
+
+TYPES_CREDIT = ('depot', 'transfert_entrant', 'recredit_annulation')
+
+_RE_REFERENCE_TRANSFERT = re.compile(r"\s*\(Réf: TRF_[^)]*\)\s*$")
+
+
+def est_credit(type_transaction: str, compte_type: str) -> bool:
+    """True si la transaction augmente le solde du compte sur lequel elle est inscrite."""
+    if type_transaction == 'transfert_compte_vers_sous':
+        return compte_type == 'sous_compte'
+    if type_transaction == 'transfert_sous_vers_compte':
+        return compte_type == 'compte_principal'
+    return type_transaction in TYPES_CREDIT
+
+
+def _jour(date_transaction) -> str:
+    if isinstance(date_transaction, datetime):
+        return date_transaction.date().isoformat()
+    if isinstance(date_transaction, date):
+        return date_transaction.isoformat()
+    return str(date_transaction)[:10]
+
+
+def empreinte_transaction(compte_type: str, compte_id: int, date_transaction, montant,
+                          credit: bool, description: Optional[str]) -> str:
+    """Empreinte hexadécimale (40 caractères) d'une transaction."""
+    cle = '|'.join((
+        'sc' if compte_type == 'sous_compte' else 'cp',
+        str(int(compte_id)),
+        _jour(date_transaction),
+        'C' if credit else 'D',
+        str(Montant.depuis(montant).centimes),
+        normaliser_texte(_RE_REFERENCE_TRANSFERT.sub('', description or '')),
+    ))
+    return hashlib.sha1(cle.encode('utf-8')).hexdigest()
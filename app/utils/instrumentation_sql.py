@@ -0,0 +1,245 @@
+"""
+Instrumentation SQL par requête HTTP.
+
+DatabaseManager.get_cursor enveloppe chaque curseur dans un CurseurInstrumente
+lorsqu'une mesure est active : nombre de requêtes, temps passé en base, attente
+du pool, requêtes les plus lentes (normalisées) et requêtes répétées (N+1).
+Les mesures de chaque requête HTTP sont agrégées par endpoint dans le processus
+pour la page d'administration, et un résumé des requêtes lentes est écrit
+périodiquement dans le journal.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+logger_lent = logging.getLogger('app.sql.lent')
+
+_mesure_courante: contextvars.ContextVar = contextvars.ContextVar('mesure_sql', default=None)
+
+_RE_CHAINES = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_NOMBRES = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTES = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_RE_ESPACES = re.compile(r"\s+")
+_RE_COMMENTAIRES = re.compile(r"--[^\n]*")
+
+
+def normaliser_requete(sql) -> str:
+    """Remplace littéraux et listes de paramètres pour regrouper les requêtes de même forme."""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _RE_COMMENTAIRES.sub(' ', str(sql))
+    sql = _RE_CHAINES.sub('?', sql)
+    sql = _RE_NOMBRES.sub('?', sql)
+    sql = _RE_LISTES.sub('(...)', sql)
+    return _RE_ESPACES.sub(' ', sql).strip()[:500]
+
+
+class MesureRequete:
+    """Compteurs SQL d'une requête HTTP."""
+
+    __slots__ = ('debut', 'nb_requetes', 'temps_db', 'temps_pool', 'nb_connexions', 'requetes')
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.nb_requetes = 0
+        self.temps_db = 0.0
+        self.temps_pool = 0.0
+        self.nb_connexions = 0
+        self.requetes: Dict[str, list] = {}  # sql normalisé -> [nombre, total, max]
+
+    def ajouter_requete(self, sql, duree: float, nombre: int = 1) -> None:
+        self.nb_requetes += nombre
+        self.temps_db += duree
+        cle = normaliser_requete(sql)
+        stats = self.requetes.get(cle)
+        if stats is None:
+            self.requetes[cle] = [nombre, duree, duree]
+        else:
+            stats[0] += nombre
+            stats[1] += duree
+            if duree > stats[2]:
+                stats[2] = duree
+
+    def ajouter_attente_pool(self, duree: float) -> None:
+        self.nb_connexions += 1
+        self.temps_pool += duree
+
+    def plus_lentes(self, limite: int = 5) -> List[Dict]:
+        tri = sorted(self.requetes.items(), key=lambda item: item[1][1], reverse=True)[:limite]
+        return [{'sql': sql, 'nombre': s[0], 'total_ms': s[1] * 1000, 'max_ms': s[2] * 1000} for sql, s in tri]
+
+    def repetees(self, seuil: int = 10) -> List[Dict]:
+        """Requêtes de même forme exécutées au moins `seuil` fois (symptôme N+1)."""
+        return [{'sql': sql, 'nombre': s[0], 'total_ms': s[1] * 1000}
+                for sql, s in self.requetes.items() if s[0] >= seuil]
+
+    def duree_totale(self) -> float:
+        return time.perf_counter() - self.debut
+
+
+def demarrer_mesure() -> MesureRequete:
+    mesure = MesureRequete()
+    _mesure_courante.set(mesure)
+    return mesure
+
+
+def terminer_mesure() -> Optional[MesureRequete]:
+    mesure = _mesure_courante.get()
+    _mesure_courante.set(None)
+    return mesure
+
+
+def mesure_courante() -> Optional[MesureRequete]:
+    return _mesure_courante.get()
+
+
+class CurseurInstrumente:
+    """Proxy de curseur DB-API chronométrant execute/executemany/callproc."""
+
+    __slots__ = ('_curseur', '_mesure')
+
+    def __init__(self, curseur, mesure: MesureRequete):
+        self._curseur = curseur
+        self._mesure = mesure
+
+    def execute(self, query, args=None):
+        debut = time.perf_counter()
+        try:
+            return self._curseur.execute(query, args)
+        finally:
+            self._mesure.ajouter_requete(query, time.perf_counter() - debut)
+
+    def executemany(self, query, args):
+        debut = time.perf_counter()
+        try:
+            return self._curseur.executemany(query, args)
+        finally:
+            self._mesure.ajouter_requete(query, time.perf_counter() - debut)
+
+    def callproc(self, procname, args=()):
+        debut = time.perf_counter()
+        try:
+            return self._curseur.callproc(procname, args)
+        finally:
+            self._mesure.ajouter_requete(f"CALL {procname}", time.perf_counter() - debut)
+
+    def __iter__(self):
+        return iter(self._curseur)
+
+    def __getattr__(self, nom):
+        return getattr(self._curseur, nom)
+
+
+class AgregateurPerformances:
+    """
+    Statistiques cumulées du processus : par endpoint (pour la page admin) et par
+    requête SQL lente (résumé écrit dans le journal toutes les `intervalle` secondes).
+    """
+
+    def __init__(self, seuil_lent_ms: float = 100.0, intervalle: float = 300.0, max_requetes_lentes: int = 500):
+        self.seuil_lent = seuil_lent_ms / 1000
+        self.intervalle = intervalle
+        self.max_requetes_lentes = max_requetes_lentes
+        self._endpoints: Dict[str, Dict] = {}
+        self._lentes: Dict[str, list] = {}  # sql -> [nombre, total, max, endpoint]
+        self._dernier_vidage = time.monotonic()
+        self._lock = threading.Lock()
+
+    def enregistrer(self, endpoint: str, mesure: MesureRequete, duree: float) -> None:
+        endpoint = endpoint or '?'
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'endpoint': endpoint, 'appels': 0, 'temps_total': 0.0, 'temps_max': 0.0,
+                    'requetes_total': 0, 'requetes_max': 0, 'temps_db': 0.0, 'temps_pool': 0.0,
+                }
+            stats['appels'] += 1
+            stats['temps_total'] += duree
+            stats['temps_max'] = max(stats['temps_max'], duree)
+            stats['requetes_total'] += mesure.nb_requetes
+            stats['requetes_max'] = max(stats['requetes_max'], mesure.nb_requetes)
+            stats['temps_db'] += mesure.temps_db
+            stats['temps_pool'] += mesure.temps_pool
+
+            for sql, (nombre, total, maximum) in mesure.requetes.items():
+                if maximum < self.seuil_lent:
+                    continue
+                lente = self._lentes.get(sql)
+                if lente is None:
+                    if len(self._lentes) >= self.max_requetes_lentes:
+                        continue
+                    self._lentes[sql] = [nombre, total, maximum, endpoint]
+                else:
+                    lente[0] += nombre
+                    lente[1] += total
+                    lente[2] = max(lente[2], maximum)
+
+            a_vider = None
+            if self._lentes and time.monotonic() - self._dernier_vidage >= self.intervalle:
+                a_vider, self._lentes = self._lentes, {}
+                self._dernier_vidage = time.monotonic()
+
+        if a_vider:
+            for sql, (nombre, total, maximum, ep) in sorted(a_vider.items(), key=lambda i: i[1][1], reverse=True):
+                logger_lent.warning("SQL lente x%d total=%.0fms max=%.0fms endpoint=%s : %s",
+                                    nombre, total * 1000, maximum * 1000, ep, sql)
+
+    def pires_endpoints(self, limite: int = 30, tri: str = 'temps_moyen') -> List[Dict]:
+        with self._lock:
+            lignes = [dict(s) for s in self._endpoints.values()]
+        for s in lignes:
+            s['temps_moyen'] = s['temps_total'] / s['appels']
+            s['requetes_moyennes'] = s['requetes_total'] / s['appels']
+            s['temps_db_moyen'] = s['temps_db'] / s['appels']
+            s['temps_pool_moyen'] = s['temps_pool'] / s['appels']
+        return sorted(lignes, key=lambda s: s.get(tri, 0), reverse=True)[:limite]
+
+    def requetes_lentes(self, limite: int = 30) -> List[Dict]:
+        with self._lock:
+            items = list(self._lentes.items())
+        items.sort(key=lambda i: i[1][1], reverse=True)
+        return [{'sql': sql, 'nombre': n, 'total_ms': t * 1000, 'max_ms': m * 1000, 'endpoint': ep}
+                for sql, (n, t, m, ep) in items[:limite]]
+
+    def reinitialiser(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._lentes.clear()
+
+
+# Instance partagée par le processus
+agregateur = AgregateurPerformances()
+
+
+def entete_server_timing(mesure: MesureRequete) -> str:
+    """Valeur de l'en-tête Server-Timing (affichée par les outils de développement du navigateur)."""
+    return (f'db;dur={mesure.temps_db * 1000:.1f};desc="{mesure.nb_requetes} requetes", '
+            f'pool;dur={mesure.temps_pool * 1000:.1f};desc="{mesure.nb_connexions} connexions", '
+            f'total;dur={mesure.duree_totale() * 1000:.1f}')
+
+
+def barre_debug_html(mesure: MesureRequete, endpoint: str) -> str:
+    """Petit panneau HTML injecté en bas des pages en mode debug."""
+    from html import escape
+    lignes = ''.join(
+        f"<tr><td>{r['nombre']}</td><td>{r['total_ms']:.1f}</td><td>{r['max_ms']:.1f}</td>"
+        f"<td><code>{escape(r['sql'][:200])}</code></td></tr>"
+        for r in mesure.plus_lentes(10)
+    )
+    repetees = mesure.repetees()
+    alerte = (f"<strong style='color:#c00'> — {len(repetees)} requête(s) répétée(s) ≥10×, N+1 probable</strong>"
+              if repetees else "")
+    return (
+        "<div id='barre-debug-sql' style='position:fixed;bottom:0;left:0;right:0;z-index:99999;"
+        "max-height:40vh;overflow:auto;background:#fffbe6;border-top:2px solid #e0c000;font:12px monospace;padding:4px 8px'>"
+        "<details><summary>"
+        f"{escape(endpoint or '?')} : {mesure.nb_requetes} requêtes SQL, {mesure.temps_db * 1000:.1f} ms en base, "
+        f"{mesure.temps_pool * 1000:.1f} ms d'attente pool, {mesure.duree_totale() * 1000:.1f} ms au total{alerte}"
+        "</summary><table><tr><th>n</th><th>total ms</th><th>max ms</th><th>requête</th></tr>"
+        f"{lignes}</table></details></div>"
+    )
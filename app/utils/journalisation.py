@@ -0,0 +1,102 @@
+"""
+Configuration de la journalisation de l'application.
+
+Les threads de requête ne font que déposer les enregistrements dans une file
+(QueueHandler) ; un thread dédié (QueueListener) les écrit dans app.log avec
+rotation. Les niveaux sont réglables par module depuis la configuration, et les
+messages DEBUG répétitifs sont échantillonnés par ligne d'appel.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+FORMAT_LOG = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+class FiltreEchantillonnage(logging.Filter):
+    """
+    Ne laisse passer qu'un enregistrement sur `taux` pour une même ligne d'appel,
+    pour les niveaux inférieurs ou égaux à `niveau_max` (DEBUG par défaut).
+    Les niveaux supérieurs ne sont jamais filtrés.
+    """
+
+    def __init__(self, taux: int = 10, niveau_max: int = logging.DEBUG):
+        super().__init__()
+        self.taux = max(1, int(taux))
+        self.niveau_max = niveau_max
+        self._compteurs: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.niveau_max or self.taux == 1:
+            return True
+        cle = (record.pathname, record.lineno)
+        with self._lock:
+            n = self._compteurs.get(cle, 0)
+            self._compteurs[cle] = n + 1
+        return n % self.taux == 0
+
+
+def niveaux_depuis_texte(texte: Optional[str]) -> Dict[str, str]:
+    """Analyse "app.models=WARNING,app.routes.banking=INFO" en dict module -> niveau."""
+    niveaux = {}
+    for morceau in (texte or '').split(','):
+        if '=' in morceau:
+            module, niveau = morceau.split('=', 1)
+            if module.strip() and niveau.strip():
+                niveaux[module.strip()] = niveau.strip().upper()
+    return niveaux
+
+
+def configurer_journalisation(log_dir: str, niveau: str = 'INFO',
+                              niveaux_modules: Optional[Dict[str, str]] = None,
+                              taux_echantillonnage: int = 10,
+                              max_octets: int = 10 * 1024 * 1024,
+                              nb_sauvegardes: int = 10) -> QueueListener:
+    """
+    Installe la journalisation asynchrone sur le logger racine (idempotent).
+    Retourne le QueueListener démarré.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, 'app.log'),
+        maxBytes=max_octets,
+        backupCount=nb_sauvegardes
+    )
+    file_handler.setFormatter(logging.Formatter(FORMAT_LOG))
+
+    file_logs = queue.SimpleQueue()
+    queue_handler = QueueHandler(file_logs)
+    queue_handler.addFilter(FiltreEchantillonnage(taux_echantillonnage))
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(niveau.upper())
+
+    for module, niveau_module in (niveaux_modules or {}).items():
+        logging.getLogger(module).setLevel(niveau_module.upper())
+
+    _listener = QueueListener(file_logs, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(arreter_journalisation)
+    return _listener
+
+
+def arreter_journalisation() -> None:
+    """Vide la file et arrête le thread d'écriture."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
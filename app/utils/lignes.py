@@ -0,0 +1,159 @@
+"""
+Lignes compactes pour les lectures volumineuses.
+
+Par défaut get_cursor renvoie un dict par ligne. Pour les lecteurs de masse
+(historiques, listes de transactions, séries quotidiennes, écritures filtrées,
+heures h1d/h2f), DatabaseManager.lire_lignes renvoie des tuples ou des
+enregistrements à __slots__ générés une fois par forme de requête : pas de
+dict par ligne, et les conversions (Decimal, float, heures 'HH:MM'...) sont
+appliquées colonne par colonne plutôt que ligne par ligne.
+
+Les enregistrements restent utilisables comme les dicts d'avant dans le code
+et les templates : ligne['montant'], ligne.get('description'), ligne.montant.
+En revanche on ne peut pas y ajouter de clé : en_dict() pour ces cas-là.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class Enregistrement:
+    """Base des classes de lignes générées par classe_enregistrement."""
+
+    __slots__ = ()
+    _colonnes: Tuple[str, ...] = ()
+    _attributs: Dict[str, str] = {}
+
+    def __init__(self, valeurs: Sequence):
+        for attribut, valeur in zip(self.__slots__, valeurs):
+            object.__setattr__(self, attribut, valeur)
+
+    def __getitem__(self, cle: str):
+        try:
+            return getattr(self, self._attributs[cle])
+        except KeyError:
+            raise KeyError(cle) from None
+
+    def __setitem__(self, cle: str, valeur) -> None:
+        try:
+            setattr(self, self._attributs[cle], valeur)
+        except KeyError:
+            raise KeyError(cle) from None
+
+    def get(self, cle: str, defaut=None):
+        attribut = self._attributs.get(cle)
+        return defaut if attribut is None else getattr(self, attribut)
+
+    def __contains__(self, cle) -> bool:
+        return cle in self._attributs
+
+    def __iter__(self):
+        return iter(self._colonnes)
+
+    def __len__(self) -> int:
+        return len(self._colonnes)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._colonnes
+
+    def values(self) -> List:
+        return [getattr(self, attribut) for attribut in self.__slots__]
+
+    def items(self) -> List[Tuple[str, object]]:
+        return list(zip(self._colonnes, self.values()))
+
+    def en_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, autre) -> bool:
+        if isinstance(autre, Enregistrement):
+            return self.items() == autre.items()
+        if isinstance(autre, dict):
+            return self.en_dict() == autre
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.en_dict()!r})"
+
+
+@lru_cache(maxsize=256)
+def classe_enregistrement(colonnes: Tuple[str, ...], nom: str = 'Ligne') -> type:
+    """
+    Classe à __slots__ pour une liste de colonnes (mise en cache par forme).
+    Les noms qui ne sont pas des identifiants Python (ex. 'SUM(total_h)') ou en
+    double sont stockés sous un attribut de remplacement mais restent accessibles
+    par clé (en double : la dernière colonne l'emporte, comme avec DictCursor).
+    """
+    attributs, vus = [], set()
+    for i, colonne in enumerate(colonnes):
+        valide = colonne.isidentifier() and not colonne.startswith('_') and colonne not in vus
+        attributs.append(colonne if valide else f"colonne_{i}")
+        vus.add(colonne)
+    attributs = tuple(attributs)
+    espace = {}
+    if attributs:
+        # __init__ généré (affectation multiple) : bien plus rapide qu'une boucle setattr
+        cibles = ', '.join(f"self.{a}" for a in attributs)
+        exec(f"def __init__(self, valeurs):\n    ({cibles},) = valeurs\n", espace)
+    return type(nom, (Enregistrement,), {
+        '__slots__': attributs,
+        '_colonnes': colonnes,
+        '_attributs': dict(zip(colonnes, attributs)),
+        **espace,
+    })
+
+
+def convertir_colonnes(lignes: List[tuple], colonnes: Sequence[str],
+                       convertisseurs: Optional[Dict[str, Callable]]) -> List[tuple]:
+    """
+    Applique chaque convertisseur à sa colonne entière (transposition, map, transposition).
+    Les colonnes sans convertisseur sont reprises telles quelles.
+    """
+    if not lignes or not convertisseurs:
+        return lignes
+    index = {nom: i for i, nom in enumerate(colonnes)}
+    inconnues = set(convertisseurs) - set(index)
+    if inconnues:
+        raise KeyError(f"Colonnes absentes du résultat : {', '.join(sorted(inconnues))}")
+    par_colonne = list(zip(*lignes))
+    for nom, fonction in convertisseurs.items():
+        i = index[nom]
+        par_colonne[i] = tuple(map(fonction, par_colonne[i]))
+    return list(zip(*par_colonne))
+
+
+def construire_lignes(lignes: Iterable[tuple], colonnes: Sequence[str], mode: str = 'slots',
+                      convertisseurs: Optional[Dict[str, Callable]] = None, nom: str = 'Ligne') -> List:
+    """Tuples bruts d'un curseur -> tuples convertis ('tuple') ou enregistrements ('slots')."""
+    lignes = convertir_colonnes(list(lignes), colonnes, convertisseurs)
+    if mode == 'tuple':
+        return lignes
+    if mode != 'slots':
+        raise ValueError(f"Mode de lignes inconnu : {mode}")
+    classe = classe_enregistrement(tuple(colonnes), nom)
+    return [classe(ligne) for ligne in lignes]
+
+
+# --- Convertisseurs usuels (acceptent None) ---
+
+def en_decimal(valeur) -> Optional[Decimal]:
+    if valeur is None or isinstance(valeur, Decimal):
+        return valeur
+    return Decimal(str(valeur))
+
+
+def en_float(valeur) -> Optional[float]:
+    return None if valeur is None else float(valeur)
+
+
+def en_heure_minutes(valeur) -> str:
+    """TIME (timedelta, ou texte 'HH:MM:SS' avec SQLite) -> 'HH:MM' ; '' si vide."""
+    if not valeur:
+        return ''
+    if hasattr(valeur, 'total_seconds'):
+        total = int(valeur.total_seconds())
+        return f"{total // 3600:02d}:{(total % 3600) // 60:02d}"
+    texte = str(valeur)
+    return texte[:5] if len(texte) == 8 and texte[2] == ':' else texte
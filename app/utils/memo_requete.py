@@ -0,0 +1,120 @@
+"""
+Mémo des lectures de modèles pour la durée d'une requête HTTP.
+
+Une même page relit souvent les mêmes données : synthese_hebdomadaire appelle deux fois
+contrat_model.get_all_contrats(user_id), compte_model.get_by_id() est relu par plusieurs
+helpers, banking_compte_detail charge plusieurs fois les catégories de l'utilisateur.
+ModelManager (un par requête, g.models) enveloppe les modèles de LECTURES_MEMOISEES
+(app/models/gestionnaire.py) dans un ModeleMemoise : le résultat de ces méthodes est
+gardé, indexé par (modèle, méthode, arguments), et un second appel identique ne coûte
+plus de requête SQL.
+
+Cohérence :
+    - DatabaseManager enveloppe ses curseurs dans un CurseurSuiviEcritures qui compte
+      les requêtes d'écriture (tout ce qui n'est pas SELECT / SHOW / EXPLAIN ...) ; dès
+      que ce compteur bouge, le mémo est vidé ;
+    - un appel qui a lui-même écrit (get_or_create_for_user qui crée la ligne) n'est
+      pas mémorisé ;
+    - chaque appel reçoit sa propre copie du résultat : une vue qui modifie le dict
+      d'un compte n'altère pas ce que reçoit l'appel suivant.
+Des arguments non hachables (liste, dict) font simplement passer l'appel sans mémo.
+"""
+import copy
+import re
+from functools import wraps
+
+# Requêtes sans effet ; tout le reste (y compris un commentaire en tête) compte comme écriture
+_RE_LECTURE = re.compile(r'\s*\(*\s*(?:SELECT|SHOW|DESCRIBE|EXPLAIN|PRAGMA)\b', re.IGNORECASE)
+
+
+def est_lecture(sql) -> bool:
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    return _RE_LECTURE.match(str(sql)) is not None
+
+
+class CurseurSuiviEcritures:
+    """Proxy de curseur DB-API incrémentant `proprietaire.nb_ecritures` à chaque écriture."""
+
+    __slots__ = ('_curseur', '_proprietaire')
+
+    def __init__(self, curseur, proprietaire):
+        self._curseur = curseur
+        self._proprietaire = proprietaire
+
+    def execute(self, query, args=None):
+        if not est_lecture(query):
+            self._proprietaire.nb_ecritures += 1
+        return self._curseur.execute(query, args)
+
+    def executemany(self, query, args):
+        if not est_lecture(query):
+            self._proprietaire.nb_ecritures += 1
+        return self._curseur.executemany(query, args)
+
+    def callproc(self, procname, args=()):
+        self._proprietaire.nb_ecritures += 1
+        return self._curseur.callproc(procname, args)
+
+    def __iter__(self):
+        return iter(self._curseur)
+
+    def __getattr__(self, nom):
+        return getattr(self._curseur, nom)
+
+
+class MemoRequete:
+    """Résultats de lectures, valables tant qu'aucune écriture n'est passée par les curseurs de `db`."""
+
+    def __init__(self, db):
+        self._db = db
+        self._resultats = {}
+        self._ecritures = db.nb_ecritures
+
+    def vider(self) -> None:
+        self._resultats.clear()
+
+    def appeler(self, cle, fonction, args, kwargs):
+        try:
+            hash(cle)
+        except TypeError:
+            return fonction(*args, **kwargs)
+
+        ecritures = self._db.nb_ecritures
+        if ecritures != self._ecritures:
+            self._resultats.clear()
+            self._ecritures = ecritures
+        if cle in self._resultats:
+            return copy.deepcopy(self._resultats[cle])
+
+        resultat = fonction(*args, **kwargs)
+        if self._db.nb_ecritures == ecritures:
+            self._resultats[cle] = resultat
+            return copy.deepcopy(resultat)
+        return resultat
+
+
+class ModeleMemoise:
+    """Enveloppe d'un modèle : les méthodes de `lectures` passent par le mémo, le reste est inchangé."""
+
+    __slots__ = ('_modele', '_nom', '_lectures', '_memo')
+
+    def __init__(self, modele, nom: str, lectures, memo: MemoRequete):
+        object.__setattr__(self, '_modele', modele)
+        object.__setattr__(self, '_nom', nom)
+        object.__setattr__(self, '_lectures', frozenset(lectures))
+        object.__setattr__(self, '_memo', memo)
+
+    def __getattr__(self, nom):
+        attribut = getattr(self._modele, nom)
+        if nom not in self._lectures:
+            return attribut
+        memo, methode = self._memo, (self._nom, nom)
+
+        @wraps(attribut)
+        def lecture(*args, **kwargs):
+            return memo.appeler((methode, args, tuple(sorted(kwargs.items()))), attribut, args, kwargs)
+        return lecture
+
+    def __setattr__(self, nom, valeur):
+        setattr(self._modele, nom, valeur)
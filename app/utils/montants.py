@@ -0,0 +1,139 @@
+"""
+Montants monétaires en centimes entiers.
+
+Les calculs de soldes et de salaires travaillent sur des entiers (centimes) :
+pas d'erreur d'arrondi binaire comme avec float, et pas le coût de Decimal à
+chaque opération. La conversion n'a lieu qu'aux bords : lecture des valeurs
+DECIMAL de la base (Montant.depuis), écriture en base (en_decimal) et passage
+aux templates (float / format).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+_CENT = Decimal('0.01')
+
+
+def _arrondir(valeur: Decimal) -> int:
+    """Arrondit un nombre de centimes (Decimal) à l'entier, demi vers le haut."""
+    return int(valeur.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+class Montant:
+    """Montant en centimes entiers, immuable."""
+
+    __slots__ = ('centimes',)
+
+    def __init__(self, centimes: int = 0):
+        self.centimes = int(centimes)
+
+    @classmethod
+    def depuis(cls, valeur) -> 'Montant':
+        """
+        Construit un Montant depuis une valeur en francs (Decimal, float, int, str
+        ou None). Les floats passent par leur représentation décimale la plus courte.
+        """
+        if valeur is None or valeur == '':
+            return cls(0)
+        if isinstance(valeur, Montant):
+            return valeur
+        if isinstance(valeur, int):
+            return cls(valeur * 100)
+        if not isinstance(valeur, Decimal):
+            valeur = Decimal(str(valeur).strip())
+        return cls(_arrondir(valeur * 100))
+
+    # --- Conversions aux bords ---
+
+    def en_decimal(self) -> Decimal:
+        """Valeur en francs à deux décimales (paramètres SQL DECIMAL(15,2))."""
+        return Decimal(self.centimes).scaleb(-2).quantize(_CENT)
+
+    def __float__(self) -> float:
+        return self.centimes / 100
+
+    def __int__(self) -> int:
+        return self.centimes // 100 if self.centimes >= 0 else -((-self.centimes) // 100)
+
+    def __str__(self) -> str:
+        return str(self.en_decimal())
+
+    def __repr__(self) -> str:
+        return f"Montant({self.en_decimal()})"
+
+    def __format__(self, spec: str) -> str:
+        return format(self.en_decimal(), spec)
+
+    # --- Arithmétique ---
+
+    @staticmethod
+    def _centimes_de(autre) -> int:
+        if isinstance(autre, Montant):
+            return autre.centimes
+        return Montant.depuis(autre).centimes
+
+    def __add__(self, autre) -> 'Montant':
+        return Montant(self.centimes + self._centimes_de(autre))
+
+    __radd__ = __add__
+
+    def __sub__(self, autre) -> 'Montant':
+        return Montant(self.centimes - self._centimes_de(autre))
+
+    def __rsub__(self, autre) -> 'Montant':
+        return Montant(self._centimes_de(autre) - self.centimes)
+
+    def __neg__(self) -> 'Montant':
+        return Montant(-self.centimes)
+
+    def __abs__(self) -> 'Montant':
+        return Montant(abs(self.centimes))
+
+    def __mul__(self, facteur: Union[int, float, Decimal, str]) -> 'Montant':
+        """Multiplie par un facteur (heures, quantité...), arrondi au centime demi vers le haut."""
+        if isinstance(facteur, Montant):
+            raise TypeError("Impossible de multiplier deux montants")
+        if isinstance(facteur, int):
+            return Montant(self.centimes * facteur)
+        if not isinstance(facteur, Decimal):
+            facteur = Decimal(str(facteur))
+        return Montant(_arrondir(self.centimes * facteur))
+
+    __rmul__ = __mul__
+
+    def pourcentage(self, taux) -> 'Montant':
+        """`taux` % de ce montant, arrondi au centime demi vers le haut."""
+        if taux is None:
+            return Montant(0)
+        if not isinstance(taux, Decimal):
+            taux = Decimal(str(taux))
+        return Montant(_arrondir(self.centimes * taux / 100))
+
+    # --- Comparaisons ---
+
+    def __eq__(self, autre) -> bool:
+        if isinstance(autre, Montant):
+            return self.centimes == autre.centimes
+        if isinstance(autre, (int, float, Decimal)):
+            return self.centimes == Montant.depuis(autre).centimes
+        return NotImplemented
+
+    def __lt__(self, autre) -> bool:
+        return self.centimes < self._centimes_de(autre)
+
+    def __le__(self, autre) -> bool:
+        return self.centimes <= self._centimes_de(autre)
+
+    def __gt__(self, autre) -> bool:
+        return self.centimes > self._centimes_de(autre)
+
+    def __ge__(self, autre) -> bool:
+        return self.centimes >= self._centimes_de(autre)
+
+    def __hash__(self) -> int:
+        return hash(self.centimes)
+
+    def __bool__(self) -> bool:
+        return self.centimes != 0
+
+
+ZERO = Montant(0)
@@ -1,11 +1,201 @@
+import hashlib
 import io
+import json
+import logging
+import multiprocessing
 import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
 from flask import current_app
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
+
+from rendu_fiche_salaire import rendre_fiche
+
+logger = logging.getLogger(__name__)
+
+# En dessous de ce nombre de fiches à rendre, le lot est rendu dans le processus courant
+# (démarrer un pool coûte plus cher que quelques fiches).
+SEUIL_POOL = 4
+
+# Cache disque des fiches : taille et âge maximum, nettoyage tous les N enregistrements
+CACHE_MAX_OCTETS_DEFAUT = 200 * 1024 * 1024
+CACHE_MAX_JOURS_DEFAUT = 90
+CACHE_NETTOYAGE_TOUS_LES = 32
+_enregistrements = 0
+_enregistrements_lock = threading.Lock()
+
+# Logos lus une seule fois par processus : chemin -> (mtime, contenu)
+_logos: Dict[str, Tuple[float, bytes]] = {}
+_logos_lock = threading.Lock()
+
+
+def lire_logo(static_folder: str, logo_path: Optional[str]) -> Optional[bytes]:
+    """Contenu du logo de l'entreprise, relu seulement si le fichier a changé."""
+    if not logo_path:
+        return None
+    chemin = os.path.join(static_folder, logo_path)
+    try:
+        mtime = os.path.getmtime(chemin)
+    except OSError:
+        return None
+    with _logos_lock:
+        en_cache = _logos.get(chemin)
+        if en_cache and en_cache[0] == mtime:
+            return en_cache[1]
+    with open(chemin, 'rb') as f:
+        contenu = f.read()
+    with _logos_lock:
+        _logos[chemin] = (mtime, contenu)
+    return contenu
+
+
+def preparer_fiche(
+    entreprise: dict,
+    employe_info: dict,
+    mois: int,
+    annee: int,
+    heures_reelles: float,
+    result: dict,
+    details: dict,
+    static_folder: Optional[str] = None
+) -> dict:
+    """
+    Extrait du résultat de paie uniquement ce qui est imprimé sur la fiche.
+    Le dict obtenu est sérialisable (envoyé aux processus du pool) et sert
+    à calculer la version de la fiche pour le cache disque.
+    """
+    entreprise = entreprise or {}
+    employe_info = employe_info or {}
+    versements = details.get('versements', {}) or {}
+    if static_folder is None:
+        static_folder = current_app.static_folder
+    return {
+        'entreprise': {k: entreprise.get(k) or '' for k in ('nom', 'rue', 'code_postal', 'commune')},
+        'logo': lire_logo(static_folder, entreprise.get('logo_path')),
+        'employe': {k: employe_info.get(k) or '' for k in ('prenom', 'nom', 'employeur')},
+        'mois': int(mois),
+        'annee': int(annee),
+        'heures_reelles': float(heures_reelles or 0),
+        'salaire_brut': float(details.get('salaire_brut', 0) or 0),
+        'total_indemnites': float(details.get('total_indemnites', 0) or 0),
+        'total_cotisations': float(details.get('total_cotisations', 0) or 0),
+        'salaire_net': float(result.get('salaire_net', 0) or 0),
+        'acompte_25': float(versements.get('acompte_25', {}).get('montant', 0) or 0),
+        'acompte_10': float(versements.get('acompte_10', {}).get('montant', 0) or 0),
+    }
+
+
+def version_fiche(fiche: dict) -> str:
+    """Empreinte du résultat de paie imprimé : change dès qu'un montant, l'entreprise ou le logo change."""
+    contenu = dict(fiche)
+    logo = contenu.pop('logo', None)
+    contenu['logo'] = hashlib.sha256(logo).hexdigest() if logo else None
+    brut = json.dumps(contenu, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(brut).hexdigest()
+
+
+class CachePdfSalaire:
+    """
+    Cache disque des fiches rendues, indexé par version_fiche() : un nouveau
+    téléchargement d'une fiche dont le résultat de paie n'a pas changé ne
+    reconstruit pas le document.
+    Borné en taille (les fiches les moins récemment lues partent en premier, la date
+    de modification servant de date d'accès) et en âge.
+    """
+
+    def __init__(self, dossier: str, max_octets: int = CACHE_MAX_OCTETS_DEFAUT,
+                 max_jours: int = CACHE_MAX_JOURS_DEFAUT):
+        self.dossier = dossier
+        self.max_octets = max_octets
+        self.max_jours = max_jours
+        os.makedirs(dossier, exist_ok=True)
+
+    def _chemin(self, version: str) -> str:
+        return os.path.join(self.dossier, version[:2], f"{version}.pdf")
+
+    def get(self, version: str) -> Optional[bytes]:
+        chemin = self._chemin(version)
+        try:
+            with open(chemin, 'rb') as f:
+                contenu = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(chemin)  # récemment lue : gardée en priorité au nettoyage
+        except OSError:
+            pass
+        return contenu
+
+    def put(self, version: str, contenu: bytes) -> None:
+        chemin = self._chemin(version)
+        try:
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            temporaire = f"{chemin}.{os.getpid()}.tmp"
+            with open(temporaire, 'wb') as f:
+                f.write(contenu)
+            os.replace(temporaire, chemin)  # écriture atomique, sûre entre workers
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire la fiche {version} dans le cache: {e}")
+            return
+        global _enregistrements
+        with _enregistrements_lock:
+            _enregistrements += 1
+            nettoyer = _enregistrements % CACHE_NETTOYAGE_TOUS_LES == 1
+        if nettoyer:
+            self.nettoyer()
+
+    def nettoyer(self) -> int:
+        """Supprime les fiches trop anciennes, puis les moins récentes au-delà de max_octets."""
+        limite_age = time.time() - self.max_jours * 86400
+        fichiers = []
+        for racine, _, noms in os.walk(self.dossier):
+            for nom in noms:
+                if not nom.endswith('.pdf'):
+                    continue
+                chemin = os.path.join(racine, nom)
+                try:
+                    infos = os.stat(chemin)
+                except OSError:
+                    continue
+                fichiers.append((infos.st_mtime, infos.st_size, chemin))
+        fichiers.sort()
+        total = sum(taille for _, taille, _ in fichiers)
+        supprimes = 0
+        for mtime, taille, chemin in fichiers:
+            if mtime >= limite_age and total <= self.max_octets:
+                break
+            try:
+                os.remove(chemin)
+                supprimes += 1
+            except OSError:
+                pass
+            total -= taille
+        if supprimes:
+            logger.info(f"Cache des fiches de salaire: {supprimes} fiches supprimées")
+        return supprimes
+
+    def obtenir(self, fiche: dict) -> bytes:
+        """PDF de la fiche, depuis le cache ou rendu puis mémorisé."""
+        version = version_fiche(fiche)
+        contenu = self.get(version)
+        if contenu is None:
+            contenu = rendre_fiche(fiche)
+            self.put(version, contenu)
+        return contenu
+
+
+def get_cache_pdf_salaire() -> CachePdfSalaire:
+    dossier = current_app.config.get('PDF_SALAIRE_CACHE_DIR') or os.path.join(current_app.instance_path, 'cache', 'fiches_salaire')
+    return CachePdfSalaire(
+        dossier,
+        max_octets=current_app.config.get('PDF_SALAIRE_CACHE_MAX_OCTETS', CACHE_MAX_OCTETS_DEFAUT),
+        max_jours=current_app.config.get('PDF_SALAIRE_CACHE_MAX_JOURS', CACHE_MAX_JOURS_DEFAUT),
+    )
+
 
 def generer_pdf_salaire(
     entreprise: dict,
@@ -20,87 +210,89 @@ def generer_pdf_salaire(
     Génère un PDF de fiche de salaire.
     Retourne un objet BytesIO prêt à être envoyé.
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-    elements = []
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=14,
-        alignment=1
+    fiche = preparer_fiche(entreprise, employe_info, mois, annee, heures_reelles, result, details)
+    return io.BytesIO(get_cache_pdf_salaire().obtenir(fiche))
+
+
+class _FluxZip(io.RawIOBase):
+    """Tampon en écriture seule : zipfile y écrit, le générateur vide les octets au fil de l'eau."""
+
+    def __init__(self):
+        super().__init__()
+        self._morceaux = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, donnees) -> int:
+        self._morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def vider(self) -> bytes:
+        donnees = b''.join(self._morceaux)
+        self._morceaux.clear()
+        return donnees
+
+
+def _rendre(a_rendre, max_processus: Optional[int]) -> Iterator[Tuple[str, bytes]]:
+    """Rend les fiches (version, fiche) et produit (version, pdf) dans l'ordre de la liste."""
+    if len(a_rendre) < SEUIL_POOL:
+        for version, fiche in a_rendre:
+            yield version, rendre_fiche(fiche)
+        return
+
+    faits = 0
+    # 'spawn' : pas de fork d'un processus serveur multi-thread
+    executor = ProcessPoolExecutor(
+        max_workers=max_processus or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn')
     )
+    try:
+        for contenu in executor.map(rendre_fiche, [fiche for _, fiche in a_rendre]):
+            yield a_rendre[faits][0], contenu
+            faits += 1
+    except BrokenProcessPool as e:
+        logger.warning(f"Pool de rendu indisponible ({e}), rendu séquentiel des {len(a_rendre) - faits} fiches restantes")
+        for version, fiche in a_rendre[faits:]:
+            yield version, rendre_fiche(fiche)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generer_lot_zip(fiches: Iterable[Tuple[str, dict]], cache: CachePdfSalaire,
+                    max_processus: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Produit une archive ZIP (en flux) des fiches (nom_fichier, fiche).
+    Les fiches absentes du cache sont rendues en parallèle dans un pool de
+    processus ; l'archive est émise dans l'ordre des fiches dès que chacune est prête.
+    """
+    fiches = list(fiches)
+    versions = [version_fiche(fiche) for _, fiche in fiches]
+    contenus = {}
+    a_rendre = []
+    for (nom, fiche), version in zip(fiches, versions):
+        if version in contenus:
+            continue
+        contenu = cache.get(version)
+        if contenu is not None:
+            contenus[version] = contenu
+        else:
+            contenus[version] = None
+            a_rendre.append((version, fiche))
+    logger.info(f"Lot de fiches de salaire: {len(fiches)} fiches, {len(a_rendre)} à rendre")
+
+    attente = _rendre(a_rendre, max_processus)
 
-    # Logo
-    if entreprise and entreprise.get('logo_path'):
-        logo_full = os.path.join(current_app.static_folder, entreprise['logo_path'])
-        if os.path.exists(logo_full):
-            img = Image(logo_full, width=1.5*inch, height=1.5*inch)
-            elements.append(img)
-            elements.append(Spacer(1, 12))
-
-    # En-tête entreprise
-    nom_entreprise = entreprise.get('nom', 'Votre entreprise') if entreprise else 'Votre entreprise'
-    elements.append(Paragraph(nom_entreprise, title_style))
-    if entreprise:
-        if entreprise.get('rue'):
-            elements.append(Paragraph(entreprise['rue'], styles['Normal']))
-        if entreprise.get('code_postal') or entreprise.get('commune'):
-            cp_commune = f"{entreprise.get('code_postal', '')} {entreprise.get('commune', '')}".strip()
-            if cp_commune:
-                elements.append(Paragraph(cp_commune, styles['Normal']))
-
-    elements.append(Spacer(1, 24))
-
-    # Titre
-    mois_noms = ["", "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                 "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
-    elements.append(Paragraph(f"Fiche de salaire – {mois_noms[mois]} {annee}", styles['Heading1']))
-
-    # Info employé (si fourni)
-    if employe_info:
-        nom_employe = f"{employe_info.get('prenom', '')} {employe_info.get('nom', '')}".strip()
-        if nom_employe:
-            elements.append(Paragraph(f"Employé : {nom_employe}", styles['Normal']))
-    if employe_info and employe_info.get('employeur'):
-        elements.append(Paragraph(f"Employeur : {employe_info['employeur']}", styles['Normal']))
-
-    elements.append(Spacer(1, 18))
-
-    # Tableau
-    data = [
-        ["Élément", "Montant (CHF)"],
-        ["Heures réelles", f"{heures_reelles:.2f} h"],
-        ["Salaire brut", f"{details.get('salaire_brut', 0):.2f}"],
-        ["+ Indemnités", f"+{details.get('total_indemnites', 0):.2f}"],
-        ["- Cotisations", f"-{details.get('total_cotisations', 0):.2f}"],
-        ["= Salaire net", f"{result.get('salaire_net', 0):.2f}"],
-    ]
-    table = Table(data, colWidths=[3*inch, 1.5*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 24))
-
-    # Acomptes (logique métier)
-    acompte_25 = details.get('versements', {}).get('acompte_25', {}).get('montant', 0)
-    acompte_10 = details.get('versements', {}).get('acompte_10', {}).get('montant', 0)
-    elements.append(Paragraph(f"Acompte du 25 : {acompte_25:.2f} CHF", styles['Normal']))
-    elements.append(Paragraph(f"Acompte du 10 (salaire net − acompte 25) : {acompte_10:.2f} CHF", styles['Normal']))
-    elements.append(Spacer(1, 12))
-
-    # Signature
-    elements.append(Paragraph("_________________________", styles['Normal']))
-    elements.append(Paragraph("Signature employeur", styles['Normal']))
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+    flux = _FluxZip()
+    try:
+        with zipfile.ZipFile(flux, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for (nom, _), version in zip(fiches, versions):
+                while contenus[version] is None:
+                    version_rendue, contenu = next(attente)
+                    cache.put(version_rendue, contenu)
+                    contenus[version_rendue] = contenu
+                archive.writestr(nom, contenus[version])
+                yield flux.vider()
+        yield flux.vider()
+    finally:
+        attente.close()
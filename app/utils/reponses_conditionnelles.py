@@ -0,0 +1,116 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified / 304) pour les pages de rapport.
+
+Les pages décorées par @tampon_donnees('comptabilite', ...) calculent d'abord un tampon
+à partir des compteurs de versions_donnees de l'utilisateur (une seule requête) :
+    - ETag (faible) : hash de l'endpoint, des paramètres de l'URL, des versions, de la
+      date du jour (les pages prennent l'année / le mois / la semaine courants par défaut)
+      et de la version de l'application (APP_VERSION, voir version_application) : après
+      un déploiement, les pages gardées par le navigateur ne sont plus revalidées en 304 ;
+    - Last-Modified : dernière incrémentation de ces compteurs, au plus tôt minuit.
+Si le navigateur renvoie le même tampon (If-None-Match / If-Modified-Since), la réponse
+est un 304 sans exécuter la vue ; sinon la vue s'exécute et la réponse porte le tampon.
+
+La portée 'banque' est toujours incluse : le menu de base.html affiche les soldes des
+comptes. Un tampon illisible ('inconnue-...'), des messages flash en attente ou une
+méthode autre que GET/HEAD font toujours exécuter la vue.
+
+À placer sous @login_required :
+    @bp.route('/comptabilite/statistiques')
+    @login_required
+    @tampon_donnees('comptabilite')
+    def statistiques_comptables(): ...
+"""
+import hashlib
+import os
+from datetime import date, datetime, time, timezone
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, g, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+
+
+# Sous-dossiers de app/ sans effet sur le rendu des pages (fichiers déposés, archives)
+_DOSSIERS_IGNORES = {'static', 'uploads', 'old', '__pycache__'}
+_EXTENSIONS_VERSION = ('.py', '.html', '.jinja', '.j2')
+
+
+def version_application(racine: str) -> str:
+    """
+    Identifiant de build par défaut quand APP_VERSION n'est pas défini : hash des chemins,
+    tailles et dates des sources et templates de `racine` (app/) et du manifeste des assets.
+    Calculé une fois au démarrage ; identique d'un worker à l'autre.
+    """
+    sha1 = hashlib.sha1()
+    for dossier, sous_dossiers, fichiers in os.walk(racine):
+        sous_dossiers[:] = sorted(d for d in sous_dossiers if d not in _DOSSIERS_IGNORES)
+        for nom in sorted(fichiers):
+            if not nom.endswith(_EXTENSIONS_VERSION):
+                continue
+            chemin = os.path.join(dossier, nom)
+            infos = os.stat(chemin)
+            sha1.update(f"{os.path.relpath(chemin, racine)}:{infos.st_size}:{infos.st_mtime_ns}\n".encode('utf-8'))
+    manifeste = os.path.join(racine, 'static', 'dist', 'manifest.json')
+    if os.path.exists(manifeste):
+        with open(manifeste, 'rb') as fichier:
+            sha1.update(fichier.read())
+    return sha1.hexdigest()[:12]
+
+
+def _derniere_modification(modifie_le: Optional[datetime], aujourd_hui: date) -> Optional[datetime]:
+    """Date UTC pour Last-Modified ; versions_donnees.updated_at est en heure locale"""
+    if modifie_le is None:
+        return None
+    # Pas avant minuit : une page d'hier ne doit pas être revalidée par If-Modified-Since
+    modifie_le = max(modifie_le, datetime.combine(aujourd_hui, time.min))
+    return modifie_le.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def calculer_tampon(user_id: int, portees, cles_supplementaires=()):
+    """(etag, last_modified) de la requête courante, ou (None, None) si une version est inconnue"""
+    cles = [(portee, user_id) for portee in dict.fromkeys(('banque', *portees))]
+    versions, modifie_le = g.models.version_model.get_tampon(cles + list(cles_supplementaires))
+    if any(isinstance(version, str) for version in versions.values()):
+        return None, None
+    aujourd_hui = date.today()
+    empreinte = repr((
+        request.endpoint,
+        sorted((request.view_args or {}).items()),
+        sorted(request.args.items(multi=True)),
+        user_id,
+        sorted(versions.items()),
+        aujourd_hui.isoformat(),
+        current_app.config.get('APP_VERSION'),
+    ))
+    etag = hashlib.sha1(empreinte.encode('utf-8')).hexdigest()
+    return etag, _derniere_modification(modifie_le, aujourd_hui)
+
+
+def tampon_donnees(*portees):
+    """Décorateur : ETag / Last-Modified depuis les portées utilisateur données, 304 si inchangé"""
+    def decorateur(vue):
+        @wraps(vue)
+        def vue_conditionnelle(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not current_user.is_authenticated \
+                    or session.get('_flashes'):
+                return vue(*args, **kwargs)
+            etag, derniere_modification = calculer_tampon(current_user.id, portees)
+            if etag is None:
+                return vue(*args, **kwargs)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=derniere_modification):
+                reponse = current_app.response_class(status=304)
+            else:
+                reponse = current_app.make_response(vue(*args, **kwargs))
+                if reponse.status_code != 200:
+                    return reponse
+            reponse.set_etag(etag, weak=True)
+            if derniere_modification is not None:
+                reponse.last_modified = derniere_modification
+            # Toujours revalider : le navigateur garde la page et la redemande avec son tampon
+            reponse.headers['Cache-Control'] = 'private, no-cache'
+            return reponse
+        return vue_conditionnelle
+    return decorateur
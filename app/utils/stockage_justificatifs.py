@@ -0,0 +1,113 @@
+"""
+Stockage adressé par contenu des justificatifs d'écritures.
+
+Un upload est copié par blocs dans un fichier temporaire tout en calculant son
+SHA-256 (la mémoire reste constante quelle que soit la taille), puis renommé en
+<dossier>/<2 premiers caractères>/<sha256>.<extension>. Un justificatif identique déjà
+stocké (même reçu joint à deux écritures, ou envoyé deux fois) n'est pas recopié : le
+fichier temporaire est supprimé et les deux écritures pointent vers le même chemin.
+
+Le chemin relatif est ce que ecritures_comptables.justificatif_url enregistre ; les
+anciens noms (20240101_120000_ecriture12_user1.pdf, à la racine du dossier) restent
+lisibles tels quels. Le hash sert d'ETag fort au téléchargement.
+
+Un contenu étant partagé, le fichier n'est supprimé que s'il n'est plus référencé. Le
+placement d'un upload jusqu'au commit de sa ligne, et la vérification « plus référencé »
+jusqu'à la suppression, se font sous verrou_stockage() (flock, commun aux workers) :
+une suppression ne peut pas retirer un fichier qu'un upload concurrent vient de
+dédoublonner sans l'avoir encore enregistré.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows (poste unique) : pas de verrou entre processus
+    fcntl = None
+
+TAILLE_BLOC = 64 * 1024
+TAILLE_MAX_DEFAUT = 10 * 1024 * 1024
+
+_RE_CHEMIN_CONTENU = re.compile(r'^([0-9a-f]{2})/(\1[0-9a-f]{62})\.\w+$')
+
+
+class FichierRefuse(Exception):
+    """Upload rejeté (vide, trop volumineux) ; le message est destiné à l'utilisateur."""
+
+
+def chemin_contenu(empreinte: str, extension: str) -> str:
+    """Chemin relatif (séparateur '/') d'un contenu d'empreinte donnée"""
+    suffixe = f".{extension.lower()}" if extension else ''
+    return f"{empreinte[:2]}/{empreinte}{suffixe}"
+
+
+def empreinte_depuis_chemin(chemin_relatif: Optional[str]) -> Optional[str]:
+    """SHA-256 contenu dans un chemin adressé par contenu, None pour un ancien nom de fichier"""
+    if not chemin_relatif:
+        return None
+    correspondance = _RE_CHEMIN_CONTENU.match(chemin_relatif)
+    return correspondance.group(2) if correspondance else None
+
+
+@contextmanager
+def verrou_stockage(dossier: str):
+    """Verrou exclusif entre processus sur le dossier de stockage."""
+    os.makedirs(dossier, exist_ok=True)
+    with open(os.path.join(dossier, '.verrou'), 'a') as fichier_verrou:
+        if fcntl is not None:
+            fcntl.flock(fichier_verrou, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fichier_verrou, fcntl.LOCK_UN)
+
+
+def recevoir_flux(flux, dossier: str, taille_max: int = TAILLE_MAX_DEFAUT) -> Tuple[str, str, int]:
+    """
+    Copie le flux par blocs dans un fichier temporaire du stockage en le hachant (sans verrou).
+    Retourne (chemin temporaire, sha256, taille) ; lève FichierRefuse si le flux est vide
+    ou dépasse taille_max (rien n'est alors conservé sur le disque).
+    """
+    os.makedirs(dossier, exist_ok=True)
+    sha256 = hashlib.sha256()
+    taille = 0
+    descripteur, chemin_temporaire = tempfile.mkstemp(prefix='.upload-', dir=dossier)
+    try:
+        with os.fdopen(descripteur, 'wb') as sortie:
+            while True:
+                bloc = flux.read(TAILLE_BLOC)
+                if not bloc:
+                    break
+                taille += len(bloc)
+                if taille > taille_max:
+                    raise FichierRefuse(f"Fichier trop volumineux (max {taille_max // (1024 * 1024)}MB)")
+                sha256.update(bloc)
+                sortie.write(bloc)
+        if taille == 0:
+            raise FichierRefuse("Fichier vide")
+        return chemin_temporaire, sha256.hexdigest(), taille
+    except BaseException:
+        if os.path.exists(chemin_temporaire):
+            os.remove(chemin_temporaire)
+        raise
+
+
+def placer_fichier(dossier: str, chemin_temporaire: str, empreinte: str, extension: str) -> Tuple[str, bool]:
+    """
+    Range le fichier reçu à son chemin de contenu, ou le supprime si ce contenu est déjà stocké.
+    Retourne (chemin relatif, déjà présent). À appeler sous verrou_stockage(), jusqu'au commit.
+    """
+    relatif = chemin_contenu(empreinte, extension)
+    destination = os.path.join(dossier, *relatif.split('/'))
+    if os.path.exists(destination):
+        os.remove(chemin_temporaire)
+        return relatif, True
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.chmod(chemin_temporaire, 0o644)
+    os.replace(chemin_temporaire, destination)
+    return relatif, False
@@ -0,0 +1,464 @@
+"""
+Stockage SQLite embarqué pour les installations mono-utilisateur (Raspberry Pi, NAS).
+
+DatabaseManager délègue à ce module lorsque DB_CONFIG contient backend='sqlite'.
+Les modèles gardent leur SQL MySQL : chaque requête est traduite à la volée
+(paramètres %s, DATE_SUB/INTERVAL, ON DUPLICATE KEY, INSERT IGNORE, FOR UPDATE...)
+et les fonctions MySQL sans équivalent (DATE_FORMAT, YEAR, NOW...) sont
+enregistrées comme fonctions Python sur la connexion. Les CREATE TABLE de
+create_tables sont convertis (AUTO_INCREMENT, ENUM, KEY/INDEX, ON UPDATE), ainsi
+que les types ENUM des ALTER TABLE ... ADD COLUMN de migrer_schema.
+
+Une connexion par thread, en mode WAL, conservée d'une requête HTTP à l'autre.
+Les lignes sont des dict (comme pymysql DictCursor) et les colonnes DECIMAL,
+DATE, DATETIME/TIMESTAMP et TIME sont reconverties en Decimal, date, datetime
+et timedelta. Les erreurs sqlite3 sont relancées en erreurs pymysql pour que
+les `except Error` des modèles continuent de fonctionner.
+"""
+import calendar
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from pymysql import err as erreurs_mysql
+
+logger = logging.getLogger(__name__)
+
+
+# --- Conversion des types Python <-> SQLite ---
+
+def _adapter_datetime(valeur: datetime) -> str:
+    return valeur.isoformat(' ', timespec='seconds')
+
+
+def _adapter_timedelta(valeur: timedelta) -> str:
+    secondes = int(valeur.total_seconds())
+    signe = '-' if secondes < 0 else ''
+    secondes = abs(secondes)
+    return f"{signe}{secondes // 3600:02d}:{secondes % 3600 // 60:02d}:{secondes % 60:02d}"
+
+
+def _convertir_decimal(brut: bytes) -> Decimal:
+    return Decimal(brut.decode())
+
+
+def _convertir_date(brut: bytes):
+    texte = brut.decode()
+    try:
+        return date.fromisoformat(texte[:10])
+    except ValueError:
+        return texte
+
+
+def _convertir_datetime(brut: bytes):
+    texte = brut.decode()
+    try:
+        return datetime.fromisoformat(texte)
+    except ValueError:
+        return texte
+
+
+def _convertir_time(brut: bytes):
+    texte = brut.decode()
+    try:
+        negatif = texte.startswith('-')
+        morceaux = [int(float(m)) for m in texte.lstrip('-').split(':')]
+        morceaux += [0] * (3 - len(morceaux))
+        duree = timedelta(hours=morceaux[0], minutes=morceaux[1], seconds=morceaux[2])
+        return -duree if negatif else duree
+    except ValueError:
+        return texte
+
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, _adapter_datetime)
+sqlite3.register_adapter(timedelta, _adapter_timedelta)
+sqlite3.register_converter('DECIMAL', _convertir_decimal)
+sqlite3.register_converter('DATE', _convertir_date)
+sqlite3.register_converter('DATETIME', _convertir_datetime)
+sqlite3.register_converter('TIMESTAMP', _convertir_datetime)
+sqlite3.register_converter('TIME', _convertir_time)
+
+
+# --- Fonctions MySQL réimplémentées ---
+
+def _en_datetime(valeur) -> Optional[datetime]:
+    if valeur is None:
+        return None
+    if isinstance(valeur, datetime):
+        return valeur
+    if isinstance(valeur, date):
+        return datetime(valeur.year, valeur.month, valeur.day)
+    texte = str(valeur).strip().replace('T', ' ')
+    try:
+        return datetime.fromisoformat(texte)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(texte[:10])
+        except ValueError:
+            return None
+
+
+def _est_date_seule(valeur) -> bool:
+    return isinstance(valeur, str) and len(valeur.strip()) == 10
+
+
+_FORMATS_MYSQL = {
+    'Y': '%Y', 'y': '%y', 'm': '%m', 'd': '%d', 'H': '%H', 'i': '%M', 's': '%S', 'S': '%S',
+    'M': '%B', 'b': '%b', 'W': '%A', 'a': '%a', 'j': '%j', 'p': '%p', 'T': '%H:%M:%S', '%': '%%',
+}
+
+
+def date_format(valeur, format_mysql):
+    d = _en_datetime(valeur)
+    if d is None or format_mysql is None:
+        return None
+    resultat, i = [], 0
+    while i < len(format_mysql):
+        c = format_mysql[i]
+        if c == '%' and i + 1 < len(format_mysql):
+            code = format_mysql[i + 1]
+            if code == 'c':
+                resultat.append(str(d.month))
+            elif code == 'e':
+                resultat.append(str(d.day))
+            elif code == 'u':
+                resultat.append(f"{d.isocalendar()[1]:02d}")
+            else:
+                resultat.append(d.strftime(_FORMATS_MYSQL.get(code, code)))
+            i += 2
+        else:
+            resultat.append(c)
+            i += 1
+    return ''.join(resultat)
+
+
+_UNITES_TIMEDELTA = {'WEEK': 'weeks', 'DAY': 'days', 'HOUR': 'hours', 'MINUTE': 'minutes', 'SECOND': 'seconds'}
+
+
+def date_intervalle(valeur, nombre, unite):
+    """DATE_ADD/DATE_SUB : `nombre` est signé, le résultat garde la forme (date seule ou date-heure) de l'entrée."""
+    d = _en_datetime(valeur)
+    if d is None or nombre is None:
+        return None
+    nombre = int(nombre)
+    unite = unite.upper()
+    if unite in ('MONTH', 'YEAR', 'QUARTER'):
+        mois = nombre * {'MONTH': 1, 'QUARTER': 3, 'YEAR': 12}[unite]
+        total = d.year * 12 + d.month - 1 + mois
+        annee, mois_cible = divmod(total, 12)
+        jour = min(d.day, calendar.monthrange(annee, mois_cible + 1)[1])
+        d = d.replace(year=annee, month=mois_cible + 1, day=jour)
+    else:
+        d += timedelta(**{_UNITES_TIMEDELTA[unite]: nombre})
+    return d.date().isoformat() if _est_date_seule(valeur) else _adapter_datetime(d)
+
+
+def _partie(attribut):
+    def extraire(valeur):
+        d = _en_datetime(valeur)
+        return getattr(d, attribut) if d is not None else None
+    return extraire
+
+
+def extraire(unite, valeur):
+    d = _en_datetime(valeur)
+    if d is None:
+        return None
+    return getattr(d, unite.lower(), None)
+
+
+def dayofweek(valeur):
+    """1 = dimanche ... 7 = samedi, comme MySQL."""
+    d = _en_datetime(valeur)
+    return d.isoweekday() % 7 + 1 if d is not None else None
+
+
+def datediff(fin, debut):
+    d_fin, d_debut = _en_datetime(fin), _en_datetime(debut)
+    if d_fin is None or d_debut is None:
+        return None
+    return (d_fin.date() - d_debut.date()).days
+
+
+def concat(*valeurs):
+    if any(v is None for v in valeurs):
+        return None
+    return ''.join(str(v) for v in valeurs)
+
+
+def _enregistrer_fonctions(connexion: sqlite3.Connection) -> None:
+    connexion.create_function('NOW', 0, lambda: _adapter_datetime(datetime.now()))
+    connexion.create_function('CURDATE', 0, lambda: date.today().isoformat())
+    connexion.create_function('YEAR', 1, _partie('year'), deterministic=True)
+    connexion.create_function('MONTH', 1, _partie('month'), deterministic=True)
+    connexion.create_function('DAY', 1, _partie('day'), deterministic=True)
+    connexion.create_function('DAYOFWEEK', 1, dayofweek, deterministic=True)
+    connexion.create_function('DATEDIFF', 2, datediff, deterministic=True)
+    connexion.create_function('DATE_FORMAT', 2, date_format, deterministic=True)
+    connexion.create_function('DATE_INTERVALLE', 3, date_intervalle, deterministic=True)
+    connexion.create_function('EXTRAIRE', 2, extraire, deterministic=True)
+    connexion.create_function('CONCAT', -1, concat, deterministic=True)
+
+
+# --- Traduction du SQL ---
+
+_RE_LITTERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_RE_PARAM_NOMME = re.compile(r"%\((\w+)\)s")
+_RE_INTERVALLE = re.compile(
+    r"DATE_(SUB|ADD)\(\s*(.+?)\s*,\s*INTERVAL\s+(\?|:\w+|-?\d+)\s+(SECOND|MINUTE|HOUR|DAY|WEEK|MONTH|QUARTER|YEAR)\s*\)",
+    re.IGNORECASE)
+_RE_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_RE_VALUES_COLONNE = re.compile(r"\bVALUES\(\s*`?(\w+)`?\s*\)", re.IGNORECASE)
+_REECRITURES = [
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE), "INSERT OR IGNORE"),
+    (re.compile(r"\bFOR\s+UPDATE\b", re.IGNORECASE), ""),
+    (re.compile(r"\bEXTRACT\(\s*(\w+)\s+FROM\s+", re.IGNORECASE), r"EXTRAIRE('\1', "),
+    (re.compile(r"\bJSON_ARRAYAGG\(", re.IGNORECASE), "json_group_array("),
+    (re.compile(r"\bSELECT\s+LAST_INSERT_ID\(\)", re.IGNORECASE), 'SELECT last_insert_rowid() AS "LAST_INSERT_ID()"'),
+    (re.compile(r"\bIF\(", re.IGNORECASE), "iif("),
+    (re.compile(r"\s+SEPARATOR\s+", re.IGNORECASE), ", "),
+]
+
+
+def _remplacer_hors_litteraux(sql: str, avec_parametres: bool) -> str:
+    """Paramètres pymysql -> sqlite3, en laissant les chaînes littérales intactes."""
+    # pymysql n'applique l'opérateur % à la requête (donc %% -> %) que s'il y a des paramètres
+    def code(texte):
+        texte = _RE_PARAM_NOMME.sub(r":\1", texte).replace('%s', '?')
+        return texte.replace('%%', '%') if avec_parametres else texte
+
+    morceaux, position = [], 0
+    for m in _RE_LITTERAL.finditer(sql):
+        morceaux.append(code(sql[position:m.start()]))
+        litteral = m.group(0)
+        morceaux.append(litteral.replace('%%', '%') if avec_parametres else litteral)
+        position = m.end()
+    morceaux.append(code(sql[position:]))
+    return ''.join(morceaux)
+
+
+def _intervalle(m: re.Match) -> str:
+    signe = '-' if m.group(1).upper() == 'SUB' else ''
+    return f"DATE_INTERVALLE({m.group(2)}, {signe}({m.group(3)}), '{m.group(4).upper()}')"
+
+
+@lru_cache(maxsize=2048)
+def traduire_requete(sql: str, avec_parametres: bool = True) -> str:
+    """Traduit une requête écrite pour MySQL/pymysql en SQL SQLite."""
+    sql = _remplacer_hors_litteraux(sql, avec_parametres)
+    sql = _RE_INTERVALLE.sub(_intervalle, sql)
+    for motif, remplacement in _REECRITURES:
+        sql = motif.sub(remplacement, sql)
+    m = _RE_DUPLICATE.search(sql)
+    if m:
+        affectations = _RE_VALUES_COLONNE.sub(r"excluded.\1", sql[m.end():])
+        sql = sql[:m.start()] + "ON CONFLICT DO UPDATE SET" + affectations
+    return sql
+
+
+_RE_CREATE_TABLE = re.compile(r"^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?", re.IGNORECASE)
+_RE_INDEX_LIGNE = re.compile(r"^\s*(?:KEY|INDEX)\s+`?(\w+)`?\s*\(([^)]*)\)\s*,?\s*$", re.IGNORECASE | re.MULTILINE)
+_RE_ENUM = re.compile(r"\bENUM\s*\([^)]*\)", re.IGNORECASE)
+_REECRITURES_SCHEMA = [
+    (re.compile(r"--[^\n]*"), ""),
+    (re.compile(r"\bINT\s+(?:AUTO_INCREMENT\s+PRIMARY\s+KEY|PRIMARY\s+KEY\s+AUTO_INCREMENT)\b", re.IGNORECASE),
+     "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (_RE_ENUM, "TEXT"),
+    (re.compile(r"\bON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.IGNORECASE), ""),
+    (re.compile(r"\bDEFAULT\s+CURRENT_TIMESTAMP\b", re.IGNORECASE), "DEFAULT (datetime('now', 'localtime'))"),
+    (re.compile(r"\bUNIQUE\s+KEY\s+`?\w+`?\s*\(", re.IGNORECASE), "UNIQUE ("),
+    # Quelques tables historiques référencent « users » au lieu de « utilisateurs »
+    (re.compile(r"\bREFERENCES\s+users\s*\(", re.IGNORECASE), "REFERENCES utilisateurs("),
+    (re.compile(r"\)\s*ENGINE\s*=.*$", re.IGNORECASE | re.DOTALL), ")"),
+]
+_RE_VIRGULE_FINALE = re.compile(r",(\s*)\)\s*;?\s*$")
+_RE_AJOUT_COLONNE = re.compile(r"^\s*ALTER\s+TABLE\s+`?\w+`?\s+ADD\s+COLUMN\b", re.IGNORECASE)
+
+
+def est_create_table(sql: str) -> bool:
+    return _RE_CREATE_TABLE.match(sql) is not None
+
+
+def traduire_schema(sql: str) -> List[str]:
+    """
+    Convertit un CREATE TABLE MySQL en instructions SQLite : la table elle-même
+    puis un CREATE INDEX par clé secondaire (KEY/INDEX n'existent pas en ligne en SQLite).
+    """
+    table = _RE_CREATE_TABLE.match(sql).group(1)
+    for motif, remplacement in _REECRITURES_SCHEMA:
+        sql = motif.sub(remplacement, sql)
+    index = [
+        f"CREATE INDEX IF NOT EXISTS {table}_{nom} ON {table} ({colonnes.replace('`', '')})"
+        for nom, colonnes in _RE_INDEX_LIGNE.findall(sql)
+    ]
+    sql = _RE_INDEX_LIGNE.sub("", sql)
+    sql = _RE_VIRGULE_FINALE.sub(r"\1)", sql.rstrip())
+    return [sql] + index
+
+
+# --- Curseur et connexions ---
+
+def _erreur_mysql(erreur: sqlite3.Error) -> Exception:
+    if isinstance(erreur, sqlite3.IntegrityError):
+        classe = erreurs_mysql.IntegrityError
+    elif isinstance(erreur, sqlite3.OperationalError):
+        classe = erreurs_mysql.OperationalError
+    elif isinstance(erreur, sqlite3.ProgrammingError):
+        classe = erreurs_mysql.ProgrammingError
+    else:
+        classe = erreurs_mysql.DatabaseError
+    return classe(0, str(erreur))
+
+
+class CurseurSQLite:
+    """Curseur au comportement de pymysql DictCursor (ou Cursor en mode tuples) au-dessus d'un curseur sqlite3."""
+
+    __slots__ = ('_curseur',)
+
+    def __init__(self, curseur: sqlite3.Cursor):
+        self._curseur = curseur
+
+    def execute(self, query, args=None):
+        if isinstance(query, bytes):
+            query = query.decode('utf-8')
+        try:
+            if est_create_table(query):
+                for instruction in traduire_schema(query):
+                    self._curseur.execute(instruction)
+                return 0
+            if _RE_AJOUT_COLONNE.match(query):
+                query = _RE_ENUM.sub("TEXT", query)
+            sql = traduire_requete(query, args is not None)
+            if args is None:
+                self._curseur.execute(sql)
+            elif isinstance(args, dict):
+                self._curseur.execute(sql, args)
+            else:
+                self._curseur.execute(sql, tuple(args) if isinstance(args, (list, tuple)) else (args,))
+        except sqlite3.Error as e:
+            raise _erreur_mysql(e) from e
+        return self._curseur.rowcount
+
+    def executemany(self, query, args):
+        args = list(args)
+        if not args:
+            return 0
+        try:
+            self._curseur.executemany(traduire_requete(query, True), args)
+        except sqlite3.Error as e:
+            raise _erreur_mysql(e) from e
+        return self._curseur.rowcount
+
+    def fetchone(self):
+        return self._curseur.fetchone()
+
+    def fetchall(self):
+        return self._curseur.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._curseur.fetchmany(size or self._curseur.arraysize)
+
+    @property
+    def lastrowid(self):
+        return self._curseur.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._curseur.rowcount
+
+    @property
+    def description(self):
+        return self._curseur.description
+
+    def close(self):
+        self._curseur.close()
+
+    def __iter__(self):
+        return iter(self._curseur)
+
+
+def _ligne_dict(curseur: sqlite3.Cursor, ligne: tuple) -> Dict:
+    return {colonne[0]: valeur for colonne, valeur in zip(curseur.description, ligne)}
+
+
+class StockageSQLite:
+    """
+    Fichier SQLite partagé par les threads du processus, une connexion par thread.
+    Les get_cursor imbriqués d'un même thread partagent la transaction : seul le
+    plus externe valide ou annule. À la sortie normale, la transaction est validée
+    même avec commit=False, comme l'autocommit de la configuration MySQL.
+    """
+
+    def __init__(self, chemin: str, delai_attente: float = 30.0):
+        self.chemin = chemin
+        self.delai_attente = delai_attente
+        self._local = threading.local()
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+
+    def _connexion(self) -> sqlite3.Connection:
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            connexion = sqlite3.connect(self.chemin, timeout=self.delai_attente,
+                                        detect_types=sqlite3.PARSE_DECLTYPES)
+            connexion.row_factory = _ligne_dict
+            connexion.execute("PRAGMA journal_mode=WAL")
+            connexion.execute("PRAGMA synchronous=NORMAL")
+            connexion.execute("PRAGMA foreign_keys=ON")
+            connexion.execute(f"PRAGMA busy_timeout={int(self.delai_attente * 1000)}")
+            _enregistrer_fonctions(connexion)
+            self._local.connexion = connexion
+            self._local.profondeur = 0
+            logger.info("Connexion SQLite ouverte sur %s (thread %s)", self.chemin, threading.get_ident())
+        return connexion
+
+    @contextmanager
+    def curseur(self, tuples: bool = False):
+        """Curseur à lignes dict, ou tuples bruts si `tuples` (lectures volumineuses)."""
+        connexion = self._connexion()
+        profondeur = self._local.profondeur
+        self._local.profondeur = profondeur + 1
+        curseur = connexion.cursor()
+        if tuples:
+            curseur.row_factory = None
+        try:
+            yield CurseurSQLite(curseur)
+            if profondeur == 0 and connexion.in_transaction:
+                connexion.commit()
+        except Exception:
+            if profondeur == 0 and connexion.in_transaction:
+                connexion.rollback()
+            raise
+        finally:
+            curseur.close()
+            self._local.profondeur = profondeur
+
+    def fermer(self) -> None:
+        """Ferme la connexion du thread courant (les autres threads gardent la leur)."""
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is not None:
+            connexion.close()
+            self._local.connexion = None
+
+
+_stockages: Dict[str, StockageSQLite] = {}
+_verrou_stockages = threading.Lock()
+
+
+def obtenir_stockage(chemin: str) -> StockageSQLite:
+    """Un StockageSQLite par fichier et par processus, réutilisé par tous les DatabaseManager."""
+    chemin = os.path.abspath(chemin)
+    with _verrou_stockages:
+        stockage = _stockages.get(chemin)
+        if stockage is None:
+            stockage = _stockages[chemin] = StockageSQLite(chemin)
+        return stockage
@@ -0,0 +1,503 @@
+"""
+Moteur commun de rendu des graphiques SVG (lignes, barres, barres horizontales,
+barres empilées, barres opposées).
+
+Les échelles sont précalculées une fois par graphique (facteur + décalage), le
+SVG est assemblé dans une liste puis joint en une seule fois, et les séries plus
+longues que la largeur utile en pixels sont sous-échantillonnées (LTTB) : un
+graphique journalier sur plusieurs années reste ainsi petit et rapide à produire.
+
+Le module ne dépend que de la bibliothèque standard.
+"""
+import math
+from html import escape
+from typing import Callable, Dict, List, Optional, Sequence
+
+COULEURS_DEFAUT = ["#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f",
+                   "#edc948", "#b07aa1", "#ff9da7", "#9c755f", "#bab0ac"]
+
+SVG_NS = 'xmlns="http://www.w3.org/2000/svg"'
+
+
+def _n(valeur: float) -> str:
+    """Formate une coordonnée avec une décimale (sortie plus compacte)."""
+    return '%.1f' % valeur
+
+
+def svg_message(texte: str, largeur: int = 800, hauteur: int = 400) -> str:
+    """SVG minimal affichant un message (aucune donnée, erreur...) ; le texte est échappé."""
+    return f"<svg width='{largeur}' height='{hauteur}'><text x='10' y='20'>{escape(str(texte))}</text></svg>"
+
+
+class Echelle:
+    """Échelle linéaire domaine -> pixels, précalculée (un produit et une somme par point)."""
+
+    __slots__ = ('domaine_min', 'domaine_max', 'facteur', 'decalage')
+
+    def __init__(self, domaine_min: float, domaine_max: float, pixel_min: float, pixel_max: float):
+        if domaine_max == domaine_min:
+            domaine_max = domaine_min + 1
+        self.domaine_min = domaine_min
+        self.domaine_max = domaine_max
+        self.facteur = (pixel_max - pixel_min) / (domaine_max - domaine_min)
+        self.decalage = pixel_min - domaine_min * self.facteur
+
+    def __call__(self, valeur: float) -> float:
+        return valeur * self.facteur + self.decalage
+
+
+class Cadre:
+    """Dimensions d'un graphique et de sa zone de tracé."""
+
+    __slots__ = ('largeur', 'hauteur', 'gauche', 'droite', 'haut', 'bas',
+                 'largeur_graph', 'hauteur_graph')
+
+    def __init__(self, largeur: float, hauteur: float,
+                 marge_gauche: float, marge_droite: float, marge_haut: float, marge_bas: float):
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.gauche = marge_gauche
+        self.droite = largeur - marge_droite
+        self.haut = marge_haut
+        self.bas = hauteur - marge_bas
+        self.largeur_graph = self.droite - self.gauche
+        self.hauteur_graph = self.bas - self.haut
+
+    @classmethod
+    def proportionnel(cls, largeur: float, hauteur: float, ratio_marge: float = 0.1) -> 'Cadre':
+        """Cadre avec des marges proportionnelles (utilisé par les templates de synthèse)."""
+        return cls(largeur, hauteur, largeur * ratio_marge, largeur * ratio_marge,
+                   hauteur * ratio_marge, hauteur * ratio_marge)
+
+    def en_dict(self) -> Dict:
+        """Clés attendues par les templates qui tracent eux-mêmes le SVG."""
+        return {
+            'largeur_svg': self.largeur,
+            'hauteur_svg': self.hauteur,
+            'margin_x': self.gauche,
+            'margin_y': self.haut,
+            'plot_width': self.largeur_graph,
+            'plot_height': self.hauteur_graph,
+        }
+
+
+def pas_lisible(etendue: float, nb_cible: int = 5) -> float:
+    """Pas de graduation « rond » (1, 2 ou 5 × 10^n) donnant environ nb_cible graduations."""
+    if etendue <= 0 or not math.isfinite(etendue):
+        return 1
+    brut = etendue / max(1, nb_cible)
+    puissance = 10 ** math.floor(math.log10(brut))
+    for multiple in (1, 2, 5, 10):
+        if brut <= multiple * puissance:
+            pas = multiple * puissance
+            break
+    return int(pas) if pas >= 1 else pas
+
+
+def graduations(min_val: float, max_val: float, pas: Optional[float] = None,
+                nb_cible: int = 5) -> List[float]:
+    """Valeurs des graduations comprises dans [min_val, max_val]."""
+    if pas is None:
+        pas = pas_lisible(max_val - min_val, nb_cible)
+    debut = math.ceil(min_val / pas - 1e-9)
+    fin = math.floor(max_val / pas + 1e-9)
+    return [i * pas for i in range(debut, fin + 1)]
+
+
+def decimales_pas(pas: float) -> int:
+    """Nombre de décimales nécessaires pour écrire le pas (0 pour 10, 1 pour 0.5 ou 2.5)."""
+    for decimales in range(7):
+        if abs(round(pas, decimales) - pas) < 1e-9:
+            return decimales
+    return 6
+
+
+def libelle_graduation(valeur: float, pas: float) -> str:
+    """Libellé d'une graduation, avec la précision du pas (pas de troncature de 0.5 en 0)."""
+    texte = '%.*f' % (decimales_pas(pas), valeur)
+    return texte.lstrip('-') if float(texte) == 0 else texte
+
+
+def lttb(valeurs: Sequence[float], seuil: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets : indices des points à conserver pour tracer
+    `valeurs` avec au plus `seuil` points en gardant la forme de la courbe.
+    """
+    n = len(valeurs)
+    if seuil >= n or seuil < 3:
+        return list(range(n))
+
+    indices = [0]
+    taille_bucket = (n - 2) / (seuil - 2)
+    a = 0
+    for i in range(seuil - 2):
+        debut = int(i * taille_bucket) + 1
+        fin = int((i + 1) * taille_bucket) + 1
+        debut_suivant = fin
+        fin_suivant = min(int((i + 2) * taille_bucket) + 1, n)
+        if fin_suivant > debut_suivant:
+            moy_x = (debut_suivant + fin_suivant - 1) / 2
+            moy_y = sum(valeurs[debut_suivant:fin_suivant]) / (fin_suivant - debut_suivant)
+        else:
+            moy_x, moy_y = n - 1, valeurs[n - 1]
+
+        ya = valeurs[a]
+        aire_max = -1.0
+        choisi = debut
+        for j in range(debut, fin):
+            aire = abs((a - moy_x) * (valeurs[j] - ya) - (a - j) * (moy_y - ya))
+            if aire > aire_max:
+                aire_max = aire
+                choisi = j
+        indices.append(choisi)
+        a = choisi
+    indices.append(n - 1)
+    return indices
+
+
+def _flottants(valeurs) -> List[float]:
+    return [float(v or 0) for v in valeurs]
+
+
+def _couleurs(couleurs: Optional[List[str]], nombre: int) -> List[str]:
+    couleurs = list(couleurs or [])
+    if len(couleurs) < nombre:
+        couleurs += COULEURS_DEFAUT[len(couleurs):]
+    while len(couleurs) < nombre:
+        couleurs += COULEURS_DEFAUT
+    return couleurs[:nombre]
+
+
+def _indices_communs(series: Sequence[List[float]], seuil: int) -> List[int]:
+    """Indices LTTB partagés par plusieurs séries (axe X commun) : calculés sur la somme des |valeurs|."""
+    n = len(series[0]) if series else 0
+    if seuil >= n:
+        return list(range(n))
+    somme = [sum(abs(s[i]) for s in series) for i in range(n)]
+    return lttb(somme, seuil)
+
+
+def _axes_et_graduations_y(parties: List[str], cadre: Cadre, echelle_y: Echelle,
+                           valeurs_ticks: List[float], format_tick: Callable) -> None:
+    g, d = cadre.gauche, cadre.droite
+    parties.append(f'<line x1="{g}" y1="{cadre.haut}" x2="{g}" y2="{cadre.bas}" stroke="black" stroke-width="2" />\n')
+    parties.append(f'<line x1="{g}" y1="{cadre.bas}" x2="{d}" y2="{cadre.bas}" stroke="black" stroke-width="2" />\n')
+    parties.append('<g font-size="10" text-anchor="end">\n')
+    for v in valeurs_ticks:
+        y = _n(echelle_y(v))
+        parties.append(f'<line x1="{g}" y1="{y}" x2="{d}" y2="{y}" stroke="#ddd" stroke-width="0.5" />'
+                       f'<text x="{g - 10}" y="{y}" dy="4">{format_tick(v)}</text>\n')
+    parties.append('</g>\n')
+
+
+def _labels_x(parties: List[str], labels: Sequence[str], positions: Sequence[float],
+              y: float, nb_max: int = 10) -> None:
+    n = len(labels)
+    if not n:
+        return
+    pas = max(1, n // nb_max)
+    parties.append('<g font-size="10" text-anchor="middle">\n')
+    for i in range(0, n, pas):
+        parties.append(f'<text x="{_n(positions[i])}" y="{_n(y)}">{escape(str(labels[i]))}</text>\n')
+    parties.append('</g>\n')
+
+
+def _legende(parties: List[str], noms: Sequence[str], couleurs: Sequence[str], cadre: Cadre) -> None:
+    x = cadre.largeur - 120
+    for idx, nom in enumerate(noms):
+        y_leg = cadre.haut + idx * 20
+        nom_affiche = nom[:15] + "..." if len(nom) > 15 else nom
+        parties.append(f'<rect x="{x}" y="{y_leg}" width="15" height="10" fill="{couleurs[idx]}" />'
+                       f'<text x="{x + 20}" y="{y_leg + 8}" font-size="12">{escape(nom_affiche)}</text>\n')
+
+
+def _format_graduations(valeurs_ticks: List[float]) -> Callable[[float], str]:
+    """Formateur de graduations à la précision du pas entre deux valeurs consécutives."""
+    pas = valeurs_ticks[1] - valeurs_ticks[0] if len(valeurs_ticks) > 1 else 1
+    return lambda v: libelle_graduation(v, pas)
+
+
+def graphique_lignes(labels: Sequence[str], series: Dict[str, Sequence], couleurs: Optional[List[str]] = None,
+                     largeur: int = 800, hauteur: int = 400, marges=(60, 40, 40, 60),
+                     afficher_points: bool = True, afficher_legende: bool = True,
+                     message_vide: str = "Aucune donnée disponible.") -> str:
+    """
+    Graphique en lignes multi-séries. Chaque série est réduite par LTTB à au plus
+    une valeur par pixel de largeur utile.
+    """
+    if not series or not labels:
+        return svg_message(message_vide, largeur, hauteur)
+
+    cadre = Cadre(largeur, hauteur, *marges)
+    noms = list(series.keys())
+    valeurs = [_flottants(series[nom]) for nom in noms]
+    couleurs = _couleurs(couleurs, len(noms))
+    n = len(labels)
+
+    max_val = max(max(v) for v in valeurs if v) if any(valeurs) else 0
+    min_val = min(0.0, min(min(v) for v in valeurs if v) if any(valeurs) else 0)
+    if max_val == min_val:
+        max_val = min_val + 1
+
+    echelle_x = Echelle(0, max(1, n - 1), cadre.gauche, cadre.droite)
+    echelle_y = Echelle(min_val, max_val, cadre.bas, cadre.haut)
+
+    parties = [f'<svg width="{largeur}" height="{hauteur}" {SVG_NS}>\n']
+    valeurs_ticks = graduations(min_val, max_val)
+    _axes_et_graduations_y(parties, cadre, echelle_y, valeurs_ticks, _format_graduations(valeurs_ticks))
+
+    seuil = max(3, int(cadre.largeur_graph))
+    for serie, couleur in zip(valeurs, couleurs):
+        indices = lttb(serie, seuil)
+        coords = [(_n(echelle_x(i)), _n(echelle_y(serie[i]))) for i in indices]
+        points = [f"{x},{y}" for x, y in coords]
+        if afficher_points and len(coords) <= cadre.largeur_graph / 4:
+            parties.append(f'<g fill="{couleur}">')
+            parties.extend(f'<circle cx="{x}" cy="{y}" r="2" />' for x, y in coords)
+            parties.append('</g>\n')
+        if len(points) > 1:
+            parties.append(f'<polyline points="{" ".join(points)}" fill="none" stroke="{couleur}" stroke-width="2" />\n')
+
+    _labels_x(parties, labels, [echelle_x(i) for i in range(n)], cadre.bas + 20)
+    if afficher_legende:
+        _legende(parties, noms, couleurs, cadre)
+    parties.append('</svg>')
+    return ''.join(parties)
+
+
+def graphique_barres(labels: Sequence[str], series: Dict[str, Sequence], couleurs: Optional[List[str]] = None,
+                     largeur: int = 800, hauteur: int = 400, marges=(60, 40, 40, 60),
+                     empile: bool = False, afficher_legende: bool = True,
+                     format_tick: Optional[Callable] = None,
+                     message_vide: str = "Aucune donnée disponible.") -> str:
+    """
+    Graphique en barres verticales, groupées par label ou empilées (empile=True :
+    valeurs positives empilées vers le haut, négatives vers le bas).
+    Au-delà d'une barre par pixel, les labels sont sous-échantillonnés (LTTB sur
+    la somme des séries) pour garder un SVG de taille bornée.
+    """
+    if not series or not labels:
+        return svg_message(message_vide, largeur, hauteur)
+
+    cadre = Cadre(largeur, hauteur, *marges)
+    noms = list(series.keys())
+    valeurs = [_flottants(series[nom]) for nom in noms]
+    n = len(labels)
+    valeurs = [v + [0.0] * (n - len(v)) for v in valeurs]
+    couleurs = _couleurs(couleurs, len(noms))
+
+    seuil = max(3, int(cadre.largeur_graph / (1 if empile else len(noms))))
+    indices = _indices_communs(valeurs, seuil)
+    n_aff = len(indices)
+
+    if empile:
+        hauts = [sum(v[i] for v in valeurs if v[i] > 0) for i in indices]
+        bas = [sum(v[i] for v in valeurs if v[i] < 0) for i in indices]
+        max_val, min_val = max(hauts + [0.0]), min(bas + [0.0])
+    else:
+        max_val = max(max(v[i] for i in indices) for v in valeurs)
+        min_val = min(0.0, min(min(v[i] for i in indices) for v in valeurs))
+        max_val = max(max_val, 0.0)
+    if max_val == min_val:
+        max_val = min_val + 1
+
+    echelle_y = Echelle(min_val, max_val, cadre.bas, cadre.haut)
+    y_zero = echelle_y(0)
+    largeur_slot = cadre.largeur_graph / n_aff
+    largeur_groupe = largeur_slot * (0.9 if n_aff > 1 else 0.5)
+    largeur_barre = largeur_groupe if empile else largeur_groupe / len(noms)
+    lb = _n(largeur_barre)
+
+    parties = [f'<svg width="{largeur}" height="{hauteur}" {SVG_NS}>\n']
+    valeurs_ticks = graduations(min_val, max_val)
+    _axes_et_graduations_y(parties, cadre, echelle_y, valeurs_ticks,
+                           format_tick or _format_graduations(valeurs_ticks))
+
+    for j, (serie, couleur) in enumerate(zip(valeurs, couleurs)):
+        parties.append(f'<g fill="{couleur}">\n')
+        for k, i in enumerate(indices):
+            v = serie[i]
+            if not v:
+                continue
+            x0 = cadre.gauche + k * largeur_slot
+            if empile:
+                # Décalage = somme des séries précédentes de même signe
+                base = sum(s[i] for s in valeurs[:j] if (s[i] > 0) == (v > 0) and s[i])
+                y_a, y_b = echelle_y(base), echelle_y(base + v)
+                x = x0
+            else:
+                y_a, y_b = y_zero, echelle_y(v)
+                x = x0 + j * largeur_barre
+            parties.append(f'<rect x="{_n(x)}" y="{_n(min(y_a, y_b))}" width="{lb}" height="{_n(abs(y_b - y_a))}" />\n')
+        parties.append('</g>\n')
+
+    if min_val < 0:
+        parties.append(f'<line x1="{cadre.gauche}" y1="{_n(y_zero)}" x2="{cadre.droite}" y2="{_n(y_zero)}" stroke="#000" stroke-dasharray="2" />\n')
+
+    _labels_x(parties, [labels[i] for i in indices],
+              [cadre.gauche + (k + 0.5) * largeur_slot - (largeur_slot - largeur_groupe) / 2 for k in range(n_aff)],
+              cadre.bas + 20)
+    if afficher_legende:
+        _legende(parties, noms, couleurs, cadre)
+    parties.append('</svg>')
+    return ''.join(parties)
+
+
+def graphique_barres_horizontales(labels: Sequence[str], valeurs: Sequence, couleurs=None,
+                                  largeur: int = 800, hauteur_min: int = 400, hauteur_par_barre: int = 40,
+                                  marges=(250, 40, 30, 30), valeur_max: Optional[float] = None,
+                                  format_valeur: Callable = lambda v: f"{v:,.2f}",
+                                  longueur_label: Optional[int] = None, taille_police: int = 12,
+                                  message_vide: str = "Aucune donnée disponible.") -> str:
+    """
+    Barres horizontales (une par label, du haut vers le bas), label à gauche,
+    valeur à droite. `couleurs` : une couleur commune ou une liste par barre.
+    `valeur_max` fixe la valeur correspondant à toute la largeur (ex. le total
+    pour des parts), sinon le maximum des valeurs.
+    """
+    if not labels:
+        return svg_message(message_vide, largeur, hauteur_min)
+
+    valeurs = _flottants(valeurs)
+    n = len(labels)
+    hauteur = max(hauteur_min, n * hauteur_par_barre)
+    cadre = Cadre(largeur, hauteur, *marges)
+    max_val = valeur_max or max(valeurs) or 1
+    echelle_x = Echelle(0, max_val, cadre.gauche, cadre.droite)
+
+    pas_y = cadre.hauteur_graph / n
+    hauteur_barre = pas_y * 0.8
+    hb = _n(hauteur_barre)
+    if couleurs is None or isinstance(couleurs, str):
+        couleurs = [couleurs or COULEURS_DEFAUT[0]] * n
+
+    parties = [f'<svg width="{largeur}" height="{hauteur}" {SVG_NS}>\n',
+               f'<g font-size="{taille_police}" dominant-baseline="middle">\n']
+    for i in range(n):
+        y = cadre.haut + i * pas_y
+        y_texte = _n(y + hauteur_barre / 2 + 4)
+        fin = echelle_x(valeurs[i])
+        label = str(labels[i])
+        if longueur_label:
+            label = label[:longueur_label]
+        parties.append(f'<rect x="{cadre.gauche}" y="{_n(y)}" width="{_n(fin - cadre.gauche)}" height="{hb}" fill="{couleurs[i]}" />'
+                       f'<text x="{_n(fin + 10)}" y="{y_texte}">{format_valeur(valeurs[i])}</text>'
+                       f'<text x="{cadre.gauche - 10}" y="{y_texte}" text-anchor="end">{escape(label)}</text>\n')
+    parties.append('</g>\n</svg>')
+    return ''.join(parties)
+
+
+def graphique_barres_opposees(labels: Sequence[str], valeurs_gauche: Sequence, valeurs_droite: Sequence,
+                              couleurs=("#0000FF", "#00FF00"), legendes=("", ""),
+                              largeur: int = 900, hauteur: int = 500, marges=(120, 40, 40, 40),
+                              message_vide: str = "Aucune donnée pour les dates sélectionnées.") -> str:
+    """
+    Barres horizontales dos à dos autour d'un axe central : la première série
+    s'étend vers la gauche, la seconde vers la droite (sens inversé pour les
+    valeurs négatives). Une ligne par label, sous-échantillonnée au-delà d'une
+    ligne par pixel de hauteur.
+    """
+    if not labels:
+        return svg_message(message_vide, largeur, hauteur)
+
+    gauche, droite = _flottants(valeurs_gauche), _flottants(valeurs_droite)
+    cadre = Cadre(largeur, hauteur, *marges)
+    indices = _indices_communs([gauche, droite], max(3, int(cadre.hauteur_graph)))
+    n = len(indices)
+
+    max_val = max(max(abs(gauche[i]), abs(droite[i])) for i in indices) or 1
+    x_zero = cadre.gauche + cadre.largeur_graph / 2
+    echelle = (cadre.largeur_graph / 2) / max_val
+    pas_y = cadre.hauteur_graph / n
+    hauteur_barre = pas_y * 0.8 if n > 1 else cadre.hauteur_graph * 0.8
+    hb = _n(hauteur_barre)
+    g, d, haut, bas = cadre.gauche, cadre.droite, cadre.haut, cadre.bas
+
+    parties = [
+        f'<svg width="{largeur}" height="{hauteur}" {SVG_NS}>\n',
+        f'<line x1="{x_zero}" y1="{haut}" x2="{x_zero}" y2="{bas}" stroke="#000" stroke-width="2" />\n',
+        f'<line x1="{g}" y1="{haut}" x2="{d}" y2="{haut}" stroke="#000" stroke-width="2" />\n',
+        f'<line x1="{g}" y1="{bas}" x2="{d}" y2="{bas}" stroke="#000" stroke-width="2" />\n',
+    ]
+
+    # Graduations symétriques
+    parties.append('<g font-size="10" text-anchor="middle">\n')
+    valeurs_ticks = graduations(0, max_val)
+    format_tick = _format_graduations(valeurs_ticks)
+    for v in valeurs_ticks:
+        if not v:
+            continue
+        for signe in (1, -1):
+            x = _n(x_zero + signe * v * echelle)
+            parties.append(f'<line x1="{x}" y1="{haut}" x2="{x}" y2="{bas}" stroke="#ccc" stroke-width="0.8" />'
+                           f'<text x="{x}" y="{bas + 15}">{"" if signe > 0 else "-"}{format_tick(v)}</text>\n')
+    parties.append('</g>\n')
+
+    rects_g, rects_d, textes = [], [], []
+    pas_labels = max(1, n // 40)
+    for k, i in enumerate(indices):
+        y_centre = haut + (k + 0.5) * pas_y
+        y = _n(y_centre - hauteur_barre / 2)
+        lg = abs(gauche[i]) * echelle
+        xg = x_zero - lg if gauche[i] >= 0 else x_zero
+        rects_g.append(f'<rect x="{_n(xg)}" y="{y}" width="{_n(lg)}" height="{hb}" />\n')
+        ld = abs(droite[i]) * echelle
+        xd = x_zero if droite[i] >= 0 else x_zero - ld
+        rects_d.append(f'<rect x="{_n(xd)}" y="{y}" width="{_n(ld)}" height="{hb}" />\n')
+        if k % pas_labels == 0:
+            textes.append(f'<text x="{g - 10}" y="{_n(y_centre)}">{escape(str(labels[i]))}</text>\n')
+
+    parties.append(f'<g fill="{couleurs[0]}">\n')
+    parties.extend(rects_g)
+    parties.append(f'</g>\n<g fill="{couleurs[1]}">\n')
+    parties.extend(rects_d)
+    parties.append('</g>\n<g text-anchor="end" dominant-baseline="middle" font-size="10">\n')
+    parties.extend(textes)
+    parties.append('</g>\n')
+
+    parties.append(f'<rect x="{g}" y="{haut - 25}" width="15" height="10" fill="{couleurs[0]}" />'
+                   f'<text x="{g + 20}" y="{haut - 15}" font-size="12">{escape(legendes[0])}</text>\n')
+    parties.append(f'<rect x="{g + 150}" y="{haut - 25}" width="15" height="10" fill="{couleurs[1]}" />'
+                   f'<text x="{g + 170}" y="{haut - 15}" font-size="12">{escape(legendes[1])}</text>\n')
+    parties.append('</svg>')
+    return ''.join(parties)
+
+
+def colonnes(valeurs: Sequence[float], cadre: Cadre, echelle_y: Echelle, ratio_barre: float = 0.7) -> List[Dict]:
+    """
+    Géométrie des colonnes (une par valeur, centrées dans leur case) pour les
+    templates qui dessinent eux-mêmes le SVG.
+    """
+    n = len(valeurs)
+    if not n:
+        return []
+    case = cadre.largeur_graph / n
+    largeur_barre = case * ratio_barre
+    bas = cadre.haut + cadre.hauteur_graph
+    resultat = []
+    for i, v in enumerate(valeurs):
+        y_top = echelle_y(v)
+        hauteur = bas - y_top
+        if hauteur < 0:
+            hauteur = 0
+            y_top = bas
+        resultat.append({'x': cadre.gauche + (i + 0.5) * case - largeur_barre / 2,
+                         'y': y_top, 'width': largeur_barre, 'height': hauteur})
+    return resultat
+
+
+def points_centres(valeurs: Sequence[float], cadre: Cadre, echelle_y: Echelle) -> List[str]:
+    """Points "x,y" centrés dans chaque case (polyline superposée aux colonnes)."""
+    n = len(valeurs)
+    if not n:
+        return []
+    case = cadre.largeur_graph / n
+    return [f"{cadre.gauche + (i + 0.5) * case},{echelle_y(v)}" for i, v in enumerate(valeurs)]
+
+
+def ticks_y(min_val: float, max_val: float, echelle_y: Echelle, pas: Optional[float] = None) -> List[Dict]:
+    """Graduations {'value' (libellé), 'y_px'} positives ou nulles du domaine, pour les templates."""
+    if pas is None:
+        pas = pas_lisible(max_val - min_val)
+    return [{'value': libelle_graduation(v, pas), 'y_px': echelle_y(v)}
+            for v in graduations(min_val, max_val, pas) if v >= 0]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du démarrage à froid (temps d'import).
+
+Chaque mesure est faite dans un nouvel interpréteur (aucun module en cache) :
+    - import app.models          (paquet seul : base + gestionnaire)
+    - import app                 (application Flask complète, blueprints compris)
+    - toutes les propriétés de ModelManager instanciées (tous les sous-modules chargés)
+
+Avec --detail, les modules les plus coûteux sont listés d'après `python -X importtime`
+(utile pour repérer une dépendance lourde importée trop tôt, ex. ReportLab).
+
+Usage :
+    python benchmarks/bench_demarrage.py [--repetitions 10] [--detail 15] [--sortie demarrage.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code exécuté dans le sous-processus ; il affiche sa durée en secondes
+SCENARIOS = {
+    'import_app_models': "import app.models",
+    'import_app': "import app",
+    'tous_les_modeles': (
+        "import app.models as m\n"
+        "gestionnaire = m.ModelManager(None)\n"
+        "for nom in dir(m.ModelManager):\n"
+        "    if isinstance(getattr(m.ModelManager, nom), property):\n"
+        "        getattr(gestionnaire, nom)\n"
+    ),
+}
+
+GABARIT = (
+    "import sys, time\n"
+    "sys.path.insert(0, {racine!r})\n"
+    "debut = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - debut)\n"
+)
+
+
+def mesurer(code: str, repetitions: int):
+    durees = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, '-c', GABARIT.format(racine=RACINE, code=code)],
+                                cwd=RACINE, capture_output=True, text=True)
+        if sortie.returncode != 0:
+            raise RuntimeError(sortie.stderr.strip().splitlines()[-1] if sortie.stderr else 'échec')
+        durees.append(float(sortie.stdout.strip().splitlines()[-1]))
+    return durees
+
+
+def modules_couteux(code: str, nb: int):
+    """Modules au temps cumulé le plus élevé d'après -X importtime (microsecondes)."""
+    sortie = subprocess.run([sys.executable, '-X', 'importtime', '-c', GABARIT.format(racine=RACINE, code=code)],
+                            cwd=RACINE, capture_output=True, text=True)
+    lignes = []
+    # Format : "import time:   propre |   cumulé | module"
+    for ligne in sortie.stderr.splitlines():
+        if not ligne.startswith('import time:') or 'cumulative' in ligne:
+            continue
+        propre, cumule, module = ligne[len('import time:'):].split('|', 2)
+        lignes.append({'module': module.strip(), 'propre_ms': round(int(propre) / 1000, 2),
+                       'cumule_ms': round(int(cumule) / 1000, 2)})
+    return sorted(lignes, key=lambda l: l['cumule_ms'], reverse=True)[:nb]
+
+
+def revision_git() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnue'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--detail', type=int, default=0, help='nombre de modules à lister via -X importtime')
+    parser.add_argument('--sortie', default=None, help='fichier JSON de résultats')
+    args = parser.parse_args()
+
+    resultats = []
+    for nom, code in SCENARIOS.items():
+        try:
+            durees = mesurer(code, args.repetitions)
+        except RuntimeError as e:
+            print(f"{nom:<24} échec : {e}")
+            continue
+        resultat = {
+            'scenario': nom,
+            'repetitions': len(durees),
+            'meilleur_ms': round(min(durees) * 1000, 2),
+            'median_ms': round(statistics.median(durees) * 1000, 2),
+        }
+        if args.detail:
+            resultat['modules'] = modules_couteux(code, args.detail)
+        resultats.append(resultat)
+
+    print(f"{'scénario':<24}{'meilleur ms':>14}{'médiane ms':>14}")
+    for r in resultats:
+        print(f"{r['scenario']:<24}{r['meilleur_ms']:>14.2f}{r['median_ms']:>14.2f}")
+        for m in r.get('modules', []):
+            print(f"    {m['module']:<40}{m['cumule_ms']:>10.2f} ms")
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'revision': revision_git(),
+                'python': platform.python_version(),
+                'resultats': resultats,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des opérations coûteuses sur une base MySQL synthétique.
+
+Génère (ou réutilise) un jeu de données dans une base dédiée, puis chronomètre :
+    - create_depot antidaté (recalcul des soldes postérieurs)
+    - reparer_soldes_compte sur un compte de 50 000 transactions
+    - la vue annuelle /salaires
+    - calculate_h2f_stats sur une année
+    - get_compte_de_resultat sur une année
+    - get_all_user_transactions en pages profondes
+    - l'import CSV (/import/csv/final)
+
+Chaque mesure rapporte le meilleur temps, la médiane et le nombre de requêtes SQL
+(instrumentation de app/utils/instrumentation_sql.py). Les résultats sont écrits
+en JSON pour comparer deux révisions.
+
+La base visée est celle de DB_CONFIG avec le nom remplacé par --base : elle doit
+exister et être vide au premier lancement. Ne jamais pointer sur la base de production.
+
+Usage :
+    python benchmarks/bench_operations.py --base appbancaire_bench [--echelle 1.0]
+        [--graine 42] [--repetitions 5] [--sans-generation] [--sortie resultats.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger('benchmarks')
+
+
+def chronometrer(fonction, repetitions: int, preparation=None):
+    """Exécute `fonction` `repetitions` fois ; retourne les durées et le dernier résultat."""
+    from app.utils.instrumentation_sql import demarrer_mesure, terminer_mesure
+
+    durees, requetes, resultat = [], [], None
+    for _ in range(repetitions):
+        if preparation is not None:
+            preparation()
+        demarrer_mesure()
+        debut = time.perf_counter()
+        try:
+            resultat = fonction()
+        finally:
+            duree = time.perf_counter() - debut
+            mesure = terminer_mesure()
+        durees.append(duree)
+        requetes.append(mesure.nb_requetes if mesure else 0)
+    return durees, requetes, resultat
+
+
+def resumer(nom: str, durees, requetes, **details) -> dict:
+    return {
+        'operation': nom,
+        'repetitions': len(durees),
+        'meilleur_ms': round(min(durees) * 1000, 2),
+        'median_ms': round(statistics.median(durees) * 1000, 2),
+        'max_ms': round(max(durees) * 1000, 2),
+        'requetes_sql': max(requetes),
+        **details,
+    }
+
+
+def revision_git() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnue'
+
+
+def client_connecte(app, user_id: int):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+def lignes_csv(nb: int, graine: int):
+    import random
+    rng = random.Random(graine)
+    debut = datetime.now() - timedelta(days=365 * 2)
+    return [{
+        'date': (debut + timedelta(minutes=rng.randrange(365 * 2 * 24 * 60))).strftime('%Y-%m-%d %H:%M'),
+        'montant': f"{rng.randint(100, 50000) / 100:.2f}",
+        'type': rng.choice(['depot', 'retrait']),
+        'description': f"Import bench {i}",
+    } for i in range(nb)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base', default=os.environ.get('BENCH_DB_NAME', 'appbancaire_bench'),
+                        help='nom de la base MySQL de benchmark')
+    parser.add_argument('--echelle', type=float, default=1.0, help='facteur appliqué aux volumes générés')
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--lignes-csv', type=int, default=500)
+    parser.add_argument('--sans-generation', action='store_true',
+                        help='réutilise le jeu de données déjà présent dans la base')
+    parser.add_argument('--sortie', default='resultats_benchmark.json')
+    args = parser.parse_args()
+
+    # La configuration de l'application lit DB_NAME à l'import
+    os.environ['DB_NAME'] = args.base
+    from app import app
+    from app.models import DatabaseManager, ModelManager
+    from config import DB_CONFIG
+    from donnees_synthetiques import GenerateurDonnees
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    config = dict(DB_CONFIG, database=args.base)
+    # create_tables déclare certaines clés étrangères avant leur table cible
+    config['init_command'] = 'SET FOREIGN_KEY_CHECKS=0'
+    db = DatabaseManager(config)
+    models = ModelManager(db)
+    generateur = GenerateurDonnees(db, graine=args.graine, echelle=args.echelle)
+
+    user_id = generateur.utilisateur_existant()
+    if args.sans_generation and user_id:
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT id FROM comptes_principaux WHERE utilisateur_id = %s ORDER BY id", (user_id,))
+            comptes = [r['id'] for r in cursor.fetchall()]
+            cursor.execute("SELECT id, employeur FROM contrats WHERE user_id = %s ORDER BY id", (user_id,))
+            contrats = cursor.fetchall()
+    else:
+        if user_id:
+            parser.error(f"la base {args.base} contient déjà un jeu de données : utiliser --sans-generation")
+        debut = time.perf_counter()
+        donnees = generateur.generer()
+        logger.info("Génération terminée en %.1f s", time.perf_counter() - debut)
+        user_id, comptes, contrats = donnees['user_id'], donnees['comptes'], donnees['contrats']
+
+    tx_model = models.transaction_financiere_model
+    ecriture_model = models.ecriture_comptable_model
+    annee = date.today().year - 1
+    contrat = contrats[0]
+    rep = args.repetitions
+    resultats = []
+
+    # 1. Dépôt antidaté de 4 ans : toutes les transactions postérieures sont recalculées
+    durees, requetes, _ = chronometrer(lambda: tx_model.create_depot(
+        comptes[0], user_id, Decimal('10.00'), "Dépôt antidaté benchmark",
+        date_transaction=datetime.now() - timedelta(days=365 * 4)), rep)
+    resultats.append(resumer('create_depot_antidate', durees, requetes))
+
+    # 2. Réparation complète des soldes d'un compte
+    durees, requetes, _ = chronometrer(
+        lambda: tx_model.reparer_soldes_compte('compte_principal', comptes[1], user_id), max(1, rep // 2))
+    resultats.append(resumer('reparer_soldes_compte', durees, requetes))
+
+    # 3. Vue annuelle des salaires (route complète, rendu du template compris)
+    client = client_connecte(app, user_id)
+    durees, requetes, reponse = chronometrer(lambda: client.get(f'/salaires?annee={annee}'), rep)
+    resultats.append(resumer('vue_salaires_annee', durees, requetes, statut_http=reponse.status_code))
+
+    # 4. Statistiques h2f annuelles
+    durees, requetes, _ = chronometrer(lambda: models.synthese_hebdo_model.calculate_h2f_stats(
+        models.heure_model, user_id, contrat['employeur'], contrat['id'], annee), rep)
+    resultats.append(resumer('calculate_h2f_stats', durees, requetes))
+
+    # 5. Compte de résultat annuel
+    durees, requetes, _ = chronometrer(lambda: ecriture_model.get_compte_de_resultat(
+        user_id, f'{annee}-01-01', f'{annee}-12-31'), rep)
+    resultats.append(resumer('get_compte_de_resultat', durees, requetes))
+
+    # 6. Liste des transactions : première page, page profonde, dernière page
+    _, total = tx_model.get_all_user_transactions(user_id, page=1, per_page=20)
+    derniere_page = max(1, (total + 19) // 20)
+    for page in sorted({1, min(1000, derniere_page), derniere_page}):
+        durees, requetes, _ = chronometrer(
+            lambda: tx_model.get_all_user_transactions(user_id, page=page, per_page=20), rep)
+        resultats.append(resumer('get_all_user_transactions', durees, requetes, page=page, total=total))
+
+    # 7. Import CSV : la session est réinjectée avant chaque passage (la route la vide)
+    lignes = lignes_csv(args.lignes_csv, args.graine)
+    formulaire = {f'row_{i}_source': f'{comptes[2]}|compte_principal' for i in range(len(lignes))}
+
+    def preparer_import():
+        with client.session_transaction() as sess:
+            sess['column_mapping'] = {'date': 'date', 'montant': 'montant', 'type': 'type',
+                                      'description': 'description'}
+            sess['csv_rows_with_type'] = lignes
+            sess['comptes_possibles'] = [{'id': comptes[2], 'type': 'compte_principal'}]
+
+    durees, requetes, reponse = chronometrer(
+        lambda: client.post('/import/csv/final', data=formulaire), max(1, rep // 2), preparation=preparer_import)
+    resultats.append(resumer('import_csv', durees, requetes, lignes=len(lignes), statut_http=reponse.status_code))
+
+    sortie = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'revision': revision_git(),
+        'python': platform.python_version(),
+        'base': args.base,
+        'echelle': args.echelle,
+        'graine': args.graine,
+        'resultats': resultats,
+    }
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(sortie, f, indent=2, ensure_ascii=False)
+
+    print(f"{'opération':<30}{'meilleur ms':>14}{'médiane ms':>14}{'requêtes':>10}")
+    for r in resultats:
+        nom = r['operation'] + (f" p{r['page']}" if 'page' in r else '')
+        print(f"{nom:<30}{r['meilleur_ms']:>14.2f}{r['median_ms']:>14.2f}{r['requetes_sql']:>10}")
+    print(f"Résultats écrits dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du moteur de graphiques SVG (app/utils/svg_charts.py).
+
+Mesure le temps de rendu et la taille du SVG produit pour des séries
+journalières de 1 mois à 10 ans, pour chaque type de graphique.
+
+Usage :
+    python benchmarks/bench_svg_charts.py [--repetitions 20] [--json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def charger_moteur():
+    """Charge svg_charts sans importer le package app (et donc sans initialiser Flask)."""
+    chemin = os.path.join(RACINE, 'app', 'utils', 'svg_charts.py')
+    spec = importlib.util.spec_from_file_location('svg_charts', chemin)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generer_series(nb_jours: int, nb_series: int = 3, graine: int = 42):
+    rng = random.Random(graine)
+    debut = date(2015, 1, 1)
+    labels = [(debut + timedelta(days=i)).strftime('%d.%m') for i in range(nb_jours)]
+    series = {}
+    for s in range(nb_series):
+        solde, valeurs = 1000.0, []
+        for _ in range(nb_jours):
+            solde += rng.gauss(0, 50)
+            valeurs.append(round(solde, 2))
+        series[f'Compte {s + 1}'] = valeurs
+    return labels, series
+
+
+def chronometrer(fonction, repetitions: int):
+    meilleur = float('inf')
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='sortie JSON')
+    args = parser.parse_args()
+
+    sc = charger_moteur()
+    resultats = []
+    for nb_jours in (31, 365, 3 * 365, 10 * 365):
+        labels, series = generer_series(nb_jours)
+        noms = list(series)
+        cas = {
+            'lignes': lambda: sc.graphique_lignes(labels, series),
+            'barres': lambda: sc.graphique_barres(labels, series),
+            'barres_empilees': lambda: sc.graphique_barres(labels, series, empile=True),
+            'barres_opposees': lambda: sc.graphique_barres_opposees(labels, series[noms[0]], series[noms[1]]),
+            'barres_horizontales': lambda: sc.graphique_barres_horizontales(labels[:50], series[noms[0]][:50]),
+        }
+        for nom, fonction in cas.items():
+            duree, svg = chronometrer(fonction, args.repetitions)
+            resultats.append({
+                'graphique': nom,
+                'jours': nb_jours,
+                'ms': round(duree * 1000, 3),
+                'octets': len(svg),
+            })
+
+    if args.json:
+        print(json.dumps(resultats, indent=2))
+        return
+    print(f"{'graphique':<22}{'jours':>8}{'ms':>10}{'octets':>10}")
+    for r in resultats:
+        print(f"{r['graphique']:<22}{r['jours']:>8}{r['ms']:>10.3f}{r['octets']:>10}")
+
+
+if __name__ == '__main__':
+    main()
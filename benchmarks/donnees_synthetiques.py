@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Générateur de données synthétiques pour les benchmarks (base MySQL dédiée).
+
+Volumes à l'échelle 1.0 :
+    - 10 comptes principaux × 50 000 transactions
+    - 5 ans d'heures de travail avec plages horaires
+    - 20 employés avec contrats, cotisations, indemnités et barèmes
+    - 100 000 écritures comptables
+
+Les insertions massives passent par executemany (INSERT multi-lignes pymysql) ;
+les heures passent par HeureTravail.create_or_update_batch pour produire les
+mêmes plages horaires que l'application. La génération est déterministe
+pour une graine donnée.
+"""
+import logging
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LOT = 5000
+NB_COMPTES = 10
+NB_TRANSACTIONS_PAR_COMPTE = 50000
+NB_ANNEES_HEURES = 5
+NB_EMPLOYES = 20
+NB_ECRITURES = 100000
+NB_CATEGORIES_COMPTABLES = 40
+NB_CATEGORIES_TRANSACTIONS = 15
+
+EMAIL_BENCHMARK = 'benchmark@example.invalid'
+
+DESCRIPTIONS = [
+    'Migros', 'Coop', 'CFF abonnement', 'Loyer', 'Salaire', 'Swisscom', 'Assurance maladie',
+    'Pharmacie', 'Restaurant', 'Essence', 'Impôts', 'Retrait bancomat', 'Twint', 'Amazon',
+    'Électricité', 'Fitness', 'Librairie', 'Cinéma', 'Boulangerie', 'Garage',
+]
+
+PRENOMS = ['Anna', 'Luca', 'Noah', 'Mia', 'Léa', 'Elias', 'Emma', 'Louis', 'Sara', 'Nina']
+NOMS = ['Müller', 'Meier', 'Schmid', 'Keller', 'Weber', 'Huber', 'Favre', 'Rochat', 'Blanc', 'Junod']
+
+
+def par_lots(lignes: List, taille: int = TAILLE_LOT):
+    for i in range(0, len(lignes), taille):
+        yield lignes[i:i + taille]
+
+
+class GenerateurDonnees:
+    """
+    Remplit une base de benchmark à partir de zéro.
+    `echelle` multiplie les volumes (0.01 pour un essai rapide, 1.0 pour la référence).
+    """
+
+    def __init__(self, db, graine: int = 42, echelle: float = 1.0):
+        self.db = db
+        self.rng = random.Random(graine)
+        self.echelle = echelle
+        self.aujourd_hui = date.today()
+
+    def _volume(self, nombre: int) -> int:
+        return max(1, int(nombre * self.echelle))
+
+    # --- Schéma ---
+
+    def preparer_schema(self) -> None:
+        self.db.create_tables()
+
+    def utilisateur_existant(self):
+        with self.db.get_cursor() as cursor:
+            cursor.execute("SELECT id FROM utilisateurs WHERE email = %s", (EMAIL_BENCHMARK,))
+            row = cursor.fetchone()
+        return row['id'] if row else None
+
+    # --- Génération ---
+
+    def generer(self) -> Dict:
+        """Génère l'ensemble du jeu de données et retourne les identifiants utiles aux mesures."""
+        self.preparer_schema()
+        user_id = self._creer_utilisateur()
+        comptes = self._creer_comptes(user_id)
+        nb_transactions = self._creer_transactions(user_id, comptes)
+        self._creer_categories_transactions(user_id)
+        employes, contrats = self._creer_employes_contrats(user_id)
+        self._creer_cotisations_indemnites(user_id, contrats)
+        nb_heures = self._creer_heures(user_id, contrats)
+        nb_ecritures = self._creer_ecritures(user_id, comptes)
+        resume = {
+            'user_id': user_id,
+            'comptes': comptes,
+            'contrats': contrats,
+            'employes': employes,
+            'transactions': nb_transactions,
+            'heures': nb_heures,
+            'ecritures': nb_ecritures,
+        }
+        logger.info("Jeu de données généré : %s", {k: v for k, v in resume.items() if isinstance(v, int)})
+        return resume
+
+    def _creer_utilisateur(self) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO utilisateurs (nom, prenom, email, mot_de_passe)
+                VALUES ('Benchmark', 'Utilisateur', %s, '!')
+            """, (EMAIL_BENCHMARK,))
+            user_id = cursor.lastrowid
+            cursor.execute("""
+                INSERT INTO banques (nom, code_banque) VALUES ('Banque benchmark', %s)
+            """, (f"BENCH{user_id}",))
+            self.banque_id = cursor.lastrowid
+        return user_id
+
+    def _creer_comptes(self, user_id: int) -> List[int]:
+        comptes = []
+        with self.db.get_cursor() as cursor:
+            for i in range(NB_COMPTES):
+                cursor.execute("""
+                    INSERT INTO comptes_principaux
+                    (utilisateur_id, banque_id, nom_compte, iban, solde, solde_initial, date_ouverture)
+                    VALUES (%s, %s, %s, %s, 0, %s, %s)
+                """, (user_id, self.banque_id, f"Compte {i + 1}", f"CH93BENCH{user_id:06d}{i:06d}",
+                      Decimal('1000.00'), self.aujourd_hui - timedelta(days=365 * 10)))
+                comptes.append(cursor.lastrowid)
+        return comptes
+
+    def _creer_transactions(self, user_id: int, comptes: List[int]) -> int:
+        """Transactions datées sur 10 ans, soldes_apres cohérents, solde final reporté sur le compte."""
+        nb_par_compte = self._volume(NB_TRANSACTIONS_PAR_COMPTE)
+        debut = datetime.combine(self.aujourd_hui - timedelta(days=365 * 10), datetime.min.time())
+        etendue = int((datetime.now() - debut).total_seconds())
+        total = 0
+        for compte_id in comptes:
+            dates = sorted(debut + timedelta(seconds=self.rng.randrange(etendue)) for _ in range(nb_par_compte))
+            solde = Decimal('1000.00')
+            lignes = []
+            for n, date_tx in enumerate(dates):
+                depot = self.rng.random() < 0.45
+                montant = Decimal(self.rng.randint(100, 250000)) / 100
+                solde += montant if depot else -montant
+                lignes.append((
+                    compte_id, 'depot' if depot else 'retrait', montant,
+                    self.rng.choice(DESCRIPTIONS), f"BENCH-{compte_id}-{n}", user_id, date_tx, solde
+                ))
+            with self.db.get_cursor() as cursor:
+                for lot in par_lots(lignes):
+                    cursor.executemany("""
+                        INSERT INTO transactions
+                        (compte_principal_id, type_transaction, montant, description, reference,
+                         utilisateur_id, date_transaction, solde_apres)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, lot)
+                cursor.execute("UPDATE comptes_principaux SET solde = %s WHERE id = %s", (solde, compte_id))
+            total += len(lignes)
+            logger.info("Compte %s : %d transactions", compte_id, len(lignes))
+        return total
+
+    def _creer_categories_transactions(self, user_id: int) -> None:
+        with self.db.get_cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO categories_transactions (utilisateur_id, nom, type_categorie)
+                VALUES (%s, %s, %s)
+            """, [(user_id, f"Catégorie {i + 1}", self.rng.choice(['Revenu', 'Dépense']))
+                  for i in range(NB_CATEGORIES_TRANSACTIONS)])
+
+    def _creer_employes_contrats(self, user_id: int):
+        """Un contrat personnel (employeur « Employeur bench ») et un contrat par employé."""
+        employes, contrats = [], []
+        debut_contrats = date(self.aujourd_hui.year - NB_ANNEES_HEURES, 1, 1)
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO contrats (user_id, employe_id, employeur, heures_hebdo, date_debut, salaire_horaire)
+                VALUES (%s, NULL, 'Employeur bench', 42, %s, 28.50)
+            """, (user_id, debut_contrats))
+            contrats.append({'id': cursor.lastrowid, 'employeur': 'Employeur bench', 'employe_id': None})
+
+            for i in range(NB_EMPLOYES):
+                cursor.execute("""
+                    INSERT INTO employes (user_id, nom, prenom, genre, date_de_naissance)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (user_id, self.rng.choice(NOMS), self.rng.choice(PRENOMS), self.rng.choice('MF'),
+                      date(1970 + self.rng.randrange(35), self.rng.randint(1, 12), self.rng.randint(1, 28))))
+                employe_id = cursor.lastrowid
+                employes.append(employe_id)
+                cursor.execute("""
+                    INSERT INTO contrats (user_id, employe_id, employeur, heures_hebdo, date_debut, salaire_horaire)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (user_id, employe_id, f"Entreprise {i % 4 + 1}", self.rng.choice([20, 30, 42]),
+                      debut_contrats, Decimal(self.rng.randint(2400, 4500)) / 100))
+                contrats.append({'id': cursor.lastrowid, 'employeur': f"Entreprise {i % 4 + 1}",
+                                 'employe_id': employe_id})
+        return employes, contrats
+
+    def _creer_cotisations_indemnites(self, user_id: int, contrats: List[Dict]) -> None:
+        annees = range(self.aujourd_hui.year - NB_ANNEES_HEURES, self.aujourd_hui.year + 1)
+        with self.db.get_cursor() as cursor:
+            types_cotisation, types_indemnite = [], []
+            for nom in ('AVS', 'AC', 'AANP', 'LPP'):
+                cursor.execute("INSERT INTO types_cotisation (user_id, nom) VALUES (%s, %s)", (user_id, nom))
+                types_cotisation.append(cursor.lastrowid)
+            for nom in ('Vacances', 'Jours fériés', 'Repas'):
+                cursor.execute("INSERT INTO types_indemnite (user_id, nom) VALUES (%s, %s)", (user_id, nom))
+                types_indemnite.append(cursor.lastrowid)
+
+            # Barèmes à 3 tranches par type
+            for table, colonne, types in (('baremes_cotisation', 'type_cotisation_id', types_cotisation),
+                                          ('baremes_indemnite', 'type_indemnite_id', types_indemnite)):
+                cursor.executemany(f"""
+                    INSERT INTO {table} ({colonne}, seuil_min, seuil_max, montant_fixe, taux, type_valeur, ordre)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, [(t, seuil_min, seuil_max, 0, taux, 'taux', ordre)
+                      for t in types
+                      for ordre, (seuil_min, seuil_max, taux) in enumerate(
+                          [(0, 2000, 1.5), (2000, 6000, 3.0), (6000, None, 4.5)])])
+
+            cursor.executemany("""
+                INSERT INTO cotisations_contrat (contrat_id, type_cotisation_id, taux, base_calcul, annee)
+                VALUES (%s, %s, %s, 'brut', %s)
+            """, [(c['id'], t, Decimal(self.rng.randint(100, 600)) / 100, a)
+                  for c in contrats for t in types_cotisation for a in annees])
+            cursor.executemany("""
+                INSERT INTO indemnites_contrat (contrat_id, type_indemnite_id, taux, base_calcul, annee)
+                VALUES (%s, %s, %s, 'brut', %s)
+            """, [(c['id'], t, Decimal(self.rng.randint(100, 1000)) / 100, a)
+                  for c in contrats for t in types_indemnite for a in annees])
+
+    def _creer_heures(self, user_id: int, contrats: List[Dict]) -> int:
+        """Journées ouvrées sur NB_ANNEES_HEURES ans, deux plages par jour, par lots mensuels."""
+        from app.models import HeureTravail
+
+        heure_model = HeureTravail(self.db)
+        debut = date(self.aujourd_hui.year - NB_ANNEES_HEURES, 1, 1)
+        nb_jours = (self.aujourd_hui - debut).days
+        # À petite échelle, seul le contrat personnel reçoit des heures
+        nb_contrats = max(1, int(len(contrats) * min(1.0, self.echelle)))
+        total = 0
+        for contrat in contrats[:nb_contrats]:
+            jours_mois, mois_courant = [], None
+            for offset in range(nb_jours):
+                jour = debut + timedelta(days=offset)
+                if jour.weekday() >= 5:
+                    continue
+                if mois_courant is not None and (jour.year, jour.month) != mois_courant:
+                    total += heure_model.create_or_update_batch(jours_mois)
+                    jours_mois = []
+                mois_courant = (jour.year, jour.month)
+                arrivee = 7 * 60 + self.rng.randrange(0, 90, 5)
+                pause = 12 * 60 + self.rng.randrange(0, 30, 5)
+                reprise = pause + self.rng.choice([30, 45, 60])
+                depart = 16 * 60 + self.rng.randrange(0, 180, 5)
+                jours_mois.append({
+                    'date': jour.isoformat(),
+                    'user_id': user_id,
+                    'employe_id': contrat['employe_id'],
+                    'employeur': contrat['employeur'],
+                    'id_contrat': contrat['id'],
+                    'type_heures': 'reelles',
+                    'vacances': False,
+                    'plages': [
+                        {'debut': f"{arrivee // 60:02d}:{arrivee % 60:02d}", 'fin': f"{pause // 60:02d}:{pause % 60:02d}"},
+                        {'debut': f"{reprise // 60:02d}:{reprise % 60:02d}", 'fin': f"{depart // 60:02d}:{depart % 60:02d}"},
+                    ],
+                })
+            if jours_mois:
+                total += heure_model.create_or_update_batch(jours_mois)
+            logger.info("Contrat %s : heures générées", contrat['id'])
+        return total
+
+    def _creer_ecritures(self, user_id: int, comptes: List[int]) -> int:
+        nb = self._volume(NB_ECRITURES)
+        with self.db.get_cursor() as cursor:
+            categories = []
+            for i in range(NB_CATEGORIES_COMPTABLES):
+                type_compte = 'Charge' if i % 2 else 'Revenus'
+                cursor.execute("""
+                    INSERT INTO categories_comptables (numero, nom, type_compte, utilisateur_id)
+                    VALUES (%s, %s, %s, %s)
+                """, (f"{user_id % 1000:03d}{i:03d}", f"Catégorie comptable {i + 1}", type_compte, user_id))
+                categories.append(cursor.lastrowid)
+
+            debut = self.aujourd_hui - timedelta(days=365 * 5)
+            lignes = []
+            for n in range(nb):
+                montant = Decimal(self.rng.randint(500, 500000)) / 100
+                taux = self.rng.choice([Decimal('0'), Decimal('2.6'), Decimal('8.1')])
+                htva = (montant / (1 + taux / 100)).quantize(Decimal('0.01'))
+                lignes.append((
+                    debut + timedelta(days=self.rng.randrange(365 * 5)),
+                    self.rng.choice(comptes), self.rng.choice(categories), montant, htva,
+                    self.rng.choice(DESCRIPTIONS), f"EC-{n}",
+                    self.rng.choice(['depense', 'recette']), taux, montant - htva, user_id,
+                    self.rng.choices(['validée', 'pending', 'rejetée'], weights=[8, 1, 1])[0],
+                ))
+            for lot in par_lots(lignes):
+                cursor.executemany("""
+                    INSERT INTO ecritures_comptables
+                    (date_ecriture, compte_bancaire_id, categorie_id, montant, montant_htva,
+                     description, reference, type_ecriture, tva_taux, tva_montant, utilisateur_id, statut)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, lot)
+        return nb
@@ -17,3 +17,43 @@ DB_CONFIG = {
     'autocommit': True,
     'cursorclass': pymysql.cursors.DictCursor  # sous forme de chaîne pour éviter dépendance ici
 }
+
+# Installation mono-utilisateur (Raspberry Pi, NAS) : DB_BACKEND=sqlite remplace MySQL
+# par un fichier SQLite local, sans serveur ni connexion réseau
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql')
+if DB_BACKEND == 'sqlite':
+    DB_CONFIG = {
+        'backend': 'sqlite',
+        'path': os.environ.get('DB_SQLITE_PATH', '/var/www/webroot/ROOT/data/appbancaire.sqlite3'),
+    }
+
+# Journalisation : niveau global, niveaux par module ("app.models=WARNING,app.routes.banking=INFO")
+# et échantillonnage des messages DEBUG répétitifs (1 sur N par ligne d'appel)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.environ.get('LOG_LEVELS', 'app.models=INFO,app.routes.banking=INFO')
+LOG_SAMPLING = int(os.environ.get('LOG_SAMPLING', 10))
+
+# Instrumentation SQL par requête (page /admin/performances ; en-têtes Server-Timing / X-SQL-Queries
+# seulement en mode debug ou pour un administrateur connecté). Désactivée par défaut
+SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '0') == '1'
+# Administrateurs (emails séparés par des virgules) : en-têtes SQL et page /admin/performances
+ADMIN_EMAILS = os.environ.get('ADMIN_EMAILS', '')
+SQL_BARRE_DEBUG = os.environ.get('SQL_BARRE_DEBUG', '0') == '1'
+SQL_SEUIL_LENT_MS = float(os.environ.get('SQL_SEUIL_LENT_MS', 100))
+# Mémo des lectures de modèles par requête (app/utils/memo_requete.py), vidé à chaque écriture
+MEMO_REQUETE = os.environ.get('MEMO_REQUETE', '1') == '1'
+
+# Envoi des fichiers par le serveur frontal plutôt que par Python :
+# USE_X_SENDFILE=1 pour Apache mod_xsendfile, X_ACCEL_REDIRECT=/_interne pour nginx (voir app/utils/assets_statiques.py)
+USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '0') == '1'
+X_ACCEL_REDIRECT = os.environ.get('X_ACCEL_REDIRECT', '')
+# Durée de cache navigateur des fichiers de /static/uploads (logos : noms réutilisés, revalidés par ETag)
+UPLOADS_MAX_AGE = int(os.environ.get('UPLOADS_MAX_AGE', 300))
+
+# Identifiant de build inclus dans les ETag des pages (app/utils/reponses_conditionnelles.py) ;
+# vide : calculé au démarrage à partir des sources, templates et du manifeste des assets
+APP_VERSION = os.environ.get('APP_VERSION', '')
+
+# Compression gzip/brotli des réponses HTML, JSON, SVG et CSV au-delà de COMPRESSION_SEUIL octets
+COMPRESSION = os.environ.get('COMPRESSION', '1') == '1'
+COMPRESSION_SEUIL = int(os.environ.get('COMPRESSION_SEUIL', 1024))
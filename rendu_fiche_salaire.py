@@ -0,0 +1,101 @@
+"""
+Rendu PDF des fiches de salaire, hors du paquet app.
+
+Les lots de fiches sont rendus dans un pool de processus 'spawn'
+(app/utils/pdf_salaire.py). Un processus fils importe le module de la fonction qu'il
+exécute : si elle vivait dans app.utils, chaque fils réimporterait le paquet app et
+rejouerait app/__init__.py (journalisation sur app.log, création de l'application,
+blueprints, create_tables). Ce module, à côté de config.py, n'importe que ReportLab.
+"""
+import io
+
+MOIS_NOMS = ["", "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
+             "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
+
+
+def rendre_fiche(fiche: dict) -> bytes:
+    """
+    Construit le PDF d'une fiche préparée par app.utils.pdf_salaire.preparer_fiche().
+    Fonction pure (ni Flask ni base de données) : exécutable dans un processus du pool.
+    """
+    # ReportLab n'est importé qu'au premier rendu (démarrage de l'application plus rapide)
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    elements = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=14,
+        alignment=1
+    )
+    entreprise = fiche['entreprise']
+    employe_info = fiche['employe']
+
+    # Logo
+    if fiche.get('logo'):
+        img = Image(io.BytesIO(fiche['logo']), width=1.5*inch, height=1.5*inch)
+        elements.append(img)
+        elements.append(Spacer(1, 12))
+
+    # En-tête entreprise
+    elements.append(Paragraph(entreprise.get('nom') or 'Votre entreprise', title_style))
+    if entreprise.get('rue'):
+        elements.append(Paragraph(entreprise['rue'], styles['Normal']))
+    cp_commune = f"{entreprise.get('code_postal', '')} {entreprise.get('commune', '')}".strip()
+    if cp_commune:
+        elements.append(Paragraph(cp_commune, styles['Normal']))
+
+    elements.append(Spacer(1, 24))
+
+    # Titre
+    elements.append(Paragraph(f"Fiche de salaire – {MOIS_NOMS[fiche['mois']]} {fiche['annee']}", styles['Heading1']))
+
+    # Info employé (si fourni)
+    nom_employe = f"{employe_info.get('prenom', '')} {employe_info.get('nom', '')}".strip()
+    if nom_employe:
+        elements.append(Paragraph(f"Employé : {nom_employe}", styles['Normal']))
+    if employe_info.get('employeur'):
+        elements.append(Paragraph(f"Employeur : {employe_info['employeur']}", styles['Normal']))
+
+    elements.append(Spacer(1, 18))
+
+    # Tableau
+    data = [
+        ["Élément", "Montant (CHF)"],
+        ["Heures réelles", f"{fiche['heures_reelles']:.2f} h"],
+        ["Salaire brut", f"{fiche['salaire_brut']:.2f}"],
+        ["+ Indemnités", f"+{fiche['total_indemnites']:.2f}"],
+        ["- Cotisations", f"-{fiche['total_cotisations']:.2f}"],
+        ["= Salaire net", f"{fiche['salaire_net']:.2f}"],
+    ]
+    table = Table(data, colWidths=[3*inch, 1.5*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(table)
+    elements.append(Spacer(1, 24))
+
+    # Acomptes (logique métier)
+    elements.append(Paragraph(f"Acompte du 25 : {fiche['acompte_25']:.2f} CHF", styles['Normal']))
+    elements.append(Paragraph(f"Acompte du 10 (salaire net − acompte 25) : {fiche['acompte_10']:.2f} CHF", styles['Normal']))
+    elements.append(Spacer(1, 12))
+
+    # Signature
+    elements.append(Paragraph("_________________________", styles['Normal']))
+    elements.append(Paragraph("Signature employeur", styles['Normal']))
+
+    doc.build(elements)
+    return buffer.getvalue()